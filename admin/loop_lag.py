@@ -0,0 +1,396 @@
+# admin/loop_lag.py
+"""
+Monitor de lag do event loop com atribuição da chamada bloqueante.
+
+PERFORMANCE: Chamadas síncronas dentro de handlers async (PyMuPDF, soffice via
+subprocess.run, Session síncrona, time.sleep em retries, pandas lendo Excel)
+param o event loop inteiro: a exportação pesada de um usuário atrasa a request
+de todos os outros, e nada nos logs por request mostra isso.
+
+Funcionamento:
+- Amostrador (task no loop): dorme `periodo` e mede com quanto atraso o loop
+  o acorda (drift do callback agendado); a cada ciclo atualiza um batimento
+- Watchdog (thread): se o batimento atrasar mais que `limite_ms`, captura a
+  pilha da thread do loop com sys._current_frames() - ainda DENTRO da chamada
+  bloqueante
+- Travamentos são agregados por (local da chamada, rota). A rota vem do
+  perf_ctx da task que estava rodando: uma task factory guarda, para cada task
+  criada, as métricas da request que a criou
+- Exposto no dashboard (/admin/api/performance/loop-lag) e no /metrics
+
+Overhead: uma task acordando a cada `periodo`, uma thread acordando a cada
+limite/2 e uma entrada em WeakKeyDictionary por task criada. A pilha só é
+capturada quando há travamento; a agregação é limitada a `max_locais`.
+
+USO:
+    from admin.loop_lag import iniciar_monitor_lag, parar_monitor_lag, get_monitor_lag
+
+    await iniciar_monitor_lag()   # lifespan (startup)
+    get_monitor_lag().stats()
+    await parar_monitor_lag()     # lifespan (shutdown)
+
+CONFIGURAÇÃO (variáveis de ambiente):
+    LOOP_LAG_HABILITADO    true/false (default: true)
+    LOOP_LAG_PERIODO_MS    intervalo do amostrador (default: 100)
+    LOOP_LAG_LIMITE_MS     atraso que conta como travamento (default: 100)
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from admin.perf_context import perf_ctx
+
+logger = logging.getLogger(__name__)
+
+# Buckets do histograma de lag (segundos)
+BUCKETS_LAG = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Raiz do projeto: o "local" é o frame mais interno que pertence ao projeto
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Frames guardados por local (do mais externo para o mais interno)
+MAX_FRAMES_PILHA = 12
+
+LOCAL_NAO_CAPTURADO = "(nao capturado)"
+
+
+@dataclass
+class LocalBloqueio:
+    """Travamentos agregados de um local de chamada em uma rota."""
+    local: str
+    rota: str
+    ocorrencias: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    ultimo_em: float = 0.0  # time.time()
+    pilha: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "local": self.local,
+            "rota": self.rota,
+            "ocorrencias": self.ocorrencias,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "medio_ms": round(self.total_ms / self.ocorrencias, 1) if self.ocorrencias else 0,
+            "ultimo_em": self.ultimo_em,
+            "pilha": self.pilha,
+        }
+
+
+@dataclass
+class _Captura:
+    seq: int
+    local: str
+    rota: str
+    pilha: List[str]
+
+
+class MonitorLagLoop:
+    """Amostrador de lag do event loop + watchdog que captura a pilha bloqueante."""
+
+    def __init__(
+        self,
+        periodo_s: float = 0.1,
+        limite_ms: float = 100.0,
+        max_locais: int = 100,
+        habilitado: bool = True,
+        raiz: str = RAIZ_PROJETO,
+    ):
+        self.periodo_s = periodo_s
+        self.limite_ms = limite_ms
+        self.max_locais = max_locais
+        self.habilitado = habilitado
+        self.raiz = raiz
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_loop: Optional[int] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self._fabrica_anterior = None
+        self._metricas_task: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+        # Estado compartilhado amostrador -> watchdog
+        self._batimento = 0.0
+        self._seq = 0
+        self._captura: Optional[_Captura] = None
+
+        self._zerar()
+
+    @classmethod
+    def from_env(cls) -> "MonitorLagLoop":
+        return cls(
+            periodo_s=float(os.getenv("LOOP_LAG_PERIODO_MS", "100")) / 1000,
+            limite_ms=float(os.getenv("LOOP_LAG_LIMITE_MS", "100")),
+            habilitado=os.getenv("LOOP_LAG_HABILITADO", "true").lower() == "true",
+        )
+
+    def _zerar(self) -> None:
+        self._amostras = 0
+        self._soma_lag_ms = 0.0
+        self._max_lag_ms = 0.0
+        self._buckets = [0] * len(BUCKETS_LAG)
+        self._travamentos = 0
+        self._bloqueado_ms = 0.0
+        self._locais: Dict[Tuple[str, str], LocalBloqueio] = {}
+
+    @property
+    def ativo(self) -> bool:
+        return self._tarefa is not None and not self._tarefa.done()
+
+    # ==========================================
+    # Ciclo de vida
+    # ==========================================
+
+    async def iniciar(self) -> None:
+        """Inicia amostrador e watchdog no loop atual."""
+        if not self.habilitado or self.ativo:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_loop = threading.get_ident()
+        self._parar.clear()
+
+        self._fabrica_anterior = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._fabrica_task)
+
+        self._batimento = time.perf_counter()
+        self._tarefa = asyncio.create_task(self._amostrar(), name="monitor-lag-loop")
+        self._watchdog = threading.Thread(target=self._vigiar, name="monitor-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"[LoopLag] Monitor iniciado (periodo={self.periodo_s * 1000:.0f}ms, limite={self.limite_ms:.0f}ms)")
+
+    async def parar(self) -> None:
+        """Para o monitor e restaura a task factory anterior."""
+        self._parar.set()
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+        if self._loop is not None and self._loop.get_task_factory() == self._fabrica_task:
+            self._loop.set_task_factory(self._fabrica_anterior)
+        self._loop = None
+
+    def _fabrica_task(self, loop, coro, **kwargs):
+        """Task factory: associa cada task às métricas (rota) da request que a criou."""
+        if self._fabrica_anterior is not None:
+            task = self._fabrica_anterior(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        try:
+            contexto = kwargs.get("context")
+            metricas = contexto.run(perf_ctx.get_metrics) if contexto is not None else perf_ctx.get_metrics()
+            if metricas is not None:
+                self._metricas_task[task] = metricas
+        except RuntimeError:
+            pass
+        return task
+
+    # ==========================================
+    # Amostrador (event loop) e watchdog (thread)
+    # ==========================================
+
+    async def _amostrar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._seq += 1
+            self._batimento = time.perf_counter()
+            inicio = loop.time()
+            await asyncio.sleep(self.periodo_s)
+            lag_ms = max(0.0, (loop.time() - inicio - self.periodo_s) * 1000)
+            self._registrar(lag_ms, self._seq)
+
+    def _vigiar(self) -> None:
+        intervalo = max(0.005, self.limite_ms / 2000)
+        while not self._parar.wait(intervalo):
+            seq = self._seq
+            atraso_ms = (time.perf_counter() - self._batimento - self.periodo_s) * 1000
+            if atraso_ms < self.limite_ms:
+                continue
+            captura = self._captura
+            if captura is not None and captura.seq == seq:
+                continue  # Este travamento já foi capturado
+            try:
+                self._captura = self._capturar(seq)
+            except Exception as e:
+                logger.debug(f"[LoopLag] Falha ao capturar pilha: {e}")
+
+    def _capturar(self, seq: int) -> Optional[_Captura]:
+        """Captura a pilha atual da thread do event loop."""
+        frame = sys._current_frames().get(self._thread_loop)
+        if frame is None:
+            return None
+        # Do mais interno para o mais externo; lookup_lines=False evita ler os fontes
+        resumo = traceback.StackSummary.extract(traceback.walk_stack(frame), limit=60, lookup_lines=False)
+        del frame
+        return _Captura(
+            seq=seq,
+            local=self._local_chamada(resumo),
+            rota=self._rota_atual(),
+            pilha=[self._formatar(f) for f in reversed(resumo[:MAX_FRAMES_PILHA])],
+        )
+
+    def _local_chamada(self, resumo: traceback.StackSummary) -> str:
+        """Frame mais interno do projeto (fora de site-packages e deste módulo)."""
+        for f in resumo:
+            arquivo = os.path.abspath(f.filename)
+            if arquivo.startswith(self.raiz) and "site-packages" not in arquivo and arquivo != os.path.abspath(__file__):
+                return self._formatar(f)
+        return self._formatar(resumo[0]) if resumo else LOCAL_NAO_CAPTURADO
+
+    def _formatar(self, f: traceback.FrameSummary) -> str:
+        arquivo = os.path.abspath(f.filename)
+        if arquivo.startswith(self.raiz):
+            arquivo = os.path.relpath(arquivo, self.raiz)
+        return f"{arquivo}:{f.lineno} ({f.name})"
+
+    def _rota_atual(self) -> str:
+        """Rota da request cuja task está rodando no loop."""
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        metricas = self._metricas_task.get(task) if task is not None else None
+        return metricas.route if metricas is not None and metricas.route else "-"
+
+    def _registrar(self, lag_ms: float, seq: int) -> None:
+        with self._lock:
+            self._amostras += 1
+            self._soma_lag_ms += lag_ms
+            self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+            for i, limite in enumerate(BUCKETS_LAG):
+                if lag_ms / 1000 <= limite:
+                    self._buckets[i] += 1
+                    break
+
+            if lag_ms < self.limite_ms:
+                return
+
+            captura = self._captura
+            if captura is None or captura.seq != seq:
+                captura = _Captura(seq=seq, local=LOCAL_NAO_CAPTURADO, rota="-", pilha=[])
+            self._captura = None
+            self._travamentos += 1
+            self._bloqueado_ms += lag_ms
+            self._agregar(captura, lag_ms)
+
+        logger.warning(f"[LoopLag] Event loop bloqueado {lag_ms:.0f}ms em {captura.local} (rota={captura.rota})")
+
+    def _agregar(self, captura: _Captura, lag_ms: float) -> None:
+        chave = (captura.local, captura.rota)
+        item = self._locais.get(chave)
+        if item is None:
+            if len(self._locais) >= self.max_locais:
+                # Descarta o local com menos tempo bloqueado
+                menor = min(self._locais, key=lambda k: self._locais[k].total_ms)
+                del self._locais[menor]
+            item = self._locais[chave] = LocalBloqueio(local=captura.local, rota=captura.rota)
+        item.ocorrencias += 1
+        item.total_ms += lag_ms
+        item.max_ms = max(item.max_ms, lag_ms)
+        item.ultimo_em = time.time()
+        if captura.pilha:
+            item.pilha = captura.pilha
+
+    # ==========================================
+    # Consulta
+    # ==========================================
+
+    def stats(self, top: int = 20) -> dict:
+        """Resumo do lag e dos locais que mais bloquearam o loop."""
+        with self._lock:
+            locais = sorted(self._locais.values(), key=lambda item: item.total_ms, reverse=True)
+            return {
+                "ativo": self.ativo,
+                "periodo_ms": round(self.periodo_s * 1000, 1),
+                "limite_ms": self.limite_ms,
+                "amostras": self._amostras,
+                "lag_medio_ms": round(self._soma_lag_ms / self._amostras, 2) if self._amostras else 0,
+                "lag_max_ms": round(self._max_lag_ms, 1),
+                "travamentos": self._travamentos,
+                "bloqueado_ms": round(self._bloqueado_ms, 1),
+                "locais": [item.to_dict() for item in locais[:top]],
+            }
+
+    def reset(self) -> None:
+        """Zera contadores e locais agregados."""
+        with self._lock:
+            self._zerar()
+
+    def texto_prometheus(self, top: int = 20) -> str:
+        """Métricas em formato Prometheus (anexadas ao /metrics)."""
+        with self._lock:
+            lines = []
+
+            lines.append("# HELP portal_pge_event_loop_lag_seconds Atraso do event loop em acordar o amostrador")
+            lines.append("# TYPE portal_pge_event_loop_lag_seconds histogram")
+            acumulado = 0
+            for bucket, quantidade in zip(BUCKETS_LAG, self._buckets):
+                acumulado += quantidade
+                lines.append(f'portal_pge_event_loop_lag_seconds_bucket{{le="{bucket}"}} {acumulado}')
+            lines.append(f'portal_pge_event_loop_lag_seconds_bucket{{le="+Inf"}} {self._amostras}')
+            lines.append(f"portal_pge_event_loop_lag_seconds_sum {self._soma_lag_ms / 1000:.4f}")
+            lines.append(f"portal_pge_event_loop_lag_seconds_count {self._amostras}")
+            lines.append("")
+
+            lines.append("# HELP portal_pge_event_loop_travamentos_total Atrasos acima do limite")
+            lines.append("# TYPE portal_pge_event_loop_travamentos_total counter")
+            lines.append(f"portal_pge_event_loop_travamentos_total {self._travamentos}")
+            lines.append("")
+
+            lines.append("# HELP portal_pge_event_loop_bloqueio_seconds_total Tempo bloqueado por local e rota")
+            lines.append("# TYPE portal_pge_event_loop_bloqueio_seconds_total counter")
+            locais = sorted(self._locais.values(), key=lambda item: item.total_ms, reverse=True)
+            for item in locais[:top]:
+                local = item.local.replace("\\", "\\\\").replace('"', '\\"')
+                rota = item.rota.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(
+                    f'portal_pge_event_loop_bloqueio_seconds_total{{local="{local}",rota="{rota}"}} {item.total_ms / 1000:.3f}'
+                )
+            lines.append("")
+
+            return "\n".join(lines)
+
+
+_monitor_lag: Optional[MonitorLagLoop] = None
+_monitor_lag_lock = threading.Lock()
+
+
+def get_monitor_lag() -> MonitorLagLoop:
+    """Retorna o monitor de lag do processo."""
+    global _monitor_lag
+    if _monitor_lag is None:
+        with _monitor_lag_lock:
+            if _monitor_lag is None:
+                _monitor_lag = MonitorLagLoop.from_env()
+    return _monitor_lag
+
+
+async def iniciar_monitor_lag() -> MonitorLagLoop:
+    """Inicia o monitor no event loop atual (chamar no startup)."""
+    monitor = get_monitor_lag()
+    await monitor.iniciar()
+    return monitor
+
+
+async def parar_monitor_lag() -> None:
+    """Para o monitor (chamar no shutdown)."""
+    if _monitor_lag is not None:
+        await _monitor_lag.parar()
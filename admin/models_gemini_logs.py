@@ -47,6 +47,7 @@ class GeminiApiLog(Base):
 
     # Response info
     response_tokens = Column(Integer, nullable=True)  # Tokens na resposta
+    cached_tokens = Column(Integer, nullable=True)  # Tokens do prompt servidos do cache de contexto
     success = Column(Boolean, nullable=False, index=True)  # Se a chamada foi bem-sucedida
     cached = Column(Boolean, default=False)  # Se veio do cache
     error = Column(String(500), nullable=True)  # Mensagem de erro (se houver)
@@ -94,6 +95,7 @@ class GeminiApiLog(Base):
             "temperature": self.temperature,
             "thinking_level": self.thinking_level,
             "response_tokens": self.response_tokens,
+            "cached_tokens": self.cached_tokens,
             "success": self.success,
             "cached": self.cached,
             "error": self.error,
@@ -655,6 +655,37 @@ async def get_cache_stats(
     }
 
 
+@router.get("/loop-lag")
+async def get_loop_lag(
+    top: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(require_admin)
+):
+    """
+    Retorna o lag do event loop e os locais que mais o bloquearam.
+
+    Cada local vem agregado por rota, com a pilha capturada durante o
+    travamento (admin/loop_lag.py).
+    """
+    from admin.loop_lag import get_monitor_lag
+
+    return get_monitor_lag().stats(top=top)
+
+
+@router.post("/loop-lag/reset")
+async def reset_loop_lag(
+    current_user: User = Depends(require_admin)
+):
+    """Zera os contadores do monitor de lag do event loop."""
+    from admin.loop_lag import get_monitor_lag
+
+    get_monitor_lag().reset()
+
+    return {
+        "success": True,
+        "message": "Contadores de lag zerados"
+    }
+
+
 @router.post("/cache-invalidate")
 async def invalidate_cache(
     current_user: User = Depends(require_admin)
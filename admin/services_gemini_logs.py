@@ -82,6 +82,7 @@ def log_gemini_call(
             temperature=temperature,
             thinking_level=thinking_level,
             response_tokens=metrics.response_tokens if hasattr(metrics, 'response_tokens') else None,
+            cached_tokens=metrics.cached_tokens if hasattr(metrics, 'cached_tokens') else None,
             success=metrics.success if hasattr(metrics, 'success') else True,
             cached=metrics.cached if hasattr(metrics, 'cached') else False,
             error=metrics.error[:500] if hasattr(metrics, 'error') and metrics.error else None,
@@ -7,10 +7,12 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, Integer
 
 from admin.models_request_perf import RequestPerfLog
+from database.connection import async_db_context
 
 logger = logging.getLogger(__name__)
 
@@ -56,17 +58,43 @@ def log_request_perf(
 
 async def log_request_perf_async(
     report: dict,
-    db_factory,
+    db_factory=None,
     user_id: int = None,
     username: str = None,
     success: bool = True,
-    error: str = None
-):
+    error: str = None,
+    db: AsyncSession = None
+) -> Optional[int]:
     """
     Versao assincrona do log_request_perf.
 
-    Executa em background sem bloquear o request.
+    PERFORMANCE: Usa a AsyncSession (asyncpg) e nao bloqueia o event loop.
+    Sem `db`, abre uma sessao propria (async_db_context).
+
+    db_factory (legado): fabrica de Session sincrona; o save roda em uma
+    thread com sessao exclusiva daquela thread.
     """
+    if db_factory is None:
+        try:
+            log = RequestPerfLog.from_tracker_report(report, user_id, username)
+            log.success = success
+            log.error = error
+            if db is not None:
+                db.add(log)
+                await db.flush()
+                log_id = log.id
+                await db.commit()
+                return log_id
+            async with async_db_context() as adb:
+                adb.add(log)
+                await adb.flush()
+                return log.id
+        except Exception as e:
+            logger.error(f"Erro ao salvar log async: {e}")
+            if db is not None:
+                await db.rollback()
+            return None
+
     def _save():
         try:
             db = db_factory()
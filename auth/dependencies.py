@@ -6,15 +6,20 @@ SECURITY: Implementa autenticação híbrida que aceita token de:
 1. Cookie HttpOnly (preferencial - mais seguro contra XSS)
 2. Header Authorization Bearer (para APIs/clients externos)
 3. Query string (para casos especiais como download de arquivos)
+
+PERFORMANCE: Roda em toda request autenticada; a busca do usuário usa a
+AsyncSession (get_async_db) para não travar o event loop.
 """
 
 from fastapi import Depends, HTTPException, status, Query, Request, Cookie
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import Optional
 
-from database.connection import get_db
+from database.connection import get_async_db
 from auth.models import User
 from auth.security import decode_token
 from auth.schemas import TokenData
@@ -23,9 +28,22 @@ from auth.schemas import TokenData
 from utils.token_blacklist import is_token_revoked
 
 
+async def buscar_usuario(db: AsyncSession, username: str) -> Optional[User]:
+    """
+    Busca o usuário pelo username.
+
+    O grupo padrão vem junto (joinedload): o usuário é usado pelas rotas
+    síncronas, onde não há lazy load pela sessão async.
+    """
+    result = await db.execute(
+        select(User).options(joinedload(User.default_group)).where(User.username == username)
+    )
+    return result.scalar_one_or_none()
+
+
 async def get_current_user_html(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     SECURITY: Versão da dependency para páginas HTML.
@@ -53,7 +71,7 @@ async def get_current_user_html(
         )
 
     username: str = payload.get("sub")
-    user = db.query(User).filter(User.username == username).first()
+    user = await buscar_usuario(db, username)
 
     if user is None or not user.is_active:
         raise HTTPException(
@@ -145,7 +163,7 @@ def extract_token_from_sources(
 async def get_current_user(
     request: Request,
     token_header: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     SECURITY: Dependency que retorna o usuário atual baseado no token JWT.
@@ -205,7 +223,7 @@ async def get_current_user(
         raise credentials_exception
 
     # Busca usuário no banco
-    user = db.query(User).filter(User.username == username).first()
+    user = await buscar_usuario(db, username)
 
     if user is None:
         raise credentials_exception
@@ -217,7 +235,7 @@ async def get_current_user_from_token_or_query(
     request: Request,
     token_header: Optional[str] = Depends(oauth2_scheme_optional),
     token_query: Optional[str] = Query(None, alias="token"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     SECURITY: Dependency que aceita token de múltiplas fontes.
@@ -265,7 +283,7 @@ async def get_current_user_from_token_or_query(
     if username is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await buscar_usuario(db, username)
     if user is None:
         raise credentials_exception
 
@@ -316,7 +334,7 @@ async def require_admin(
 async def get_optional_user(
     request: Request,
     token_header: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """
     SECURITY: Dependency que retorna o usuário se autenticado, ou None se não.
@@ -347,5 +365,4 @@ async def get_optional_user(
     if username is None:
         return None
 
-    user = db.query(User).filter(User.username == username).first()
-    return user
+    return await buscar_usuario(db, username)
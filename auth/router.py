@@ -5,18 +5,19 @@ Endpoints de autenticação: login, logout, troca de senha
 SECURITY: Implementa autenticação via HttpOnly cookies para prevenir XSS.
 """
 
+import asyncio
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.connection import get_db
+from database.connection import get_async_db
 from auth.models import User
 from auth.schemas import (
     Token, LoginRequest, ChangePasswordRequest, UserMe, HTTPError
 )
 from auth.security import verify_password, get_password_hash, create_access_token
-from auth.dependencies import get_current_active_user
+from auth.dependencies import get_current_active_user, buscar_usuario
 from config import ACCESS_TOKEN_EXPIRE_MINUTES, IS_PRODUCTION
 
 # SECURITY: Rate Limiting
@@ -62,7 +63,7 @@ async def login(
     request: Request,  # Necessário para rate limiting
     response: Response,  # SECURITY: Para definir cookie HttpOnly
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Autentica o usuário e retorna um token JWT.
@@ -90,7 +91,7 @@ async def login(
         )
 
     # Busca usuário
-    user = db.query(User).filter(User.username == form_data.username).first()
+    user = await buscar_usuario(db, form_data.username)
 
     if not user:
         # SECURITY: Audit log de falha de login
@@ -186,7 +187,7 @@ async def change_password(
     request: Request,  # Necessário para rate limiting
     password_request: ChangePasswordRequestSimple,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)  # Mesma sessão que carregou current_user
 ):
     """
     Altera a senha do usuário autenticado.
@@ -237,7 +238,7 @@ async def change_password(
     # Atualiza senha
     current_user.hashed_password = get_password_hash(password_request.new_password)
     current_user.must_change_password = False
-    db.commit()
+    await db.commit()
 
     # SECURITY: Audit log de alteração de senha
     log_password_change(current_user.id, current_user.username, request)
@@ -267,9 +268,10 @@ async def logout(
         if auth_header.startswith("Bearer "):
             token = auth_header[7:]
 
-    # SECURITY: Revoga o token (adiciona à blacklist)
+    # SECURITY: Revoga o token (adiciona à blacklist); pode esperar o lock do
+    # estado compartilhado, então roda fora do event loop
     if token:
-        revoke_token(token)
+        await asyncio.to_thread(revoke_token, token)
 
     # SECURITY: Audit log de logout
     log_logout(current_user.id, current_user.username, request)
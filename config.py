@@ -115,14 +115,15 @@ if not GEMINI_API_KEY:
         RuntimeWarning
     )
 
-GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+# Sobrescritas de URL permitem apontar para servidores locais (scripts/benchmark_offline)
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/models")
 DEFAULT_GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-3-flash-preview")
 
 # ==================================================
 # CONFIGURAÇÕES DO OPENROUTER (IA - Legado)
 # ==================================================
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
-OPENROUTER_ENDPOINT = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_ENDPOINT = os.getenv("OPENROUTER_ENDPOINT", "https://openrouter.ai/api/v1/chat/completions")
 DEFAULT_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemini-3-flash-preview")
 FULL_REPORT_MODEL = os.getenv("FULL_REPORT_MODEL", "google/gemini-3-flash-preview")
 
@@ -4,14 +4,20 @@ Configuração da conexão com o banco de dados PostgreSQL usando SQLAlchemy 2.0
 
 PERFORMANCE: Este módulo configura o pool de conexões de forma otimizada
 para diferentes ambientes (desenvolvimento local e produção).
+
+Além do engine síncrono (psycopg2), expõe um AsyncEngine (asyncpg) para rotas
+async: com a sessão síncrona, cada query dentro de um `async def` trava o event
+loop inteiro (inclusive os streams SSE de outros usuários).
 """
 
 import os
 import logging
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from config import DATABASE_URL
 
@@ -79,6 +85,75 @@ SessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+# ==================================================
+# ENGINE ASSÍNCRONO (asyncpg)
+# ==================================================
+
+# Drivers async equivalentes aos síncronos
+_DRIVERS_ASYNC = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def url_async(url: str) -> URL:
+    """
+    Converte a URL síncrona para o driver async (asyncpg / aiosqlite).
+
+    O asyncpg não aceita 'sslmode' como parâmetro: vira 'ssl'.
+    """
+    u = make_url(url)
+    u = u.set(drivername=_DRIVERS_ASYNC.get(u.drivername, u.drivername))
+    if "sslmode" in u.query:
+        query = dict(u.query)
+        query["ssl"] = query.pop("sslmode")
+        u = u.set(query=query)
+    return u
+
+
+def criar_async_engine(url: str, **kwargs):
+    """
+    Cria o AsyncEngine com o mesmo perfil de pool do engine síncrono.
+
+    NOTA: São dois pools independentes; conexões no banco = soma dos dois
+    (ajuste DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW conforme o limite do Postgres).
+    """
+    if IS_LOCALHOST and not IS_PRODUCTION:
+        pool = dict(
+            pool_size=5, max_overflow=10, pool_timeout=5, pool_recycle=3600, pool_pre_ping=False,
+            connect_args={"timeout": 5},
+        )
+    else:
+        pool = dict(
+            pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", str(POOL_SIZE))),
+            max_overflow=int(os.getenv("DB_ASYNC_MAX_OVERFLOW", str(MAX_OVERFLOW))),
+            pool_timeout=POOL_TIMEOUT,
+            pool_recycle=POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    u = url_async(url)
+    if u.drivername.startswith("sqlite"):
+        pool = {}
+    return create_async_engine(u, echo=False, **{**pool, **kwargs})
+
+
+try:
+    async_engine = criar_async_engine(DATABASE_URL)
+except ImportError as e:
+    # asyncpg ausente: as rotas async com get_async_db falham com mensagem clara
+    async_engine = None
+    logger.warning(f"AsyncEngine indisponível ({e}); instale asyncpg")
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # Objetos continuam legíveis após o commit (sem lazy load async)
+)
+
+
 # ==================================================
 # DEPENDENCIES
 # ==================================================
@@ -99,6 +174,61 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency que fornece uma AsyncSession (não bloqueia o event loop).
+
+    Uso:
+        @router.get("/rota")
+        async def rota(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Model).where(Model.id == 1))
+            ...
+
+    Código síncrono legado que recebe Session pode rodar sobre a mesma
+    conexão com `await db.run_sync(lambda s: funcao(s, ...))`.
+    """
+    if async_engine is None:
+        raise RuntimeError("AsyncEngine indisponível: instale asyncpg")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_db_transacao() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency com uma transação por request: commit se a rota terminar
+    sem exceção, rollback caso contrário.
+
+    Uso:
+        @router.post("/rota")
+        async def rota(db: AsyncSession = Depends(get_async_db_transacao)):
+            db.add(Model(...))   # commit automático ao fim da rota
+    """
+    async with async_db_context() as db:
+        yield db
+
+
+@asynccontextmanager
+async def async_db_context() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Versão async de get_db_context (commit ao sair, rollback em erro).
+
+    Para geradores SSE, que rodam depois do fim das dependencies da rota.
+
+    Uso:
+        async with async_db_context() as db:
+            db.add(Model(...))
+    """
+    if async_engine is None:
+        raise RuntimeError("AsyncEngine indisponível: instale asyncpg")
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+
+
 @contextmanager
 def get_db_context():
     """
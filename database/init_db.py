@@ -20,7 +20,7 @@ from sistemas.gerador_pecas.models_resumo_json import CategoriaResumoJSON, Categ
 from sistemas.gerador_pecas.models_config_pecas import CategoriaDocumento, TipoPeca, tipo_peca_categorias
 from sistemas.gerador_pecas.models_extraction import (
     ExtractionQuestion, ExtractionModel, ExtractionVariable,
-    PromptVariableUsage, PromptActivationLog
+    PromptVariableUsage, PromptActivationLog, VariableSlugReference
 )
 from sistemas.gerador_pecas.models_teste_categorias import TesteDocumento, TesteObservacao
 # TEMPORÁRIO: import condicional até redeploy com arquivo correto
@@ -29,7 +29,7 @@ try:
 except ImportError:
     CenarioTesteAtivacao = None  # Tabela não será criada automaticamente
 from sistemas.pedido_calculo.models import GeracaoPedidoCalculo, FeedbackPedidoCalculo, LogChamadaIA
-from sistemas.prestacao_contas.models import GeracaoAnalise, LogChamadaIAPrestacao, FeedbackPrestacao
+from sistemas.prestacao_contas.models import GeracaoAnalise, LogChamadaIAPrestacao, FeedbackPrestacao, ModeloPreClassificador
 from sistemas.relatorio_cumprimento.models import GeracaoRelatorioCumprimento, LogChamadaIARelatorioCumprimento, FeedbackRelatorioCumprimento
 from sistemas.classificador_documentos.models import (
     ProjetoClassificacao, CodigoDocumentoProjeto, ExecucaoClassificacao,
@@ -38,6 +38,10 @@ from sistemas.classificador_documentos.models import (
 from sistemas.bert_training.models import (
     BertDataset, BertRun, BertJob, BertMetric, BertLog, BertWorker
 )
+from sistemas.cumprimento_beta.models import (
+    SessaoCumprimentoBeta, DocumentoBeta, JSONResumoBeta, ConsolidacaoBeta,
+    ConversaBeta, ContextoChatBeta, PecaGeradaBeta
+)
 from admin.models import PromptConfig, ConfiguracaoIA
 from admin.models_prompts import PromptModulo, PromptModuloHistorico, ModuloTipoPeca, RegraDeterministicaTipoPeca
 from admin.models_prompt_groups import PromptGroup, PromptSubgroup, PromptSubcategoria
@@ -82,7 +86,9 @@ def create_tables():
         'geracoes_relatorio_cumprimento',  # Sistema de relatório de cumprimento de sentença
         'request_perf_logs',  # Logs detalhados de performance de requests
         'projetos_classificacao',  # Sistema de classificação de documentos
-        'bert_datasets'  # Sistema BERT Training
+        'bert_datasets',  # Sistema BERT Training
+        'variable_slug_references',  # Índice reverso de slugs de variáveis
+        'contextos_chat_beta'  # Contexto em cache do chatbot do cumprimento beta
     }
 
     # Se todas as tabelas obrigatórias existem, não precisa criar
@@ -105,17 +111,22 @@ def run_migrations():
     is_sqlite = 'sqlite' in str(engine.url)
 
     # Fast-path: verifica se a última migração já foi aplicada
-    # Se as colunas 'setor' (users) e 'thinking_level' (gemini_api_logs) existem, todas as migrações estão ok
+    # Se as colunas 'setor' (users), 'cached_tokens' (gemini_api_logs) e 'geracao'
+    # (contextos_chat_beta) existem, todas as migrações estão ok
     try:
         result_setor = db.execute(text("""
             SELECT column_name FROM information_schema.columns
             WHERE table_name = 'users' AND column_name = 'setor'
         """)).fetchone()
-        result_thinking = db.execute(text("""
+        result_cached_tokens = db.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'gemini_api_logs' AND column_name = 'cached_tokens'
+        """)).fetchone()
+        result_geracao = db.execute(text("""
             SELECT column_name FROM information_schema.columns
-            WHERE table_name = 'gemini_api_logs' AND column_name = 'thinking_level'
+            WHERE table_name = 'contextos_chat_beta' AND column_name = 'geracao'
         """)).fetchone()
-        if result_setor and result_thinking:
+        if result_setor and result_cached_tokens and result_geracao:
             # Migrações já aplicadas, apenas executa seed_prompt_groups
             seed_prompt_groups(db)
             db.close()
@@ -1610,6 +1621,43 @@ def run_migrations():
             db.rollback()
             print(f"[WARN] Migração thinking_level: {e}")
 
+    # Migração: Adicionar coluna cached_tokens (tokens servidos do cache de contexto) em gemini_api_logs
+    if table_exists('gemini_api_logs') and not column_exists('gemini_api_logs', 'cached_tokens'):
+        try:
+            db.execute(text("ALTER TABLE gemini_api_logs ADD COLUMN cached_tokens INTEGER"))
+            db.commit()
+            print("[OK] Migração: coluna cached_tokens adicionada em gemini_api_logs")
+        except Exception as e:
+            db.rollback()
+            print(f"[WARN] Migração cached_tokens: {e}")
+
+    # Migração: índices compostos das listas de histórico (paginação por criado_em, id)
+    indices_historico = [
+        ("geracoes_pedido_calculo", "ix_geracoes_pedido_calculo_usuario_criado"),
+        ("geracoes_pecas", "ix_geracoes_pecas_usuario_criado"),
+        ("geracoes_prestacao_contas", "ix_geracoes_prestacao_contas_usuario_criado"),
+        ("geracoes_relatorio_cumprimento", "ix_geracoes_relatorio_cumprimento_usuario_criado"),
+    ]
+    for tabela, indice in indices_historico:
+        if not table_exists(tabela):
+            continue
+        try:
+            db.execute(text(f"CREATE INDEX IF NOT EXISTS {indice} ON {tabela}(usuario_id, criado_em, id)"))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[WARN] Migração {indice}: {e}")
+
+    # Migração: geração do contexto do chat beta (invalidação entre workers)
+    if table_exists('contextos_chat_beta') and not column_exists('contextos_chat_beta', 'geracao'):
+        try:
+            db.execute(text("ALTER TABLE contextos_chat_beta ADD COLUMN geracao INTEGER NOT NULL DEFAULT 0"))
+            db.commit()
+            print("[OK] Migração: coluna geracao adicionada em contextos_chat_beta")
+        except Exception as e:
+            db.rollback()
+            print(f"[WARN] Migração geracao: {e}")
+
     seed_prompt_groups(db)
 
 
@@ -2223,6 +2271,23 @@ O campo "irrelevante" deve ser true apenas se o documento for meramente administ
         db.close()
 
 
+def seed_slug_index():
+    """Popula o índice reverso de slugs se estiver vazio (primeiro deploy)"""
+    from sistemas.gerador_pecas.services_slug_index import SlugReferenceIndex
+
+    db = SessionLocal()
+    try:
+        if db.query(VariableSlugReference.id).first() is None:
+            totais = SlugReferenceIndex(db).reconstruir()
+            db.commit()
+            print(f"[OK] Índice reverso de slugs construído: {totais}")
+    except Exception as e:
+        db.rollback()
+        print(f"[WARN] Falha ao construir índice de slugs: {e}")
+    finally:
+        db.close()
+
+
 _DB_INITIALIZED = False  # Cache em memória
 
 def init_database():
@@ -2240,7 +2305,7 @@ def init_database():
 
     # Fast-path com cache em arquivo (evita query ao banco em dev)
     # IMPORTANTE: Versão do schema - incrementar quando adicionar novas colunas/tabelas
-    SCHEMA_VERSION = "v5"  # v5: adicionado sistema BERT Training
+    SCHEMA_VERSION = "v9"  # v9: contextos_chat_beta.geracao
     import hashlib
     cache_file = Path(__file__).parent / ".db_initialized"
     db_url_hash = hashlib.md5(f"{engine.url}:{SCHEMA_VERSION}".encode()).hexdigest()[:8]
@@ -2253,8 +2318,10 @@ def init_database():
                 db = SessionLocal()
                 # Verifica se as colunas/tabelas mais recentes existem
                 db.execute(text("SELECT setor FROM users LIMIT 1"))
-                db.execute(text("SELECT thinking_level FROM gemini_api_logs LIMIT 1"))
+                db.execute(text("SELECT cached_tokens FROM gemini_api_logs LIMIT 1"))
                 db.execute(text("SELECT 1 FROM request_perf_logs LIMIT 1"))
+                db.execute(text("SELECT 1 FROM variable_slug_references LIMIT 1"))
+                db.execute(text("SELECT geracao FROM contextos_chat_beta LIMIT 1"))
                 db.close()
                 print("[OK] Conexao com banco de dados estabelecida!")
                 _DB_INITIALIZED = True
@@ -2278,8 +2345,10 @@ def init_database():
         result = db.execute(text("SELECT 1 FROM users LIMIT 1")).fetchone()
         # Verifica colunas/tabelas mais recentes
         db.execute(text("SELECT setor FROM users LIMIT 1"))
-        db.execute(text("SELECT thinking_level FROM gemini_api_logs LIMIT 1"))
+        db.execute(text("SELECT cached_tokens FROM gemini_api_logs LIMIT 1"))
         db.execute(text("SELECT 1 FROM request_perf_logs LIMIT 1"))
+        db.execute(text("SELECT 1 FROM variable_slug_references LIMIT 1"))
+        db.execute(text("SELECT geracao FROM contextos_chat_beta LIMIT 1"))
         db.close()
         if result:
             # Banco ok, salva cache
@@ -2298,6 +2367,7 @@ def init_database():
     seed_prompts()
     seed_prompt_modulos()
     seed_categorias_resumo_json()
+    seed_slug_index()
 
     # Salva cache após inicialização bem-sucedida
     try:
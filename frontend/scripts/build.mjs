@@ -3,10 +3,13 @@
  *
  * Transpila arquivos TypeScript para JavaScript usando esbuild.
  * Os arquivos JS resultantes são colocados nas pastas templates/ de cada sistema.
+ * Ao final, gera as cópias com hash, as variantes .br/.gz e o manifesto de
+ * assets (python -m utils.static_assets).
  */
 
 import * as esbuild from 'esbuild';
 import * as fs from 'fs';
+import { execFileSync } from 'child_process';
 import * as path from 'path';
 import { fileURLToPath } from 'url';
 
@@ -159,6 +162,24 @@ async function build() {
   if (failCount > 0) {
     process.exit(1);
   }
+
+  fingerprintAssets();
+}
+
+/**
+ * Fingerprint + pré-compressão dos assets (utils/static_assets.py)
+ */
+function fingerprintAssets() {
+  const python = process.env.PYTHON || 'python';
+  try {
+    execFileSync(python, ['-m', 'utils.static_assets'], {
+      cwd: path.resolve(ROOT_DIR, '..'),
+      stdio: 'inherit',
+    });
+  } catch (error) {
+    log(`Fingerprint de assets falhou: ${error.message}`, 'yellow');
+    log('Os templates usarão as URLs sem hash até o próximo build.', 'yellow');
+  }
 }
 
 /**
@@ -171,6 +192,10 @@ async function watch() {
   // Build inicial
   await build();
 
+  // Em watch os bundles mudam sem novo fingerprint: remove o manifesto para
+  // que os templates usem as URLs sem hash
+  fs.rmSync(path.join(ROOT_DIR, 'static', 'asset-manifest.json'), { force: true });
+
   // Watch
   const entryPoints = findEntryPoints();
 
@@ -82,9 +82,11 @@ class CumprimentoBetaApi {
     return this.handleResponse(response);
   }
 
-  async listSessions(pagina: number = 1, porPagina: number = 10): Promise<SessionListResponse> {
+  async listSessions(porPagina: number = 10, cursor?: string): Promise<SessionListResponse> {
+    const params = new URLSearchParams({ por_pagina: String(porPagina) });
+    if (cursor) params.set('cursor', cursor);
     const response = await fetch(
-      `${API_BASE}/sessoes?pagina=${pagina}&por_pagina=${porPagina}`,
+      `${API_BASE}/sessoes?${params}`,
       { headers: this.getHeaders() }
     );
     return this.handleResponse(response);
@@ -688,7 +688,7 @@ export class CumprimentoBetaApp {
 
   private async loadHistory(): Promise<void> {
     try {
-      const response = await api.listSessions(1, 50);
+      const response = await api.listSessions(50);
       this.historyDrawer?.setSessions(response.sessoes);
     } catch (error) {
       console.error('Erro ao carregar histórico:', error);
@@ -52,8 +52,8 @@ export interface SessionResponse {
 export interface SessionListResponse {
   sessoes: SessionResponse[];
   total: number;
-  pagina: number;
   por_pagina: number;
+  proximo_cursor?: string | null;
 }
 
 export interface CreateSessionRequest {
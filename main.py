@@ -9,13 +9,14 @@ Unifica os sistemas:
 Com autenticação centralizada via JWT.
 """
 
+import asyncio
 import logging
 from fastapi import FastAPI, Request, Response, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse, HTMLResponse, FileResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from contextlib import asynccontextmanager
 from pathlib import Path
 import os
@@ -40,7 +41,6 @@ class StatusPollingFilter(logging.Filter):
 # Aplica filtro ao logger do uvicorn
 logging.getLogger("uvicorn.access").addFilter(StatusPollingFilter())
 
-from database.init_db import init_database
 from auth.models import User
 from auth.dependencies import (
     get_current_user, 
@@ -62,58 +62,21 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 import traceback
 
-# Import dos sistemas
-from sistemas.assistencia_judiciaria.router import router as assistencia_router
-from sistemas.matriculas_confrontantes.router import router as matriculas_router
-from sistemas.gerador_pecas.router import router as gerador_pecas_router
-from sistemas.gerador_pecas.router_admin import router as gerador_pecas_admin_router
-from sistemas.gerador_pecas.router_categorias_json import router as categorias_json_router
-from sistemas.gerador_pecas.router_config_pecas import router as config_pecas_router
-from sistemas.gerador_pecas.router_teste_categorias import router as teste_categorias_router
-# TEMPORÁRIO: import condicional até redeploy com arquivo models_teste_ativacao.py
-try:
-    from sistemas.gerador_pecas.router_teste_ativacao import router as teste_ativacao_router
-except ImportError:
-    teste_ativacao_router = None
-
-# Import do admin de prompts modulares
-from admin.router_prompts import router as prompts_modulos_router
-
-# Import do router de extração (perguntas, modelos, variáveis, regras determinísticas)
-from sistemas.gerador_pecas.router_extraction import router as extraction_router
-
-# Import do sistema de Pedido de Cálculo
-from sistemas.pedido_calculo.router import router as pedido_calculo_router
-from sistemas.pedido_calculo.router_admin import router as pedido_calculo_admin_router
-
-# Import do sistema de Prestação de Contas
-from sistemas.prestacao_contas.router import router as prestacao_contas_router
-from sistemas.prestacao_contas.router_admin import router as prestacao_contas_admin_router
-
-# Import do sistema de Relatório de Cumprimento
-from sistemas.relatorio_cumprimento.router import router as relatorio_cumprimento_router
-
-# Import do sistema Cumprimento de Sentença Beta
-from sistemas.cumprimento_beta.router import router as cumprimento_beta_router
-
-# Import do sistema de Classificador de Documentos
-from sistemas.classificador_documentos.router import router as classificador_documentos_router
-
-# Import do sistema BERT Training
-from sistemas.bert_training.router import router as bert_training_router
-
-# Import do sistema de Performance Logs
-from admin.router_performance import router as performance_router
-from admin.router_gemini_logs import router as gemini_logs_router
+# PERFORMANCE: Routers dos sistemas são registrados de forma lazy (ver ROUTER_REGISTRY).
+# O import de cada módulo pesado acontece na primeira requisição ao seu prefixo
+# ou no warm-up em background, após o worker começar a aceitar tráfego.
+from utils.lazy_routers import LazyRouterSpec, register_lazy_routers, warm_up_routers
+
+# PERFORMANCE: Assets com fingerprint (cache imutável) e variantes .br/.gz
+from utils.static_assets import AssetStaticFiles, asset_url, html_com_assets, resposta_asset
+
+# Middleware de Performance Logs
 from admin.middleware_performance import PerformanceMiddleware
 
 # Métricas de request (Prometheus-style)
 from middleware.metrics import MetricsMiddleware
 from utils.metrics import get_metrics_text, get_metrics_summary
 
-# Import do serviço de normalização de texto
-from services.text_normalizer import text_normalizer_router
-
 # Diretórios base
 BASE_DIR = Path(__file__).resolve().parent
 MATRICULAS_TEMPLATES = BASE_DIR / "sistemas" / "matriculas_confrontantes" / "templates"
@@ -126,31 +89,9 @@ CUMPRIMENTO_BETA_TEMPLATES = BASE_DIR / "sistemas" / "cumprimento_beta" / "templ
 CLASSIFICADOR_DOCUMENTOS_TEMPLATES = BASE_DIR / "sistemas" / "classificador_documentos" / "templates"
 BERT_TRAINING_TEMPLATES = BASE_DIR / "sistemas" / "bert_training" / "templates"
 
-# IMPORTANTE: Inicializa banco de dados ANTES de criar o app
-# Isso garante que migrações sejam executadas antes de qualquer query
-print("[*] Pré-inicializando banco de dados...")
-init_database()
 
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """
-    Lifecycle events da aplicação.
-    Executa na inicialização e no shutdown.
-    """
-    # Startup
-    print("[+] Iniciando Portal PGE-MS...")
-
-    # Configura logging estruturado
-    setup_logging()
-    logger = get_logger("portal-pge")
-    logger.info(f"Iniciando aplicação (environment={'production' if IS_PRODUCTION else 'development'})")
-
-    init_database()
-
-    # ==========================================================================
-    # Inicializa tabela de embeddings vetoriais (com pgvector se disponível)
-    # ==========================================================================
+def _startup_init_embeddings():
+    """Inicializa tabela de embeddings vetoriais (com pgvector se disponível)."""
     try:
         from sistemas.gerador_pecas.models_embeddings import init_embeddings_table
         pgvector_ok = init_embeddings_table()
@@ -158,10 +99,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[WARN] Erro ao inicializar tabela de embeddings: {e}")
 
-    # ==========================================================================
-    # REGRA DE OURO: Corrige modos de ativação inconsistentes no startup
-    # Garante que dados legados ou corrompidos sejam corrigidos automaticamente
-    # ==========================================================================
+
+def _startup_corrigir_modos_ativacao():
+    """
+    REGRA DE OURO: Corrige modos de ativação inconsistentes no startup.
+    Garante que dados legados ou corrompidos sejam corrigidos automaticamente.
+    """
     try:
         from database.connection import SessionLocal
         from sistemas.gerador_pecas.services_deterministic import corrigir_modos_ativacao_inconsistentes
@@ -178,10 +121,39 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[WARN] Erro ao verificar modos de ativação: {e}")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifecycle events da aplicação.
+    Executa na inicialização e no shutdown.
+    """
+    # Startup
+    print("[+] Iniciando Portal PGE-MS...")
+
+    # Configura logging estruturado
+    setup_logging()
+    logger = get_logger("portal-pge")
+    logger.info(f"Iniciando aplicação (environment={'production' if IS_PRODUCTION else 'development'})")
+
+    # Migrações/criação de tabelas precisam terminar antes das demais tarefas
+    from database.init_db import init_database
+    await asyncio.to_thread(init_database)
+
+    # PERFORMANCE: Tarefas de startup independentes rodam concorrentemente
+    await asyncio.gather(
+        asyncio.to_thread(_startup_init_embeddings),
+        asyncio.to_thread(_startup_corrigir_modos_ativacao),
+    )
+
     # Configura instrumentação automática de performance
     from admin.perf_instrumentation import setup_instrumentation
     setup_instrumentation(app)
 
+    # PERFORMANCE: Mede travamentos do event loop e captura a chamada bloqueante
+    from admin.loop_lag import iniciar_monitor_lag, parar_monitor_lag
+    await iniciar_monitor_lag()
+
     # ==========================================================================
     # Inicia BERT Watchdog Scheduler
     # Monitora jobs travados e toma ações automáticas (retry, cleanup)
@@ -197,10 +169,18 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[WARN] Erro ao iniciar BERT Watchdog: {e}")
 
+    # Carrega os routers lazy em background (após o worker aceitar tráfego)
+    warmup_task = asyncio.create_task(warm_up_routers(app))
+
     yield
     # Shutdown
     print("[-] Encerrando Portal PGE-MS...")
 
+    if not warmup_task.done():
+        warmup_task.cancel()
+
+    await parar_monitor_lag()
+
     # Para o scheduler de tarefas
     try:
         from utils.background_tasks import stop_scheduler
@@ -403,14 +383,15 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 # Templates Jinja2 para páginas do portal
 templates = Jinja2Templates(directory="frontend/templates")
+templates.env.globals["asset_url"] = asset_url
 
-# Arquivos estáticos
+# Arquivos estáticos (com hash: cache imutável; sem hash: ETag/304)
 if os.path.exists("frontend/static"):
-    app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
+    app.mount("/static", AssetStaticFiles(directory="frontend/static"), name="static")
 
 # Arquivos de logo
 if os.path.exists("logo"):
-    app.mount("/logo", StaticFiles(directory="logo"), name="logo")
+    app.mount("/logo", AssetStaticFiles(directory="logo"), name="logo")
 
 
 # ==================================================
@@ -532,8 +513,14 @@ async def prometheus_metrics(admin: User = Depends(require_admin)):
     SECURITY: Acesso restrito a administradores.
     """
     from fastapi.responses import PlainTextResponse
+    from utils.llm_admission import get_admissao_llm
+    from admin.loop_lag import get_monitor_lag
     return PlainTextResponse(
-        content=get_metrics_text(),
+        content="\n".join([
+            get_metrics_text(),
+            get_admissao_llm().texto_prometheus(),
+            get_monitor_lag().texto_prometheus(),
+        ]),
         media_type="text/plain; version=0.0.4; charset=utf-8"
     )
 
@@ -557,74 +544,72 @@ app.include_router(users_router)
 
 
 # ==================================================
-# ROUTER DE ADMINISTRAÇÃO
+# ROUTERS DE ADMINISTRAÇÃO E DOS SISTEMAS (LAZY)
 # ==================================================
+# A ordem da lista é a ordem de precedência das rotas, exatamente como nos
+# antigos app.include_router. `match_prefix` é obrigatório quando o prefixo
+# real vem do próprio APIRouter (ex: APIRouter(prefix="/admin/api/performance")).
 
-from admin.router import router as admin_router
-app.include_router(admin_router)
+ROUTER_REGISTRY = [
+    # Administração
+    LazyRouterSpec("admin.router:router", match_prefix="/admin"),
+    LazyRouterSpec("admin.dashboard_router:router", match_prefix="/admin/dashboard"),
+    LazyRouterSpec("admin.router_performance:router", match_prefix="/admin/api/performance"),
+    LazyRouterSpec("admin.router_gemini_logs:router", match_prefix="/admin/api/gemini-logs"),
 
-# Router de Dashboard de Métricas (admin)
-from admin.dashboard_router import router as dashboard_router
-app.include_router(dashboard_router)
+    # Sistemas
+    LazyRouterSpec("sistemas.assistencia_judiciaria.router:router", prefix="/assistencia/api"),
+    LazyRouterSpec("sistemas.matriculas_confrontantes.router:router", prefix="/matriculas/api"),
+    LazyRouterSpec("sistemas.gerador_pecas.router:router", prefix="/gerador-pecas/api"),
+    LazyRouterSpec("sistemas.gerador_pecas.router_admin:router", prefix="/admin/api",
+                   match_prefix="/admin/api/gerador-pecas-admin"),
 
-# Router de Performance Logs (admin)
-app.include_router(performance_router)
+    # Prompts Modulares (admin)
+    LazyRouterSpec("admin.router_prompts:router", prefix="/admin/api",
+                   match_prefix="/admin/api/prompts-modulos"),
 
-# Router de Logs de Chamadas Gemini (admin)
-app.include_router(gemini_logs_router)
+    # Categorias de Formato JSON e Teste de Categorias (admin)
+    LazyRouterSpec("sistemas.gerador_pecas.router_categorias_json:router", prefix="/admin/api",
+                   match_prefix="/admin/api/categorias-resumo-json"),
+    LazyRouterSpec("sistemas.gerador_pecas.router_teste_categorias:router", prefix="/admin/api",
+                   match_prefix="/admin/api/teste-categorias"),
 
+    # Teste de Ativacao de Modulos (admin)
+    # TEMPORÁRIO: opcional até redeploy com arquivo models_teste_ativacao.py
+    LazyRouterSpec("sistemas.gerador_pecas.router_teste_ativacao:router", prefix="/admin/api",
+                   match_prefix="/admin/api/teste-ativacao", optional=True),
 
-# ==================================================
-# ROUTERS DOS SISTEMAS
-# ==================================================
+    # Extração (perguntas, modelos, variáveis, regras determinísticas)
+    LazyRouterSpec("sistemas.gerador_pecas.router_extraction:router", prefix="/admin/api/extraction"),
 
-app.include_router(assistencia_router, prefix="/assistencia/api")
-app.include_router(matriculas_router, prefix="/matriculas/api")
-app.include_router(gerador_pecas_router, prefix="/gerador-pecas/api")
-app.include_router(gerador_pecas_admin_router, prefix="/admin/api")
+    # Configuração de Tipos de Peça e Categorias de Documentos (admin)
+    LazyRouterSpec("sistemas.gerador_pecas.router_config_pecas:router", match_prefix="/api/gerador-pecas/config"),
 
-# Router de Prompts Modulares (admin)
-app.include_router(prompts_modulos_router, prefix="/admin/api")
+    # Pedido de Cálculo (admin router sem prefixo pois já tem no router)
+    LazyRouterSpec("sistemas.pedido_calculo.router:router", prefix="/pedido-calculo/api"),
+    LazyRouterSpec("sistemas.pedido_calculo.router_admin:router", match_prefix="/pedido-calculo-admin"),
 
-# Router de Categorias de Formato JSON (admin)
-app.include_router(categorias_json_router, prefix="/admin/api")
+    # Prestação de Contas (admin router sem prefixo pois já tem no router)
+    LazyRouterSpec("sistemas.prestacao_contas.router:router", prefix="/prestacao-contas/api"),
+    LazyRouterSpec("sistemas.prestacao_contas.router_admin:router", match_prefix="/admin/api/prestacao-admin"),
 
-# Router de Teste de Categorias JSON (admin)
-app.include_router(teste_categorias_router, prefix="/admin/api")
+    # Relatório de Cumprimento
+    LazyRouterSpec("sistemas.relatorio_cumprimento.router:router", prefix="/relatorio-cumprimento/api"),
 
-# Router de Teste de Ativacao de Modulos (admin)
-# TEMPORÁRIO: inclusão condicional até redeploy com arquivo models_teste_ativacao.py
-if teste_ativacao_router is not None:
-    app.include_router(teste_ativacao_router, prefix="/admin/api")
+    # Cumprimento de Sentença Beta
+    LazyRouterSpec("sistemas.cumprimento_beta.router:router", prefix="/api", match_prefix="/api/cumprimento-beta"),
 
-# Router de Extração (perguntas, modelos, variáveis, regras determinísticas)
-app.include_router(extraction_router, prefix="/admin/api/extraction")
+    # Classificador de Documentos
+    LazyRouterSpec("sistemas.classificador_documentos.router:router", prefix="/classificador/api"),
 
-# Router de Configuração de Tipos de Peça e Categorias de Documentos (admin)
-app.include_router(config_pecas_router)
+    # BERT Training (prefixo /bert-training já está no router)
+    LazyRouterSpec("sistemas.bert_training.router:router", match_prefix="/bert-training"),
 
-# Router de Pedido de Cálculo
-app.include_router(pedido_calculo_router, prefix="/pedido-calculo/api")
-app.include_router(pedido_calculo_admin_router)  # Admin router - sem prefixo pois já tem no router
+    # Normalização de Texto
+    LazyRouterSpec("services.text_normalizer.router:router", match_prefix="/api/text"),
+]
 
-# Router de Prestação de Contas
-app.include_router(prestacao_contas_router, prefix="/prestacao-contas/api")
-app.include_router(prestacao_contas_admin_router)  # Admin router - sem prefixo pois já tem no router
-
-# Router de Relatório de Cumprimento
-app.include_router(relatorio_cumprimento_router, prefix="/relatorio-cumprimento/api")
-
-# Router de Cumprimento de Sentença Beta
-app.include_router(cumprimento_beta_router, prefix="/api")
-
-# Router de Classificador de Documentos
-app.include_router(classificador_documentos_router, prefix="/classificador/api")
-
-# Router de BERT Training
-app.include_router(bert_training_router)  # prefixo /bert-training já está no router
-
-# Router de Normalização de Texto
-app.include_router(text_normalizer_router)
+register_lazy_routers(app, ROUTER_REGISTRY)
 
 
 # ==================================================
@@ -647,14 +632,32 @@ ALLOWED_CONTENT_TYPES = {
     ".ttf": "font/ttf",
 }
 
-def safe_serve_static(base_dir: Path, filename: str, no_cache: bool = False):
+# Headers anti-cache para o HTML dos sistemas (o HTML referencia os assets com hash)
+NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0"
+}
+
+
+def _serve_html(html_path: Path, no_cache: bool) -> HTMLResponse:
+    """HTML do sistema com src/href de .js/.css resolvidos pelo manifesto de assets."""
+    return HTMLResponse(html_com_assets(html_path), headers=NO_CACHE_HEADERS if no_cache else None)
+
+
+def safe_serve_static(base_dir: Path, filename: str, no_cache: bool = False, request: Request = None):
     """
     SECURITY: Serve arquivos estáticos de forma segura, prevenindo path traversal.
 
+    PERFORMANCE: JS/CSS com hash no nome recebem cache imutável; os demais
+    arquivos são revalidados por ETag (304). A variante .br/.gz gerada no
+    build é escolhida pelo Accept-Encoding da requisição.
+
     Args:
         base_dir: Diretório base permitido
         filename: Nome do arquivo requisitado
-        no_cache: Se True, adiciona headers anti-cache
+        no_cache: Se True, adiciona headers anti-cache ao HTML
+        request: Requisição (Accept-Encoding, If-None-Match)
 
     Returns:
         FileResponse ou HTMLResponse com erro
@@ -687,33 +690,21 @@ def safe_serve_static(base_dir: Path, filename: str, no_cache: bool = False):
         # Fallback para index.html (SPA)
         index_path = base_dir / "index.html"
         if index_path.exists():
-            return FileResponse(index_path, media_type="text/html")
+            return _serve_html(index_path, no_cache)
         return HTMLResponse("<h1>Tipo de arquivo não permitido</h1>", status_code=403)
 
     if file_path.exists() and file_path.is_file():
-        media_type = ALLOWED_CONTENT_TYPES.get(suffix, "application/octet-stream")
+        if suffix == ".html":
+            return _serve_html(file_path, no_cache)
 
-        headers = {}
-        if no_cache:
-            headers = {
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0"
-            }
-
-        return FileResponse(file_path, media_type=media_type, headers=headers if headers else None)
+        media_type = ALLOWED_CONTENT_TYPES.get(suffix, "application/octet-stream")
+        request_headers = request.headers if request is not None else Headers()
+        return resposta_asset(file_path, request_headers, media_type=media_type)
 
     # Se não encontrou, retorna index.html (SPA fallback)
     index_path = base_dir / "index.html"
     if index_path.exists():
-        headers = {}
-        if no_cache:
-            headers = {
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0"
-            }
-        return FileResponse(index_path, media_type="text/html", headers=headers if headers else None)
+        return _serve_html(index_path, no_cache)
 
     return HTMLResponse("<h1>Sistema não encontrado</h1>", status_code=404)
 
@@ -722,79 +713,79 @@ def safe_serve_static(base_dir: Path, filename: str, no_cache: bool = False):
 @app.get("/assistencia/{filename:path}")
 @app.get("/assistencia/")
 @app.get("/assistencia")
-async def serve_assistencia_static(filename: str = "", user: User = Depends(require_system_access_html("assistencia_judiciaria"))):
+async def serve_assistencia_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("assistencia_judiciaria"))):
     """Serve arquivos do frontend Assistência Judiciária"""
-    return safe_serve_static(ASSISTENCIA_TEMPLATES, filename)
+    return safe_serve_static(ASSISTENCIA_TEMPLATES, filename, request=request)
 
 
 # Matrículas Confrontantes - Servir arquivos estáticos (JS, CSS)
 @app.get("/matriculas/{filename:path}")
-async def serve_matriculas_static(filename: str = "", user: User = Depends(require_system_access_html("matriculas"))):
+async def serve_matriculas_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("matriculas"))):
     """Serve arquivos do frontend Matrículas Confrontantes"""
-    return safe_serve_static(MATRICULAS_TEMPLATES, filename)
+    return safe_serve_static(MATRICULAS_TEMPLATES, filename, request=request)
 
 
 # Gerador de Peças Jurídicas
 @app.get("/gerador-pecas/{filename:path}")
 @app.get("/gerador-pecas/")
 @app.get("/gerador-pecas")
-async def serve_gerador_pecas_static(filename: str = "", user: User = Depends(require_system_access_html("gerador_pecas"))):
+async def serve_gerador_pecas_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("gerador_pecas"))):
     """Serve arquivos do frontend Gerador de Peças Jurídicas"""
-    return safe_serve_static(GERADOR_PECAS_TEMPLATES, filename, no_cache=True)
+    return safe_serve_static(GERADOR_PECAS_TEMPLATES, filename, no_cache=True, request=request)
 
 
 # Pedido de Cálculo
 @app.get("/pedido-calculo/{filename:path}")
 @app.get("/pedido-calculo/")
 @app.get("/pedido-calculo")
-async def serve_pedido_calculo_static(filename: str = "", user: User = Depends(require_system_access_html("pedido_calculo"))):
+async def serve_pedido_calculo_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("pedido_calculo"))):
     """Serve arquivos do frontend Pedido de Cálculo"""
-    return safe_serve_static(PEDIDO_CALCULO_TEMPLATES, filename, no_cache=True)
+    return safe_serve_static(PEDIDO_CALCULO_TEMPLATES, filename, no_cache=True, request=request)
 
 
 # Prestação de Contas
 @app.get("/prestacao-contas/{filename:path}")
 @app.get("/prestacao-contas/")
 @app.get("/prestacao-contas")
-async def serve_prestacao_contas_static(filename: str = "", user: User = Depends(require_system_access_html("prestacao_contas"))):
+async def serve_prestacao_contas_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("prestacao_contas"))):
     """Serve arquivos do frontend Prestação de Contas"""
-    return safe_serve_static(PRESTACAO_CONTAS_TEMPLATES, filename, no_cache=True)
+    return safe_serve_static(PRESTACAO_CONTAS_TEMPLATES, filename, no_cache=True, request=request)
 
 
 # Relatório de Cumprimento
 @app.get("/relatorio-cumprimento/{filename:path}")
 @app.get("/relatorio-cumprimento/")
 @app.get("/relatorio-cumprimento")
-async def serve_relatorio_cumprimento_static(filename: str = "", user: User = Depends(require_system_access_html("relatorio_cumprimento"))):
+async def serve_relatorio_cumprimento_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("relatorio_cumprimento"))):
     """Serve arquivos do frontend Relatório de Cumprimento"""
-    return safe_serve_static(RELATORIO_CUMPRIMENTO_TEMPLATES, filename, no_cache=True)
+    return safe_serve_static(RELATORIO_CUMPRIMENTO_TEMPLATES, filename, no_cache=True, request=request)
 
 
 # Cumprimento de Sentença Beta
 @app.get("/cumprimento-beta/{filename:path}")
 @app.get("/cumprimento-beta/")
 @app.get("/cumprimento-beta")
-async def serve_cumprimento_beta_static(filename: str = "", user: User = Depends(require_system_access_html("cumprimento_beta"))):
+async def serve_cumprimento_beta_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("cumprimento_beta"))):
     """Serve arquivos do frontend Cumprimento de Sentença Beta"""
-    return safe_serve_static(CUMPRIMENTO_BETA_TEMPLATES, filename, no_cache=True)
+    return safe_serve_static(CUMPRIMENTO_BETA_TEMPLATES, filename, no_cache=True, request=request)
 
 
 # Classificador de Documentos
 @app.get("/classificador/{filename:path}")
 @app.get("/classificador/")
 @app.get("/classificador")
-async def serve_classificador_static(filename: str = "", user: User = Depends(require_system_access_html("classificador"))):
+async def serve_classificador_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("classificador"))):
     """Serve arquivos do frontend Classificador de Documentos"""
-    return safe_serve_static(CLASSIFICADOR_DOCUMENTOS_TEMPLATES, filename, no_cache=True)
+    return safe_serve_static(CLASSIFICADOR_DOCUMENTOS_TEMPLATES, filename, no_cache=True, request=request)
 
 
 # BERT Training
 @app.get("/bert-training/templates/{filename:path}")
 @app.get("/bert-training/")
 @app.get("/bert-training")
-async def serve_bert_training_static(filename: str = "", user: User = Depends(require_system_access_html("bert_training"))):
+async def serve_bert_training_static(request: Request, filename: str = "", user: User = Depends(require_system_access_html("bert_training"))):
     """Serve arquivos do frontend BERT Training"""
-    return safe_serve_static(BERT_TRAINING_TEMPLATES, filename, no_cache=True)
+    return safe_serve_static(BERT_TRAINING_TEMPLATES, filename, no_cache=True, request=request)
 
 
 # ==================================================
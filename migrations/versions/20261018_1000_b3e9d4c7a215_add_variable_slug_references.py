@@ -0,0 +1,58 @@
+"""add variable slug references
+
+Revision ID: b3e9d4c7a215
+Revises: a7c3b8d2e1f0
+Create Date: 2026-10-18 10:00:00.000000
+
+Cria o índice reverso de referências a slugs de variáveis
+(variable_slug_references). Mantido pelo listener after_flush em
+sistemas/gerador_pecas/services_slug_index.py; popular com:
+    python scripts/rebuild_slug_index.py
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e9d4c7a215'
+down_revision: Union[str, None] = 'a7c3b8d2e1f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table_name: str) -> bool:
+    """Verifica se uma tabela já existe (idempotência)."""
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade() -> None:
+    """
+    Cria a tabela variable_slug_references.
+
+    A migração é idempotente - não recria a tabela se o init_db já a criou.
+    """
+    if table_exists('variable_slug_references'):
+        return
+
+    op.create_table('variable_slug_references',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slug', sa.String(length=200), nullable=False),
+        sa.Column('entity_type', sa.String(length=30), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('location', sa.String(length=255), nullable=False),
+        sa.Column('criado_em', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_variable_slug_references_id', 'variable_slug_references', ['id'], unique=False)
+    op.create_index('ix_slug_ref_slug_entity', 'variable_slug_references', ['slug', 'entity_type'], unique=False)
+    op.create_index('ix_slug_ref_entity', 'variable_slug_references', ['entity_type', 'entity_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove a tabela variable_slug_references."""
+    if table_exists('variable_slug_references'):
+        op.drop_index('ix_slug_ref_entity', table_name='variable_slug_references')
+        op.drop_index('ix_slug_ref_slug_entity', table_name='variable_slug_references')
+        op.drop_index('ix_variable_slug_references_id', table_name='variable_slug_references')
+        op.drop_table('variable_slug_references')
@@ -0,0 +1,58 @@
+"""add contextos_chat_beta
+
+Revision ID: c4f1a6e8b392
+Revises: b3e9d4c7a215
+Create Date: 2026-10-18 11:00:00.000000
+
+Cria a tabela contextos_chat_beta: contexto persistido do chatbot do
+Cumprimento de Sentença Beta (prefixo renderizado, resumo incremental dos
+turnos antigos e buscas de argumentos memorizadas).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a6e8b392'
+down_revision: Union[str, None] = 'b3e9d4c7a215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def table_exists(table_name: str) -> bool:
+    """Verifica se uma tabela já existe (idempotência)."""
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade() -> None:
+    """
+    Cria a tabela contextos_chat_beta.
+
+    A migração é idempotente - não recria a tabela se o init_db já a criou.
+    """
+    if table_exists('contextos_chat_beta'):
+        return
+
+    op.create_table('contextos_chat_beta',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sessao_id', sa.Integer(), nullable=False),
+        sa.Column('prefixo', sa.Text(), nullable=True),
+        sa.Column('versao_prefixo', sa.String(length=64), nullable=True),
+        sa.Column('resumo_historico', sa.Text(), nullable=True),
+        sa.Column('ultima_mensagem_resumida_id', sa.Integer(), nullable=True),
+        sa.Column('memo_argumentos', sa.JSON(), nullable=True),
+        sa.Column('atualizado_em', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['sessao_id'], ['sessoes_cumprimento_beta.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_contextos_chat_beta_id', 'contextos_chat_beta', ['id'], unique=False)
+    op.create_index('ix_contextos_chat_beta_sessao_id', 'contextos_chat_beta', ['sessao_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Remove a tabela contextos_chat_beta."""
+    if table_exists('contextos_chat_beta'):
+        op.drop_index('ix_contextos_chat_beta_sessao_id', table_name='contextos_chat_beta')
+        op.drop_index('ix_contextos_chat_beta_id', table_name='contextos_chat_beta')
+        op.drop_table('contextos_chat_beta')
@@ -0,0 +1,46 @@
+"""add geracao to contextos_chat_beta
+
+Revision ID: d5a2b7f9c013
+Revises: c4f1a6e8b392
+Create Date: 2026-10-19 09:00:00.000000
+
+Adiciona a coluna geracao em contextos_chat_beta: incrementada a cada
+invalidação do contexto (nova consolidação), para que os demais workers
+descartem a cópia em memória em vez de servir o prefixo antigo.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a2b7f9c013'
+down_revision: Union[str, None] = 'c4f1a6e8b392'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def column_exists(table_name: str, column_name: str) -> bool:
+    """Verifica se uma coluna já existe na tabela (idempotência)."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table_name):
+        return False
+    return column_name in {c['name'] for c in inspector.get_columns(table_name)}
+
+
+def upgrade() -> None:
+    """
+    Adiciona contextos_chat_beta.geracao (default 0).
+
+    A migração é idempotente - não recria a coluna se o init_db já a criou.
+    """
+    if column_exists('contextos_chat_beta', 'geracao'):
+        return
+    op.add_column('contextos_chat_beta',
+        sa.Column('geracao', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Remove contextos_chat_beta.geracao."""
+    if column_exists('contextos_chat_beta', 'geracao'):
+        op.drop_column('contextos_chat_beta', 'geracao')
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# scripts/benchmark_audit_log.py
+"""
+Benchmark da leitura do audit log: readlines() completo x leitura reversa
+indexada (utils/audit_log.py).
+
+Gera um audit.log sintético (1 GB por padrão, um evento por segundo, com
+eventos IDOR_ATTEMPT raros), monta o índice e mede o tempo e, em uma segunda
+execução, o pico de memória Python (tracemalloc, que deixa tudo mais lento) de:
+- Últimos 100 eventos
+- Últimos 10 eventos de um tipo raro
+- Janela de 1 hora no meio do arquivo
+
+Uso:
+    python scripts/benchmark_audit_log.py
+    python scripts/benchmark_audit_log.py --tamanho-mb 256 --diretorio /tmp/audit_bench
+
+Autor: LAB/PGE-MS
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.audit_log import ler_eventos_recentes, reconstruir_indice  # noqa: E402
+
+INICIO = datetime(2026, 1, 1)
+EVENTOS = ["AUTH_LOGIN_SUCCESS", "DATA_ACCESS", "ACCESS_GRANTED", "AUTH_LOGOUT", "ADMIN_ACTION"]
+RARO_A_CADA = 400_000
+
+
+def gerar_log(caminho: str, tamanho_mb: int) -> int:
+    """Escreve linhas no formato do audit_handler até atingir tamanho_mb."""
+    alvo = tamanho_mb * 1024 * 1024
+    escrito = linhas = 0
+    with open(caminho, "w", encoding="utf-8") as f:
+        lote = []
+        while escrito < alvo:
+            instante = INICIO + timedelta(seconds=linhas)
+            evento = "IDOR_ATTEMPT" if linhas % RARO_A_CADA == RARO_A_CADA - 1 else EVENTOS[linhas % len(EVENTOS)]
+            registro = {
+                "event": evento, "timestamp": instante.isoformat() + "Z", "success": True,
+                "user_id": linhas % 500, "username": f"usuario{linhas % 500}", "ip_address": "10.0.0.1",
+                "user_agent": "Mozilla/5.0", "path": "/gerador-pecas/api/autos", "method": "GET",
+                "request_id": f"{linhas:012x}",
+            }
+            linha = f"{instante:%Y-%m-%d %H:%M:%S} | INFO | {json.dumps(registro)}\n"
+            lote.append(linha)
+            escrito += len(linha)
+            linhas += 1
+            if len(lote) >= 10_000:
+                f.write("".join(lote))
+                lote.clear()
+        f.write("".join(lote))
+    return linhas
+
+
+def leitura_completa(caminho: str, limit: int, filtro=lambda e, ts: True):
+    """Implementação anterior (readlines + varredura reversa), com filtro opcional."""
+    eventos = []
+    with open(caminho, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    for line in reversed(lines):
+        if len(eventos) >= limit:
+            break
+        parts = line.strip().split(" | ", 2)
+        if len(parts) >= 3:
+            dados = json.loads(parts[2])
+            if filtro(dados, parts[0]):
+                eventos.append(dados)
+    return eventos
+
+
+def medir(nome: str, funcao):
+    t0 = time.perf_counter()
+    resultado = funcao()
+    duracao = time.perf_counter() - t0
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {nome:<34} {duracao * 1000:>10.1f} ms   pico {pico / 1024 / 1024:>8.1f} MB   {len(resultado)} eventos")
+    return resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da leitura do audit log")
+    parser.add_argument("--tamanho-mb", type=int, default=1024)
+    parser.add_argument("--diretorio", default=tempfile.gettempdir())
+    parser.add_argument("--sem-leitura-completa", action="store_true", help="Pula o readlines() (lento em 1 GB)")
+    args = parser.parse_args()
+
+    caminho = os.path.join(args.diretorio, "audit_benchmark.log")
+    t0 = time.perf_counter()
+    linhas = gerar_log(caminho, args.tamanho_mb)
+    print(f"Log gerado: {linhas:,} linhas, {os.path.getsize(caminho) / 1024 / 1024:.0f} MB ({time.perf_counter() - t0:.1f}s)")
+
+    t0 = time.perf_counter()
+    entradas = reconstruir_indice(caminho)
+    print(f"Índice: {entradas} entradas ({time.perf_counter() - t0:.1f}s)\n")
+
+    meio = INICIO + timedelta(seconds=linhas // 2)
+    desde, ate = meio, meio + timedelta(hours=1) - timedelta(seconds=1)
+    desde_txt, ate_txt = f"{desde:%Y-%m-%d %H:%M:%S}", f"{ate:%Y-%m-%d %H:%M:%S}"
+
+    cenarios = [
+        ("últimos 100", 100, {}, lambda e, ts: True),
+        ("10 IDOR_ATTEMPT", 10, {"tipos": {"IDOR_ATTEMPT"}}, lambda e, ts: e["event"] == "IDOR_ATTEMPT"),
+        ("janela de 1h no meio", 5000, {"desde": desde, "ate": ate}, lambda e, ts: desde_txt <= ts <= ate_txt),
+    ]
+    for nome, limit, filtros, filtro_completo in cenarios:
+        print(nome)
+        if not args.sem_leitura_completa:
+            esperado = medir("readlines()", lambda: leitura_completa(caminho, limit, filtro_completo))
+        indexado = medir("reversa + índice", lambda: ler_eventos_recentes(caminho, limit=limit, **filtros))
+        sem_indice = medir("reversa sem índice", lambda: ler_eventos_recentes(caminho, limit=limit, usar_indice=False, **filtros))
+        if not args.sem_leitura_completa:
+            assert [e["request_id"] for e in indexado] == [e["request_id"] for e in esperado]
+        assert [e["request_id"] for e in indexado] == [e["request_id"] for e in sem_indice]
+        print()
+
+    os.remove(caminho)
+    os.remove(caminho + ".idx")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# scripts/benchmark_bert_chunked_inference.py
+"""
+Benchmark da inferência por janelas do BERT (sistemas/bert_training/ml/chunking.py).
+
+Compara, em CPU e com um BERT minúsculo criado localmente (sem download),
+sobre textos sintéticos longos (de 1x a --fator-max x max_length tokens):
+- truncado: um forward de até max_length tokens por texto (cobre só o início)
+- janelas: texto inteiro em janelas sobrepostas, até max_chunks por texto
+  (cabeça + cauda), todas no mesmo forward
+
+Para cada um, mede a latência por texto (p50/p95/máx), as janelas por texto e
+a fração dos tokens do texto que o modelo viu. O custo das janelas é limitado
+por max_chunks: a latência do texto mais longo não passa de ~max_chunks vezes
+a do modo truncado, não importa o tamanho do texto.
+
+Uso:
+    python scripts/benchmark_bert_chunked_inference.py
+    python scripts/benchmark_bert_chunked_inference.py --amostras 100 --max-length 512 --max-chunks 8 --fator-max 20
+
+Autor: LAB/PGE-MS
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import torch  # noqa: E402
+from tokenizers import Tokenizer, models, pre_tokenizers, processors  # noqa: E402
+from transformers import BertConfig, BertForPreTraining, PreTrainedTokenizerFast  # noqa: E402
+
+from sistemas.bert_training.ml.chunking import (  # noqa: E402
+    ChunkingConfig, predict_chunked, select_head_tail, window_starts,
+)
+from sistemas.bert_training.ml.classifier import BertClassifier  # noqa: E402
+
+PALAVRAS = (
+    "o autor requer a condenação do estado ao pagamento de honorários advocatícios "
+    "sentença julgou procedente o pedido recurso de apelação cumprimento de sentença "
+    "prazo intimação certidão trânsito em julgado execução fiscal impugnação cálculo"
+).split()
+
+
+def _criar_modelo(diretorio: str, max_length: int) -> PreTrainedTokenizerFast:
+    especiais = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab = {t: i for i, t in enumerate(especiais + sorted(set(PALAVRAS)))}
+    backend = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]",
+        cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]",
+    )
+    tokenizer.save_pretrained(diretorio)
+
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=128, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=256, max_position_embeddings=max(512, max_length),
+    )
+    BertForPreTraining(config).save_pretrained(diretorio)
+    return tokenizer
+
+
+def _textos(n: int, max_length: int, fator_max: float, seed: int):
+    # Tamanhos uniformes em escala log: de uma janela até fator_max janelas
+    rnd = np.random.default_rng(seed)
+    tamanhos = np.exp(rnd.uniform(np.log(max_length), np.log(fator_max * max_length), size=n))
+    return [" ".join(rnd.choice(PALAVRAS, size=int(t))) for t in tamanhos]
+
+
+def _cobertos(num_tokens: int, config: ChunkingConfig) -> int:
+    """Tokens distintos do texto que entram em alguma janela selecionada."""
+    vistos = np.zeros(num_tokens, dtype=bool)
+    starts = window_starts(num_tokens, config.window_tokens, config.overlap)
+    for start in select_head_tail(starts, config.max_chunks):
+        vistos[start:start + config.window_tokens] = True
+    return int(vistos.sum())
+
+
+def _truncado(modelo, tokenizer, texto: str, max_length: int) -> None:
+    encoding = tokenizer(texto, truncation=True, max_length=max_length, return_tensors="pt")
+    with torch.no_grad():
+        modelo(encoding["input_ids"], encoding["attention_mask"], torch.zeros_like(encoding["input_ids"]))
+
+
+def _medir(funcao, textos) -> np.ndarray:
+    funcao(textos[0])  # aquecimento
+    latencias = []
+    for texto in textos:
+        t0 = time.perf_counter()
+        funcao(texto)
+        latencias.append(time.perf_counter() - t0)
+    return np.array(latencias) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--amostras", type=int, default=50)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--overlap", type=int, default=128)
+    parser.add_argument("--max-chunks", type=int, default=8)
+    parser.add_argument("--fator-max", type=float, default=20.0, help="Texto mais longo, em múltiplos de max_length")
+    parser.add_argument("--threads", type=int, default=0, help="torch.set_num_threads (0 = padrão)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    config = ChunkingConfig(max_length=args.max_length, overlap=args.overlap, max_chunks=args.max_chunks)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modelo_dir = os.path.join(tmp, "tiny_bert")
+        tokenizer = _criar_modelo(modelo_dir, args.max_length)
+        textos = _textos(args.amostras, args.max_length, args.fator_max, args.seed)
+
+        torch.manual_seed(args.seed)
+        modelo = BertClassifier(modelo_dir, num_labels=4).eval()
+
+        tokens = np.array([len(ids) for ids in tokenizer(textos, add_special_tokens=False)["input_ids"]])
+        print(f"{len(textos)} textos de {tokens.min()} a {tokens.max()} tokens (mediana {int(np.median(tokens))}), "
+              f"max_length={args.max_length}, overlap={args.overlap}, max_chunks={args.max_chunks}, "
+              f"{torch.get_num_threads()} threads")
+
+        truncado = _medir(lambda t: _truncado(modelo, tokenizer, t, args.max_length), textos)
+        janelas = _medir(lambda t: predict_chunked(modelo, tokenizer, [t], config), textos)
+
+        _, info = predict_chunked(modelo, tokenizer, textos, config)
+        num_janelas = np.array([i["num_chunks"] for i in info])
+        vistos_janelas = np.array([_cobertos(int(n), config) for n in tokens])
+        vistos_truncado = np.minimum(tokens, config.window_tokens)
+
+        print(f"\n  {'':<10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9} {'janelas':>8} {'cobertura':>10}")
+        for nome, latencias, n, vistos in (
+            ("truncado", truncado, np.ones_like(num_janelas), vistos_truncado),
+            ("janelas", janelas, num_janelas, vistos_janelas),
+        ):
+            print(f"  {nome:<10} {np.percentile(latencias, 50):>9.1f} {np.percentile(latencias, 95):>9.1f} "
+                  f"{latencias.max():>9.1f} {n.mean():>8.1f} {(vistos / tokens).mean():>9.0%}")
+
+        razao = janelas.max() / np.median(truncado)
+        print(f"\nTexto mais caro por janelas: {razao:.1f}x a mediana do truncado "
+              f"(limite teórico ~{args.max_chunks}x, max_chunks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# scripts/benchmark_estado_compartilhado.py
+"""
+Benchmark do estado compartilhado entre workers (utils/estado_compartilhado.py).
+
+Mede a latência por operação (p50/p99) das primitivas usadas no caminho de
+cada request (incremento do rate limit, consulta de bloqueio, set-if-absent e
+consulta de revogação de token), com N processos disputando o mesmo arquivo
+SQLite, e compara com o backend em memória (por processo, sem compartilhar).
+
+Sem --intervalo-us os processos disputam o arquivo em laço fechado (pior caso:
+com mais processos que CPUs, o p99 passa a medir a preempção do escalonador
+de quem está com o lock). Com --intervalo-us cada processo faz uma operação
+a cada N µs, como requisições chegando.
+
+Uso:
+    python scripts/benchmark_estado_compartilhado.py
+    python scripts/benchmark_estado_compartilhado.py --processos 8 --operacoes 5000
+    python scripts/benchmark_estado_compartilhado.py --intervalo-us 500
+
+Autor: LAB/PGE-MS
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.estado_compartilhado import EstadoMemoria, EstadoSQLite  # noqa: E402
+
+OPERACOES = {
+    "incrementar": lambda e, i: e.incrementar(f"rl:ip:{i % 50}", ttl_s=60),
+    "contador": lambda e, i: e.contador(f"bf:falhas:ip:{i % 50}"),
+    "definir_se_ausente": lambda e, i: e.definir_se_ausente(f"lock:{i % 200}", "1", ttl_s=60),
+    "pertence": lambda e, i: e.pertence("revogado", f"jti{i % 500}"),
+}
+
+
+def _medir(estado, operacoes: int, intervalo_s: float) -> dict:
+    tempos = {}
+    for nome, operacao in OPERACOES.items():
+        amostras = []
+        for i in range(operacoes):
+            t0 = time.perf_counter()
+            operacao(estado, i)
+            amostras.append(time.perf_counter() - t0)
+            if intervalo_s:
+                time.sleep(intervalo_s)
+        tempos[nome] = amostras
+    return tempos
+
+
+def _worker(fila, caminho, operacoes, intervalo_s):
+    estado = EstadoSQLite(caminho) if caminho else EstadoMemoria()
+    fila.put(_medir(estado, operacoes, intervalo_s))
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def rodar(nome: str, caminho, processos: int, operacoes: int, intervalo_s: float = 0.0) -> None:
+    contexto = multiprocessing.get_context("fork")
+    fila = contexto.Queue()
+    workers = [
+        contexto.Process(target=_worker, args=(fila, caminho, operacoes, intervalo_s)) for _ in range(processos)
+    ]
+    for w in workers:
+        w.start()
+    resultados = [fila.get() for _ in workers]
+    for w in workers:
+        w.join()
+
+    ritmo = f", uma a cada {intervalo_s * 1e6:.0f} µs" if intervalo_s else ", laço fechado"
+    print(f"{nome} ({processos} processos x {operacoes} operações{ritmo}; {os.cpu_count()} CPUs)")
+    for operacao in OPERACOES:
+        amostras = [t for r in resultados for t in r[operacao]]
+        print(
+            f"  {operacao:<20} p50 {_percentil(amostras, 0.50) * 1e6:>8.1f} µs"
+            f"   p99 {_percentil(amostras, 0.99) * 1e6:>8.1f} µs"
+            f"   p99.9 {_percentil(amostras, 0.999) * 1e6:>8.1f} µs"
+        )
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do estado compartilhado")
+    parser.add_argument("--processos", type=int, default=4)
+    parser.add_argument("--operacoes", type=int, default=2000)
+    parser.add_argument("--intervalo-us", type=float, default=0.0, help="Pausa entre operações (0 = laço fechado)")
+    parser.add_argument("--diretorio", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    caminho = os.path.join(args.diretorio, "estado_benchmark.db")
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+    EstadoSQLite(caminho)
+
+    intervalo_s = args.intervalo_us / 1e6
+    rodar("SQLite WAL (compartilhado)", caminho, args.processos, args.operacoes, intervalo_s)
+    rodar("Memória (por processo)", None, args.processos, args.operacoes, intervalo_s)
+
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+
+if __name__ == "__main__":
+    main()
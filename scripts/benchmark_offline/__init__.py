@@ -0,0 +1,10 @@
+# scripts/benchmark_offline/__init__.py
+"""
+Benchmark offline reprodutivel do portal.
+
+Substitui TJ-MS (SOAP), LLMs (Gemini/OpenRouter) e embeddings por servidores
+locais com latencia configuravel e executa os cenarios principais contra a
+aplicacao in-process. Ver __main__.py para uso.
+
+Autor: LAB/PGE-MS
+"""
@@ -0,0 +1,222 @@
+# scripts/benchmark_offline/__main__.py
+"""
+Benchmark offline: executa os cenarios contra a aplicacao com TJ-MS, LLM e
+embeddings substituidos por servidores locais.
+
+Uso:
+    python -m scripts.benchmark_offline
+    python -m scripts.benchmark_offline --cenarios gerador classificador --concorrencia 8 --requisicoes 40
+    python -m scripts.benchmark_offline --saida atual.json --baseline baseline.json --tolerancia 0.15
+
+Requer:
+    - DATABASE_URL apontando para um PostgreSQL descartavel (o schema e
+      criado no startup da aplicacao)
+
+Saida: relatorio JSON com p50/p95/p99, throughput, erros, queries SQL por
+requisicao e pico de RSS por cenario, alem dos contadores dos servidores
+fake. Com --baseline, retorna codigo 1 se alguma metrica regredir alem da
+tolerancia.
+
+Autor: LAB/PGE-MS
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from .corpus import ConfigCorpus, gerar_corpus
+from .fakes import FakeEmbeddings, FakeLLM, FakeTJMS, Latencia
+from .metricas import AmostradorRSS, ContadorQueries, ResultadoCenario, comparar_com_baseline
+
+PERFIL_PADRAO = Path(__file__).with_name("perfil_padrao.json")
+RAIZ_PROJETO = Path(__file__).resolve().parents[2]
+
+
+def carregar_perfil(caminho: Path) -> Dict:
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def configurar_ambiente(tjms: FakeTJMS, llm: FakeLLM, embeddings: FakeEmbeddings) -> None:
+    """Aponta a aplicacao para os servidores fake (antes de importar main)."""
+    os.environ.update({
+        "TJMS_PROXY_URL": tjms.url,
+        "TJMS_PROXY_LOCAL_URL": "",
+        "URL_WSDL": f"{tjms.url}/soap",
+        "GEMINI_BASE_URL": f"{llm.url}/gemini/v1beta/models",
+        "GEMINI_EMBEDDING_BASE_URL": f"{embeddings.url}/gemini/v1beta/models",
+        "OPENROUTER_ENDPOINT": f"{llm.url}/openrouter/api/v1/chat/completions",
+        "GEMINI_KEY": "benchmark-offline",
+        "OPENROUTER_API_KEY": "benchmark-offline",
+        "RATE_LIMIT_ENABLED": "false",
+    })
+
+
+async def executar_cenario(
+    nome: str,
+    app,
+    engine,
+    token: str,
+    processos: List,
+    concorrencia: int,
+    requisicoes: int,
+    opcoes: Dict
+) -> ResultadoCenario:
+    import httpx
+    from .cenarios import CENARIOS, ErroCenario, executar_requisicao
+
+    resultado = ResultadoCenario(nome=nome, concorrencia=concorrencia)
+    contador = ContadorQueries()
+    contador.instalar(engine)
+    amostrador = AmostradorRSS()
+    amostrador.iniciar()
+
+    fila: asyncio.Queue = asyncio.Queue()
+    for i in range(requisicoes):
+        fila.put_nowait(processos[i % len(processos)])
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transporte,
+        base_url="http://benchmark.local",
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=httpx.Timeout(600.0),
+    ) as cliente:
+
+        async def worker():
+            while True:
+                try:
+                    processo = fila.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    resultado.latencias_ms.append(
+                        await executar_requisicao(CENARIOS[nome], cliente, processo, opcoes)
+                    )
+                except ErroCenario as e:
+                    resultado.registrar_erro(str(e))
+                except Exception as e:
+                    resultado.registrar_erro(f"{type(e).__name__}: {e}")
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concorrencia)))
+        resultado.duracao_s = time.perf_counter() - inicio
+
+    resultado.pico_rss_mb = await amostrador.parar()
+    contador.remover(engine)
+    resultado.queries = contador.total
+    return resultado
+
+
+async def executar(args: argparse.Namespace, perfil: Dict) -> Dict:
+    seed = perfil.get("seed", 42)
+    corpus = gerar_corpus(ConfigCorpus.from_dict({**perfil.get("corpus", {}), "seed": seed}))
+
+    cfg_tjms, cfg_llm = perfil.get("tjms", {}), perfil.get("llm", {})
+    tjms = FakeTJMS(
+        corpus,
+        Latencia.from_dict(cfg_tjms.get("latencia_consulta")),
+        Latencia.from_dict(cfg_tjms.get("latencia_documento")),
+        seed=seed,
+    )
+    llm = FakeLLM(
+        Latencia.from_dict(cfg_llm.get("ttft")),
+        tokens_por_segundo=cfg_llm.get("tokens_por_segundo", 80.0),
+        tokens_saida=cfg_llm.get("tokens_saida", 400),
+        tokens_por_chunk=cfg_llm.get("tokens_por_chunk", 20),
+        respostas=cfg_llm.get("respostas"),
+        resposta_json=cfg_llm.get("resposta_json"),
+        seed=seed,
+    )
+    embeddings = FakeEmbeddings(Latencia.from_dict(perfil.get("embeddings", {}).get("latencia")), seed=seed)
+    fakes = [tjms, llm, embeddings]
+
+    for fake in fakes:
+        fake.iniciar()
+    try:
+        configurar_ambiente(tjms, llm, embeddings)
+
+        # Importa a aplicacao somente apos configurar o ambiente
+        if str(RAIZ_PROJETO) not in sys.path:
+            sys.path.insert(0, str(RAIZ_PROJETO))
+        from main import app
+        from auth.security import create_access_token
+        from config import ADMIN_USERNAME
+        from database.connection import engine
+
+        token = create_access_token({"sub": ADMIN_USERNAME})
+        processos = list(corpus.values())
+        relatorio_cenarios = {}
+
+        async with app.router.lifespan_context(app):
+            for nome in args.cenarios:
+                print(f"[benchmark] {nome}: {args.requisicoes} requisicoes, concorrencia {args.concorrencia}")
+                resultado = await executar_cenario(
+                    nome, app, engine, token, processos,
+                    args.concorrencia, args.requisicoes,
+                    perfil.get("cenarios", {}).get(nome, {}),
+                )
+                relatorio_cenarios[nome] = resultado.resumo()
+                resumo = relatorio_cenarios[nome]
+                print(
+                    f"[benchmark] {nome}: p50={resumo['p50_ms']}ms p95={resumo['p95_ms']}ms "
+                    f"rps={resumo['throughput_rps']} erros={resumo['erros']} "
+                    f"queries/req={resumo['queries_por_requisicao']}"
+                )
+    finally:
+        for fake in fakes:
+            fake.parar()
+
+    return {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "perfil": str(args.perfil),
+        "seed": seed,
+        "cenarios": relatorio_cenarios,
+        "fakes": {fake.nome: dict(fake.estatisticas) for fake in fakes},
+    }
+
+
+def main(argv=None) -> int:
+    from .cenarios import CENARIOS, nomes_validos
+
+    parser = argparse.ArgumentParser(description="Benchmark offline com TJ-MS e LLM simulados")
+    parser.add_argument("--cenarios", nargs="+", default=list(CENARIOS), help="Cenarios a executar")
+    parser.add_argument("--concorrencia", type=int, default=4, help="Requisicoes simultaneas por cenario")
+    parser.add_argument("--requisicoes", type=int, default=20, help="Total de requisicoes por cenario")
+    parser.add_argument("--perfil", type=Path, default=PERFIL_PADRAO, help="Perfil JSON (corpus e latencias)")
+    parser.add_argument("--saida", type=Path, help="Arquivo do relatorio JSON (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="Relatorio anterior para comparacao")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Regressao relativa aceita (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    nomes_validos(args.cenarios)
+    relatorio = asyncio.run(executar(args, carregar_perfil(args.perfil)))
+
+    conteudo = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        args.saida.write_text(conteudo, encoding="utf-8")
+        print(f"[benchmark] Relatorio salvo em {args.saida}")
+    else:
+        print(conteudo)
+
+    if args.baseline:
+        regressoes = comparar_com_baseline(relatorio, carregar_perfil(args.baseline), args.tolerancia)
+        for r in regressoes:
+            print(
+                f"[benchmark] REGRESSAO {r['cenario']}.{r['metrica']}: "
+                f"{r['baseline']} -> {r['atual']} ({r['variacao_pct']:+}%)"
+            )
+        if regressoes:
+            return 1
+        print("[benchmark] Sem regressoes em relacao ao baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
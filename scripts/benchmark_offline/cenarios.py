@@ -0,0 +1,146 @@
+# scripts/benchmark_offline/cenarios.py
+"""
+Cenarios do benchmark offline.
+
+Cada cenario executa uma requisicao fim a fim contra a aplicacao (in-process,
+via httpx.ASGITransport) e consome o stream SSE ate o fim. Um evento SSE com
+tipo de erro conta como falha, mesmo com HTTP 200.
+
+Cenarios:
+- gerador: POST /gerador-pecas/api/processar-stream
+- classificador: cria projeto, adiciona codigos TJ-MS e executa (SSE)
+- pedido_calculo: POST /pedido-calculo/api/processar-stream
+- relatorio_cumprimento: POST /relatorio-cumprimento/api/processar-stream
+
+Autor: LAB/PGE-MS
+"""
+
+import json
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .corpus import ProcessoSintetico
+
+TIPOS_EVENTO_ERRO = {"erro", "error"}
+
+
+class ErroCenario(Exception):
+    """Falha de uma requisicao do cenario (HTTP != 2xx ou evento de erro)."""
+
+
+async def consumir_sse(resposta: httpx.Response) -> int:
+    """
+    Consome o stream SSE ate o fim.
+
+    Returns:
+        Quantidade de eventos recebidos
+
+    Raises:
+        ErroCenario: Se algum evento sinalizar erro
+    """
+    eventos = 0
+    async for linha in resposta.aiter_lines():
+        if not linha.startswith("data:"):
+            continue
+        eventos += 1
+        dados = linha[5:].strip()
+        if not dados or dados == "[DONE]":
+            continue
+        try:
+            evento = json.loads(dados)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(evento, dict):
+            tipo = evento.get("tipo") or evento.get("type") or evento.get("status")
+            if tipo in TIPOS_EVENTO_ERRO:
+                raise ErroCenario(str(evento.get("mensagem") or evento.get("message") or evento)[:300])
+    return eventos
+
+
+async def _post_stream(cliente: httpx.AsyncClient, url: str, payload: Dict) -> None:
+    async with cliente.stream("POST", url, json=payload) as resposta:
+        if resposta.status_code >= 400:
+            corpo = (await resposta.aread()).decode("utf-8", errors="ignore")
+            raise ErroCenario(f"HTTP {resposta.status_code} em {url}: {corpo[:200]}")
+        await consumir_sse(resposta)
+
+
+# ============================================================================
+# CENARIOS
+# ============================================================================
+
+async def cenario_gerador(cliente: httpx.AsyncClient, processo: ProcessoSintetico, opcoes: Dict) -> None:
+    await _post_stream(cliente, "/gerador-pecas/api/processar-stream", {
+        "numero_cnj": processo.numero,
+        "tipo_peca": opcoes.get("tipo_peca", "contestacao"),
+    })
+
+
+async def cenario_classificador(cliente: httpx.AsyncClient, processo: ProcessoSintetico, opcoes: Dict) -> None:
+    resposta = await cliente.post("/classificador/api/projetos", json={
+        "nome": f"benchmark {processo.numero}",
+        "modelo": opcoes.get("modelo", "google/gemini-2.5-flash-lite"),
+        "max_concurrent": opcoes.get("max_concurrent", 3),
+    })
+    if resposta.status_code >= 400:
+        raise ErroCenario(f"HTTP {resposta.status_code} ao criar projeto: {resposta.text[:200]}")
+    projeto_id = resposta.json()["id"]
+
+    limite = opcoes.get("documentos_por_processo", 10)
+    resposta = await cliente.post(f"/classificador/api/projetos/{projeto_id}/codigos-tjms", json={
+        "numero_cnj": processo.numero,
+        "ids_documentos": [doc.id for doc in processo.documentos[:limite]],
+    })
+    if resposta.status_code >= 400:
+        raise ErroCenario(f"HTTP {resposta.status_code} ao adicionar codigos: {resposta.text[:200]}")
+
+    async with cliente.stream("GET", f"/classificador/api/projetos/{projeto_id}/executar") as resposta:
+        if resposta.status_code >= 400:
+            corpo = (await resposta.aread()).decode("utf-8", errors="ignore")
+            raise ErroCenario(f"HTTP {resposta.status_code} ao executar: {corpo[:200]}")
+        await consumir_sse(resposta)
+
+
+async def cenario_pedido_calculo(cliente: httpx.AsyncClient, processo: ProcessoSintetico, opcoes: Dict) -> None:
+    await _post_stream(cliente, "/pedido-calculo/api/processar-stream", {
+        "numero_cnj": processo.numero,
+        "sobrescrever_existente": True,
+    })
+
+
+async def cenario_relatorio_cumprimento(cliente: httpx.AsyncClient, processo: ProcessoSintetico, opcoes: Dict) -> None:
+    await _post_stream(cliente, "/relatorio-cumprimento/api/processar-stream", {
+        "numero_cnj": processo.numero,
+        "sobrescrever_existente": True,
+    })
+
+
+Cenario = Callable[[httpx.AsyncClient, ProcessoSintetico, Dict], Awaitable[None]]
+
+CENARIOS: Dict[str, Cenario] = {
+    "gerador": cenario_gerador,
+    "classificador": cenario_classificador,
+    "pedido_calculo": cenario_pedido_calculo,
+    "relatorio_cumprimento": cenario_relatorio_cumprimento,
+}
+
+
+async def executar_requisicao(
+    cenario: Cenario,
+    cliente: httpx.AsyncClient,
+    processo: ProcessoSintetico,
+    opcoes: Optional[Dict] = None
+) -> float:
+    """Executa uma requisicao do cenario e retorna a latencia em ms."""
+    inicio = time.perf_counter()
+    await cenario(cliente, processo, opcoes or {})
+    return (time.perf_counter() - inicio) * 1000
+
+
+def nomes_validos(nomes: List[str]) -> List[str]:
+    invalidos = [n for n in nomes if n not in CENARIOS]
+    if invalidos:
+        raise ValueError(f"Cenarios desconhecidos: {', '.join(invalidos)} (disponiveis: {', '.join(CENARIOS)})")
+    return nomes
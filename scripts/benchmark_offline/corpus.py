@@ -0,0 +1,202 @@
+# scripts/benchmark_offline/corpus.py
+"""
+Corpus sintetico de processos para o benchmark offline.
+
+Gera, de forma deterministica (seed), processos no formato MNI/CNJ com:
+- Dados basicos, polos, movimentos (citacao, transito em julgado, intimacao)
+- Documentos dos tipos relevantes (peticao inicial, sentenca, acordao,
+  certidoes, pedido de cumprimento) com quantidade e tamanho configuraveis
+
+Os PDFs sao gerados com PyMuPDF e cacheados por quantidade de paginas.
+
+Autor: LAB/PGE-MS
+"""
+
+import base64
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+NS_TIPOS = "http://www.cnj.jus.br/intercomunicacao-2.2.2"
+NS_SERVICO = "http://www.cnj.jus.br/servico-intercomunicacao-2.2.2/"
+
+# Tipos de documento usados nos cenarios (codigos TJ-MS)
+TIPOS_DOCUMENTO_CORPUS = [
+    ("9500", "Petição Inicial"),
+    ("8", "Sentença"),
+    ("37", "Acórdão"),
+    ("9508", "Certidão"),
+    ("13", "Certidão de Cartório"),
+    ("286", "Pedido de Cumprimento de Sentença contra a Fazenda Pública"),
+    ("9501", "Petição Intermediária"),
+    ("15", "Decisão Interlocutória"),
+]
+
+PARAGRAFO_BASE = (
+    "Trata-se de ação ajuizada em face do Estado de Mato Grosso do Sul em que a parte "
+    "autora requer o fornecimento de medicamento e o pagamento de valores retroativos. "
+    "O juízo analisou as provas dos autos, os laudos periciais e as manifestações das "
+    "partes, concluindo pela procedência parcial dos pedidos formulados na inicial. "
+)
+
+
+@dataclass
+class DocumentoSintetico:
+    id: str
+    tipo: str
+    descricao: str
+    data_hora: datetime
+    paginas: int
+
+
+@dataclass
+class ProcessoSintetico:
+    numero: str
+    classe: str
+    data_ajuizamento: datetime
+    documentos: List[DocumentoSintetico] = field(default_factory=list)
+    movimentos: List[Dict[str, str]] = field(default_factory=list)
+
+
+@dataclass
+class ConfigCorpus:
+    """
+    Parametros do corpus.
+
+    Attributes:
+        processos: Quantidade de processos gerados
+        documentos_min/documentos_max: Faixa de documentos por processo
+        paginas_min/paginas_max: Faixa de paginas por documento
+        seed: Semente do gerador (corpus reprodutivel)
+    """
+    processos: int = 20
+    documentos_min: int = 8
+    documentos_max: int = 30
+    paginas_min: int = 1
+    paginas_max: int = 12
+    seed: int = 42
+
+    @classmethod
+    def from_dict(cls, dados: Dict) -> "ConfigCorpus":
+        return cls(**{k: v for k, v in dados.items() if k in cls.__dataclass_fields__})
+
+
+def _numero_cnj(rng: random.Random, indice: int) -> str:
+    sequencial = 800000 + indice
+    ano = rng.choice([2019, 2020, 2021, 2022, 2023, 2024])
+    return f"{sequencial:07d}{rng.randint(10, 99)}{ano}8120001"
+
+
+def gerar_corpus(config: ConfigCorpus) -> Dict[str, ProcessoSintetico]:
+    """Gera o corpus (numero CNJ -> processo)."""
+    rng = random.Random(config.seed)
+    corpus: Dict[str, ProcessoSintetico] = {}
+
+    for indice in range(config.processos):
+        numero = _numero_cnj(rng, indice)
+        ajuizamento = datetime(2020, 1, 1) + timedelta(days=rng.randint(0, 1500))
+        processo = ProcessoSintetico(
+            numero=numero,
+            classe="Procedimento Comum Cível",
+            data_ajuizamento=ajuizamento,
+        )
+
+        total_docs = rng.randint(config.documentos_min, config.documentos_max)
+        data = ajuizamento
+        for d in range(total_docs):
+            # Os primeiros documentos cobrem o fluxo principal; os demais sao aleatorios
+            tipo, descricao = TIPOS_DOCUMENTO_CORPUS[d] if d < 6 else rng.choice(TIPOS_DOCUMENTO_CORPUS)
+            data = data + timedelta(days=rng.randint(3, 60), hours=rng.randint(8, 17))
+            processo.documentos.append(DocumentoSintetico(
+                id=f"{numero[-6:]}{d:04d}",
+                tipo=tipo,
+                descricao=descricao,
+                data_hora=data,
+                paginas=rng.randint(config.paginas_min, config.paginas_max),
+            ))
+
+        datas = [doc.data_hora for doc in processo.documentos]
+        processo.movimentos = [
+            {"data": datas[0], "descricao": "Expedição de Citação eletrônica"},
+            {"data": datas[min(1, len(datas) - 1)], "descricao": "Julgado procedente em parte o pedido"},
+            {"data": datas[min(3, len(datas) - 1)], "descricao": "Trânsito em julgado"},
+            {"data": datas[-1], "descricao": "Intimação eletrônica - Cumprimento de sentença"},
+        ]
+        corpus[numero] = processo
+
+    return corpus
+
+
+def _fmt_data(data: datetime) -> str:
+    return data.strftime("%Y%m%d%H%M%S")
+
+
+def processo_para_xml(processo: ProcessoSintetico, ids_conteudo: Optional[List[str]] = None) -> str:
+    """
+    Serializa o processo como resposta SOAP consultarProcesso.
+
+    Args:
+        processo: Processo sintetico
+        ids_conteudo: Se informado, inclui o conteudo base64 desses documentos
+    """
+    ids_conteudo = set(ids_conteudo or [])
+    partes = [
+        '<ns2:polo polo="AT"><ns2:parte><ns2:pessoa nome="Maria da Silva Sintetica" tipoPessoa="fisica">'
+        '<ns2:documento codigoDocumento="12345678901" tipoDocumento="CMF"/></ns2:pessoa></ns2:parte></ns2:polo>',
+        '<ns2:polo polo="PA"><ns2:parte><ns2:pessoa nome="Estado de Mato Grosso do Sul" tipoPessoa="juridica">'
+        '<ns2:documento codigoDocumento="15412257000128" tipoDocumento="CMF"/></ns2:pessoa></ns2:parte></ns2:polo>',
+    ]
+
+    movimentos = [
+        f'<ns2:movimento dataHora="{_fmt_data(m["data"])}">'
+        f'<ns2:movimentoLocal codigoMovimento="1" descricao="{escape(m["descricao"])}">{escape(m["descricao"])}</ns2:movimentoLocal>'
+        f'</ns2:movimento>'
+        for m in processo.movimentos
+    ]
+
+    documentos = []
+    for doc in processo.documentos:
+        conteudo = ""
+        if doc.id in ids_conteudo:
+            b64 = base64.b64encode(pdf_sintetico(doc.paginas, doc.descricao)).decode("ascii")
+            conteudo = f"<ns2:conteudo>{b64}</ns2:conteudo>"
+        documentos.append(
+            f'<ns2:documento idDocumento="{doc.id}" tipoDocumento="{doc.tipo}" '
+            f'dataHora="{_fmt_data(doc.data_hora)}" descricao="{escape(doc.descricao)}" '
+            f'mimetype="application/pdf" nivelSigilo="0">{conteudo}</ns2:documento>'
+        )
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+        f'<ns3:consultarProcessoResposta xmlns:ns3="{NS_SERVICO}" xmlns:ns2="{NS_TIPOS}">'
+        '<ns2:sucesso>true</ns2:sucesso><ns2:mensagem>Processo consultado com sucesso</ns2:mensagem>'
+        '<ns2:processo>'
+        f'<ns2:dadosBasicos numero="{processo.numero}" classeProcessual="7" codigoLocalidade="1" competencia="2">'
+        + "".join(partes) +
+        '<ns2:orgaoJulgador nomeOrgao="1ª Vara de Fazenda Pública e de Registros Públicos" codigoMunicipioIBGE="5002704"/>'
+        '<ns2:valorCausa>15000.00</ns2:valorCausa>'
+        f'<ns2:dataAjuizamento>{_fmt_data(processo.data_ajuizamento)}</ns2:dataAjuizamento>'
+        '</ns2:dadosBasicos>'
+        + "".join(movimentos) + "".join(documentos) +
+        '</ns2:processo></ns3:consultarProcessoResposta></soap:Body></soap:Envelope>'
+    )
+
+
+@lru_cache(maxsize=64)
+def pdf_sintetico(paginas: int, titulo: str = "Documento") -> bytes:
+    """PDF com `paginas` paginas de texto corrido (cacheado por tamanho/titulo)."""
+    import fitz
+
+    doc = fitz.open()
+    try:
+        for p in range(paginas):
+            page = doc.new_page()
+            texto = f"{titulo} - página {p + 1}\n\n" + (PARAGRAFO_BASE * 12)
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), texto, fontsize=10)
+        return doc.tobytes()
+    finally:
+        doc.close()
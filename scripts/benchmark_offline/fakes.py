@@ -0,0 +1,449 @@
+# scripts/benchmark_offline/fakes.py
+"""
+Servidores locais que substituem os upstreams no benchmark offline.
+
+- FakeTJMS: endpoint SOAP consultarProcesso (metadados e download de conteudo)
+  servido a partir do corpus sintetico
+- FakeLLM: API Gemini (generateContent, streamGenerateContent?alt=sse) e
+  OpenRouter (chat/completions, com e sem stream) com latencia de primeiro
+  token e velocidade de geracao configuraveis; com `capacidade`, responde
+  429 quando ha mais requisicoes simultaneas que a cota
+- FakeEmbeddings: embedContent / batchEmbedContents com vetores deterministicos
+
+Cada servidor e uma aplicacao Starlette executada por uvicorn em uma thread
+propria, em porta livre de 127.0.0.1. Os contadores de chamadas ficam em
+`servidor.estatisticas` e entram no relatorio.
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from .corpus import ProcessoSintetico, processo_para_xml
+
+DIMENSAO_EMBEDDING = 768
+
+_RE_NUMERO = re.compile(r"<(?:\w+:)?numeroProcesso>\s*(\d+)\s*</(?:\w+:)?numeroProcesso>")
+_RE_DOCUMENTO = re.compile(r"<(?:\w+:)?documento>\s*([^<\s]+)\s*</(?:\w+:)?documento>")
+
+
+# ============================================================================
+# LATENCIA
+# ============================================================================
+
+@dataclass
+class Latencia:
+    """
+    Distribuicao de latencia em milissegundos.
+
+    distribuicao: "fixa", "normal" ou "lognormal" (cauda longa, default)
+    """
+    media_ms: float = 0.0
+    desvio_ms: float = 0.0
+    distribuicao: str = "lognormal"
+
+    @classmethod
+    def from_dict(cls, dados: Optional[Dict]) -> "Latencia":
+        return cls(**(dados or {}))
+
+    def amostra(self, rng: random.Random) -> float:
+        """Retorna uma amostra em segundos."""
+        if self.media_ms <= 0:
+            return 0.0
+        if self.distribuicao == "fixa" or self.desvio_ms <= 0:
+            valor = self.media_ms
+        elif self.distribuicao == "normal":
+            valor = rng.gauss(self.media_ms, self.desvio_ms)
+        else:
+            # Parametros da lognormal a partir de media/desvio desejados
+            import math
+            variancia = self.desvio_ms ** 2
+            sigma2 = math.log(1 + variancia / self.media_ms ** 2)
+            mu = math.log(self.media_ms) - sigma2 / 2
+            valor = rng.lognormvariate(mu, math.sqrt(sigma2))
+        return max(valor, 0.0) / 1000.0
+
+
+# ============================================================================
+# SERVIDOR BASE
+# ============================================================================
+
+def _porta_livre() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class ServidorFake:
+    """Executa uma app Starlette com uvicorn em thread dedicada."""
+
+    nome = "fake"
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.estatisticas: Counter = Counter()
+        self.porta: Optional[int] = None
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.porta}"
+
+    def rotas(self) -> List[Route]:
+        raise NotImplementedError
+
+    def iniciar(self) -> "ServidorFake":
+        self.porta = _porta_livre()
+        config = uvicorn.Config(
+            Starlette(routes=self.rotas()),
+            host="127.0.0.1",
+            port=self.porta,
+            log_level="warning",
+            lifespan="off",
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name=f"fake-{self.nome}", daemon=True)
+        self._thread.start()
+
+        limite = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > limite:
+                raise RuntimeError(f"Servidor fake {self.nome} nao iniciou")
+            time.sleep(0.02)
+        return self
+
+    def parar(self) -> None:
+        if self._server:
+            self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+# ============================================================================
+# TJ-MS (SOAP)
+# ============================================================================
+
+class FakeTJMS(ServidorFake):
+    """
+    SOAP consultarProcesso servido a partir do corpus.
+
+    Sem <documento> no envelope: retorna metadados. Com ids: retorna os
+    documentos com conteudo base64. A latencia do download soma um custo
+    por documento solicitado.
+    """
+
+    nome = "tjms"
+
+    def __init__(
+        self,
+        corpus: Dict[str, ProcessoSintetico],
+        latencia_consulta: Latencia,
+        latencia_documento: Latencia,
+        seed: int = 0
+    ):
+        super().__init__(seed)
+        self.corpus = corpus
+        self.latencia_consulta = latencia_consulta
+        self.latencia_documento = latencia_documento
+
+    def rotas(self) -> List[Route]:
+        return [
+            Route("/", self.soap, methods=["POST", "GET"]),
+            Route("/soap", self.soap, methods=["POST", "GET"]),
+        ]
+
+    async def soap(self, request: Request) -> Response:
+        if request.method == "GET":
+            return Response("<wsdl/>", media_type="text/xml")
+
+        corpo = (await request.body()).decode("utf-8", errors="ignore")
+        match = _RE_NUMERO.search(corpo)
+        processo = self.corpus.get(match.group(1)) if match else None
+        ids = _RE_DOCUMENTO.findall(corpo)
+
+        atraso = self.latencia_consulta.amostra(self.rng)
+        for _ in ids:
+            atraso += self.latencia_documento.amostra(self.rng)
+        await asyncio.sleep(atraso)
+
+        if processo is None:
+            self.estatisticas["nao_encontrado"] += 1
+            return Response(
+                '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+                '<ns3:consultarProcessoResposta xmlns:ns3="http://www.cnj.jus.br/servico-intercomunicacao-2.2.2/" '
+                'xmlns:ns2="http://www.cnj.jus.br/intercomunicacao-2.2.2"><ns2:sucesso>false</ns2:sucesso>'
+                '<ns2:mensagem>Processo nao encontrado</ns2:mensagem></ns3:consultarProcessoResposta>'
+                '</soap:Body></soap:Envelope>',
+                media_type="text/xml",
+            )
+
+        if ids:
+            self.estatisticas["download"] += 1
+            self.estatisticas["documentos_baixados"] += len(ids)
+        else:
+            self.estatisticas["consulta"] += 1
+
+        xml = await asyncio.to_thread(processo_para_xml, processo, ids or None)
+        return Response(xml, media_type="text/xml; charset=utf-8")
+
+
+# ============================================================================
+# LLM (Gemini + OpenRouter)
+# ============================================================================
+
+PALAVRAS_LOREM = (
+    "o estado de mato grosso do sul apresenta manifestacao nos autos em face do pedido "
+    "formulado pela parte autora considerando a jurisprudencia consolidada e os documentos "
+    "juntados requer a improcedencia dos pedidos e subsidiariamente a fixacao de prazo razoavel"
+).split()
+
+
+class FakeLLM(ServidorFake):
+    """
+    Gemini e OpenRouter com latencia de primeiro token + tokens/segundo.
+
+    Conteudo da resposta:
+    - Primeira regra de `respostas` cujo trecho aparece no prompt; senao
+    - `resposta_json` quando responseMimeType=application/json; senao
+    - Texto sintetico com `tokens_saida` tokens
+
+    Com `capacidade` > 0, requisicoes alem desse numero em voo recebem 429
+    (Retry-After: 0), como a cota por minuto da API real.
+    """
+
+    nome = "llm"
+
+    def __init__(
+        self,
+        ttft: Latencia,
+        tokens_por_segundo: float = 80.0,
+        tokens_saida: int = 400,
+        tokens_por_chunk: int = 20,
+        respostas: Optional[List[Dict[str, str]]] = None,
+        resposta_json: Optional[Dict] = None,
+        capacidade: int = 0,
+        seed: int = 0
+    ):
+        super().__init__(seed)
+        self.capacidade = capacidade
+        self.em_voo = 0
+        self.ttft = ttft
+        self.tokens_por_segundo = tokens_por_segundo
+        self.tokens_saida = tokens_saida
+        self.tokens_por_chunk = max(1, tokens_por_chunk)
+        self.respostas = respostas or []
+        self.resposta_json = resposta_json if resposta_json is not None else {"resultado": "ok"}
+
+    def rotas(self) -> List[Route]:
+        return [
+            Route("/gemini/v1beta/models/{modelo_acao:path}", self._com_cota(self.gemini), methods=["POST"]),
+            Route("/openrouter/api/v1/chat/completions", self._com_cota(self.openrouter), methods=["POST"]),
+        ]
+
+    def _com_cota(self, handler):
+        """Conta requisicoes em voo (ate o fim do stream) e aplica a capacidade."""
+        async def _handler(request: Request) -> Response:
+            if self.capacidade and self.em_voo >= self.capacidade:
+                self.estatisticas["429"] += 1
+                return JSONResponse(
+                    {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                    status_code=429,
+                    headers={"Retry-After": "0"},
+                )
+            self.em_voo += 1
+            self.estatisticas["pico_em_voo"] = max(self.estatisticas["pico_em_voo"], self.em_voo)
+            try:
+                resposta = await handler(request)
+            except BaseException:
+                self.em_voo -= 1
+                raise
+            if isinstance(resposta, StreamingResponse):
+                iterador = resposta.body_iterator
+
+                async def _contando():
+                    try:
+                        async for parte in iterador:
+                            yield parte
+                    finally:
+                        self.em_voo -= 1
+
+                resposta.body_iterator = _contando()
+            else:
+                self.em_voo -= 1
+            return resposta
+
+        return _handler
+
+    # ------------------------------------------------------------------
+
+    def _texto_resposta(self, prompt: str, json_mode: bool) -> str:
+        for regra in self.respostas:
+            if regra.get("contem", "") in prompt:
+                return regra["texto"]
+        if json_mode:
+            return json.dumps(self.resposta_json, ensure_ascii=False)
+        return " ".join(PALAVRAS_LOREM[i % len(PALAVRAS_LOREM)] for i in range(self.tokens_saida))
+
+    def _chunks(self, texto: str) -> List[str]:
+        palavras = texto.split(" ")
+        return [
+            " ".join(palavras[i:i + self.tokens_por_chunk]) + (" " if i + self.tokens_por_chunk < len(palavras) else "")
+            for i in range(0, len(palavras), self.tokens_por_chunk)
+        ] or [""]
+
+    def _tempo_geracao(self, tokens: int) -> float:
+        return tokens / self.tokens_por_segundo if self.tokens_por_segundo > 0 else 0.0
+
+    # ------------------------------------------------------------------
+
+    async def gemini(self, request: Request) -> Response:
+        modelo_acao = request.path_params["modelo_acao"]
+        if modelo_acao.endswith(":embedContent") or modelo_acao.endswith(":batchEmbedContents"):
+            # Embeddings atendidos por FakeEmbeddings; aqui apenas por conveniencia
+            return await FakeEmbeddings.responder(request, modelo_acao, self.estatisticas)
+
+        payload = await request.json()
+        prompt = "".join(
+            part.get("text", "")
+            for content in payload.get("contents", [])
+            for part in content.get("parts", [])
+            if isinstance(part, dict)
+        )
+        json_mode = (payload.get("generationConfig") or {}).get("responseMimeType") == "application/json"
+        texto = self._texto_resposta(prompt, json_mode)
+        chunks = self._chunks(texto)
+        uso = {
+            "promptTokenCount": len(prompt) // 4,
+            "candidatesTokenCount": len(texto.split()),
+            "totalTokenCount": len(prompt) // 4 + len(texto.split()),
+        }
+
+        if ":streamGenerateContent" in modelo_acao:
+            self.estatisticas["gemini_stream"] += 1
+
+            async def eventos():
+                await asyncio.sleep(self.ttft.amostra(self.rng))
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        await asyncio.sleep(self._tempo_geracao(self.tokens_por_chunk))
+                    dados = {"candidates": [{"content": {"role": "model", "parts": [{"text": chunk}]}}]}
+                    if i == len(chunks) - 1:
+                        dados["candidates"][0]["finishReason"] = "STOP"
+                        dados["usageMetadata"] = uso
+                    yield f"data: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+            return StreamingResponse(eventos(), media_type="text/event-stream")
+
+        self.estatisticas["gemini"] += 1
+        await asyncio.sleep(self.ttft.amostra(self.rng) + self._tempo_geracao(len(texto.split())))
+        return JSONResponse({
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": texto}]},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": uso,
+        })
+
+    async def openrouter(self, request: Request) -> Response:
+        payload = await request.json()
+        prompt = "".join(
+            m.get("content", "") if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+            for m in payload.get("messages", [])
+        )
+        json_mode = (payload.get("response_format") or {}).get("type") in ("json_object", "json_schema")
+        texto = self._texto_resposta(prompt, json_mode)
+        uso = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(texto.split()),
+            "total_tokens": len(prompt) // 4 + len(texto.split()),
+        }
+
+        if payload.get("stream"):
+            self.estatisticas["openrouter_stream"] += 1
+            chunks = self._chunks(texto)
+
+            async def eventos():
+                await asyncio.sleep(self.ttft.amostra(self.rng))
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        await asyncio.sleep(self._tempo_geracao(self.tokens_por_chunk))
+                    yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {'content': chunk}}]}, ensure_ascii=False)}\n\n"
+                yield f"data: {json.dumps({'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}], 'usage': uso})}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(eventos(), media_type="text/event-stream")
+
+        self.estatisticas["openrouter"] += 1
+        await asyncio.sleep(self.ttft.amostra(self.rng) + self._tempo_geracao(len(texto.split())))
+        return JSONResponse({
+            "id": "fake-openrouter",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": texto}, "finish_reason": "stop"}],
+            "usage": uso,
+        })
+
+
+# ============================================================================
+# EMBEDDINGS
+# ============================================================================
+
+def vetor_deterministico(texto: str, dimensao: int = DIMENSAO_EMBEDDING) -> List[float]:
+    """Vetor unitario derivado do hash do texto (mesmo texto -> mesmo vetor)."""
+    semente = int.from_bytes(hashlib.sha256(texto.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(semente)
+    valores = [rng.uniform(-1.0, 1.0) for _ in range(dimensao)]
+    norma = sum(v * v for v in valores) ** 0.5 or 1.0
+    return [v / norma for v in valores]
+
+
+class FakeEmbeddings(ServidorFake):
+    """embedContent / batchEmbedContents no formato da API Gemini."""
+
+    nome = "embeddings"
+
+    def __init__(self, latencia: Latencia, seed: int = 0):
+        super().__init__(seed)
+        self.latencia = latencia
+
+    def rotas(self) -> List[Route]:
+        return [Route("/gemini/v1beta/models/{modelo_acao:path}", self.embed, methods=["POST"])]
+
+    async def embed(self, request: Request) -> Response:
+        await asyncio.sleep(self.latencia.amostra(self.rng))
+        return await self.responder(request, request.path_params["modelo_acao"], self.estatisticas)
+
+    @staticmethod
+    async def responder(request: Request, modelo_acao: str, estatisticas: Counter) -> Response:
+        payload = await request.json()
+
+        def _texto(req: Dict) -> str:
+            return "".join(p.get("text", "") for p in (req.get("content") or {}).get("parts", []))
+
+        def _dim(req: Dict) -> int:
+            return int(req.get("outputDimensionality") or DIMENSAO_EMBEDDING)
+
+        if modelo_acao.endswith(":batchEmbedContents"):
+            reqs = payload.get("requests", [])
+            estatisticas["embeddings_batch"] += 1
+            estatisticas["embeddings"] += len(reqs)
+            return JSONResponse({"embeddings": [{"values": vetor_deterministico(_texto(r), _dim(r))} for r in reqs]})
+
+        estatisticas["embeddings"] += 1
+        return JSONResponse({"embedding": {"values": vetor_deterministico(_texto(payload), _dim(payload))}})
@@ -0,0 +1,189 @@
+# scripts/benchmark_offline/metricas.py
+"""
+Coleta de metricas do benchmark offline.
+
+- Latencia por requisicao (p50/p95/p99, media) e throughput
+- Pico de RSS do processo (amostrado; psutil se disponivel, senao getrusage)
+- Contagem de queries SQL (listener before_cursor_execute no engine)
+- Comparacao com um relatorio baseline
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por interpolacao linear (mesma definicao do numpy)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicao = (len(ordenados) - 1) * p / 100.0
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    fracao = posicao - inferior
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * fracao
+
+
+# ============================================================================
+# MEMORIA
+# ============================================================================
+
+def rss_atual_mb() -> Optional[float]:
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def rss_pico_processo_mb() -> float:
+    """Pico de RSS desde o inicio do processo (getrusage)."""
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+class AmostradorRSS:
+    """Amostra o RSS em background para obter o pico por cenario."""
+
+    def __init__(self, intervalo: float = 0.05):
+        self.intervalo = intervalo
+        self.pico_mb = 0.0
+        self._tarefa: Optional[asyncio.Task] = None
+
+    async def _loop(self):
+        while True:
+            atual = rss_atual_mb()
+            if atual is None:
+                return
+            self.pico_mb = max(self.pico_mb, atual)
+            await asyncio.sleep(self.intervalo)
+
+    def iniciar(self):
+        self.pico_mb = rss_atual_mb() or 0.0
+        self._tarefa = asyncio.create_task(self._loop())
+
+    async def parar(self) -> float:
+        if self._tarefa:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+        return self.pico_mb or rss_pico_processo_mb()
+
+
+# ============================================================================
+# QUERIES SQL
+# ============================================================================
+
+class ContadorQueries:
+    """Conta statements executados no engine da aplicacao."""
+
+    def __init__(self):
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.total += 1
+
+    def instalar(self, engine) -> None:
+        from sqlalchemy import event
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def remover(self, engine) -> None:
+        from sqlalchemy import event
+        event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+# ============================================================================
+# RESULTADO POR CENARIO
+# ============================================================================
+
+@dataclass
+class ResultadoCenario:
+    nome: str
+    concorrencia: int
+    latencias_ms: List[float] = field(default_factory=list)
+    erros: int = 0
+    amostras_erro: List[str] = field(default_factory=list)
+    duracao_s: float = 0.0
+    queries: int = 0
+    pico_rss_mb: float = 0.0
+
+    def registrar_erro(self, mensagem: str) -> None:
+        self.erros += 1
+        if len(self.amostras_erro) < 5:
+            self.amostras_erro.append(mensagem[:300])
+
+    def resumo(self) -> Dict:
+        total = len(self.latencias_ms) + self.erros
+        return {
+            "requisicoes": total,
+            "sucesso": len(self.latencias_ms),
+            "erros": self.erros,
+            "amostras_erro": self.amostras_erro,
+            "concorrencia": self.concorrencia,
+            "p50_ms": round(percentil(self.latencias_ms, 50), 1),
+            "p95_ms": round(percentil(self.latencias_ms, 95), 1),
+            "p99_ms": round(percentil(self.latencias_ms, 99), 1),
+            "media_ms": round(sum(self.latencias_ms) / len(self.latencias_ms), 1) if self.latencias_ms else 0.0,
+            "throughput_rps": round(len(self.latencias_ms) / self.duracao_s, 3) if self.duracao_s else 0.0,
+            "duracao_s": round(self.duracao_s, 2),
+            "queries_db": self.queries,
+            "queries_por_requisicao": round(self.queries / total, 1) if total else 0.0,
+            "pico_rss_mb": round(self.pico_rss_mb, 1),
+        }
+
+
+# ============================================================================
+# COMPARACAO COM BASELINE
+# ============================================================================
+
+# Metrica -> True se "maior e pior"
+METRICAS_COMPARADAS = {
+    "p50_ms": True,
+    "p95_ms": True,
+    "throughput_rps": False,
+    "queries_por_requisicao": True,
+    "pico_rss_mb": True,
+}
+
+
+def comparar_com_baseline(atual: Dict, baseline: Dict, tolerancia: float = 0.10) -> List[Dict]:
+    """
+    Compara dois relatorios e retorna as regressoes acima da tolerancia.
+
+    Args:
+        atual/baseline: Relatorios no formato gerado pelo benchmark
+        tolerancia: Variacao relativa aceita (0.10 = 10%)
+    """
+    regressoes = []
+    for nome, metricas in atual.get("cenarios", {}).items():
+        base = baseline.get("cenarios", {}).get(nome)
+        if not base:
+            continue
+        for metrica, maior_e_pior in METRICAS_COMPARADAS.items():
+            valor, referencia = metricas.get(metrica), base.get(metrica)
+            if not valor or not referencia:
+                continue
+            variacao = (valor - referencia) / referencia
+            if (maior_e_pior and variacao > tolerancia) or (not maior_e_pior and variacao < -tolerancia):
+                regressoes.append({
+                    "cenario": nome,
+                    "metrica": metrica,
+                    "baseline": referencia,
+                    "atual": valor,
+                    "variacao_pct": round(variacao * 100, 1),
+                })
+    return regressoes
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Script para reconstruir o índice reverso de slugs de variáveis
+(variable_slug_references).
+
+Normalmente o índice é mantido automaticamente a cada flush. Use este script
+no primeiro deploy da tabela ou após alterações feitas direto no banco.
+
+Uso:
+    python scripts/rebuild_slug_index.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main():
+    from database.connection import SessionLocal
+    from admin.models_prompts import PromptModulo  # noqa: F401 - registra mapeamentos
+    from sistemas.gerador_pecas.services_slug_index import SlugReferenceIndex
+
+    db = SessionLocal()
+    try:
+        totais = SlugReferenceIndex(db).reconstruir()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print("=" * 60)
+    print("ÍNDICE REVERSO DE SLUGS RECONSTRUÍDO")
+    print("=" * 60)
+    for entity_type, total in totais.items():
+        print(f"  {entity_type:<22} {total:>6} referências")
+    print(f"  {'TOTAL':<22} {sum(totais.values()):>6} referências")
+
+
+if __name__ == "__main__":
+    main()
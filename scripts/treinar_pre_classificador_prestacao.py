@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# scripts/treinar_pre_classificador_prestacao.py
+"""
+Treino, avaliação e ativação do pré-classificador local da prestação de contas
+(sistemas/prestacao_contas/pre_classificador.py).
+
+Comandos:
+    treinar   Treina com as decisões da IA registradas e grava uma nova versão
+    avaliar   Compara as previsões do modo sombra com a decisão da IA
+    ativar    Ativa uma versão (ou desativa todas com --nenhuma)
+    listar    Lista as versões gravadas
+
+Uso:
+    python scripts/treinar_pre_classificador_prestacao.py treinar
+    python scripts/treinar_pre_classificador_prestacao.py treinar --desde 2026-01-01 --precisao-alvo 0.98 --ativar
+    python scripts/treinar_pre_classificador_prestacao.py avaliar --versao 3
+    python scripts/treinar_pre_classificador_prestacao.py ativar --versao 3
+
+Fluxo sugerido: treinar, deixar a versão ativa com pre_classificador_modo =
+"sombra", conferir o `avaliar` após alguns dias e só então mudar para "ativo".
+
+Autor: LAB/PGE-MS
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.connection import SessionLocal  # noqa: E402
+from sistemas.prestacao_contas import pre_classificador  # noqa: E402
+from sistemas.prestacao_contas.models import ModeloPreClassificador  # noqa: E402
+
+
+def imprimir_relatorio(relatorio: dict) -> None:
+    print(f"Amostras: {relatorio['amostras']}   Acurácia: {relatorio['acuracia']}")
+    print(f"  {'tipo':<20} {'precisão':>9} {'recall':>8} {'suporte':>8} {'previstos':>10}")
+    for tipo, m in relatorio["por_tipo"].items():
+        precisao = "-" if m["precisao"] is None else f"{m['precisao']:.3f}"
+        recall = "-" if m["recall"] is None else f"{m['recall']:.3f}"
+        print(f"  {tipo:<20} {precisao:>9} {recall:>8} {m['suporte']:>8} {m['previstos']:>10}")
+    cascata = relatorio.get("cascata")
+    if cascata:
+        print(
+            f"Cascata: {cascata['dispensados']} sem IA (cobertura {cascata['cobertura']}), "
+            f"precisão {cascata['precisao_dispensados']}, prestações dispensadas {cascata['prestacoes_dispensadas']}"
+        )
+
+
+def _data(valor: str) -> datetime:
+    return datetime.strptime(valor, "%Y-%m-%d")
+
+
+def cmd_treinar(args, db) -> None:
+    t0 = time.perf_counter()
+    amostras = pre_classificador.carregar_amostras(db, desde=args.desde)
+    print(f"{len(amostras)} documentos rotulados pela IA ({time.perf_counter() - t0:.1f}s)")
+
+    t0 = time.perf_counter()
+    modelo, limiares, relatorio = pre_classificador.treinar(
+        amostras, epocas=args.epocas, precisao_alvo=args.precisao_alvo, semente=args.semente
+    )
+    print(f"Treino: {time.perf_counter() - t0:.1f}s, temperatura {relatorio['temperatura']}\n")
+    print("Validação:")
+    imprimir_relatorio(relatorio)
+    print(f"Limiares: {json.dumps(limiares)}")
+    print(f"Recall de 'menciona anexos' enviado à IA: {relatorio['recall_anexos']}")
+
+    registro = pre_classificador.salvar_modelo(db, modelo, limiares, relatorio, len(amostras), ativar=args.ativar)
+    print(f"\nVersão {registro.versao} gravada ({len(registro.artefato) / 1024:.0f} KB){' e ativada' if args.ativar else ''}")
+
+
+def cmd_avaliar(args, db) -> None:
+    relatorio = pre_classificador.avaliar_sombra(db, desde=args.desde, versao=args.versao)
+    if not relatorio["amostras"]:
+        print("Nenhuma previsão em modo sombra registrada")
+        return
+    imprimir_relatorio(relatorio)
+    print(f"Limiares sugeridos: {json.dumps(relatorio['limiares_sugeridos'])}")
+
+
+def cmd_ativar(args, db) -> None:
+    versao = None if args.nenhuma else args.versao
+    if pre_classificador.ativar_versao(db, versao):
+        print("Todas as versões desativadas" if versao is None else f"Versão {versao} ativada")
+    else:
+        print(f"Versão {versao} não encontrada")
+        sys.exit(1)
+
+
+def cmd_listar(args, db) -> None:
+    registros = db.query(
+        ModeloPreClassificador.versao, ModeloPreClassificador.ativo, ModeloPreClassificador.n_amostras,
+        ModeloPreClassificador.criado_em, ModeloPreClassificador.limiares,
+    ).order_by(ModeloPreClassificador.versao).all()
+    for r in registros:
+        print(f"v{r.versao:<4} {'ATIVA' if r.ativo else '     '} {r.criado_em:%Y-%m-%d %H:%M}  {r.n_amostras} amostras  {json.dumps(r.limiares)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pré-classificador local da prestação de contas")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    treinar = sub.add_parser("treinar")
+    treinar.add_argument("--desde", type=_data, help="Só decisões a partir desta data (AAAA-MM-DD)")
+    treinar.add_argument("--epocas", type=int, default=12)
+    treinar.add_argument("--precisao-alvo", type=float, default=pre_classificador.PRECISAO_ALVO)
+    treinar.add_argument("--semente", type=int, default=0)
+    treinar.add_argument("--ativar", action="store_true", help="Ativa a nova versão")
+    treinar.set_defaults(func=cmd_treinar)
+
+    avaliar = sub.add_parser("avaliar")
+    avaliar.add_argument("--desde", type=_data)
+    avaliar.add_argument("--versao", type=int)
+    avaliar.set_defaults(func=cmd_avaliar)
+
+    ativar = sub.add_parser("ativar")
+    grupo = ativar.add_mutually_exclusive_group(required=True)
+    grupo.add_argument("--versao", type=int)
+    grupo.add_argument("--nenhuma", action="store_true")
+    ativar.set_defaults(func=cmd_ativar)
+
+    listar = sub.add_parser("listar")
+    listar.set_defaults(func=cmd_listar)
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        args.func(args, db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# services/gemini_context_cache.py
+"""
+Cache explícito de contexto do Gemini (cachedContents) para prefixos de prompt.
+
+PERFORMANCE: O prompt do Agente 3 começa com um bloco grande e estável
+(módulos base + estrutura da peça + módulos de conteúdo ativados) seguido da
+parte que muda a cada processo (observação, dados do processo, documentos).
+Com o prefixo guardado em um cachedContent, a requisição envia só o sufixo e
+os tokens do prefixo são cobrados com desconto e não são reprocessados.
+
+Funcionamento:
+- Chave = sha256(modelo + system_prompt + prefixo)
+- Um prefixo só vira cache explícito depois de ser usado USOS_PARA_CRIAR vezes
+  dentro do TTL (prefixos "quentes"); antes disso a chamada segue com o prompt
+  completo, prefixo primeiro, e aproveita o cache implícito do Gemini
+- Handles ficam em um LRU (OrderedDict); o que sai do LRU é apagado na API
+- Faltando pouco para expirar, o TTL é renovado (PATCH) em segundo plano
+- Criações concorrentes do mesmo prefixo compartilham uma única requisição
+- Modelo que recusa cache explícito (400/403/404) fica marcado por um tempo
+  e passa a usar só o cache implícito
+
+USO:
+    from services.gemini_context_cache import get_cache_contexto
+
+    handle = await get_cache_contexto().obter(client, base_url, api_key, modelo, system_prompt, prefixo)
+    if handle:
+        payload["cachedContent"] = handle.nome   # contents = só o sufixo
+
+CONFIGURAÇÃO (variáveis de ambiente):
+    GEMINI_CACHE_CONTEXTO_HABILITADO   true/false (default: true)
+    GEMINI_CACHE_CONTEXTO_TTL_S        TTL dos cachedContents (default: 3600)
+    GEMINI_CACHE_CONTEXTO_MAX          handles mantidos no LRU (default: 32)
+    GEMINI_CACHE_CONTEXTO_USOS         usos do prefixo antes de criar o cache (default: 2)
+    GEMINI_CACHE_CONTEXTO_MIN_TOKENS   tamanho mínimo estimado do prefixo (default: 4096)
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Status que indicam que o modelo não aceita cache explícito
+STATUS_SEM_SUPORTE = {400, 403, 404}
+
+# Status de uma geração que indicam cachedContent inexistente ou expirado
+STATUS_CACHE_INVALIDO = {400, 403, 404}
+
+# Margem para não usar um handle prestes a expirar no servidor
+MARGEM_EXPIRACAO_S = 60.0
+
+# Por quanto tempo um modelo sem suporte deixa de tentar o cache explícito
+PAUSA_SEM_SUPORTE_S = 3600.0
+
+# Prefixos acompanhados para detectar os quentes
+MAX_PREFIXOS_VISTOS = 512
+
+
+@dataclass
+class HandleCache:
+    """cachedContent criado na API para um prefixo."""
+    chave: str
+    nome: str               # "cachedContents/..."
+    modelo: str
+    expira_em: float        # time.monotonic()
+    tokens: int = 0
+    renovando: bool = False
+
+
+class GerenciadorCacheContexto:
+    """LRU de cachedContents por prefixo, com criação sob demanda e renovação de TTL."""
+
+    def __init__(
+        self,
+        ttl_s: int = 3600,
+        max_handles: int = 32,
+        usos_para_criar: int = 2,
+        min_tokens: int = 4096,
+        habilitado: bool = True,
+    ):
+        self.ttl_s = ttl_s
+        self.max_handles = max_handles
+        self.usos_para_criar = usos_para_criar
+        self.min_tokens = min_tokens
+        self.habilitado = habilitado
+        # Renova quando resta menos de 1/4 do TTL
+        self.renovar_faltando_s = ttl_s / 4
+
+        self._handles: "OrderedDict[str, HandleCache]" = OrderedDict()
+        self._vistos: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._criando: Dict[str, asyncio.Future] = {}
+        self._sem_suporte: Dict[str, float] = {}
+        self._stats = {"hits": 0, "criados": 0, "renovados": 0, "removidos": 0, "falhas": 0}
+
+    @classmethod
+    def from_env(cls) -> "GerenciadorCacheContexto":
+        return cls(
+            ttl_s=int(os.getenv("GEMINI_CACHE_CONTEXTO_TTL_S", "3600")),
+            max_handles=int(os.getenv("GEMINI_CACHE_CONTEXTO_MAX", "32")),
+            usos_para_criar=int(os.getenv("GEMINI_CACHE_CONTEXTO_USOS", "2")),
+            min_tokens=int(os.getenv("GEMINI_CACHE_CONTEXTO_MIN_TOKENS", "4096")),
+            habilitado=os.getenv("GEMINI_CACHE_CONTEXTO_HABILITADO", "true").lower() == "true",
+        )
+
+    @staticmethod
+    def chave(modelo: str, system_prompt: str, prefixo: str) -> str:
+        h = hashlib.sha256()
+        for parte in (modelo, system_prompt, prefixo):
+            h.update(parte.encode("utf-8"))
+            h.update(b"\x00")
+        return h.hexdigest()
+
+    async def obter(
+        self,
+        client: httpx.AsyncClient,
+        base_url: str,
+        api_key: str,
+        modelo: str,
+        system_prompt: str,
+        prefixo: str,
+    ) -> Optional[HandleCache]:
+        """
+        Retorna o cachedContent do prefixo ou None (usar o prompt completo).
+
+        Args:
+            base_url: Raiz da API (ex: .../v1beta), sem "/models"
+        """
+        if not self.habilitado or not prefixo:
+            return None
+        if (len(system_prompt) + len(prefixo)) // 4 < self.min_tokens:
+            return None
+        pausa = self._sem_suporte.get(modelo)
+        if pausa and time.monotonic() < pausa:
+            return None
+
+        chave = self.chave(modelo, system_prompt, prefixo)
+        agora = time.monotonic()
+
+        handle = self._handles.get(chave)
+        if handle is not None:
+            if handle.expira_em - agora > MARGEM_EXPIRACAO_S:
+                self._handles.move_to_end(chave)
+                self._stats["hits"] += 1
+                if handle.expira_em - agora < self.renovar_faltando_s and not handle.renovando:
+                    handle.renovando = True
+                    asyncio.create_task(self._renovar(client, base_url, api_key, handle))
+                return handle
+            # Expirado (ou quase): recria
+            del self._handles[chave]
+
+        if not self._quente(chave, agora):
+            return None
+
+        futuro = self._criando.get(chave)
+        if futuro is None:
+            futuro = asyncio.get_running_loop().create_future()
+            self._criando[chave] = futuro
+            try:
+                handle = await self._criar(client, base_url, api_key, chave, modelo, system_prompt, prefixo)
+                futuro.set_result(handle)
+            except BaseException as e:
+                futuro.set_result(None)
+                if not isinstance(e, Exception):
+                    raise
+                handle = None
+            finally:
+                self._criando.pop(chave, None)
+            return handle
+        return await asyncio.shield(futuro)
+
+    def _quente(self, chave: str, agora: float) -> bool:
+        """Conta o uso do prefixo; True a partir de usos_para_criar usos dentro do TTL."""
+        usos, visto_em = self._vistos.pop(chave, (0, agora))
+        if agora - visto_em > self.ttl_s:
+            usos = 0
+        usos += 1
+        self._vistos[chave] = (usos, agora)
+        while len(self._vistos) > MAX_PREFIXOS_VISTOS:
+            self._vistos.popitem(last=False)
+        return usos >= self.usos_para_criar
+
+    async def _criar(
+        self,
+        client: httpx.AsyncClient,
+        base_url: str,
+        api_key: str,
+        chave: str,
+        modelo: str,
+        system_prompt: str,
+        prefixo: str,
+    ) -> Optional[HandleCache]:
+        corpo = {
+            "model": f"models/{modelo}",
+            "contents": [{"role": "user", "parts": [{"text": prefixo}]}],
+            "ttl": f"{self.ttl_s}s",
+        }
+        if system_prompt:
+            corpo["systemInstruction"] = {"parts": [{"text": system_prompt}]}
+
+        try:
+            response = await client.post(f"{base_url}/cachedContents?key={api_key}", json=corpo)
+        except httpx.HTTPError as e:
+            self._stats["falhas"] += 1
+            logger.warning(f"[Gemini Cache] Falha ao criar cachedContent: {type(e).__name__}")
+            return None
+
+        if response.status_code != 200:
+            self._stats["falhas"] += 1
+            if response.status_code in STATUS_SEM_SUPORTE:
+                self._sem_suporte[modelo] = time.monotonic() + PAUSA_SEM_SUPORTE_S
+                logger.info(
+                    f"[Gemini Cache] model={modelo} sem cache explícito "
+                    f"(HTTP {response.status_code}); usando cache implícito"
+                )
+            else:
+                logger.warning(f"[Gemini Cache] HTTP {response.status_code} ao criar cachedContent")
+            return None
+
+        dados = response.json()
+        handle = HandleCache(
+            chave=chave,
+            nome=dados["name"],
+            modelo=modelo,
+            expira_em=time.monotonic() + self.ttl_s,
+            tokens=dados.get("usageMetadata", {}).get("totalTokenCount", 0),
+        )
+        self._handles[chave] = handle
+        self._stats["criados"] += 1
+        logger.info(f"[Gemini Cache] criado {handle.nome} model={modelo} tokens={handle.tokens}")
+
+        while len(self._handles) > self.max_handles:
+            _, antigo = self._handles.popitem(last=False)
+            asyncio.create_task(self._remover(client, base_url, api_key, antigo))
+        return handle
+
+    async def _renovar(self, client: httpx.AsyncClient, base_url: str, api_key: str, handle: HandleCache) -> None:
+        try:
+            response = await client.patch(
+                f"{base_url}/{handle.nome}?key={api_key}&updateMask=ttl",
+                json={"ttl": f"{self.ttl_s}s"},
+            )
+            if response.status_code == 200:
+                handle.expira_em = time.monotonic() + self.ttl_s
+                self._stats["renovados"] += 1
+            elif response.status_code in STATUS_CACHE_INVALIDO:
+                self.invalidar(handle)
+        except httpx.HTTPError as e:
+            logger.debug(f"[Gemini Cache] Falha ao renovar {handle.nome}: {e}")
+        finally:
+            handle.renovando = False
+
+    async def _remover(self, client: httpx.AsyncClient, base_url: str, api_key: str, handle: HandleCache) -> None:
+        """Apaga o cachedContent na API (evita custo de armazenamento até o TTL)."""
+        try:
+            await client.delete(f"{base_url}/{handle.nome}?key={api_key}")
+            self._stats["removidos"] += 1
+        except httpx.HTTPError as e:
+            logger.debug(f"[Gemini Cache] Falha ao remover {handle.nome}: {e}")
+
+    def invalidar(self, handle: HandleCache) -> None:
+        """Descarta o handle (ex: a API respondeu que o cachedContent não existe mais)."""
+        if self._handles.get(handle.chave) is handle:
+            del self._handles[handle.chave]
+
+    def limpar(self) -> None:
+        """Esquece handles e prefixos vistos (os caches na API expiram pelo TTL)."""
+        self._handles.clear()
+        self._vistos.clear()
+        self._sem_suporte.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "handles": len(self._handles), "prefixos_vistos": len(self._vistos)}
+
+
+_cache_contexto: Optional[GerenciadorCacheContexto] = None
+_cache_contexto_lock = threading.Lock()
+
+
+def get_cache_contexto() -> GerenciadorCacheContexto:
+    """Retorna o gerenciador de cache de contexto do processo."""
+    global _cache_contexto
+    if _cache_contexto is None:
+        with _cache_contexto_lock:
+            if _cache_contexto is None:
+                _cache_contexto = GerenciadorCacheContexto.from_env()
+    return _cache_contexto
+
+
+def set_cache_contexto(gerenciador: Optional[GerenciadorCacheContexto]) -> None:
+    """Substitui o gerenciador global (para testes)."""
+    global _cache_contexto
+    _cache_contexto = gerenciador
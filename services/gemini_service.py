@@ -13,7 +13,9 @@ OTIMIZAÇÕES DE LATÊNCIA (2026-01-16):
 - Retry com backoff exponencial
 - Timeouts granulares (connect vs read)
 - Cache hash-based para prompts idênticos
+- Cache de contexto (cachedContents) para prefixos estáveis de prompt
 - Logging estruturado
+- Controle de admissão global por modelo (utils/llm_admission)
 
 Autor: LAB/PGE-MS
 """
@@ -53,6 +55,12 @@ except ImportError:
     CIRCUIT_BREAKER_ENABLED = False
     CircuitOpenError = Exception  # Fallback
 
+# Controle de admissão global (concorrência adaptativa por modelo + prioridades)
+from utils.llm_admission import get_admissao_llm, prioridade_corrente, PRIORIDADE_INTERATIVO
+
+# Cache explícito de contexto para prefixos de prompt
+from services.gemini_context_cache import get_cache_contexto, HandleCache, STATUS_CACHE_INVALIDO
+
 
 # ============================================
 # INSTRUMENTAÇÃO DE MÉTRICAS
@@ -66,6 +74,7 @@ class GeminiMetrics:
     prompt_chars: int = 0
     prompt_tokens_estimated: int = 0
     response_tokens: int = 0
+    cached_tokens: int = 0          # Tokens do prompt servidos do cache de contexto (usageMetadata)
 
     # Tempos em milissegundos
     time_prepare_ms: float = 0      # Tempo preparando payload
@@ -99,6 +108,7 @@ class GeminiMetrics:
             "prompt_chars": self.prompt_chars,
             "prompt_tokens_est": self.prompt_tokens_estimated,
             "response_tokens": self.response_tokens,
+            "cached_tokens": self.cached_tokens,
             "time_prepare_ms": round(self.time_prepare_ms, 2),
             "time_connect_ms": round(self.time_connect_ms, 2),
             "time_ttft_ms": round(self.time_ttft_ms, 2),
@@ -137,6 +147,7 @@ class GeminiMetrics:
                 f"[Gemini] model={self.model} "
                 f"prompt={self.prompt_chars}chars "
                 f"response={self.response_tokens}tok "
+                f"cached_tokens={self.cached_tokens} "
                 f"prepare={self.time_prepare_ms:.0f}ms "
                 f"ttft={self.time_ttft_ms:.0f}ms "
                 f"total={self.time_total_ms:.0f}ms "
@@ -151,6 +162,14 @@ class GeminiMetrics:
             )
 
 
+class _CacheContextoInvalido(Exception):
+    """A API recusou o cachedContent usado no stream (expirado ou removido)."""
+
+    def __init__(self, handle: HandleCache):
+        super().__init__(handle.nome)
+        self.handle = handle
+
+
 # ============================================
 # CACHE DE RESPOSTAS
 # ============================================
@@ -292,6 +311,27 @@ async def close_http_client():
         logger.info("[Gemini] HTTP client fechado")
 
 
+# Tokens estimados por imagem (resolução padrão da API Gemini)
+TOKENS_POR_IMAGEM = 258
+
+
+def _tokens_estimados(payload: Dict[str, Any]) -> int:
+    """Estimativa de tokens de entrada de um payload (~4 chars/token)."""
+    chars = 0
+    imagens = 0
+    partes = [
+        part
+        for content in payload.get("contents", [])
+        for part in content.get("parts", [])
+    ] + (payload.get("systemInstruction") or {}).get("parts", [])
+    for part in partes:
+        if "text" in part:
+            chars += len(part["text"])
+        elif "inline_data" in part:
+            imagens += 1
+    return chars // 4 + imagens * TOKENS_POR_IMAGEM
+
+
 class GeminiService:
     """
     Serviço centralizado para chamadas à API do Google Gemini.
@@ -310,7 +350,7 @@ class GeminiService:
     """
     
     # URL base da API Gemini
-    BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+    BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/models")
     
     # Modelos disponíveis
     MODELS = {
@@ -400,6 +440,8 @@ class GeminiService:
         temperature: float = 0.3,
         use_cache: bool = True,
         thinking_level: str = None,
+        response_schema: Dict[str, Any] = None,
+        prompt_prefix: str = "",
         # Contexto para logging
         context: Dict[str, Any] = None
     ) -> GeminiResponse:
@@ -417,6 +459,12 @@ class GeminiService:
             thinking_level: Nível de raciocínio do Gemini 3 ("minimal", "low", "medium", "high")
                            AVISO: None causa TTFT de 60s+ porque Gemini 3 usa "high" como default!
                            Use "low" para latência reduzida ou "minimal" para máxima velocidade
+            response_schema: Schema de saída estruturada (responseSchema). Respostas
+                           com schema não passam pelo cache (a chave não inclui o schema)
+            prompt_prefix: Parte estável que antecede o prompt (o modelo recebe
+                           prompt_prefix + prompt). Prefixos quentes vão para um
+                           cachedContent; os demais seguem no início do prompt e
+                           aproveitam o cache implícito
             context: Dicionário com contexto para logging (sistema, modulo, user_id, username)
 
         Returns:
@@ -455,12 +503,13 @@ class GeminiService:
             model = self.DEFAULT_MODELS["analise"]
 
         metrics.model = model
-        metrics.prompt_chars = len(prompt)
-        metrics.prompt_tokens_estimated = len(prompt) // 4  # Estimativa ~4 chars/token
+        metrics.prompt_chars = len(prompt_prefix) + len(prompt)
+        metrics.prompt_tokens_estimated = metrics.prompt_chars // 4  # Estimativa ~4 chars/token
 
         # Verifica cache
+        use_cache = use_cache and not response_schema
         if use_cache and temperature <= 0.3:  # Só cacheia respostas determinísticas
-            cached = _response_cache.get(prompt, system_prompt, model, temperature)
+            cached = _response_cache.get(prompt_prefix + prompt, system_prompt, model, temperature)
             if cached is not None:
                 metrics.cached = True
                 metrics.time_total_ms = (time.perf_counter() - t_start) * 1000
@@ -475,14 +524,20 @@ class GeminiService:
                     metrics=metrics
                 )
 
+        # Prefixo estável: cachedContent (se quente) ou início do prompt
+        handle = await self._cache_prefixo(model, system_prompt, prompt_prefix)
+        prompt_envio, system_envio = self._partes_envio(prompt, system_prompt, prompt_prefix, handle)
+
         # Monta payload
         payload = self._build_payload(
-            prompt=prompt,
-            system_prompt=system_prompt,
+            prompt=prompt_envio,
+            system_prompt=system_envio,
             max_tokens=max_tokens,
             temperature=temperature,
             thinking_level=thinking_level,
-            model=model
+            model=model,
+            response_schema=response_schema,
+            cached_content=handle.nome if handle else None
         )
         metrics.time_prepare_ms = (time.perf_counter() - t_prepare) * 1000
 
@@ -497,7 +552,7 @@ class GeminiService:
 
                 # Usa HTTP client singleton com connection pooling
                 client = await get_http_client()
-                response = await client.post(url, json=payload)
+                response = await self._post_admitido(client, url, payload, model)
 
                 metrics.time_ttft_ms = (time.perf_counter() - t_connect) * 1000
                 response.raise_for_status()
@@ -515,14 +570,16 @@ class GeminiService:
                     )
                     # Reconstrói payload SEM thinking_level (usa default)
                     payload_retry = self._build_payload(
-                        prompt=prompt,
-                        system_prompt=system_prompt,
+                        prompt=prompt_envio,
+                        system_prompt=system_envio,
                         max_tokens=max_tokens,
                         temperature=temperature,
                         thinking_level=None,  # Usa default do modelo
-                        model=model
+                        model=model,
+                        response_schema=response_schema,
+                        cached_content=payload.get("cachedContent")
                     )
-                    response_retry = await client.post(url, json=payload_retry)
+                    response_retry = await self._post_admitido(client, url, payload_retry, model)
                     response_retry.raise_for_status()
                     data = response_retry.json()
                     content = self._extract_content(data)
@@ -541,6 +598,7 @@ class GeminiService:
                 metrics.time_generation_ms = (time.perf_counter() - t_parse) * 1000
                 metrics.time_total_ms = (time.perf_counter() - t_start) * 1000
                 metrics.response_tokens = tokens
+                metrics.cached_tokens = self._extract_cached_tokens(data)
                 metrics.retry_count = attempt
                 metrics.log()
 
@@ -553,7 +611,7 @@ class GeminiService:
 
                 # Salva no cache
                 if use_cache and temperature <= 0.3:
-                    _response_cache.set(prompt, system_prompt, model, temperature, result)
+                    _response_cache.set(prompt_prefix + prompt, system_prompt, model, temperature, result)
 
                 # Circuit Breaker - registra sucesso
                 if CIRCUIT_BREAKER_ENABLED:
@@ -578,6 +636,24 @@ class GeminiService:
             except httpx.HTTPStatusError as e:
                 status_code = e.response.status_code
 
+                # cachedContent expirou/foi removido na API: descarta e reenvia o prompt completo
+                if handle and status_code in STATUS_CACHE_INVALIDO:
+                    logger.warning(f"[Gemini] HTTP {status_code} com {handle.nome}; reenviando sem cache de contexto")
+                    get_cache_contexto().invalidar(handle)
+                    handle = None
+                    last_error = e
+                    prompt_envio, system_envio = self._partes_envio(prompt, system_prompt, prompt_prefix, None)
+                    payload = self._build_payload(
+                        prompt=prompt_envio,
+                        system_prompt=system_envio,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        thinking_level=thinking_level,
+                        model=model,
+                        response_schema=response_schema
+                    )
+                    continue
+
                 # Retry em status codes temporários (503, 429, 500, 502, 504)
                 if status_code in RETRYABLE_STATUS_CODES:
                     last_error = e
@@ -638,6 +714,8 @@ class GeminiService:
         max_tokens: int = None,
         temperature: float = 0.3,
         thinking_level: str = None,
+        response_schema: Dict[str, Any] = None,
+        prompt_prefix: str = "",
         context: Dict[str, Any] = None
     ) -> AsyncGenerator[str, None]:
         """
@@ -654,6 +732,8 @@ class GeminiService:
             max_tokens: Limite de tokens na resposta
             temperature: Temperatura (0-2)
             thinking_level: Nível de raciocínio ("minimal", "low", "medium", "high")
+            response_schema: Schema de saída estruturada (JSON); os chunks formam um JSON
+            prompt_prefix: Parte estável que antecede o prompt (ver generate)
             context: Dicionário com contexto para logging
 
         Yields:
@@ -683,17 +763,23 @@ class GeminiService:
             model = self.DEFAULT_MODELS["analise"]
 
         metrics.model = model
-        metrics.prompt_chars = len(prompt)
-        metrics.prompt_tokens_estimated = len(prompt) // 4
+        metrics.prompt_chars = len(prompt_prefix) + len(prompt)
+        metrics.prompt_tokens_estimated = metrics.prompt_chars // 4
+
+        # Prefixo estável: cachedContent (se quente) ou início do prompt
+        handle = await self._cache_prefixo(model, system_prompt, prompt_prefix)
+        prompt_envio, system_envio = self._partes_envio(prompt, system_prompt, prompt_prefix, handle)
 
         # Monta payload
         payload = self._build_payload(
-            prompt=prompt,
-            system_prompt=system_prompt,
+            prompt=prompt_envio,
+            system_prompt=system_envio,
             max_tokens=max_tokens,
             temperature=temperature,
             thinking_level=thinking_level,
-            model=model
+            model=model,
+            response_schema=response_schema,
+            cached_content=handle.nome if handle else None
         )
 
         # URL da API com streaming
@@ -708,11 +794,20 @@ class GeminiService:
             # Usa httpx para streaming
             client = await get_http_client()
 
-            async with client.stream("POST", url, json=payload, timeout=TIMEOUT_TOTAL) as response:
+            # Streams são acompanhados pelo usuário: prioridade interativa por padrão
+            admissao = get_admissao_llm().admitir(
+                model,
+                prioridade=prioridade_corrente(PRIORIDADE_INTERATIVO),
+                tokens_estimados=_tokens_estimados(payload)
+            )
+            async with admissao as permissao, client.stream("POST", url, json=payload, timeout=TIMEOUT_TOTAL) as response:
+                permissao.registrar(response.status_code)
                 metrics.time_connect_ms = (time.perf_counter() - t_connect) * 1000
 
                 if response.status_code != 200:
                     error_text = await response.aread()
+                    if handle and response.status_code in STATUS_CACHE_INVALIDO:
+                        raise _CacheContextoInvalido(handle)
                     metrics.success = False
                     metrics.error = f"HTTP {response.status_code}: {error_text.decode()[:200]}"
                     metrics.time_total_ms = (time.perf_counter() - t_start) * 1000
@@ -764,6 +859,7 @@ class GeminiService:
                                 usage = data.get("usageMetadata", {})
                                 if usage:
                                     total_tokens = usage.get("totalTokenCount", total_tokens)
+                                    metrics.cached_tokens = usage.get("cachedContentTokenCount", metrics.cached_tokens)
 
                             except __import__("json").JSONDecodeError:
                                 # Linha não é JSON válido, ignora
@@ -779,6 +875,22 @@ class GeminiService:
             # Log assíncrono
             asyncio.create_task(self._log_to_db(metrics, ctx, temperature=temperature, thinking_level=thinking_level))
 
+        except _CacheContextoInvalido as e:
+            # cachedContent expirou/foi removido na API: refaz o stream com o prompt completo
+            logger.warning(f"[Gemini Stream] {e.handle.nome} inválido; reenviando sem cache de contexto")
+            get_cache_contexto().invalidar(e.handle)
+            async for chunk in self.generate_stream(
+                prompt=prompt_prefix + prompt,
+                system_prompt=system_prompt,
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                thinking_level=thinking_level,
+                response_schema=response_schema,
+                context=context
+            ):
+                yield chunk
+
         except Exception as e:
             metrics.success = False
             metrics.error = str(e)
@@ -1011,7 +1123,8 @@ class GeminiService:
         task: str = None,
         max_tokens: int = None,
         temperature: float = 0.3,
-        thinking_level: str = None
+        thinking_level: str = None,
+        response_schema: Dict[str, Any] = None
     ) -> GeminiResponse:
         """
         Gera texto usando uma sessão aiohttp existente.
@@ -1045,15 +1158,18 @@ class GeminiService:
             max_tokens=max_tokens,
             temperature=temperature,
             thinking_level=thinking_level,
-            model=model
+            model=model,
+            response_schema=response_schema
         )
 
         try:
-            async with session.post(
+            admissao = get_admissao_llm().admitir(model, tokens_estimados=_tokens_estimados(payload))
+            async with admissao as permissao, session.post(
                 url,
                 json=payload,
                 timeout=aiohttp.ClientTimeout(total=300)
             ) as resp:
+                permissao.registrar(resp.status)
                 resp.raise_for_status()
                 data = await resp.json()
 
@@ -1081,6 +1197,7 @@ class GeminiService:
         max_tokens: int = None,
         temperature: float = 0.3,
         thinking_level: str = None,
+        response_schema: Dict[str, Any] = None,
         context: Dict[str, Any] = None
     ) -> GeminiResponse:
         """
@@ -1128,7 +1245,8 @@ class GeminiService:
             max_tokens=max_tokens,
             temperature=temperature,
             thinking_level=thinking_level,
-            model=model
+            model=model,
+            response_schema=response_schema
         )
 
         # Retry com backoff
@@ -1139,7 +1257,7 @@ class GeminiService:
 
                 # Usa HTTP client singleton
                 client = await get_http_client()
-                response = await client.post(url, json=payload)
+                response = await self._post_admitido(client, url, payload, model)
 
                 metrics.time_ttft_ms = (time.perf_counter() - t_connect) * 1000
                 response.raise_for_status()
@@ -1160,9 +1278,10 @@ class GeminiService:
                         max_tokens=max_tokens,
                         temperature=temperature,
                         thinking_level=None,  # Usa default do modelo
-                        model=model
+                        model=model,
+                        response_schema=response_schema
                     )
-                    response_retry = await client.post(url, json=payload_retry)
+                    response_retry = await self._post_admitido(client, url, payload_retry, model)
                     response_retry.raise_for_status()
                     data = response_retry.json()
                     content = self._extract_content(data)
@@ -1251,7 +1370,8 @@ class GeminiService:
         model: str = None,
         max_tokens: int = None,
         temperature: float = 0.3,
-        thinking_level: str = None
+        thinking_level: str = None,
+        response_schema: Dict[str, Any] = None
     ) -> GeminiResponse:
         """
         Gera texto analisando imagens usando sessão aiohttp.
@@ -1282,15 +1402,18 @@ class GeminiService:
             max_tokens=max_tokens,
             temperature=temperature,
             thinking_level=thinking_level,
-            model=model
+            model=model,
+            response_schema=response_schema
         )
 
         try:
-            async with session.post(
+            admissao = get_admissao_llm().admitir(model, tokens_estimados=_tokens_estimados(payload))
+            async with admissao as permissao, session.post(
                 url,
                 json=payload,
                 timeout=aiohttp.ClientTimeout(total=300)
             ) as resp:
+                permissao.registrar(resp.status)
                 resp.raise_for_status()
                 data = await resp.json()
 
@@ -1309,6 +1432,24 @@ class GeminiService:
                 error=f"Erro: {str(e)}"
             )
 
+    async def _post_admitido(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        payload: Dict[str, Any],
+        model: str
+    ) -> httpx.Response:
+        """
+        POST ao Gemini passando pelo controle de admissão global.
+
+        A vaga é liberada ao fim da requisição; o backoff de retry acontece
+        fora dela, e o status (429/503) alimenta o ajuste do limite.
+        """
+        async with get_admissao_llm().admitir(model, tokens_estimados=_tokens_estimados(payload)) as permissao:
+            response = await client.post(url, json=payload)
+            permissao.registrar(response.status_code)
+            return response
+
     def _build_payload(
         self,
         prompt: str,
@@ -1316,7 +1457,9 @@ class GeminiService:
         max_tokens: int = None,
         temperature: float = 0.3,
         thinking_level: str = None,
-        model: str = None
+        model: str = None,
+        response_schema: Dict[str, Any] = None,
+        cached_content: str = None
     ) -> Dict[str, Any]:
         """
         Monta o payload para chamada de texto.
@@ -1329,6 +1472,10 @@ class GeminiService:
                 - "medium": Balanceado - só Flash
                 - "high": Máximo raciocínio (padrão)
             model: Nome do modelo (usado para validar thinking_level)
+            response_schema: Schema de saída estruturada (responseSchema). Quando
+                informado, a resposta é JSON válido conforme o schema.
+            cached_content: Nome do cachedContent com o prefixo do prompt (e o
+                system prompt, que não pode ser repetido na requisição)
         """
         generation_config = {"temperature": temperature}
 
@@ -1356,6 +1503,11 @@ class GeminiService:
                     }
                 # Se nível inválido para o modelo, simplesmente ignora (usa default)
 
+        # Saída estruturada: o modelo só emite JSON conforme o schema
+        if response_schema:
+            generation_config["responseMimeType"] = "application/json"
+            generation_config["responseSchema"] = response_schema
+
         payload = {
             "contents": [
                 {"role": "user", "parts": [{"text": prompt}]}
@@ -1368,7 +1520,51 @@ class GeminiService:
                 "parts": [{"text": system_prompt}]
             }
 
+        if cached_content:
+            payload["cachedContent"] = cached_content
+
         return payload
+
+    async def _cache_prefixo(
+        self,
+        model: str,
+        system_prompt: str,
+        prompt_prefix: str
+    ) -> Optional[HandleCache]:
+        """
+        Obtém o cachedContent do prefixo estável (None = enviar o prompt completo).
+
+        PERFORMANCE: Com o handle, a requisição leva só o sufixo variável e o
+        prefixo não é reprocessado. Sem ele o prefixo vai no início do prompt,
+        onde o cache implícito do Gemini ainda pode reaproveitá-lo.
+        """
+        if not prompt_prefix:
+            return None
+        try:
+            client = await get_http_client()
+            return await get_cache_contexto().obter(
+                client,
+                self.BASE_URL.rsplit("/models", 1)[0],
+                self._api_key,
+                model,
+                system_prompt,
+                prompt_prefix
+            )
+        except Exception as e:
+            logger.warning(f"[Gemini] Cache de contexto indisponível: {e}")
+            return None
+
+    @staticmethod
+    def _partes_envio(
+        prompt: str,
+        system_prompt: str,
+        prompt_prefix: str,
+        handle: Optional[HandleCache]
+    ) -> Tuple[str, str]:
+        """(prompt, system_prompt) da requisição: com cachedContent ambos já estão no cache."""
+        if handle:
+            return prompt, ""
+        return prompt_prefix + prompt, system_prompt
     
     def _build_payload_with_images(
         self,
@@ -1378,7 +1574,8 @@ class GeminiService:
         max_tokens: int = None,
         temperature: float = 0.3,
         thinking_level: str = None,
-        model: str = None
+        model: str = None,
+        response_schema: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         """
         Monta o payload para chamada com imagens.
@@ -1391,6 +1588,8 @@ class GeminiService:
                 - "medium": Balanceado - só Flash
                 - "high": Máximo raciocínio (padrão)
             model: Nome do modelo (usado para validar thinking_level)
+            response_schema: Schema de saída estruturada (responseSchema). Quando
+                informado, a resposta é JSON válido conforme o schema.
         """
         parts = []
 
@@ -1438,6 +1637,11 @@ class GeminiService:
                     }
                 # Se nível inválido para o modelo, simplesmente ignora (usa default)
 
+        # Saída estruturada: o modelo só emite JSON conforme o schema
+        if response_schema:
+            generation_config["responseMimeType"] = "application/json"
+            generation_config["responseSchema"] = response_schema
+
         payload = {
             "contents": [{"role": "user", "parts": parts}],
             "generationConfig": generation_config
@@ -1550,7 +1754,7 @@ class GeminiService:
             try:
                 async with httpx.AsyncClient(timeout=300.0) as client:
                     t_connect_start = time.perf_counter()
-                    response = await client.post(url, json=payload)
+                    response = await self._post_admitido(client, url, payload, model)
                     metrics.time_connect_ms = (time.perf_counter() - t_connect_start) * 1000
 
                     response.raise_for_status()
@@ -1736,7 +1940,7 @@ class GeminiService:
             try:
                 async with httpx.AsyncClient(timeout=300.0) as client:
                     t_connect_start = time.perf_counter()
-                    response = await client.post(url, json=payload)
+                    response = await self._post_admitido(client, url, payload, model)
                     metrics.time_connect_ms = (time.perf_counter() - t_connect_start) * 1000
 
                     response.raise_for_status()
@@ -1846,6 +2050,11 @@ class GeminiService:
         usage = data.get("usageMetadata", {})
         return usage.get("totalTokenCount", 0)
 
+    def _extract_cached_tokens(self, data: Dict) -> int:
+        """Extrai os tokens do prompt servidos do cache (explícito ou implícito)"""
+        usage = data.get("usageMetadata", {})
+        return usage.get("cachedContentTokenCount", 0)
+
     def _extract_grounding_metadata(self, data: Dict) -> str:
         """Extrai metadados de grounding (fontes consultadas)"""
         candidates = data.get("candidates", [])
@@ -1952,7 +2161,8 @@ async def chamar_gemini(
     system_prompt: str = "",
     modelo: str = None,
     max_tokens: int = None,
-    temperature: float = 0.3
+    temperature: float = 0.3,
+    prompt_prefix: str = ""
 ) -> str:
     """
     Função de conveniência para chamadas simples.
@@ -1964,7 +2174,8 @@ async def chamar_gemini(
         system_prompt=system_prompt,
         model=modelo,
         max_tokens=max_tokens,
-        temperature=temperature
+        temperature=temperature,
+        prompt_prefix=prompt_prefix
     )
     
     if not response.success:
@@ -2029,6 +2240,7 @@ async def get_service_status() -> Dict[str, Any]:
         "configured": gemini_service.is_configured(),
         "http_client_active": _http_client is not None and not _http_client.is_closed,
         "cache": _response_cache.stats(),
+        "admissao": get_admissao_llm().snapshot(),
         "config": {
             "timeout_connect": TIMEOUT_CONNECT,
             "timeout_read": TIMEOUT_READ,
@@ -9,6 +9,6 @@ Arquitetura:
 O worker local faz pull de jobs via API, baixa Excel, treina, e envia métricas/logs.
 """
 
-from sistemas.bert_training.router import router
-
-__all__ = ["router"]
+# PERFORMANCE: o router NÃO é reexportado aqui. Importar apenas os models
+# (ex: database.init_db) não deve carregar o router e suas dependências pesadas.
+# Use: from sistemas.bert_training.router import router
@@ -5,6 +5,8 @@ Módulo ML - Componentes de Machine Learning para classificação BERT.
 Contém:
 - classifier.py: BertClassifier (modelo)
 - dataset.py: TextClassificationDataset (preparação de dados)
+- data_pipeline.py: cache de tokenização, batches por tamanho e padding dinâmico
+- chunking.py: documentos longos por janelas sobrepostas (treino e inferência)
 - training.py: Trainer (loop de treinamento)
 - evaluation.py: Evaluator (métricas)
 """
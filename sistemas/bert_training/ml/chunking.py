@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Classificação de documentos longos por janelas de tokens sobrepostas.
+
+PERFORMANCE: com truncamento, peças e decisões longas são classificadas só
+pelos primeiros ~512 tokens (ou pelos últimos, com truncation_side='left'), e
+os chamadores acabam recorrendo ao LLM para textos longos. Aqui:
+- o texto é tokenizado inteiro uma vez e dividido em janelas de max_length
+  tokens com sobreposição (overlap), cada uma com [CLS]/[SEP];
+- cada documento usa no máximo max_chunks janelas, escolhidas do início e do
+  fim (cabeça + cauda), então o custo por documento é limitado e previsível
+  (no máximo max_chunks forwards de max_length tokens);
+- as janelas de um batch de documentos passam juntas num único forward e os
+  logits são agregados por documento (média, máximo ou atenção aprendida);
+- no treino, sorteia-se até train_chunks janelas por documento a cada época,
+  limitando o custo do backward; o sorteio depende só de (seed, época,
+  índice da amostra), então é o mesmo com ou sem workers no DataLoader e na
+  retomada de checkpoint.
+
+Documentos que cabem em uma janela produzem exatamente a mesma entrada do
+modo truncado, então o resultado para textos curtos não muda.
+"""
+
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+
+from sistemas.bert_training.ml.data_pipeline import PreTokenizedDataset, TOKENIZE_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+POOLING_MODES = ("mean", "max", "attention")
+
+
+@dataclass
+class ChunkingConfig:
+    """Parâmetros das janelas (gravados junto com o modelo treinado)."""
+    max_length: int = 512  # Tokens por janela, incluindo [CLS]/[SEP]
+    overlap: int = 128  # Tokens repetidos entre janelas vizinhas
+    max_chunks: int = 8  # Janelas por documento (cabeça + cauda)
+    train_chunks: int = 2  # Janelas sorteadas por documento no treino
+    pooling: str = "mean"  # 'mean', 'max' ou 'attention'
+
+    def __post_init__(self):
+        if self.pooling not in POOLING_MODES:
+            raise ValueError(f"Agregação inválida: {self.pooling} (use {', '.join(POOLING_MODES)})")
+        if self.max_length < 8:
+            raise ValueError(f"max_length muito pequeno para janelas: {self.max_length}")
+        if not 0 <= self.overlap < self.window_tokens:
+            raise ValueError(f"overlap deve ficar entre 0 e {self.window_tokens - 1}")
+        if self.max_chunks < 1 or self.train_chunks < 1:
+            raise ValueError("max_chunks e train_chunks devem ser >= 1")
+
+    @property
+    def window_tokens(self) -> int:
+        """Tokens de conteúdo por janela (sem [CLS]/[SEP])."""
+        return self.max_length - 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> Optional["ChunkingConfig"]:
+        if not data:
+            return None
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+# ==================== Janelas ====================
+
+def window_starts(num_tokens: int, window: int, overlap: int) -> List[int]:
+    """
+    Início de cada janela de `window` tokens, com `overlap` tokens em comum
+    entre vizinhas. A última janela termina exatamente no fim do texto.
+    """
+    if num_tokens <= window:
+        return [0]
+    step = window - overlap
+    starts = list(range(0, num_tokens - window + 1, step))
+    if starts[-1] + window < num_tokens:
+        starts.append(num_tokens - window)
+    return starts
+
+
+def select_head_tail(starts: Sequence[int], max_chunks: int) -> List[int]:
+    """Mantém as primeiras ceil(max/2) e as últimas floor(max/2) janelas."""
+    starts = list(starts)
+    if len(starts) <= max_chunks:
+        return starts
+    head = (max_chunks + 1) // 2
+    tail = max_chunks - head
+    return starts[:head] + (starts[-tail:] if tail else [])
+
+
+def chunk_document(
+    content_ids: np.ndarray,
+    cls_token_id: int,
+    sep_token_id: int,
+    config: ChunkingConfig,
+) -> List[np.ndarray]:
+    """
+    Divide os ids de um documento (sem tokens especiais) nas janelas
+    selecionadas, cada uma como [CLS] + conteúdo + [SEP].
+    """
+    content_ids = np.asarray(content_ids)
+    window = config.window_tokens
+    starts = select_head_tail(window_starts(len(content_ids), window, config.overlap), config.max_chunks)
+    chunks = []
+    for start in starts:
+        chunk = np.empty(min(window, len(content_ids) - start) + 2, dtype=np.int64)
+        chunk[0] = cls_token_id
+        chunk[1:-1] = content_ids[start:start + window]
+        chunk[-1] = sep_token_id
+        chunks.append(chunk)
+    return chunks
+
+
+def capped_length(num_tokens: int, config: ChunkingConfig) -> int:
+    """Tokens efetivamente processados para um documento (custo do forward)."""
+    starts = select_head_tail(window_starts(num_tokens, config.window_tokens, config.overlap), config.max_chunks)
+    return sum(min(config.window_tokens, num_tokens - s) + 2 for s in starts)
+
+
+# ==================== Agregação ====================
+
+def pool_chunk_logits(
+    chunk_logits: torch.Tensor,
+    chunk_doc: torch.Tensor,
+    mode: str = "mean",
+    chunk_scores: Optional[torch.Tensor] = None,
+) -> torch.Tensor:
+    """
+    Agrega os logits das janelas por documento.
+
+    Args:
+        chunk_logits: [n_janelas, n_classes]
+        chunk_doc: [n_janelas] posição do documento de cada janela no batch
+            (janelas do mesmo documento são contíguas)
+        mode: 'mean', 'max' ou 'attention'
+        chunk_scores: [n_janelas] pontuação da atenção (mode='attention')
+
+    Returns:
+        [n_documentos, n_classes]
+    """
+    num_docs = int(chunk_doc.max().item()) + 1
+    counts = torch.bincount(chunk_doc, minlength=num_docs)
+    first = torch.cumsum(counts, 0) - counts
+    position = torch.arange(len(chunk_doc), device=chunk_doc.device) - first[chunk_doc]
+    width = int(counts.max().item())
+
+    if mode == "mean":
+        total = chunk_logits.new_zeros((num_docs, chunk_logits.shape[-1]))
+        total.index_add_(0, chunk_doc, chunk_logits)
+        return total / counts.unsqueeze(-1).to(chunk_logits.dtype)
+
+    padded = chunk_logits.new_full((num_docs, width, chunk_logits.shape[-1]), float("-inf"))
+    padded[chunk_doc, position] = chunk_logits
+    if mode == "max":
+        return padded.max(dim=1).values
+
+    if mode == "attention":
+        if chunk_scores is None:
+            raise ValueError("Agregação por atenção requer chunk_scores")
+        mask = torch.zeros((num_docs, width), dtype=torch.bool, device=chunk_logits.device)
+        mask[chunk_doc, position] = True
+        scores = chunk_scores.new_full((num_docs, width), float("-inf"))
+        scores[chunk_doc, position] = chunk_scores
+        weights = torch.softmax(scores, dim=1).masked_fill(~mask, 0.0)
+        return (weights.unsqueeze(-1) * padded.masked_fill(~mask.unsqueeze(-1), 0.0)).sum(dim=1)
+
+    raise ValueError(f"Agregação inválida: {mode} (use {', '.join(POOLING_MODES)})")
+
+
+# ==================== Dados ====================
+
+def collate_chunks(
+    docs: Sequence[Sequence[np.ndarray]],
+    pad_token_id: int = 0,
+    pad_to_multiple_of: Optional[int] = 8,
+    max_length: Optional[int] = None,
+) -> Dict[str, torch.Tensor]:
+    """Achata as janelas dos documentos num batch só, com padding dinâmico."""
+    chunks = [chunk for doc in docs for chunk in doc]
+    longest = max(len(c) for c in chunks)
+    width = longest
+    if pad_to_multiple_of:
+        width = -(-width // pad_to_multiple_of) * pad_to_multiple_of
+        if max_length:
+            width = min(width, max(max_length, longest))
+
+    input_ids = np.full((len(chunks), width), pad_token_id, dtype=np.int64)
+    attention_mask = np.zeros((len(chunks), width), dtype=np.int64)
+    for row, chunk in enumerate(chunks):
+        input_ids[row, :len(chunk)] = chunk
+        attention_mask[row, :len(chunk)] = 1
+
+    return {
+        "input_ids": torch.from_numpy(input_ids),
+        "attention_mask": torch.from_numpy(attention_mask),
+        "token_type_ids": torch.zeros((len(chunks), width), dtype=torch.long),
+        "chunk_doc": torch.repeat_interleave(
+            torch.arange(len(docs)), torch.tensor([len(doc) for doc in docs])
+        ),
+    }
+
+
+class ChunkedDataset(PreTokenizedDataset):
+    """
+    Dataset de documentos longos sobre um cache tokenize_to_cache(..., truncation=False).
+
+    Cada item traz as janelas selecionadas (cabeça + cauda, até max_chunks);
+    o sorteio das janelas de treino é feito pelo ChunkCollator. `lengths` é o
+    custo limitado de cada documento, usado pelo sampler por tamanho.
+    """
+
+    def __init__(
+        self,
+        cache_path: Union[str, Path],
+        labels: Optional[List[int]] = None,
+        config: Optional[ChunkingConfig] = None,
+    ):
+        """
+        Args:
+            cache_path: Diretório retornado por tokenize_to_cache com truncation=False
+            labels: Lista de labels (opcional para inferência)
+            config: Parâmetros das janelas
+        """
+        self.chunking = config or ChunkingConfig()
+        super().__init__(cache_path, labels)
+
+    def _open(self) -> None:
+        super()._open()
+        if self.meta.get("truncation", True):
+            raise ValueError(f"Cache {self.cache_path} foi truncado; gere com truncation=False")
+        self.cls_token_id = self.meta["cls_token_id"]
+        self.sep_token_id = self.meta["sep_token_id"]
+        self.content_lengths = self.lengths
+        self.lengths = np.array([capped_length(int(n), self.chunking) for n in self.content_lengths])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = super().__getstate__()
+        state["chunking"] = self.chunking
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.chunking = state["chunking"]
+        super().__setstate__(state)
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        content = np.asarray(self.ids[self.offsets[idx]:self.offsets[idx + 1]])
+        item = {"chunks": chunk_document(content, self.cls_token_id, self.sep_token_id, self.chunking)}
+        if self.labels is not None:
+            item["labels"] = self.labels[idx]
+        return item
+
+    def make_collator(self, train: bool, pad_to_multiple_of: Optional[int] = 8, seed: int = 42) -> "ChunkCollator":
+        """Collator do DataLoader (create_data_loader)."""
+        return ChunkCollator(
+            self.pad_token_id,
+            pad_to_multiple_of,
+            max_length=self.chunking.max_length,
+            sample_chunks=self.chunking.train_chunks if train else None,
+            seed=seed,
+        )
+
+
+class ChunkCollator:
+    """
+    Junta as janelas de um batch de documentos (collate_chunks).
+
+    Com sample_chunks (treino), cada documento contribui com no máximo
+    sample_chunks janelas sorteadas. O sorteio usa um gerador próprio por
+    amostra, semeado por (seed, época, índice): não depende do RNG global,
+    que nos workers do DataLoader é outro a cada processo, nem da ordem em
+    que as amostras são carregadas. O Trainer chama set_epoch a cada época.
+    """
+
+    def __init__(self, pad_token_id: int = 0, pad_to_multiple_of: Optional[int] = 8,
+                 max_length: Optional[int] = None, sample_chunks: Optional[int] = None,
+                 seed: int = 42):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.max_length = max_length
+        self.sample_chunks = sample_chunks
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        """Define a época (o sorteio é determinístico por seed + época + índice)."""
+        self.epoch = epoch
+
+    def sample(self, num_chunks: int, index: int) -> List[int]:
+        """Posições (crescentes) das janelas sorteadas de uma amostra."""
+        seed = int(np.random.SeedSequence([self.seed, self.epoch, index]).generate_state(1)[0])
+        generator = torch.Generator().manual_seed(seed)
+        return torch.randperm(num_chunks, generator=generator)[:self.sample_chunks].sort().values.tolist()
+
+    def __call__(self, items: List[Dict[str, Any]]) -> Dict[str, torch.Tensor]:
+        docs = []
+        for position, item in enumerate(items):
+            chunks = item["chunks"]
+            if self.sample_chunks and len(chunks) > self.sample_chunks:
+                chosen = self.sample(len(chunks), item.get("index", position))
+                chunks = [chunks[i] for i in chosen]
+            docs.append(chunks)
+
+        batch = collate_chunks(docs, self.pad_token_id, self.pad_to_multiple_of, self.max_length)
+        if "labels" in items[0]:
+            batch["labels"] = torch.tensor([item["labels"] for item in items], dtype=torch.long)
+        if "index" in items[0]:
+            batch["index"] = torch.tensor([item["index"] for item in items], dtype=torch.long)
+        return batch
+
+
+# ==================== Inferência ====================
+
+def encode_documents(
+    tokenizer,
+    texts: Sequence[str],
+    config: ChunkingConfig,
+    batch_size: int = TOKENIZE_BATCH_SIZE,
+) -> Tuple[List[List[np.ndarray]], List[int]]:
+    """
+    Tokeniza os textos inteiros e monta as janelas de cada um.
+
+    Returns:
+        Tuple de (janelas por documento, total de tokens de cada documento)
+    """
+    docs, num_tokens = [], []
+    for begin in range(0, len(texts), batch_size):
+        encoded = tokenizer(
+            [str(t) for t in texts[begin:begin + batch_size]],
+            add_special_tokens=False,
+            truncation=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,
+        )["input_ids"]
+        for ids in encoded:
+            num_tokens.append(len(ids))
+            docs.append(chunk_document(np.asarray(ids), tokenizer.cls_token_id, tokenizer.sep_token_id, config))
+    return docs, num_tokens
+
+
+def predict_chunked(
+    model,
+    tokenizer,
+    texts: Sequence[str],
+    config: ChunkingConfig,
+    device: Union[str, torch.device] = "cpu",
+    batch_size: int = 8,
+) -> Tuple[torch.Tensor, List[Dict[str, int]]]:
+    """
+    Logits por documento, com todas as janelas de cada batch de documentos
+    num único forward.
+
+    Args:
+        model: BertClassifier (com ou sem cabeça de atenção)
+        tokenizer: Tokenizer do modelo
+        texts: Textos a classificar
+        config: Parâmetros das janelas
+        device: Dispositivo
+        batch_size: Documentos por forward (até batch_size * max_chunks janelas)
+
+    Returns:
+        Tuple de (logits [n_textos, n_classes], [{num_tokens, num_chunks}] por texto)
+    """
+    if not texts:
+        return torch.empty((0, model.num_labels)), []
+
+    docs, num_tokens = encode_documents(tokenizer, texts, config)
+    pad_token_id = tokenizer.pad_token_id or 0
+
+    model.eval()
+    logits = []
+    with torch.no_grad():
+        for begin in range(0, len(docs), batch_size):
+            batch = collate_chunks(docs[begin:begin + batch_size], pad_token_id, max_length=config.max_length)
+            batch = {k: v.to(device) for k, v in batch.items()}
+            logits.append(model(
+                batch["input_ids"], batch["attention_mask"], batch["token_type_ids"],
+                chunk_doc=batch["chunk_doc"], pooling=config.pooling,
+            ).float().cpu())
+
+    info = [{"num_tokens": n, "num_chunks": len(d)} for n, d in zip(num_tokens, docs)]
+    return torch.cat(logits), info
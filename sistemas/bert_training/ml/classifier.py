@@ -13,6 +13,8 @@ from pathlib import Path
 import logging
 import hashlib
 
+from sistemas.bert_training.ml.chunking import pool_chunk_logits
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,9 +22,19 @@ class BertClassifier(nn.Module):
     """
     Classificador baseado em BERT para classificação de texto.
     Utiliza o token [CLS] como representação do texto.
+
+    Documentos longos podem ser classificados por janelas (chunking.py): o
+    forward recebe todas as janelas do batch e `chunk_doc`, e agrega os
+    logits por documento.
     """
 
-    def __init__(self, model_name: str, num_labels: int, dropout_prob: float = 0.1):
+    def __init__(
+        self,
+        model_name: str,
+        num_labels: int,
+        dropout_prob: float = 0.1,
+        chunk_pooling: Optional[str] = None
+    ):
         """
         Inicializa o classificador.
 
@@ -30,11 +42,16 @@ class BertClassifier(nn.Module):
             model_name: Nome do modelo no Hugging Face Hub ou caminho local
             num_labels: Número de classes para classificação
             dropout_prob: Probabilidade de dropout
+            chunk_pooling: Agregação das janelas ('mean', 'max' ou 'attention';
+                'attention' cria a cabeça de atenção treinável)
         """
         super(BertClassifier, self).__init__()
 
         self.model_name = model_name
         self.num_labels = num_labels
+        self.chunk_pooling = chunk_pooling
+        # Parâmetros das janelas usados no treino (gravados em save())
+        self.chunking: Optional[Dict[str, Any]] = None
 
         # Carrega o modelo base
         logger.info(f"Carregando modelo base: {model_name}")
@@ -48,6 +65,12 @@ class BertClassifier(nn.Module):
         self.dropout = nn.Dropout(dropout_prob)
         self.classifier = nn.Linear(self.config.hidden_size, num_labels)
 
+        # Pontua cada janela a partir do [CLS]; os pesos (softmax por
+        # documento) ponderam os logits das janelas
+        self.chunk_attention = None
+        if chunk_pooling == 'attention':
+            self.chunk_attention = nn.Linear(self.config.hidden_size, 1)
+
         logger.info(f"Classificador criado com {num_labels} classes")
 
     def forward(
@@ -55,6 +78,8 @@ class BertClassifier(nn.Module):
         input_ids: Optional[torch.Tensor] = None,
         attention_mask: Optional[torch.Tensor] = None,
         token_type_ids: Optional[torch.Tensor] = None,
+        chunk_doc: Optional[torch.Tensor] = None,
+        pooling: Optional[str] = None,
     ) -> torch.Tensor:
         """
         Forward pass do modelo.
@@ -63,6 +88,9 @@ class BertClassifier(nn.Module):
             input_ids: IDs dos tokens
             attention_mask: Máscara de atenção
             token_type_ids: IDs de tipo de token
+            chunk_doc: Documento de cada linha (modo por janelas); se
+                informado, retorna um logit por documento
+            pooling: Agregação das janelas (padrão: chunk_pooling ou 'mean')
 
         Returns:
             Logits de classificação
@@ -78,7 +106,16 @@ class BertClassifier(nn.Module):
         pooled_output = self.dropout(pooled_output)
         logits = self.classifier(pooled_output)
 
-        return logits
+        if chunk_doc is None:
+            return logits
+
+        pooling = pooling or self.chunk_pooling or 'mean'
+        scores = None
+        if pooling == 'attention':
+            if self.chunk_attention is None:
+                raise ValueError("Modelo sem cabeça de atenção; use pooling 'mean' ou 'max'")
+            scores = self.chunk_attention(pooled_output).squeeze(-1)
+        return pool_chunk_logits(logits, chunk_doc, pooling, scores)
 
     def predict(
         self,
@@ -105,7 +142,8 @@ class BertClassifier(nn.Module):
         path: Path,
         label_map: Dict[int, str],
         tokenizer_name: str,
-        truncation_side: str = "right"
+        truncation_side: str = "right",
+        chunking: Optional[Dict[str, Any]] = None
     ) -> str:
         """
         Salva o modelo treinado.
@@ -115,6 +153,8 @@ class BertClassifier(nn.Module):
             label_map: Mapeamento de índice para label
             tokenizer_name: Nome do tokenizer usado
             truncation_side: Lado do truncamento usado no treinamento
+            chunking: Parâmetros das janelas (ChunkingConfig.to_dict()), se
+                treinado por janelas; padrão: self.chunking
 
         Returns:
             Fingerprint (hash) do modelo salvo
@@ -130,9 +170,11 @@ class BertClassifier(nn.Module):
             'label_map': label_map,
             'tokenizer_name': tokenizer_name,
             'truncation_side': truncation_side,
+            'chunking': chunking or self.chunking,
             'config': {
                 'hidden_size': self.config.hidden_size,
-                'dropout_prob': self.dropout.p
+                'dropout_prob': self.dropout.p,
+                'chunk_pooling': self.chunk_pooling
             }
         }
 
@@ -179,8 +221,11 @@ class BertClassifier(nn.Module):
         model = cls(
             model_name=checkpoint['model_name'],
             num_labels=checkpoint['num_labels'],
-            dropout_prob=checkpoint['config']['dropout_prob']
+            dropout_prob=checkpoint['config']['dropout_prob'],
+            chunk_pooling=checkpoint['config'].get('chunk_pooling')
         )
+        # Modelos antigos não têm chunking (classificados por truncamento)
+        model.chunking = checkpoint.get('chunking')
 
         model.load_state_dict(checkpoint['model_state_dict'])
         model.to(device)
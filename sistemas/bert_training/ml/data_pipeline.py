@@ -0,0 +1,429 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline de dados pré-tokenizado para treino e avaliação do classificador BERT.
+
+PERFORMANCE: o TextClassificationDataset tokeniza cada amostra no __getitem__
+com padding='max_length', ou seja, re-tokeniza o dataset inteiro a cada época
+na thread de treino e roda o modelo sobre 512 tokens mesmo para textos curtos.
+Aqui:
+- tokenize_to_cache: uma única passada em lote do tokenizer rápido, gravada em
+  disco (ids em int32 + offsets, lidos por memmap) e reaproveitada enquanto o
+  hash dos textos, o tokenizer, max_length e truncation_side forem os mesmos;
+- LengthBucketBatchSampler: agrupa textos de tamanho parecido no mesmo batch;
+- DynamicPaddingCollator: completa só até o maior texto do batch;
+- create_data_loader: monta o DataLoader (workers configuráveis, pin_memory
+  em CUDA) usado tanto pelo Trainer quanto pelo Evaluator.
+
+Documentos longos (modo por janelas) usam o cache sem truncamento e o
+ChunkedDataset de chunking.py.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler, Subset
+
+logger = logging.getLogger(__name__)
+
+# Versão do formato gravado em disco; mudar invalida os caches antigos
+CACHE_FORMAT_VERSION = 1
+
+# Textos tokenizados por chamada ao tokenizer rápido (Rust, paralelo por lote)
+TOKENIZE_BATCH_SIZE = 1000
+
+# Cada "megabatch" embaralhado tem batch_size * MEGABATCH_FACTOR amostras
+MEGABATCH_FACTOR = 50
+
+
+def _tokenizer_fingerprint(tokenizer) -> str:
+    """Identifica o tokenizer pelo vocabulário/regras, não só pelo nome."""
+    h = hashlib.sha256(str(getattr(tokenizer, "name_or_path", "")).encode("utf-8"))
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        h.update(backend.to_str().encode("utf-8"))
+    else:
+        h.update(json.dumps(tokenizer.get_vocab(), sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def cache_key(
+    texts: Sequence[str],
+    tokenizer,
+    max_length: int,
+    truncation_side: str,
+    truncation: bool = True,
+) -> str:
+    """
+    Chave do cache: hash dos textos + tokenizer + max_length + truncation_side.
+
+    Cada texto entra com o tamanho como prefixo, para que ["ab", "c"] e
+    ["a", "bc"] não colidam.
+    """
+    h = hashlib.sha256()
+    if truncation:
+        h.update(f"v{CACHE_FORMAT_VERSION}|{max_length}|{truncation_side}|".encode("utf-8"))
+    else:
+        h.update(f"v{CACHE_FORMAT_VERSION}|completo|".encode("utf-8"))
+    h.update(_tokenizer_fingerprint(tokenizer).encode("utf-8"))
+    for text in texts:
+        data = str(text).encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def tokenize_to_cache(
+    texts: Sequence[str],
+    tokenizer,
+    max_length: int,
+    cache_dir: Union[str, Path],
+    truncation_side: str = "right",
+    batch_size: int = TOKENIZE_BATCH_SIZE,
+    truncation: bool = True,
+) -> Path:
+    """
+    Tokeniza os textos uma única vez e grava o resultado em cache_dir/<chave>.
+
+    Formato: ids.npy (int32, todos os textos concatenados), offsets.npy
+    (int64, n+1 posições) e meta.json. A gravação é feita num diretório
+    temporário renomeado no fim, então um cache interrompido nunca é lido.
+
+    Args:
+        texts: Textos do dataset
+        tokenizer: Tokenizer do Hugging Face (de preferência o "fast")
+        max_length: Tamanho máximo da sequência (inclui [CLS]/[SEP])
+        cache_dir: Diretório raiz do cache
+        truncation_side: Lado do truncamento ('right' ou 'left')
+        batch_size: Textos por chamada ao tokenizer
+        truncation: False grava o texto inteiro, sem [CLS]/[SEP], para o
+            modo por janelas (ChunkedDataset); max_length é ignorado
+
+    Returns:
+        Caminho do diretório do cache
+    """
+    cache_dir = Path(cache_dir)
+    key = cache_key(texts, tokenizer, max_length, truncation_side, truncation)
+    path = cache_dir / key
+    if (path / "meta.json").exists():
+        logger.info(f"Cache de tokenização reutilizado: {path}")
+        return path
+
+    if not getattr(tokenizer, "is_fast", False):
+        logger.warning("Tokenizer não é 'fast'; a tokenização inicial será mais lenta")
+
+    tokenizer.truncation_side = truncation_side
+    start = time.perf_counter()
+
+    chunks: List[np.ndarray] = []
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for begin in range(0, len(texts), batch_size):
+        batch = [str(t) for t in texts[begin:begin + batch_size]]
+        if truncation:
+            encoded = tokenizer(
+                batch,
+                add_special_tokens=True,
+                max_length=max_length,
+                truncation=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )["input_ids"]
+        else:
+            encoded = tokenizer(
+                batch,
+                add_special_tokens=False,
+                truncation=False,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False,
+            )["input_ids"]
+        for i, ids in enumerate(encoded):
+            lengths[begin + i] = len(ids)
+            chunks.append(np.asarray(ids, dtype=np.int32))
+
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    ids = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+
+    truncated = int((lengths >= max_length).sum()) if truncation else 0
+    meta = {
+        "version": CACHE_FORMAT_VERSION,
+        "num_texts": len(texts),
+        "num_tokens": int(offsets[-1]),
+        "max_length": max_length,
+        "truncation_side": truncation_side,
+        "pad_token_id": int(tokenizer.pad_token_id or 0),
+        "tokenizer": str(getattr(tokenizer, "name_or_path", "")),
+        "truncated": truncated,
+    }
+    if not truncation:
+        meta.update({
+            "truncation": False,
+            "cls_token_id": int(tokenizer.cls_token_id),
+            "sep_token_id": int(tokenizer.sep_token_id),
+        })
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = cache_dir / f".{key}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    np.save(tmp / "ids.npy", ids)
+    np.save(tmp / "offsets.npy", offsets)
+    (tmp / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # Outro processo gravou o mesmo cache primeiro (conteúdo idêntico)
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not (path / "meta.json").exists():
+            raise
+
+    if truncation:
+        detalhe = f"{truncated} atingiram max_length={max_length}"
+    else:
+        detalhe = f"textos completos, maior com {int(lengths.max()) if len(lengths) else 0} tokens"
+    logger.info(
+        f"Tokenização: {len(texts)} textos, {meta['num_tokens']} tokens em "
+        f"{time.perf_counter() - start:.1f}s ({detalhe}) -> {path}"
+    )
+    return path
+
+
+class PreTokenizedDataset(Dataset):
+    """
+    Dataset sobre um cache gerado por tokenize_to_cache.
+
+    Cada item traz só os ids sem padding (o collator completa por batch).
+    Os ids ficam em memmap: em workers do DataLoader (spawn no Windows) o
+    dataset é reaberto a partir do caminho em vez de ser copiado.
+    """
+
+    def __init__(self, cache_path: Union[str, Path], labels: Optional[List[int]] = None):
+        """
+        Args:
+            cache_path: Diretório retornado por tokenize_to_cache
+            labels: Lista de labels (opcional para inferência)
+        """
+        self.cache_path = Path(cache_path)
+        self.labels = labels
+        self._open()
+
+        if labels is not None and len(labels) != len(self):
+            raise ValueError(f"{len(labels)} labels para {len(self)} textos no cache {self.cache_path}")
+
+    def _open(self) -> None:
+        self.meta: Dict[str, Any] = json.loads((self.cache_path / "meta.json").read_text(encoding="utf-8"))
+        self.ids = np.load(self.cache_path / "ids.npy", mmap_mode="r")
+        self.offsets = np.load(self.cache_path / "offsets.npy")
+        self.lengths = np.diff(self.offsets)
+        self.pad_token_id = self.meta["pad_token_id"]
+        self.max_length = self.meta["max_length"]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"cache_path": self.cache_path, "labels": self.labels}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.cache_path = state["cache_path"]
+        self.labels = state["labels"]
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        item = {"input_ids": np.asarray(self.ids[self.offsets[idx]:self.offsets[idx + 1]])}
+        if self.labels is not None:
+            item["labels"] = self.labels[idx]
+        return item
+
+
+def dataset_lengths(dataset) -> Optional[np.ndarray]:
+    """Tamanhos (em tokens) das amostras, inclusive dentro de um Subset do split."""
+    if isinstance(dataset, Subset):
+        base = dataset_lengths(dataset.dataset)
+        return None if base is None else base[np.asarray(dataset.indices)]
+    lengths = getattr(dataset, "lengths", None)
+    return None if lengths is None else np.asarray(lengths)
+
+
+def _base_dataset(dataset):
+    while isinstance(dataset, Subset):
+        dataset = dataset.dataset
+    return dataset
+
+
+class LengthBucketBatchSampler(Sampler[List[int]]):
+    """
+    Batches de amostras com tamanho parecido.
+
+    Com shuffle, a cada época as amostras são embaralhadas, divididas em
+    megabatches de batch_size * megabatch_factor, ordenadas por tamanho dentro
+    de cada megabatch e fatiadas em batches; a ordem dos batches é embaralhada
+    de novo. Sem shuffle (avaliação), a ordem é a de tamanho crescente.
+
+    start_batch pula os primeiros batches da próxima iteração (retomada de
+    checkpoint no meio da época) sem carregar as amostras puladas.
+    """
+
+    def __init__(
+        self,
+        lengths: Sequence[int],
+        batch_size: int,
+        shuffle: bool = True,
+        seed: int = 42,
+        megabatch_factor: int = MEGABATCH_FACTOR,
+    ):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.megabatch_factor = megabatch_factor
+        self.epoch = 0
+        self.start_batch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        """Define a época (a ordem é determinística por seed + época)."""
+        self.epoch = epoch
+
+    def _batches(self) -> List[np.ndarray]:
+        n = len(self.lengths)
+        if not self.shuffle:
+            order = np.argsort(self.lengths, kind="stable")
+            return [order[i:i + self.batch_size] for i in range(0, n, self.batch_size)]
+
+        rng = np.random.default_rng([self.seed, self.epoch])
+        permutation = rng.permutation(n)
+        megabatch = self.batch_size * self.megabatch_factor
+        batches = []
+        for begin in range(0, n, megabatch):
+            chunk = permutation[begin:begin + megabatch]
+            chunk = chunk[np.argsort(-self.lengths[chunk], kind="stable")]
+            batches.extend(chunk[i:i + self.batch_size] for i in range(0, len(chunk), self.batch_size))
+        return [batches[i] for i in rng.permutation(len(batches))]
+
+    def __iter__(self) -> Iterator[List[int]]:
+        start, self.start_batch = self.start_batch, 0
+        for batch in self._batches()[start:]:
+            yield batch.tolist()
+
+    def __len__(self) -> int:
+        return math.ceil(len(self.lengths) / self.batch_size)
+
+
+class DynamicPaddingCollator:
+    """
+    Completa os input_ids só até o maior texto do batch (arredondado para
+    múltiplo de pad_to_multiple_of, que favorece os kernels de GPU).
+    """
+
+    def __init__(self, pad_token_id: int = 0, pad_to_multiple_of: Optional[int] = 8, max_length: Optional[int] = None):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+        self.max_length = max_length
+
+    def __call__(self, items: List[Dict[str, Any]]) -> Dict[str, torch.Tensor]:
+        lengths = [len(item["input_ids"]) for item in items]
+        width = max(lengths)
+        if self.pad_to_multiple_of:
+            width = -(-width // self.pad_to_multiple_of) * self.pad_to_multiple_of
+            if self.max_length:
+                width = min(width, max(self.max_length, max(lengths)))
+
+        input_ids = np.full((len(items), width), self.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(items), width), dtype=np.int64)
+        for row, (item, length) in enumerate(zip(items, lengths)):
+            input_ids[row, :length] = item["input_ids"]
+            attention_mask[row, :length] = 1
+
+        batch = {
+            "input_ids": torch.from_numpy(input_ids),
+            "attention_mask": torch.from_numpy(attention_mask),
+            "token_type_ids": torch.zeros((len(items), width), dtype=torch.long),
+        }
+        if "labels" in items[0]:
+            batch["labels"] = torch.tensor([item["labels"] for item in items], dtype=torch.long)
+        if "index" in items[0]:
+            batch["index"] = torch.tensor([item["index"] for item in items], dtype=torch.long)
+        return batch
+
+
+class _IndexedDataset(Dataset):
+    """Acrescenta a posição da amostra, para o Evaluator restaurar a ordem original."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        item = dict(self.dataset[idx])
+        item["index"] = idx
+        return item
+
+
+def create_data_loader(
+    dataset,
+    batch_size: int,
+    shuffle: bool = False,
+    seed: int = 42,
+    num_workers: int = 0,
+    device: str = "cpu",
+    pad_to_multiple_of: Optional[int] = 8,
+) -> DataLoader:
+    """
+    DataLoader de treino/avaliação.
+
+    Datasets pré-tokenizados (com `lengths`, inclusive via Subset) usam o
+    sampler por tamanho e o padding dinâmico; os demais (ex.: token
+    classification) mantêm o DataLoader padrão. Datasets por janelas
+    (ChunkedDataset) usam o próprio collator, que no treino (shuffle) sorteia
+    até train_chunks janelas por documento, por seed + época + amostra.
+
+    Args:
+        dataset: Dataset ou Subset
+        batch_size: Tamanho do batch
+        shuffle: Embaralhar (treino) ou ordem por tamanho (avaliação)
+        seed: Seed da ordem dos batches (e do sorteio do collator, se houver)
+        num_workers: Processos de carregamento (0 = na thread principal)
+        device: Dispositivo; 'cuda' ativa pin_memory
+        pad_to_multiple_of: Arredondamento da largura do batch
+
+    Returns:
+        DataLoader
+    """
+    pin_memory = str(device).startswith("cuda")
+    lengths = dataset_lengths(dataset)
+    if lengths is None:
+        return DataLoader(
+            dataset,
+            batch_size=batch_size,
+            shuffle=shuffle,
+            num_workers=num_workers,
+            pin_memory=pin_memory,
+            persistent_workers=num_workers > 0,
+        )
+
+    base = _base_dataset(dataset)
+    if hasattr(base, "make_collator"):
+        collate_fn = base.make_collator(train=shuffle, pad_to_multiple_of=pad_to_multiple_of, seed=seed)
+    else:
+        collate_fn = DynamicPaddingCollator(base.pad_token_id, pad_to_multiple_of, base.max_length)
+    return DataLoader(
+        _IndexedDataset(dataset),
+        batch_sampler=LengthBucketBatchSampler(lengths, batch_size, shuffle=shuffle, seed=seed),
+        collate_fn=collate_fn,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        # Workers persistentes ficariam com a cópia do collator da primeira
+        # época; collators com set_epoch precisam ser recopiados a cada época
+        persistent_workers=num_workers > 0 and not hasattr(collate_fn, "set_epoch"),
+    )
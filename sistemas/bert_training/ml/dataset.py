@@ -6,13 +6,17 @@ Adaptado do projeto E:\Projetos\BERT para integração com o portal PGE.
 """
 
 import json
+from pathlib import Path
 import torch
 from torch.utils.data import Dataset
 from transformers import AutoTokenizer
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union, TYPE_CHECKING
 import pandas as pd
 import logging
 
+if TYPE_CHECKING:
+    from sistemas.bert_training.ml.chunking import ChunkingConfig
+
 logger = logging.getLogger(__name__)
 
 
@@ -203,7 +207,9 @@ def prepare_data_from_dataframe(
     tokenizer_name: str = "neuralmind/bert-base-portuguese-cased",
     max_length: int = 512,
     truncation_side: str = "right",
-    task_type: str = "text_classification"
+    task_type: str = "text_classification",
+    cache_dir: Optional[Union[str, Path]] = None,
+    chunking: Optional["ChunkingConfig"] = None
 ) -> Tuple[Dataset, Dict[str, int], Dict[int, str]]:
     """
     Prepara os dados a partir de um DataFrame.
@@ -216,6 +222,12 @@ def prepare_data_from_dataframe(
         max_length: Tamanho máximo da sequência
         truncation_side: Lado do truncamento
         task_type: Tipo de tarefa ('text_classification' ou 'token_classification')
+        cache_dir: Diretório do cache de tokenização. Se informado, os textos
+            são tokenizados uma única vez e o dataset retornado é um
+            PreTokenizedDataset (padding dinâmico no DataLoader)
+        chunking: ChunkingConfig para documentos longos: os textos são
+            tokenizados inteiros e divididos em janelas (ChunkedDataset) em vez
+            de truncados em max_length. Requer cache_dir
 
     Returns:
         Tuple de (dataset, label_to_id, id_to_label)
@@ -230,14 +242,40 @@ def prepare_data_from_dataframe(
         # Converte labels para índices
         labels = [label_to_id[label] for label in labels_str]
 
-        # Cria o dataset
-        dataset = TextClassificationDataset(
-            texts=texts,
-            labels=labels,
-            tokenizer_name=tokenizer_name,
-            max_length=max_length,
-            truncation_side=truncation_side
-        )
+        if chunking is not None:
+            # Documentos longos: texto inteiro em cache, janelas no __getitem__
+            from sistemas.bert_training.ml.chunking import ChunkedDataset
+            from sistemas.bert_training.ml.data_pipeline import tokenize_to_cache
+
+            if cache_dir is None:
+                raise ValueError("O modo por janelas requer cache_dir")
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+            cache_path = tokenize_to_cache(texts, tokenizer, max_length, cache_dir, truncation=False)
+            dataset = ChunkedDataset(cache_path, labels, chunking)
+            longos = int((dataset.content_lengths > chunking.window_tokens).sum())
+            logger.info(
+                f"Modo por janelas: {longos} de {len(dataset)} textos passam de {chunking.max_length} tokens "
+                f"(até {chunking.max_chunks} janelas por texto, {chunking.train_chunks} no treino, "
+                f"agregação {chunking.pooling})"
+            )
+        elif cache_dir is not None:
+            # Tokenização única, em lote, com cache em disco
+            from sistemas.bert_training.ml.data_pipeline import PreTokenizedDataset, tokenize_to_cache
+
+            tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+            cache_path = tokenize_to_cache(
+                texts, tokenizer, max_length, cache_dir, truncation_side=truncation_side
+            )
+            dataset = PreTokenizedDataset(cache_path, labels)
+        else:
+            # Cria o dataset
+            dataset = TextClassificationDataset(
+                texts=texts,
+                labels=labels,
+                tokenizer_name=tokenizer_name,
+                max_length=max_length,
+                truncation_side=truncation_side
+            )
 
     else:  # token_classification
         # Parseia tokens e tags de JSON
@@ -6,7 +6,6 @@ Adaptado do projeto E:\Projetos\BERT para integração com o portal PGE.
 """
 
 import torch
-from torch.utils.data import DataLoader
 from typing import Dict, List, Any, Tuple, Optional
 import numpy as np
 from sklearn.metrics import (
@@ -20,6 +19,7 @@ from sklearn.metrics import (
 import logging
 
 from sistemas.bert_training.ml.classifier import BertClassifier
+from sistemas.bert_training.ml.data_pipeline import create_data_loader
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +36,8 @@ class Evaluator:
         id_to_label: Dict[int, str],
         device: str = 'cuda',
         batch_size: int = 16,
-        texts: Optional[List[str]] = None
+        texts: Optional[List[str]] = None,
+        num_workers: int = 0
     ):
         """
         Inicializa o avaliador.
@@ -48,6 +49,7 @@ class Evaluator:
             device: Dispositivo
             batch_size: Tamanho do batch
             texts: Lista de textos originais (para análise de erros)
+            num_workers: Processos do DataLoader (0 = na thread principal)
         """
         self.model = model.to(device)
         self.model.eval()
@@ -56,11 +58,12 @@ class Evaluator:
         self.labels = [id_to_label[i] for i in range(len(id_to_label))]
         self.texts = texts
 
-        self.dataloader = DataLoader(
+        self.dataloader = create_data_loader(
             dataset,
             batch_size=batch_size,
             shuffle=False,
-            num_workers=0
+            num_workers=num_workers,
+            device=device
         )
 
     def get_predictions(self) -> Tuple[List[int], List[int], np.ndarray]:
@@ -73,6 +76,7 @@ class Evaluator:
         all_predictions = []
         all_labels = []
         all_probabilities = []
+        all_indices = []
 
         with torch.no_grad():
             for batch in self.dataloader:
@@ -84,13 +88,27 @@ class Evaluator:
                 if 'token_type_ids' in batch:
                     token_type_ids = batch['token_type_ids'].to(self.device)
 
-                logits = self.model(input_ids, attention_mask, token_type_ids)
+                # Modo por janelas: um logit por documento
+                chunk_kwargs = {}
+                if 'chunk_doc' in batch:
+                    chunk_kwargs['chunk_doc'] = batch['chunk_doc'].to(self.device)
+
+                logits = self.model(input_ids, attention_mask, token_type_ids, **chunk_kwargs)
                 probabilities = torch.softmax(logits, dim=-1)
                 predictions = torch.argmax(logits, dim=-1)
 
                 all_predictions.extend(predictions.cpu().numpy())
                 all_labels.extend(labels.cpu().numpy())
                 all_probabilities.extend(probabilities.cpu().numpy())
+                if 'index' in batch:
+                    all_indices.extend(batch['index'].tolist())
+
+        # Os batches vêm agrupados por tamanho: volta para a ordem do dataset
+        if all_indices:
+            order = np.argsort(all_indices)
+            all_labels = [all_labels[i] for i in order]
+            all_predictions = [all_predictions[i] for i in order]
+            all_probabilities = [all_probabilities[i] for i in order]
 
         return all_labels, all_predictions, np.array(all_probabilities)
 
@@ -3,24 +3,39 @@
 Loop de treinamento do classificador BERT.
 
 Adaptado do projeto E:\Projetos\BERT para integração com o portal PGE.
+
+PERFORMANCE: acumulação de gradiente até um batch efetivo alvo, autocast
+opcional (bf16 em CPU; fp16/bf16 em GPU), torch.compile opcional e ajuste do
+número de threads. Com ChunkedDataset, cada batch traz janelas de vários
+documentos e a loss é calculada sobre os logits agregados por documento. Checkpoints por step (modelo, otimizador, scheduler, RNG e
+posição do sampler) gravados de forma atômica permitem retomar um treino
+interrompido exatamente de onde parou.
 """
 
+import contextlib
+import math
+import os
+import random
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, random_split, Subset
+from torch.utils.data import random_split, Subset
 from torch.optim import AdamW
 from transformers import get_linear_schedule_with_warmup
-from typing import Dict, List, Optional, Callable, Any, Tuple
+from typing import Dict, List, Optional, Callable, Any, Tuple, Union
 from pathlib import Path
 import numpy as np
 import logging
 from sklearn.utils.class_weight import compute_class_weight
 
 from sistemas.bert_training.ml.classifier import BertClassifier
+from sistemas.bert_training.ml.data_pipeline import create_data_loader
 from sistemas.bert_training.ml.dataset import TextClassificationDataset
 
 logger = logging.getLogger(__name__)
 
+CHECKPOINT_FILE = "checkpoint.pt"
+PRECISIONS = ("fp32", "bf16", "fp16")
+
 
 class Trainer:
     """
@@ -41,7 +56,16 @@ class Trainer:
         use_class_weights: bool = True,
         gradient_accumulation_steps: int = 1,
         early_stopping_patience: int = 3,
-        progress_callback: Optional[Callable] = None
+        progress_callback: Optional[Callable] = None,
+        num_workers: int = 0,
+        seed: int = 42,
+        effective_batch_size: Optional[int] = None,
+        precision: str = 'fp32',
+        compile_model: bool = False,
+        num_threads: Optional[int] = None,
+        checkpoint_dir: Optional[Union[str, Path]] = None,
+        checkpoint_every_steps: int = 0,
+        checkpoint_fingerprint: Optional[str] = None
     ):
         """
         Inicializa o trainer.
@@ -60,32 +84,66 @@ class Trainer:
             gradient_accumulation_steps: Steps para acumular gradientes
             early_stopping_patience: Épocas sem melhoria para parar
             progress_callback: Callback para reportar progresso
+            num_workers: Processos do DataLoader (0 = na thread principal)
+            seed: Seed da ordem dos batches
+            effective_batch_size: Batch efetivo alvo; se informado, define
+                gradient_accumulation_steps = ceil(effective_batch_size / batch_size)
+            precision: 'fp32', 'bf16' (autocast em CPU ou GPU) ou 'fp16' (GPU, com GradScaler)
+            compile_model: Usa torch.compile no forward
+            num_threads: Threads intra-op do PyTorch (None = padrão)
+            checkpoint_dir: Diretório do checkpoint; se já houver um, o treino é retomado dele
+            checkpoint_every_steps: Grava checkpoint a cada N passos do otimizador (0 = só ao fim de cada época)
+            checkpoint_fingerprint: Identifica dataset + configuração; checkpoint de outro treino é ignorado
         """
+        if num_threads:
+            torch.set_num_threads(num_threads)
+            logger.info(f"PyTorch usando {num_threads} threads")
+
         self.model = model.to(device)
         self.device = device
+        self.device_type = 'cuda' if str(device).startswith('cuda') else 'cpu'
         self.epochs = epochs
         self.batch_size = batch_size
+        if effective_batch_size:
+            gradient_accumulation_steps = max(1, math.ceil(effective_batch_size / batch_size))
         self.gradient_accumulation_steps = gradient_accumulation_steps
         self.early_stopping_patience = early_stopping_patience
         self.progress_callback = progress_callback
 
-        # DataLoaders
-        self.train_loader = DataLoader(
+        # Precisão mista
+        self.amp_dtype = self._resolve_precision(precision)
+        self.scaler = None
+        if self.amp_dtype == torch.float16:
+            self.scaler = torch.amp.GradScaler('cuda')
+
+        # torch.compile (o state_dict continua sendo o do modelo original)
+        self.forward_model = self.model
+        if compile_model:
+            if hasattr(torch, 'compile'):
+                self.forward_model = torch.compile(self.model)
+                logger.info("Modelo compilado com torch.compile")
+            else:
+                logger.warning("torch.compile indisponível nesta versão do PyTorch")
+
+        # DataLoaders (PERFORMANCE: batches por tamanho + padding dinâmico
+        # quando o dataset é pré-tokenizado)
+        self.train_loader = create_data_loader(
             train_dataset,
             batch_size=batch_size,
             shuffle=True,
-            num_workers=0,
-            pin_memory=True if device == 'cuda' else False
+            seed=seed,
+            num_workers=num_workers,
+            device=device
         )
 
         self.val_loader = None
         if val_dataset:
-            self.val_loader = DataLoader(
+            self.val_loader = create_data_loader(
                 val_dataset,
                 batch_size=batch_size,
                 shuffle=False,
-                num_workers=0,
-                pin_memory=True if device == 'cuda' else False
+                num_workers=num_workers,
+                device=device
             )
 
         # Class weights para lidar com desbalanceamento
@@ -126,8 +184,9 @@ class Trainer:
             weight_decay=weight_decay
         )
 
-        # Scheduler
-        total_steps = len(self.train_loader) * epochs
+        # Scheduler (um step por passo do otimizador, não por batch)
+        steps_per_epoch = math.ceil(len(self.train_loader) / self.gradient_accumulation_steps)
+        total_steps = steps_per_epoch * epochs
         self.scheduler = get_linear_schedule_with_warmup(
             self.optimizer,
             num_warmup_steps=warmup_steps,
@@ -138,6 +197,49 @@ class Trainer:
         self.history: List[Dict[str, Any]] = []
         self.best_val_accuracy = 0.0
         self.best_model_state = None
+        self.epochs_without_improvement = 0
+        self.global_step = 0
+        self.start_epoch = 0
+
+        # Checkpoints
+        self.checkpoint_path = Path(checkpoint_dir) / CHECKPOINT_FILE if checkpoint_dir else None
+        self.checkpoint_every_steps = checkpoint_every_steps
+        self.checkpoint_fingerprint = checkpoint_fingerprint
+        self.resumed_from: Optional[Dict[str, int]] = None
+        self._resume_state: Optional[Dict[str, Any]] = None
+        self._epoch_rng_state: Optional[Dict[str, Any]] = None
+        if self.checkpoint_path and self.checkpoint_path.exists():
+            self._load_checkpoint()
+
+        logger.info(
+            f"Batch efetivo: {batch_size * self.gradient_accumulation_steps} "
+            f"({batch_size} x {self.gradient_accumulation_steps} acumulações), precisão: {precision}"
+        )
+
+    def _resolve_precision(self, precision: str) -> Optional[torch.dtype]:
+        """Dtype do autocast para a precisão pedida (None = fp32)."""
+        if precision not in PRECISIONS:
+            raise ValueError(f"Precisão inválida: {precision} (use {', '.join(PRECISIONS)})")
+        if precision == 'fp32':
+            return None
+        if precision == 'fp16' and self.device_type == 'cpu':
+            logger.warning("fp16 não é suportado no autocast de CPU; usando bf16")
+            return torch.bfloat16
+        if precision == 'bf16' and self.device_type == 'cuda' and not torch.cuda.is_bf16_supported():
+            logger.warning("GPU sem suporte a bf16; usando fp16")
+            return torch.float16
+        return torch.bfloat16 if precision == 'bf16' else torch.float16
+
+    def _autocast(self):
+        if self.amp_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=self.device_type, dtype=self.amp_dtype)
+
+    def _chunk_kwargs(self, batch: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """Modo por janelas: o modelo agrega as janelas de cada documento."""
+        if 'chunk_doc' not in batch:
+            return {}
+        return {'chunk_doc': batch['chunk_doc'].to(self.device, non_blocking=True)}
 
     @staticmethod
     def _get_labels_from_dataset(dataset) -> Optional[List[int]]:
@@ -149,6 +251,112 @@ class Trainer:
             return [dataset.dataset.labels[i] for i in dataset.indices]
         return None
 
+    # ==================== Checkpoints ====================
+
+    def _get_rng_state(self) -> Dict[str, Any]:
+        state = {
+            'torch': torch.get_rng_state(),
+            'numpy': np.random.get_state(),
+            'python': random.getstate(),
+        }
+        if self.device_type == 'cuda':
+            state['cuda'] = torch.cuda.get_rng_state_all()
+        return state
+
+    def _set_rng_state(self, state: Dict[str, Any]) -> None:
+        torch.set_rng_state(state['torch'])
+        np.random.set_state(state['numpy'])
+        random.setstate(state['python'])
+        if self.device_type == 'cuda' and 'cuda' in state:
+            torch.cuda.set_rng_state_all(state['cuda'])
+
+    def save_checkpoint(self, epoch: int, batch: int, epoch_loss: float = 0.0) -> None:
+        """
+        Grava o estado completo do treino de forma atômica.
+
+        Args:
+            epoch: Época em que o treino deve continuar
+            batch: Batches da época já processados
+            epoch_loss: Soma das losses da época até aqui
+        """
+        if not self.checkpoint_path:
+            return
+
+        rng_state = self._get_rng_state()
+        state = {
+            'fingerprint': self.checkpoint_fingerprint,
+            'epoch': epoch,
+            'batch': batch,
+            'epoch_loss': epoch_loss,
+            'global_step': self.global_step,
+            'model': self.model.state_dict(),
+            'optimizer': self.optimizer.state_dict(),
+            'scheduler': self.scheduler.state_dict(),
+            'scaler': self.scaler.state_dict() if self.scaler else None,
+            'rng': rng_state,
+            # Estado do RNG no início da época: recria a mesma ordem dos batches
+            'epoch_rng': self._epoch_rng_state if batch else rng_state,
+            'history': self.history,
+            'best_val_accuracy': self.best_val_accuracy,
+            'best_model_state': self.best_model_state,
+            'epochs_without_improvement': self.epochs_without_improvement,
+        }
+
+        # Arquivo temporário + os.replace: um crash durante a escrita não
+        # corrompe o checkpoint anterior
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_name(self.checkpoint_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            torch.save(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+        logger.info(f"Checkpoint gravado: época {epoch + 1}, batch {batch}, step {self.global_step}")
+
+    def _load_checkpoint(self) -> None:
+        state = torch.load(self.checkpoint_path, map_location='cpu', weights_only=False)
+        if state.get('fingerprint') != self.checkpoint_fingerprint:
+            logger.warning(f"Checkpoint {self.checkpoint_path} é de outro treino; ignorado")
+            return
+
+        self.model.load_state_dict(state['model'])
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.scheduler.load_state_dict(state['scheduler'])
+        if self.scaler and state['scaler']:
+            self.scaler.load_state_dict(state['scaler'])
+        self.global_step = state['global_step']
+        self.history = state['history']
+        self.best_val_accuracy = state['best_val_accuracy']
+        self.best_model_state = state['best_model_state']
+        self.epochs_without_improvement = state['epochs_without_improvement']
+        self.start_epoch = state['epoch']
+        self._resume_state = state
+        self.resumed_from = {'epoch': state['epoch'], 'batch': state['batch'], 'step': state['global_step']}
+        logger.info(
+            f"Treino retomado do checkpoint: época {state['epoch'] + 1}, "
+            f"batch {state['batch']}, step {state['global_step']}"
+        )
+
+    def clear_checkpoint(self) -> None:
+        """Remove o checkpoint (treino concluído)."""
+        if self.checkpoint_path:
+            self.checkpoint_path.unlink(missing_ok=True)
+
+    # ==================== Treino ====================
+
+    def _optimizer_step(self) -> None:
+        if self.scaler:
+            self.scaler.unscale_(self.optimizer)
+        torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
+        if self.scaler:
+            self.scaler.step(self.optimizer)
+            self.scaler.update()
+        else:
+            self.optimizer.step()
+        self.scheduler.step()
+        self.optimizer.zero_grad()
+        self.global_step += 1
+
     def train_epoch(self, epoch: int) -> float:
         """
         Treina uma época.
@@ -159,34 +367,74 @@ class Trainer:
         self.model.train()
         total_loss = 0.0
         num_batches = len(self.train_loader)
+        accumulation = self.gradient_accumulation_steps
+
+        # Retomada no meio da época: mesmo RNG inicial (mesma ordem de batches)
+        resume = self._resume_state if self._resume_state and self._resume_state['epoch'] == epoch else None
+        start_batch = 0
+        if resume:
+            start_batch = resume['batch']
+            total_loss = resume['epoch_loss']
+            self._set_rng_state(resume['epoch_rng'])
+        self._epoch_rng_state = self._get_rng_state()
+
+        # Nova ordem de batches (sampler por tamanho) e novo sorteio de janelas a cada época
+        batch_sampler = self.train_loader.batch_sampler
+        if hasattr(batch_sampler, 'set_epoch'):
+            batch_sampler.set_epoch(epoch)
+        if hasattr(self.train_loader.collate_fn, 'set_epoch'):
+            self.train_loader.collate_fn.set_epoch(epoch)
+
+        skip = start_batch
+        if hasattr(batch_sampler, 'start_batch'):
+            batch_sampler.start_batch = start_batch
+            skip = 0
+
+        iterator = iter(self.train_loader)
+        for _ in range(skip):
+            next(iterator)
+
+        if resume:
+            self._set_rng_state(resume['rng'])
+            self._resume_state = None
 
         self.optimizer.zero_grad()
 
-        for batch_idx, batch in enumerate(self.train_loader):
+        for batch_idx, batch in enumerate(iterator, start=start_batch):
             # Move dados para GPU
-            input_ids = batch['input_ids'].to(self.device)
-            attention_mask = batch['attention_mask'].to(self.device)
-            labels = batch['labels'].to(self.device)
+            input_ids = batch['input_ids'].to(self.device, non_blocking=True)
+            attention_mask = batch['attention_mask'].to(self.device, non_blocking=True)
+            labels = batch['labels'].to(self.device, non_blocking=True)
 
             token_type_ids = None
             if 'token_type_ids' in batch:
-                token_type_ids = batch['token_type_ids'].to(self.device)
+                token_type_ids = batch['token_type_ids'].to(self.device, non_blocking=True)
 
             # Forward
-            logits = self.model(input_ids, attention_mask, token_type_ids)
-            loss = self.criterion(logits, labels)
-
-            # Gradient accumulation
-            loss = loss / self.gradient_accumulation_steps
-            loss.backward()
-
-            if (batch_idx + 1) % self.gradient_accumulation_steps == 0:
-                torch.nn.utils.clip_grad_norm_(self.model.parameters(), max_norm=1.0)
-                self.optimizer.step()
-                self.scheduler.step()
-                self.optimizer.zero_grad()
-
-            total_loss += loss.item() * self.gradient_accumulation_steps
+            with self._autocast():
+                logits = self.forward_model(input_ids, attention_mask, token_type_ids, **self._chunk_kwargs(batch))
+            loss = self.criterion(logits.float(), labels)
+
+            # Gradient accumulation (o último grupo da época pode ser menor)
+            group_start = batch_idx - batch_idx % accumulation
+            group_size = min(accumulation, num_batches - group_start)
+            scaled_loss = loss / group_size
+            if self.scaler:
+                self.scaler.scale(scaled_loss).backward()
+            else:
+                scaled_loss.backward()
+
+            total_loss += loss.item()
+
+            if (batch_idx + 1) % accumulation == 0 or batch_idx + 1 == num_batches:
+                self._optimizer_step()
+
+                if (
+                    self.checkpoint_every_steps
+                    and self.global_step % self.checkpoint_every_steps == 0
+                    and batch_idx + 1 < num_batches
+                ):
+                    self.save_checkpoint(epoch, batch_idx + 1, total_loss)
 
             # Log a cada 10% do epoch
             if (batch_idx + 1) % max(1, num_batches // 10) == 0:
@@ -212,15 +460,17 @@ class Trainer:
 
         with torch.no_grad():
             for batch in self.val_loader:
-                input_ids = batch['input_ids'].to(self.device)
-                attention_mask = batch['attention_mask'].to(self.device)
-                labels = batch['labels'].to(self.device)
+                input_ids = batch['input_ids'].to(self.device, non_blocking=True)
+                attention_mask = batch['attention_mask'].to(self.device, non_blocking=True)
+                labels = batch['labels'].to(self.device, non_blocking=True)
 
                 token_type_ids = None
                 if 'token_type_ids' in batch:
-                    token_type_ids = batch['token_type_ids'].to(self.device)
+                    token_type_ids = batch['token_type_ids'].to(self.device, non_blocking=True)
 
-                logits = self.model(input_ids, attention_mask, token_type_ids)
+                with self._autocast():
+                    logits = self.forward_model(input_ids, attention_mask, token_type_ids, **self._chunk_kwargs(batch))
+                logits = logits.float()
                 loss = self.criterion(logits, labels)
 
                 total_loss += loss.item()
@@ -245,9 +495,7 @@ class Trainer:
         logger.info(f"Device: {self.device}")
         logger.info(f"Batch size: {self.batch_size}")
 
-        epochs_without_improvement = 0
-
-        for epoch in range(self.epochs):
+        for epoch in range(self.start_epoch, self.epochs):
             logger.info(f"\n{'='*50}")
             logger.info(f"Época {epoch + 1}/{self.epochs}")
             logger.info(f"{'='*50}")
@@ -278,18 +526,24 @@ class Trainer:
                 self.progress_callback(epoch_data)
 
             # Early stopping e salvamento do melhor modelo
+            stop = False
             if val_accuracy is not None:
                 if val_accuracy > self.best_val_accuracy:
                     self.best_val_accuracy = val_accuracy
                     self.best_model_state = {k: v.clone() for k, v in self.model.state_dict().items()}
-                    epochs_without_improvement = 0
+                    self.epochs_without_improvement = 0
                     logger.info(f"Novo melhor modelo! Val Accuracy: {val_accuracy:.4f}")
                 else:
-                    epochs_without_improvement += 1
+                    self.epochs_without_improvement += 1
+
+                stop = self.epochs_without_improvement >= self.early_stopping_patience
+
+            # Checkpoint de fim de época (após early stopping, retoma já concluído)
+            self.save_checkpoint(self.epochs if stop else epoch + 1, 0)
 
-                if epochs_without_improvement >= self.early_stopping_patience:
-                    logger.info(f"Early stopping após {epoch + 1} épocas")
-                    break
+            if stop:
+                logger.info(f"Early stopping após {epoch + 1} épocas")
+                break
 
         # Restaura o melhor modelo
         if self.best_model_state:
@@ -53,6 +53,18 @@ class PresetConfig(BaseModel):
     use_class_weights: bool = True
     seed: int = Field(42, ge=0)
     truncation_side: str = Field("right", pattern="^(left|right)$")
+    num_workers: int = Field(0, ge=0, le=8)
+    effective_batch_size: Optional[int] = Field(None, ge=1, le=4096)
+    precision: str = Field("fp32", pattern="^(fp32|bf16|fp16)$")
+    compile_model: bool = False
+    num_threads: Optional[int] = Field(None, ge=1, le=128)
+    checkpoint_every_steps: int = Field(200, ge=0)
+    # Documentos longos: janelas sobrepostas em vez de truncamento
+    chunking: bool = False
+    chunk_pooling: str = Field("mean", pattern="^(mean|max|attention)$")
+    chunk_overlap: int = Field(128, ge=0, le=512)
+    max_chunks: int = Field(8, ge=1, le=64)
+    train_chunks: int = Field(2, ge=1, le=16)
 
 
 # ==================== Dataset Schemas ====================
@@ -120,6 +132,18 @@ class HyperparametersConfig(BaseModel):
     use_class_weights: bool = True
     seed: int = Field(42, ge=0)
     truncation_side: str = Field("right", pattern="^(left|right)$")
+    num_workers: int = Field(0, ge=0, le=8)
+    effective_batch_size: Optional[int] = Field(None, ge=1, le=4096)
+    precision: str = Field("fp32", pattern="^(fp32|bf16|fp16)$")
+    compile_model: bool = False
+    num_threads: Optional[int] = Field(None, ge=1, le=128)
+    checkpoint_every_steps: int = Field(200, ge=0)
+    # Documentos longos: janelas sobrepostas em vez de truncamento
+    chunking: bool = False
+    chunk_pooling: str = Field("mean", pattern="^(mean|max|attention)$")
+    chunk_overlap: int = Field(128, ge=0, le=512)
+    max_chunks: int = Field(8, ge=1, le=64)
+    train_chunks: int = Field(2, ge=1, le=16)
 
 
 class RunCreate(BaseModel):
@@ -9,8 +9,7 @@ import os
 import subprocess
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
-import pandas as pd
+from typing import Optional, Dict, Any, List, Tuple, TYPE_CHECKING
 import logging
 
 from sqlalchemy.orm import Session
@@ -30,6 +29,10 @@ from sistemas.bert_training.error_translator import (
     translate_error, get_friendly_error_message, get_quality_alert
 )
 
+# PERFORMANCE: pandas (~0.5s de import) é importado dentro das funções que leem Excel
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 # Diretório para armazenar datasets
@@ -70,6 +73,8 @@ def validate_excel_file(
     total_rows = 0
     sample_data = None
 
+    import pandas as pd
+
     try:
         # Tenta ler o Excel
         df = pd.read_excel(file_path, engine="openpyxl")
@@ -183,6 +188,8 @@ def extract_dataset_metadata(
     Returns:
         Dicionário com total_rows, total_labels, label_distribution, sample_preview
     """
+    import pandas as pd
+
     df = pd.read_excel(file_path, engine="openpyxl")
 
     # Remove linhas com valores nulos nas colunas principais
@@ -807,7 +814,7 @@ def calculate_progress_with_estimate(
 # ==================== Validacoes Proativas ====================
 
 def analyze_dataset_quality(
-    df: pd.DataFrame,
+    df: "pd.DataFrame",
     text_column: str,
     label_column: str
 ) -> Dict[str, Any]:
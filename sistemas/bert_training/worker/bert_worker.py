@@ -351,11 +351,29 @@ class BertWorker:
             from sistemas.bert_training.ml.dataset import prepare_data_from_dataframe
             from sistemas.bert_training.ml.training import Trainer, split_dataset
             from sistemas.bert_training.ml.evaluation import Evaluator
+            from sistemas.bert_training.ml.chunking import ChunkingConfig
 
             device = 'cuda' if torch.cuda.is_available() else 'cpu'
 
             # Prepara dados
             task_type = job['task_type']
+
+            # Documentos longos: janelas sobrepostas em vez de truncamento
+            chunking = None
+            if config.get('chunking') and task_type == 'text_classification':
+                chunking = ChunkingConfig(
+                    max_length=config.get('max_length', 512),
+                    overlap=config.get('chunk_overlap', 128),
+                    max_chunks=config.get('max_chunks', 8),
+                    train_chunks=config.get('train_chunks', 2),
+                    pooling=config.get('chunk_pooling', 'mean')
+                )
+                self.send_log(
+                    run_id, 'INFO',
+                    f"Modo por janelas: até {chunking.max_chunks} janelas de {chunking.max_length} tokens "
+                    f"por texto ({chunking.train_chunks} sorteadas no treino), agregação {chunking.pooling}"
+                )
+
             full_dataset, label_to_id, id_to_label = prepare_data_from_dataframe(
                 df=df,
                 text_column=job['text_column'],
@@ -363,7 +381,9 @@ class BertWorker:
                 tokenizer_name=job['base_model'],
                 max_length=config.get('max_length', 512),
                 truncation_side=config.get('truncation_side', 'right'),
-                task_type=task_type
+                task_type=task_type,
+                cache_dir=self.models_dir / "token_cache",
+                chunking=chunking
             )
 
             # Split determinístico
@@ -379,8 +399,11 @@ class BertWorker:
             # Cria modelo
             model = BertClassifier(
                 model_name=job['base_model'],
-                num_labels=len(label_to_id)
+                num_labels=len(label_to_id),
+                chunk_pooling=chunking.pooling if chunking else None
             )
+            if chunking:
+                model.chunking = chunking.to_dict()
 
             # Callback de progresso
             total_epochs = config.get('epochs', 10)
@@ -410,6 +433,16 @@ class BertWorker:
                     epoch=epoch
                 )
 
+            # Checkpoints por run: se o worker cair, o watchdog recoloca o run
+            # na fila e o próximo claim retoma daqui
+            checkpoint_dir = self.models_dir / "checkpoints" / f"run_{run_id}"
+            checkpoint_fingerprint = hashlib.sha256(
+                json.dumps(
+                    {'dataset': job['dataset_sha256'], 'base_model': job['base_model'], 'config': config},
+                    sort_keys=True, default=str
+                ).encode()
+            ).hexdigest()
+
             # Treina
             trainer = Trainer(
                 model=model,
@@ -424,9 +457,26 @@ class BertWorker:
                 use_class_weights=config.get('use_class_weights', True),
                 gradient_accumulation_steps=config.get('gradient_accumulation_steps', 1),
                 early_stopping_patience=config.get('early_stopping_patience', 3),
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                num_workers=config.get('num_workers', 0),
+                seed=seed,
+                effective_batch_size=config.get('effective_batch_size'),
+                precision=config.get('precision', 'fp32'),
+                compile_model=config.get('compile_model', False),
+                num_threads=config.get('num_threads'),
+                checkpoint_dir=checkpoint_dir,
+                checkpoint_every_steps=config.get('checkpoint_every_steps', 200),
+                checkpoint_fingerprint=checkpoint_fingerprint
             )
 
+            if trainer.resumed_from:
+                resumed = trainer.resumed_from
+                self.send_log(
+                    run_id, 'INFO',
+                    f"Treino retomado do checkpoint: época {resumed['epoch'] + 1}, "
+                    f"batch {resumed['batch']}, step {resumed['step']}"
+                )
+
             history = trainer.train()
 
             # Atualiza para evaluating
@@ -438,7 +488,9 @@ class BertWorker:
                 model=model,
                 dataset=val_dataset,
                 id_to_label=id_to_label,
-                device=device
+                device=device,
+                batch_size=config.get('batch_size', 16),
+                num_workers=config.get('num_workers', 0)
             )
             metrics = evaluator.evaluate()
 
@@ -447,6 +499,7 @@ class BertWorker:
             fingerprint = model.save(model_path, id_to_label, job['base_model'])
 
             self.send_log(run_id, 'INFO', f'Modelo salvo em: {model_path}')
+            trainer.clear_checkpoint()
             self.send_log(run_id, 'INFO', f'Model fingerprint: {fingerprint}')
 
             # Envia métricas finais
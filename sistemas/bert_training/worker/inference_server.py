@@ -68,22 +68,34 @@ def load_model(model_path: Path) -> Optional[Dict[str, Any]]:
             logger.warning("weights_only=True não suportado nesta versão do torch. Use com cautela.")
             checkpoint = torch.load(checkpoint_path, map_location=device)
 
-        # Carrega tokenizer
-        base_model = checkpoint.get("base_model", "neuralmind/bert-base-portuguese-cased")
+        # Carrega tokenizer (BertClassifier.save grava model_name/label_map)
+        base_model = (
+            checkpoint.get("base_model")
+            or checkpoint.get("model_name")
+            or "neuralmind/bert-base-portuguese-cased"
+        )
         tokenizer = AutoTokenizer.from_pretrained(base_model)
 
         # Recria o modelo
         from sistemas.bert_training.ml.classifier import BertClassifier
+        from sistemas.bert_training.ml.chunking import ChunkingConfig
 
-        id_to_label = checkpoint["id_to_label"]
+        id_to_label = checkpoint.get("id_to_label") or checkpoint["label_map"]
         num_labels = len(id_to_label)
+        chunk_pooling = checkpoint.get("config", {}).get("chunk_pooling")
 
-        model = BertClassifier(base_model, num_labels)
+        model = BertClassifier(base_model, num_labels, chunk_pooling=chunk_pooling)
         model.load_state_dict(checkpoint["model_state_dict"])
         model.to(device)
         model.eval()
 
-        logger.info(f"Modelo carregado: {model_path.name} ({num_labels} labels)")
+        # Modelos treinados por janelas classificam o texto inteiro por padrão
+        chunking = ChunkingConfig.from_dict(checkpoint.get("chunking"))
+
+        logger.info(
+            f"Modelo carregado: {model_path.name} ({num_labels} labels"
+            f"{', janelas ' + chunking.pooling if chunking else ''})"
+        )
 
         return {
             "model": model,
@@ -91,20 +103,49 @@ def load_model(model_path: Path) -> Optional[Dict[str, Any]]:
             "id_to_label": id_to_label,
             "base_model": base_model,
             "device": device,
-            "num_labels": num_labels
+            "num_labels": num_labels,
+            "chunking": chunking
         }
     except Exception as e:
         logger.error(f"Erro ao carregar modelo {model_path}: {e}")
         return None
 
 
-def predict_text(model_info: Dict[str, Any], text: str, max_length: int = 512) -> Dict[str, Any]:
-    """Faz predicao para um texto."""
+def predict_text(
+    model_info: Dict[str, Any],
+    text: str,
+    max_length: int = 512,
+    chunked: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Faz predicao para um texto.
+
+    Com chunked (padrao: se o modelo foi treinado por janelas), o texto
+    inteiro e dividido em janelas sobrepostas, todas no mesmo forward, e os
+    logits agregados; o custo fica limitado a max_chunks janelas (inicio e fim
+    do documento). Sem chunked, o texto e truncado em max_length tokens.
+    """
     model = model_info["model"]
     tokenizer = model_info["tokenizer"]
     id_to_label = model_info["id_to_label"]
     device = model_info["device"]
 
+    chunking = model_info.get("chunking")
+    if chunked is None:
+        chunked = chunking is not None
+
+    if chunked:
+        from sistemas.bert_training.ml.chunking import ChunkingConfig, predict_chunked
+
+        # Modelo treinado sem janelas: media dos logits (nao precisa de pesos extras)
+        config = chunking or ChunkingConfig(max_length=max_length, pooling="mean")
+        logits, info = predict_chunked(model, tokenizer, [text], config, device=device)
+        probabilities = torch.softmax(logits, dim=-1)
+        predicted_id = torch.argmax(probabilities, dim=-1).item()
+        result = _format_prediction(probabilities[0], predicted_id, id_to_label)
+        result.update(info[0])
+        return result
+
     # Tokeniza
     encoding = tokenizer(
         text,
@@ -125,16 +166,18 @@ def predict_text(model_info: Dict[str, Any], text: str, max_length: int = 512) -
         logits = model(input_ids, attention_mask, token_type_ids)
         probabilities = torch.softmax(logits, dim=-1)
         predicted_id = torch.argmax(probabilities, dim=-1).item()
-        confidence = probabilities[0][predicted_id].item()
 
-    predicted_label = id_to_label.get(predicted_id, str(predicted_id))
+    return _format_prediction(probabilities[0], predicted_id, id_to_label)
+
 
+def _format_prediction(probabilities, predicted_id: int, id_to_label: Dict[int, str]) -> Dict[str, Any]:
+    """Monta a resposta a partir das probabilidades de um texto."""
     return {
-        "predicted_label": predicted_label,
-        "confidence": round(confidence, 4),
+        "predicted_label": id_to_label.get(predicted_id, str(predicted_id)),
+        "confidence": round(probabilities[predicted_id].item(), 4),
         "all_probabilities": {
             id_to_label.get(i, str(i)): round(p.item(), 4)
-            for i, p in enumerate(probabilities[0])
+            for i, p in enumerate(probabilities)
         }
     }
 
@@ -175,8 +218,8 @@ def create_app(models_dir: Path) -> Flask:
                 # Carrega info basica do modelo
                 try:
                     checkpoint = torch.load(model_path / "model.pt", map_location="cpu")
-                    id_to_label = checkpoint.get("id_to_label", {})
-                    base_model = checkpoint.get("base_model", "unknown")
+                    id_to_label = checkpoint.get("id_to_label") or checkpoint.get("label_map", {})
+                    base_model = checkpoint.get("base_model") or checkpoint.get("model_name", "unknown")
 
                     models.append({
                         "name": model_path.name,
@@ -184,7 +227,8 @@ def create_app(models_dir: Path) -> Flask:
                         "path": str(model_path),
                         "num_labels": len(id_to_label),
                         "labels": list(id_to_label.values()),
-                        "base_model": base_model
+                        "base_model": base_model,
+                        "chunking": checkpoint.get("chunking")
                     })
                 except Exception as e:
                     logger.warning(f"Erro ao ler info do modelo {model_path}: {e}")
@@ -209,6 +253,7 @@ def create_app(models_dir: Path) -> Flask:
 
         model_name = data.get("model")
         text = data.get("text")
+        chunked = data.get("chunked")
 
         if not model_name or not text:
             return jsonify({"error": "model e text sao obrigatorios"}), 400
@@ -225,7 +270,7 @@ def create_app(models_dir: Path) -> Flask:
 
         # Faz predicao
         try:
-            result = predict_text(model_info, text)
+            result = predict_text(model_info, text, chunked=chunked)
             return jsonify(result)
         except Exception as e:
             logger.error(f"Erro na predicao: {e}")
@@ -241,6 +286,9 @@ def create_app(models_dir: Path) -> Flask:
             return jsonify({"error": "Arquivo PDF nao enviado"}), 400
 
         model_name = request.form.get("model")
+        chunked = request.form.get("chunked")
+        if chunked is not None:
+            chunked = chunked.lower() in ("1", "true", "sim")
         if not model_name:
             return jsonify({"error": "model e obrigatorio"}), 400
 
@@ -275,7 +323,7 @@ def create_app(models_dir: Path) -> Flask:
 
         # Faz predicao
         try:
-            result = predict_text(model_info, text)
+            result = predict_text(model_info, text, chunked=chunked)
             result["extracted_text_length"] = len(text)
             result["filename"] = file.filename
             return jsonify(result)
@@ -21,6 +21,7 @@ from typing import Optional, List, Dict, Any, AsyncGenerator, Tuple, Set
 from sqlalchemy.orm import Session
 
 from utils.timezone import get_utc_now
+from utils.llm_admission import prioridade_llm, PRIORIDADE_LOTE
 
 from .models import (
     ProjetoClassificacao,
@@ -373,10 +374,13 @@ class ClassificadorService:
         prompt_texto: str
     ) -> ResultadoClassificacaoDTO:
         """Processa um código com controle de concorrência"""
-        async with semaforo:
-            return await self._processar_codigo(
-                execucao, codigo, projeto, prompt_texto
-            )
+        # Cada código roda em task própria (as_completed): a prioridade de lote
+        # vale só para as chamadas LLM desta task
+        with prioridade_llm(PRIORIDADE_LOTE):
+            async with semaforo:
+                return await self._processar_codigo(
+                    execucao, codigo, projeto, prompt_texto
+                )
 
     async def _processar_codigo(
         self,
@@ -20,6 +20,8 @@ import time
 from typing import Optional, Tuple, Dict, Any, List
 from dataclasses import dataclass
 
+from utils.llm_admission import get_admissao_llm
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +33,7 @@ logger = logging.getLogger(__name__)
 class OpenRouterConfig:
     """Configurações do OpenRouter"""
     api_key: str
-    base_url: str = "https://openrouter.ai/api/v1/chat/completions"
+    base_url: str = os.getenv("OPENROUTER_ENDPOINT", "https://openrouter.ai/api/v1/chat/completions")
     timeout: float = 60.0
     retry_delays: List[int] = None
     default_model: str = "google/gemini-2.5-flash-lite"
@@ -158,11 +160,14 @@ class OpenRouterService:
                 async with httpx.AsyncClient(timeout=self.config.timeout) as client:
                     # Serializa body manualmente para garantir UTF-8
                     body_bytes = json.dumps(body, ensure_ascii=False).encode('utf-8')
-                    response = await client.post(
-                        self.config.base_url,
-                        headers=headers,
-                        content=body_bytes
-                    )
+                    # Controle de admissão global: a vaga é devolvida antes do backoff
+                    async with get_admissao_llm().admitir(modelo, tokens_estimados=len(body_bytes) // 4) as permissao:
+                        response = await client.post(
+                            self.config.base_url,
+                            headers=headers,
+                            content=body_bytes
+                        )
+                        permissao.registrar(response.status_code)
 
                     if response.status_code == 429:  # Rate limit
                         if delay is not None:
@@ -8,6 +8,6 @@ operando com dois agentes de IA:
 - Agente 2: Consolida JSONs, sugere peças e conduz chatbot até geração final
 """
 
-from sistemas.cumprimento_beta.router import router
-
-__all__ = ["router"]
+# PERFORMANCE: o router NÃO é reexportado aqui. Importar apenas os models
+# (ex: database.init_db) não deve carregar o router e suas dependências pesadas.
+# Use: from sistemas.cumprimento_beta.router import router
@@ -77,7 +77,20 @@ MAX_DOCS_POR_PROCESSO = 500
 MAX_MENSAGENS_CONTEXTO = 20
 MAX_TOKENS_RESPOSTA = 8192
 
+# Processamento de documentos (escalonador com janela deslizante)
+MAX_CONCORRENCIA_DOCUMENTOS = 20  # Vagas simultâneas de chamadas ao Agente 1
+TAMANHO_LOTE_COMMIT = 10  # Resultados gravados por commit
+INTERVALO_COMMIT_S = 2.0  # Commit do lote parcial após este intervalo
+
+# Contexto do chatbot (services_contexto_chat)
+CHAT_TURNOS_POR_RESUMO = 6  # Mensagens antigas incorporadas ao resumo a cada atualização
+CHAT_TURNOS_RECENTES = 4  # Mensagens mantidas literalmente após o resumo
+CHAT_MEMO_ARGUMENTOS = 8  # Buscas de argumentos memorizadas por sessão
+CHAT_SIMILARIDADE_MEMO = 0.95  # Similaridade mínima entre embeddings para reaproveitar uma busca
+CHAT_TTL_CONTEXTO_S = 1800  # Tempo do contexto da sessão em memória
+
 # Modelos padrão (fallback se não configurado no admin)
 MODELO_PADRAO_AGENTE1 = "gemini-3-flash-preview"
 MODELO_PADRAO_AGENTE2 = "gemini-3-pro-preview"
 MODELO_PADRAO_CHATBOT = "gemini-3-pro-preview"
+MODELO_PADRAO_RESUMO_CHAT = "gemini-3-flash-preview"
@@ -8,6 +8,7 @@ Modelos isolados para não afetar o gerador normal:
 - JSONResumoBeta: JSON gerado pelo Agente 1
 - ConsolidacaoBeta: Resumo consolidado do Agente 2
 - ConversaBeta: Mensagens do chatbot
+- ContextoChatBeta: Contexto persistido do chatbot (prefixo, resumo, memo)
 - PecaGeradaBeta: Peça final gerada
 """
 
@@ -65,6 +66,7 @@ class SessaoCumprimentoBeta(Base):
     documentos = relationship("DocumentoBeta", back_populates="sessao", cascade="all, delete-orphan")
     consolidacao = relationship("ConsolidacaoBeta", back_populates="sessao", uselist=False, cascade="all, delete-orphan")
     conversas = relationship("ConversaBeta", back_populates="sessao", cascade="all, delete-orphan")
+    contexto_chat = relationship("ContextoChatBeta", back_populates="sessao", uselist=False, cascade="all, delete-orphan")
     pecas = relationship("PecaGeradaBeta", back_populates="sessao", cascade="all, delete-orphan")
 
     __table_args__ = (
@@ -241,6 +243,43 @@ class ConversaBeta(Base):
         return f"<ConversaBeta(id={self.id}, role='{self.role}')>"
 
 
+class ContextoChatBeta(Base):
+    """
+    Contexto persistido do chatbot de uma sessão.
+
+    Espelha o ContextoChat em memória (services_contexto_chat) para que
+    outro worker ou um restart retome o prefixo renderizado e o resumo
+    incremental sem reprocessar o histórico inteiro.
+    """
+    __tablename__ = "contextos_chat_beta"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Sessão pai
+    sessao_id = Column(Integer, ForeignKey("sessoes_cumprimento_beta.id"), nullable=False, unique=True, index=True)
+    sessao = relationship("SessaoCumprimentoBeta", back_populates="contexto_chat")
+
+    # Prefixo estático (prompt de sistema + consolidação); NULL = renderizar de novo
+    prefixo = Column(Text, nullable=True)
+    versao_prefixo = Column(String(64), nullable=True)  # Hash do modelo de prompt usado
+
+    # Resumo incremental dos turnos antigos
+    resumo_historico = Column(Text, nullable=True)
+    ultima_mensagem_resumida_id = Column(Integer, default=0)  # Último ConversaBeta.id coberto pelo resumo
+
+    # Buscas de argumentos memorizadas (embedding + argumentos)
+    memo_argumentos = Column(JSON, nullable=True)
+
+    # Incrementada a cada invalidação; workers comparam com a cópia em memória
+    geracao = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Timestamps
+    atualizado_em = Column(DateTime(timezone=True), default=get_utc_now, onupdate=get_utc_now)
+
+    def __repr__(self):
+        return f"<ContextoChatBeta(sessao_id={self.sessao_id})>"
+
+
 class PecaGeradaBeta(Base):
     """
     Peça jurídica gerada pelo beta.
@@ -18,12 +18,14 @@ from typing import Optional, List
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, Query, BackgroundTasks, Request
 from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 
 from database.connection import get_db
 from auth.models import User
 from auth.dependencies import get_current_active_user
 from utils.security_sanitizer import sanitize_html
+from utils.historico import LIMITE_MAXIMO, consultar_historico
 from sistemas.cumprimento_beta.dependencies import require_beta_access, get_user_pode_acessar_beta
 from sistemas.cumprimento_beta.models import (
     SessaoCumprimentoBeta, DocumentoBeta, JSONResumoBeta,
@@ -46,6 +48,7 @@ from sistemas.cumprimento_beta.services_geracao_peca import (
     gerar_peca, obter_peca, listar_pecas_sessao
 )
 from utils.rate_limit import limit_ai_request, limit_default, limit_export
+from utils.llm_admission import prioridade_llm, PRIORIDADE_LOTE
 
 logger = logging.getLogger(__name__)
 
@@ -141,32 +144,50 @@ async def criar_sessao(
 @limit_default
 async def listar_sessoes(
     request: Request,
-    pagina: int = Query(1, ge=1),
-    por_pagina: int = Query(10, ge=1, le=50),
+    por_pagina: int = Query(10, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="proximo_cursor da página anterior"),
     current_user: User = Depends(require_beta_access),
     db: Session = Depends(get_db)
 ):
-    """Lista sessões do usuário atual."""
-    query = db.query(SessaoCumprimentoBeta).filter(
-        SessaoCumprimentoBeta.user_id == current_user.id
-    )
+    """
+    Lista sessões do usuário atual.
 
+    PERFORMANCE: paginação por cursor em (created_at, id) e os indicadores
+    (consolidação, conversas, peças) calculados na mesma query, em vez de
+    três COUNTs por sessão.
+    """
+    S = SessaoCumprimentoBeta
     # Admin pode ver todas
-    if current_user.role == "admin":
-        query = db.query(SessaoCumprimentoBeta)
+    filtros = [] if current_user.role == "admin" else [S.user_id == current_user.id]
 
-    total = query.count()
-    sessoes = query.order_by(
-        SessaoCumprimentoBeta.created_at.desc()
-    ).offset(
-        (pagina - 1) * por_pagina
-    ).limit(por_pagina).all()
+    total = db.query(S.id).filter(*filtros).count()
+
+    pagina = consultar_historico(
+        db, S,
+        colunas=[
+            S.numero_processo, S.numero_processo_formatado, S.status,
+            S.total_documentos, S.documentos_processados, S.documentos_relevantes,
+            S.documentos_irrelevantes, S.documentos_ignorados,
+            S.erro_mensagem, S.updated_at, S.finalizado_em,
+        ],
+        filtros=filtros,
+        extras={
+            "tem_consolidacao": exists().where(ConsolidacaoBeta.sessao_id == S.id),
+            "total_conversas": select(func.count(ConversaBeta.id))
+                .where(ConversaBeta.sessao_id == S.id).scalar_subquery(),
+            "total_pecas": select(func.count(PecaGeradaBeta.id))
+                .where(PecaGeradaBeta.sessao_id == S.id).scalar_subquery(),
+        },
+        coluna_data=S.created_at,
+        limite=por_pagina,
+        cursor=cursor,
+    )
 
     return ListaSessoesResponse(
-        sessoes=[_sessao_para_response(s, db) for s in sessoes],
+        sessoes=[_sessao_para_response(s, db, indicadores) for s, indicadores in pagina.itens],
         total=total,
-        pagina=pagina,
-        por_pagina=por_pagina
+        por_pagina=por_pagina,
+        proximo_cursor=pagina.proximo_cursor,
     )
 
 
@@ -203,19 +224,34 @@ def _obter_sessao_usuario(
     return sessao
 
 
-def _sessao_para_response(sessao: SessaoCumprimentoBeta, db: Session) -> StatusSessaoResponse:
-    """Converte sessão para response"""
-    tem_consolidacao = db.query(ConsolidacaoBeta).filter(
-        ConsolidacaoBeta.sessao_id == sessao.id
-    ).count() > 0
-
-    total_conversas = db.query(ConversaBeta).filter(
-        ConversaBeta.sessao_id == sessao.id
-    ).count()
+def _sessao_para_response(
+    sessao: SessaoCumprimentoBeta,
+    db: Session,
+    indicadores: Optional[dict] = None
+) -> StatusSessaoResponse:
+    """
+    Converte sessão para response.
 
-    total_pecas = db.query(PecaGeradaBeta).filter(
-        PecaGeradaBeta.sessao_id == sessao.id
-    ).count()
+    Args:
+        indicadores: tem_consolidacao/total_conversas/total_pecas já calculados
+            (listagem); se ausente, consulta o banco
+    """
+    if indicadores is not None:
+        tem_consolidacao = bool(indicadores["tem_consolidacao"])
+        total_conversas = indicadores["total_conversas"]
+        total_pecas = indicadores["total_pecas"]
+    else:
+        tem_consolidacao = db.query(ConsolidacaoBeta).filter(
+            ConsolidacaoBeta.sessao_id == sessao.id
+        ).count() > 0
+
+        total_conversas = db.query(ConversaBeta).filter(
+            ConversaBeta.sessao_id == sessao.id
+        ).count()
+
+        total_pecas = db.query(PecaGeradaBeta).filter(
+            PecaGeradaBeta.sessao_id == sessao.id
+        ).count()
 
     return StatusSessaoResponse(
         id=sessao.id,
@@ -288,7 +324,9 @@ async def _processar_agente1_background(sessao_id: int):
         ).first()
 
         if sessao:
-            await processar_agente1(db, sessao)
+            # Processamento em background: cede vez às chamadas interativas
+            with prioridade_llm(PRIORIDADE_LOTE):
+                await processar_agente1(db, sessao)
 
     except Exception as e:
         logger.error(f"[BETA] Erro no processamento background: {e}")
@@ -159,8 +159,8 @@ class ListaSessoesResponse(BaseModel):
     """Lista de sessões do usuário"""
     sessoes: List[StatusSessaoResponse]
     total: int
-    pagina: int
     por_pagina: int
+    proximo_cursor: Optional[str] = None  # Enviar em ?cursor= para a próxima página
 
 
 # ==========================================
@@ -7,11 +7,12 @@ Funcionalidades:
 - Integração com banco vetorial para busca de argumentos
 - Prompt de sistema configurável via admin
 - Streaming de respostas
+- Contexto por sessão em cache (prefixo estável, resumo incremental, memo de argumentos)
 """
 
 import json
 import logging
-from typing import List, Optional, Dict, Any, AsyncGenerator
+from typing import List, Optional, Dict, Any, AsyncGenerator, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 
@@ -21,11 +22,15 @@ from sistemas.cumprimento_beta.models import (
 )
 from sistemas.cumprimento_beta.constants import (
     StatusSessao, RoleChat, ConfigKeys,
-    MODELO_PADRAO_CHATBOT, TIMEOUT_CHATBOT, MAX_MENSAGENS_CONTEXTO
+    MODELO_PADRAO_CHATBOT, TIMEOUT_CHATBOT
 )
 from sistemas.cumprimento_beta.exceptions import CumprimentoBetaError
 from services.gemini_service import gemini_service, chamar_gemini
+from sistemas.cumprimento_beta.services_contexto_chat import (
+    ContextoChat, agendar_resumo, obter_contexto_chat
+)
 from sistemas.gerador_pecas.services_busca_vetorial import buscar_argumentos_vetorial
+from sistemas.gerador_pecas.services_embeddings import generate_embedding_for_query
 
 logger = logging.getLogger(__name__)
 
@@ -132,37 +137,109 @@ class ChatbotService:
 
         return "\n".join(contexto_partes)
 
-    def _montar_historico(self, sessao: SessaoCumprimentoBeta) -> List[Dict[str, str]]:
-        """Monta histórico de mensagens para contexto"""
-        mensagens = self.db.query(ConversaBeta).filter(
-            ConversaBeta.sessao_id == sessao.id
-        ).order_by(
-            ConversaBeta.created_at.desc()
-        ).limit(MAX_MENSAGENS_CONTEXTO).all()
-
-        # Inverte para ordem cronológica
-        mensagens = list(reversed(mensagens))
-
-        return [
-            {"role": m.role, "content": m.conteudo}
-            for m in mensagens
-        ]
+    async def _buscar_argumentos(
+        self,
+        query: str,
+        contexto: Optional[ContextoChat] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Busca argumentos relevantes no banco vetorial.
 
-    async def _buscar_argumentos(self, query: str) -> List[Dict[str, Any]]:
-        """Busca argumentos relevantes no banco vetorial"""
+        PERFORMANCE: com `contexto`, reaproveita buscas anteriores da sessão
+        (mesma mensagem ou embedding muito próximo) e o embedding já gerado.
+        """
         try:
+            if contexto is None:
+                return await buscar_argumentos_vetorial(
+                    db=self.db,
+                    query=query,
+                    tipo_peca="cumprimento",
+                    limit=3,
+                    threshold=0.4
+                )
+
+            memorizados = contexto.buscar_memo_texto(query)
+            if memorizados is not None:
+                return memorizados
+
+            embedding = await generate_embedding_for_query(query)
+            if not embedding:
+                return []
+            memorizados = contexto.buscar_memo(embedding)
+            if memorizados is not None:
+                logger.info(f"[BETA] Argumentos reaproveitados do memo (sessão {contexto.sessao_id})")
+                return memorizados
+
             argumentos = await buscar_argumentos_vetorial(
                 db=self.db,
                 query=query,
                 tipo_peca="cumprimento",
                 limit=3,
-                threshold=0.4
+                threshold=0.4,
+                query_embedding=embedding
             )
+            contexto.memorizar(query, embedding, argumentos)
             return argumentos
         except Exception as e:
             logger.warning(f"[BETA] Erro na busca vetorial: {e}")
             return []
 
+    def _obter_contexto(self, sessao: SessaoCumprimentoBeta) -> ContextoChat:
+        """Contexto da sessão (prefixo renderizado só quando não está em cache)"""
+        return obter_contexto_chat(
+            self.db,
+            sessao.id,
+            self._prompt_sistema,
+            lambda: self._prompt_sistema.format(contexto_processo=self._montar_contexto_processo(sessao))
+        )
+
+    async def _preparar_mensagem(
+        self,
+        sessao: SessaoCumprimentoBeta,
+        mensagem_usuario: str
+    ) -> Tuple[ContextoChat, str, List[Dict[str, Any]]]:
+        """
+        Salva a mensagem do usuário e monta o prompt.
+
+        PERFORMANCE: o system prompt é o prefixo estável da sessão; tudo que
+        varia (resumo, turnos, argumentos, mensagem) vai no prompt do usuário,
+        do mais estável para o mais volátil, para o cache de prefixo do provedor.
+
+        Returns:
+            (contexto, prompt do usuário, argumentos encontrados)
+        """
+        # Carregado antes de salvar: a mensagem atual não entra no histórico
+        contexto = self._obter_contexto(sessao)
+
+        mensagem = self._salvar_mensagem(sessao.id, RoleChat.USER, mensagem_usuario)
+
+        argumentos = await self._buscar_argumentos(mensagem_usuario, contexto)
+        prompt = contexto.montar_prompt(mensagem_usuario, argumentos)
+        contexto.adicionar_turno(mensagem.id, RoleChat.USER, mensagem_usuario)
+
+        return contexto, prompt, argumentos
+
+    def _registrar_resposta(
+        self,
+        contexto: ContextoChat,
+        sessao: SessaoCumprimentoBeta,
+        resposta: str,
+        argumentos: List[Dict[str, Any]]
+    ) -> ConversaBeta:
+        """Salva a resposta, acrescenta o turno e agenda o resumo incremental"""
+        argumentos_ids = [a.get("id") for a in argumentos if a.get("id")]
+        mensagem = self._salvar_mensagem(
+            sessao_id=sessao.id,
+            role=RoleChat.ASSISTANT,
+            conteudo=resposta,
+            modelo=self._modelo,
+            usou_busca=len(argumentos) > 0,
+            argumentos=argumentos_ids if argumentos_ids else None
+        )
+        contexto.adicionar_turno(mensagem.id, RoleChat.ASSISTANT, resposta)
+        agendar_resumo(contexto)
+        return mensagem
+
     def _salvar_mensagem(
         self,
         sessao_id: int,
@@ -203,57 +280,18 @@ class ChatbotService:
         """
         logger.info(f"[BETA] Processando mensagem na sessão {sessao.id}")
 
-        # Salva mensagem do usuário
-        self._salvar_mensagem(sessao.id, RoleChat.USER, mensagem_usuario)
-
-        # Busca argumentos relevantes
-        argumentos = await self._buscar_argumentos(mensagem_usuario)
-        argumentos_ids = [a.get("id") for a in argumentos if a.get("id")]
-
-        # Monta contexto
-        contexto_processo = self._montar_contexto_processo(sessao)
-        historico = self._montar_historico(sessao)
-
-        # Monta prompt completo
-        prompt_sistema = self._prompt_sistema.format(contexto_processo=contexto_processo)
-
-        # Adiciona argumentos encontrados se houver
-        if argumentos:
-            argumentos_texto = "\n\n## Argumentos Jurídicos Relevantes\n\n"
-            for arg in argumentos:
-                argumentos_texto += f"### {arg.get('titulo', 'Argumento')}\n{arg.get('conteudo', '')}\n\n"
-            prompt_sistema += argumentos_texto
-
-        # Monta mensagens para a API
-        mensagens_api = [{"role": "system", "content": prompt_sistema}]
-        mensagens_api.extend(historico)
-        mensagens_api.append({"role": "user", "content": mensagem_usuario})
+        contexto, prompt, argumentos = await self._preparar_mensagem(sessao, mensagem_usuario)
 
         # Chama Gemini
         try:
-            # Monta prompt completo com histórico
-            prompt_completo = mensagem_usuario
-            if historico:
-                historico_texto = "\n".join([
-                    f"{m['role'].upper()}: {m['content']}" for m in historico[-4:]
-                ])
-                prompt_completo = f"Histórico recente:\n{historico_texto}\n\nMensagem atual: {mensagem_usuario}"
-
             resposta = await chamar_gemini(
-                prompt=prompt_completo,
+                prompt=prompt,
                 modelo=self._modelo,
-                system_prompt=prompt_sistema
+                system_prompt=contexto.prefixo
             )
 
             # Salva resposta
-            mensagem_resposta = self._salvar_mensagem(
-                sessao_id=sessao.id,
-                role=RoleChat.ASSISTANT,
-                conteudo=resposta,
-                modelo=self._modelo,
-                usou_busca=len(argumentos) > 0,
-                argumentos=argumentos_ids if argumentos_ids else None
-            )
+            mensagem_resposta = self._registrar_resposta(contexto, sessao, resposta, argumentos)
 
             logger.info(f"[BETA] Resposta gerada ({len(resposta)} chars)")
 
@@ -276,53 +314,21 @@ class ChatbotService:
         """
         logger.info(f"[BETA] Processando mensagem streaming na sessão {sessao.id}")
 
-        # Salva mensagem do usuário
-        self._salvar_mensagem(sessao.id, RoleChat.USER, mensagem_usuario)
-
-        # Busca argumentos
-        argumentos = await self._buscar_argumentos(mensagem_usuario)
-        argumentos_ids = [a.get("id") for a in argumentos if a.get("id")]
-
-        # Monta contexto
-        contexto_processo = self._montar_contexto_processo(sessao)
-        historico = self._montar_historico(sessao)
-
-        prompt_sistema = self._prompt_sistema.format(contexto_processo=contexto_processo)
-
-        if argumentos:
-            argumentos_texto = "\n\n## Argumentos Jurídicos Relevantes\n\n"
-            for arg in argumentos:
-                argumentos_texto += f"### {arg.get('titulo', 'Argumento')}\n{arg.get('conteudo', '')}\n\n"
-            prompt_sistema += argumentos_texto
+        contexto, prompt, argumentos = await self._preparar_mensagem(sessao, mensagem_usuario)
 
         resposta_completa = ""
 
         try:
-            # Monta prompt completo com histórico
-            prompt_completo = mensagem_usuario
-            if historico:
-                historico_texto = "\n".join([
-                    f"{m['role'].upper()}: {m['content']}" for m in historico[-4:]
-                ])
-                prompt_completo = f"Histórico recente:\n{historico_texto}\n\nMensagem atual: {mensagem_usuario}"
-
             async for chunk in gemini_service.generate_stream(
-                prompt=prompt_completo,
+                prompt=prompt,
                 model=self._modelo,
-                system_prompt=prompt_sistema
+                system_prompt=contexto.prefixo
             ):
                 resposta_completa += chunk
                 yield chunk
 
             # Salva resposta completa
-            self._salvar_mensagem(
-                sessao_id=sessao.id,
-                role=RoleChat.ASSISTANT,
-                conteudo=resposta_completa,
-                modelo=self._modelo,
-                usou_busca=len(argumentos) > 0,
-                argumentos=argumentos_ids if argumentos_ids else None
-            )
+            self._registrar_resposta(contexto, sessao, resposta_completa, argumentos)
 
         except Exception as e:
             logger.error(f"[BETA] Erro no streaming: {e}")
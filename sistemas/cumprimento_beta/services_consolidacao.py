@@ -24,6 +24,7 @@ from sistemas.cumprimento_beta.constants import (
 )
 from sistemas.cumprimento_beta.exceptions import ConsolidacaoError
 from services.gemini_service import gemini_service, chamar_gemini
+from sistemas.cumprimento_beta.services_contexto_chat import invalidar_contexto_chat
 
 logger = logging.getLogger(__name__)
 
@@ -214,6 +215,7 @@ class ConsolidacaoService:
             )
 
             self.db.add(consolidacao)
+            invalidar_contexto_chat(self.db, sessao.id)
 
             # Atualiza status da sessão
             sessao.status = StatusSessao.CHATBOT
@@ -321,6 +323,7 @@ class ConsolidacaoService:
             )
 
             self.db.add(consolidacao)
+            invalidar_contexto_chat(self.db, sessao.id)
             sessao.status = StatusSessao.CHATBOT
             self.db.commit()
 
@@ -0,0 +1,334 @@
+# sistemas/cumprimento_beta/services_contexto_chat.py
+"""
+Contexto de conversa por sessão do chatbot beta.
+
+PERFORMANCE: antes, cada mensagem reconsultava a consolidação, recarregava o
+histórico e remontava o prompt inteiro. O ContextoChat mantém por sessão:
+
+- Prefixo estático já renderizado (prompt de sistema + consolidação +
+  sugestões), idêntico byte a byte entre mensagens: o provedor reaproveita
+  o cache de prefixo (cache implícito do Gemini)
+- Resumo incremental dos turnos antigos, atualizado em background a cada
+  CHAT_TURNOS_POR_RESUMO mensagens
+- Turnos recentes apenas acrescentados: entre dois resumos, o prompt de uma
+  mensagem é o prompt anterior + o novo turno
+- Memo da busca de argumentos, indexado pelo embedding da mensagem
+
+Fica em memória (TTLCache) e é persistido em contextos_chat_beta, de modo que
+outro worker ou um restart retoma o prefixo e o resumo sem reprocessar o
+histórico. A consolidação invalida o contexto (invalidar_contexto_chat)
+incrementando contextos_chat_beta.geracao: cada worker confere a geração a
+cada mensagem (uma consulta pela chave única) e recarrega a cópia em memória
+quando ela ficou para trás.
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from database.connection import SessionLocal
+from services.gemini_service import chamar_gemini
+from sistemas.cumprimento_beta.constants import (
+    CHAT_MEMO_ARGUMENTOS,
+    CHAT_SIMILARIDADE_MEMO,
+    CHAT_TTL_CONTEXTO_S,
+    CHAT_TURNOS_POR_RESUMO,
+    CHAT_TURNOS_RECENTES,
+    MAX_MENSAGENS_CONTEXTO,
+    MODELO_PADRAO_RESUMO_CHAT,
+)
+from sistemas.cumprimento_beta.models import ContextoChatBeta, ConversaBeta
+from sistemas.gerador_pecas.services_busca_vetorial import cosine_similarity
+from utils.cache import TTLCache
+from utils.llm_admission import PRIORIDADE_LOTE, prioridade_llm
+
+logger = logging.getLogger(__name__)
+
+# Campos dos argumentos usados no prompt (o restante não é memorizado)
+CAMPOS_ARGUMENTO = ("id", "titulo", "conteudo", "score", "similaridade")
+
+PROMPT_RESUMO_CONVERSA = """Você mantém o resumo de uma conversa entre um procurador da PGE-MS e o assistente jurídico de cumprimento de sentença.
+
+Atualize o resumo anterior incorporando as novas mensagens. Preserve fatos do processo, valores, datas, decisões tomadas, pedidos do procurador e pendências. Escreva em tópicos, no máximo 15 linhas.
+
+Responda apenas com o resumo atualizado."""
+
+_contextos = TTLCache(default_ttl=CHAT_TTL_CONTEXTO_S, max_size=500)
+
+
+def versao_modelo_prompt(modelo_prompt: str) -> str:
+    """Hash do modelo de prompt de sistema (mudança no admin re-renderiza o prefixo)."""
+    return hashlib.sha256(modelo_prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def _hash_mensagem(mensagem: str) -> str:
+    return hashlib.sha256(" ".join(mensagem.lower().split()).encode("utf-8")).hexdigest()[:16]
+
+
+def _renderizar_turno(role: str, conteudo: str) -> str:
+    return f"{role.upper()}: {conteudo}"
+
+
+def formatar_argumentos(argumentos: List[Dict[str, Any]]) -> str:
+    """Bloco de argumentos jurídicos encontrados na busca vetorial."""
+    if not argumentos:
+        return ""
+    texto = "## Argumentos Jurídicos Relevantes\n\n"
+    for arg in argumentos:
+        texto += f"### {arg.get('titulo', 'Argumento')}\n{arg.get('conteudo', '')}\n\n"
+    return texto.strip()
+
+
+@dataclass
+class ContextoChat:
+    """
+    Estado de conversa de uma sessão.
+
+    O prompt é montado do trecho mais estável para o mais volátil:
+    system = prefixo; usuário = resumo + turnos recentes + argumentos + mensagem atual.
+    """
+    sessao_id: int
+    prefixo: str
+    versao_prefixo: str
+    resumo: str = ""
+    ultimo_id_resumido: int = 0
+    turnos: List[Dict[str, Any]] = field(default_factory=list)
+    memo_argumentos: List[Dict[str, Any]] = field(default_factory=list)
+    geracao: int = 0
+    _linhas: List[str] = field(default_factory=list, repr=False)
+    _tarefa_resumo: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def adicionar_turno(self, mensagem_id: int, role: str, conteudo: str) -> None:
+        """Acrescenta um turno (renderizado uma única vez)."""
+        self.turnos.append({"id": mensagem_id, "role": role, "content": conteudo})
+        self._linhas.append(_renderizar_turno(role, conteudo))
+
+    def montar_prompt(self, mensagem: str, argumentos: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Prompt do usuário para a mensagem atual (o system prompt é `prefixo`)."""
+        partes = []
+        if self.resumo:
+            partes.append(f"Resumo da conversa anterior:\n{self.resumo}")
+        if self._linhas:
+            partes.append("Histórico recente:\n" + "\n".join(self._linhas))
+        bloco_argumentos = formatar_argumentos(argumentos or [])
+        if bloco_argumentos:
+            partes.append(bloco_argumentos)
+        partes.append(f"Mensagem atual: {mensagem}")
+        return "\n\n".join(partes)
+
+    # ------------------------------------------------------------------
+    # Resumo incremental
+    # ------------------------------------------------------------------
+
+    @property
+    def resumindo(self) -> bool:
+        return self._tarefa_resumo is not None and not self._tarefa_resumo.done()
+
+    def precisa_resumir(self) -> bool:
+        """Há CHAT_TURNOS_POR_RESUMO turnos além dos CHAT_TURNOS_RECENTES mantidos."""
+        return not self.resumindo and len(self.turnos) >= CHAT_TURNOS_POR_RESUMO + CHAT_TURNOS_RECENTES
+
+    def aplicar_resumo(self, resumo: str, bloco: List[Dict[str, Any]]) -> bool:
+        """Substitui os turnos de `bloco` (os mais antigos) pelo novo resumo."""
+        quantidade = len(bloco)
+        if [t["id"] for t in self.turnos[:quantidade]] != [t["id"] for t in bloco]:
+            # Contexto recarregado enquanto o resumo era gerado
+            return False
+        del self.turnos[:quantidade]
+        del self._linhas[:quantidade]
+        self.resumo = resumo
+        self.ultimo_id_resumido = bloco[-1]["id"]
+        return True
+
+    # ------------------------------------------------------------------
+    # Memo da busca de argumentos
+    # ------------------------------------------------------------------
+
+    def buscar_memo_texto(self, mensagem: str) -> Optional[List[Dict[str, Any]]]:
+        """Mensagem repetida (ignorando caixa e espaços): dispensa até o embedding."""
+        chave = _hash_mensagem(mensagem)
+        for entrada in self.memo_argumentos:
+            if entrada.get("hash") == chave:
+                return entrada["argumentos"]
+        return None
+
+    def buscar_memo(self, embedding: List[float]) -> Optional[List[Dict[str, Any]]]:
+        """Argumentos de uma busca anterior com embedding suficientemente próximo."""
+        for entrada in self.memo_argumentos:
+            if cosine_similarity(embedding, entrada["embedding"]) >= CHAT_SIMILARIDADE_MEMO:
+                return entrada["argumentos"]
+        return None
+
+    def memorizar(self, mensagem: str, embedding: List[float], argumentos: List[Dict[str, Any]]) -> None:
+        self.memo_argumentos.append({
+            "hash": _hash_mensagem(mensagem),
+            "embedding": [round(float(v), 5) for v in embedding],
+            "argumentos": [{k: a.get(k) for k in CAMPOS_ARGUMENTO} for a in argumentos],
+        })
+        del self.memo_argumentos[:-CHAT_MEMO_ARGUMENTOS]
+
+
+# ============================================
+# CARGA, PERSISTÊNCIA E INVALIDAÇÃO
+# ============================================
+
+def obter_contexto_chat(
+    db: Session,
+    sessao_id: int,
+    modelo_prompt: str,
+    renderizar_prefixo: Callable[[], str]
+) -> ContextoChat:
+    """
+    Contexto da sessão: memória, depois contextos_chat_beta, por último montado do zero.
+
+    A cópia em memória só é usada se a geração persistida não mudou (outro
+    worker pode ter invalidado o contexto). `renderizar_prefixo` só é chamado
+    quando não há prefixo válido persistido.
+    """
+    contexto = _contextos.get("chat", sessao_id)
+    if contexto is not None:
+        geracao = db.query(ContextoChatBeta.geracao).filter(
+            ContextoChatBeta.sessao_id == sessao_id
+        ).scalar()
+        if geracao == contexto.geracao:
+            return contexto
+        logger.info(f"[BETA] Contexto do chat invalidado por outro worker (sessão {sessao_id})")
+
+    contexto = _carregar_contexto(db, sessao_id, modelo_prompt, renderizar_prefixo)
+    _contextos.set("chat", sessao_id, value=contexto)
+    return contexto
+
+
+def _carregar_contexto(
+    db: Session,
+    sessao_id: int,
+    modelo_prompt: str,
+    renderizar_prefixo: Callable[[], str]
+) -> ContextoChat:
+    versao = versao_modelo_prompt(modelo_prompt)
+    registro = db.query(ContextoChatBeta).filter(ContextoChatBeta.sessao_id == sessao_id).first()
+
+    prefixo_valido = registro is not None and registro.prefixo and registro.versao_prefixo == versao
+    contexto = ContextoChat(
+        sessao_id=sessao_id,
+        prefixo=registro.prefixo if prefixo_valido else renderizar_prefixo(),
+        versao_prefixo=versao,
+        resumo=(registro.resumo_historico or "") if registro else "",
+        ultimo_id_resumido=(registro.ultima_mensagem_resumida_id or 0) if registro else 0,
+        memo_argumentos=list(registro.memo_argumentos or []) if registro else [],
+        geracao=(registro.geracao or 0) if registro else 0,
+    )
+
+    # Apenas os turnos ainda não cobertos pelo resumo
+    mensagens = db.query(ConversaBeta).filter(
+        ConversaBeta.sessao_id == sessao_id,
+        ConversaBeta.id > contexto.ultimo_id_resumido
+    ).order_by(
+        ConversaBeta.id.desc()
+    ).limit(MAX_MENSAGENS_CONTEXTO).all()
+    for mensagem in reversed(mensagens):
+        contexto.adicionar_turno(mensagem.id, mensagem.role, mensagem.conteudo)
+
+    if not prefixo_valido:
+        persistir_contexto(db, contexto, registro)
+
+    logger.info(
+        f"[BETA] Contexto do chat carregado (sessão {sessao_id}, "
+        f"prefixo {'persistido' if prefixo_valido else 'renderizado'}, {len(contexto.turnos)} turnos)"
+    )
+    return contexto
+
+
+def persistir_contexto(
+    db: Session,
+    contexto: ContextoChat,
+    registro: Optional[ContextoChatBeta] = None
+) -> None:
+    """
+    Grava o contexto em contextos_chat_beta (upsert).
+
+    Se o registro já está em outra geração (invalidado depois que o contexto
+    foi carregado), o prefixo antigo não é regravado.
+    """
+    try:
+        if registro is None:
+            registro = db.query(ContextoChatBeta).filter(
+                ContextoChatBeta.sessao_id == contexto.sessao_id
+            ).first()
+        if registro is None:
+            registro = ContextoChatBeta(sessao_id=contexto.sessao_id)
+            db.add(registro)
+
+        if (registro.geracao or 0) == contexto.geracao:
+            registro.prefixo = contexto.prefixo
+            registro.versao_prefixo = contexto.versao_prefixo
+        registro.resumo_historico = contexto.resumo or None
+        registro.ultima_mensagem_resumida_id = contexto.ultimo_id_resumido
+        registro.memo_argumentos = list(contexto.memo_argumentos)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[BETA] Erro ao persistir contexto do chat (sessão {contexto.sessao_id}): {e}")
+
+
+def invalidar_contexto_chat(db: Session, sessao_id: int) -> None:
+    """
+    Descarta o prefixo da sessão (nova consolidação) em todos os workers.
+
+    Incrementa a geração do registro: os outros workers percebem na próxima
+    mensagem e recarregam. O resumo e o memo continuam válidos; o commit
+    fica com o chamador.
+    """
+    _contextos.invalidate("chat", sessao_id)
+    db.query(ContextoChatBeta).filter(
+        ContextoChatBeta.sessao_id == sessao_id
+    ).update(
+        {ContextoChatBeta.prefixo: None, ContextoChatBeta.geracao: ContextoChatBeta.geracao + 1},
+        synchronize_session=False
+    )
+
+
+# ============================================
+# RESUMO EM BACKGROUND
+# ============================================
+
+def agendar_resumo(contexto: ContextoChat) -> Optional[asyncio.Task]:
+    """Dispara a atualização do resumo se houver turnos suficientes (não bloqueia a resposta)."""
+    if not contexto.precisa_resumir():
+        return None
+    bloco = list(contexto.turnos[:CHAT_TURNOS_POR_RESUMO])
+    contexto._tarefa_resumo = asyncio.create_task(_atualizar_resumo(contexto, bloco))
+    return contexto._tarefa_resumo
+
+
+async def _atualizar_resumo(contexto: ContextoChat, bloco: List[Dict[str, Any]]) -> None:
+    novas = "\n".join(_renderizar_turno(t["role"], t["content"]) for t in bloco)
+    prompt = f"Resumo anterior:\n{contexto.resumo or '(vazio)'}\n\nNovas mensagens:\n{novas}"
+
+    try:
+        with prioridade_llm(PRIORIDADE_LOTE):
+            resumo = await chamar_gemini(
+                prompt=prompt,
+                system_prompt=PROMPT_RESUMO_CONVERSA,
+                modelo=MODELO_PADRAO_RESUMO_CHAT,
+                temperature=0.1
+            )
+    except Exception as e:
+        logger.warning(f"[BETA] Erro ao resumir conversa (sessão {contexto.sessao_id}): {e}")
+        return
+
+    if not resumo or not resumo.strip() or not contexto.aplicar_resumo(resumo.strip(), bloco):
+        return
+
+    db = SessionLocal()
+    try:
+        persistir_contexto(db, contexto)
+    finally:
+        db.close()
+    logger.info(f"[BETA] Resumo do chat atualizado (sessão {contexto.sessao_id}, até mensagem {contexto.ultimo_id_resumido})")
@@ -0,0 +1,188 @@
+# sistemas/cumprimento_beta/services_escalonador.py
+"""
+Escalonador de documentos com janela deslizante para o módulo beta.
+
+Substitui o processamento em "ondas" (fatias de N documentos com
+asyncio.gather + commit por fatia): um pool fixo de workers consome uma
+fila e cada vaga é reocupada assim que um documento termina, de modo que
+um documento lento não trava as demais vagas.
+
+- Ordenação da fila: menor primeiro (SJF, padrão), maior primeiro (LPT) ou original
+- Timeout por documento
+- CommitEmLote: agrupa os commits dos resultados (por quantidade ou tempo)
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Ordenação da fila
+ORDEM_MENOR_PRIMEIRO = "menor_primeiro"  # SJF: menor tempo médio de conclusão
+ORDEM_MAIOR_PRIMEIRO = "maior_primeiro"  # LPT: menor makespan quando há documentos muito grandes
+ORDEM_ORIGINAL = "original"
+
+# Estimativa usada quando só o número de páginas é conhecido
+BYTES_POR_PAGINA_ESTIMADO = 3000
+
+
+def custo_documento(documento: Any) -> int:
+    """
+    Custo estimado de um documento (em bytes de texto) para ordenar a fila.
+
+    Usa tamanho_bytes; na falta dele, o tamanho do texto extraído; por
+    último, o número de páginas.
+    """
+    tamanho = getattr(documento, "tamanho_bytes", 0) or 0
+    if not tamanho:
+        texto = getattr(documento, "conteudo_texto", None)
+        tamanho = len(texto) if isinstance(texto, str) else 0
+    if not tamanho:
+        tamanho = (getattr(documento, "paginas", 0) or 0) * BYTES_POR_PAGINA_ESTIMADO
+    return tamanho
+
+
+def motivo_falha(exc: BaseException) -> str:
+    """Descrição curta de uma falha de processamento (timeout sem mensagem incluso)."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return "Tempo limite excedido"
+    return str(exc) or type(exc).__name__
+
+
+class EscalonadorDocumentos:
+    """
+    Pool de workers com janela deslizante sobre uma fila de documentos.
+
+    Uso:
+        escalonador = EscalonadorDocumentos(max_concorrentes=20, timeout_documento_s=120)
+        resultados = await escalonador.executar(
+            documentos,
+            processar=service.processar_documento,
+            ao_concluir=on_resultado,      # (indice, documento, resultado), na ordem de término
+            ao_falhar=resultado_de_erro,   # (documento, exceção) -> resultado substituto
+        )
+    """
+
+    def __init__(
+        self,
+        max_concorrentes: int = 20,
+        timeout_documento_s: Optional[float] = None,
+        ordenacao: str = ORDEM_MENOR_PRIMEIRO,
+        custo: Callable[[Any], float] = custo_documento
+    ):
+        if ordenacao not in (ORDEM_MENOR_PRIMEIRO, ORDEM_MAIOR_PRIMEIRO, ORDEM_ORIGINAL):
+            raise ValueError(f"Ordenação inválida: {ordenacao}")
+        self.max_concorrentes = max(1, int(max_concorrentes))
+        self.timeout_documento_s = timeout_documento_s
+        self.ordenacao = ordenacao
+        self._custo = custo
+
+    def ordenar(self, itens: Sequence[Any]) -> List[Tuple[int, Any]]:
+        """Pares (índice original, item) na ordem em que entram na fila."""
+        pares = list(enumerate(itens))
+        if self.ordenacao == ORDEM_ORIGINAL:
+            return pares
+        # sorted é estável: empates mantêm a ordem original
+        return sorted(
+            pares,
+            key=lambda par: self._custo(par[1]),
+            reverse=self.ordenacao == ORDEM_MAIOR_PRIMEIRO
+        )
+
+    async def executar(
+        self,
+        itens: Sequence[Any],
+        processar: Callable[[Any], Awaitable[Any]],
+        ao_concluir: Optional[Callable[[int, Any, Any], Any]] = None,
+        ao_falhar: Optional[Callable[[Any, BaseException], Any]] = None
+    ) -> List[Any]:
+        """
+        Processa todos os itens e retorna os resultados na ordem original.
+
+        Sem `ao_falhar`, a primeira exceção (ou timeout) cancela os demais
+        workers e é propagada.
+        """
+        if not itens:
+            return []
+
+        fila: asyncio.Queue = asyncio.Queue()
+        for par in self.ordenar(itens):
+            fila.put_nowait(par)
+
+        resultados: List[Any] = [None] * len(itens)
+
+        async def worker():
+            while True:
+                try:
+                    indice, item = fila.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    if self.timeout_documento_s:
+                        resultado = await asyncio.wait_for(processar(item), self.timeout_documento_s)
+                    else:
+                        resultado = await processar(item)
+                except Exception as exc:
+                    if ao_falhar is None:
+                        raise
+                    logger.warning(f"[BETA] Falha no documento {getattr(item, 'id', indice)}: {motivo_falha(exc)}")
+                    resultado = ao_falhar(item, exc)
+
+                resultados[indice] = resultado
+                if ao_concluir:
+                    retorno = ao_concluir(indice, item, resultado)
+                    if inspect.isawaitable(retorno):
+                        await retorno
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.max_concorrentes, len(itens)))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for tarefa in workers:
+                tarefa.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+        return resultados
+
+
+class CommitEmLote:
+    """
+    Agrupa commits de resultados: grava a cada `tamanho_lote` alterações
+    ou quando `intervalo_s` segundos se passaram desde o último commit.
+    """
+
+    def __init__(self, db: Session, tamanho_lote: int = 10, intervalo_s: float = 2.0):
+        self.db = db
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.intervalo_s = intervalo_s
+        self.commits = 0
+        self._pendentes = 0
+        self._ultimo_commit = time.monotonic()
+
+    def registrar(self, quantidade: int = 1) -> bool:
+        """Registra alterações pendentes; retorna True se gravou o lote."""
+        self._pendentes += quantidade
+        if (
+            self._pendentes >= self.tamanho_lote
+            or time.monotonic() - self._ultimo_commit >= self.intervalo_s
+        ):
+            self.gravar()
+            return True
+        return False
+
+    def gravar(self) -> None:
+        """Grava as alterações pendentes (no-op se não houver)."""
+        if not self._pendentes:
+            return
+        self.db.commit()
+        self.commits += 1
+        self._pendentes = 0
+        self._ultimo_commit = time.monotonic()
@@ -3,7 +3,8 @@
 Serviço unificado de processamento de documentos para o módulo beta.
 
 OTIMIZAÇÃO: Combina avaliação de relevância + extração de JSON em UMA ÚNICA chamada.
-Também paraleliza o processamento de múltiplos documentos usando asyncio.gather().
+Também paraleliza o processamento de múltiplos documentos com janela deslizante
+(services_escalonador) e grava os resultados em lotes.
 
 Autor: LAB/PGE-MS
 """
@@ -12,7 +13,7 @@ import asyncio
 import json
 import logging
 import time
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Callable, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
@@ -21,7 +22,11 @@ from admin.models import ConfiguracaoIA
 from sistemas.cumprimento_beta.models import SessaoCumprimentoBeta, DocumentoBeta, JSONResumoBeta
 from sistemas.cumprimento_beta.constants import (
     StatusSessao, StatusRelevancia, ConfigKeys, CATEGORIA_CUMPRIMENTO_SENTENCA,
-    MODELO_PADRAO_AGENTE1
+    MODELO_PADRAO_AGENTE1, MAX_CONCORRENCIA_DOCUMENTOS, TIMEOUT_EXTRACAO_JSON,
+    TAMANHO_LOTE_COMMIT, INTERVALO_COMMIT_S
+)
+from sistemas.cumprimento_beta.services_escalonador import (
+    CommitEmLote, EscalonadorDocumentos, motivo_falha
 )
 from sistemas.gerador_pecas.extrator_resumo_json import obter_criterios_relevancia
 from sistemas.gerador_pecas.models_resumo_json import CategoriaResumoJSON
@@ -101,6 +106,86 @@ class ResultadoProcessamento:
     tempo_ms: int = 0
 
 
+class GravadorResultadosBeta:
+    """
+    Aplica os resultados em DocumentoBeta/JSONResumoBeta assim que chegam.
+
+    PERFORMANCE: os updates são gravados em lote (um commit a cada
+    TAMANHO_LOTE_COMMIT resultados ou INTERVALO_COMMIT_S segundos), em vez de
+    commits vazios por onda e todos os resultados aplicados só no fim.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        sessao: SessaoCumprimentoBeta,
+        documentos: List[DocumentoBeta],
+        modelo: str,
+        categoria: Optional[CategoriaResumoJSON] = None,
+        tamanho_lote: int = TAMANHO_LOTE_COMMIT,
+        intervalo_s: float = INTERVALO_COMMIT_S
+    ):
+        self.db = db
+        self.sessao = sessao
+        self._modelo = modelo
+        self._categoria = categoria
+        self._doc_map = {d.id: d for d in documentos}
+        self._lote = CommitEmLote(db, tamanho_lote=tamanho_lote, intervalo_s=intervalo_s)
+        self.relevantes = 0
+        self.irrelevantes = 0
+        self.erros = 0
+        self.jsons_criados = 0
+
+    @property
+    def commits(self) -> int:
+        return self._lote.commits
+
+    def adicionar(self, resultado: ResultadoProcessamento) -> None:
+        """Aplica um resultado ao documento e grava o lote quando cheio."""
+        doc = self._doc_map.get(resultado.documento_id)
+        if not doc:
+            return
+
+        doc.modelo_avaliacao = self._modelo
+        doc.avaliado_em = datetime.utcnow()
+
+        if resultado.erro:
+            self.erros += 1
+            doc.status_relevancia = StatusRelevancia.IRRELEVANTE
+            doc.motivo_irrelevancia = resultado.motivo
+
+        elif resultado.relevante:
+            doc.status_relevancia = StatusRelevancia.RELEVANTE
+            self.relevantes += 1
+            self.sessao.documentos_relevantes = (self.sessao.documentos_relevantes or 0) + 1
+
+            # Cria JSON se tiver dados extraídos
+            if resultado.dados_extraidos:
+                json_resumo = JSONResumoBeta(
+                    documento_id=doc.id,
+                    json_conteudo=resultado.dados_extraidos,
+                    categoria_id=self._categoria.id if self._categoria else None,
+                    categoria_nome=self._categoria.nome if self._categoria else "padrao",
+                    modelo_usado=self._modelo,
+                    tempo_processamento_ms=resultado.tempo_ms,
+                    json_valido=True
+                )
+                self.db.add(json_resumo)
+                self.jsons_criados += 1
+
+        else:
+            doc.status_relevancia = StatusRelevancia.IRRELEVANTE
+            doc.motivo_irrelevancia = resultado.motivo
+            self.irrelevantes += 1
+            self.sessao.documentos_irrelevantes = (self.sessao.documentos_irrelevantes or 0) + 1
+
+        self._lote.registrar()
+
+    def gravar(self) -> None:
+        """Grava o lote parcial pendente."""
+        self._lote.gravar()
+
+
 class ProcessamentoUnificadoService:
     """
     Serviço unificado que avalia relevância e extrai JSON em uma única chamada.
@@ -116,7 +201,8 @@ class ProcessamentoUnificadoService:
         self._modelo = self._carregar_modelo()
         self._criterios = self._carregar_criterios()
         self._categoria = self._carregar_categoria()
-        self._max_concurrent = 20  # Máximo de chamadas paralelas
+        self._max_concurrent = MAX_CONCORRENCIA_DOCUMENTOS  # Máximo de chamadas paralelas
+        self._timeout_documento = TIMEOUT_EXTRACAO_JSON
 
     def _carregar_modelo(self) -> str:
         """Carrega modelo configurado para o Agente 1"""
@@ -277,17 +363,26 @@ class ProcessamentoUnificadoService:
     async def processar_documentos_paralelo(
         self,
         documentos: List[DocumentoBeta],
-        on_progress: Optional[callable] = None
+        on_progress: Optional[callable] = None,
+        on_resultado: Optional[Callable[[ResultadoProcessamento], None]] = None
     ) -> List[ResultadoProcessamento]:
         """
-        Processa múltiplos documentos em paralelo.
+        Processa múltiplos documentos em paralelo com janela deslizante.
+
+        PERFORMANCE: antes os documentos eram processados em ondas de
+        _max_concurrent (gather da onda inteira + commit), e um documento
+        lento segurava todas as vagas da sua onda. Agora um pool fixo de
+        workers consome a fila (menor documento primeiro) e cada vaga é
+        reocupada assim que um documento termina.
 
         Args:
             documentos: Lista de documentos a processar
             on_progress: Callback para progresso
+            on_resultado: Chamado com cada resultado assim que fica pronto
+                          (ex.: GravadorResultadosBeta.adicionar)
 
         Returns:
-            Lista de ResultadoProcessamento
+            Lista de ResultadoProcessamento (na ordem de `documentos`)
         """
         if not documentos:
             return []
@@ -295,44 +390,43 @@ class ProcessamentoUnificadoService:
         total = len(documentos)
         logger.info(f"[BETA] Processando {total} documentos em paralelo (max {self._max_concurrent} simultâneos)")
 
-        resultados = []
         processados = 0
 
-        # Processa em batches para controlar concorrência
-        for i in range(0, total, self._max_concurrent):
-            batch = documentos[i:i + self._max_concurrent]
-
-            # Executa batch em paralelo
-            tasks = [self.processar_documento(doc) for doc in batch]
-            batch_resultados = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Processa resultados do batch
-            for idx, resultado in enumerate(batch_resultados):
-                if isinstance(resultado, Exception):
-                    # Converte exceção em ResultadoProcessamento com erro
-                    doc = batch[idx]
-                    resultado = ResultadoProcessamento(
-                        documento_id=doc.id,
-                        relevante=False,
-                        motivo=f"Erro: {str(resultado)}",
-                        erro=str(resultado)
-                    )
-
-                resultados.append(resultado)
-                processados += 1
-
-                if on_progress:
-                    await on_progress(
-                        etapa="processando_documentos",
-                        atual=processados,
-                        total=total,
-                        mensagem=f"Processando documento {processados}/{total}"
-                    )
-
-            # Commit parcial a cada batch
-            self.db.commit()
-
-        return resultados
+        def _resultado_de_falha(doc: DocumentoBeta, exc: BaseException) -> ResultadoProcessamento:
+            # Converte exceção/timeout em ResultadoProcessamento com erro
+            motivo = motivo_falha(exc)
+            return ResultadoProcessamento(
+                documento_id=doc.id,
+                relevante=False,
+                motivo=f"Erro: {motivo}",
+                erro=motivo
+            )
+
+        async def _concluido(indice: int, doc: DocumentoBeta, resultado: ResultadoProcessamento):
+            nonlocal processados
+            processados += 1
+
+            if on_resultado:
+                on_resultado(resultado)
+
+            if on_progress:
+                await on_progress(
+                    etapa="processando_documentos",
+                    atual=processados,
+                    total=total,
+                    mensagem=f"Processando documento {processados}/{total}"
+                )
+
+        escalonador = EscalonadorDocumentos(
+            max_concorrentes=self._max_concurrent,
+            timeout_documento_s=self._timeout_documento
+        )
+        return await escalonador.executar(
+            documentos,
+            self.processar_documento,
+            ao_concluir=_concluido,
+            ao_falhar=_resultado_de_falha
+        )
 
     async def processar_sessao(
         self,
@@ -370,55 +464,20 @@ class ProcessamentoUnificadoService:
         sessao.status = StatusSessao.AVALIANDO_RELEVANCIA
         self.db.commit()
 
-        # Processa em paralelo
-        resultados = await self.processar_documentos_paralelo(documentos, on_progress)
-
-        # Aplica resultados aos documentos
-        relevantes = 0
-        irrelevantes = 0
-        erros = 0
-        jsons_criados = 0
-
-        doc_map = {d.id: d for d in documentos}
-
-        for resultado in resultados:
-            doc = doc_map.get(resultado.documento_id)
-            if not doc:
-                continue
-
-            doc.modelo_avaliacao = self._modelo
-            doc.avaliado_em = datetime.utcnow()
-
-            if resultado.erro:
-                erros += 1
-                doc.status_relevancia = StatusRelevancia.IRRELEVANTE
-                doc.motivo_irrelevancia = resultado.motivo
-                continue
-
-            if resultado.relevante:
-                doc.status_relevancia = StatusRelevancia.RELEVANTE
-                relevantes += 1
-                sessao.documentos_relevantes = (sessao.documentos_relevantes or 0) + 1
-
-                # Cria JSON se tiver dados extraídos
-                if resultado.dados_extraidos:
-                    json_resumo = JSONResumoBeta(
-                        documento_id=doc.id,
-                        json_conteudo=resultado.dados_extraidos,
-                        categoria_id=self._categoria.id if self._categoria else None,
-                        categoria_nome=self._categoria.nome if self._categoria else "padrao",
-                        modelo_usado=self._modelo,
-                        tempo_processamento_ms=resultado.tempo_ms,
-                        json_valido=True
-                    )
-                    self.db.add(json_resumo)
-                    jsons_criados += 1
-
-            else:
-                doc.status_relevancia = StatusRelevancia.IRRELEVANTE
-                doc.motivo_irrelevancia = resultado.motivo
-                irrelevantes += 1
-                sessao.documentos_irrelevantes = (sessao.documentos_irrelevantes or 0) + 1
+        # Processa em paralelo; resultados aplicados e gravados em lote conforme chegam
+        gravador = GravadorResultadosBeta(
+            self.db,
+            sessao,
+            documentos,
+            modelo=self._modelo,
+            categoria=self._categoria
+        )
+        await self.processar_documentos_paralelo(documentos, on_progress, on_resultado=gravador.adicionar)
+
+        relevantes = gravador.relevantes
+        irrelevantes = gravador.irrelevantes
+        erros = gravador.erros
+        jsons_criados = gravador.jsons_criados
 
         # Commit final
         self.db.commit()
@@ -16,9 +16,13 @@ from admin.models import ConfiguracaoIA
 from sistemas.cumprimento_beta.models import SessaoCumprimentoBeta, DocumentoBeta
 from sistemas.cumprimento_beta.constants import (
     StatusSessao, StatusRelevancia, ConfigKeys,
-    MODELO_PADRAO_AGENTE1, TIMEOUT_AVALIACAO_RELEVANCIA
+    MODELO_PADRAO_AGENTE1, TIMEOUT_AVALIACAO_RELEVANCIA,
+    MAX_CONCORRENCIA_DOCUMENTOS, TAMANHO_LOTE_COMMIT, INTERVALO_COMMIT_S
 )
 from sistemas.cumprimento_beta.exceptions import PromptNaoEncontradoError, GeminiError
+from sistemas.cumprimento_beta.services_escalonador import (
+    CommitEmLote, EscalonadorDocumentos, motivo_falha
+)
 from sistemas.gerador_pecas.extrator_resumo_json import obter_criterios_relevancia
 from sistemas.gerador_pecas.gemini_client import chamar_gemini_async
 
@@ -59,6 +63,7 @@ class RelevanciaService:
         self.db = db
         self._modelo = self._carregar_modelo()
         self._criterios = self._carregar_criterios_relevancia()
+        self._max_concurrent = MAX_CONCORRENCIA_DOCUMENTOS
 
     def _carregar_modelo(self) -> str:
         """Carrega modelo configurado para o Agente 1"""
@@ -194,19 +199,16 @@ class RelevanciaService:
 
         relevantes = 0
         irrelevantes = 0
+        avaliados = 0
+        total = len(documentos)
 
-        for idx, doc in enumerate(documentos):
-            # Callback de progresso
-            if on_progress:
-                await on_progress(
-                    etapa="avaliando_relevancia",
-                    atual=idx + 1,
-                    total=len(documentos),
-                    mensagem=f"Avaliando documento {idx + 1}/{len(documentos)}"
-                )
+        # PERFORMANCE: avaliações em paralelo com janela deslizante (cada vaga
+        # é reocupada assim que um documento termina) e commits em lote
+        lote = CommitEmLote(self.db, tamanho_lote=TAMANHO_LOTE_COMMIT, intervalo_s=INTERVALO_COMMIT_S)
 
-            # Avalia documento
-            eh_relevante, motivo = await self.avaliar_documento(doc)
+        async def _concluido(indice: int, doc: DocumentoBeta, resultado: Tuple[bool, str]):
+            nonlocal relevantes, irrelevantes, avaliados
+            eh_relevante, motivo = resultado
 
             # Atualiza documento
             if eh_relevante:
@@ -220,10 +222,28 @@ class RelevanciaService:
                 sessao.documentos_irrelevantes += 1
 
             doc.avaliado_em = datetime.utcnow()
+            lote.registrar()
+
+            # Callback de progresso
+            avaliados += 1
+            if on_progress:
+                await on_progress(
+                    etapa="avaliando_relevancia",
+                    atual=avaliados,
+                    total=total,
+                    mensagem=f"Avaliando documento {avaliados}/{total}"
+                )
 
-            # Commit parcial a cada 5 documentos
-            if (idx + 1) % 5 == 0:
-                self.db.commit()
+        escalonador = EscalonadorDocumentos(
+            max_concorrentes=self._max_concurrent,
+            timeout_documento_s=TIMEOUT_AVALIACAO_RELEVANCIA
+        )
+        await escalonador.executar(
+            documentos,
+            self.avaliar_documento,
+            ao_concluir=_concluido,
+            ao_falhar=lambda doc, exc: (False, f"Erro na avaliação: {motivo_falha(exc)}")
+        )
 
         # Commit final
         self.db.commit()
@@ -55,9 +55,11 @@
       });
       return this.handleResponse(response);
     }
-    async listSessions(pagina = 1, porPagina = 10) {
+    async listSessions(porPagina = 10, cursor) {
+      const params = new URLSearchParams({ por_pagina: String(porPagina) });
+      if (cursor) params.set("cursor", cursor);
       const response = await fetch(
-        `${API_BASE}/sessoes?pagina=${pagina}&por_pagina=${porPagina}`,
+        `${API_BASE}/sessoes?${params}`,
         { headers: this.getHeaders() }
       );
       return this.handleResponse(response);
@@ -15,20 +15,21 @@ Autor: LAB/PGE-MS
 import os
 import re
 import sys
+import time
 import base64
 import asyncio
 import aiohttp
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import json
 from pathlib import Path
 
 # PDF
 import fitz  # PyMuPDF
 fitz.TOOLS.mupdf_warnings(False)  # Suprime warnings de imagens JPEG2000 corrompidas
-import pymupdf4llm
+# PERFORMANCE: pymupdf4llm (~1s de import) é importado sob demanda em extrair_conteudo_pdf
 
 # IMPORTANTE: PyMuPDF/MuPDF NÃO é thread-safe!
 # Usar lock centralizado para TODAS as operações com fitz/pymupdf4llm
@@ -519,21 +520,24 @@ async def baixar_documentos_async(
         return await resp.text()
 
 
-async def baixar_documentos_paralelo(
+async def baixar_documentos_stream(
     session: aiohttp.ClientSession,
     numero_processo: str,
     lista_ids: List[str],
     batch_size: int = 5,
     max_paralelo: int = 4,
     timeout: int = 180
-) -> Dict[str, str]:
+) -> AsyncIterator[Tuple[str, Optional[str]]]:
     """
-    Baixa documentos em paralelo com fallback individual.
+    Baixa documentos em batches paralelos e entrega cada um assim que seu batch chega.
 
-    Estrategia:
-    1. Divide IDs em batches
-    2. Baixa batches em paralelo (limitado por max_paralelo)
-    3. Se um batch falhar, tenta baixar IDs individuais desse batch
+    PERFORMANCE: Não há barreira esperando todos os batches. O consumidor
+    começa a extrair/resumir com o primeiro batch. O batch segura o semáforo
+    até entregar seus documentos à fila, que é limitada. Assim, com um
+    consumidor lento, no máximo `max_paralelo` batches ficam em memória (em
+    vez do processo inteiro).
+
+    Se um batch falhar, os IDs dele são baixados individualmente na sequência.
 
     Args:
         session: Sessao aiohttp
@@ -543,91 +547,104 @@ async def baixar_documentos_paralelo(
         max_paralelo: Maximo de downloads paralelos (default: 4)
         timeout: Timeout em segundos
 
-    Returns:
-        Dict mapeando ID do documento para conteudo base64
+    Yields:
+        (id_documento, conteudo_base64), exatamente uma vez por ID;
+        conteudo None se o download falhou
     """
     if not lista_ids:
-        return {}
-
-    conteudo_map: Dict[str, str] = {}
+        return
 
-    # Divide em batches
     batches = [lista_ids[i:i + batch_size] for i in range(0, len(lista_ids), batch_size)]
-    total_batches = len(batches)
+    print(f"      Baixando {len(lista_ids)} documentos em {len(batches)} batches (paralelo={max_paralelo})")
 
-    print(f"      Baixando {len(lista_ids)} documentos em {total_batches} batches (paralelo={max_paralelo})")
-
-    # Semaforo para limitar paralelismo
     semaphore = asyncio.Semaphore(max_paralelo)
-    batches_com_falha: List[List[str]] = []
+    fila: asyncio.Queue = asyncio.Queue(maxsize=batch_size * max_paralelo)
+
+    async def baixar_individual(doc_id: str) -> Optional[str]:
+        """Baixa um documento individual"""
+        try:
+            xml = await baixar_documentos_async(session, numero_processo, [doc_id], timeout)
+            for doc in extrair_documentos_xml(xml):
+                if doc.id == doc_id and doc.conteudo_base64:
+                    return doc.conteudo_base64
+        except Exception as e:
+            print(f"      [ERRO] Documento {doc_id}: {e}")
+        return None
 
-    async def baixar_batch(batch_ids: List[str], batch_num: int) -> Dict[str, str]:
-        """Baixa um batch de documentos"""
+    async def baixar_batch(batch_ids: List[str], batch_num: int) -> None:
+        """Baixa um batch e entrega seus documentos na fila"""
         async with semaphore:
             try:
                 xml_conteudo = await baixar_documentos_async(
                     session, numero_processo, batch_ids, timeout
                 )
-                docs_baixados = extrair_documentos_xml(xml_conteudo)
-
-                resultado = {}
-                for doc in docs_baixados:
-                    if doc.conteudo_base64:
-                        resultado[doc.id] = doc.conteudo_base64
-
-                return resultado
-
+                conteudos = {
+                    doc.id: doc.conteudo_base64
+                    for doc in extrair_documentos_xml(xml_conteudo)
+                    if doc.conteudo_base64
+                }
+                del xml_conteudo
             except Exception as e:
                 print(f"      [WARN] Batch {batch_num} falhou: {e}")
-                # Marca batch para retry individual
-                batches_com_falha.append(batch_ids)
-                return {}
-
-    # Fase 1: Download paralelo de batches
-    tasks = [baixar_batch(batch, i + 1) for i, batch in enumerate(batches)]
-    resultados = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Consolida resultados
-    for resultado in resultados:
-        if isinstance(resultado, dict):
-            conteudo_map.update(resultado)
-
-    # Fase 2: Fallback individual para batches que falharam
-    if batches_com_falha:
-        ids_fallback = [id for batch in batches_com_falha for id in batch]
-        print(f"      [FALLBACK] Baixando {len(ids_fallback)} documentos individualmente...")
-
-        async def baixar_individual(doc_id: str) -> tuple:
-            """Baixa um documento individual"""
-            async with semaphore:
-                try:
-                    xml = await baixar_documentos_async(
-                        session, numero_processo, [doc_id], timeout
-                    )
-                    docs = extrair_documentos_xml(xml)
-                    for doc in docs:
-                        if doc.id == doc_id and doc.conteudo_base64:
-                            return (doc_id, doc.conteudo_base64)
-                    return (doc_id, None)
-                except Exception as e:
-                    print(f"      [ERRO] Documento {doc_id}: {e}")
-                    return (doc_id, None)
+                print(f"      [FALLBACK] Baixando {len(batch_ids)} documentos individualmente...")
+                resultados = await asyncio.gather(*(baixar_individual(doc_id) for doc_id in batch_ids))
+                conteudos = dict(zip(batch_ids, resultados))
 
-        fallback_tasks = [baixar_individual(doc_id) for doc_id in ids_fallback]
-        fallback_results = await asyncio.gather(*fallback_tasks, return_exceptions=True)
+            for doc_id in batch_ids:
+                await fila.put((doc_id, conteudos.pop(doc_id, None)))
 
-        for result in fallback_results:
-            if isinstance(result, tuple) and result[1]:
-                conteudo_map[result[0]] = result[1]
+    tarefas = [asyncio.create_task(baixar_batch(batch, i + 1)) for i, batch in enumerate(batches)]
+    baixados = 0
+    try:
+        for _ in range(len(lista_ids)):
+            doc_id, conteudo = await fila.get()
+            if conteudo:
+                baixados += 1
+            yield doc_id, conteudo
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
 
     # Estatisticas
-    baixados = len(conteudo_map)
     falharam = len(lista_ids) - baixados
     if falharam > 0:
         print(f"      [OK] {baixados} baixados, {falharam} falharam")
     else:
         print(f"      [OK] Todos {baixados} documentos baixados")
 
+
+async def baixar_documentos_paralelo(
+    session: aiohttp.ClientSession,
+    numero_processo: str,
+    lista_ids: List[str],
+    batch_size: int = 5,
+    max_paralelo: int = 4,
+    timeout: int = 180
+) -> Dict[str, str]:
+    """
+    Baixa documentos em paralelo com fallback individual.
+
+    Acumula a saída de `baixar_documentos_stream`. Prefira o stream quando o
+    consumidor puder processar cada documento à medida que chega.
+
+    Args:
+        session: Sessao aiohttp
+        numero_processo: Numero CNJ do processo
+        lista_ids: Lista de IDs de documentos para baixar
+        batch_size: Tamanho de cada batch (default: 5)
+        max_paralelo: Maximo de downloads paralelos (default: 4)
+        timeout: Timeout em segundos
+
+    Returns:
+        Dict mapeando ID do documento para conteudo base64
+    """
+    conteudo_map: Dict[str, str] = {}
+    async for doc_id, conteudo in baixar_documentos_stream(
+        session, numero_processo, lista_ids, batch_size, max_paralelo, timeout
+    ):
+        if conteudo:
+            conteudo_map[doc_id] = conteudo
     return conteudo_map
 
 
@@ -979,6 +996,8 @@ def extrair_conteudo_pdf(pdf_bytes: bytes, max_paginas_imagem: int = 10) -> Cont
                 if len(texto_completo.strip()) > 200:
                     # Usa pymupdf4llm para extração otimizada
                     try:
+                        import pymupdf4llm
+
                         # Suprime avisos do pymupdf4llm (find_tables exceptions)
                         import io
                         old_stderr = sys.stderr
@@ -1037,6 +1056,7 @@ def extrair_texto_pdf(pdf_bytes: bytes) -> str:
 # Funções Gemini/LLM (usando serviço centralizado)
 # =========================
 from services.gemini_service import gemini_service
+from utils.llm_admission import PRIORIDADE_DOCUMENTO, prioridade_corrente, prioridade_llm
 
 
 async def chamar_llm_async(
@@ -1046,7 +1066,8 @@ async def chamar_llm_async(
     modelo: str = MODELO_PADRAO,
     max_tokens: int = 12000,  # Aumentado para suportar schemas JSON com muitos campos
     temperature: float = 0.3,
-    thinking_level: str = "low"  # Baixo para extração JSON (reduz latência ~80%)
+    thinking_level: str = "low",  # Baixo para extração JSON (reduz latência ~80%)
+    response_schema: Dict[str, Any] = None
 ) -> str:
     """Chama modelo Gemini diretamente (async)"""
     response = await gemini_service.generate_with_session(
@@ -1056,7 +1077,8 @@ async def chamar_llm_async(
         model=modelo,
         max_tokens=max_tokens,
         temperature=temperature,
-        thinking_level=thinking_level
+        thinking_level=thinking_level,
+        response_schema=response_schema
     )
     
     if not response.success:
@@ -1073,7 +1095,8 @@ async def chamar_llm_com_imagens_async(
     modelo: str = MODELO_PADRAO,
     max_tokens: int = 12000,  # Aumentado para suportar schemas JSON com muitos campos
     temperature: float = 0.3,
-    thinking_level: str = "low"  # Baixo para extração JSON (reduz latência ~80%)
+    thinking_level: str = "low",  # Baixo para extração JSON (reduz latência ~80%)
+    response_schema: Dict[str, Any] = None
 ) -> str:
     """Chama modelo Gemini com imagens (async) - para PDFs digitalizados"""
     response = await gemini_service.generate_with_images_session(
@@ -1084,7 +1107,8 @@ async def chamar_llm_com_imagens_async(
         model=modelo,
         max_tokens=max_tokens,
         temperature=temperature,
-        thinking_level=thinking_level
+        thinking_level=thinking_level,
+        response_schema=response_schema
     )
     
     if not response.success:
@@ -1093,6 +1117,52 @@ async def chamar_llm_com_imagens_async(
     return response.content
 
 
+async def chamar_llm_json_stream_async(
+    prompt: str,
+    response_schema: Dict[str, Any],
+    json_schema: Dict[str, Any] = None,
+    modelo: str = MODELO_PADRAO,
+    max_tokens: int = 12000,
+    temperature: float = 0.3,
+    thinking_level: str = "low"
+):
+    """
+    Chama o Gemini em streaming com saída estruturada (responseSchema).
+
+    PERFORMANCE: o JSON é parseado à medida que chega; documento marcado como
+    irrelevante encerra o stream logo após o campo "motivo", sem esperar o
+    restante da geração.
+
+    Returns:
+        Tupla (resposta_bruta, ParserJSONIncremental)
+    """
+    from sistemas.gerador_pecas.schema_resumo_json import ParserJSONIncremental
+
+    parser = ParserJSONIncremental(json_schema)
+    # Resumo de documento não é interativo (generate_stream assume interativo)
+    with prioridade_llm(prioridade_corrente(PRIORIDADE_DOCUMENTO)):
+        stream = gemini_service.generate_stream(
+            prompt=prompt,
+            model=modelo,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            thinking_level=thinking_level,
+            response_schema=response_schema
+        )
+        try:
+            async for chunk in stream:
+                parser.feed(chunk)
+                if parser.pode_encerrar:
+                    break
+        finally:
+            await stream.aclose()
+
+    if not parser.texto:
+        raise ValueError("Resposta vazia do Gemini (stream)")
+
+    return parser.texto, parser
+
+
 # =========================
 # Agente Principal
 # =========================
@@ -1534,73 +1604,21 @@ RESUMOS DOS DOCUMENTOS PARA ANÁLISE:
 
                 resultado.documentos = docs_agrupados
 
-                # 3. Baixar conteúdo dos documentos (incluindo todos os IDs agrupados)
-                # Coletar todos os IDs que precisamos baixar
-                ids_baixar = []
-                for doc in docs_agrupados:
-                    if doc.ids_agrupados:
-                        ids_baixar.extend(doc.ids_agrupados)
-                    else:
-                        ids_baixar.append(doc.id)
-
-                print(f"[3/4] Baixando {len(ids_baixar)} arquivos...")
-
-                # Baixa em paralelo com fallback individual para falhas
-                conteudo_map = await baixar_documentos_paralelo(
-                    session=session,
-                    numero_processo=numero_processo,
-                    lista_ids=ids_baixar,
-                    batch_size=5,
-                    max_paralelo=4,  # 4 batches simultaneos
-                    timeout=180
-                )
-
-                # Associar conteúdos aos documentos (juntando se agrupados)
-                for doc in resultado.documentos:
-                    if doc.ids_agrupados:
-                        # Documento agrupado - juntar conteúdos
-                        conteudos = []
-                        for id_parte in doc.ids_agrupados:
-                            if id_parte in conteudo_map:
-                                conteudos.append(conteudo_map[id_parte])
-                        doc.conteudo_base64 = conteudos if conteudos else None
-                    else:
-                        # Documento único
-                        doc.conteudo_base64 = conteudo_map.get(doc.id)
-
                 # Marcar documentos com o número do processo
                 for doc in resultado.documentos:
                     doc.numero_processo = numero_processo
 
                 # Preparar gerenciador JSON para fontes especiais (ex: Petição Inicial)
+                # (usa apenas metadados, pode rodar antes dos downloads)
                 if self._deve_usar_json():
                     gerenciador = self._obter_gerenciador_json()
                     if gerenciador:
                         gerenciador.preparar_lote(resultado.documentos)
 
-                # 4. Processar documentos em PARALELO com controle de concorrência
-                print(f"[4/4] Processando documentos em paralelo com IA (max {self.max_workers} simultâneos)...")
-
-                # Criar semáforo para limitar concorrência
-                semaphore = asyncio.Semaphore(self.max_workers)
-                
-                async def processar_com_semaforo(doc):
-                    """Wrapper que aplica o semáforo para controlar concorrência"""
-                    async with semaphore:
-                        await self._processar_documento_async(session, doc)
-
-                # Criar tasks para processamento paralelo
-                tasks = []
-                for doc in resultado.documentos:
-                    if doc.conteudo_base64:
-                        task = processar_com_semaforo(doc)
-                        tasks.append(task)
-                    else:
-                        doc.erro = "Documento sem conteúdo disponível"
-
-                # Executar todos em paralelo (limitado pelo semáforo)
-                if tasks:
-                    await asyncio.gather(*tasks, return_exceptions=True)
+                # 3+4. Baixar e processar em PIPELINE: cada documento vai para
+                # extração/resumo assim que seu batch de download chega
+                print(f"[3/4] Baixando documentos e [4/4] processando com IA em pipeline (max {self.max_workers} simultâneos)...")
+                await self._baixar_e_processar_pipeline(session, numero_processo, resultado.documentos)
 
                 # Contar sucessos
                 docs_ok = resultado.documentos_com_resumo()
@@ -1633,6 +1651,89 @@ RESUMOS DOS DOCUMENTOS PARA ANÁLISE:
 
         return resultado
 
+    async def _baixar_e_processar_pipeline(
+        self,
+        session: aiohttp.ClientSession,
+        numero_processo: str,
+        documentos: List[DocumentoTJMS]
+    ) -> None:
+        """
+        Baixa e processa documentos em pipeline (download -> extração -> resumo).
+
+        PERFORMANCE: Antes, todos os downloads terminavam antes do primeiro
+        resumo começar, e o base64 de todos os documentos ficava em memória
+        até o fim. Agora:
+        - Cada documento entra numa fila limitada assim que seu batch chega
+          e `max_workers` workers extraem/resumem em paralelo aos downloads
+        - Documentos agrupados (ids_agrupados) passam por um join: só entram
+          na fila quando todas as partes chegaram (ou falharam)
+        - O base64 é descartado logo após a extração do texto
+        """
+        # Cada ID baixado aponta para o documento (agrupado ou único) que o contém
+        doc_por_id: Dict[str, DocumentoTJMS] = {}
+        ids_baixar: List[str] = []
+        for doc in documentos:
+            for id_parte in (doc.ids_agrupados or [doc.id]):
+                doc_por_id[id_parte] = doc
+                ids_baixar.append(id_parte)
+
+        print(f"      Pipeline: {len(ids_baixar)} arquivos para {len(documentos)} documentos")
+
+        fila: asyncio.Queue = asyncio.Queue(maxsize=self.max_workers * 2)
+        partes_recebidas: Dict[str, Dict[str, Optional[str]]] = {}
+        inicio = time.perf_counter()
+        primeiro_resumo: List[float] = []
+
+        async def worker():
+            while True:
+                doc = await fila.get()
+                if doc is None:
+                    return
+                try:
+                    await self._processar_documento_async(session, doc)
+                except Exception as e:
+                    doc.erro = f"Erro no processamento: {type(e).__name__}: {str(e) or 'sem detalhes'}"
+                finally:
+                    doc.conteudo_base64 = None
+                if doc.resumo and not primeiro_resumo:
+                    primeiro_resumo.append(time.perf_counter() - inicio)
+                    print(f"      [PIPELINE] Primeiro resumo em {primeiro_resumo[0]:.1f}s")
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_workers)]
+        try:
+            async for id_parte, conteudo in baixar_documentos_stream(
+                session=session,
+                numero_processo=numero_processo,
+                lista_ids=ids_baixar,
+                batch_size=5,
+                max_paralelo=4,  # 4 batches simultaneos
+                timeout=180
+            ):
+                doc = doc_por_id[id_parte]
+
+                if doc.ids_agrupados:
+                    # JOIN: aguarda todas as partes do documento agrupado
+                    recebidas = partes_recebidas.setdefault(doc.id, {})
+                    recebidas[id_parte] = conteudo
+                    if len(recebidas) < len(doc.ids_agrupados):
+                        continue
+                    del partes_recebidas[doc.id]
+                    conteudos = [recebidas[i] for i in doc.ids_agrupados if recebidas.get(i)]
+                    doc.conteudo_base64 = conteudos if conteudos else None
+                else:
+                    doc.conteudo_base64 = conteudo
+
+                if doc.conteudo_base64:
+                    await fila.put(doc)
+                else:
+                    doc.erro = "Documento sem conteúdo disponível"
+        finally:
+            for _ in workers:
+                await fila.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        print(f"      [PIPELINE] Download + resumos em {time.perf_counter() - inicio:.1f}s")
+
     async def _buscar_processo_origem(
         self,
         session: aiohttp.ClientSession,
@@ -1672,55 +1773,14 @@ RESUMOS DOS DOCUMENTOS PARA ANÁLISE:
             if not docs_origem:
                 return
 
-            # 3. Baixar conteúdo em paralelo (incluindo todos os IDs agrupados)
-            ids_baixar = []
-            for doc in docs_origem:
-                if doc.ids_agrupados:
-                    ids_baixar.extend(doc.ids_agrupados)
-                else:
-                    ids_baixar.append(doc.id)
-
-            conteudo_map = await baixar_documentos_paralelo(
-                session=session,
-                numero_processo=numero_processo_origem,
-                lista_ids=ids_baixar,
-                batch_size=5,
-                max_paralelo=4,
-                timeout=180
-            )
-
-            # Associar conteúdos (juntando se agrupados)
-            for doc in docs_origem:
-                if doc.ids_agrupados:
-                    conteudos = [conteudo_map[id_p] for id_p in doc.ids_agrupados if id_p in conteudo_map]
-                    doc.conteudo_base64 = conteudos if conteudos else None
-                else:
-                    doc.conteudo_base64 = conteudo_map.get(doc.id)
-
-            # 4. Marcar como documentos de origem
+            # 3. Marcar como documentos de origem
             for doc in docs_origem:
                 doc.processo_origem = True
                 doc.numero_processo = numero_processo_origem
 
-            # 5. Processar em paralelo com controle de concorrência
+            # 4. Baixar e processar em pipeline com controle de concorrência
             print(f"      Processando {len(docs_origem)} documentos do 1º grau (max {self.max_workers} simultâneos)...")
-            
-            # Criar semáforo para limitar concorrência
-            semaphore = asyncio.Semaphore(self.max_workers)
-            
-            async def processar_com_semaforo(doc):
-                """Wrapper que aplica o semáforo para controlar concorrência"""
-                async with semaphore:
-                    await self._processar_documento_async(session, doc)
-            
-            tasks = []
-            for doc in docs_origem:
-                if doc.conteudo_base64:
-                    task = processar_com_semaforo(doc)
-                    tasks.append(task)
-
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+            await self._baixar_e_processar_pipeline(session, numero_processo_origem, docs_origem)
 
             # 6. Verificar duplicatas antes de adicionar
             docs_para_adicionar = []
@@ -1796,6 +1856,87 @@ RESUMOS DOS DOCUMENTOS PARA ANÁLISE:
         from sistemas.gerador_pecas.extrator_resumo_json import gerar_prompt_extracao_json_imagem
         return gerar_prompt_extracao_json_imagem(formato, db=self.db_session)
 
+    def _obter_schemas_resumo(self, doc: DocumentoTJMS) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Obtém os schemas compilados da categoria do documento.
+
+        Returns:
+            Tupla (responseSchema do Gemini, JSON Schema para validação) ou (None, None)
+        """
+        gerenciador = self._obter_gerenciador_json()
+        if not gerenciador:
+            return None, None
+
+        codigo = int(doc.tipo_documento) if doc.tipo_documento else 0
+        formato = gerenciador.obter_formato(codigo, doc_id=doc.id)
+
+        from sistemas.gerador_pecas.schema_resumo_json import json_schema_resumo, schema_resposta_gemini
+        return schema_resposta_gemini(formato), json_schema_resumo(formato)
+
+    async def _gerar_resumo_llm(
+        self,
+        session: aiohttp.ClientSession,
+        doc: DocumentoTJMS,
+        prompt: str,
+        usar_json: bool,
+        imagens: Optional[List[str]] = None
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Chama o LLM para resumir o documento.
+
+        Com prompt JSON e schema compilado para a categoria, usa saída estruturada:
+        texto em streaming com parse incremental (encerra cedo se irrelevante),
+        imagens em chamada única com o mesmo schema.
+
+        Returns:
+            Tupla (resposta, json_dict). json_dict é None quando a resposta deve
+            seguir o parse tradicional (sem schema ou JSON fora do formato).
+        """
+        schema_gemini, json_schema = self._obter_schemas_resumo(doc) if usar_json else (None, None)
+
+        if not schema_gemini:
+            if imagens is not None:
+                resposta = await chamar_llm_com_imagens_async(
+                    session,
+                    prompt=prompt,
+                    imagens_base64=imagens,
+                    modelo=self.modelo
+                )
+            else:
+                resposta = await chamar_llm_async(session, prompt=prompt, modelo=self.modelo)
+            return resposta, None
+
+        from sistemas.gerador_pecas.schema_resumo_json import ParserJSONIncremental
+
+        if imagens is not None:
+            resposta = await chamar_llm_com_imagens_async(
+                session,
+                prompt=prompt,
+                imagens_base64=imagens,
+                modelo=self.modelo,
+                response_schema=schema_gemini
+            )
+            parser = ParserJSONIncremental(json_schema)
+            parser.feed(resposta)
+        else:
+            resposta, parser = await chamar_llm_json_stream_async(
+                prompt,
+                schema_gemini,
+                json_schema,
+                modelo=self.modelo
+            )
+
+        if parser.truncado:
+            # generate_stream encerra sem exceção em erro HTTP/transporte: um JSON
+            # cortado nunca deve passar pelo reparo e virar resumo válido
+            raise ValueError("Resposta JSON truncada (stream interrompido ou limite de tokens)")
+
+        json_dict, erro = parser.finalizar()
+        if erro:
+            print(f"[JSON_SCHEMA] ⚠️ {erro} para doc '{doc.descricao or doc.id}' - usando parse com reparo")
+            return resposta, None
+        return resposta, json_dict
+
     def _gerar_prompt_correcao_json(self, resposta_invalida: str, prompt_original: str) -> str:
         """
         Gera um prompt para corrigir uma resposta JSON inválida.
@@ -1823,7 +1964,13 @@ REGRAS IMPORTANTES:
 
 {prompt_original}"""
 
-    def _processar_resposta_resumo(self, doc: DocumentoTJMS, resposta: str, usar_json: bool = None) -> bool:
+    def _processar_resposta_resumo(
+        self,
+        doc: DocumentoTJMS,
+        resposta: str,
+        usar_json: bool = None,
+        json_dict: Optional[Dict[str, Any]] = None
+    ) -> bool:
         """
         Processa a resposta da IA e atualiza o documento.
         Suporta tanto formato MD quanto JSON.
@@ -1833,6 +1980,7 @@ REGRAS IMPORTANTES:
             resposta: Resposta da IA
             usar_json: Se True, processa como JSON. Se None, usa _deve_usar_json().
                        IMPORTANTE: Deve ser True somente se o prompt enviado foi JSON.
+            json_dict: JSON já parseado pela saída estruturada (dispensa o parse com reparo)
 
         Returns:
             bool: True se JSON foi parseado com sucesso, False se falhou (quando usando JSON)
@@ -1851,7 +1999,10 @@ REGRAS IMPORTANTES:
                 normalizar_json_com_schema
             )
 
-            json_dict, erro = parsear_resposta_json(resposta)
+            if json_dict is not None:
+                erro = None
+            else:
+                json_dict, erro = parsear_resposta_json(resposta)
 
             if erro:
                 # Log detalhado para diagnóstico
@@ -1956,6 +2107,10 @@ REGRAS IMPORTANTES:
                     except:
                         continue
 
+                # PERFORMANCE: libera o base64 assim que o texto/imagens foram extraídos
+                total_partes = len(doc.conteudo_base64)
+                doc.conteudo_base64 = None
+
                 if tem_texto:
                     # Juntar todos os textos
                     texto_completo = "\n\n".join(textos)
@@ -1994,14 +2149,14 @@ REGRAS IMPORTANTES:
                     else:
                         prompt = self.prompt_resumo.format(texto_documento=texto)
 
-                    resposta = await chamar_llm_async(
-                        session,
-                        prompt=prompt,
-                        modelo=self.modelo
+                    resposta, json_dict = await self._gerar_resumo_llm(
+                        session, doc, prompt, usar_json=bool(prompt_json)
                     )
 
                     # Passa flag indicando se prompt era JSON (corrige bug de inconsistência)
-                    sucesso = self._processar_resposta_resumo(doc, resposta, usar_json=bool(prompt_json))
+                    sucesso = self._processar_resposta_resumo(
+                        doc, resposta, usar_json=bool(prompt_json), json_dict=json_dict
+                    )
 
                     # CACHE: Salva resumo no cache se for JSON válido
                     if sucesso and prompt_json and hasattr(doc, 'resumo_json') and doc.resumo_json:
@@ -2027,7 +2182,7 @@ REGRAS IMPORTANTES:
 
                 elif todas_imagens:
                     # PDFs digitalizados - enviar imagens
-                    doc.texto_extraido = f"[{len(doc.conteudo_base64)} PDFs digitalizados - analisados via visão]"
+                    doc.texto_extraido = f"[{total_partes} PDFs digitalizados - analisados via visão]"
 
                     # Limitar número de imagens
                     imagens = todas_imagens[:15]
@@ -2036,15 +2191,14 @@ REGRAS IMPORTANTES:
                     prompt_json = self._obter_prompt_json_imagem(doc)
                     prompt_imagem = prompt_json if prompt_json else self._get_prompt_imagem()
 
-                    resposta = await chamar_llm_com_imagens_async(
-                        session,
-                        prompt=prompt_imagem,
-                        imagens_base64=imagens,
-                        modelo=self.modelo
+                    resposta, json_dict = await self._gerar_resumo_llm(
+                        session, doc, prompt_imagem, usar_json=bool(prompt_json), imagens=imagens
                     )
 
                     # Passa flag indicando se prompt era JSON
-                    sucesso = self._processar_resposta_resumo(doc, resposta, usar_json=bool(prompt_json))
+                    sucesso = self._processar_resposta_resumo(
+                        doc, resposta, usar_json=bool(prompt_json), json_dict=json_dict
+                    )
 
                     # RETRY: Se JSON falhou em imagem, tenta novamente
                     if not sucesso and prompt_json:
@@ -2070,6 +2224,10 @@ REGRAS IMPORTANTES:
                 # Executa extração em thread separada para não bloquear event loop
                 conteudo_pdf = await asyncio.to_thread(extrair_conteudo_pdf, pdf_bytes)
 
+                # PERFORMANCE: libera o base64/bytes assim que o conteúdo foi extraído
+                doc.conteudo_base64 = None
+                del pdf_bytes
+
                 if conteudo_pdf.tipo == 'texto':
                     doc.texto_extraido = conteudo_pdf.conteudo
 
@@ -2105,14 +2263,14 @@ REGRAS IMPORTANTES:
                     else:
                         prompt = self.prompt_resumo.format(texto_documento=texto)
 
-                    resposta = await chamar_llm_async(
-                        session,
-                        prompt=prompt,
-                        modelo=self.modelo
+                    resposta, json_dict = await self._gerar_resumo_llm(
+                        session, doc, prompt, usar_json=bool(prompt_json)
                     )
 
                     # Passa flag indicando se prompt era JSON
-                    sucesso = self._processar_resposta_resumo(doc, resposta, usar_json=bool(prompt_json))
+                    sucesso = self._processar_resposta_resumo(
+                        doc, resposta, usar_json=bool(prompt_json), json_dict=json_dict
+                    )
 
                     # CACHE: Salva resumo no cache se for JSON válido
                     if sucesso and prompt_json and hasattr(doc, 'resumo_json') and doc.resumo_json:
@@ -2149,15 +2307,14 @@ REGRAS IMPORTANTES:
                     prompt_json = self._obter_prompt_json_imagem(doc)
                     prompt_imagem = prompt_json if prompt_json else self._get_prompt_imagem()
 
-                    resposta = await chamar_llm_com_imagens_async(
-                        session,
-                        prompt=prompt_imagem,
-                        imagens_base64=imagens,
-                        modelo=self.modelo
+                    resposta, json_dict = await self._gerar_resumo_llm(
+                        session, doc, prompt_imagem, usar_json=bool(prompt_json), imagens=imagens
                     )
 
                     # Passa flag indicando se prompt era JSON
-                    sucesso = self._processar_resposta_resumo(doc, resposta, usar_json=bool(prompt_json))
+                    sucesso = self._processar_resposta_resumo(
+                        doc, resposta, usar_json=bool(prompt_json), json_dict=json_dict
+                    )
 
                     # RETRY: Se JSON falhou em imagem, tenta novamente
                     if not sucesso and prompt_json:
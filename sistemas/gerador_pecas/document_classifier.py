@@ -12,10 +12,12 @@ Este módulo é responsável por:
 Modelo obrigatório: gemini-2.5-flash-lite (configurável no admin/prompts-config)
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import base64
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any, Tuple
@@ -30,8 +32,30 @@ from utils.pymupdf_lock import pymupdf_lock as _PYMUPDF_LOCK
 
 from sqlalchemy.orm import Session
 
+from sistemas.gerador_pecas.document_dedup import LIMIAR_QUASE_DUPLICATA, agrupar_duplicatas, hash_texto
+
 logger = logging.getLogger(__name__)
 
+# Classificação em lote
+MAX_CONCORRENCIA_LOTE = 8  # Classificações simultâneas (o limite global fica com o controle de admissão)
+MAX_CHARS_DOCUMENTO_CURTO = 2000  # Candidatos a prompt multi-documento (agrupar_curtos)
+MAX_DOCUMENTOS_POR_PACOTE = 8
+
+SCHEMA_RESPOSTA_PACOTE = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "documento": {"type": "INTEGER"},
+            "categoria_id": {"type": "INTEGER"},
+            "confianca": {"type": "NUMBER"},
+            "justificativa_curta": {"type": "STRING"},
+        },
+        "required": ["documento", "categoria_id", "confianca"],
+        "propertyOrdering": ["documento", "categoria_id", "confianca", "justificativa_curta"],
+    },
+}
+
 
 class ClassificationSource(str, Enum):
     """Fonte usada para classificação do documento."""
@@ -277,6 +301,7 @@ class DocumentClassifier:
         self.threshold = threshold_confianca
         self._categorias_cache: Optional[List[Dict]] = None
         self._categoria_padrao: Optional[Dict] = None
+        self._temperatura: Optional[float] = None
 
     def _carregar_modelo_config(self) -> str:
         """Carrega modelo configurado no admin ou usa padrão."""
@@ -413,13 +438,7 @@ Retorne SOMENTE este JSON, sem texto adicional:
             # Usa serviço centralizado de Gemini
             from services.gemini_service import gemini_service
 
-            # Carrega config de temperatura
-            from admin.models import ConfiguracaoIA
-            temp_config = self.db.query(ConfiguracaoIA).filter(
-                ConfiguracaoIA.sistema == "sistemas_acessorios",
-                ConfiguracaoIA.chave == "classificador_documentos_temperatura"
-            ).first()
-            temperatura = float(temp_config.valor) if temp_config and temp_config.valor else 0.1
+            temperatura = self._carregar_temperatura()
 
             # Chama modelo apropriado
             if imagens:
@@ -484,6 +503,17 @@ Retorne SOMENTE este JSON, sem texto adicional:
             logger.error(f"[Classifier] Erro ao chamar IA: {e}")
             raise
 
+    def _carregar_temperatura(self) -> float:
+        """Temperatura configurada no admin (carregada uma vez por instância)."""
+        if self._temperatura is None:
+            from admin.models import ConfiguracaoIA
+            temp_config = self.db.query(ConfiguracaoIA).filter(
+                ConfiguracaoIA.sistema == "sistemas_acessorios",
+                ConfiguracaoIA.chave == "classificador_documentos_temperatura"
+            ).first()
+            self._temperatura = float(temp_config.valor) if temp_config and temp_config.valor else 0.1
+        return self._temperatura
+
     def _validar_categoria(self, categoria_id: int) -> Optional[Dict]:
         """
         Valida se categoria_id existe.
@@ -538,29 +568,56 @@ Retorne SOMENTE este JSON, sem texto adicional:
 
         # Se tem código conhecido, usa fluxo existente (não chama IA)
         if codigo_documento:
-            from sistemas.gerador_pecas.extrator_resumo_json import obter_formato_para_documento
-            formato = obter_formato_para_documento(self.db, codigo_documento)
-
-            if formato:
-                return DocumentClassification(
-                    arquivo_nome=arquivo_nome,
-                    arquivo_id=arquivo_id,
-                    categoria_id=formato.categoria_id,
-                    categoria_nome=formato.categoria_nome,
-                    confianca=1.0,
-                    justificativa="Código de documento conhecido",
-                    source=ClassificationSource.TEXT,
-                    fallback_aplicado=False
-                )
+            por_codigo = self._classificar_por_codigo(arquivo_nome, arquivo_id, codigo_documento)
+            if por_codigo:
+                return por_codigo
 
         # Extrai conteúdo do PDF
         conteudo = extrair_conteudo_pdf(pdf_bytes)
+        source, texto_para_enviar, imagens_para_enviar = self._preparar_envio(conteudo)
+
+        if texto_para_enviar is None and not imagens_para_enviar:
+            logger.warning(f"[Classifier] Sem conteúdo extraível: {arquivo_nome}")
+            return self._classificacao_sem_conteudo(arquivo_nome, arquivo_id)
+
+        return await self._classificar_conteudo(
+            arquivo_nome, arquivo_id, source, texto_para_enviar, imagens_para_enviar
+        )
+
+    def _classificar_por_codigo(
+        self,
+        arquivo_nome: str,
+        arquivo_id: str,
+        codigo_documento: int
+    ) -> Optional[DocumentClassification]:
+        """Classificação pelo código TJ-MS (sem IA), se o código tiver formato."""
+        from sistemas.gerador_pecas.extrator_resumo_json import obter_formato_para_documento
+        formato = obter_formato_para_documento(self.db, codigo_documento)
+
+        if not formato:
+            return None
+
+        return DocumentClassification(
+            arquivo_nome=arquivo_nome,
+            arquivo_id=arquivo_id,
+            categoria_id=formato.categoria_id,
+            categoria_nome=formato.categoria_nome,
+            confianca=1.0,
+            justificativa="Código de documento conhecido",
+            source=ClassificationSource.TEXT,
+            fallback_aplicado=False
+        )
 
-        # Decide estratégia: texto parcial ou imagem completa
-        source = ClassificationSource.TEXT
-        texto_para_enviar = None
-        imagens_para_enviar = None
+    def _preparar_envio(
+        self,
+        conteudo: PDFContent
+    ) -> Tuple[ClassificationSource, Optional[str], Optional[List[bytes]]]:
+        """
+        Decide estratégia: texto parcial ou imagem completa.
 
+        Returns:
+            Tupla (source, texto, imagens); texto e imagens vazios = sem conteúdo
+        """
         if conteudo.tem_texto and conteudo.texto_qualidade == "good":
             # Caso 1: PDF com texto extraível - usa heurística de texto parcial
             inicio, fim = _truncar_texto_heuristico(conteudo.texto, max_tokens=1000)
@@ -570,131 +627,345 @@ Retorne SOMENTE este JSON, sem texto adicional:
             else:
                 texto_para_enviar = conteudo.texto
 
-            source = ClassificationSource.TEXT
             logger.info(f"[Classifier] Usando texto ({len(texto_para_enviar)} chars)")
+            return ClassificationSource.TEXT, texto_para_enviar, None
 
-        elif conteudo.imagens:
+        if conteudo.imagens:
             # Caso 2: PDF é imagem ou OCR falhou - envia imagens
-            imagens_para_enviar = conteudo.imagens
-            source = ClassificationSource.FULL_IMAGE
-            logger.info(f"[Classifier] Usando {len(imagens_para_enviar)} imagens")
-
-        else:
-            # Caso 3: Não conseguiu extrair nada - fallback
-            logger.warning(f"[Classifier] Sem conteúdo extraível: {arquivo_nome}")
-            cat_id, cat_nome = self._aplicar_fallback("Sem conteúdo extraível")
-
-            return DocumentClassification(
-                arquivo_nome=arquivo_nome,
-                arquivo_id=arquivo_id,
-                categoria_id=cat_id,
-                categoria_nome=cat_nome,
-                confianca=0.0,
-                justificativa="Documento sem conteúdo extraível",
-                source=ClassificationSource.FULL_IMAGE,
-                fallback_aplicado=True,
-                fallback_motivo="Sem conteúdo extraível do PDF"
-            )
+            logger.info(f"[Classifier] Usando {len(conteudo.imagens)} imagens")
+            return ClassificationSource.FULL_IMAGE, None, conteudo.imagens
+
+        # Caso 3: Não conseguiu extrair nada
+        return ClassificationSource.FULL_IMAGE, None, None
+
+    def _classificacao_sem_conteudo(self, arquivo_nome: str, arquivo_id: str) -> DocumentClassification:
+        """Fallback para documento sem conteúdo extraível."""
+        cat_id, cat_nome = self._aplicar_fallback("Sem conteúdo extraível")
+
+        return DocumentClassification(
+            arquivo_nome=arquivo_nome,
+            arquivo_id=arquivo_id,
+            categoria_id=cat_id,
+            categoria_nome=cat_nome,
+            confianca=0.0,
+            justificativa="Documento sem conteúdo extraível",
+            source=ClassificationSource.FULL_IMAGE,
+            fallback_aplicado=True,
+            fallback_motivo="Sem conteúdo extraível do PDF"
+        )
 
-        # Monta prompt e chama IA
+    async def _classificar_conteudo(
+        self,
+        arquivo_nome: str,
+        arquivo_id: str,
+        source: ClassificationSource,
+        texto_para_enviar: Optional[str],
+        imagens_para_enviar: Optional[List[bytes]]
+    ) -> DocumentClassification:
+        """Monta prompt, chama IA e valida a resposta (erro vira fallback)."""
         prompt = self._montar_prompt_classificacao(texto_para_enviar)
 
         try:
             resultado = await self._chamar_ia(prompt, imagens_para_enviar)
+            return self._montar_classificacao(arquivo_nome, arquivo_id, resultado, source, texto_para_enviar)
 
-            # Valida categoria retornada
-            categoria = self._validar_categoria(resultado["categoria_id"])
-
-            if not categoria:
-                # Categoria inválida - fallback
-                logger.warning(f"[Classifier] Categoria inválida: {resultado['categoria_id']}")
-                cat_id, cat_nome = self._aplicar_fallback("Categoria inexistente")
-
-                return DocumentClassification(
-                    arquivo_nome=arquivo_nome,
-                    arquivo_id=arquivo_id,
-                    categoria_id=cat_id,
-                    categoria_nome=cat_nome,
-                    confianca=resultado["confianca"],
-                    justificativa=resultado["justificativa_curta"],
-                    source=source,
-                    texto_utilizado=texto_para_enviar,
-                    fallback_aplicado=True,
-                    fallback_motivo=f"IA retornou categoria inexistente: {resultado['categoria_id']}"
-                )
+        except Exception as e:
+            return self._classificacao_com_erro(arquivo_nome, arquivo_id, source, texto_para_enviar, e)
 
-            # Verifica threshold de confiança
-            if resultado["confianca"] < self.threshold:
-                logger.warning(f"[Classifier] Confiança baixa: {resultado['confianca']}")
-                cat_id, cat_nome = self._aplicar_fallback("Confiança baixa")
-
-                return DocumentClassification(
-                    arquivo_nome=arquivo_nome,
-                    arquivo_id=arquivo_id,
-                    categoria_id=cat_id,
-                    categoria_nome=cat_nome,
-                    confianca=resultado["confianca"],
-                    justificativa=resultado["justificativa_curta"],
-                    source=source,
-                    texto_utilizado=texto_para_enviar,
-                    fallback_aplicado=True,
-                    fallback_motivo=f"Confiança {resultado['confianca']:.2f} abaixo do threshold {self.threshold}"
-                )
+    def _montar_classificacao(
+        self,
+        arquivo_nome: str,
+        arquivo_id: str,
+        resultado: Dict[str, Any],
+        source: ClassificationSource,
+        texto_para_enviar: Optional[str]
+    ) -> DocumentClassification:
+        """Valida categoria e confiança retornadas pela IA, aplicando fallback."""
+        # Valida categoria retornada
+        categoria = self._validar_categoria(resultado["categoria_id"])
+
+        if not categoria:
+            # Categoria inválida - fallback
+            logger.warning(f"[Classifier] Categoria inválida: {resultado['categoria_id']}")
+            cat_id, cat_nome = self._aplicar_fallback("Categoria inexistente")
 
-            # Classificação bem-sucedida
             return DocumentClassification(
                 arquivo_nome=arquivo_nome,
                 arquivo_id=arquivo_id,
-                categoria_id=categoria["id"],
-                categoria_nome=categoria["nome"],
+                categoria_id=cat_id,
+                categoria_nome=cat_nome,
                 confianca=resultado["confianca"],
                 justificativa=resultado["justificativa_curta"],
                 source=source,
                 texto_utilizado=texto_para_enviar,
-                fallback_aplicado=False
+                fallback_aplicado=True,
+                fallback_motivo=f"IA retornou categoria inexistente: {resultado['categoria_id']}"
             )
 
-        except Exception as e:
-            # Erro na IA - fallback
-            logger.error(f"[Classifier] Erro na classificação: {e}")
-            cat_id, cat_nome = self._aplicar_fallback(str(e))
+        # Verifica threshold de confiança
+        if resultado["confianca"] < self.threshold:
+            logger.warning(f"[Classifier] Confiança baixa: {resultado['confianca']}")
+            cat_id, cat_nome = self._aplicar_fallback("Confiança baixa")
 
             return DocumentClassification(
                 arquivo_nome=arquivo_nome,
                 arquivo_id=arquivo_id,
                 categoria_id=cat_id,
                 categoria_nome=cat_nome,
-                confianca=0.0,
-                justificativa="Erro na classificação via IA",
+                confianca=resultado["confianca"],
+                justificativa=resultado["justificativa_curta"],
                 source=source,
                 texto_utilizado=texto_para_enviar,
                 fallback_aplicado=True,
-                fallback_motivo=f"Erro IA: {str(e)[:100]}",
-                erro=str(e)
+                fallback_motivo=f"Confiança {resultado['confianca']:.2f} abaixo do threshold {self.threshold}"
             )
 
+        # Classificação bem-sucedida
+        return DocumentClassification(
+            arquivo_nome=arquivo_nome,
+            arquivo_id=arquivo_id,
+            categoria_id=categoria["id"],
+            categoria_nome=categoria["nome"],
+            confianca=resultado["confianca"],
+            justificativa=resultado["justificativa_curta"],
+            source=source,
+            texto_utilizado=texto_para_enviar,
+            fallback_aplicado=False
+        )
+
+    def _classificacao_com_erro(
+        self,
+        arquivo_nome: str,
+        arquivo_id: str,
+        source: ClassificationSource,
+        texto_para_enviar: Optional[str],
+        erro: Exception
+    ) -> DocumentClassification:
+        """Erro na IA - fallback."""
+        logger.error(f"[Classifier] Erro na classificação: {erro}")
+        cat_id, cat_nome = self._aplicar_fallback(str(erro))
+
+        return DocumentClassification(
+            arquivo_nome=arquivo_nome,
+            arquivo_id=arquivo_id,
+            categoria_id=cat_id,
+            categoria_nome=cat_nome,
+            confianca=0.0,
+            justificativa="Erro na classificação via IA",
+            source=source,
+            texto_utilizado=texto_para_enviar,
+            fallback_aplicado=True,
+            fallback_motivo=f"Erro IA: {str(erro)[:100]}",
+            erro=str(erro)
+        )
+
+    # ------------------------------------------------------------------------
+    # CLASSIFICAÇÃO EM LOTE
+    # ------------------------------------------------------------------------
+
     async def classificar_lote(
         self,
-        documentos: List[Dict[str, Any]]
+        documentos: List[Dict[str, Any]],
+        max_concorrencia: int = MAX_CONCORRENCIA_LOTE,
+        limiar_duplicata: Optional[float] = LIMIAR_QUASE_DUPLICATA,
+        agrupar_curtos: bool = False
     ) -> List[DocumentClassification]:
         """
         Classifica um lote de documentos.
 
+        PERFORMANCE: antes, um await por documento (60 documentos = 60 chamadas
+        sequenciais). Agora:
+        - Conteúdo extraído fora do event loop
+        - Duplicatas exatas e quase-duplicatas (MinHash) classificadas uma vez,
+          com o resultado replicado
+        - Chamadas concorrentes (até max_concorrencia), passando pelo controle
+          de admissão global do gemini_service
+        - Opcional (agrupar_curtos): documentos curtos de texto em um único
+          prompt com resposta em array
+
+        A ordem dos resultados e o fallback por documento não mudam.
+
         Args:
             documentos: Lista de dicts com 'nome', 'id', 'bytes', 'codigo' (opcional)
+            max_concorrencia: Classificações simultâneas
+            limiar_duplicata: Similaridade mínima para quase-duplicatas (None = só exatas)
+            agrupar_curtos: Agrupa documentos curtos em prompts multi-documento
 
         Returns:
-            Lista de DocumentClassification
+            Lista de DocumentClassification (mesma ordem de `documentos`)
         """
-        resultados = []
-
-        for doc in documentos:
-            resultado = await self.classificar_documento(
-                arquivo_nome=doc["nome"],
-                arquivo_id=doc["id"],
-                pdf_bytes=doc["bytes"],
-                codigo_documento=doc.get("codigo")
+        resultados: List[Optional[DocumentClassification]] = [None] * len(documentos)
+
+        # 1. Código TJ-MS conhecido dispensa a IA
+        pendentes = []
+        for indice, doc in enumerate(documentos):
+            logger.info(f"[Classifier] Classificando: {doc['nome']}")
+            por_codigo = self._classificar_por_codigo(doc["nome"], doc["id"], doc["codigo"]) if doc.get("codigo") else None
+            if por_codigo:
+                resultados[indice] = por_codigo
+            else:
+                pendentes.append(indice)
+
+        # 2. Extração (PyMuPDF serializado pelo lock global, fora do event loop)
+        conteudos = await asyncio.gather(*(
+            asyncio.to_thread(extrair_conteudo_pdf, documentos[i]["bytes"]) for i in pendentes
+        ))
+        envios: Dict[int, Tuple[ClassificationSource, Optional[str], Optional[List[bytes]]]] = {}
+        for indice, conteudo in zip(pendentes, conteudos):
+            envio = self._preparar_envio(conteudo)
+            if envio[1] is None and not envio[2]:
+                logger.warning(f"[Classifier] Sem conteúdo extraível: {documentos[indice]['nome']}")
+                resultados[indice] = self._classificacao_sem_conteudo(documentos[indice]["nome"], documentos[indice]["id"])
+            else:
+                envios[indice] = envio
+
+        # 3. Deduplicação: texto enviado (normalizado) ou bytes do PDF quando só há imagens
+        indices = list(envios)
+        chaves = [
+            ("t:" + hash_texto(envios[i][1])) if envios[i][1] is not None
+            else ("b:" + hashlib.sha256(documentos[i]["bytes"]).hexdigest())
+            for i in indices
+        ]
+        grupos = agrupar_duplicatas(
+            [(chave, envios[i][1]) for chave, i in zip(chaves, indices)],
+            limiar=limiar_duplicata
+        )
+        representantes = [indices[p] for p, g in enumerate(grupos) if g == p]
+        if len(representantes) < len(indices):
+            logger.info(
+                f"[Classifier] Lote: {len(indices)} documentos, {len(indices) - len(representantes)} "
+                f"duplicatas agrupadas ({len(representantes)} chamadas)"
+            )
+
+        # 4. Classificação concorrente dos representantes
+        semaforo = asyncio.Semaphore(max(1, max_concorrencia))
+
+        async def classificar(indice: int) -> None:
+            async with semaforo:
+                source, texto, imagens = envios[indice]
+                resultados[indice] = await self._classificar_conteudo(
+                    documentos[indice]["nome"], documentos[indice]["id"], source, texto, imagens
+                )
+
+        async def classificar_pacote(pacote: List[int]) -> None:
+            async with semaforo:
+                respostas = await self._classificar_pacote([envios[i][1] for i in pacote])
+            for indice, resposta in zip(pacote, respostas):
+                if resposta is not None:
+                    resultados[indice] = self._montar_classificacao(
+                        documentos[indice]["nome"], documentos[indice]["id"], resposta,
+                        ClassificationSource.TEXT, envios[indice][1]
+                    )
+            # Documentos sem resposta no array voltam à classificação individual
+            await asyncio.gather(*(classificar(i) for i in pacote if resultados[i] is None))
+
+        individuais = representantes
+        pacotes: List[List[int]] = []
+        if agrupar_curtos:
+            pacotes, individuais = self._montar_pacotes(representantes, envios)
+
+        await asyncio.gather(
+            *(classificar(i) for i in individuais),
+            *(classificar_pacote(p) for p in pacotes)
+        )
+
+        # 5. Replica o resultado do representante para as duplicatas
+        for posicao, grupo in enumerate(grupos):
+            if grupo == posicao:
+                continue
+            indice, origem = indices[posicao], resultados[indices[grupo]]
+            resultados[indice] = replace(
+                origem,
+                arquivo_nome=documentos[indice]["nome"],
+                arquivo_id=documentos[indice]["id"],
+                texto_utilizado=envios[indice][1]
             )
-            resultados.append(resultado)
 
         return resultados
+
+    def _montar_pacotes(
+        self,
+        representantes: List[int],
+        envios: Dict[int, Tuple[ClassificationSource, Optional[str], Optional[List[bytes]]]]
+    ) -> Tuple[List[List[int]], List[int]]:
+        """Separa documentos curtos de texto em pacotes; retorna (pacotes, individuais)."""
+        curtos = [
+            i for i in representantes
+            if envios[i][1] is not None and len(envios[i][1]) <= MAX_CHARS_DOCUMENTO_CURTO
+        ]
+        conjunto_curtos = set(curtos)
+        individuais = [i for i in representantes if i not in conjunto_curtos]
+        pacotes = [curtos[p:p + MAX_DOCUMENTOS_POR_PACOTE] for p in range(0, len(curtos), MAX_DOCUMENTOS_POR_PACOTE)]
+
+        # Pacote de um documento só não compensa o prompt multi-documento
+        if pacotes and len(pacotes[-1]) == 1:
+            individuais.append(pacotes.pop()[0])
+        return pacotes, individuais
+
+    def _montar_prompt_pacote(self, textos: List[str]) -> str:
+        """Prompt de classificação de vários documentos curtos com resposta em array."""
+        categorias_lista = self._montar_lista_categorias_prompt()
+        documentos = "\n\n".join(
+            f"### Documento {n}\n{texto}" for n, texto in enumerate(textos, start=1)
+        )
+
+        return f"""Você é um classificador de documentos jurídicos. Classifique CADA documento abaixo, de forma independente, em UMA das categorias listadas.
+
+## CATEGORIAS DISPONÍVEIS
+{categorias_lista}
+
+## REGRAS
+1. Para cada documento, escolha EXATAMENTE UMA categoria da lista acima.
+2. Use o ID exato da categoria escolhida.
+3. Se tiver dúvida entre categorias, escolha a mais provável e indique confiança baixa.
+4. A confiança deve refletir sua certeza: 1.0 = certeza absoluta, 0.0 = chute.
+
+## DOCUMENTOS A CLASSIFICAR ({len(textos)})
+
+{documentos}
+
+## FORMATO DE RESPOSTA (JSON)
+Retorne SOMENTE um array JSON com um objeto por documento:
+[{{"documento": <NÚMERO_DO_DOCUMENTO>, "categoria_id": <ID_NUMERICO_DA_CATEGORIA>, "confianca": <0.0_A_1.0>, "justificativa_curta": "<até 140 caracteres>"}}]
+"""
+
+    async def _classificar_pacote(self, textos: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Classifica vários documentos curtos em uma chamada.
+
+        Returns:
+            Uma resposta por texto (None quando o documento ficou sem resposta
+            válida ou a chamada falhou - o chamador reclassifica individualmente)
+        """
+        try:
+            from services.gemini_service import gemini_service
+
+            response = await gemini_service.generate(
+                prompt=self._montar_prompt_pacote(textos),
+                model=self.modelo,
+                temperature=self._carregar_temperatura(),
+                max_tokens=150 * len(textos) + 200,
+                thinking_level="low",
+                response_schema=SCHEMA_RESPOSTA_PACOTE,
+                context={"sistema": "document_classifier", "modulo": "classificacao_categoria_lote"}
+            )
+            if not response.success:
+                raise ValueError(f"Erro na API Gemini: {response.error}")
+            itens = json.loads(response.content)
+        except Exception as e:
+            logger.warning(f"[Classifier] Pacote de {len(textos)} documentos falhou, classificando individualmente: {e}")
+            return [None] * len(textos)
+
+        respostas: List[Optional[Dict[str, Any]]] = [None] * len(textos)
+        for item in itens if isinstance(itens, list) else []:
+            try:
+                posicao = int(item["documento"]) - 1
+                if 0 <= posicao < len(textos) and respostas[posicao] is None:
+                    respostas[posicao] = {
+                        "categoria_id": int(item["categoria_id"]),
+                        "confianca": float(item.get("confianca", 0.5)),
+                        "justificativa_curta": str(item.get("justificativa_curta") or "")[:140],
+                    }
+            except (KeyError, TypeError, ValueError):
+                continue
+        return respostas
@@ -0,0 +1,127 @@
+# sistemas/gerador_pecas/document_dedup.py
+"""
+Deduplicação de documentos por texto para a classificação em lote.
+
+Processos digitalizados trazem documentos repetidos (petições reapresentadas,
+juntadas duplicadas). Antes de chamar a IA, o DocumentClassifier agrupa:
+
+1. Duplicatas exatas: mesmo hash do texto normalizado (ou dos bytes, para
+   documentos sem texto)
+2. Quase-duplicatas: assinaturas MinHash de shingles de palavras com
+   similaridade de Jaccard estimada >= limiar, candidatas encontradas por
+   LSH (bandas da assinatura)
+
+Cada grupo é classificado uma única vez e o resultado é replicado.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Parâmetros do MinHash/LSH: 64 permutações em 16 bandas de 4 linhas.
+# Pares com Jaccard ~0.5 já viram candidatos; a confirmação usa LIMIAR_QUASE_DUPLICATA.
+NUM_PERMUTACOES = 64
+NUM_BANDAS = 16
+TAMANHO_SHINGLE = 3
+LIMIAR_QUASE_DUPLICATA = 0.9
+
+# Textos com poucos shingles só são agrupados por igualdade exata
+MIN_SHINGLES = 10
+
+_rng = np.random.default_rng(20240601)
+_COEF_A = _rng.integers(1, 2 ** 63, size=NUM_PERMUTACOES, dtype=np.uint64) | np.uint64(1)
+_COEF_B = _rng.integers(0, 2 ** 63, size=NUM_PERMUTACOES, dtype=np.uint64)
+
+_RE_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas, sem acentos e sem pontuação (espaços colapsados)."""
+    sem_acentos = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode("ascii")
+    return _RE_NAO_ALFANUMERICO.sub(" ", sem_acentos).strip()
+
+
+def hash_texto(texto: str) -> str:
+    """Hash do texto normalizado (duplicatas exatas)."""
+    return hashlib.sha256(normalizar_texto(texto).encode("utf-8")).hexdigest()
+
+
+def assinatura_minhash(texto: str) -> Optional[np.ndarray]:
+    """
+    Assinatura MinHash dos shingles de TAMANHO_SHINGLE palavras.
+
+    Usa hashing multiplica-e-desloca em uint64 (vetorizado com numpy).
+    Retorna None quando o texto tem menos de MIN_SHINGLES shingles.
+    """
+    palavras = normalizar_texto(texto).split()
+    shingles = {" ".join(palavras[i:i + TAMANHO_SHINGLE]) for i in range(len(palavras) - TAMANHO_SHINGLE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    with np.errstate(over="ignore"):
+        permutados = (_COEF_A[:, None] * hashes[None, :] + _COEF_B[:, None]) >> np.uint64(32)
+    return permutados.min(axis=1)
+
+
+def similaridade_estimada(assinatura_a: np.ndarray, assinatura_b: np.ndarray) -> float:
+    """Jaccard estimado: fração de posições iguais nas assinaturas."""
+    return float(np.mean(assinatura_a == assinatura_b))
+
+
+def agrupar_duplicatas(
+    itens: Sequence[Tuple[str, Optional[str]]],
+    limiar: Optional[float] = LIMIAR_QUASE_DUPLICATA
+) -> List[int]:
+    """
+    Agrupa duplicatas e quase-duplicatas.
+
+    Args:
+        itens: Pares (chave exata, texto para MinHash ou None)
+        limiar: Similaridade mínima para quase-duplicatas (None = só exatas)
+
+    Returns:
+        Para cada item, o índice do representante do seu grupo (o primeiro
+        item do grupo, que é o próprio índice quando não há duplicata)
+    """
+    representantes: List[int] = []
+    por_chave: Dict[str, int] = {}
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    assinaturas: Dict[int, np.ndarray] = {}
+    linhas = NUM_PERMUTACOES // NUM_BANDAS
+
+    for indice, (chave, texto) in enumerate(itens):
+        if chave in por_chave:
+            representantes.append(por_chave[chave])
+            continue
+
+        assinatura = assinatura_minhash(texto) if (texto and limiar is not None) else None
+        bandas = []
+        representante = indice
+        if assinatura is not None:
+            bandas = [(b, assinatura[b * linhas:(b + 1) * linhas].tobytes()) for b in range(NUM_BANDAS)]
+            candidatos = []
+            for banda in bandas:
+                for candidato in buckets.get(banda, ()):
+                    if candidato not in candidatos:
+                        candidatos.append(candidato)
+            for candidato in sorted(candidatos):
+                if similaridade_estimada(assinatura, assinaturas[candidato]) >= limiar:
+                    representante = candidato
+                    break
+
+        por_chave[chave] = representante
+        representantes.append(representante)
+        if representante == indice and assinatura is not None:
+            assinaturas[indice] = assinatura
+            for banda in bandas:
+                buckets.setdefault(banda, []).append(indice)
+
+    return representantes
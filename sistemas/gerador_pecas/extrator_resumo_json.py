@@ -71,6 +71,13 @@ class FormatoResumo:
     formato_json: str  # JSON string com estrutura esperada
     instrucoes_extracao: Optional[str]
     is_residual: bool
+    versao: Optional[str] = None  # atualizado_em da categoria (chave do cache de schema)
+
+
+def _versao_categoria(cat) -> Optional[str]:
+    """Versão da categoria para o cache de schemas compilados."""
+    atualizado_em = getattr(cat, "atualizado_em", None)
+    return atualizado_em.isoformat() if atualizado_em else None
 
 
 def obter_formato_para_documento(db: Session, codigo_documento: int) -> Optional[FormatoResumo]:
@@ -99,7 +106,8 @@ def obter_formato_para_documento(db: Session, codigo_documento: int) -> Optional
                 categoria_nome=cat.nome,
                 formato_json=cat.formato_json,
                 instrucoes_extracao=cat.instrucoes_extracao,
-                is_residual=False
+                is_residual=False,
+                versao=_versao_categoria(cat)
             )
     
     # Se não encontrou específica, usa residual
@@ -114,7 +122,8 @@ def obter_formato_para_documento(db: Session, codigo_documento: int) -> Optional
             categoria_nome=residual.nome,
             formato_json=residual.formato_json,
             instrucoes_extracao=residual.instrucoes_extracao,
-            is_residual=True
+            is_residual=True,
+            versao=_versao_categoria(residual)
         )
     
     return None
@@ -878,7 +887,8 @@ class GerenciadorFormatosJSON:
                 categoria_nome=cat.nome,
                 formato_json=cat.formato_json,
                 instrucoes_extracao=cat.instrucoes_extracao,
-                is_residual=cat.is_residual
+                is_residual=cat.is_residual,
+                versao=_versao_categoria(cat)
             )
 
             if cat.is_residual:
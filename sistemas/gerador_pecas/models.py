@@ -3,7 +3,7 @@
 Modelos do sistema de Geração de Peças Jurídicas
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship, deferred
 from database.connection import Base
 from utils.timezone import get_utc_now
@@ -82,6 +82,11 @@ class GeracaoPeca(Base):
     # Relacionamento com versões
     versoes = relationship("VersaoPeca", back_populates="geracao", cascade="all, delete-orphan", order_by="VersaoPeca.numero_versao")
 
+    # PERFORMANCE: lista do histórico por usuário, paginada por (criado_em, id)
+    __table_args__ = (
+        Index("ix_geracoes_pecas_usuario_criado", "usuario_id", "criado_em", "id"),
+    )
+
     def __repr__(self):
         return f"<GeracaoPeca(id={self.id}, cnj='{self.numero_cnj}', tipo='{self.tipo_peca}')>"
 
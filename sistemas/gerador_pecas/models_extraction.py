@@ -7,12 +7,13 @@ Este módulo implementa:
 - Modelos de extração gerados por IA ou manuais
 - Variáveis normalizadas do sistema
 - Rastreamento de uso de variáveis em prompts
+- Índice reverso de referências a slugs (renomeação/análise de impacto)
 """
 
 from typing import Optional, List
 from sqlalchemy import (
     Column, Integer, String, Text, Boolean, DateTime,
-    JSON, ForeignKey, Enum as SQLEnum, UniqueConstraint
+    JSON, ForeignKey, Enum as SQLEnum, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from database.connection import Base
@@ -329,6 +330,45 @@ class PromptVariableUsage(Base):
         return f"<PromptVariableUsage(prompt_id={self.prompt_id}, variable_slug='{self.variable_slug}')>"
 
 
+class VariableSlugReference(Base):
+    """
+    Índice reverso de referências a slugs de variáveis.
+
+    Cada linha indica que a entidade (entity_type, entity_id) referencia o slug
+    na posição `location` (caminho dentro do campo, ex:
+    "regra_deterministica.conditions[1].variable").
+
+    Mantido automaticamente no mesmo flush/transação em que PromptModulo,
+    RegraDeterministicaTipoPeca, ExtractionVariable e ExtractionQuestion são
+    salvos (ver services_slug_index). Permite que renomeação e análise de
+    impacto carreguem apenas as linhas que realmente referenciam o slug.
+    """
+    __tablename__ = "variable_slug_references"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Slug referenciado
+    slug = Column(String(200), nullable=False)
+
+    # Entidade que referencia: 'prompt_modulo', 'regra_tipo_peca',
+    # 'extraction_variable', 'extraction_question'
+    entity_type = Column(String(30), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+
+    # Caminho da referência dentro da entidade
+    location = Column(String(255), nullable=False)
+
+    criado_em = Column(DateTime, default=get_utc_now)
+
+    __table_args__ = (
+        Index('ix_slug_ref_slug_entity', 'slug', 'entity_type'),
+        Index('ix_slug_ref_entity', 'entity_type', 'entity_id'),
+    )
+
+    def __repr__(self):
+        return f"<VariableSlugReference(slug='{self.slug}', {self.entity_type}={self.entity_id}, location='{self.location}')>"
+
+
 class PromptActivationLog(Base):
     """
     Log de ativação de prompts para auditoria.
@@ -378,3 +418,8 @@ class PromptActivationLog(Base):
 
     def __repr__(self):
         return f"<PromptActivationLog(prompt_id={self.prompt_id}, modo='{self.modo_ativacao}', resultado={self.resultado})>"
+
+
+# Registra o listener que mantém o índice reverso de slugs (after_flush).
+# Import no final do módulo: services_slug_index depende dos models acima.
+from sistemas.gerador_pecas import services_slug_index as _services_slug_index  # noqa: E402,F401
@@ -432,25 +432,37 @@ Os dados abaixo foram extraídos automaticamente do sistema judicial e são conf
 """
 
 
-def _montar_prompt_agente3(
+def _montar_prefixo_agente3(
     prompt_sistema: str,
     prompt_peca: str,
-    prompt_conteudo: str,
-    resumo_consolidado: str,
-    secao_observacao: str = "",
-    secao_dados_processo: str = ""
+    prompt_conteudo: str
 ) -> str:
     """
-    Monta o prompt completo para o Agente 3.
+    Monta a parte estável do prompt do Agente 3: sistema + peça + módulos de conteúdo.
 
-    Combina todos os componentes em um único prompt formatado.
+    PERFORMANCE: Depende só da configuração dos módulos e do conjunto ativado
+    (já ordenado por categoria, ordem e id em _montar_prompt_conteudo), então
+    processos com os mesmos módulos geram o mesmo texto, byte a byte. Esse
+    prefixo vai para o cache de contexto do Gemini (prompt_prefix).
     """
     return f"""{prompt_sistema}
 
 {prompt_peca}
 
 {prompt_conteudo}
-{secao_observacao}{secao_dados_processo}
+"""
+
+
+def _montar_sufixo_agente3(
+    resumo_consolidado: str,
+    secao_observacao: str = "",
+    secao_dados_processo: str = ""
+) -> str:
+    """
+    Monta a parte variável do prompt do Agente 3: observação, dados do
+    processo, documentos e instruções finais.
+    """
+    return f"""{secao_observacao}{secao_dados_processo}
 ---
 
 ## DOCUMENTOS DO PROCESSO PARA ANÁLISE:
@@ -1213,15 +1225,10 @@ class OrquestradorAgentes:
             secao_observacao = _montar_secao_observacao(observacao_usuario)
             secao_dados_processo = _montar_secao_dados_processo(dados_processo)
 
-            # Monta o prompt completo
-            prompt_completo = _montar_prompt_agente3(
-                prompt_sistema=prompt_sistema,
-                prompt_peca=prompt_peca,
-                prompt_conteudo=prompt_conteudo,
-                resumo_consolidado=resumo_consolidado,
-                secao_observacao=secao_observacao,
-                secao_dados_processo=secao_dados_processo
-            )
+            # Monta o prompt: prefixo estável (cacheável) + sufixo do processo
+            prefixo = _montar_prefixo_agente3(prompt_sistema, prompt_peca, prompt_conteudo)
+            sufixo = _montar_sufixo_agente3(resumo_consolidado, secao_observacao, secao_dados_processo)
+            prompt_completo = prefixo + sufixo
 
             resultado.prompt_enviado = prompt_completo
 
@@ -1231,7 +1238,8 @@ class OrquestradorAgentes:
             # Chama a API do Gemini
             max_tokens_efetivo = self.params_agente3.max_tokens or 50000
             content = await chamar_gemini_async(
-                prompt=prompt_completo,
+                prompt=sufixo,
+                prompt_prefix=prefixo,
                 modelo=self.params_agente3.modelo,
                 max_tokens=max_tokens_efetivo,
                 temperature=self.params_agente3.temperatura
@@ -1306,15 +1314,10 @@ class OrquestradorAgentes:
             secao_observacao = _montar_secao_observacao(observacao_usuario)
             secao_dados_processo = _montar_secao_dados_processo(dados_processo)
 
-            # Monta o prompt completo
-            prompt_completo = _montar_prompt_agente3(
-                prompt_sistema=prompt_sistema,
-                prompt_peca=prompt_peca,
-                prompt_conteudo=prompt_conteudo,
-                resumo_consolidado=resumo_consolidado,
-                secao_observacao=secao_observacao,
-                secao_dados_processo=secao_dados_processo
-            )
+            # Monta o prompt: prefixo estável (cacheável) + sufixo do processo
+            prefixo = _montar_prefixo_agente3(prompt_sistema, prompt_peca, prompt_conteudo)
+            sufixo = _montar_sufixo_agente3(resumo_consolidado, secao_observacao, secao_dados_processo)
+            prompt_completo = prefixo + sufixo
 
             resultado.prompt_enviado = prompt_completo
 
@@ -1326,7 +1329,8 @@ class OrquestradorAgentes:
             chunk_count = 0
 
             async for chunk in gemini_service.generate_stream(
-                prompt=prompt_completo,
+                prompt=sufixo,
+                prompt_prefix=prefixo,
                 model=self.params_agente3.modelo,
                 max_tokens=max_tokens_efetivo,
                 temperature=self.params_agente3.temperatura,
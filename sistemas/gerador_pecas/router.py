@@ -9,7 +9,7 @@ import json
 import uuid
 import asyncio
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, UploadFile, File, Form, status, Request
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, UploadFile, File, Form, status, Request, Response
 from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, AsyncGenerator
@@ -19,15 +19,16 @@ from sqlalchemy.orm import Session
 
 from auth.dependencies import get_current_active_user, get_current_user_from_token_or_query
 from auth.models import User
-from database.connection import get_db
+from database.connection import get_db, async_db_context
 from utils.timezone import to_iso_utc
+from utils.historico import CABECALHO_CURSOR, LIMITE_MAXIMO, LIMITE_PADRAO, consultar_historico
 from services.text_normalizer import text_normalizer
 from services.performance_tracker import (
     create_tracker, get_tracker, mark, record_chunk, PerformanceTracker
 )
 from services.config_cache import config_cache
 from utils.rate_limit import limiter, limit_ai_request, LIMITS, get_user_identifier, limit_upload, limit_export, limit_default
-from admin.services_request_perf import log_request_perf
+from admin.services_request_perf import log_request_perf_async
 from sistemas.gerador_pecas.models import GeracaoPeca, FeedbackPeca, VersaoPeca
 from sistemas.gerador_pecas.services import GeradorPecasService
 from sistemas.gerador_pecas.orquestrador_agentes import consolidar_dados_extracao
@@ -50,6 +51,46 @@ TEMP_DIR = os.path.join(os.path.dirname(__file__), 'temp_docs')
 os.makedirs(TEMP_DIR, exist_ok=True)
 
 
+async def _salvar_geracao_com_versao(
+    geracao: GeracaoPeca,
+    versao: Dict,
+    campos_opcionais: List[str],
+    log_prefixo: str = "[GERADOR]",
+) -> GeracaoPeca:
+    """
+    Salva a geração e a versão inicial em uma única transação async.
+
+    PERFORMANCE: Chamado de dentro dos geradores SSE; com a Session síncrona o
+    commit travava o event loop (e os streams de todos os usuários).
+
+    Se o banco ainda não tem alguma coluna de campos_opcionais (migration
+    pendente), salva de novo sem esses campos.
+    """
+    async with async_db_context() as adb:
+        try:
+            adb.add(geracao)
+            await adb.flush()  # Flush para obter o ID sem commit
+            # Versão inicial na mesma transação (evita commit duplo)
+            adb.add(VersaoPeca(geracao_id=geracao.id, numero_versao=1, diff_anterior=None, **versao))
+            await adb.commit()
+        except Exception as e:
+            if not any(campo in str(e) for campo in campos_opcionais):
+                raise
+            await adb.rollback()
+            print(f"{log_prefixo} Colunas opcionais não existem no banco, salvando sem elas: {e}")
+            from sqlalchemy import inspect
+            state = inspect(geracao)
+            for attr in campos_opcionais:
+                if attr in state.dict:
+                    del state.dict[attr]
+            adb.add(geracao)
+            await adb.flush()
+            adb.add(VersaoPeca(geracao_id=geracao.id, numero_versao=1, diff_anterior=None, **versao))
+            await adb.commit()
+        await adb.refresh(geracao)
+    return geracao
+
+
 def _limpar_cnj(numero_cnj: str) -> str:
     """
     Limpa número CNJ removendo formatação e sufixos.
@@ -690,52 +731,16 @@ async def processar_processo_stream(
                 except AttributeError:
                     pass
 
-                try:
-                    db.add(geracao)
-                    db.flush()  # Flush para obter o ID sem commit
-
-                    # Cria versão inicial na mesma transação (evita commit duplo)
-                    versao = VersaoPeca(
-                        geracao_id=geracao.id,
-                        numero_versao=1,
-                        conteudo=resultado_agente3.conteudo_markdown,
-                        origem='geracao_inicial',
-                        descricao_alteracao='Versão inicial gerada pela IA',
-                        diff_anterior=None
-                    )
-                    db.add(versao)
-
-                    db.commit()
-                    db.refresh(geracao)
-                except Exception as e:
-                    # Se falhou por colunas inexistentes, tenta sem os campos de modo de ativação
-                    if 'modo_ativacao_agente2' in str(e) or 'modulos_ativados' in str(e):
-                        db.rollback()
-                        geracao.modo_ativacao_agente2 = None
-                        geracao.modulos_ativados_det = None
-                        geracao.modulos_ativados_llm = None
-                        from sqlalchemy import inspect
-                        state = inspect(geracao)
-                        for attr in ['modo_ativacao_agente2', 'modulos_ativados_det', 'modulos_ativados_llm']:
-                            if attr in state.dict:
-                                del state.dict[attr]
-                        db.add(geracao)
-                        db.flush()
-
-                        versao = VersaoPeca(
-                            geracao_id=geracao.id,
-                            numero_versao=1,
-                            conteudo=resultado_agente3.conteudo_markdown,
-                            origem='geracao_inicial',
-                            descricao_alteracao='Versão inicial gerada pela IA',
-                            diff_anterior=None
-                        )
-                        db.add(versao)
-
-                        db.commit()
-                        db.refresh(geracao)
-                    else:
-                        raise
+                # Se faltarem as colunas de modo de ativação, salva sem elas
+                await _salvar_geracao_com_versao(
+                    geracao,
+                    versao={
+                        "conteudo": resultado_agente3.conteudo_markdown,
+                        "origem": "geracao_inicial",
+                        "descricao_alteracao": "Versão inicial gerada pela IA",
+                    },
+                    campos_opcionais=['modo_ativacao_agente2', 'modulos_ativados_det', 'modulos_ativados_llm'],
+                )
 
                 tracker.mark("db_save_done")
 
@@ -750,9 +755,8 @@ async def processar_processo_stream(
 
                 # Salva log de performance detalhado no banco
                 try:
-                    log_request_perf(
+                    await log_request_perf_async(
                         report=perf_report,
-                        db=db,
                         user_id=current_user.id if current_user else None,
                         username=current_user.username if current_user else None,
                         success=True
@@ -1723,17 +1727,30 @@ async def download_documento(
 @limit_default
 async def listar_historico(
     request: Request,
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="Valor do cabeçalho X-Proximo-Cursor da página anterior"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Lista o histórico de gerações do usuário.
+
+    PERFORMANCE: carrega só CNJ, tipo e data (sem peça, prompt e JSON do
+    processo); a peça completa vem de /historico/{id}. Próxima página no
+    cabeçalho X-Proximo-Cursor.
     """
     try:
-        geracoes = db.query(GeracaoPeca).filter(
-            GeracaoPeca.usuario_id == current_user.id
-        ).order_by(GeracaoPeca.criado_em.desc()).limit(50).all()
-        
+        pagina = consultar_historico(
+            db, GeracaoPeca,
+            colunas=[GeracaoPeca.numero_cnj, GeracaoPeca.numero_cnj_formatado, GeracaoPeca.tipo_peca],
+            filtros=[GeracaoPeca.usuario_id == current_user.id],
+            limite=limite,
+            cursor=cursor,
+        )
+        if pagina.proximo_cursor:
+            response.headers[CABECALHO_CURSOR] = pagina.proximo_cursor
+
         return [
             {
                 "id": g.id,
@@ -1741,8 +1758,10 @@ async def listar_historico(
                 "tipo_peca": g.tipo_peca,
                 "data": to_iso_utc(g.criado_em)
             }
-            for g in geracoes
+            for g, _ in pagina.itens
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -2220,13 +2239,12 @@ async def listar_documentos_processo(
     Retorna lista ordenada cronologicamente com descrição do XML.
     Documentos com mesma descrição e data (até 1 min) são agrupados.
     Se houver processamento anterior, usa descrição identificada pela IA.
+
+    PERFORMANCE: a consulta ao TJ-MS fica em cache com TTL curto
+    (services_visualizador_autos.listar_documentos_tjms).
     """
-    import aiohttp
-    from sistemas.gerador_pecas.agente_tjms import (
-        consultar_processo_async,
-        extrair_documentos_xml,
-        documento_permitido
-    )
+    from sistemas.gerador_pecas.agente_tjms import documento_permitido
+    from sistemas.gerador_pecas.services_visualizador_autos import listar_documentos_tjms
     
     try:
         cnj_limpo = _limpar_cnj(numero_cnj)
@@ -2246,9 +2264,7 @@ async def listar_documentos_processo(
                     for doc_id in doc_salvo.get("ids", [doc_salvo.get("id")]):
                         descricoes_ia_map[doc_id] = doc_salvo["descricao_ia"]
         
-        async with aiohttp.ClientSession() as session:
-            xml_response = await consultar_processo_async(session, cnj_limpo)
-            docs = extrair_documentos_xml(xml_response)
+        docs = await listar_documentos_tjms(cnj_limpo)
         
         # Filtra documentos permitidos
         docs_filtrados = [d for d in docs if documento_permitido(int(d.tipo_documento or 0))]
@@ -2304,11 +2320,12 @@ async def baixar_documento_processo(
     Baixa um ou mais documentos do processo do TJ-MS.
     Se ids contiver múltiplos IDs (separados por vírgula), faz merge dos PDFs.
     Retorna o PDF diretamente para visualização no navegador.
+
+    PERFORMANCE: o PDF mesclado fica em cache em disco por (CNJ, ids), com
+    ETag/Last-Modified e suporte a Range, para o PDF.js buscar só os trechos
+    necessários; reabrir o documento não consulta o TJ-MS de novo.
     """
-    import aiohttp
-    import base64
-    from sistemas.gerador_pecas.agente_tjms import baixar_documentos_async
-    import xml.etree.ElementTree as ET
+    from sistemas.gerador_pecas.services_visualizador_autos import cache_pdfs_autos
     
     try:
         cnj_limpo = _limpar_cnj(numero_cnj)
@@ -2319,67 +2336,13 @@ async def baixar_documento_processo(
         else:
             lista_ids = [doc_id]
         
-        async with aiohttp.ClientSession() as session:
-            xml_response = await baixar_documentos_async(session, cnj_limpo, lista_ids)
-        
-        # Extrai conteúdo base64 de todos os documentos
-        root = ET.fromstring(xml_response)
-        pdfs_bytes = []
-        
-        for elem in root.iter():
-            tag_no_ns = elem.tag.split('}')[-1].lower() if '}' in elem.tag else elem.tag.lower()
-            if tag_no_ns == 'documento':
-                doc_id_found = elem.attrib.get("idDocumento") or elem.attrib.get("id")
-                if doc_id_found in lista_ids:
-                    # Busca conteúdo base64
-                    conteudo_base64 = elem.attrib.get("conteudo")
-                    if not conteudo_base64:
-                        for child in elem:
-                            child_tag = child.tag.split('}')[-1].lower()
-                            if child_tag == 'conteudo' and child.text:
-                                conteudo_base64 = child.text.strip()
-                                break
-                    
-                    if conteudo_base64:
-                        pdfs_bytes.append((doc_id_found, base64.b64decode(conteudo_base64)))
-        
-        if not pdfs_bytes:
+        # Download, parse e merge (fora do event loop) só quando não está em cache;
+        # PDF inline, com 206 para requisições com Range
+        resposta = await cache_pdfs_autos.responder(cnj_limpo, lista_ids, request.headers, f"doc_{doc_id}.pdf")
+        if resposta is None:
             raise HTTPException(status_code=404, detail="Documento não encontrado")
         
-        # Se só tem um PDF, retorna direto
-        if len(pdfs_bytes) == 1:
-            pdf_bytes = pdfs_bytes[0][1]
-        else:
-            # Faz merge dos PDFs usando PyMuPDF
-            import fitz
-            
-            # Ordena os PDFs pela ordem dos IDs na lista original
-            id_order = {id: i for i, id in enumerate(lista_ids)}
-            pdfs_bytes.sort(key=lambda x: id_order.get(x[0], 999))
-            
-            # Merge
-            merged_pdf = fitz.open()
-            for doc_id_item, pdf_data in pdfs_bytes:
-                try:
-                    pdf_doc = fitz.open(stream=pdf_data, filetype="pdf")
-                    merged_pdf.insert_pdf(pdf_doc)
-                    pdf_doc.close()
-                except Exception as e:
-                    print(f"Erro ao processar PDF {doc_id_item}: {e}")
-                    continue
-            
-            pdf_bytes = merged_pdf.tobytes()
-            merged_pdf.close()
-        
-        # Retorna como PDF para visualização inline
-        return StreamingResponse(
-            iter([pdf_bytes]),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"inline; filename=doc_{doc_id}.pdf",
-                "Cache-Control": "private, max-age=3600"  # Cache de 1h
-            }
-        )
+        return resposta
         
     except HTTPException:
         raise
@@ -2926,49 +2889,21 @@ async def curation_generate_stream(
             except AttributeError as e:
                 print(f"[CURADORIA] Aviso: campo nao disponivel no modelo: {e}")
 
+            # Se faltarem as colunas de curadoria, salva sem os metadados
             try:
-                db.add(geracao)
-                db.flush()
-
-                versao = VersaoPeca(
-                    geracao_id=geracao.id,
-                    numero_versao=1,
-                    conteudo=resultado_agente3.conteudo_markdown,
-                    origem='geracao_curada',
-                    descricao_alteracao='Versao inicial gerada com modulos curados pelo usuario',
-                    diff_anterior=None
+                await _salvar_geracao_com_versao(
+                    geracao,
+                    versao={
+                        "conteudo": resultado_agente3.conteudo_markdown,
+                        "origem": "geracao_curada",
+                        "descricao_alteracao": "Versao inicial gerada com modulos curados pelo usuario",
+                    },
+                    campos_opcionais=['modo_ativacao_agente2', 'modulos_ativados_det', 'modulos_ativados_llm', 'curadoria_metadata'],
+                    log_prefixo="[CURADORIA]",
                 )
-                db.add(versao)
-                db.commit()
-                db.refresh(geracao)
             except Exception as e:
-                # Se erro for por colunas inexistentes, tenta salvar sem os campos de curadoria
-                if 'modo_ativacao_agente2' in str(e) or 'modulos_ativados' in str(e) or 'curadoria_metadata' in str(e):
-                    db.rollback()
-                    print(f"[CURADORIA] Colunas de curadoria nao existem no banco, salvando sem metadados: {e}")
-                    # Remove atributos que causam erro
-                    from sqlalchemy import inspect
-                    state = inspect(geracao)
-                    for attr in ['modo_ativacao_agente2', 'modulos_ativados_det', 'modulos_ativados_llm', 'curadoria_metadata']:
-                        if attr in state.dict:
-                            del state.dict[attr]
-                    db.add(geracao)
-                    db.flush()
-                    versao = VersaoPeca(
-                        geracao_id=geracao.id,
-                        numero_versao=1,
-                        conteudo=resultado_agente3.conteudo_markdown,
-                        origem='geracao_curada',
-                        descricao_alteracao='Versao inicial gerada com modulos curados pelo usuario',
-                        diff_anterior=None
-                    )
-                    db.add(versao)
-                    db.commit()
-                    db.refresh(geracao)
-                else:
-                    db.rollback()
-                    print(f"[CURADORIA] Erro ao salvar: {e}")
-                    raise
+                print(f"[CURADORIA] Erro ao salvar: {e}")
+                raise
 
             tracker.mark("db_save_done")
             tracker.mark("response_sent")
@@ -2978,9 +2913,8 @@ async def curation_generate_stream(
             perf_report = tracker.get_report()
 
             try:
-                log_request_perf(
+                await log_request_perf_async(
                     report=perf_report,
-                    db=db,
                     user_id=current_user.id,
                     username=current_user.username,
                     success=True
@@ -30,9 +30,11 @@ from sistemas.gerador_pecas.models_config_pecas import (
     get_codigos_por_categoria_json
 )
 from sistemas.gerador_pecas.services_source_resolver import invalidar_cache_source_resolver
+from utils.static_assets import asset_url
 
 router = APIRouter(prefix="/api/gerador-pecas/config", tags=["Config Peças"])
 templates = Jinja2Templates(directory="frontend/templates")
+templates.env.globals["asset_url"] = asset_url
 
 
 # ===========================================
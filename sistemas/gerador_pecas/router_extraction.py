@@ -3322,35 +3322,28 @@ async def listar_variaveis(
     """
     Lista todas as variáveis normalizadas do sistema.
 
-    OTIMIZADO: Usa JOINs e subqueries para evitar N+1 queries.
+    OTIMIZADO: Usa JOINs para evitar N+1 queries. Uso em prompts vem do
+    índice reverso de slugs, consultado apenas para os slugs da página.
     """
     from sqlalchemy import func as sql_func, case
     from sqlalchemy.orm import aliased
+    from sistemas.gerador_pecas.models_extraction import VariableSlugReference
+    from sistemas.gerador_pecas.services_slug_index import SlugReferenceIndex, ENTITY_PROMPT_MODULO
 
     # 1. QUERY PRINCIPAL com JOINs (evita N+1)
-    # Subquery para contar uso de variáveis em prompts
-    uso_subquery = db.query(
-        PromptVariableUsage.variable_slug,
-        sql_func.count(PromptVariableUsage.id).label('uso_count')
-    ).group_by(PromptVariableUsage.variable_slug).subquery()
-
     # Query principal com JOINs - agora inclui formato_json para verificação real
     query = db.query(
         ExtractionVariable,
         CategoriaResumoJSON.nome.label('categoria_nome'),
         CategoriaResumoJSON.formato_json.label('categoria_formato_json'),  # Para verificar se slug está no JSON
         ExtractionQuestion.ordem.label('pergunta_ordem'),
-        ExtractionQuestion.depends_on_variable.label('pergunta_depends_on'),
-        sql_func.coalesce(uso_subquery.c.uso_count, 0).label('uso_count')
+        ExtractionQuestion.depends_on_variable.label('pergunta_depends_on')
     ).outerjoin(
         CategoriaResumoJSON,
         ExtractionVariable.categoria_id == CategoriaResumoJSON.id
     ).outerjoin(
         ExtractionQuestion,
         ExtractionVariable.source_question_id == ExtractionQuestion.id
-    ).outerjoin(
-        uso_subquery,
-        ExtractionVariable.slug == uso_subquery.c.variable_slug
     )
 
     # Aplica filtros
@@ -3416,18 +3409,23 @@ async def listar_variaveis(
     for slug in deps_map:
         calcular_profundidade_local(slug)
 
-    # 3. PRÉ-CARREGAR NOMES DE PROMPTS QUE USAM VARIÁVEIS
-    # Busca todos os usos de variáveis com nomes dos prompts
+    # 3. PRÉ-CARREGAR USO E NOMES DE PROMPTS (somente slugs desta página)
     from admin.models_prompts import PromptModulo
     prompts_por_variavel = {}
+    slugs_pagina = [row[0].slug for row in resultados_query]
+
+    uso_por_slug = SlugReferenceIndex(db).contagem_por_slug(slugs_pagina, ENTITY_PROMPT_MODULO)
 
     usos_com_nomes = db.query(
-        PromptVariableUsage.variable_slug,
+        VariableSlugReference.slug.label('variable_slug'),
         PromptModulo.titulo
     ).join(
         PromptModulo,
-        PromptVariableUsage.prompt_id == PromptModulo.id
-    ).all()
+        VariableSlugReference.entity_id == PromptModulo.id
+    ).filter(
+        VariableSlugReference.entity_type == ENTITY_PROMPT_MODULO,
+        VariableSlugReference.slug.in_(slugs_pagina)
+    ).distinct().all() if slugs_pagina else []
 
     for uso in usos_com_nomes:
         slug = uso.variable_slug
@@ -3445,7 +3443,7 @@ async def listar_variaveis(
         categoria_formato_json = row.categoria_formato_json
         pergunta_ordem = row.pergunta_ordem
         pergunta_depends_on = row.pergunta_depends_on
-        uso_count = row.uso_count or 0
+        uso_count = uso_por_slug.get(v.slug, 0)
 
         # Determina dependência (prioriza pergunta sobre variável)
         is_conditional = v.is_conditional or False
@@ -0,0 +1,450 @@
+# sistemas/gerador_pecas/schema_resumo_json.py
+"""
+Saída estruturada para os resumos JSON do Agente 1.
+
+Compila o formato_json de cada categoria (FormatoResumo) em schemas nativos
+dos provedores e parseia a resposta de forma incremental:
+
+- json_schema_resumo(): JSON Schema neutro (usado na validação dos campos)
+- schema_resposta_gemini(): responseSchema do Gemini (subconjunto OpenAPI)
+- ParserJSONIncremental: consome os chunks do stream, valida cada campo de
+  primeiro nível assim que ele fecha e sinaliza quando o documento foi
+  marcado como irrelevante (o stream pode ser interrompido)
+
+PERFORMANCE: com o schema o modelo só emite JSON válido, então os reparos
+por regex (_corrigir_json_malformado/_reparar_json_truncado) e a segunda
+chamada de correção viram exceção. Os schemas são compilados uma vez por
+versão da categoria (FormatoResumo.versao = atualizado_em).
+
+Autor: LAB/PGE-MS
+"""
+
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CAMPO_IRRELEVANTE = "irrelevante"
+CAMPO_MOTIVO = "motivo"
+
+# Tipos do formato "tipado" ({"campo": {"type": "choice", "options": [...]}})
+_TIPOS_FORMATO = {
+    "text": "string",
+    "string": "string",
+    "date": "string",
+    "choice": "string",
+    "number": "number",
+    "currency": "number",
+    "integer": "integer",
+    "boolean": "boolean",
+    "list": "array",
+    "array": "array",
+    "object": "object",
+}
+
+# Formato "exemplo" ({"campo": "boolean - descrição"}): prefixo indica o tipo
+_PREFIXOS_BOOLEAN = ("boolean", "bool", "true ou false", "true/false")
+_PREFIXOS_NUMERO = ("number", "número", "numero", "integer", "inteiro", "decimal", "float")
+
+
+# ============================================
+# COMPILAÇÃO DOS SCHEMAS
+# ============================================
+
+def _anulavel(tipo: str, **extras) -> Dict[str, Any]:
+    schema = {"type": [tipo, "null"], **extras}
+    if "enum" in schema:
+        schema["enum"] = list(schema["enum"]) + [None]
+    return schema
+
+
+def _e_campo_tipado(valor: Any) -> bool:
+    return (
+        isinstance(valor, dict)
+        and isinstance(valor.get("type"), str)
+        and valor["type"].lower() in _TIPOS_FORMATO
+    )
+
+
+def _compilar_campo_tipado(config: Dict[str, Any]) -> Dict[str, Any]:
+    tipo_formato = config["type"].lower()
+    tipo = _TIPOS_FORMATO[tipo_formato]
+
+    if tipo_formato == "choice":
+        opcoes = [o for o in (config.get("options") or []) if isinstance(o, str)]
+        if opcoes:
+            return _anulavel("string", enum=opcoes)
+    if tipo == "array":
+        itens = config.get("items")
+        return _anulavel("array", items=_compilar_valor(itens) if itens is not None else {"type": "string"})
+    if tipo == "object":
+        return _compilar_valor(config.get("properties") or {})
+    return _anulavel(tipo)
+
+
+def _compilar_valor(valor: Any) -> Dict[str, Any]:
+    """Converte um valor de exemplo (ou campo tipado) em JSON Schema."""
+    if isinstance(valor, bool):
+        return _anulavel("boolean")
+    if isinstance(valor, (int, float)):
+        return _anulavel("number")
+    if isinstance(valor, str):
+        texto = valor.strip().lower()
+        if texto.startswith(_PREFIXOS_BOOLEAN):
+            return _anulavel("boolean")
+        if texto.startswith(_PREFIXOS_NUMERO):
+            return _anulavel("number")
+        # "a | b | null", "string ou null - descrição", datas etc.
+        return _anulavel("string")
+    if isinstance(valor, list):
+        itens = _compilar_valor(valor[0]) if valor else {"type": "string"}
+        return _anulavel("array", items=itens)
+    if _e_campo_tipado(valor):
+        return _compilar_campo_tipado(valor)
+    if isinstance(valor, dict) and valor:
+        return _anulavel("object", properties={k: _compilar_valor(v) for k, v in valor.items()})
+    # null ou objeto vazio: o Gemini não aceita OBJECT sem propriedades
+    return _anulavel("string")
+
+
+def _compilar_json_schema(formato_json: str) -> Optional[Dict[str, Any]]:
+    try:
+        estrutura = json.loads(formato_json)
+    except (TypeError, ValueError):
+        return None
+
+    if isinstance(estrutura, list) and estrutura and isinstance(estrutura[0], dict):
+        estrutura = estrutura[0]
+    if not isinstance(estrutura, dict) or not estrutura:
+        return None
+
+    # irrelevante/motivo primeiro: permite encerrar o stream logo no início
+    propriedades = {
+        CAMPO_IRRELEVANTE: {"type": "boolean"},
+        CAMPO_MOTIVO: _anulavel("string"),
+    }
+    for chave, valor in estrutura.items():
+        if chave not in propriedades:
+            propriedades[chave] = _compilar_valor(valor)
+
+    return {"type": "object", "properties": propriedades, "required": [CAMPO_IRRELEVANTE]}
+
+
+def _para_schema_gemini(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte JSON Schema no subconjunto OpenAPI aceito pelo responseSchema."""
+    tipo = schema.get("type", "string")
+    anulavel = False
+    if isinstance(tipo, list):
+        anulavel = "null" in tipo
+        tipo = next((t for t in tipo if t != "null"), "string")
+
+    saida: Dict[str, Any] = {"type": tipo.upper()}
+    if anulavel:
+        saida["nullable"] = True
+    if "enum" in schema:
+        saida["format"] = "enum"
+        saida["enum"] = [v for v in schema["enum"] if v is not None]
+    if tipo == "array":
+        saida["items"] = _para_schema_gemini(schema.get("items") or {"type": "string"})
+    if tipo == "object":
+        propriedades = schema.get("properties") or {}
+        saida["properties"] = {k: _para_schema_gemini(v) for k, v in propriedades.items()}
+        saida["propertyOrdering"] = list(propriedades)
+        if schema.get("required"):
+            saida["required"] = list(schema["required"])
+    return saida
+
+
+@lru_cache(maxsize=256)
+def _schema_compilado(
+    categoria_id: Optional[int],
+    versao: Optional[str],
+    formato_json: str,
+    provedor: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Compila e memoriza o schema de uma versão de categoria.
+
+    A chave inclui o formato_json para que FormatoResumo montados fora do
+    banco (testes de categoria, sem versão) nunca reaproveitem schema alheio.
+    Os dicts retornados são compartilhados: não devem ser modificados.
+    """
+    schema = _compilar_json_schema(formato_json)
+    if schema is None:
+        return None
+    if provedor == "gemini":
+        return _para_schema_gemini(schema)
+    return schema
+
+
+def _compilar_formato(formato: Any, provedor: str) -> Optional[Dict[str, Any]]:
+    if formato is None or not getattr(formato, "formato_json", None):
+        return None
+    return _schema_compilado(
+        formato.categoria_id,
+        getattr(formato, "versao", None),
+        formato.formato_json,
+        provedor
+    )
+
+
+def json_schema_resumo(formato: Any) -> Optional[Dict[str, Any]]:
+    """JSON Schema da resposta para um FormatoResumo (None se o formato não for JSON)."""
+    return _compilar_formato(formato, "json_schema")
+
+
+def schema_resposta_gemini(formato: Any) -> Optional[Dict[str, Any]]:
+    """responseSchema do Gemini para um FormatoResumo (None se o formato não for JSON)."""
+    return _compilar_formato(formato, "gemini")
+
+
+def limpar_cache_schemas() -> None:
+    """Descarta os schemas compilados (ex.: após edição em massa das categorias)."""
+    _schema_compilado.cache_clear()
+
+
+# ============================================
+# VALIDAÇÃO DE CAMPOS
+# ============================================
+
+def _tem_tipo(valor: Any, tipo: str) -> bool:
+    if tipo == "null":
+        return valor is None
+    if tipo == "boolean":
+        return isinstance(valor, bool)
+    if tipo == "integer":
+        return isinstance(valor, int) and not isinstance(valor, bool)
+    if tipo == "number":
+        return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+    if tipo == "string":
+        return isinstance(valor, str)
+    if tipo == "array":
+        return isinstance(valor, list)
+    if tipo == "object":
+        return isinstance(valor, dict)
+    return True
+
+
+def validar_valor(valor: Any, schema: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Valida um campo contra seu JSON Schema (tipo e opções).
+
+    Returns:
+        Descrição do problema ou None se válido
+    """
+    if not schema:
+        return None
+    tipos = schema.get("type")
+    tipos = tipos if isinstance(tipos, list) else [tipos]
+    tipos = [t for t in tipos if t]
+    if tipos and not any(_tem_tipo(valor, t) for t in tipos):
+        return f"esperado {'/'.join(tipos)}, recebido {type(valor).__name__}"
+    if "enum" in schema and valor not in schema["enum"]:
+        return f"valor fora das opções: {valor!r}"
+    return None
+
+
+# ============================================
+# PARSER INCREMENTAL
+# ============================================
+
+_ESPACOS = re.compile(r"[ \t\n\r]*")
+_INICIO_NUMERO = frozenset("-0123456789")
+_RESTO_NUMERO = re.compile(r"[0-9.eE+-]*")
+
+
+class ParserJSONIncremental:
+    """
+    Parser incremental do objeto JSON de primeiro nível da resposta.
+
+    Cada campo é decodificado (json.JSONDecoder.raw_decode) e validado assim
+    que seu valor fecha; valores ainda abertos só são reavaliados quando
+    chega um caractere que pode fechá-los. Texto antes do primeiro "{"
+    (ex.: cerca ```json) é ignorado.
+
+    Respostas fora do formato (array no topo, vírgula sobrando, truncamento)
+    não são reparadas aqui: finalizar() retorna erro e o chamador usa
+    parsear_resposta_json() como fallback.
+
+    Uso:
+        parser = ParserJSONIncremental(json_schema_resumo(formato))
+        async for chunk in stream:
+            parser.feed(chunk)
+            if parser.pode_encerrar:
+                break
+        json_dict, erro = parser.finalizar()
+    """
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        self._propriedades: Dict[str, Any] = (schema or {}).get("properties") or {}
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._estado = "inicio"
+        self._chave: Optional[str] = None
+        self._espera: Optional[str] = None
+        self.campos: Dict[str, Any] = {}
+        self.avisos: List[str] = []
+        self.irrelevante = False
+        self.completo = False
+        self.invalido = False
+
+    @property
+    def texto(self) -> str:
+        """Texto bruto recebido até agora."""
+        return self._buffer
+
+    @property
+    def truncado(self) -> bool:
+        """True quando a resposta parou no meio do objeto (stream interrompido ou limite de tokens)."""
+        return bool(self._buffer.strip()) and not (self.completo or self.pode_encerrar or self.invalido)
+
+    @property
+    def pode_encerrar(self) -> bool:
+        """True quando o documento foi marcado irrelevante e o motivo já chegou."""
+        return self.irrelevante and (CAMPO_MOTIVO in self.campos or self.completo)
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Consome um chunk da resposta.
+
+        Returns:
+            Chaves dos campos concluídos neste chunk
+        """
+        if not chunk:
+            return []
+        self._buffer += chunk
+        if self.completo or self.invalido:
+            return []
+        # Valor aberto (string/objeto/lista) só pode fechar com estes caracteres
+        if self._espera and not any(c in chunk for c in self._espera):
+            return []
+        self._espera = None
+        return self._avancar()
+
+    def _avancar(self) -> List[str]:
+        buffer = self._buffer
+        tamanho = len(buffer)
+        i = self._pos
+        concluidos = []
+
+        while True:
+            i = _ESPACOS.match(buffer, i).end()
+            if i >= tamanho:
+                break
+            c = buffer[i]
+            estado = self._estado
+
+            if estado == "inicio":
+                if c == "{":
+                    self._estado = "chave_ou_fim"
+                elif c == "[":
+                    self._marcar_invalido("array no primeiro nível")
+                    break
+                i += 1
+
+            elif estado in ("chave_ou_fim", "chave"):
+                if c == "}" and estado == "chave_ou_fim":
+                    self.completo = True
+                    i += 1
+                    break
+                if c != '"':
+                    self._marcar_invalido(f"esperava chave na posição {i}")
+                    break
+                try:
+                    chave, fim = self._decoder.raw_decode(buffer, i)
+                except json.JSONDecodeError:
+                    break
+                self._chave = chave
+                self._estado = "dois_pontos"
+                i = fim
+
+            elif estado == "dois_pontos":
+                if c != ":":
+                    self._marcar_invalido(f"esperava ':' na posição {i}")
+                    break
+                self._estado = "valor"
+                i += 1
+
+            elif estado == "valor":
+                try:
+                    valor, fim = self._decoder.raw_decode(buffer, i)
+                except json.JSONDecodeError:
+                    if c == '"':
+                        self._espera = '"'
+                    elif c in "{[":
+                        self._espera = "}]"
+                    break
+                # Número no fim do buffer pode continuar no próximo chunk ("12" -> "123", "1500." -> "1500.5")
+                if c in _INICIO_NUMERO and _RESTO_NUMERO.match(buffer, fim).end() >= tamanho:
+                    break
+                self._registrar(self._chave, valor)
+                concluidos.append(self._chave)
+                self._estado = "separador"
+                i = fim
+
+            elif estado == "separador":
+                if c == ",":
+                    self._estado = "chave"
+                    i += 1
+                elif c == "}":
+                    self.completo = True
+                    i += 1
+                    break
+                else:
+                    self._marcar_invalido(f"esperava ',' ou '}}' na posição {i}")
+                    break
+
+        self._pos = i
+        return concluidos
+
+    def _registrar(self, chave: str, valor: Any) -> None:
+        self.campos[chave] = valor
+        if chave == CAMPO_IRRELEVANTE and valor is True:
+            self.irrelevante = True
+        problema = validar_valor(valor, self._propriedades.get(chave))
+        if problema:
+            self.avisos.append(f"{chave}: {problema}")
+
+    def _marcar_invalido(self, motivo: str) -> None:
+        self.invalido = True
+        self.avisos.append(motivo)
+
+    def finalizar(self) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Resultado do parse incremental.
+
+        Returns:
+            Tupla (json_dict, erro) - erro é None se o objeto fechou
+            (ou se o stream foi encerrado cedo por irrelevância)
+        """
+        if self.avisos:
+            logger.warning(f"[JSON_SCHEMA] Campos fora do schema: {self.avisos[:5]}")
+        if self.completo or self.pode_encerrar:
+            return dict(self.campos), None
+        if not self._buffer.strip():
+            return {}, "Resposta vazia"
+        if self.invalido:
+            return {}, f"JSON fora do formato esperado: {self.avisos[-1]}"
+        return {}, "JSON incompleto (resposta truncada)"
+
+
+def parsear_resposta_estruturada(
+    resposta: str,
+    schema: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Parseia uma resposta completa: parser incremental e, se falhar,
+    os reparos de parsear_resposta_json().
+    """
+    parser = ParserJSONIncremental(schema)
+    parser.feed(resposta)
+    json_dict, erro = parser.finalizar()
+    if erro is None:
+        return json_dict, None
+
+    from sistemas.gerador_pecas.extrator_resumo_json import parsear_resposta_json
+    return parsear_resposta_json(resposta)
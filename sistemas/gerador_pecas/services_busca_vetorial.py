@@ -51,7 +51,8 @@ async def buscar_argumentos_vetorial(
     query: str,
     tipo_peca: Optional[str] = None,
     limit: int = 5,
-    threshold: float = 0.3
+    threshold: float = 0.3,
+    query_embedding: Optional[List[float]] = None
 ) -> List[Dict]:
     """
     Busca módulos de conteúdo usando similaridade vetorial.
@@ -62,6 +63,7 @@ async def buscar_argumentos_vetorial(
         tipo_peca: Tipo de peça atual (para contexto, não filtro)
         limit: Número máximo de resultados
         threshold: Similaridade mínima (0-1)
+        query_embedding: Embedding da query já calculado (evita nova chamada à API)
 
     Returns:
         Lista de módulos relevantes com score de similaridade
@@ -70,9 +72,10 @@ async def buscar_argumentos_vetorial(
     print(f"[BUSCA-VETORIAL] Tipo de peca: {tipo_peca or 'nao especificado'}")
     print(f"[BUSCA-VETORIAL] pgvector disponivel: {PGVECTOR_AVAILABLE}")
 
-    # Gera embedding da query
-    print(f"[BUSCA-VETORIAL] Gerando embedding da query...")
-    query_embedding = await generate_embedding_for_query(query)
+    # Gera embedding da query (ou reaproveita o do chamador)
+    if query_embedding is None:
+        print(f"[BUSCA-VETORIAL] Gerando embedding da query...")
+        query_embedding = await generate_embedding_for_query(query)
 
     if not query_embedding:
         print(f"[BUSCA-VETORIAL] [ERRO] Falha ao gerar embedding da query")
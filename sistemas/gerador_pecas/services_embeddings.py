@@ -30,7 +30,11 @@ logger = logging.getLogger(__name__)
 # Configuração da API (aceita vários nomes de variável)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_KEY")
 EMBEDDING_MODEL = "gemini-embedding-001"
-EMBEDDING_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{EMBEDDING_MODEL}:embedContent"
+EMBEDDING_BASE_URL = os.getenv(
+    "GEMINI_EMBEDDING_BASE_URL",
+    os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/models")
+)
+EMBEDDING_API_URL = f"{EMBEDDING_BASE_URL}/{EMBEDDING_MODEL}:embedContent"
 
 # Limites
 MAX_TEXT_LENGTH = 2048  # Limite recomendado para embeddings
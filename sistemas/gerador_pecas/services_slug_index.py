@@ -0,0 +1,277 @@
+# sistemas/gerador_pecas/services_slug_index.py
+"""
+Indice reverso de referencias a slugs de variaveis.
+
+PROBLEMA: renomeacao de slug e analise de impacto carregavam TODOS os
+PromptModulo, RegraDeterministicaTipoPeca, ExtractionVariable e
+ExtractionQuestion ativos e varriam regras JSON / dependency_config em Python
+para achar um unico slug. Cada rename tocava o catalogo inteiro.
+
+SOLUCAO: a tabela variable_slug_references guarda (slug -> entity_type,
+entity_id, location). Ela e mantida por um listener `after_flush` na mesma
+transacao em que as entidades sao salvas, de modo que o indice nunca diverge
+dos dados commitados. Consultas de rename/impacto buscam os ids no indice e
+carregam somente as linhas que realmente referenciam o slug.
+
+Campos indexados:
+- PromptModulo.regra_deterministica / regra_deterministica_secundaria
+- RegraDeterministicaTipoPeca.regra_deterministica
+- ExtractionVariable.depends_on_variable / dependency_config
+- ExtractionQuestion.depends_on_variable / dependency_config / nome_variavel_sugerido
+
+Reconstrucao completa (deploy inicial ou reparo):
+    python scripts/rebuild_slug_index.py
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func as sql_func
+from sqlalchemy.orm import Session
+
+from .models_extraction import ExtractionVariable, ExtractionQuestion, VariableSlugReference
+
+logger = logging.getLogger(__name__)
+
+
+# Tipos de entidade gravados em VariableSlugReference.entity_type
+ENTITY_PROMPT_MODULO = "prompt_modulo"
+ENTITY_REGRA_TIPO_PECA = "regra_tipo_peca"
+ENTITY_EXTRACTION_VARIABLE = "extraction_variable"
+ENTITY_EXTRACTION_QUESTION = "extraction_question"
+
+# Despacho por __tablename__ (evita importar admin.models_prompts aqui)
+_ENTITY_POR_TABELA = {
+    "prompt_modulos": ENTITY_PROMPT_MODULO,
+    "regra_deterministica_tipo_peca": ENTITY_REGRA_TIPO_PECA,
+    "extraction_variables": ENTITY_EXTRACTION_VARIABLE,
+    "extraction_questions": ENTITY_EXTRACTION_QUESTION,
+}
+
+
+# ============================================================================
+# EXTRACAO DE REFERENCIAS
+# ============================================================================
+
+def _refs_regra(regra: Any, path: str, refs: List[Tuple[str, str]]) -> None:
+    """Percorre a AST de uma regra deterministica coletando (slug, location)."""
+    if not regra or not isinstance(regra, dict):
+        return
+
+    tipo = regra.get("type")
+
+    if tipo == "condition":
+        variavel = regra.get("variable")
+        if variavel and isinstance(variavel, str):
+            refs.append((variavel, f"{path}.variable"))
+
+    elif tipo in ("and", "or"):
+        for i, cond in enumerate(regra.get("conditions") or []):
+            _refs_regra(cond, f"{path}.conditions[{i}]", refs)
+
+    elif tipo == "not":
+        # Aceita os dois formatos: {"condition": ...} e {"conditions": [...]}
+        if "condition" in regra:
+            _refs_regra(regra.get("condition"), f"{path}.condition", refs)
+        for i, cond in enumerate(regra.get("conditions") or []):
+            _refs_regra(cond, f"{path}.conditions[{i}]", refs)
+
+
+def _refs_dependency_config(config: Any, path: str, refs: List[Tuple[str, str]]) -> None:
+    """Coleta referencias em dependency_config (campo 'variable' e 'conditions' aninhadas)."""
+    if not config or not isinstance(config, dict):
+        return
+
+    variavel = config.get("variable")
+    if variavel and isinstance(variavel, str):
+        refs.append((variavel, f"{path}.variable"))
+
+    conditions = config.get("conditions")
+    if isinstance(conditions, list):
+        for i, cond in enumerate(conditions):
+            _refs_dependency_config(cond, f"{path}.conditions[{i}]", refs)
+
+
+def extrair_referencias(obj: Any) -> List[Tuple[str, str]]:
+    """
+    Extrai as referencias a slugs de uma entidade indexavel.
+
+    Returns:
+        Lista de (slug, location) sem duplicatas
+    """
+    entity_type = _ENTITY_POR_TABELA.get(getattr(obj, "__tablename__", None))
+    refs: List[Tuple[str, str]] = []
+
+    if entity_type == ENTITY_PROMPT_MODULO:
+        _refs_regra(obj.regra_deterministica, "regra_deterministica", refs)
+        _refs_regra(obj.regra_deterministica_secundaria, "regra_deterministica_secundaria", refs)
+
+    elif entity_type == ENTITY_REGRA_TIPO_PECA:
+        _refs_regra(obj.regra_deterministica, "regra_deterministica", refs)
+
+    elif entity_type in (ENTITY_EXTRACTION_VARIABLE, ENTITY_EXTRACTION_QUESTION):
+        if obj.depends_on_variable:
+            refs.append((obj.depends_on_variable, "depends_on_variable"))
+        _refs_dependency_config(obj.dependency_config, "dependency_config", refs)
+        if entity_type == ENTITY_EXTRACTION_QUESTION and obj.nome_variavel_sugerido:
+            refs.append((obj.nome_variavel_sugerido, "nome_variavel_sugerido"))
+
+    # Remove duplicatas preservando a ordem
+    vistos: Set[Tuple[str, str]] = set()
+    unicos = []
+    for ref in refs:
+        if ref not in vistos:
+            vistos.add(ref)
+            unicos.append(ref)
+    return unicos
+
+
+# ============================================================================
+# MANUTENCAO DO INDICE
+# ============================================================================
+
+_TABELA_INDICE = VariableSlugReference.__table__
+
+
+def _reindexar_linhas(conn, entity_type: str, objs: Iterable[Any]) -> None:
+    """Substitui as linhas do indice das entidades informadas (Core, sem ORM)."""
+    objs = [o for o in objs if o.id is not None]
+    if not objs:
+        return
+
+    ids = [o.id for o in objs]
+    conn.execute(
+        _TABELA_INDICE.delete().where(
+            _TABELA_INDICE.c.entity_type == entity_type,
+            _TABELA_INDICE.c.entity_id.in_(ids)
+        )
+    )
+
+    linhas = [
+        {"slug": slug, "entity_type": entity_type, "entity_id": o.id, "location": location}
+        for o in objs
+        for slug, location in extrair_referencias(o)
+    ]
+    if linhas:
+        conn.execute(_TABELA_INDICE.insert(), linhas)
+
+
+def _remover_linhas(conn, entity_type: str, ids: List[int]) -> None:
+    if ids:
+        conn.execute(
+            _TABELA_INDICE.delete().where(
+                _TABELA_INDICE.c.entity_type == entity_type,
+                _TABELA_INDICE.c.entity_id.in_(ids)
+            )
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _manter_indice_after_flush(session: Session, flush_context) -> None:
+    """
+    Mantem o indice na mesma transacao do flush.
+
+    Entidades novas ou alteradas sao reindexadas; entidades removidas tem
+    suas linhas apagadas. Sessoes que nao tocam entidades indexaveis nao
+    executam nenhuma query.
+    """
+    alterados: Dict[str, list] = {}
+    removidos: Dict[str, list] = {}
+
+    for obj in list(session.new) + list(session.dirty):
+        entity_type = _ENTITY_POR_TABELA.get(getattr(obj, "__tablename__", None))
+        if entity_type:
+            alterados.setdefault(entity_type, []).append(obj)
+
+    for obj in session.deleted:
+        entity_type = _ENTITY_POR_TABELA.get(getattr(obj, "__tablename__", None))
+        if entity_type and obj.id is not None:
+            removidos.setdefault(entity_type, []).append(obj.id)
+
+    if not alterados and not removidos:
+        return
+
+    conn = session.connection()
+    for entity_type, ids in removidos.items():
+        _remover_linhas(conn, entity_type, ids)
+    for entity_type, objs in alterados.items():
+        _reindexar_linhas(conn, entity_type, objs)
+
+
+class SlugReferenceIndex:
+    """
+    Consulta e reconstrucao do indice reverso de slugs.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def buscar_ids(
+        self,
+        slug: str,
+        entity_type: str,
+        location_prefix: Optional[str] = None
+    ) -> List[int]:
+        """
+        Retorna os ids das entidades do tipo informado que referenciam o slug.
+
+        Args:
+            slug: Slug procurado
+            entity_type: Um dos ENTITY_*
+            location_prefix: Restringe a um campo (ex: "dependency_config")
+        """
+        query = self.db.query(VariableSlugReference.entity_id).filter(
+            VariableSlugReference.slug == slug,
+            VariableSlugReference.entity_type == entity_type
+        )
+        if location_prefix:
+            query = query.filter(VariableSlugReference.location.like(f"{location_prefix}%"))
+        return sorted({row.entity_id for row in query.distinct().all()})
+
+    def contagem_por_slug(self, slugs: Iterable[str], entity_type: str) -> Dict[str, int]:
+        """Conta entidades distintas que referenciam cada slug (uma unica query)."""
+        slugs = list(set(slugs))
+        if not slugs:
+            return {}
+        rows = self.db.query(
+            VariableSlugReference.slug,
+            sql_func.count(sql_func.distinct(VariableSlugReference.entity_id))
+        ).filter(
+            VariableSlugReference.slug.in_(slugs),
+            VariableSlugReference.entity_type == entity_type
+        ).group_by(VariableSlugReference.slug).all()
+        return {slug: count for slug, count in rows}
+
+    def reindexar(self, obj: Any) -> None:
+        """Reindexa uma entidade imediatamente (normalmente feito pelo listener)."""
+        entity_type = _ENTITY_POR_TABELA.get(getattr(obj, "__tablename__", None))
+        if entity_type:
+            _reindexar_linhas(self.db.connection(), entity_type, [obj])
+
+    def reconstruir(self, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Reconstroi o indice inteiro a partir das entidades.
+
+        Returns:
+            Dict entity_type -> quantidade de referencias gravadas
+        """
+        from admin.models_prompts import PromptModulo, RegraDeterministicaTipoPeca
+
+        conn = self.db.connection()
+        conn.execute(_TABELA_INDICE.delete())
+
+        totais: Dict[str, int] = {}
+        modelos = [
+            (ENTITY_PROMPT_MODULO, PromptModulo),
+            (ENTITY_REGRA_TIPO_PECA, RegraDeterministicaTipoPeca),
+            (ENTITY_EXTRACTION_VARIABLE, ExtractionVariable),
+            (ENTITY_EXTRACTION_QUESTION, ExtractionQuestion),
+        ]
+        for entity_type, modelo in modelos:
+            objs = self.db.query(modelo).order_by(modelo.id).all()
+            for i in range(0, len(objs), batch_size):
+                _reindexar_linhas(conn, entity_type, objs[i:i + batch_size])
+            totais[entity_type] = sum(len(extrair_referencias(o)) for o in objs)
+
+        logger.info(f"[SLUG-INDEX] Indice reconstruido: {totais}")
+        return totais
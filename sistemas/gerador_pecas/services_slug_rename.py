@@ -13,6 +13,10 @@ garantindo que todas as referencias sejam atualizadas atomicamente:
 - PromptVariableUsage.variable_slug
 - ExtractionVariable.depends_on_variable
 - ExtractionQuestion.depends_on_variable
+
+PERFORMANCE: As entidades a reescrever sao localizadas pelo indice reverso
+de slugs (services_slug_index), carregando apenas as linhas que referenciam
+o slug em vez do catalogo inteiro.
 """
 
 import json
@@ -22,9 +26,17 @@ import unicodedata
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from datetime import datetime
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from .models_extraction import ExtractionVariable, ExtractionQuestion, PromptVariableUsage
+from .services_slug_index import (
+    SlugReferenceIndex,
+    ENTITY_PROMPT_MODULO,
+    ENTITY_REGRA_TIPO_PECA,
+    ENTITY_EXTRACTION_VARIABLE,
+    ENTITY_EXTRACTION_QUESTION,
+)
 from .models_resumo_json import CategoriaResumoJSON
 
 logger = logging.getLogger(__name__)
@@ -61,6 +73,7 @@ class SlugRenameService:
 
     def __init__(self, db: Session):
         self.db = db
+        self.indice = SlugReferenceIndex(db)
 
     def _normalizar_slug(self, texto: str) -> str:
         """
@@ -209,10 +222,12 @@ class SlugRenameService:
         """Propaga renomeacao para prompts modulares"""
         from admin.models_prompts import PromptModulo, RegraDeterministicaTipoPeca
 
-        # Busca todos os prompts que podem ter regras usando este slug
+        # Busca apenas os prompts que o indice aponta como referenciando o slug
+        prompt_ids = self.indice.buscar_ids(old_slug, ENTITY_PROMPT_MODULO)
         prompts = self.db.query(PromptModulo).filter(
+            PromptModulo.id.in_(prompt_ids),
             PromptModulo.ativo == True
-        ).all()
+        ).all() if prompt_ids else []
 
         for prompt in prompts:
             atualizado = False
@@ -242,9 +257,11 @@ class SlugRenameService:
                 logger.info(f"[SLUG-RENAME] Prompt {prompt.id} atualizado: {old_slug} -> {new_slug}")
 
         # Atualiza regras por tipo de peca
+        regra_ids = self.indice.buscar_ids(old_slug, ENTITY_REGRA_TIPO_PECA)
         regras_tipo_peca = self.db.query(RegraDeterministicaTipoPeca).filter(
+            RegraDeterministicaTipoPeca.id.in_(regra_ids),
             RegraDeterministicaTipoPeca.ativo == True
-        ).all()
+        ).all() if regra_ids else []
 
         for regra in regras_tipo_peca:
             if regra.regra_deterministica:
@@ -357,12 +374,14 @@ class SlugRenameService:
 
         Casos onde depends_on_variable pode ser diferente mas o slug aparece em conditions.
         """
-        # Busca variaveis com dependency_config que pode conter o slug
-        # Nota: Busca por LIKE no JSON (funciona para SQLite e PostgreSQL)
+        # Busca no indice as variaveis cujo dependency_config referencia o slug
+        variavel_ids = self.indice.buscar_ids(
+            old_slug, ENTITY_EXTRACTION_VARIABLE, location_prefix="dependency_config"
+        )
         variaveis_com_config = self.db.query(ExtractionVariable).filter(
-            ExtractionVariable.dependency_config.isnot(None),
-            ExtractionVariable.depends_on_variable != old_slug  # Ja processamos acima
-        ).all()
+            ExtractionVariable.id.in_(variavel_ids),
+            or_(ExtractionVariable.depends_on_variable.is_(None), ExtractionVariable.depends_on_variable != old_slug)  # Ja processamos acima
+        ).all() if variavel_ids else []
 
         for var in variaveis_com_config:
             if var.dependency_config:
@@ -376,11 +395,14 @@ class SlugRenameService:
                         var.atualizado_em = datetime.utcnow()
                         logger.info(f"[SLUG-RENAME] dependency_config de variavel {var.id} atualizado")
 
-        # Busca perguntas com dependency_config complexo
+        # Busca no indice as perguntas com dependency_config complexo
+        pergunta_ids = self.indice.buscar_ids(
+            old_slug, ENTITY_EXTRACTION_QUESTION, location_prefix="dependency_config"
+        )
         perguntas_com_config = self.db.query(ExtractionQuestion).filter(
-            ExtractionQuestion.dependency_config.isnot(None),
-            ExtractionQuestion.depends_on_variable != old_slug  # Ja processamos acima
-        ).all()
+            ExtractionQuestion.id.in_(pergunta_ids),
+            or_(ExtractionQuestion.depends_on_variable.is_(None), ExtractionQuestion.depends_on_variable != old_slug)  # Ja processamos acima
+        ).all() if pergunta_ids else []
 
         for perg in perguntas_com_config:
             if perg.dependency_config:
@@ -583,10 +605,14 @@ class SlugConsistencyChecker:
         prompts_usando = []
         regras_tipo_peca_usando = []
 
-        # Verifica PromptModulo
+        indice = SlugReferenceIndex(self.db)
+
+        # Verifica PromptModulo (apenas os candidatos apontados pelo indice)
+        prompt_ids = indice.buscar_ids(slug, ENTITY_PROMPT_MODULO)
         prompts = self.db.query(PromptModulo).filter(
+            PromptModulo.id.in_(prompt_ids),
             PromptModulo.ativo == True
-        ).all()
+        ).all() if prompt_ids else []
 
         for prompt in prompts:
             usa_slug = False
@@ -609,9 +635,11 @@ class SlugConsistencyChecker:
                 })
 
         # Verifica RegraDeterministicaTipoPeca
+        regra_ids = indice.buscar_ids(slug, ENTITY_REGRA_TIPO_PECA)
         regras = self.db.query(RegraDeterministicaTipoPeca).filter(
+            RegraDeterministicaTipoPeca.id.in_(regra_ids),
             RegraDeterministicaTipoPeca.ativo == True
-        ).all()
+        ).all() if regra_ids else []
 
         for regra in regras:
             if regra.regra_deterministica and self._regra_usa_slug(regra.regra_deterministica, slug):
@@ -0,0 +1,458 @@
+# sistemas/gerador_pecas/services_visualizador_autos.py
+"""
+Serviço do visualizador de autos (/autos/{numero_cnj}).
+
+PERFORMANCE: cada abertura do visualizador consultava o TJ-MS duas vezes
+(listagem e download) e mesclava os PDFs com PyMuPDF dentro do event loop;
+o PDF inteiro era devolvido em um único bloco, sem suporte a Range, e reabrir
+o mesmo documento repetia tudo. Aqui:
+
+- A listagem (XML do processo) fica em cache com TTL curto
+- Os PDFs mesclados ficam em disco, indexados por (CNJ, ids na ordem do
+  merge), em um LRU limitado por bytes, com ETag (SHA-256 do conteúdo) e
+  Last-Modified
+- Downloads simultâneos da mesma chave compartilham uma única requisição
+- Parse do XML, decodificação base64 e merge rodam em asyncio.to_thread
+- A resposta atende `Range` (206/416), `If-None-Match`/`If-Modified-Since`
+  (304) e é lida do disco em blocos, para o PDF.js buscar páginas sob demanda
+
+Uso:
+    docs = await listar_documentos_tjms(cnj)
+    resposta = await cache_pdfs_autos.responder(cnj, ["101", "102"], request.headers, "doc_101.pdf")
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import aiohttp
+import fitz  # PyMuPDF
+from fastapi.responses import Response, StreamingResponse
+
+from sistemas.gerador_pecas.agente_tjms import (
+    DocumentoTJMS,
+    baixar_documentos_async,
+    consultar_processo_async,
+    extrair_documentos_xml,
+)
+from utils.cache import TTLCache
+from utils.pymupdf_lock import pymupdf_lock
+
+logger = logging.getLogger(__name__)
+
+# Listagem: o processo pode receber juntadas novas, então o TTL é curto
+TTL_LISTAGEM_S = 120
+
+# PDFs mesclados: documentos juntados não mudam; limite só por espaço em disco
+MAX_BYTES_PDFS = 512 * 1024 * 1024
+DIRETORIO_PDFS = os.path.join(tempfile.gettempdir(), "pge_visualizador_autos")
+
+# Arquivos de execuções anteriores (fora do índice em memória) são removidos
+IDADE_MAXIMA_ORFAO_S = 6 * 3600
+
+TAMANHO_BLOCO = 64 * 1024
+CACHE_CONTROL_PDF = "private, max-age=3600"
+
+ChavePDF = Tuple[str, Tuple[str, ...]]
+
+
+async def _unico_em_voo(em_voo: Dict, chave, fabrica: Callable[[], Awaitable]):
+    """Executa fabrica() uma única vez por chave enquanto houver requisição em andamento."""
+    tarefa = em_voo.get(chave)
+    if tarefa is None:
+        tarefa = asyncio.ensure_future(fabrica())
+        em_voo[chave] = tarefa
+
+        def _liberar(concluida, chave=chave):
+            if em_voo.get(chave) is concluida:
+                del em_voo[chave]
+
+        tarefa.add_done_callback(_liberar)
+    # shield: um cliente que desiste não cancela o download dos demais
+    return await asyncio.shield(tarefa)
+
+
+# =========================
+# Listagem
+# =========================
+
+_listagens = TTLCache(default_ttl=TTL_LISTAGEM_S, max_size=200)
+_listagens_em_voo: Dict[str, asyncio.Future] = {}
+
+
+async def _consultar_documentos(cnj: str) -> List[DocumentoTJMS]:
+    async with aiohttp.ClientSession() as session:
+        xml_response = await consultar_processo_async(session, cnj)
+    docs = await asyncio.to_thread(extrair_documentos_xml, xml_response)
+    _listagens.set(cnj, value=docs)
+    return docs
+
+
+async def listar_documentos_tjms(cnj: str) -> List[DocumentoTJMS]:
+    """Documentos do processo no TJ-MS (cache de TTL_LISTAGEM_S segundos)."""
+    docs = _listagens.get(cnj)
+    if docs is not None:
+        return docs
+    return await _unico_em_voo(_listagens_em_voo, cnj, lambda: _consultar_documentos(cnj))
+
+
+def invalidar_listagem(cnj: str) -> None:
+    _listagens.invalidate(cnj)
+
+
+# =========================
+# Extração e merge
+# =========================
+
+def extrair_pdfs_xml(xml_response: str, lista_ids: Sequence[str]) -> List[Tuple[str, bytes]]:
+    """PDFs (id, bytes) do XML de download, na ordem de lista_ids."""
+    procurados = set(lista_ids)
+    pdfs = []
+    for elem in ET.fromstring(xml_response).iter():
+        tag_no_ns = elem.tag.split('}')[-1].lower() if '}' in elem.tag else elem.tag.lower()
+        if tag_no_ns != 'documento':
+            continue
+        doc_id = elem.attrib.get("idDocumento") or elem.attrib.get("id")
+        if doc_id not in procurados:
+            continue
+
+        conteudo_base64 = elem.attrib.get("conteudo")
+        if not conteudo_base64:
+            for child in elem:
+                if child.tag.split('}')[-1].lower() == 'conteudo' and child.text:
+                    conteudo_base64 = child.text.strip()
+                    break
+        if conteudo_base64:
+            pdfs.append((doc_id, base64.b64decode(conteudo_base64)))
+
+    ordem = {doc_id: i for i, doc_id in enumerate(lista_ids)}
+    pdfs.sort(key=lambda item: ordem.get(item[0], len(ordem)))
+    return pdfs
+
+
+def mesclar_pdfs(pdfs: Sequence[Tuple[str, bytes]]) -> bytes:
+    """Mescla os PDFs com PyMuPDF; um único PDF é devolvido sem alteração."""
+    if len(pdfs) == 1:
+        return pdfs[0][1]
+
+    with pymupdf_lock:
+        mesclado = fitz.open()
+        try:
+            for doc_id, pdf_data in pdfs:
+                try:
+                    with fitz.open(stream=pdf_data, filetype="pdf") as pdf_doc:
+                        mesclado.insert_pdf(pdf_doc)
+                except Exception as e:
+                    logger.warning(f"Erro ao processar PDF {doc_id}: {e}")
+            return mesclado.tobytes(garbage=1)
+        finally:
+            mesclado.close()
+
+
+def montar_pdf(xml_response: str, lista_ids: Sequence[str]) -> Optional[bytes]:
+    """XML de download -> PDF final (None quando nenhum documento veio)."""
+    pdfs = extrair_pdfs_xml(xml_response, lista_ids)
+    if not pdfs:
+        return None
+    return mesclar_pdfs(pdfs)
+
+
+async def _baixar_xml_tjms(cnj: str, lista_ids: List[str]) -> str:
+    async with aiohttp.ClientSession() as session:
+        return await baixar_documentos_async(session, cnj, lista_ids)
+
+
+# =========================
+# Cache dos PDFs em disco
+# =========================
+
+@dataclass(frozen=True)
+class PDFAutos:
+    """PDF mesclado guardado em disco."""
+    caminho: str
+    tamanho: int
+    etag: str
+    modificado_em: float
+
+
+class CachePDFsAutos:
+    """LRU de PDFs mesclados em disco, limitado pelo total de bytes."""
+
+    def __init__(self, diretorio: str = DIRETORIO_PDFS, max_bytes: int = MAX_BYTES_PDFS):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self._itens: "OrderedDict[ChavePDF, PDFAutos]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._em_voo: Dict[ChavePDF, asyncio.Future] = {}
+        self._diretorio_pronto = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def chave(cnj: str, lista_ids: Sequence[str]) -> ChavePDF:
+        # O merge segue a ordem pedida: outra ordem é outro PDF
+        return cnj, tuple(dict.fromkeys(lista_ids))
+
+    def get(self, chave: ChavePDF) -> Optional[PDFAutos]:
+        with self._lock:
+            pdf = self._itens.get(chave)
+            if pdf is not None and not os.path.exists(pdf.caminho):
+                # Removido por fora (limpeza do /tmp)
+                self._remover(chave)
+                pdf = None
+            if pdf is None:
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return pdf
+
+    def guardar(self, chave: ChavePDF, pdf_bytes: bytes) -> PDFAutos:
+        """Grava o PDF (escrita atômica) e aplica o limite de bytes."""
+        self._preparar_diretorio()
+        nome = hashlib.sha256(repr(chave).encode("utf-8")).hexdigest()
+        caminho = os.path.join(self.diretorio, f"{nome}.pdf")
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(temporario, caminho)
+
+        pdf = PDFAutos(
+            caminho=caminho,
+            tamanho=len(pdf_bytes),
+            etag=f'"{hashlib.sha256(pdf_bytes).hexdigest()[:32]}"',
+            modificado_em=os.path.getmtime(caminho),
+        )
+        with self._lock:
+            self._remover(chave, apagar=False)
+            self._itens[chave] = pdf
+            self._bytes += pdf.tamanho
+            while self._bytes > self.max_bytes and len(self._itens) > 1:
+                self._remover(next(iter(self._itens)))
+        return pdf
+
+    def _remover(self, chave: ChavePDF, apagar: bool = True) -> None:
+        """Remove do índice (e do disco). Deve ser chamado com lock."""
+        pdf = self._itens.pop(chave, None)
+        if pdf is None:
+            return
+        self._bytes -= pdf.tamanho
+        if apagar:
+            # Respostas em andamento mantêm o arquivo aberto (POSIX)
+            try:
+                os.remove(pdf.caminho)
+            except OSError:
+                pass
+
+    def _preparar_diretorio(self) -> None:
+        if self._diretorio_pronto:
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        limite = time.time() - IDADE_MAXIMA_ORFAO_S
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                if os.path.getmtime(caminho) < limite:
+                    os.remove(caminho)
+            except OSError:
+                pass
+        self._diretorio_pronto = True
+
+    async def obter(
+        self,
+        cnj: str,
+        lista_ids: Sequence[str],
+        baixar: Callable[[str, List[str]], Awaitable[str]] = _baixar_xml_tjms
+    ) -> Optional[PDFAutos]:
+        """
+        PDF mesclado dos documentos, baixando do TJ-MS só quando não está em cache.
+
+        Returns:
+            PDFAutos ou None quando o TJ-MS não retornou nenhum dos documentos
+        """
+        chave = self.chave(cnj, lista_ids)
+        pdf = self.get(chave)
+        if pdf is not None:
+            return pdf
+
+        ids = list(chave[1])
+
+        async def _carregar() -> Optional[PDFAutos]:
+            xml_response = await baixar(cnj, ids)
+            return await asyncio.to_thread(self._montar_e_guardar, chave, xml_response, ids)
+
+        return await _unico_em_voo(self._em_voo, chave, _carregar)
+
+    async def responder(
+        self,
+        cnj: str,
+        lista_ids: Sequence[str],
+        request_headers,
+        nome_arquivo: str,
+        baixar: Callable[[str, List[str]], Awaitable[str]] = _baixar_xml_tjms
+    ) -> Optional[Response]:
+        """
+        obter() + resposta_pdf(), remontando o PDF se o arquivo sumir entre os dois
+        (despejado por outra requisição ou pela limpeza do /tmp).
+
+        Returns:
+            Response ou None quando o TJ-MS não retornou nenhum dos documentos
+        """
+        pdf = await self.obter(cnj, lista_ids, baixar)
+        if pdf is None:
+            return None
+        try:
+            return resposta_pdf(pdf, request_headers, nome_arquivo)
+        except FileNotFoundError:
+            logger.info(f"PDF dos autos removido do disco antes da resposta; remontando ({cnj})")
+            chave = self.chave(cnj, lista_ids)
+            with self._lock:
+                if self._itens.get(chave) is pdf:
+                    self._remover(chave, apagar=False)
+            pdf = await self.obter(cnj, lista_ids, baixar)
+            return resposta_pdf(pdf, request_headers, nome_arquivo) if pdf is not None else None
+
+    def _montar_e_guardar(self, chave: ChavePDF, xml_response: str, lista_ids: List[str]) -> Optional[PDFAutos]:
+        pdf_bytes = montar_pdf(xml_response, lista_ids)
+        if pdf_bytes is None:
+            return None
+        return self.guardar(chave, pdf_bytes)
+
+    def limpar(self) -> None:
+        with self._lock:
+            for chave in list(self._itens):
+                self._remover(chave)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"itens": len(self._itens), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+cache_pdfs_autos = CachePDFsAutos()
+
+
+# =========================
+# Resposta HTTP
+# =========================
+
+class FaixaInvalida(ValueError):
+    """Range fora do tamanho do arquivo (416)."""
+
+
+def interpretar_range(valor: Optional[str], tamanho: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta o header Range (RFC 9110) para um único intervalo.
+
+    Returns:
+        (início, fim) inclusivos, ou None para servir o arquivo inteiro
+        (sem Range, unidade desconhecida, sintaxe inválida ou múltiplos intervalos)
+
+    Raises:
+        FaixaInvalida: intervalo sintaticamente válido, mas não satisfazível
+    """
+    if not valor or not valor.strip().lower().startswith("bytes="):
+        return None
+    especificacao = valor.strip()[6:].strip()
+    if "," in especificacao:
+        return None
+
+    inicio_txt, separador, fim_txt = especificacao.partition("-")
+    inicio_txt, fim_txt = inicio_txt.strip(), fim_txt.strip()
+    if not separador or not (inicio_txt.isdigit() or fim_txt.isdigit()):
+        return None
+    if (inicio_txt and not inicio_txt.isdigit()) or (fim_txt and not fim_txt.isdigit()):
+        return None
+
+    if not inicio_txt:
+        # Sufixo: últimos N bytes
+        sufixo = int(fim_txt)
+        if sufixo == 0 or tamanho == 0:
+            raise FaixaInvalida(valor)
+        return max(0, tamanho - sufixo), tamanho - 1
+
+    inicio = int(inicio_txt)
+    fim = int(fim_txt) if fim_txt else tamanho - 1
+    if fim_txt and fim < inicio:
+        return None
+    if inicio >= tamanho:
+        raise FaixaInvalida(valor)
+    return inicio, min(fim, tamanho - 1)
+
+
+def _nao_modificado(pdf: PDFAutos, request_headers) -> bool:
+    """If-None-Match pelo ETag, senão If-Modified-Since (mesma regra do StaticFiles)."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        return pdf.etag in [tag.strip(" W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    return bool(if_modified_since and if_modified_since >= parsedate(formatdate(pdf.modificado_em, usegmt=True)))
+
+
+def _ler_arquivo(arquivo, inicio: int, fim: int) -> Iterator[bytes]:
+    """Lê [inicio, fim] em blocos (executado no threadpool pelo StreamingResponse)."""
+    try:
+        arquivo.seek(inicio)
+        restante = fim - inicio + 1
+        while restante > 0:
+            bloco = arquivo.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+    finally:
+        arquivo.close()
+
+
+def resposta_pdf(pdf: PDFAutos, request_headers, nome_arquivo: str) -> Response:
+    """Resposta inline do PDF com ETag/Last-Modified, 304 e Range (206/416)."""
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": pdf.etag,
+        "Last-Modified": formatdate(pdf.modificado_em, usegmt=True),
+        "Cache-Control": CACHE_CONTROL_PDF,
+    }
+    if _nao_modificado(pdf, request_headers):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = f"inline; filename={nome_arquivo}"
+    valor_range = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if if_range and if_range.strip() not in (pdf.etag, headers["Last-Modified"]):
+        # Representação mudou desde o primeiro pedaço: envia o arquivo inteiro
+        valor_range = None
+
+    try:
+        faixa = interpretar_range(valor_range, pdf.tamanho)
+    except FaixaInvalida:
+        headers["Content-Range"] = f"bytes */{pdf.tamanho}"
+        return Response(status_code=416, headers=headers)
+
+    inicio, fim = faixa if faixa else (0, pdf.tamanho - 1)
+    headers["Content-Length"] = str(fim - inicio + 1)
+    status_code = 200
+    if faixa:
+        headers["Content-Range"] = f"bytes {inicio}-{fim}/{pdf.tamanho}"
+        status_code = 206
+
+    # Abre já aqui: o arquivo pode sair do cache enquanto a resposta é enviada
+    arquivo = open(pdf.caminho, "rb")
+    return StreamingResponse(
+        _ler_arquivo(arquivo, inicio, fim),
+        status_code=status_code,
+        media_type="application/pdf",
+        headers=headers,
+    )
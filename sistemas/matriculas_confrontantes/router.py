@@ -24,6 +24,7 @@ from auth.dependencies import get_current_active_user, get_current_user_from_tok
 from auth.models import User
 from utils.security_sanitizer import validate_file_signature # SECURITY: Magic numbers
 from utils.rate_limit import limit_ai_request, limit_upload, limit_export, limit_default
+from utils.llm_admission import prioridade_llm, PRIORIDADE_LOTE
 from config import UPLOAD_FOLDER, ALLOWED_EXTENSIONS, DEFAULT_MODEL, FULL_REPORT_MODEL
 
 from sistemas.matriculas_confrontantes.models import Analise, Registro, LogSistema, FeedbackMatricula, GrupoAnalise, ArquivoUpload
@@ -629,10 +630,11 @@ def run_batch_analysis_task(grupo_id: int, file_ids: List[str], file_paths: List
     from database.connection import SessionLocal
     from admin.models import ConfiguracaoIA
     from sistemas.matriculas_confrontantes.services_ia import (
-        pdf_to_images, image_to_base64, call_openrouter_vision, 
+        call_openrouter_vision, 
         get_system_prompt, get_analysis_prompt, clean_json_response,
         get_config_from_db
     )
+    from sistemas.matriculas_confrontantes.services_render import EXTENSOES_IMAGEM, iterar_paginas
     import logging
     logger = logging.getLogger("matriculas_batch_task")
     
@@ -660,22 +662,13 @@ def run_batch_analysis_task(grupo_id: int, file_ids: List[str], file_paths: List
             
             ext = os.path.splitext(file_path.lower())[1]
             
-            if ext == ".pdf":
-                from PIL import Image
-                images = pdf_to_images(file_path, max_pages=None)
-            elif ext in [".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp"]:
-                from PIL import Image
-                images = [Image.open(file_path)]
-            else:
+            if ext != ".pdf" and ext not in EXTENSOES_IMAGEM:
                 logger.warning(f"Formato não suportado: {ext}")
                 continue
             
+            # PERFORMANCE: páginas renderizadas em streaming, já codificadas
             start_page = len(all_images_b64)
-            for img in images:
-                if img and hasattr(img, 'size'):
-                    b64 = image_to_base64(img, max_size=1536)
-                    if b64:
-                        all_images_b64.append(b64)
+            all_images_b64.extend(iterar_paginas(file_path, max_pages=None))
             
             file_page_map[file_id] = {
                 "start": start_page,
@@ -719,16 +712,17 @@ INSTRUÇÕES ESPECIAIS PARA ANÁLISE EM LOTE:
         max_tokens = int(get_config_from_db("matriculas", "max_tokens_analise") or "100000")
         modelo_analise = get_config_from_db("matriculas", "modelo_analise") or model
         
-        # Faz chamada à IA com todas as imagens
-        data = call_openrouter_vision(
-            model=modelo_analise,
-            system_prompt=system_prompt,
-            user_prompt=vision_prompt,
-            images_base64=all_images_b64,
-            temperature=temperatura,
-            max_tokens=max_tokens,
-            api_key=api_key
-        )
+        # Faz chamada à IA com todas as imagens (fila de lote no controle de admissão)
+        with prioridade_llm(PRIORIDADE_LOTE):
+            data = call_openrouter_vision(
+                model=modelo_analise,
+                system_prompt=system_prompt,
+                user_prompt=vision_prompt,
+                images_base64=all_images_b64,
+                temperature=temperatura,
+                max_tokens=max_tokens,
+                api_key=api_key
+            )
         
         content = data["choices"][0]["message"].get("content", "")
         clean_content = clean_json_response(content)
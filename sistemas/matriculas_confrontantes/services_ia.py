@@ -35,6 +35,7 @@ except ImportError:
     PDF2IMAGE_AVAILABLE = False
 
 from config import DEFAULT_MODEL, FULL_REPORT_MODEL
+from sistemas.matriculas_confrontantes.services_render import iterar_paginas
 from services.ia_params_resolver import get_ia_params
 
 
@@ -519,7 +520,12 @@ def image_to_base64(image_path_or_pil: Union[str, Image.Image], max_size: int =
 
 
 def pdf_to_images(pdf_path: str, max_pages: Optional[int] = 10) -> List[Image.Image]:
-    """Converte PDF para lista de imagens"""
+    """
+    Converte PDF para lista de imagens.
+
+    PERFORMANCE: mantém todas as páginas em memória; para enviar à LLM use
+    services_render.iterar_paginas (streaming, já codificado).
+    """
     images = []
     
     try:
@@ -731,28 +737,12 @@ def analyze_with_vision_llm(model: str, file_path: str, api_key: str = None, mat
     fname = os.path.basename(file_path)
     
     try:
-        ext = os.path.splitext(file_path.lower())[1]
-        
-        if ext == ".pdf":
-            images = pdf_to_images(file_path, max_pages=None)
-        elif ext in [".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp"]:
-            images = [Image.open(file_path)]
-        else:
-            raise ValueError(f"Formato não suportado: {ext}")
-        
-        if not images:
-            raise ValueError("Não foi possível extrair imagens do arquivo")
-        
-        # Converte para base64
-        images_b64 = []
-        for img in images:
-            if img and hasattr(img, 'size'):
-                b64 = image_to_base64(img, max_size=1536)
-                if b64:
-                    images_b64.append(b64)
+        # PERFORMANCE: páginas renderizadas uma a uma e já codificadas
+        # (nunca há mais que algumas imagens PIL em memória)
+        images_b64 = list(iterar_paginas(file_path, max_pages=None))
         
         if not images_b64:
-            raise ValueError("Não foi possível converter imagens")
+            raise ValueError("Não foi possível extrair imagens do arquivo")
         
         # Obtém prompts do banco de dados (com fallback)
         system_prompt = get_system_prompt()
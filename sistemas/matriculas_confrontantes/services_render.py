@@ -0,0 +1,289 @@
+# sistemas/matriculas_confrontantes/services_render.py
+"""
+Rasterização de páginas em streaming para a análise visual de matrículas.
+
+PERFORMANCE: pdf_to_images renderizava todas as páginas a 200 dpi em uma
+lista de imagens PIL (~6 MB por página A4) antes de codificar qualquer uma;
+com max_pages=None, uma matrícula longa ocupava gigabytes antes da primeira
+chamada à LLM. Aqui as páginas são:
+
+- Renderizadas uma a uma em um pool de threads, com no máximo
+  2 x workers páginas em voo (memória limitada, ordem preservada)
+- Renderizadas já na resolução usada pelo modelo de visão (lado maior
+  limitado em LADO_MAX_PADRAO), sem passar por 200 dpi e reduzir depois
+- Codificadas direto em JPEG (ou WebP), em tons de cinza quando a página não tem cor
+- Guardadas em cache LRU limitado por bytes, chave (hash do arquivo, página,
+  dpi, lado máximo, formato)
+
+Uso:
+    for data_url in iterar_paginas(caminho):  # "data:image/jpeg;base64,..."
+        imagens.append(data_url)
+
+Autor: LAB/PGE-MS
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageChops, features
+
+logger = logging.getLogger("matriculas")
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    PDF2IMAGE_AVAILABLE = True
+except ImportError:
+    PDF2IMAGE_AVAILABLE = False
+
+# Resolução: o modelo de visão recebe no máximo 1536 px no lado maior
+DPI_PADRAO = 200
+LADO_MAX_PADRAO = 1536
+
+# Codificação: WebP gera ~35% menos bytes em páginas de texto, mas codifica
+# ~20x mais devagar que JPEG; fica opcional (formato="WEBP")
+FORMATO_PADRAO = "JPEG"
+WEBP_DISPONIVEL = features.check("webp")
+QUALIDADE_PADRAO = 80
+MIME_POR_FORMATO = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+# Diferença máxima entre canais (0-255) para considerar a página sem cor
+LIMIAR_COR = 24
+
+# Pool de renderização
+WORKERS_PADRAO = 2
+
+# Cache das páginas codificadas
+MAX_BYTES_CACHE = 64 * 1024 * 1024
+
+EXTENSOES_IMAGEM = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+
+class CacheRenderizacao:
+    """Cache LRU de páginas codificadas, limitado pelo total de bytes."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES_CACHE):
+        self.max_bytes = max_bytes
+        self._itens: "OrderedDict[tuple, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chave: tuple) -> Optional[str]:
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is None:
+                self.misses += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return valor
+
+    def set(self, chave: tuple, valor: str) -> None:
+        tamanho = len(valor)
+        if tamanho > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= len(anterior)
+            self._itens[chave] = valor
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                _, removido = self._itens.popitem(last=False)
+                self._bytes -= len(removido)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"itens": len(self._itens), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+cache_renderizacao = CacheRenderizacao()
+
+
+def hash_arquivo(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """SHA-256 do arquivo, lido em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+# =========================
+# Codificação
+# =========================
+
+def _sem_cor(img: Image.Image) -> bool:
+    """Página em tons de cinza? Verificado numa miniatura (barato)."""
+    miniatura = img.resize((64, 64), Image.Resampling.BILINEAR)
+    r, g, b = miniatura.split()
+    diferenca = max(
+        ImageChops.difference(r, g).getextrema()[1],
+        ImageChops.difference(g, b).getextrema()[1]
+    )
+    return diferenca <= LIMIAR_COR
+
+
+def codificar_imagem(
+    img: Image.Image,
+    lado_max: Optional[int] = LADO_MAX_PADRAO,
+    formato: str = FORMATO_PADRAO,
+    qualidade: int = QUALIDADE_PADRAO
+) -> str:
+    """Imagem -> data URL (lado maior limitado, tons de cinza quando não há cor)."""
+    if lado_max and max(img.size) > lado_max:
+        img.thumbnail((lado_max, lado_max), Image.Resampling.LANCZOS)
+
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if _sem_cor(img):
+        img = img.convert("L")
+
+    buffer = io.BytesIO()
+    if formato == "WEBP" and WEBP_DISPONIVEL:
+        img.save(buffer, format="WEBP", quality=qualidade, method=4)
+    else:
+        formato = "JPEG"
+        img.save(buffer, format="JPEG", quality=qualidade, optimize=True)
+    return f"data:{MIME_POR_FORMATO[formato]};base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+
+# =========================
+# Renderização
+# =========================
+
+class _RenderizadorPDF:
+    """Renderiza páginas isoladas; cada thread abre o próprio documento (PyMuPDF não é thread-safe)."""
+
+    def __init__(self, caminho: str, dpi: int, lado_max: Optional[int]):
+        self.caminho = caminho
+        self.dpi = dpi
+        self.lado_max = lado_max
+        self._local = threading.local()
+        self._abertos: List = []
+        self._lock = threading.Lock()
+        self.usar_fitz = PYMUPDF_AVAILABLE
+
+    def total_paginas(self) -> int:
+        if self.usar_fitz:
+            return len(self._documento())
+        return int(pdfinfo_from_path(self.caminho)["Pages"])
+
+    def _documento(self):
+        doc = getattr(self._local, "doc", None)
+        if doc is None:
+            doc = fitz.open(self.caminho)
+            self._local.doc = doc
+            with self._lock:
+                self._abertos.append(doc)
+        return doc
+
+    def renderizar(self, indice: int) -> Image.Image:
+        if not self.usar_fitz:
+            paginas = convert_from_path(self.caminho, dpi=self.dpi, first_page=indice + 1, last_page=indice + 1)
+            return paginas[0]
+
+        pagina = self._documento()[indice]
+        zoom = self.dpi / 72.0
+        if self.lado_max:
+            zoom = min(zoom, self.lado_max / max(pagina.rect.width, pagina.rect.height))
+        pix = pagina.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+    def fechar(self) -> None:
+        with self._lock:
+            for doc in self._abertos:
+                doc.close()
+            self._abertos.clear()
+
+
+def iterar_paginas_pdf(
+    caminho: str,
+    max_pages: Optional[int] = None,
+    dpi: int = DPI_PADRAO,
+    lado_max: Optional[int] = LADO_MAX_PADRAO,
+    formato: str = FORMATO_PADRAO,
+    workers: int = WORKERS_PADRAO,
+    cache: Optional[CacheRenderizacao] = cache_renderizacao
+) -> Iterator[str]:
+    """
+    Gera as páginas do PDF como data URLs, na ordem, renderizando em paralelo.
+
+    Páginas que falham são registradas e puladas (como no pdf_to_images).
+    """
+    if not (PYMUPDF_AVAILABLE or PDF2IMAGE_AVAILABLE):
+        raise RuntimeError("Nenhum renderizador de PDF disponível (PyMuPDF ou pdf2image)")
+
+    hash_pdf = hash_arquivo(caminho) if cache is not None else None
+    renderizador = _RenderizadorPDF(caminho, dpi, lado_max)
+
+    def tarefa(indice: int) -> Tuple[int, Optional[str]]:
+        chave = (hash_pdf, indice, dpi, lado_max, formato)
+        if cache is not None:
+            memorizada = cache.get(chave)
+            if memorizada is not None:
+                return indice, memorizada
+        try:
+            data_url = codificar_imagem(renderizador.renderizar(indice), lado_max, formato)
+        except Exception as e:
+            logger.warning(f"Erro ao renderizar página {indice + 1} de {caminho}: {e}")
+            return indice, None
+        if cache is not None:
+            cache.set(chave, data_url)
+        return indice, data_url
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="matriculas-render")
+    try:
+        total = renderizador.total_paginas()
+        if max_pages is not None:
+            total = min(total, max_pages)
+
+        indices = iter(range(total))
+        em_voo = deque(executor.submit(tarefa, i) for i in islice(indices, 2 * max(1, workers)))
+        while em_voo:
+            _, data_url = em_voo.popleft().result()
+            proximo = next(indices, None)
+            if proximo is not None:
+                em_voo.append(executor.submit(tarefa, proximo))
+            if data_url:
+                yield data_url
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        renderizador.fechar()
+
+
+def iterar_paginas(
+    caminho: str,
+    max_pages: Optional[int] = None,
+    lado_max: Optional[int] = LADO_MAX_PADRAO,
+    formato: str = FORMATO_PADRAO,
+    **kwargs
+) -> Iterator[str]:
+    """Páginas de um PDF ou imagem avulsa como data URLs (ver iterar_paginas_pdf)."""
+    extensao = caminho.lower().rsplit(".", 1)[-1] if "." in caminho else ""
+    if f".{extensao}" == ".pdf":
+        yield from iterar_paginas_pdf(caminho, max_pages=max_pages, lado_max=lado_max, formato=formato, **kwargs)
+    elif f".{extensao}" in EXTENSOES_IMAGEM:
+        with Image.open(caminho) as img:
+            yield codificar_imagem(img, lado_max, formato)
+    else:
+        raise ValueError(f"Formato não suportado: .{extensao}")
@@ -18,7 +18,7 @@ from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
 import fitz  # PyMuPDF
-import pymupdf4llm
+# PERFORMANCE: pymupdf4llm (~1s de import) é importado sob demanda na extração
 
 # Suprime warnings do MuPDF (ex: "Failed to read JPX header" em imagens JPEG2000 corrompidas)
 # Esses warnings não afetam a extração de texto, apenas indicam imagens problemáticas
@@ -158,6 +158,7 @@ def extrair_texto_pdf(pdf_bytes: bytes) -> str:
 
                 # Tenta extração otimizada
                 try:
+                    import pymupdf4llm
                     md_text = pymupdf4llm.to_markdown(doc)
                     if md_text and len(md_text.strip()) > 100:
                         return md_text
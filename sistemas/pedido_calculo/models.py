@@ -17,7 +17,7 @@ from datetime import date
 from typing import List, Dict, Optional, Any
 from enum import Enum
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from database.connection import Base
 from utils.timezone import get_utc_now
@@ -71,6 +71,11 @@ class GeracaoPedidoCalculo(Base):
     feedback = relationship("FeedbackPedidoCalculo", back_populates="geracao", uselist=False)
     logs_ia = relationship("LogChamadaIA", back_populates="geracao", order_by="LogChamadaIA.criado_em")
 
+    # PERFORMANCE: lista do histórico por usuário, paginada por (criado_em, id)
+    __table_args__ = (
+        Index("ix_geracoes_pedido_calculo_usuario_criado", "usuario_id", "criado_em", "id"),
+    )
+
     def __repr__(self):
         return f"<GeracaoPedidoCalculo(id={self.id}, cnj='{self.numero_cnj}')>"
 
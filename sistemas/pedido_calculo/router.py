@@ -20,7 +20,7 @@ import asyncio
 from datetime import datetime
 from typing import Optional, List, Dict, AsyncGenerator
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -29,6 +29,9 @@ from auth.dependencies import get_current_active_user, get_current_user_from_tok
 from auth.models import User
 from database.connection import get_db
 from utils.timezone import to_iso_utc
+from utils.historico import (
+    CABECALHO_CURSOR, LIMITE_MAXIMO, LIMITE_PADRAO, consultar_historico, preview_sql,
+)
 from utils.security_sanitizer import sanitize_html
 from admin.models import ConfiguracaoIA, PromptConfig
 from utils.rate_limit import limiter, limit_ai_request, LIMITS, get_user_identifier, limit_default, limit_export
@@ -1128,27 +1131,31 @@ async def processar_stream(
                     })
 
             # Salva no histórico do banco de dados
+            # PERFORMANCE: AsyncSession - o save não trava o event loop dos outros streams
             from .models import GeracaoPedidoCalculo, LogChamadaIA, FeedbackPedidoCalculo
-            from database.connection import SessionLocal
+            from database.connection import AsyncSessionLocal
+            from sqlalchemy import select, delete
 
-            db_session = SessionLocal()
+            db_session = AsyncSessionLocal()
             try:
                 numero_cnj_limpo = numero_cnj.replace(".", "").replace("-", "").replace("/", "")
 
                 # Verifica se deve sobrescrever registro existente
                 geracao_existente = None
                 if sobrescrever_existente:
-                    geracao_existente = db_session.query(GeracaoPedidoCalculo).filter(
-                        GeracaoPedidoCalculo.numero_cnj == numero_cnj_limpo,
-                        GeracaoPedidoCalculo.usuario_id == user_id
-                    ).first()
+                    geracao_existente = (await db_session.execute(
+                        select(GeracaoPedidoCalculo).where(
+                            GeracaoPedidoCalculo.numero_cnj == numero_cnj_limpo,
+                            GeracaoPedidoCalculo.usuario_id == user_id
+                        ).limit(1)
+                    )).scalar_one_or_none()
 
                 if geracao_existente:
                     # ATUALIZA registro existente
                     # Primeiro, deleta logs antigos
-                    db_session.query(LogChamadaIA).filter(
-                        LogChamadaIA.geracao_id == geracao_existente.id
-                    ).delete()
+                    await db_session.execute(
+                        delete(LogChamadaIA).where(LogChamadaIA.geracao_id == geracao_existente.id)
+                    )
 
                     # Atualiza os dados
                     geracao_existente.numero_cnj_formatado = agente1_result.dados_basicos.numero_processo
@@ -1161,7 +1168,7 @@ async def processar_stream(
                     geracao_existente.tempo_processamento = tempo_processamento
                     geracao_existente.criado_em = datetime.utcnow()  # Atualiza timestamp
 
-                    db_session.commit()
+                    await db_session.commit()
                     geracao_id = geracao_existente.id
 
                     yield f"data: {json.dumps({'tipo': 'info', 'mensagem': f'Pedido atualizado no histórico (ID: {geracao_id})'})}\n\n"
@@ -1180,21 +1187,21 @@ async def processar_stream(
                         usuario_id=user_id
                     )
                     db_session.add(geracao)
-                    db_session.commit()
+                    await db_session.commit()
                     geracao_id = geracao.id
 
                     yield f"data: {json.dumps({'tipo': 'info', 'mensagem': f'Pedido salvo no histórico (ID: {geracao_id})'})}\n\n"
 
-                # Salva logs de IA vinculados a esta geração
+                # Salva logs de IA vinculados a esta geração (código síncrono sobre a conexão async)
                 ia_logger.set_geracao_id(geracao_id)
-                ia_logger.salvar_logs(db_session)
+                await db_session.run_sync(ia_logger.salvar_logs)
             except Exception as e:
-                db_session.rollback()
+                await db_session.rollback()
                 import traceback
                 traceback.print_exc()
                 yield f"data: {json.dumps({'tipo': 'info', 'mensagem': 'Aviso: Não foi possível salvar no histórico'})}\n\n"
             finally:
-                db_session.close()
+                await db_session.close()
 
             # Resultado final com documentos baixados e ID do histórico
             yield f"data: {json.dumps({'tipo': 'sucesso', 'geracao_id': geracao_id, 'dados_basicos': agente1_result.dados_basicos.to_dict(), 'dados_extracao': agente2_result.to_dict(), 'pedido_markdown': markdown, 'documentos_baixados': documentos_baixados})}\n\n"
@@ -1387,35 +1394,47 @@ async def verificar_processo_existente(
 @limit_default
 async def listar_historico(
     request: Request,
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="Valor do cabeçalho X-Proximo-Cursor da página anterior"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Lista histórico de pedidos de cálculo gerados pelo usuário.
     Ordenado por data de criação (mais recentes primeiro).
-    """
-    from .models import GeracaoPedidoCalculo
-    from datetime import timezone, timedelta
-
-    # Timezone de Brasília (UTC-3)
-    tz_brasilia = timezone(timedelta(hours=-3))
 
-    historico = db.query(GeracaoPedidoCalculo).filter(
-        GeracaoPedidoCalculo.usuario_id == current_user.id
-    ).order_by(GeracaoPedidoCalculo.criado_em.desc()).limit(50).all()
+    PERFORMANCE: só as colunas da lista saem do banco (autor e preview são
+    calculados no SQL); pedido, dados do processo e documentos ficam em
+    /historico/{id}. Próxima página no cabeçalho X-Proximo-Cursor.
+    """
+    from .models import GeracaoPedidoCalculo as G
+
+    pagina = consultar_historico(
+        db, G,
+        colunas=[G.numero_cnj, G.numero_cnj_formatado, G.tempo_processamento],
+        filtros=[G.usuario_id == current_user.id],
+        extras={
+            "autor": G.dados_processo["autor"].as_string(),
+            "preview": preview_sql(G.conteudo_gerado),
+        },
+        limite=limite,
+        cursor=cursor,
+    )
+    if pagina.proximo_cursor:
+        response.headers[CABECALHO_CURSOR] = pagina.proximo_cursor
 
     return [
         {
             "id": h.id,
             "numero_cnj": h.numero_cnj,
             "numero_cnj_formatado": h.numero_cnj_formatado,
-            "dados_processo": h.dados_processo,
-            "conteudo_gerado": h.conteudo_gerado,
-            "documentos_baixados": h.documentos_baixados,
+            "autor": extras["autor"],
+            "preview": extras["preview"],
             "criado_em": to_iso_utc(h.criado_em),
             "tempo_processamento": h.tempo_processamento
         }
-        for h in historico
+        for h, extras in pagina.itens
     ]
 
 
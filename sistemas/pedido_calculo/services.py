@@ -29,20 +29,17 @@ from .agentes import Agente1AnaliseXML, Agente2ExtracaoPDFs, Agente3GeracaoPedid
 # Cliente TJMS unificado (adaptador compativel)
 from services.tjms import DocumentDownloader
 
+from utils import calendario_forense
+
 
 def _calcular_dias_uteis(data_inicial: date, dias: int) -> date:
     """
     Calcula data final após N dias úteis.
     
-    Considera apenas segunda a sexta (não inclui feriados).
+    Considera fins de semana, feriados e suspensões de prazo
+    (utils/calendario_forense).
     """
-    data = data_inicial
-    dias_contados = 0
-    while dias_contados < dias:
-        data += timedelta(days=1)
-        if data.weekday() < 5:  # Segunda a Sexta
-            dias_contados += 1
-    return data
+    return calendario_forense.dias_uteis_apos(data_inicial, dias)
 
 
 class PedidoCalculoService:
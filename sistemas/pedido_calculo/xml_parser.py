@@ -8,14 +8,26 @@ identificando:
 - Movimentos relevantes (citação, trânsito em julgado, intimações)
 - Documentos para download (sentenças, acórdãos, certidões, etc.)
 
+PERFORMANCE: o XML é percorrido uma única vez. Cada documento e cada
+movimento vira um registro (DocumentoXML / MovimentoXML) com atributos já
+lidos, data convertida, textos em minúsculas e as categorias de termos
+(TERMOS) encontradas na descrição/complemento, todas de uma vez por uma
+única regex. Os helpers consultam índices (documentos por tipo, por data e
+por dataHora; movimentos por código nacional/local e por categoria de
+termo) em vez de refazer mov.iter() e as buscas por substring a cada
+chamada. A saída é conferida com o corpus de tests/fixtures/pedido_calculo_xml.
+
 Autor: LAB/PGE-MS
 """
 
 import re
 import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, FrozenSet, List, Optional, Any, Tuple
 
+from utils import calendario_forense
 from utils.security import safe_parse_xml
 
 from .models import (
@@ -88,11 +100,64 @@ COMARCAS_IBGE = {
     "5003306": "Coxim",
 }
 
+# Termos procurados nas descrições e complementos, por categoria
+TERMOS = {
+    # Intimação para cumprimento (descrição ou complemento do movimento)
+    "CUMPRIMENTO": [
+        'impugnar', 'impugnação', 'impugnacao',
+        'cumprimento de sentença', 'cumprimento de sentenca',
+        'cumprir a obrigação', 'cumprir a obrigacao',
+        'cumprimento da obrigação', 'cumprimento da obrigacao',
+        'pagar ou impugnar',
+        'intimação para cumprimento', 'intimacao para cumprimento',
+        'intimado para cumprimento',
+        'art. 523', 'art. 535',
+    ],
+    # Certidão de decurso de prazo
+    "DECURSO": [
+        'inexistência de leitura',
+        'inexistencia de leitura',
+        'decurso de prazo',
+        'decurso do prazo',
+    ],
+    # Complemento da distribuição por dependência (50002)
+    "CUMPRIMENTO_SENTENCA": ['cumprimento de sentença', 'cumprimento de sentenca'],
+    # Apensamento a outro processo, com menção a cumprimento/execução
+    "APENSO": ['apensado ao processo', 'apenso ao processo'],
+    "EXECUCAO": ['cumprimento', 'execução', 'execucao'],
+    "CITACAO": ['citação', 'citacao'],
+    "CERTIDAO": ['certidão', 'certidao'],
+    "TRANSITO": ['transitou em julgado', 'trânsito em julgado'],
+    "IMPUGNACAO": ['impugnar', 'cumprimento'],
+    # Descrição do documento
+    "PEDIDO_CUMPRIMENTO": ['pedido de cumprimento', 'cumprimento de sentença'],
+    "PLANILHA": [
+        'planilha', 'cálculo', 'calculo', 'memória de cálculo',
+        'memoria de calculo', 'demonstrativo', 'evolução do débito',
+        'evolucao do debito', 'atualização monetária', 'atualizacao monetaria',
+        'memória de cálculo atualizada', 'memoria atualizada',
+        'cálculos', 'calculos', 'débito', 'debito', 'valor atualizado',
+        'atualização do valor', 'atualizacao do valor', 'conta de liquidação',
+        'conta de liquidacao', 'valor devido'
+    ],
+}
+
+# Padrão CNJ: NNNNNNN-NN.NNNN.N.NN.NNNN
+PADRAO_CNJ = re.compile(r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}')
+PADRAO_DATA_TRANSITO = re.compile(r'em\s+(\d{1,2})/(\d{1,2})/(\d{4})')
+
 
 def _parse_datahora_tjms(s: Optional[str]) -> Optional[datetime]:
     """Parse de data/hora no formato TJ-MS: YYYYMMDDHHMMSS"""
     if not s or len(s) < 8:
         return None
+    # PERFORMANCE: caminho rápido sem strptime (um XML grande tem milhares de datas).
+    # Se os campos não formarem uma data válida, cai no strptime, que decide como antes.
+    if len(s) >= 14 and s[:14].isascii() and s[:14].isdigit():
+        try:
+            return datetime(int(s[:4]), int(s[4:6]), int(s[6:8]), int(s[8:10]), int(s[10:12]), int(s[12:14]))
+        except ValueError:
+            pass
     try:
         if len(s) >= 14:
             return datetime.strptime(s[:14], "%Y%m%d%H%M%S")
@@ -140,16 +205,10 @@ def _get_tag_name(elem: ET.Element) -> str:
 
 def _dias_uteis_apos(data_inicial: date, dias_uteis: int) -> date:
     """
-    Calcula data após N dias úteis (ignora finais de semana).
-    Não considera feriados - seria necessário tabela de feriados.
+    Calcula data após N dias úteis forenses.
+    Considera fins de semana, feriados e suspensões (utils/calendario_forense).
     """
-    data = data_inicial
-    dias_contados = 0
-    while dias_contados < dias_uteis:
-        data += timedelta(days=1)
-        if data.weekday() < 5:  # Segunda a Sexta
-            dias_contados += 1
-    return data
+    return calendario_forense.dias_uteis_apos(data_inicial, dias_uteis)
 
 
 def _primeiro_dia_util_posterior(data_referencia: date) -> date:
@@ -158,12 +217,117 @@ def _primeiro_dia_util_posterior(data_referencia: date) -> date:
     Conforme art. 224 do CPC, o termo inicial do prazo é o primeiro
     dia útil seguinte à data de recebimento da intimação.
 
-    Não considera feriados - seria necessário tabela de feriados.
+    Considera feriados e suspensões de prazo (utils/calendario_forense).
+    """
+    return calendario_forense.proximo_dia_util(data_referencia)
+
+
+class _BuscaTermos:
     """
-    data = data_referencia + timedelta(days=1)
-    while data.weekday() >= 5:  # Sábado (5) ou Domingo (6)
-        data += timedelta(days=1)
-    return data
+    Encontra, em uma passada, as categorias de TERMOS presentes em um texto.
+
+    Uma única regex com todos os termos em alternância, dentro de um
+    lookahead para testar todas as posições (inclusive sobrepostas). Em cada
+    posição só a alternativa mais longa é reportada, então cada termo herda
+    as categorias dos termos contidos nele.
+    """
+
+    def __init__(self, termos_por_categoria: Dict[str, List[str]]):
+        categorias: Dict[str, set] = {}
+        for categoria, termos in termos_por_categoria.items():
+            for termo in termos:
+                categorias.setdefault(termo, set()).add(categoria)
+        self._categorias = {
+            termo: frozenset().union(*(cats for outro, cats in categorias.items() if outro in termo))
+            for termo in categorias
+        }
+        alternativas = sorted(categorias, key=len, reverse=True)
+        self._regex = re.compile("(?=(" + "|".join(map(re.escape, alternativas)) + "))")
+
+    def categorias(self, texto_lower: str) -> FrozenSet[str]:
+        if not texto_lower:
+            return frozenset()
+        encontrados = {m.group(1) for m in self._regex.finditer(texto_lower)}
+        return frozenset().union(*(self._categorias[termo] for termo in encontrados))
+
+
+_BUSCA_TERMOS = _BuscaTermos(TERMOS)
+
+
+@dataclass(slots=True, frozen=True)
+class DocumentoXML:
+    """Documento do XML com atributos já lidos"""
+    id: str
+    tipo: str
+    descricao: str
+    data_hora_str: str
+    data: Optional[datetime]
+    termos: FrozenSet[str]  # Categorias de TERMOS na descrição
+
+
+@dataclass(slots=True, frozen=True)
+class MovimentoXML:
+    """Movimento do XML com atributos e textos já extraídos"""
+    data_hora_str: str
+    data: Optional[datetime]
+    codigo_local: str
+    codigo_nacional: str
+    descricao: str
+    descricao_lower: str
+    complemento: str
+    complemento_lower: str
+    id_documento_vinculado: Optional[str]
+    numero_cnj: Optional[str]  # Primeiro número CNJ citado no complemento
+    termos_descricao: FrozenSet[str]
+    termos_complemento: FrozenSet[str]
+
+
+def _ler_documento(elem: ET.Element) -> DocumentoXML:
+    descricao = elem.attrib.get('descricao', '')
+    data_hora_str = elem.attrib.get('dataHora', '')
+    return DocumentoXML(
+        id=elem.attrib.get('idDocumento', elem.attrib.get('id', '')),
+        tipo=elem.attrib.get('tipoDocumentoLocal', elem.attrib.get('tipoDocumento', '')),
+        descricao=descricao,
+        data_hora_str=data_hora_str,
+        data=_parse_datahora_tjms(data_hora_str),
+        termos=_BUSCA_TERMOS.categorias(descricao.lower()),
+    )
+
+
+def _ler_movimento(elem: ET.Element) -> MovimentoXML:
+    codigo_local = codigo_nacional = descricao = complemento = ""
+    id_documento_vinculado = None
+    for child in elem.iter():
+        tag = _get_tag_name(child)
+        if tag == 'movimentolocal':
+            codigo_local = child.attrib.get('codigoMovimento', '')
+            descricao = child.attrib.get('descricao', '')
+        elif tag == 'movimentonacional':
+            codigo_nacional = child.attrib.get('codigoNacional', '')
+        elif tag == 'complemento' and child.text:
+            complemento = child.text
+        elif tag == 'iddocumentovinculado' and child.text:
+            id_documento_vinculado = child.text.strip()
+
+    data_hora_str = elem.attrib.get('dataHora', '')
+    descricao_lower = descricao.lower()
+    complemento_lower = complemento.lower()
+    numero_cnj = PADRAO_CNJ.search(complemento)
+    return MovimentoXML(
+        data_hora_str=data_hora_str,
+        data=_parse_datahora_tjms(data_hora_str),
+        codigo_local=codigo_local,
+        codigo_nacional=codigo_nacional,
+        descricao=descricao,
+        descricao_lower=descricao_lower,
+        complemento=complemento,
+        complemento_lower=complemento_lower,
+        id_documento_vinculado=id_documento_vinculado,
+        numero_cnj=numero_cnj.group(0) if numero_cnj else None,
+        termos_descricao=_BUSCA_TERMOS.categorias(descricao_lower),
+        termos_complemento=_BUSCA_TERMOS.categorias(complemento_lower),
+    )
 
 
 class XMLParser:
@@ -180,43 +344,79 @@ class XMLParser:
         # SECURITY: Usa parsing seguro para prevenir XXE
         self.root = safe_parse_xml(xml_text)
         self._dados_basicos = None
-        self._movimentos = []
-        self._documentos = []
+        self._movimentos: List[MovimentoXML] = []
+        self._documentos: List[DocumentoXML] = []
         self._doc_movimento_map = {}  # Mapeia doc_id -> info do movimento pai
+
+        # Índices (listas sempre na ordem do XML)
+        self._docs_por_tipo: Dict[str, List[DocumentoXML]] = {}
+        self._docs_por_tipo_dia: Dict[Tuple[str, date], List[DocumentoXML]] = {}
+        self._docs_por_data_hora: Dict[str, List[DocumentoXML]] = {}
+        self._docs_por_termo: Dict[str, List[DocumentoXML]] = {}
+        self._docs_por_data: List[DocumentoXML] = []  # Só os datados, em ordem de data
+        self._dias_docs: List[date] = []  # Dia de cada item de _docs_por_data (para bisect)
+        self._movs_por_codigo_local: Dict[str, List[MovimentoXML]] = {}
+        self._movs_por_codigo_nacional: Dict[str, List[MovimentoXML]] = {}
+        self._movs_por_termo: Dict[str, List[MovimentoXML]] = {}
+        self._movs_com_numero_cnj: List[MovimentoXML] = []
         self._parse_estrutura()
 
     def _parse_estrutura(self):
-        """Parse inicial para identificar estrutura do XML"""
+        """Percorre o XML uma vez, montando os registros e os índices"""
         for elem in self.root.iter():
             tag = _get_tag_name(elem)
 
             if tag == 'dadosbasicos':
                 self._dados_basicos = elem
             elif tag == 'movimento':
-                self._movimentos.append(elem)
-                # Extrai info do movimento para mapear aos documentos filhos
-                mov_complemento = ""
-                mov_descricao = ""
-                # Primeiro passa para pegar complemento e descrição
-                for child in elem:
-                    child_tag = _get_tag_name(child)
-                    if child_tag == 'complemento' and child.text:
-                        mov_complemento = child.text
-                    elif child_tag == 'movimentolocal':
-                        mov_descricao = child.attrib.get('descricao', '')
-                # Segunda passada para mapear documentos com o complemento já extraído
+                mov = _ler_movimento(elem)
+                self._indexar_movimento(mov)
+                # Mapeia os documentos filhos ao movimento pai
                 for child in elem:
-                    child_tag = _get_tag_name(child)
-                    if child_tag == 'documento':
-                        # Mapeia este documento ao movimento pai
+                    if _get_tag_name(child) == 'documento':
                         doc_id = child.attrib.get('idDocumento', child.attrib.get('id', ''))
                         if doc_id:
                             self._doc_movimento_map[doc_id] = {
-                                'complemento': mov_complemento,
-                                'descricao_movimento': mov_descricao
+                                'complemento': mov.complemento,
+                                'descricao_movimento': mov.descricao
                             }
             elif tag == 'documento':
-                self._documentos.append(elem)
+                self._indexar_documento(_ler_documento(elem))
+
+        # sorted é estável: documentos com a mesma data ficam na ordem do XML
+        self._docs_por_data = sorted((d for d in self._documentos if d.data), key=lambda d: d.data)
+        self._dias_docs = [d.data.date() for d in self._docs_por_data]
+
+    def _indexar_documento(self, doc: DocumentoXML):
+        self._documentos.append(doc)
+        self._docs_por_tipo.setdefault(doc.tipo, []).append(doc)
+        self._docs_por_data_hora.setdefault(doc.data_hora_str, []).append(doc)
+        if doc.data:
+            self._docs_por_tipo_dia.setdefault((doc.tipo, doc.data.date()), []).append(doc)
+        for termo in doc.termos:
+            self._docs_por_termo.setdefault(termo, []).append(doc)
+
+    def _indexar_movimento(self, mov: MovimentoXML):
+        self._movimentos.append(mov)
+        self._movs_por_codigo_local.setdefault(mov.codigo_local, []).append(mov)
+        self._movs_por_codigo_nacional.setdefault(mov.codigo_nacional, []).append(mov)
+        for termo in mov.termos_descricao | mov.termos_complemento:
+            self._movs_por_termo.setdefault(termo, []).append(mov)
+        if mov.numero_cnj:
+            self._movs_com_numero_cnj.append(mov)
+
+    def _docs_dos_tipos(self, *chaves: str) -> List[DocumentoXML]:
+        """Documentos dos tipos de TIPOS_DOCUMENTO[chave], tipo a tipo"""
+        return [
+            doc
+            for chave in chaves
+            for tipo in TIPOS_DOCUMENTO[chave]
+            for doc in self._docs_por_tipo.get(tipo, ())
+        ]
+
+    def _docs_entre(self, inicio: date, fim: date) -> List[DocumentoXML]:
+        """Documentos datados com inicio <= dia <= fim, em ordem de data"""
+        return self._docs_por_data[bisect_left(self._dias_docs, inicio):bisect_right(self._dias_docs, fim)]
 
     def get_movimento_info(self, doc_id: str) -> Optional[Dict[str, str]]:
         """
@@ -360,19 +560,6 @@ class XMLParser:
         is_cumprimento_autonomo = self._verificar_cumprimento_autonomo()
         resultado.is_cumprimento_autonomo = is_cumprimento_autonomo
 
-        # Mapear documentos por tipo
-        docs_por_tipo: Dict[str, List[Tuple[str, datetime, str]]] = {}
-        for doc in self._documentos:
-            doc_id = doc.attrib.get('idDocumento', doc.attrib.get('id', ''))
-            tipo = doc.attrib.get('tipoDocumentoLocal', doc.attrib.get('tipoDocumento', ''))
-            descricao = doc.attrib.get('descricao', '')
-            data_str = doc.attrib.get('dataHora', '')
-            data = _parse_datahora_tjms(data_str)
-
-            if tipo not in docs_por_tipo:
-                docs_por_tipo[tipo] = []
-            docs_por_tipo[tipo].append((doc_id, data, descricao))
-
         # Decide se busca sentenças/acórdãos deste processo
         # Se forcar_busca_sentencas=True, busca mesmo se for cumprimento autônomo
         buscar_sentencas_aqui = not is_cumprimento_autonomo or forcar_busca_sentencas
@@ -392,7 +579,7 @@ class XMLParser:
                 print(f"[CUMPRIMENTO AUTÔNOMO] Número não encontrado no XML - será extraído da petição inicial")
 
             # Guarda ID da primeira petição (para análise IA se necessário)
-            id_peticao = self._identificar_primeira_peticao(docs_por_tipo)
+            id_peticao = self._identificar_primeira_peticao()
             resultado.id_peticao_inicial = id_peticao
             if id_peticao:
                 print(f"[CUMPRIMENTO AUTÔNOMO] Petição inicial: {id_peticao}")
@@ -406,31 +593,20 @@ class XMLParser:
                 print(f"[ORIGEM] Forçando busca de sentenças e acórdãos do processo de origem")
 
             # Sentenças (originais)
-            for tipo_cod in TIPOS_DOCUMENTO["SENTENCA"] + TIPOS_DOCUMENTO["SENTENCA_JUIZ_LEIGO"]:
-                if tipo_cod in docs_por_tipo:
-                    for doc_id, _, _ in docs_por_tipo[tipo_cod]:
-                        resultado.sentencas.append(doc_id)
+            resultado.sentencas.extend(d.id for d in self._docs_dos_tipos("SENTENCA", "SENTENCA_JUIZ_LEIGO"))
 
             # Acórdãos (originais)
-            for tipo_cod in TIPOS_DOCUMENTO["ACORDAO"]:
-                if tipo_cod in docs_por_tipo:
-                    for doc_id, _, _ in docs_por_tipo[tipo_cod]:
-                        resultado.acordaos.append(doc_id)
+            resultado.acordaos.extend(d.id for d in self._docs_dos_tipos("ACORDAO"))
 
             # Decisões interlocutórias (para cumprimento de decisão)
-            for tipo_cod in TIPOS_DOCUMENTO["DECISAO"]:
-                if tipo_cod in docs_por_tipo:
-                    for doc_id, _, _ in docs_por_tipo[tipo_cod]:
-                        resultado.decisoes.append(doc_id)
+            resultado.decisoes.extend(d.id for d in self._docs_dos_tipos("DECISAO"))
 
             # Certidão de trânsito em julgado
-            # 1. Primeiro tenta pelo tipo de documento (9644)
+            # 1. Primeiro tenta pelo tipo de documento (9644), o primeiro de cada tipo
             for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_TRANSITO"]:
-                if tipo_cod in docs_por_tipo:
-                    for doc_id, _, _ in docs_por_tipo[tipo_cod]:
-                        resultado.certidao_transito = doc_id
-                        print(f"[TRÂNSITO] Certidão de trânsito (tipo 9644): {doc_id}")
-                        break
+                if tipo_cod in self._docs_por_tipo:
+                    resultado.certidao_transito = self._docs_por_tipo[tipo_cod][0].id
+                    print(f"[TRÂNSITO] Certidão de trânsito (tipo 9644): {resultado.certidao_transito}")
 
             # 2. Se não encontrou, busca pelo documento vinculado ao movimento de trânsito (código 848)
             if not resultado.certidao_transito:
@@ -445,7 +621,7 @@ class XMLParser:
                 print(f"[ORIGEM] Decisões encontradas: {resultado.decisoes}")
         
         # Identifica certidão de citação (heurística - funciona bem)
-        resultado.certidoes_citacao_intimacao = self._identificar_certidoes_citacao_intimacao(docs_por_tipo)
+        resultado.certidoes_citacao_intimacao = self._identificar_certidoes_citacao_intimacao()
 
         # Identifica certidão de intimação para cumprimento
         # 1. Primeiro, encontra a data do movimento de cumprimento
@@ -454,13 +630,11 @@ class XMLParser:
 
         # 2. SEMPRE coleta candidatas para análise IA (a IA vai ler o conteúdo e extrair data real)
         # A heurística é usada apenas como referência, mas a IA tem prioridade
-        resultado.certidoes_candidatas = self._identificar_certidoes_candidatas_cumprimento(
-            docs_por_tipo, data_mov_cumprimento
-        )
+        resultado.certidoes_candidatas = self._identificar_certidoes_candidatas_cumprimento(data_mov_cumprimento)
 
         # 3. Guarda sugestão da heurística (será sobrescrita pela IA se ela encontrar algo)
-        cert_cumprimento_sistema = self._identificar_certidao_cumprimento_sistema(docs_por_tipo, data_mov_cumprimento)
-        cert_cumprimento_cartorio = self._identificar_certidao_cumprimento_cartorio(docs_por_tipo, data_mov_cumprimento)
+        cert_cumprimento_sistema = self._identificar_certidao_cumprimento_sistema(data_mov_cumprimento)
+        cert_cumprimento_cartorio = self._identificar_certidao_cumprimento_cartorio(data_mov_cumprimento)
 
         if cert_cumprimento_sistema:
             resultado.certidao_heuristica = cert_cumprimento_sistema
@@ -503,20 +677,9 @@ class XMLParser:
         if self._dados_basicos is None:
             return False
 
-        # PRIMEIRO: Verifica se tem sentenças ORIGINAIS no processo
+        # PRIMEIRO: Verifica se tem sentenças ORIGINAIS (não cópias) no processo
         # Se tiver, é um processo "evoluído" (classe alterada), não autônomo
-        tem_sentenca_original = False
-        tem_acordao_original = False
-        for doc in self._documentos:
-            tipo = doc.attrib.get('tipoDocumentoLocal', doc.attrib.get('tipoDocumento', ''))
-            # Tipos de sentença original (não cópia)
-            if tipo in TIPOS_DOCUMENTO["SENTENCA"] + TIPOS_DOCUMENTO["SENTENCA_JUIZ_LEIGO"]:
-                tem_sentenca_original = True
-            # Tipos de acórdão original (não cópia)
-            if tipo in TIPOS_DOCUMENTO["ACORDAO"]:
-                tem_acordao_original = True
-
-        if tem_sentenca_original:
+        if self._docs_dos_tipos("SENTENCA", "SENTENCA_JUIZ_LEIGO"):
             print(f"[CUMPRIMENTO] Processo tem sentença ORIGINAL - é processo 'evoluído', não autônomo")
             print(f"              (sentenças e acórdãos serão buscados deste mesmo processo)")
             return False
@@ -527,61 +690,29 @@ class XMLParser:
             print(f"[CUMPRIMENTO] Identificado pela classe processual: {classe_processual}")
             return True
 
-        # 2. Verifica movimento "Distribuído por Dependência" com complemento "CUMPRIMENTO DE SENTENÇA"
-        for mov in self._movimentos:
-            codigo_movimento = ""
-            complemento = ""
-
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'movimentolocal':
-                    codigo_movimento = child.attrib.get('codigoMovimento', '')
-                elif tag == 'complemento' and child.text:
-                    complemento = child.text
-
-            # Movimento de distribuição por dependência (50002)
-            if codigo_movimento == MOVIMENTO_DISTRIBUICAO_DEPENDENCIA:
-                complemento_upper = complemento.upper()
-                if 'CUMPRIMENTO DE SENTENÇA' in complemento_upper or 'CUMPRIMENTO DE SENTENCA' in complemento_upper:
-                    print(f"[CUMPRIMENTO] Identificado por movimento de dependência com complemento: {complemento[:80]}...")
-                    return True
+        # 2. Verifica movimento "Distribuído por Dependência" (50002) com complemento "CUMPRIMENTO DE SENTENÇA"
+        for mov in self._movs_por_codigo_local.get(MOVIMENTO_DISTRIBUICAO_DEPENDENCIA, ()):
+            if "CUMPRIMENTO_SENTENCA" in mov.termos_complemento:
+                print(f"[CUMPRIMENTO] Identificado por movimento de dependência com complemento: {mov.complemento[:80]}...")
+                return True
 
         # 3. Verifica presença de cópias de sentença, acórdão ou trânsito em julgado
         # Esses documentos são típicos de cumprimentos autônomos
-        tipos_copia = set(TIPOS_DOCUMENTO["COPIA_SENTENCA"] + TIPOS_DOCUMENTO["COPIA_ACORDAO"] + TIPOS_DOCUMENTO["CERTIDAO_TRANSITO"])
-        tem_copia_sentenca = False
-        tem_copia_acordao = False
-        tem_copia_transito = False
-
-        for doc in self._documentos:
-            tipo = doc.attrib.get('tipoDocumentoLocal', doc.attrib.get('tipoDocumento', ''))
-            if tipo in TIPOS_DOCUMENTO["COPIA_SENTENCA"]:
-                tem_copia_sentenca = True
-            if tipo in TIPOS_DOCUMENTO["COPIA_ACORDAO"]:
-                tem_copia_acordao = True
-            if tipo in TIPOS_DOCUMENTO["CERTIDAO_TRANSITO"]:
-                tem_copia_transito = True
+        tem_copia_sentenca = bool(self._docs_dos_tipos("COPIA_SENTENCA"))
+        tem_copia_acordao = bool(self._docs_dos_tipos("COPIA_ACORDAO"))
+        tem_copia_transito = bool(self._docs_dos_tipos("CERTIDAO_TRANSITO"))
 
         # Se tem cópia de sentença E (cópia de acórdão OU cópia de trânsito), é cumprimento
         if tem_copia_sentenca and (tem_copia_acordao or tem_copia_transito):
             print(f"[CUMPRIMENTO] Identificado por cópias de documentos (sentença={tem_copia_sentenca}, acórdão={tem_copia_acordao}, trânsito={tem_copia_transito})")
             return True
 
-        # 4. Verifica movimento de apensamento a outro processo
-        padrao_cnj = r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}'
-        for mov in self._movimentos:
-            complemento = ""
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'complemento' and child.text:
-                    complemento = child.text.lower()
-
-            # Verifica se tem "apensado ao processo" ou similar
-            if 'apensado ao processo' in complemento or 'apenso ao processo' in complemento:
-                # Verifica se menciona cumprimento ou execução
-                if 'cumprimento' in complemento or 'execução' in complemento or 'execucao' in complemento:
-                    print(f"[CUMPRIMENTO] Identificado por apensamento com menção a cumprimento/execução")
-                    return True
+        # 4. Verifica movimento de apensamento a outro processo ("apensado ao processo" ou similar)
+        # que mencione cumprimento ou execução
+        for mov in self._movs_por_termo.get("APENSO", ()):
+            if {"APENSO", "EXECUCAO"} <= mov.termos_complemento:
+                print(f"[CUMPRIMENTO] Identificado por apensamento com menção a cumprimento/execução")
+                return True
 
         return False
 
@@ -603,26 +734,15 @@ class XMLParser:
         Returns:
             ID do documento vinculado ou None se não encontrado
         """
-        for mov in self._movimentos:
-            codigo_nacional = ""
-            id_doc_vinculado = None
-            complemento = ""
-
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'movimentonacional':
-                    codigo_nacional = child.attrib.get('codigoNacional', '')
-                elif tag == 'iddocumentovinculado' and child.text:
-                    # O ID pode vir com sufixo como "124419043 - 0", pegamos só o número principal
-                    id_doc_vinculado = child.text.strip().split(' - ')[0].strip()
-                elif tag == 'complemento' and child.text:
-                    complemento = child.text
-
-            # Verifica se é movimento de trânsito em julgado (código 848)
-            if codigo_nacional in MOVIMENTOS_TRANSITO and id_doc_vinculado:
+        for codigo in MOVIMENTOS_TRANSITO:
+            for mov in self._movs_por_codigo_nacional.get(codigo, ()):
+                if not mov.id_documento_vinculado:
+                    continue
+                # O ID pode vir com sufixo como "124419043 - 0", pegamos só o número principal
+                id_doc_vinculado = mov.id_documento_vinculado.split(' - ')[0].strip()
                 print(f"[TRÂNSITO] Documento vinculado encontrado no movimento 848: {id_doc_vinculado}")
-                if complemento:
-                    print(f"[TRÂNSITO] Complemento: {complemento[:80]}...")
+                if mov.complemento:
+                    print(f"[TRÂNSITO] Complemento: {mov.complemento[:80]}...")
                 return id_doc_vinculado
 
         return None
@@ -638,40 +758,15 @@ class XMLParser:
         Returns:
             Número CNJ formatado do processo de origem ou None
         """
-        # Padrão CNJ: NNNNNNN-NN.NNNN.N.NN.NNNN
-        import re
-        padrao_cnj = r'\d{7}-\d{2}\.\d{4}\.\d\.\d{2}\.\d{4}'
-
-        # Busca nos movimentos
-        for mov in self._movimentos:
-            complemento = ""
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'complemento' and child.text:
-                    complemento = child.text
-
-            # Procura padrão CNJ no complemento
-            match = re.search(padrao_cnj, complemento)
-            if match:
-                numero_origem = match.group(0)
-                print(f"[ORIGEM] Processo de origem encontrado no movimento: {numero_origem}")
-                return numero_origem
-
-            # Procura termos indicativos
-            complemento_lower = complemento.lower()
-            if 'apensado ao processo' in complemento_lower or 'dependência' in complemento_lower:
-                # Tenta extrair número mesmo em formato diferente
-                # Ex: "0815077-35.2021.8.12.0110"
-                match = re.search(padrao_cnj, complemento)
-                if match:
-                    return match.group(0)
+        # Primeiro movimento cujo complemento cita um número CNJ (extraído no parse)
+        if self._movs_com_numero_cnj:
+            numero_origem = self._movs_com_numero_cnj[0].numero_cnj
+            print(f"[ORIGEM] Processo de origem encontrado no movimento: {numero_origem}")
+            return numero_origem
 
         return None
 
-    def _identificar_primeira_peticao(
-        self,
-        docs_por_tipo: Dict[str, List[Tuple[str, datetime, str]]]
-    ) -> Optional[str]:
+    def _identificar_primeira_peticao(self) -> Optional[str]:
         """
         Identifica a primeira petição do processo (petição inicial).
 
@@ -681,72 +776,37 @@ class XMLParser:
         Returns:
             ID da primeira petição ou None
         """
-        # Busca petições (tipo 9500)
-        peticoes = []
-        for tipo_cod in TIPOS_DOCUMENTO["PETICAO"]:
-            if tipo_cod in docs_por_tipo:
-                for doc_id, doc_data, doc_descr in docs_por_tipo[tipo_cod]:
-                    if doc_data:
-                        peticoes.append((doc_id, doc_data, doc_descr))
+        # Busca petições (tipo 9500) com data
+        peticoes = [d for d in self._docs_dos_tipos("PETICAO") if d.data]
 
         if not peticoes:
             return None
 
-        # Ordena por data (mais antiga primeiro)
-        peticoes.sort(key=lambda x: x[1])
-
-        # Retorna a primeira petição
-        return peticoes[0][0]
+        # Retorna a mais antiga (min é estável: empate fica com a primeira da lista)
+        return min(peticoes, key=lambda d: d.data).id
 
     def _encontrar_data_movimento_cumprimento(self) -> Optional[date]:
         """
         Encontra a data do movimento de intimação para cumprimento mais recente.
         """
         data_movimento_cumprimento = None
-        termos_cumprimento = [
-            'impugnar', 'impugnação', 'impugnacao',
-            'cumprimento de sentença', 'cumprimento de sentenca',
-            'cumprir a obrigação', 'cumprir a obrigacao',
-            'cumprimento da obrigação', 'cumprimento da obrigacao',
-            'pagar ou impugnar',
-            'intimação para cumprimento', 'intimacao para cumprimento',
-            'intimado para cumprimento',
-            'art. 523', 'art. 535',
-        ]
 
-        for mov in self._movimentos:
-            data_mov_str = mov.attrib.get('dataHora', '')
-            data_mov = _parse_datahora_tjms(data_mov_str)
-
-            if not data_mov:
+        # Movimentos com termos de intimação para cumprimento (TERMOS["CUMPRIMENTO"])
+        # na descrição ou no complemento
+        for mov in self._movs_por_termo.get("CUMPRIMENTO", ()):
+            if not mov.data:
                 continue
 
-            # Verifica descrição e complemento do movimento
-            descricao_mov = ""
-            complemento_mov = ""
-
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'movimentolocal':
-                    descricao_mov = child.attrib.get('descricao', '').lower()
-                elif tag == 'complemento' and child.text:
-                    complemento_mov = child.text.lower()
-
-            texto_completo = f"{descricao_mov} {complemento_mov}".lower()
-
-            # Verifica se é movimento de intimação para cumprimento
-            if any(termo in texto_completo for termo in termos_cumprimento):
-                # Pega o movimento mais recente de cumprimento
-                if data_movimento_cumprimento is None or data_mov.date() > data_movimento_cumprimento:
-                    data_movimento_cumprimento = data_mov.date()
-                    print(f"[MOVIMENTO] Intimação p/ cumprimento encontrada: {data_movimento_cumprimento}")
-                    print(f"            Descrição: {descricao_mov[:80]}...")
+            # Pega o movimento mais recente de cumprimento
+            if data_movimento_cumprimento is None or mov.data.date() > data_movimento_cumprimento:
+                data_movimento_cumprimento = mov.data.date()
+                print(f"[MOVIMENTO] Intimação p/ cumprimento encontrada: {data_movimento_cumprimento}")
+                print(f"            Descrição: {mov.descricao_lower[:80]}...")
 
         return data_movimento_cumprimento
 
     def _identificar_certidao_cumprimento_sistema(
         self,
-        docs_por_tipo: Dict[str, List[Tuple[str, datetime, str]]],
         data_movimento_cumprimento: Optional[date]
     ) -> Optional[CertidaoCitacaoIntimacao]:
         """
@@ -762,13 +822,8 @@ class XMLParser:
         if not data_movimento_cumprimento:
             return None
 
-        # Coleta certidões do sistema (9508) disponíveis
-        certidoes_sistema = []
-        for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_SISTEMA"]:
-            if tipo_cod in docs_por_tipo:
-                for cert_id, cert_data, cert_descr in docs_por_tipo[tipo_cod]:
-                    if cert_data:
-                        certidoes_sistema.append((cert_id, cert_data, cert_descr))
+        # Certidões do sistema (9508) disponíveis
+        certidoes_sistema = [d for d in self._docs_dos_tipos("CERTIDAO_SISTEMA") if d.data]
 
         if not certidoes_sistema:
             return None
@@ -776,11 +831,11 @@ class XMLParser:
         # Busca certidão do sistema emitida até 15 dias úteis após o movimento
         data_limite = _dias_uteis_apos(data_movimento_cumprimento, 15)
 
-        for cert_id, cert_data, cert_descr in certidoes_sistema:
+        for cert in certidoes_sistema:
             # Certidão deve ser posterior ao movimento e dentro do limite
-            if data_movimento_cumprimento <= cert_data.date() <= data_limite:
+            if data_movimento_cumprimento <= cert.data.date() <= data_limite:
                 # A data da certidão do sistema É a data de recebimento pela PGE
-                data_recebimento = cert_data.date()
+                data_recebimento = cert.data.date()
                 termo_inicial = _primeiro_dia_util_posterior(data_recebimento)
 
                 print(f"[CUMPRIMENTO] Certidão do SISTEMA identificada por heurística")
@@ -791,7 +846,7 @@ class XMLParser:
                 return CertidaoCitacaoIntimacao(
                     tipo=TipoIntimacao.INTIMACAO_IMPUGNACAO,
                     data_expedicao=data_movimento_cumprimento,
-                    id_certidao_9508=cert_id,
+                    id_certidao_9508=cert.id,
                     data_certidao=data_recebimento,
                     data_recebimento=data_recebimento,
                     termo_inicial_prazo=termo_inicial,
@@ -803,7 +858,6 @@ class XMLParser:
 
     def _identificar_certidao_cumprimento_cartorio(
         self,
-        docs_por_tipo: Dict[str, List[Tuple[str, datetime, str]]],
         data_movimento_cumprimento: Optional[date]
     ) -> Optional[CertidaoCitacaoIntimacao]:
         """
@@ -819,83 +873,48 @@ class XMLParser:
         if not data_movimento_cumprimento:
             return None
 
-        # Termos que indicam certidão de decurso de prazo
-        termos_decurso = [
-            'inexistência de leitura',
-            'inexistencia de leitura',
-            'decurso de prazo',
-            'decurso do prazo',
-        ]
-
         # Busca movimento de certidão cartorária com indicação de decurso de prazo
-        # após o movimento de cumprimento
-        for mov in self._movimentos:
-            data_mov_str = mov.attrib.get('dataHora', '')
-            data_mov = _parse_datahora_tjms(data_mov_str)
-
-            if not data_mov:
-                continue
-
+        # (TERMOS["DECURSO"] no complemento ou na descrição) após o movimento de cumprimento
+        for mov in self._movs_por_termo.get("DECURSO", ()):
             # Deve ser posterior ao movimento de cumprimento
-            if data_mov.date() < data_movimento_cumprimento:
+            if not mov.data or mov.data.date() < data_movimento_cumprimento:
                 continue
 
-            # Verifica complemento e descrição do movimento
-            complemento_mov = ""
-            descricao_mov = ""
-            id_doc_vinculado = None
-
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'complemento' and child.text:
-                    complemento_mov = child.text.lower()
-                elif tag == 'movimentolocal':
-                    descricao_mov = child.attrib.get('descricao', '').lower()
-                elif tag == 'iddocumentovinculado' and child.text:
-                    id_doc_vinculado = child.text.strip()
-
-            texto_completo = f"{complemento_mov} {descricao_mov}".lower()
-
-            # Verifica se indica decurso de prazo
-            if any(termo in texto_completo for termo in termos_decurso):
-                # A data do movimento de decurso É a data de intimação automática
-                data_intimacao = data_mov.date()
-                termo_inicial = _primeiro_dia_util_posterior(data_intimacao)
-
-                # Busca ID da certidão vinculada ou usa o ID do documento vinculado
-                cert_id = id_doc_vinculado
-
-                # Se não tem documento vinculado, busca certidão do cartório próxima
-                if not cert_id:
-                    for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_CARTORIO"]:
-                        if tipo_cod in docs_por_tipo:
-                            for doc_id, doc_data, doc_descr in docs_por_tipo[tipo_cod]:
-                                if doc_data and doc_data.date() == data_intimacao:
-                                    cert_id = doc_id
-                                    break
-
-                print(f"[CUMPRIMENTO] Certidão de CARTÓRIO (decurso) identificada por heurística")
-                print(f"              Movimento cumprimento: {data_movimento_cumprimento}")
-                print(f"              Data decurso/intimação: {data_intimacao}")
-                print(f"              Termo inicial: {termo_inicial}")
-                print(f"              Complemento: {complemento_mov[:60]}...")
-
-                return CertidaoCitacaoIntimacao(
-                    tipo=TipoIntimacao.INTIMACAO_IMPUGNACAO,
-                    data_expedicao=data_movimento_cumprimento,
-                    id_certidao_9508=cert_id,
-                    data_certidao=data_intimacao,
-                    data_recebimento=data_intimacao,
-                    termo_inicial_prazo=termo_inicial,
-                    tipo_certidao="cartorio",
-                    identificado_por_ia=False
-                )
+            # A data do movimento de decurso É a data de intimação automática
+            data_intimacao = mov.data.date()
+            termo_inicial = _primeiro_dia_util_posterior(data_intimacao)
+
+            # Busca ID da certidão vinculada ou usa o ID do documento vinculado
+            cert_id = mov.id_documento_vinculado
+
+            # Se não tem documento vinculado, busca certidão do cartório do mesmo dia
+            if not cert_id:
+                for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_CARTORIO"]:
+                    certidoes_dia = self._docs_por_tipo_dia.get((tipo_cod, data_intimacao))
+                    if certidoes_dia:
+                        cert_id = certidoes_dia[0].id
+
+            print(f"[CUMPRIMENTO] Certidão de CARTÓRIO (decurso) identificada por heurística")
+            print(f"              Movimento cumprimento: {data_movimento_cumprimento}")
+            print(f"              Data decurso/intimação: {data_intimacao}")
+            print(f"              Termo inicial: {termo_inicial}")
+            print(f"              Complemento: {mov.complemento_lower[:60]}...")
+
+            return CertidaoCitacaoIntimacao(
+                tipo=TipoIntimacao.INTIMACAO_IMPUGNACAO,
+                data_expedicao=data_movimento_cumprimento,
+                id_certidao_9508=cert_id,
+                data_certidao=data_intimacao,
+                data_recebimento=data_intimacao,
+                termo_inicial_prazo=termo_inicial,
+                tipo_certidao="cartorio",
+                identificado_por_ia=False
+            )
 
         return None
 
     def _identificar_certidoes_candidatas_cumprimento(
         self,
-        docs_por_tipo: Dict[str, List[Tuple[str, datetime, str]]],
         data_movimento_cumprimento: Optional[date]
     ) -> List[CertidaoCandidata]:
         """
@@ -918,28 +937,16 @@ class XMLParser:
         data_minima = data_movimento_cumprimento - timedelta(days=1)
 
         # Certidões do Sistema (tipo 9508) - podem existir várias, IA vai identificar
-        for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_SISTEMA"]:
-            if tipo_cod in docs_por_tipo:
-                for cert_id, cert_data, cert_descr in docs_por_tipo[tipo_cod]:
-                    if cert_data and cert_data.date() >= data_minima:
-                        certidoes_candidatas.append(CertidaoCandidata(
-                            id_documento=cert_id,
-                            tipo_documento="9508",
-                            data_documento=cert_data.date(),
-                            descricao=cert_descr
-                        ))
-
         # Certidões Cartorária (tipo 13) - decurso de prazo
-        for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_CARTORIO"]:
-            if tipo_cod in docs_por_tipo:
-                for cert_id, cert_data, cert_descr in docs_por_tipo[tipo_cod]:
-                    if cert_data and cert_data.date() >= data_minima:
-                        certidoes_candidatas.append(CertidaoCandidata(
-                            id_documento=cert_id,
-                            tipo_documento="13",
-                            data_documento=cert_data.date(),
-                            descricao=cert_descr
-                        ))
+        for chave, tipo_documento in (("CERTIDAO_SISTEMA", "9508"), ("CERTIDAO_CARTORIO", "13")):
+            for cert in self._docs_dos_tipos(chave):
+                if cert.data and cert.data.date() >= data_minima:
+                    certidoes_candidatas.append(CertidaoCandidata(
+                        id_documento=cert.id,
+                        tipo_documento=tipo_documento,
+                        data_documento=cert.data.date(),
+                        descricao=cert.descricao
+                    ))
 
         # Ordena por data (mais recentes primeiro)
         certidoes_candidatas.sort(key=lambda x: x.data_documento or date.min, reverse=True)
@@ -954,75 +961,51 @@ class XMLParser:
 
         return certidoes_candidatas
 
-    def _identificar_certidao_citacao(
-        self,
-        docs_por_tipo: Dict[str, List[Tuple[str, datetime, str]]]
-    ) -> Optional[CertidaoCitacaoIntimacao]:
+    def _identificar_certidao_citacao(self) -> Optional[CertidaoCitacaoIntimacao]:
         """
         Identifica a certidão de CITAÇÃO usando heurística (método legado).
         A certidão de citação geralmente é encontrada corretamente por este método.
         """
         # Coleta certidões disponíveis
-        certidoes_disponiveis = []
-
-        for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_SISTEMA"]:
-            if tipo_cod in docs_por_tipo:
-                for cert in docs_por_tipo[tipo_cod]:
-                    certidoes_disponiveis.append((*cert, "sistema"))
-
-        for tipo_cod in TIPOS_DOCUMENTO["CERTIDAO_CARTORIO"]:
-            if tipo_cod in docs_por_tipo:
-                for cert in docs_por_tipo[tipo_cod]:
-                    certidoes_disponiveis.append((*cert, "cartorio"))
-
-        # Procura movimento de citação
-        for mov in self._movimentos:
-            data_mov_str = mov.attrib.get('dataHora', '')
-            data_mov = _parse_datahora_tjms(data_mov_str)
+        certidoes_disponiveis = (
+            [(cert, "sistema") for cert in self._docs_dos_tipos("CERTIDAO_SISTEMA")]
+            + [(cert, "cartorio") for cert in self._docs_dos_tipos("CERTIDAO_CARTORIO")]
+        )
 
+        # Procura movimento de citação (descrição com "citação", mas que não seja certidão)
+        for mov in self._movs_por_termo.get("CITACAO", ()):
+            data_mov = mov.data
             if not data_mov:
                 continue
 
-            descricao_mov = ""
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'movimentolocal':
-                    descricao_mov = child.attrib.get('descricao', '').lower()
-                    break
-
-            # Verifica se é citação
-            if 'citação' in descricao_mov or 'citacao' in descricao_mov:
-                if 'certidão' not in descricao_mov and 'certidao' not in descricao_mov:
-                    # Busca certidão correspondente
-                    data_limite = _dias_uteis_apos(data_mov.date(), 15)
-
-                    for cert_id, cert_data, cert_descr, cert_origem in certidoes_disponiveis:
-                        if cert_data and data_mov.date() <= cert_data.date() <= data_limite:
-                            data_recebimento = cert_data.date()
-                            termo_inicial = _primeiro_dia_util_posterior(data_recebimento)
-
-                            print(f"[CITAÇÃO] Certidão de citação identificada")
-                            print(f"          Data expedição: {data_mov.date()}")
-                            print(f"          Data recebimento: {data_recebimento}")
-                            print(f"          Termo inicial: {termo_inicial}")
-
-                            return CertidaoCitacaoIntimacao(
-                                tipo=TipoIntimacao.CITACAO,
-                                data_expedicao=data_mov.date(),
-                                id_certidao_9508=cert_id,
-                                data_certidao=data_recebimento,
-                                data_recebimento=data_recebimento,
-                                termo_inicial_prazo=termo_inicial,
-                                tipo_certidao=cert_origem,
-                                identificado_por_ia=False
-                            )
+            if "CITACAO" in mov.termos_descricao and "CERTIDAO" not in mov.termos_descricao:
+                # Busca certidão correspondente
+                data_limite = _dias_uteis_apos(data_mov.date(), 15)
+
+                for cert, cert_origem in certidoes_disponiveis:
+                    if cert.data and data_mov.date() <= cert.data.date() <= data_limite:
+                        data_recebimento = cert.data.date()
+                        termo_inicial = _primeiro_dia_util_posterior(data_recebimento)
+
+                        print(f"[CITAÇÃO] Certidão de citação identificada")
+                        print(f"          Data expedição: {data_mov.date()}")
+                        print(f"          Data recebimento: {data_recebimento}")
+                        print(f"          Termo inicial: {termo_inicial}")
+
+                        return CertidaoCitacaoIntimacao(
+                            tipo=TipoIntimacao.CITACAO,
+                            data_expedicao=data_mov.date(),
+                            id_certidao_9508=cert.id,
+                            data_certidao=data_recebimento,
+                            data_recebimento=data_recebimento,
+                            termo_inicial_prazo=termo_inicial,
+                            tipo_certidao=cert_origem,
+                            identificado_por_ia=False
+                        )
 
         return None
 
-    def _identificar_certidoes_citacao_intimacao(
-        self,
-        docs_por_tipo: Dict[str, List[Tuple[str, datetime, str]]]
-    ) -> List[CertidaoCitacaoIntimacao]:
+    def _identificar_certidoes_citacao_intimacao(self) -> List[CertidaoCitacaoIntimacao]:
         """
         Identifica apenas a certidão de CITAÇÃO (heurística).
         A certidão de intimação para cumprimento será identificada pela IA.
@@ -1030,7 +1013,7 @@ class XMLParser:
         certidoes = []
 
         # Identifica certidão de citação (método legado funciona bem)
-        cert_citacao = self._identificar_certidao_citacao(docs_por_tipo)
+        cert_citacao = self._identificar_certidao_citacao()
         if cert_citacao:
             certidoes.append(cert_citacao)
 
@@ -1062,42 +1045,26 @@ class XMLParser:
         pedido_cumprimento_286 = None
         data_hora_pedido_ref = None
 
-        for doc in self._documentos:
-            doc_id = doc.attrib.get('idDocumento', doc.attrib.get('id', ''))
-            doc_tipo = doc.attrib.get('tipoDocumentoLocal', doc.attrib.get('tipoDocumento', ''))
-            doc_descr = doc.attrib.get('descricao', '')
-            doc_data_str = doc.attrib.get('dataHora', '')
-            doc_data = _parse_datahora_tjms(doc_data_str)
-
-            descr_lower = doc_descr.lower()
-
-            # Verifica se é Pedido de Cumprimento pelo tipo 286
-            if doc_tipo in TIPOS_DOCUMENTO["PEDIDO_CUMPRIMENTO"]:
-                pedido_cumprimento_286 = {
-                    "id": doc_id,
-                    "tipo": doc_tipo,
-                    "descricao": doc_descr,
-                    "data": doc_data,
-                    "data_hora_str": doc_data_str
-                }
-                data_hora_pedido_ref = doc_data_str
-                print(f"[CUMPRIMENTO] ✓ Pedido de Cumprimento tipo 286 encontrado: {doc_id}")
-                print(f"              Data/Hora: {doc_data_str} - {doc_descr}")
-                break
-
-            # Verifica pela descrição
-            if 'pedido de cumprimento' in descr_lower or 'cumprimento de sentença' in descr_lower:
-                if not pedido_cumprimento_286:  # Só se ainda não encontrou tipo 286
-                    pedido_cumprimento_286 = {
-                        "id": doc_id,
-                        "tipo": doc_tipo,
-                        "descricao": doc_descr,
-                        "data": doc_data,
-                        "data_hora_str": doc_data_str
-                    }
-                    data_hora_pedido_ref = doc_data_str
-                    print(f"[CUMPRIMENTO] Pedido de Cumprimento encontrado pela descrição: {doc_id}")
-                    print(f"              Data/Hora: {doc_data_str} - {doc_descr}")
+        # O tipo 286 tem prioridade; senão, o primeiro documento cuja descrição
+        # indique pedido de cumprimento (TERMOS["PEDIDO_CUMPRIMENTO"])
+        pedidos_tipo = self._docs_dos_tipos("PEDIDO_CUMPRIMENTO")
+        pedidos_descricao = self._docs_por_termo.get("PEDIDO_CUMPRIMENTO")
+        doc_pedido = pedidos_tipo[0] if pedidos_tipo else (pedidos_descricao[0] if pedidos_descricao else None)
+
+        if doc_pedido:
+            pedido_cumprimento_286 = {
+                "id": doc_pedido.id,
+                "tipo": doc_pedido.tipo,
+                "descricao": doc_pedido.descricao,
+                "data": doc_pedido.data,
+                "data_hora_str": doc_pedido.data_hora_str
+            }
+            data_hora_pedido_ref = doc_pedido.data_hora_str
+            if pedidos_tipo:
+                print(f"[CUMPRIMENTO] ✓ Pedido de Cumprimento tipo 286 encontrado: {doc_pedido.id}")
+            else:
+                print(f"[CUMPRIMENTO] Pedido de Cumprimento encontrado pela descrição: {doc_pedido.id}")
+            print(f"              Data/Hora: {doc_pedido.data_hora_str} - {doc_pedido.descricao}")
 
         # Se não encontrou pedido 286, usa a data da intimação como fallback
         data_intimacao_cumprimento = None
@@ -1116,16 +1083,7 @@ class XMLParser:
 
         resultado["data_referencia"] = data_intimacao_cumprimento.strftime("%d/%m/%Y") if data_intimacao_cumprimento else None
 
-        # Termos que indicam planilha de cálculo na descrição
-        termos_planilha = [
-            'planilha', 'cálculo', 'calculo', 'memória de cálculo',
-            'memoria de calculo', 'demonstrativo', 'evolução do débito',
-            'evolucao do debito', 'atualização monetária', 'atualizacao monetaria',
-            'memória de cálculo atualizada', 'memoria atualizada',
-            'cálculos', 'calculos', 'débito', 'debito', 'valor atualizado',
-            'atualização do valor', 'atualizacao do valor', 'conta de liquidação',
-            'conta de liquidacao', 'valor devido'
-        ]
+        # Termos que indicam planilha de cálculo na descrição: TERMOS["PLANILHA"]
 
         # Códigos conhecidos de planilhas de cálculo
         # 9553 = Planilha de Cálculo
@@ -1157,17 +1115,17 @@ class XMLParser:
         # Janela de 90 dias (usada só se não encontramos pedido 286)
         data_limite_antes = data_intimacao_cumprimento - timedelta(days=90) if data_intimacao_cumprimento else date.today() - timedelta(days=90)
 
-        for doc in self._documentos:
-            doc_id = doc.attrib.get('idDocumento', doc.attrib.get('id', ''))
-            doc_descr = doc.attrib.get('descricao', '')
-            doc_tipo = doc.attrib.get('tipoDocumentoLocal', doc.attrib.get('tipoDocumento', ''))
-            doc_data_str = doc.attrib.get('dataHora', '')
-            doc_data = _parse_datahora_tjms(doc_data_str)
-
-            if not doc_data:
-                continue
+        # Se temos data_hora_pedido_ref (encontramos tipo 286), só os documentos com o MESMO dataHora;
+        # senão, os da janela de 90 dias (em ordem de data; as listas são reordenadas por data abaixo)
+        if data_hora_pedido_ref:
+            candidatos = [d for d in self._docs_por_data_hora.get(data_hora_pedido_ref, ()) if d.data]
+        else:
+            candidatos = self._docs_entre(data_limite_antes, data_intimacao_cumprimento)
 
-            descr_lower = doc_descr.lower()
+        for doc in candidatos:
+            doc_id = doc.id
+            doc_tipo = doc.tipo
+            doc_data = doc.data
 
             # Pega info do movimento pai (complemento) para verificar tipo real
             mov_info = self.get_movimento_info(doc_id)
@@ -1176,42 +1134,35 @@ class XMLParser:
             doc_info = {
                 "id": doc_id,
                 "tipo": doc_tipo,
-                "descricao": doc_descr,
+                "descricao": doc.descricao,
                 "data": doc_data,
                 "data_date": doc_data.date(),
-                "data_hora_str": doc_data_str,
+                "data_hora_str": doc.data_hora_str,
                 "complemento_movimento": complemento_movimento
             }
 
             # Classifica o documento
             is_pedido_cumprimento_tipo = doc_tipo in codigos_pedido_cumprimento
             is_planilha_por_codigo = doc_tipo in codigos_planilha
-            is_planilha_por_descricao = any(termo in descr_lower for termo in termos_planilha)
+            is_planilha_por_descricao = "PLANILHA" in doc.termos
             is_peticao = doc_tipo in codigos_peticao
             is_outros_doc = doc_tipo in codigos_outros_docs
 
-            # Se temos data_hora_pedido_ref (encontramos tipo 286), filtra por MESMO dataHora
             if data_hora_pedido_ref:
-                if doc_data_str == data_hora_pedido_ref:
-                    # Documento anexado no mesmo momento do pedido
-                    if is_planilha_por_codigo or is_planilha_por_descricao:
-                        doc_info["tipo"] = "9553"
-                        planilhas_no_periodo.append(doc_info)
-                        print(f"[CUMPRIMENTO] ✓ Planilha do mesmo momento: {doc_id} (dataHora={doc_data_str})")
-                    elif is_outros_doc:
-                        parece_planilha = any(termo in descr_lower for termo in termos_planilha)
-                        doc_info["tipo"] = "9553" if parece_planilha else "9509"
-                        doc_info["is_outros_doc"] = True
-                        docs_9509_filtrados.append(doc_info)
-                    elif is_pedido_cumprimento_tipo:
-                        lista_pedidos_286.append(doc_info)
-                    elif is_peticao:
-                        peticoes_no_periodo.append(doc_info)
+                # Documento anexado no mesmo momento do pedido
+                if is_planilha_por_codigo or is_planilha_por_descricao:
+                    doc_info["tipo"] = "9553"
+                    planilhas_no_periodo.append(doc_info)
+                    print(f"[CUMPRIMENTO] ✓ Planilha do mesmo momento: {doc_id} (dataHora={doc.data_hora_str})")
+                elif is_outros_doc:
+                    doc_info["tipo"] = "9553" if is_planilha_por_descricao else "9509"
+                    doc_info["is_outros_doc"] = True
+                    docs_9509_filtrados.append(doc_info)
+                elif is_pedido_cumprimento_tipo:
+                    lista_pedidos_286.append(doc_info)
+                elif is_peticao:
+                    peticoes_no_periodo.append(doc_info)
             else:
-                # Sem data_hora_pedido_ref, usa janela de 90 dias
-                if not (data_limite_antes <= doc_data.date() <= data_intimacao_cumprimento):
-                    continue
-
                 if is_pedido_cumprimento_tipo:
                     lista_pedidos_286.append(doc_info)
                     print(f"[CUMPRIMENTO] Encontrado Pedido de Cumprimento (tipo 286): {doc_id}")
@@ -1358,23 +1309,21 @@ class XMLParser:
             print(f"[CUMPRIMENTO] FALLBACK: Nenhum documento encontrado na lógica principal, buscando planilhas/petições recentes...")
             ids_adicionados = set()
             for doc in self._documentos:
-                doc_id = doc.attrib.get('idDocumento', doc.attrib.get('id', ''))
+                doc_id = doc.id
                 if not doc_id or doc_id in ids_adicionados:
                     continue
 
-                doc_descr = doc.attrib.get('descricao', '')
-                doc_tipo = doc.attrib.get('tipoDocumentoLocal', doc.attrib.get('tipoDocumento', ''))
-                doc_data_str = doc.attrib.get('dataHora', '')
-                doc_data = _parse_datahora_tjms(doc_data_str)
+                doc_descr = doc.descricao
+                doc_tipo = doc.tipo
+                doc_data = doc.data
 
                 # Filtra por data: só documentos nos últimos 90 dias antes da intimação
                 if doc_data and data_intimacao_cumprimento:
                     if not (data_limite_antes <= doc_data.date() <= data_intimacao_cumprimento):
                         continue  # Fora do período relevante
 
-                descr_lower = doc_descr.lower()
                 is_pedido_cumprimento = doc_tipo in codigos_pedido_cumprimento
-                is_planilha = doc_tipo in codigos_planilha or any(termo in descr_lower for termo in termos_planilha)
+                is_planilha = doc_tipo in codigos_planilha or "PLANILHA" in doc.termos
                 is_peticao = doc_tipo in codigos_peticao
 
                 if is_pedido_cumprimento or is_planilha or is_peticao:
@@ -1412,57 +1361,40 @@ class XMLParser:
             MovimentosRelevantes com datas de citação, trânsito, intimações
         """
         resultado = MovimentosRelevantes()
-        
+
+        # Citação: primeiro movimento com "citação" na descrição
+        for mov in self._movs_por_termo.get("CITACAO", ()):
+            if mov.data and "CITACAO" in mov.termos_descricao:
+                resultado.citacao_expedida = mov.data.date()
+                break
+
+        # Trânsito em julgado: complemento (sobrescreve) ou código nacional 848 (se ainda não há data)
         for mov in self._movimentos:
-            data_mov_str = mov.attrib.get('dataHora', '')
-            data_mov = _parse_date_tjms(data_mov_str)
-            
-            # Busca descrição e código do movimento
-            descricao = ""
-            codigo = ""
-            codigo_nacional = ""
-            complemento_texto = ""
-            
-            for child in mov.iter():
-                tag = _get_tag_name(child)
-                if tag == 'movimentolocal':
-                    codigo = child.attrib.get('codigoMovimento', '')
-                    descricao = child.attrib.get('descricao', '').lower()
-                elif tag == 'movimentonacional':
-                    codigo_nacional = child.attrib.get('codigoNacional', '')
-                elif tag == 'complemento' and child.text:
-                    complemento_texto = child.text
-            
-            # Citação
-            if data_mov and ('citação' in descricao or 'citacao' in descricao):
-                if not resultado.citacao_expedida:
-                    resultado.citacao_expedida = data_mov
-            
+            data_mov = mov.data.date() if mov.data else None
+
             # Trânsito em julgado - procura no complemento
-            if complemento_texto:
-                texto_lower = complemento_texto.lower()
-                if 'transitou em julgado' in texto_lower or 'trânsito em julgado' in texto_lower:
-                    # Tenta extrair data do texto: "em DD/MM/YYYY" ou "em DD/MM/AAAA"
-                    import re
-                    match = re.search(r'em\s+(\d{1,2})/(\d{1,2})/(\d{4})', complemento_texto)
-                    if match:
-                        try:
-                            dia, mes, ano = int(match.group(1)), int(match.group(2)), int(match.group(3))
-                            from datetime import date as dt_date
-                            resultado.transito_julgado = dt_date(ano, mes, dia)
-                        except ValueError:
-                            resultado.transito_julgado = data_mov
-                    else:
+            if "TRANSITO" in mov.termos_complemento:
+                # Tenta extrair data do texto: "em DD/MM/YYYY" ou "em DD/MM/AAAA"
+                match = PADRAO_DATA_TRANSITO.search(mov.complemento)
+                if match:
+                    try:
+                        dia, mes, ano = int(match.group(1)), int(match.group(2)), int(match.group(3))
+                        resultado.transito_julgado = date(ano, mes, dia)
+                    except ValueError:
                         resultado.transito_julgado = data_mov
-            
+                else:
+                    resultado.transito_julgado = data_mov
+
             # Trânsito em julgado pelo código nacional 848
-            if codigo_nacional in MOVIMENTOS_TRANSITO and not resultado.transito_julgado:
+            if mov.codigo_nacional in MOVIMENTOS_TRANSITO and not resultado.transito_julgado:
                 resultado.transito_julgado = data_mov
-            
-            # Intimação para impugnar
-            if data_mov and ('impugnar' in descricao or 'cumprimento' in descricao):
-                resultado.intimacao_impugnacao_expedida = data_mov
-        
+
+        # Intimação para impugnar: último movimento com "impugnar"/"cumprimento" na descrição
+        for mov in reversed(self._movs_por_termo.get("IMPUGNACAO", ())):
+            if mov.data and "IMPUGNACAO" in mov.termos_descricao:
+                resultado.intimacao_impugnacao_expedida = mov.data.date()
+                break
+
         return resultado
 
 
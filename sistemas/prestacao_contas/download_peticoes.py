@@ -0,0 +1,254 @@
+# sistemas/prestacao_contas/download_peticoes.py
+"""
+Download e classificação das petições candidatas (etapa 3 da prestação de contas).
+
+PERFORMANCE: a etapa 3 fazia uma chamada SOAP por petição, percorria o XML
+inteiro com root.iter() e extraía o texto do PDF dentro do event loop, uma
+petição depois da outra; só a classificação por IA era paralela, e começava
+depois do último download. Aqui:
+
+- As petições são baixadas em poucos lotes (TAMANHO_LOTE ids por chamada
+  SOAP), com no máximo MAX_LOTES_PARALELOS chamadas simultâneas
+- O XML de cada lote é lido com XMLPullParser: cada documento é decodificado
+  assim que sua tag fecha e o elemento é descartado em seguida, e a extração
+  do primeiro documento começa antes do parse dos demais
+- Decodificação e extração de texto rodam em thread (asyncio.to_thread),
+  sobrepostas aos downloads dos outros lotes
+- A classificação por IA de cada documento começa assim que o texto dele
+  fica pronto
+- Se o cliente desconecta, a thread de extração para no documento seguinte
+
+Uso:
+    pipeline = PipelinePeticoes(numero_cnj, peticoes, identificador.identificar_async)
+    async for mensagem, progresso in pipeline.executar():
+        yield EventoSSE(tipo="info", etapa=3, mensagem=mensagem, progresso=progresso)
+    pipeline.baixados      # [{doc, bytes, texto}] na ordem das petições
+    pipeline.classificados # [{doc, resultado, texto, bytes}] na ordem das petições
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import base64
+import binascii
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from sistemas.prestacao_contas.xml_parser import DocumentoProcesso
+# Cliente TJMS unificado (funcoes de compatibilidade)
+from services.tjms import (
+    baixar_documentos_async,
+    extrair_texto_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 4
+MAX_LOTES_PARALELOS = 3
+
+# Faixa da barra de progresso ocupada pela etapa 3 (a etapa 4 começa em 55)
+PROGRESSO_INICIO = 40
+PROGRESSO_FIM = 55
+
+# Tamanho dos blocos entregues ao XMLPullParser
+TAMANHO_BLOCO_XML = 1024 * 1024
+
+
+def iterar_conteudos_xml(xml_response: str) -> Iterator[Tuple[str, bytes]]:
+    """
+    (idDocumento, bytes) de cada documento do XML de download.
+
+    O XML já chega inteiro (o cliente TJ-MS devolve a resposta como str), mas
+    é entregue ao parser em blocos: cada documento é decodificado quando sua
+    tag fecha e o elemento é limpo logo depois, então a árvore parseada não
+    duplica o lote inteiro e o primeiro documento sai antes do parse terminar.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    for inicio in range(0, len(xml_response), TAMANHO_BLOCO_XML):
+        parser.feed(xml_response[inicio:inicio + TAMANHO_BLOCO_XML])
+        yield from _documentos_prontos(parser)
+    parser.close()
+    yield from _documentos_prontos(parser)
+
+
+def _documentos_prontos(parser: ET.XMLPullParser) -> Iterator[Tuple[str, bytes]]:
+    for _, elem in parser.read_events():
+        if elem.tag.split('}')[-1].lower() != "documento":
+            continue
+        doc_id = elem.attrib.get("idDocumento") or elem.attrib.get("id")
+        conteudo = next((filho for filho in elem if 'conteudo' in filho.tag.lower() and filho.text), None)
+        if doc_id and conteudo is not None:
+            try:
+                yield doc_id, base64.b64decode(conteudo.text)
+            except (binascii.Error, ValueError) as e:
+                logger.error(f"Erro ao decodificar documento {doc_id}: {e}")
+        elem.clear()
+
+
+class PipelinePeticoes:
+    """
+    Baixa, extrai e classifica as petições, entregando o progresso por documento.
+
+    `classificar` recebe o texto e retorna o ResultadoIdentificacao; uma falha
+    na classificação de um documento não interrompe os demais.
+    """
+
+    def __init__(
+        self,
+        numero_cnj: str,
+        peticoes: Sequence[DocumentoProcesso],
+        classificar: Callable[[str], Awaitable[Any]],
+        tamanho_lote: int = TAMANHO_LOTE,
+        max_paralelo: int = MAX_LOTES_PARALELOS,
+    ):
+        self.numero_cnj = numero_cnj
+        self.peticoes = list(peticoes)
+        self.classificar = classificar
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.max_paralelo = max(1, max_paralelo)
+
+        self.baixados: List[Dict[str, Any]] = []
+        self.classificados: List[Dict[str, Any]] = []
+
+    def _progresso(self, concluidos: int) -> int:
+        # Cada petição conta duas vezes: download e classificação
+        total = max(1, 2 * len(self.peticoes))
+        return PROGRESSO_INICIO + (PROGRESSO_FIM - PROGRESSO_INICIO) * concluidos // total
+
+    async def executar(self) -> AsyncIterator[Tuple[str, int]]:
+        """Executa o pipeline, gerando (mensagem, progresso) a cada documento baixado ou classificado."""
+        total = len(self.peticoes)
+        if not total:
+            return
+
+        loop = asyncio.get_running_loop()
+        fila: asyncio.Queue = asyncio.Queue()
+        # Cancelar a tarefa do to_thread não interrompe a thread: ela consulta o sinal
+        parar = threading.Event()
+
+        def entregar(item: tuple) -> None:
+            # Chamado também pela thread de extração
+            if not parar.is_set():
+                loop.call_soon_threadsafe(fila.put_nowait, item)
+
+        indexadas = list(enumerate(self.peticoes))
+        lotes = [indexadas[i:i + self.tamanho_lote] for i in range(0, total, self.tamanho_lote)]
+        semaforo = asyncio.Semaphore(self.max_paralelo)
+
+        baixados: Dict[int, Dict[str, Any]] = {}
+        classificados: Dict[int, Dict[str, Any]] = {}
+        tarefas: List[asyncio.Task] = []
+        downloads_pendentes = total
+        classificacoes_pendentes = 0
+        concluidos = 0
+
+        async with aiohttp.ClientSession() as session:
+            try:
+                tarefas.extend(
+                    asyncio.create_task(self._processar_lote(session, lote, semaforo, entregar, parar))
+                    for lote in lotes
+                )
+                yield f"Baixando {total} petições em {len(lotes)} lote(s)...", self._progresso(0)
+
+                while downloads_pendentes or classificacoes_pendentes:
+                    tipo, indice, dados = await fila.get()
+                    peticao = self.peticoes[indice]
+                    concluidos += 1
+
+                    if tipo == "baixado":
+                        downloads_pendentes -= 1
+                        classificacoes_pendentes += 1
+                        baixados[indice] = dados
+                        tarefas.append(asyncio.create_task(self._classificar(indice, dados, entregar)))
+                        logger.info(f"Documento {peticao.id} baixado ({len(dados['texto'])} caracteres)")
+                        mensagem = f"Documento {len(baixados)}/{total} baixado, classificando via IA..."
+
+                    elif tipo == "falha":
+                        downloads_pendentes -= 1
+                        # Sem download não há classificação: conta as duas partes
+                        concluidos += 1
+                        logger.error(f"Erro ao baixar documento {peticao.id}: {dados}")
+                        mensagem = f"Falha ao baixar documento {peticao.id}"
+
+                    else:
+                        classificacoes_pendentes -= 1
+                        if dados is not None:
+                            classificados[indice] = dados
+                        mensagem = f"{len(classificados)}/{len(baixados)} documentos classificados..."
+
+                    yield mensagem, self._progresso(concluidos)
+            finally:
+                # Cliente desconectou do SSE (ou erro): não deixa downloads, extrações e chamadas de IA órfãos
+                parar.set()
+                for tarefa in tarefas:
+                    tarefa.cancel()
+                await asyncio.gather(*tarefas, return_exceptions=True)
+
+        self.baixados = [baixados[i] for i in sorted(baixados)]
+        self.classificados = [classificados[i] for i in sorted(classificados)]
+
+    async def _processar_lote(
+        self,
+        session: aiohttp.ClientSession,
+        lote: List[Tuple[int, DocumentoProcesso]],
+        semaforo: asyncio.Semaphore,
+        entregar: Callable[[tuple], None],
+        parar: threading.Event,
+    ) -> None:
+        entregues = set()
+        erro: Any = "Conteúdo não encontrado na resposta"
+        try:
+            async with semaforo:
+                xml_docs = await baixar_documentos_async(session, self.numero_cnj, [p.id for _, p in lote])
+            await asyncio.to_thread(self._extrair_lote, xml_docs, lote, entregar, entregues, parar)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            erro = e
+        for indice, peticao in lote:
+            if indice not in entregues:
+                entregar(("falha", indice, erro))
+
+    def _extrair_lote(
+        self,
+        xml_docs: str,
+        lote: List[Tuple[int, DocumentoProcesso]],
+        entregar: Callable[[tuple], None],
+        entregues: set,
+        parar: threading.Event,
+    ) -> None:
+        """Roda em thread: decodifica e extrai o texto de cada documento, entregando um a um."""
+        por_id = {str(p.id): indice for indice, p in lote}
+        for doc_id, conteudo in iterar_conteudos_xml(xml_docs):
+            if parar.is_set():
+                return
+            indice = por_id.get(doc_id)
+            if indice is None or indice in entregues:
+                continue
+            entregues.add(indice)
+            try:
+                texto = extrair_texto_pdf(conteudo)
+            except Exception as e:
+                entregar(("falha", indice, e))
+                continue
+            entregar(("baixado", indice, {"doc": self.peticoes[indice], "bytes": conteudo, "texto": texto}))
+
+    async def _classificar(self, indice: int, doc_info: Dict[str, Any], entregar: Callable[[tuple], None]) -> None:
+        resultado: Optional[Dict[str, Any]] = None
+        try:
+            resultado_id = await self.classificar(doc_info["texto"])
+            resultado = {
+                "doc": doc_info["doc"],
+                "resultado": resultado_id,
+                "texto": doc_info["texto"],
+                "bytes": doc_info["bytes"],
+            }
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao classificar documento {doc_info['doc'].id}: {e}")
+        entregar(("classificado", indice, resultado))
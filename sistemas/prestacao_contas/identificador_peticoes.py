@@ -5,18 +5,25 @@ Identificador de Petição de Prestação de Contas
 Utiliza LLM para classificar petições e documentos.
 O prompt é configurável via painel admin (/admin/prompts-config).
 
+Cada decisão é registrada no IALogger (etapa "identificacao_peticao") e
+serve de treino para o pré-classificador local (pre_classificador.py), que
+pode dispensar a IA nos documentos de rotina.
+
 Autor: LAB/PGE-MS
 """
 
 import json
 import logging
 import re
+import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional, List
 from sqlalchemy.orm import Session
 
 from services.ia_params_resolver import get_ia_params, IAParams
+from sistemas.prestacao_contas import pre_classificador
+from sistemas.prestacao_contas.ia_logger import IALogger
 
 logger = logging.getLogger(__name__)
 
@@ -97,7 +104,7 @@ Responda APENAS com o JSON abaixo (sem explicações adicionais):
 class ResultadoIdentificacao:
     """Resultado da identificação de petição/documento"""
     tipo_documento: TipoDocumento
-    metodo: str  # 'llm', 'llm_erro', 'vazio'
+    metodo: str  # 'llm', 'llm_erro', 'vazio', 'pre_classificador'
     confianca: float  # 0.0 a 1.0
     resumo: str = ""
     menciona_anexos: bool = False
@@ -152,6 +159,29 @@ def _buscar_prompt_admin(db: Session = None) -> Optional[str]:
     return None
 
 
+def _buscar_modo_pre_classificador(db: Session = None) -> str:
+    """Modo do pré-classificador local configurado no admin (desligado, sombra ou ativo)."""
+    if not db:
+        return "desligado"
+
+    try:
+        from admin.models import ConfiguracaoIA
+
+        config = db.query(ConfiguracaoIA).filter(
+            ConfiguracaoIA.sistema == "prestacao_contas",
+            ConfiguracaoIA.chave == "pre_classificador_modo"
+        ).first()
+        modo = (config.valor.strip().lower() if config else pre_classificador.MODO_PADRAO)
+        if modo in pre_classificador.MODOS:
+            return modo
+        logger.warning(f"Modo do pré-classificador inválido: {modo}")
+
+    except Exception as e:
+        logger.warning(f"Erro ao buscar modo do pré-classificador: {e}")
+
+    return "desligado"
+
+
 class IdentificadorPeticoes:
     """
     Identificador de petições de prestação de contas usando LLM.
@@ -164,6 +194,7 @@ class IdentificadorPeticoes:
         temperatura_llm: float = None,
         db: Session = None,
         usar_llm: bool = True,  # Mantido para compatibilidade, mas sempre usa LLM
+        ia_logger: Optional[IALogger] = None,
     ):
         """
         Args:
@@ -171,8 +202,10 @@ class IdentificadorPeticoes:
             temperatura_llm: Temperatura da IA (override manual, opcional - usa resolver)
             db: Sessão do banco para buscar prompt do admin
             usar_llm: Ignorado (mantido para compatibilidade)
+            ia_logger: Logger da geração; recebe cada decisão (histórico de treino do pré-classificador)
         """
         self.db = db
+        self.ia_logger = ia_logger
 
         # Usa resolver de parâmetros por agente
         if db:
@@ -193,6 +226,12 @@ class IdentificadorPeticoes:
         # Busca prompt do admin ou usa padrão
         self.prompt_template = _buscar_prompt_admin(db) or PROMPT_IDENTIFICACAO_PADRAO
 
+        # Pré-classificador local (None se desligado ou sem versão ativa)
+        self.modo_pre_classificador = _buscar_modo_pre_classificador(db)
+        self.pre_classificador = None
+        if self.modo_pre_classificador != "desligado":
+            self.pre_classificador = pre_classificador.carregar_ativo(db)
+
     def identificar(self, texto: str) -> ResultadoIdentificacao:
         """
         Identifica se o texto é uma petição de prestação de contas.
@@ -254,7 +293,61 @@ class IdentificadorPeticoes:
                 explicacao="Texto muito curto ou vazio"
             )
 
-        return await self._identificar_com_llm(texto)
+        inicio = time.time()
+        predicao = self._prever_local(texto)
+        if predicao and predicao.dispensa_ia and self.modo_pre_classificador == "ativo":
+            resultado = ResultadoIdentificacao(
+                tipo_documento=TipoDocumento(predicao.tipo),
+                metodo="pre_classificador",
+                confianca=predicao.confianca,
+                resumo=f"Classificado localmente (pré-classificador v{predicao.versao})",
+                explicacao=f"Classificado como {predicao.tipo} sem IA"
+            )
+        else:
+            resultado = await self._identificar_com_llm(texto)
+
+        self._registrar_decisao(texto, resultado, predicao, inicio)
+        return resultado
+
+    def _prever_local(self, texto: str) -> Optional[pre_classificador.PredicaoLocal]:
+        if not self.pre_classificador:
+            return None
+        try:
+            return self.pre_classificador.prever(texto)
+        except Exception as e:
+            logger.warning(f"Erro no pré-classificador local: {e}")
+            return None
+
+    def _registrar_decisao(
+        self,
+        texto: str,
+        resultado: ResultadoIdentificacao,
+        predicao: Optional[pre_classificador.PredicaoLocal],
+        inicio: float,
+    ) -> None:
+        """Registra a decisão no IALogger (só as de metodo='llm' viram rótulo de treino)."""
+        if not self.ia_logger:
+            return
+
+        entry = self.ia_logger.iniciar_log(pre_classificador.ETAPA_LOG, "Identificação do tipo de documento")
+        entry.set_documento(None, texto[:pre_classificador.LIMITE_TEXTO])
+        entry.set_modelo(
+            f"pre_classificador_v{predicao.versao}" if resultado.metodo == "pre_classificador" else self.modelo_llm
+        )
+        resposta = {
+            "metodo": resultado.metodo,
+            "tipo": resultado.tipo_documento.value,
+            "confianca": resultado.confianca,
+            "resumo": resultado.resumo,
+            "menciona_anexos": resultado.menciona_anexos,
+            "descricao_anexos": resultado.descricao_anexos,
+        }
+        if predicao:
+            resposta["pre_classificador"] = predicao.to_dict()
+        entry.set_resposta(None, resposta)
+        entry.tempo_ms = int((time.time() - inicio) * 1000)
+        if resultado.metodo in ("llm_erro", "llm_parse_erro"):
+            entry.set_erro(resultado.explicacao or resultado.metodo)
 
     async def _identificar_com_llm(self, texto: str) -> ResultadoIdentificacao:
         """
@@ -3,7 +3,7 @@
 Modelos SQLAlchemy para o sistema de Prestação de Contas
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Float, LargeBinary, Index
 from sqlalchemy.orm import relationship
 
 from database.connection import Base
@@ -103,6 +103,11 @@ class GeracaoAnalise(Base):
     logs_ia = relationship("LogChamadaIAPrestacao", back_populates="geracao", cascade="all, delete-orphan")
     feedbacks = relationship("FeedbackPrestacao", back_populates="geracao", cascade="all, delete-orphan")
 
+    # PERFORMANCE: lista do histórico por usuário, paginada por (criado_em, id)
+    __table_args__ = (
+        Index("ix_geracoes_prestacao_contas_usuario_criado", "usuario_id", "criado_em", "id"),
+    )
+
 
 class LogChamadaIAPrestacao(Base):
     """Log detalhado de cada chamada de IA"""
@@ -156,3 +161,19 @@ class FeedbackPrestacao(Base):
 
     # Relacionamento
     geracao = relationship("GeracaoAnalise", back_populates="feedbacks")
+
+
+class ModeloPreClassificador(Base):
+    """Versões do pré-classificador local de documentos (ver pre_classificador.py)"""
+    __tablename__ = "modelos_pre_classificador_prestacao"
+
+    id = Column(Integer, primary_key=True, index=True)
+    versao = Column(Integer, nullable=False, unique=True, index=True)
+
+    artefato = Column(LargeBinary, nullable=False)  # npz com pesos, idf e temperatura
+    limiares = Column(JSON, nullable=True)  # {tipo: confiança mínima para dispensar a IA}
+    metricas = Column(JSON, nullable=True)  # Relatório da validação (precisão/recall por classe)
+    n_amostras = Column(Integer, nullable=True)
+
+    ativo = Column(Boolean, default=False, index=True)
+    criado_em = Column(DateTime, default=get_utc_now)
@@ -0,0 +1,558 @@
+# sistemas/prestacao_contas/pre_classificador.py
+"""
+Pré-classificador local de documentos da prestação de contas.
+
+PERFORMANCE: o IdentificadorPeticoes mandava o texto de todo documento
+baixado para a IA escolher entre os 5 tipos, mas a maior parte dos documentos
+de um processo é rotina (procurações, certidões, manifestações comuns). Aqui
+um modelo linear pequeno, só CPU, treinado com o histórico de decisões da IA
+(logs_chamada_ia_prestacao, etapa "identificacao_peticao"), classifica antes:
+
+- Features: n-gramas de caracteres (3 a 5) com hashing, TF-IDF e norma L2
+- Regressão logística multinomial (tipo) + binária (menciona anexos),
+  treinadas com SGD em numpy
+- Confiança calibrada por temperature scaling na validação
+- Limiar por tipo escolhido na validação para precisão >= PRECISAO_ALVO;
+  tipo sem previsões suficientes fica sem limiar (sempre vai para a IA)
+- PETICAO_PRESTACAO nunca é decidida localmente, e documento com
+  probabilidade de prestação >= MIN_PROB_PRESTACAO ou de mencionar anexos
+  >= MAX_PROB_ANEXOS sempre vai para a IA
+
+Modos (configuracoes_ia prestacao_contas/pre_classificador_modo):
+- desligado: só IA
+- sombra: IA em tudo; a previsão local é registrada junto da decisão da IA
+- ativo: a IA só é chamada quando o modelo local não dispensa
+
+Treino, avaliação da sombra e ativação de versões:
+    python scripts/treinar_pre_classificador_prestacao.py --help
+
+Autor: LAB/PGE-MS
+"""
+
+import hashlib
+import io
+import logging
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Mesmos valores de TipoDocumento (identificador_peticoes importa este módulo)
+TIPOS = ["PETICAO_PRESTACAO", "PETICAO_RELEVANTE", "NOTA_FISCAL", "COMPROVANTE", "IRRELEVANTE"]
+TIPO_PRESTACAO = "PETICAO_PRESTACAO"
+TIPOS_DISPENSAVEIS = ("PETICAO_RELEVANTE", "NOTA_FISCAL", "COMPROVANTE", "IRRELEVANTE")
+
+MODOS = ("desligado", "sombra", "ativo")
+MODO_PADRAO = "sombra"
+
+ETAPA_LOG = "identificacao_peticao"
+
+# Mesmo corte de texto do prompt de identificação
+LIMITE_TEXTO = 6000
+
+N_FEATURES = 2 ** 17
+NGRAMAS = (3, 4, 5)
+
+PRECISAO_ALVO = 0.97
+MIN_PREVISOES_LIMIAR = 20
+MIN_PROB_PRESTACAO = 0.02
+MAX_PROB_ANEXOS = 0.15
+MIN_AMOSTRAS = 50
+
+# Frequência com que cada worker confere se há outra versão ativa
+INTERVALO_VERIFICACAO_S = 300
+
+_PRIMO = np.uint64(1099511628211)
+_MISTURA = np.uint64(0x9E3779B97F4A7C15)
+
+
+# =====================================================
+# FEATURES
+# =====================================================
+
+def normalizar_texto(texto: str) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    texto = unicodedata.normalize("NFKD", texto[:LIMITE_TEXTO].lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def contar_ngramas(texto: str, n_features: int = N_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """(índices, contagens) dos n-gramas de caracteres, com hash determinístico entre processos."""
+    codigos = np.frombuffer(normalizar_texto(texto).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    partes = []
+    for n in NGRAMAS:
+        total = len(codigos) - n + 1
+        if total <= 0:
+            continue
+        h = np.full(total, n, dtype=np.uint64)
+        for k in range(n):
+            h = h * _PRIMO + codigos[k:k + total]
+        partes.append(h)
+    if not partes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    h = np.concatenate(partes) * _MISTURA
+    indices, contagens = np.unique((h >> np.uint64(32)) % np.uint64(n_features), return_counts=True)
+    return indices.astype(np.int64), contagens.astype(np.float32)
+
+
+def _tfidf(indices: np.ndarray, contagens: np.ndarray, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    valores = (1.0 + np.log(contagens)) * idf[indices]
+    norma = float(np.linalg.norm(valores))
+    return indices, (valores / norma if norma else valores).astype(np.float32)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return z / z.sum(axis=-1, keepdims=True)
+
+
+def _sigmoide(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+# =====================================================
+# MODELO
+# =====================================================
+
+@dataclass
+class ModeloLinear:
+    """Pesos do modelo; serializado como npz (sem pickle) na coluna artefato."""
+    classes: List[str]
+    idf: np.ndarray           # (n_features,)
+    pesos: np.ndarray         # (n_features, n_classes)
+    vies: np.ndarray          # (n_classes,)
+    pesos_anexos: np.ndarray  # (n_features,)
+    vies_anexos: float = 0.0
+    temperatura: float = 1.0
+
+    @classmethod
+    def vazio(cls, classes: Sequence[str], idf: np.ndarray) -> "ModeloLinear":
+        n_features = len(idf)
+        return cls(
+            classes=list(classes),
+            idf=idf,
+            pesos=np.zeros((n_features, len(classes)), dtype=np.float32),
+            vies=np.zeros(len(classes), dtype=np.float32),
+            pesos_anexos=np.zeros(n_features, dtype=np.float32),
+        )
+
+    def vetorizar(self, texto: str) -> Tuple[np.ndarray, np.ndarray]:
+        return _tfidf(*contar_ngramas(texto, len(self.idf)), self.idf)
+
+    def logits(self, indices: np.ndarray, valores: np.ndarray) -> np.ndarray:
+        return valores @ self.pesos[indices] + self.vies
+
+    def prob_anexos(self, indices: np.ndarray, valores: np.ndarray) -> float:
+        return float(_sigmoide(valores @ self.pesos_anexos[indices] + self.vies_anexos))
+
+    def prever(self, texto: str) -> Tuple[Dict[str, float], float]:
+        """({tipo: probabilidade calibrada}, probabilidade de mencionar anexos)"""
+        indices, valores = self.vetorizar(texto)
+        probs = _softmax(self.logits(indices, valores) / self.temperatura)
+        return dict(zip(self.classes, probs.tolist())), self.prob_anexos(indices, valores)
+
+    def serializar(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            classes=np.array(self.classes),
+            idf=self.idf,
+            pesos=self.pesos,
+            vies=self.vies,
+            pesos_anexos=self.pesos_anexos,
+            vies_anexos=np.array(self.vies_anexos),
+            temperatura=np.array(self.temperatura),
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def desserializar(cls, dados: bytes) -> "ModeloLinear":
+        with np.load(io.BytesIO(dados), allow_pickle=False) as npz:
+            return cls(
+                classes=[str(c) for c in npz["classes"]],
+                idf=npz["idf"],
+                pesos=npz["pesos"],
+                vies=npz["vies"],
+                pesos_anexos=npz["pesos_anexos"],
+                vies_anexos=float(npz["vies_anexos"]),
+                temperatura=float(npz["temperatura"]),
+            )
+
+
+def dispensa_ia(tipo: str, confianca: float, prob_prestacao: float, prob_anexos: float, limiares: Dict[str, Any]) -> bool:
+    """Regra da cascata: só dispensa a IA com confiança acima do limiar do tipo e sem sinal de prestação/anexos."""
+    limiar = (limiares or {}).get(tipo)
+    return (
+        tipo in TIPOS_DISPENSAVEIS
+        and limiar is not None
+        and confianca >= float(limiar)
+        and prob_prestacao < MIN_PROB_PRESTACAO
+        and prob_anexos < MAX_PROB_ANEXOS
+    )
+
+
+@dataclass
+class PredicaoLocal:
+    versao: int
+    tipo: str
+    confianca: float
+    prob_prestacao: float
+    prob_anexos: float
+    dispensa_ia: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        dados = asdict(self)
+        for chave in ("confianca", "prob_prestacao", "prob_anexos"):
+            dados[chave] = round(dados[chave], 4)
+        return dados
+
+
+class PreClassificador:
+    """Versão ativa do modelo com seus limiares."""
+
+    def __init__(self, versao: int, modelo: ModeloLinear, limiares: Optional[Dict[str, Any]]):
+        self.versao = versao
+        self.modelo = modelo
+        self.limiares = limiares or {}
+
+    def prever(self, texto: str) -> PredicaoLocal:
+        probs, prob_anexos = self.modelo.prever(texto)
+        tipo = max(probs, key=probs.get)
+        confianca = probs[tipo]
+        prob_prestacao = probs.get(TIPO_PRESTACAO, 0.0)
+        return PredicaoLocal(
+            versao=self.versao,
+            tipo=tipo,
+            confianca=confianca,
+            prob_prestacao=prob_prestacao,
+            prob_anexos=prob_anexos,
+            dispensa_ia=dispensa_ia(tipo, confianca, prob_prestacao, prob_anexos, self.limiares),
+        )
+
+
+# =====================================================
+# TREINO E AVALIAÇÃO
+# =====================================================
+
+@dataclass
+class Amostra:
+    """Documento rotulado pela IA."""
+    texto: str
+    tipo: str
+    menciona_anexos: bool = False
+
+
+def _sgd(modelo: ModeloLinear, X: List[Tuple[np.ndarray, np.ndarray]], y: np.ndarray,
+         anexos: np.ndarray, epocas: int, taxa: float, l2: float, rng: np.random.Generator) -> None:
+    for epoca in range(epocas):
+        passo = taxa / (1 + epoca)
+        for i in rng.permutation(len(X)):
+            indices, valores = X[i]
+            erro = _softmax(modelo.logits(indices, valores))
+            erro[y[i]] -= 1.0
+            pesos = modelo.pesos[indices]
+            modelo.pesos[indices] = pesos - passo * (np.outer(valores, erro) + l2 * pesos)
+            modelo.vies -= passo * erro
+
+            erro_anexos = modelo.prob_anexos(indices, valores) - anexos[i]
+            pesos = modelo.pesos_anexos[indices]
+            modelo.pesos_anexos[indices] = pesos - passo * (erro_anexos * valores + l2 * pesos)
+            modelo.vies_anexos -= passo * erro_anexos
+
+
+def _calibrar_temperatura(logits: np.ndarray, y: np.ndarray) -> float:
+    """Temperatura que minimiza a log-verossimilhança negativa na validação."""
+    melhor, melhor_nll = 1.0, float("inf")
+    for temperatura in np.geomspace(0.25, 8.0, 60):
+        probs = _softmax(logits / temperatura)
+        nll = -float(np.mean(np.log(probs[np.arange(len(y)), y] + 1e-12)))
+        if nll < melhor_nll:
+            melhor, melhor_nll = float(temperatura), nll
+    return melhor
+
+
+def escolher_limiares(
+    verdadeiros: Sequence[str],
+    previstos: Sequence[str],
+    confiancas: Sequence[float],
+    precisao_alvo: float = PRECISAO_ALVO,
+    min_previsoes: int = MIN_PREVISOES_LIMIAR,
+) -> Dict[str, Optional[float]]:
+    """
+    Menor confiança, por tipo dispensável, a partir da qual as previsões do
+    tipo têm precisão >= precisao_alvo (com ao menos min_previsoes acima dela).
+    """
+    verdadeiros, previstos, confiancas = np.asarray(verdadeiros), np.asarray(previstos), np.asarray(confiancas)
+    limiares: Dict[str, Optional[float]] = {}
+    for tipo in TIPOS_DISPENSAVEIS:
+        mascara = previstos == tipo
+        ordem = np.argsort(-confiancas[mascara], kind="stable")
+        conf = confiancas[mascara][ordem]
+        acertos = np.cumsum(verdadeiros[mascara][ordem] == tipo)
+        limiares[tipo] = None
+        for k in range(len(conf), min_previsoes - 1, -1):
+            if k and acertos[k - 1] / k >= precisao_alvo:
+                limiares[tipo] = round(float(conf[k - 1]), 4)
+                break
+    return limiares
+
+
+def relatorio_classificacao(
+    verdadeiros: Sequence[str],
+    previstos: Sequence[str],
+    dispensados: Optional[Sequence[bool]] = None,
+) -> Dict[str, Any]:
+    """Precisão/recall por tipo e, se informado, o efeito da cascata (documentos que não iriam para a IA)."""
+    verdadeiros, previstos = np.asarray(verdadeiros), np.asarray(previstos)
+    total = len(verdadeiros)
+    por_tipo = {}
+    for tipo in TIPOS:
+        previstos_tipo = int(np.sum(previstos == tipo))
+        suporte = int(np.sum(verdadeiros == tipo))
+        acertos = int(np.sum((previstos == tipo) & (verdadeiros == tipo)))
+        por_tipo[tipo] = {
+            "precisao": round(acertos / previstos_tipo, 4) if previstos_tipo else None,
+            "recall": round(acertos / suporte, 4) if suporte else None,
+            "suporte": suporte,
+            "previstos": previstos_tipo,
+        }
+    relatorio: Dict[str, Any] = {
+        "amostras": total,
+        "acuracia": round(float(np.mean(verdadeiros == previstos)), 4) if total else None,
+        "por_tipo": por_tipo,
+    }
+    if dispensados is not None:
+        dispensados = np.asarray(dispensados, dtype=bool)
+        n = int(dispensados.sum())
+        relatorio["cascata"] = {
+            "dispensados": n,
+            "cobertura": round(n / total, 4) if total else None,
+            "precisao_dispensados": round(float(np.mean(verdadeiros[dispensados] == previstos[dispensados])), 4) if n else None,
+            # Erro mais caro: prestação decidida localmente como outro tipo
+            "prestacoes_dispensadas": int(np.sum(dispensados & (verdadeiros == TIPO_PRESTACAO))),
+        }
+    return relatorio
+
+
+def treinar(
+    amostras: Sequence[Amostra],
+    n_features: int = N_FEATURES,
+    epocas: int = 12,
+    taxa: float = 0.5,
+    l2: float = 1e-6,
+    fracao_validacao: float = 0.2,
+    precisao_alvo: float = PRECISAO_ALVO,
+    semente: int = 0,
+) -> Tuple[ModeloLinear, Dict[str, Optional[float]], Dict[str, Any]]:
+    """
+    Treina com (1 - fracao_validacao) das amostras; a validação calibra a
+    temperatura, escolhe os limiares e gera o relatório.
+
+    Returns:
+        (modelo, limiares, relatorio)
+    """
+    amostras = [a for a in amostras if a.tipo in TIPOS and a.texto]
+    if len(amostras) < MIN_AMOSTRAS:
+        raise ValueError(f"São necessárias ao menos {MIN_AMOSTRAS} amostras rotuladas (há {len(amostras)})")
+
+    rng = np.random.default_rng(semente)
+    y = np.array([TIPOS.index(a.tipo) for a in amostras])
+    anexos = np.array([a.menciona_anexos for a in amostras], dtype=np.float32)
+    contagens = [contar_ngramas(a.texto, n_features) for a in amostras]
+
+    ordem = rng.permutation(len(amostras))
+    n_validacao = max(1, int(len(amostras) * fracao_validacao))
+    validacao, treino = ordem[:n_validacao], ordem[n_validacao:]
+
+    df = np.zeros(n_features, dtype=np.float32)
+    for i in treino:
+        df[contagens[i][0]] += 1
+    idf = (np.log((1 + len(treino)) / (1 + df)) + 1).astype(np.float32)
+    X = [_tfidf(*c, idf) for c in contagens]
+
+    modelo = ModeloLinear.vazio(TIPOS, idf)
+    _sgd(modelo, [X[i] for i in treino], y[treino], anexos[treino], epocas, taxa, l2, rng)
+
+    logits = np.array([modelo.logits(*X[i]) for i in validacao])
+    modelo.temperatura = _calibrar_temperatura(logits, y[validacao])
+    probs = _softmax(logits / modelo.temperatura)
+    prob_anexos = np.array([modelo.prob_anexos(*X[i]) for i in validacao])
+
+    verdadeiros = [TIPOS[i] for i in y[validacao]]
+    previstos = [TIPOS[i] for i in probs.argmax(axis=1)]
+    confiancas = probs.max(axis=1)
+    limiares = escolher_limiares(verdadeiros, previstos, confiancas, precisao_alvo)
+
+    prob_prestacao = probs[:, TIPOS.index(TIPO_PRESTACAO)]
+    dispensados = [
+        dispensa_ia(previstos[i], confiancas[i], prob_prestacao[i], prob_anexos[i], limiares)
+        for i in range(len(validacao))
+    ]
+    relatorio = relatorio_classificacao(verdadeiros, previstos, dispensados)
+    relatorio.update({
+        "treino": len(treino),
+        "temperatura": round(modelo.temperatura, 4),
+        "precisao_alvo": precisao_alvo,
+        "recall_anexos": _recall_anexos(anexos[validacao], prob_anexos),
+    })
+    return modelo, limiares, relatorio
+
+
+def _recall_anexos(verdadeiros: np.ndarray, probs: np.ndarray) -> Optional[float]:
+    """Fração dos documentos que mencionam anexos que a cascata mandaria para a IA."""
+    positivos = verdadeiros > 0.5
+    if not positivos.any():
+        return None
+    return round(float(np.mean(probs[positivos] >= MAX_PROB_ANEXOS)), 4)
+
+
+# =====================================================
+# BANCO DE DADOS
+# =====================================================
+
+def carregar_amostras(db: Session, desde: Optional[datetime] = None) -> List[Amostra]:
+    """Decisões da IA registradas na identificação; documentos repetidos ficam com o rótulo mais recente."""
+    from sistemas.prestacao_contas.models import LogChamadaIAPrestacao
+
+    query = db.query(LogChamadaIAPrestacao).filter(
+        LogChamadaIAPrestacao.etapa == ETAPA_LOG,
+        LogChamadaIAPrestacao.sucesso == True,
+    )
+    if desde:
+        query = query.filter(LogChamadaIAPrestacao.criado_em >= desde)
+
+    por_texto: Dict[str, Amostra] = {}
+    for log in query.order_by(LogChamadaIAPrestacao.criado_em).yield_per(500):
+        dados = log.resposta_parseada or {}
+        if dados.get("metodo") != "llm" or dados.get("tipo") not in TIPOS or not log.documento_texto:
+            continue
+        chave = hashlib.sha1(log.documento_texto.encode("utf-8")).hexdigest()
+        por_texto[chave] = Amostra(log.documento_texto, dados["tipo"], bool(dados.get("menciona_anexos")))
+    return list(por_texto.values())
+
+
+def avaliar_sombra(db: Session, desde: Optional[datetime] = None, versao: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compara as previsões locais registradas em modo sombra com a decisão da IA
+    no mesmo documento e sugere limiares com base nelas.
+    """
+    from sistemas.prestacao_contas.models import LogChamadaIAPrestacao
+
+    query = db.query(LogChamadaIAPrestacao.resposta_parseada).filter(
+        LogChamadaIAPrestacao.etapa == ETAPA_LOG,
+        LogChamadaIAPrestacao.sucesso == True,
+    )
+    if desde:
+        query = query.filter(LogChamadaIAPrestacao.criado_em >= desde)
+
+    verdadeiros, previstos, confiancas, dispensados = [], [], [], []
+    for (dados,) in query.yield_per(1000):
+        dados = dados or {}
+        local = dados.get("pre_classificador")
+        if dados.get("metodo") != "llm" or not local or (versao is not None and local.get("versao") != versao):
+            continue
+        verdadeiros.append(dados.get("tipo"))
+        previstos.append(local["tipo"])
+        confiancas.append(local["confianca"])
+        dispensados.append(bool(local.get("dispensa_ia")))
+
+    relatorio = relatorio_classificacao(verdadeiros, previstos, dispensados)
+    relatorio["limiares_sugeridos"] = escolher_limiares(verdadeiros, previstos, confiancas)
+    return relatorio
+
+
+def salvar_modelo(
+    db: Session,
+    modelo: ModeloLinear,
+    limiares: Dict[str, Optional[float]],
+    relatorio: Dict[str, Any],
+    n_amostras: int,
+    ativar: bool = False,
+):
+    """Grava uma nova versão (e opcionalmente a torna a única ativa)."""
+    from sistemas.prestacao_contas.models import ModeloPreClassificador
+
+    versao = (db.query(func.max(ModeloPreClassificador.versao)).scalar() or 0) + 1
+    if ativar:
+        db.query(ModeloPreClassificador).update({ModeloPreClassificador.ativo: False})
+    registro = ModeloPreClassificador(
+        versao=versao,
+        artefato=modelo.serializar(),
+        limiares=limiares,
+        metricas=relatorio,
+        n_amostras=n_amostras,
+        ativo=ativar,
+    )
+    db.add(registro)
+    db.commit()
+    invalidar_cache()
+    return registro
+
+
+def ativar_versao(db: Session, versao: Optional[int]) -> bool:
+    """Ativa a versão informada (None desativa todas)."""
+    from sistemas.prestacao_contas.models import ModeloPreClassificador
+
+    if versao is not None and not db.query(ModeloPreClassificador.id).filter(ModeloPreClassificador.versao == versao).first():
+        return False
+    db.query(ModeloPreClassificador).update(
+        {ModeloPreClassificador.ativo: ModeloPreClassificador.versao == versao},
+        synchronize_session=False,
+    )
+    db.commit()
+    invalidar_cache()
+    return True
+
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, Any] = {"verificado_em": None, "pre_classificador": None}
+
+
+def carregar_ativo(db: Session) -> Optional[PreClassificador]:
+    """
+    Versão ativa, com cache por processo. O artefato só é lido do banco
+    quando a versão ativa muda; os limiares são relidos a cada verificação.
+    """
+    from sistemas.prestacao_contas.models import ModeloPreClassificador
+
+    agora = time.monotonic()
+    with _cache_lock:
+        verificado_em, atual = _cache["verificado_em"], _cache["pre_classificador"]
+    if verificado_em is not None and agora - verificado_em < INTERVALO_VERIFICACAO_S:
+        return atual
+
+    try:
+        ativo = db.query(
+            ModeloPreClassificador.id, ModeloPreClassificador.versao, ModeloPreClassificador.limiares
+        ).filter(ModeloPreClassificador.ativo == True).order_by(ModeloPreClassificador.versao.desc()).first()
+
+        if ativo is None:
+            atual = None
+        elif atual is not None and atual.versao == ativo.versao:
+            atual = PreClassificador(atual.versao, atual.modelo, ativo.limiares)
+        else:
+            artefato = db.query(ModeloPreClassificador.artefato).filter(ModeloPreClassificador.id == ativo.id).scalar()
+            atual = PreClassificador(ativo.versao, ModeloLinear.desserializar(artefato), ativo.limiares)
+            logger.info(f"[PreClassificador] Versão {ativo.versao} carregada")
+    except Exception as e:
+        # Sem modelo a identificação continua só com a IA
+        logger.warning(f"[PreClassificador] Erro ao carregar modelo ativo: {e}")
+
+    with _cache_lock:
+        _cache.update(verificado_em=agora, pre_classificador=atual)
+    return atual
+
+
+def invalidar_cache() -> None:
+    with _cache_lock:
+        _cache.update(verificado_em=None, pre_classificador=None)
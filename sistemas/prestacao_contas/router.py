@@ -28,6 +28,7 @@ from auth.dependencies import get_current_active_user
 from auth.models import User
 from database.connection import get_db
 from utils.security_sanitizer import sanitize_html
+from utils.historico import LIMITE_MAXIMO, consultar_historico, preview_sql
 from sistemas.prestacao_contas.models import GeracaoAnalise, FeedbackPrestacao
 from sistemas.prestacao_contas.schemas import (
     AnalisarProcessoRequest,
@@ -741,29 +742,44 @@ def _pode_anexar_documentos(geracao: GeracaoAnalise) -> bool:
 @limit_default
 async def listar_historico(
     request: Request,
-    limit: int = Query(default=20, le=100),
-    offset: int = Query(default=0),
+    limit: int = Query(default=20, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(default=None, description="proximo_cursor da página anterior"),
     parecer: Optional[str] = Query(default=None),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Lista histórico de análises do usuário"""
-
-    query = db.query(GeracaoAnalise).filter(
-        GeracaoAnalise.usuario_id == current_user.id
-    )
+    """
+    Lista histórico de análises do usuário.
 
+    PERFORMANCE: não carrega PDFs em base64, textos extraídos, prompts nem a
+    fundamentação (só um preview calculado no SQL); a análise completa vem de
+    /historico/{id}. Paginação por cursor (proximo_cursor).
+    """
+    G = GeracaoAnalise
+    filtros = [G.usuario_id == current_user.id]
     if parecer:
-        query = query.filter(GeracaoAnalise.parecer == parecer)
-
-    total = query.count()
-
-    geracoes = query.order_by(
-        GeracaoAnalise.criado_em.desc()
-    ).offset(offset).limit(limit).all()
+        filtros.append(G.parecer == parecer)
+
+    total = db.query(G.id).filter(*filtros).count()
+
+    pagina = consultar_historico(
+        db, G,
+        colunas=[
+            G.numero_cnj, G.numero_cnj_formatado, G.status, G.parecer,
+            G.valor_bloqueado, G.valor_utilizado, G.valor_devolvido,
+            G.medicamento_pedido, G.medicamento_comprado,
+            G.modelo_usado, G.tempo_processamento_ms, G.erro,
+            G.documentos_faltantes, G.mensagem_erro_usuario, G.estado_expira_em,
+        ],
+        filtros=filtros,
+        extras={"preview": preview_sql(G.fundamentacao)},
+        limite=limit,
+        cursor=cursor,
+    )
 
     return HistoricoResponse(
         total=total,
+        proximo_cursor=pagina.proximo_cursor,
         geracoes=[
             GeracaoResponse(
                 id=g.id,
@@ -771,9 +787,7 @@ async def listar_historico(
                 numero_cnj_formatado=g.numero_cnj_formatado,
                 status=g.status,
                 parecer=g.parecer,
-                fundamentacao=g.fundamentacao,
-                irregularidades=g.irregularidades,
-                perguntas_usuario=g.perguntas_usuario,
+                preview=extras["preview"],
                 valor_bloqueado=g.valor_bloqueado,
                 valor_utilizado=g.valor_utilizado,
                 valor_devolvido=g.valor_devolvido,
@@ -790,7 +804,7 @@ async def listar_historico(
                 estado_expirado=_calcular_estado_expirado(g) if g.status in ("aguardando_documentos", "aguardando_nota_fiscal") else None,
                 permite_anexar=_pode_anexar_documentos(g),
             )
-            for g in geracoes
+            for g, extras in pagina.itens
         ]
     )
 
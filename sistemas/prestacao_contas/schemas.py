@@ -122,6 +122,8 @@ class GeracaoResponse(BaseModel):
     fundamentacao: Optional[str] = None
     irregularidades: Optional[List[str]] = None
     perguntas_usuario: Optional[List[str]] = None
+    # Início da fundamentação (só no histórico; o texto completo vem do detalhe)
+    preview: Optional[str] = None
 
     # Valores
     valor_bloqueado: Optional[float] = None
@@ -189,6 +191,7 @@ class HistoricoResponse(BaseModel):
     """Response com lista de gerações do histórico"""
     total: int
     geracoes: List[GeracaoResponse]
+    proximo_cursor: Optional[str] = None  # Enviar em ?cursor= para a próxima página
 
 
 class FeedbackResponse(BaseModel):
@@ -46,6 +46,15 @@ CONFIGURACOES_PADRAO = [
         "tipo_valor": "number",
         "descricao": "Temperatura para análise final",
     },
+
+    # Pré-classificador local (ver pre_classificador.py)
+    {
+        "sistema": "prestacao_contas",
+        "chave": "pre_classificador_modo",
+        "valor": "sombra",
+        "tipo_valor": "string",
+        "descricao": "Pré-classificador local antes da IA de identificação: desligado, sombra (só registra) ou ativo",
+    },
 ]
 
 
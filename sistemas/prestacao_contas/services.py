@@ -12,7 +12,6 @@ Coordena as 5 etapas do pipeline:
 Autor: LAB/PGE-MS
 """
 
-import asyncio
 import logging
 import os
 import aiohttp
@@ -37,6 +36,7 @@ from sistemas.prestacao_contas.extrato_paralelo import (
     ResultadoExtratoParalelo,
     is_valid_extrato,
 )
+from sistemas.prestacao_contas.download_peticoes import PipelinePeticoes
 from sistemas.prestacao_contas.identificador_peticoes import (
     IdentificadorPeticoes,
     TipoDocumento,
@@ -581,7 +581,8 @@ class OrquestradorPrestacaoContas:
             identificador = IdentificadorPeticoes(
                 modelo_llm=self.modelo_identificacao,
                 temperatura_llm=self.temperatura_identificacao,
-                db=self.db
+                db=self.db,
+                ia_logger=self.ia_logger
             )
 
             # Estruturas para armazenar documentos classificados
@@ -591,46 +592,24 @@ class OrquestradorPrestacaoContas:
             peticoes_relevantes = []  # Petições que irão como texto
             docs_para_baixar_anexos = []  # Documentos que mencionam anexos
 
-            # FASE 1: Baixar documentos sequencialmente
-            log_info("Baixando documentos...")
-            documentos_baixados = []  # Lista de {doc, bytes, texto}
+            # Baixa em lotes, extrai o texto em thread e classifica cada documento
+            # assim que o texto fica pronto (ver download_peticoes.py)
+            log_info("Baixando e classificando documentos...")
 
             # DEBUG: Log dos documentos que serão baixados
             logger.warning(f"DOCUMENTOS A BAIXAR ({len(peticoes_para_analisar)}):")
             for i, p in enumerate(peticoes_para_analisar):
                 logger.warning(f"  {i+1}. ID={p.id} | Codigo={p.tipo_codigo} | {p.tipo_descricao[:40] if p.tipo_descricao else 'Sem desc'}")
 
-            async with aiohttp.ClientSession() as session:
-                for i, peticao in enumerate(peticoes_para_analisar):
-                    yield EventoSSE(
-                        tipo="info",
-                        etapa=3,
-                        mensagem=f"Baixando documento {i+1}/{len(peticoes_para_analisar)}..."
-                    )
-
-                    try:
-                        xml_docs = await baixar_documentos_async(session, numero_cnj, [peticao.id])
-
-                        import base64
-                        import xml.etree.ElementTree as ET
-                        root = ET.fromstring(xml_docs)
-                        conteudo_bytes = None
-                        for elem in root.iter():
-                            if 'conteudo' in elem.tag.lower() and elem.text:
-                                conteudo_bytes = base64.b64decode(elem.text)
-                                break
-
-                        if conteudo_bytes:
-                            texto = extrair_texto_pdf(conteudo_bytes)
-                            documentos_baixados.append({
-                                "doc": peticao,
-                                "bytes": conteudo_bytes,
-                                "texto": texto
-                            })
-                            log_info(f"Documento {peticao.id} baixado ({len(texto)} caracteres)")
-                    except Exception as e:
-                        log_erro(f"Erro ao baixar documento {peticao.id}: {e}")
-                        continue
+            pipeline_peticoes = PipelinePeticoes(numero_cnj, peticoes_para_analisar, identificador.identificar_async)
+            async for mensagem, progresso in pipeline_peticoes.executar():
+                yield EventoSSE(
+                    tipo="info",
+                    etapa=3,
+                    mensagem=mensagem,
+                    progresso=progresso
+                )
+            documentos_baixados = pipeline_peticoes.baixados
 
             log_sucesso(f"{len(documentos_baixados)} documentos baixados com sucesso")
 
@@ -651,32 +630,7 @@ class OrquestradorPrestacaoContas:
                 )
                 return
 
-            # FASE 2: Classificar todos via LLM (PARALELIZADO)
-            log_info(f"Classificando {len(documentos_baixados)} documentos via IA em paralelo...")
-            yield EventoSSE(
-                tipo="info",
-                etapa=3,
-                mensagem=f"Classificando {len(documentos_baixados)} documentos via IA em paralelo..."
-            )
-
-            async def classificar_documento(doc_info):
-                """Classifica um documento via LLM"""
-                try:
-                    resultado_id = await identificador.identificar_async(doc_info["texto"])
-                    return {
-                        "doc": doc_info["doc"],
-                        "resultado": resultado_id,
-                        "texto": doc_info["texto"],
-                        "bytes": doc_info["bytes"],
-                    }
-                except Exception as e:
-                    log_erro(f"Erro ao classificar documento {doc_info['doc'].id}: {e}")
-                    return None
-
-            # Classifica todos os documentos em paralelo
-            tarefas_classificacao = [classificar_documento(d) for d in documentos_baixados]
-            resultados_classificacao = await asyncio.gather(*tarefas_classificacao)
-            documentos_classificados = [r for r in resultados_classificacao if r is not None]
+            documentos_classificados = pipeline_peticoes.classificados
 
             # Processa resultados da classificação
             log_info(f"Processando {len(documentos_classificados)} documentos classificados...")
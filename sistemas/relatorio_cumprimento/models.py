@@ -16,7 +16,7 @@ from datetime import date
 from typing import List, Dict, Optional, Any
 from enum import Enum
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from database.connection import Base
 from utils.timezone import get_utc_now
@@ -124,6 +124,11 @@ class GeracaoRelatorioCumprimento(Base):
     feedback = relationship("FeedbackRelatorioCumprimento", back_populates="geracao", uselist=False)
     logs_ia = relationship("LogChamadaIARelatorioCumprimento", back_populates="geracao", order_by="LogChamadaIARelatorioCumprimento.criado_em")
 
+    # PERFORMANCE: lista do histórico por usuário, paginada por (criado_em, id)
+    __table_args__ = (
+        Index("ix_geracoes_relatorio_cumprimento_usuario_criado", "usuario_id", "criado_em", "id"),
+    )
+
     def __repr__(self):
         return f"<GeracaoRelatorioCumprimento(id={self.id}, cumprimento='{self.numero_cumprimento}')>"
 
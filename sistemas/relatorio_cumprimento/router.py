@@ -21,7 +21,7 @@ import time
 from datetime import datetime, timezone, timedelta
 from typing import Optional, List, Dict, AsyncGenerator
 
-from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -30,6 +30,9 @@ from auth.dependencies import get_current_active_user, get_current_user_from_tok
 from auth.models import User
 from database.connection import get_db
 from utils.timezone import to_iso_utc
+from utils.historico import (
+    CABECALHO_CURSOR, LIMITE_MAXIMO, LIMITE_PADRAO, consultar_historico, preview_sql,
+)
 from utils.security_sanitizer import sanitize_html
 from utils.rate_limit import limiter, limit_ai_request, LIMITS, get_user_identifier, limit_upload, limit_export, limit_default
 
@@ -911,16 +914,37 @@ async def verificar_processo_existente(
 @limit_default
 async def listar_historico(
     request: Request,
+    response: Response,
+    limite: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(None, description="Valor do cabeçalho X-Proximo-Cursor da página anterior"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
     Lista histórico de relatórios gerados pelo usuário.
+
+    PERFORMANCE: só as colunas da lista saem do banco (autor e preview são
+    calculados no SQL); relatório, dados dos processos e documentos ficam em
+    /historico/{id}. Próxima página no cabeçalho X-Proximo-Cursor.
     """
-    historico = db.query(GeracaoRelatorioCumprimento).filter(
-        GeracaoRelatorioCumprimento.usuario_id == current_user.id,
-        GeracaoRelatorioCumprimento.status == StatusProcessamento.CONCLUIDO.value
-    ).order_by(GeracaoRelatorioCumprimento.criado_em.desc()).limit(50).all()
+    G = GeracaoRelatorioCumprimento
+    pagina = consultar_historico(
+        db, G,
+        colunas=[
+            G.numero_cumprimento, G.numero_cumprimento_formatado,
+            G.numero_principal, G.numero_principal_formatado,
+            G.transito_julgado_localizado, G.data_transito_julgado, G.tempo_processamento,
+        ],
+        filtros=[G.usuario_id == current_user.id, G.status == StatusProcessamento.CONCLUIDO.value],
+        extras={
+            "autor": G.dados_basicos[("cumprimento", "autor")].as_string(),
+            "preview": preview_sql(G.conteudo_gerado),
+        },
+        limite=limite,
+        cursor=cursor,
+    )
+    if pagina.proximo_cursor:
+        response.headers[CABECALHO_CURSOR] = pagina.proximo_cursor
 
     return [
         {
@@ -929,15 +953,14 @@ async def listar_historico(
             "numero_cumprimento_formatado": h.numero_cumprimento_formatado,
             "numero_principal": h.numero_principal,
             "numero_principal_formatado": h.numero_principal_formatado,
-            "dados_basicos": h.dados_basicos,
+            "autor": extras["autor"],
+            "preview": extras["preview"],
             "transito_julgado_localizado": h.transito_julgado_localizado,
             "data_transito_julgado": h.data_transito_julgado,
-            "conteudo_gerado": h.conteudo_gerado,
-            "documentos_baixados": h.documentos_baixados,
             "criado_em": to_iso_utc(h.criado_em),
             "tempo_processamento": h.tempo_processamento
         }
-        for h in historico
+        for h, extras in pagina.itens
     ]
 
 
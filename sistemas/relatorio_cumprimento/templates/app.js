@@ -789,7 +789,7 @@
           </div>
           <div>
             <p class="font-medium text-gray-800 text-sm">${escapeHtml(h.numero_cumprimento_formatado || h.numero_cumprimento)}</p>
-            <p class="text-xs text-gray-500">${escapeHtml(h.dados_basicos?.cumprimento?.autor || "Autor nao identificado")}</p>
+            <p class="text-xs text-gray-500">${escapeHtml(h.autor || h.dados_basicos?.cumprimento?.autor || "Autor nao identificado")}</p>
           </div>
         </div>
         <div class="text-right">
@@ -810,7 +810,7 @@
       <div class="p-3 border border-gray-100 rounded-xl mb-3 hover:border-primary-200 hover:bg-primary-50/30 transition-colors cursor-pointer"
            onclick="app.carregarDoHistorico(${h.id})">
         <p class="font-medium text-gray-800 text-sm">${escapeHtml(h.numero_cumprimento_formatado || h.numero_cumprimento)}</p>
-        <p class="text-xs text-gray-500 mt-1">${escapeHtml(h.dados_basicos?.cumprimento?.autor || "Autor nao identificado")}</p>
+        <p class="text-xs text-gray-500 mt-1">${escapeHtml(h.autor || h.dados_basicos?.cumprimento?.autor || "Autor nao identificado")}</p>
         <div class="flex items-center gap-2 mt-2">
           <span class="text-xs text-gray-400">${this.formatarData(h.criado_em)}</span>
           ${h.tempo_processamento ? `<span class="text-xs text-gray-400">- ${h.tempo_processamento}s</span>` : ""}
@@ -25,6 +25,8 @@ importlib.invalidate_caches()
 # Configura variáveis de ambiente para testes
 os.environ.setdefault("ENV", "test")
 os.environ.setdefault("GEMINI_KEY", "test-key-for-tests")
+# Rate limit / brute force / blacklist por processo: testes não compartilham contadores
+os.environ.setdefault("ESTADO_COMPARTILHADO_BACKEND", "memoria")
 
 
 import pytest
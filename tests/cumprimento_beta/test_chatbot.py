@@ -53,32 +53,6 @@ class TestChatbotService:
         assert "Estado de MS" in contexto
         assert "R$ 50.000,00" in contexto
 
-    def test_montar_historico_limita_mensagens(self):
-        """Deve limitar quantidade de mensagens no histórico"""
-        from sistemas.cumprimento_beta.services_chatbot import ChatbotService
-        from sistemas.cumprimento_beta.constants import MAX_MENSAGENS_CONTEXTO
-
-        mock_db = Mock()
-
-        # Cria mais mensagens do que o limite
-        mensagens = [Mock() for _ in range(MAX_MENSAGENS_CONTEXTO + 10)]
-        for i, m in enumerate(mensagens):
-            m.role = "user" if i % 2 == 0 else "assistant"
-            m.conteudo = f"Mensagem {i}"
-
-        mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = mensagens[:MAX_MENSAGENS_CONTEXTO]
-
-        service = ChatbotService.__new__(ChatbotService)
-        service.db = mock_db
-
-        sessao = Mock()
-        sessao.id = 1
-
-        historico = service._montar_historico(sessao)
-
-        # Deve ter no máximo MAX_MENSAGENS_CONTEXTO
-        assert len(historico) <= MAX_MENSAGENS_CONTEXTO
-
     def test_salvar_mensagem_usuario(self):
         """Deve salvar mensagem do usuário corretamente"""
         from sistemas.cumprimento_beta.services_chatbot import ChatbotService
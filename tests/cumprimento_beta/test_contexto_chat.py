@@ -0,0 +1,211 @@
+# tests/cumprimento_beta/test_contexto_chat.py
+"""
+Testes do contexto de conversa em cache do chatbot beta.
+
+Verifica:
+- Prefixo renderizado uma vez e system prompt idêntico entre mensagens
+- Prompt do usuário cresce apenas com o novo turno (append-only)
+- Memo da busca de argumentos por texto e por embedding
+- Resumo incremental em background e persistência em contextos_chat_beta
+- Retomada do contexto persistido sem renderizar o prefixo
+- Invalidação feita por outro worker descarta a cópia em memória
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import auth.models  # noqa: F401 - registra User para os mappers do beta
+from database.connection import Base
+from sistemas.cumprimento_beta import services_chatbot, services_contexto_chat
+from sistemas.cumprimento_beta.constants import CHAT_TURNOS_POR_RESUMO, CHAT_TURNOS_RECENTES, RoleChat
+from sistemas.cumprimento_beta.models import ContextoChatBeta, ConversaBeta
+from sistemas.cumprimento_beta.services_chatbot import ChatbotService
+
+SESSAO = SimpleNamespace(id=1, numero_processo="00012345620208120001", numero_processo_formatado=None)
+
+
+@pytest.fixture
+def fabrica_sessoes(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[ConversaBeta.__table__, ContextoChatBeta.__table__])
+    fabrica = sessionmaker(bind=engine)
+    monkeypatch.setattr(services_contexto_chat, "SessionLocal", fabrica)
+    services_contexto_chat._contextos.invalidate_all()
+    yield fabrica
+    services_contexto_chat._contextos.invalidate_all()
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fakes do Gemini, do embedding e da busca vetorial."""
+    estado = {"chamadas": [], "embeddings": 0, "buscas": 0, "resumos": []}
+
+    async def fake_chamar_gemini(prompt, system_prompt="", modelo=None, **kwargs):
+        estado["chamadas"].append((system_prompt, prompt))
+        return f"resposta {len(estado['chamadas'])}"
+
+    async def fake_resumo(prompt, system_prompt="", modelo=None, **kwargs):
+        estado["resumos"].append(prompt)
+        return f"resumo {len(estado['resumos'])}"
+
+    async def fake_embedding(texto):
+        estado["embeddings"] += 1
+        return [1.0, 0.0] if "prescrição" in texto.lower() else [0.0, 1.0]
+
+    async def fake_busca(db, query, tipo_peca=None, limit=5, threshold=0.3, query_embedding=None):
+        estado["buscas"] += 1
+        assert query_embedding is not None
+        return [{"id": 7, "titulo": "Prescrição intercorrente", "conteudo": "Art. 921 CPC", "nome": "x"}]
+
+    monkeypatch.setattr(services_chatbot, "chamar_gemini", fake_chamar_gemini)
+    monkeypatch.setattr(services_contexto_chat, "chamar_gemini", fake_resumo)
+    monkeypatch.setattr(services_chatbot, "generate_embedding_for_query", fake_embedding)
+    monkeypatch.setattr(services_chatbot, "buscar_argumentos_vetorial", fake_busca)
+    return estado
+
+
+def _service(db, renderizacoes):
+    service = ChatbotService.__new__(ChatbotService)
+    service.db = db
+    service._modelo = "gemini-teste"
+    service._prompt_sistema = "Sistema.\n\n{contexto_processo}"
+
+    def contexto_processo(sessao):
+        renderizacoes.append(sessao.id)
+        return "**Processo:** 0001234"
+
+    service._montar_contexto_processo = contexto_processo
+    return service
+
+
+async def _conversar(service, mensagens):
+    for mensagem in mensagens:
+        await service.enviar_mensagem(SESSAO, mensagem)
+    await asyncio.sleep(0)
+
+
+def test_prefixo_estavel_e_prompt_append_only(fabrica_sessoes, llm):
+    db = fabrica_sessoes()
+    renderizacoes = []
+    service = _service(db, renderizacoes)
+
+    asyncio.run(_conversar(service, ["Qual o valor?", "E os juros?", "Quem é o exequente?"]))
+
+    sistemas = {sistema for sistema, _ in llm["chamadas"]}
+    prompts = [prompt for _, prompt in llm["chamadas"]]
+    assert renderizacoes == [1]
+    assert sistemas == {"Sistema.\n\n**Processo:** 0001234"}
+    # Cada prompt contém o histórico anterior inteiro, com o novo turno no fim
+    historico_2 = prompts[1].split("\n\n## Argumentos")[0]
+    assert prompts[2].startswith(historico_2 + "\nUSER: E os juros?\nASSISTANT: resposta 2\n\n")
+    assert prompts[2].endswith("Mensagem atual: Quem é o exequente?")
+    assert db.query(ContextoChatBeta).one().prefixo == "Sistema.\n\n**Processo:** 0001234"
+
+
+def test_memo_de_argumentos_por_texto_e_embedding(fabrica_sessoes, llm):
+    db = fabrica_sessoes()
+    service = _service(db, [])
+
+    asyncio.run(_conversar(service, [
+        "Há prescrição intercorrente?",
+        "há   PRESCRIÇÃO intercorrente?",   # mesmo texto normalizado: nem gera embedding
+        "E a prescrição do crédito?",       # embedding igual: reaproveita a busca
+    ]))
+
+    assert llm["buscas"] == 1
+    assert llm["embeddings"] == 2
+    assert all("## Argumentos Jurídicos Relevantes" in prompt for _, prompt in llm["chamadas"])
+    # Argumentos vão no prompt do usuário, não no prefixo
+    assert all("Art. 921" not in sistema for sistema, _ in llm["chamadas"])
+    mensagens = db.query(ConversaBeta).filter(ConversaBeta.role == RoleChat.ASSISTANT).all()
+    assert [m.argumentos_encontrados for m in mensagens] == [[7], [7], [7]]
+
+
+def test_resumo_incremental_em_background(fabrica_sessoes, llm):
+    db = fabrica_sessoes()
+    service = _service(db, [])
+    total_trocas = (CHAT_TURNOS_POR_RESUMO + CHAT_TURNOS_RECENTES) // 2
+
+    async def cenario():
+        await _conversar(service, [f"pergunta {i}" for i in range(total_trocas)])
+        contexto = service._obter_contexto(SESSAO)
+        if contexto._tarefa_resumo:
+            await contexto._tarefa_resumo
+        await service.enviar_mensagem(SESSAO, "pergunta final")
+        return contexto
+
+    contexto = asyncio.run(cenario())
+
+    assert len(llm["resumos"]) == 1
+    assert "USER: pergunta 0" in llm["resumos"][0]
+    assert contexto.resumo == "resumo 1"
+    assert len(contexto.turnos) == CHAT_TURNOS_RECENTES + 2
+    ultimo_prompt = llm["chamadas"][-1][1]
+    assert ultimo_prompt.startswith("Resumo da conversa anterior:\nresumo 1")
+    assert "pergunta 0" not in ultimo_prompt
+
+    registro = fabrica_sessoes().query(ContextoChatBeta).one()
+    assert registro.resumo_historico == "resumo 1"
+    assert registro.ultima_mensagem_resumida_id == CHAT_TURNOS_POR_RESUMO
+    assert len(registro.memo_argumentos) > 0
+
+
+def test_retoma_contexto_persistido(fabrica_sessoes, llm):
+    db = fabrica_sessoes()
+    for i in range(1, 5):
+        db.add(ConversaBeta(sessao_id=1, role=RoleChat.USER, conteudo=f"antiga {i}"))
+    db.add(ContextoChatBeta(
+        sessao_id=1,
+        prefixo="Prefixo persistido",
+        versao_prefixo=services_contexto_chat.versao_modelo_prompt("Sistema.\n\n{contexto_processo}"),
+        resumo_historico="resumo salvo",
+        ultima_mensagem_resumida_id=2,
+    ))
+    db.commit()
+    renderizacoes = []
+    service = _service(db, renderizacoes)
+
+    asyncio.run(_conversar(service, ["nova"]))
+
+    sistema, prompt = llm["chamadas"][0]
+    assert renderizacoes == []
+    assert sistema == "Prefixo persistido"
+    assert "antiga 1" not in prompt and "USER: antiga 3\nUSER: antiga 4" in prompt
+
+    # Nova consolidação descarta o prefixo (memória e banco)
+    services_contexto_chat.invalidar_contexto_chat(db, 1)
+    db.commit()
+    asyncio.run(_conversar(service, ["depois da consolidação"]))
+    assert renderizacoes == [1]
+    assert llm["chamadas"][-1][0] == "Sistema.\n\n**Processo:** 0001234"
+
+
+def test_invalidacao_por_outro_worker(fabrica_sessoes, llm):
+    db = fabrica_sessoes()
+    renderizacoes = []
+    service = _service(db, renderizacoes)
+    asyncio.run(_conversar(service, ["Qual o valor?"]))
+    contexto = service._obter_contexto(SESSAO)
+    assert renderizacoes == [1] and contexto.geracao == 0
+
+    # Consolidação em outro worker: o cache deste processo não é tocado
+    outro_worker = fabrica_sessoes()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(services_contexto_chat._contextos, "invalidate", lambda *a, **k: None)
+        services_contexto_chat.invalidar_contexto_chat(outro_worker, 1)
+    outro_worker.commit()
+
+    # O resumo em background do contexto antigo não regrava o prefixo descartado
+    services_contexto_chat.persistir_contexto(fabrica_sessoes(), contexto)
+    assert fabrica_sessoes().query(ContextoChatBeta).one().prefixo is None
+
+    asyncio.run(_conversar(service, ["E depois da consolidação?"]))
+    assert renderizacoes == [1, 1]
+    assert service._obter_contexto(SESSAO).geracao == 1
+    assert "USER: Qual o valor?" in llm["chamadas"][-1][1]
+    registro = fabrica_sessoes().query(ContextoChatBeta).one()
+    assert registro.geracao == 1 and registro.prefixo == "Sistema.\n\n**Processo:** 0001234"
@@ -0,0 +1,253 @@
+# tests/cumprimento_beta/test_escalonador.py
+"""
+Testes do escalonador de documentos com janela deslizante.
+
+Verifica:
+- Simulação com distribuição de tamanhos assimétrica (relógio virtual):
+  makespan menor que em ondas e concorrência limitada às vagas
+- Vaga reocupada assim que um documento termina (SJF / LPT)
+- Timeout por documento vira resultado de erro
+- Resultados gravados em lote (GravadorResultadosBeta)
+"""
+
+import asyncio
+import heapq
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from sistemas.cumprimento_beta.constants import StatusRelevancia
+from sistemas.cumprimento_beta.services_escalonador import (
+    ORDEM_MAIOR_PRIMEIRO,
+    ORDEM_ORIGINAL,
+    CommitEmLote,
+    EscalonadorDocumentos,
+    custo_documento,
+)
+
+# Segundos por byte simulado: documento de 100 KB leva 0,2 s, de 5 KB 0,01 s
+SEGUNDOS_POR_BYTE = 0.2 / 100_000
+
+
+class RelogioFalso:
+    """
+    Relógio virtual: dormir() só termina quando o teste avança o relógio, então
+    o makespan não depende da carga da máquina que roda os testes.
+    """
+
+    def __init__(self):
+        self.agora = 0.0
+        self.ativos = 0
+        self.max_ativos = 0
+        self.inicios = []
+        self._despertar = []
+
+    async def dormir(self, segundos, rotulo=None):
+        self.ativos += 1
+        self.max_ativos = max(self.max_ativos, self.ativos)
+        self.inicios.append((self.agora, rotulo))
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._despertar, (self.agora + segundos, len(self.inicios), futuro))
+        try:
+            await futuro
+        finally:
+            self.ativos -= 1
+
+    async def _estabilizar(self, tarefa):
+        # Deixa o loop rodar até ninguém mais começar a dormir (sem I/O real, é determinístico)
+        pendentes = -1
+        while not tarefa.done() and pendentes != len(self._despertar):
+            pendentes = len(self._despertar)
+            for _ in range(10):
+                await asyncio.sleep(0)
+
+    def rodar(self, coro):
+        """Executa coro avançando o relógio até o próximo despertar; retorna (makespan, resultado)."""
+        async def _principal():
+            tarefa = asyncio.ensure_future(coro)
+            await self._estabilizar(tarefa)
+            while not tarefa.done():
+                self.agora, _, futuro = heapq.heappop(self._despertar)
+                futuro.set_result(None)
+                await self._estabilizar(tarefa)
+            return self.agora, tarefa.result()
+
+        return asyncio.run(_principal())
+
+
+def _documentos_assimetricos():
+    """24 documentos: a cada 4, um grande (processo de 200 páginas) e três pequenos."""
+    docs = []
+    for i in range(24):
+        tamanho = 100_000 if i % 4 == 0 else 5_000
+        docs.append(SimpleNamespace(id=i, tamanho_bytes=tamanho, conteudo_texto=None, paginas=0))
+    return docs
+
+
+def _simulador(relogio):
+    async def _simular(doc):
+        await relogio.dormir(doc.tamanho_bytes * SEGUNDOS_POR_BYTE, doc.id)
+        return doc.id
+    return _simular
+
+
+async def _em_ondas(docs, vagas, processar):
+    """Comportamento anterior: fatias de `vagas` documentos com gather."""
+    resultados = []
+    for i in range(0, len(docs), vagas):
+        resultados.extend(await asyncio.gather(*(processar(d) for d in docs[i:i + vagas])))
+    return resultados
+
+
+class TestSimulacaoMakespan:
+    """Simulação com tamanhos assimétricos (poucos documentos muito grandes)"""
+
+    def test_janela_deslizante_reduz_makespan(self):
+        docs = _documentos_assimetricos()
+        vagas = 4
+
+        ondas = RelogioFalso()
+        t_ondas, r_ondas = ondas.rodar(_em_ondas(docs, vagas, _simulador(ondas)))
+        sjf = RelogioFalso()
+        t_sjf, r_sjf = sjf.rodar(EscalonadorDocumentos(max_concorrentes=vagas).executar(docs, _simulador(sjf)))
+        lpt = RelogioFalso()
+        t_lpt, r_lpt = lpt.rodar(
+            EscalonadorDocumentos(max_concorrentes=vagas, ordenacao=ORDEM_MAIOR_PRIMEIRO).executar(docs, _simulador(lpt))
+        )
+
+        assert r_ondas == r_sjf == r_lpt == list(range(24))
+        # Ondas: cada onda espera o documento grande (6 x 0,2 s).
+        assert t_ondas == pytest.approx(1.2)
+        # SJF: os 18 pequenos em ~0,05 s, depois os 6 grandes em 2 rodadas nas 4 vagas
+        assert t_sjf == pytest.approx(0.44)
+        # LPT: 4 grandes de início, os 2 restantes em 0,2 s; as outras 2 vagas absorvem os pequenos
+        assert t_lpt == pytest.approx(0.4)
+        # Todas as vagas ocupadas, nunca mais que elas
+        for relogio in (sjf, lpt):
+            assert relogio.max_ativos == vagas
+            assert len(relogio.inicios) == 24
+        # LPT despacha os grandes primeiro; os 2 últimos entram assim que as primeiras vagas liberam
+        assert sorted(rotulo for _, rotulo in lpt.inicios[:6]) == [0, 4, 8, 12, 16, 20]
+        assert [inicio for inicio, _ in lpt.inicios[:6]] == pytest.approx([0.0] * 4 + [0.2] * 2)
+
+
+class TestEscalonador:
+    """Comportamento do pool de workers"""
+
+    def test_vaga_reocupada_sem_esperar_documento_lento(self):
+        lento = SimpleNamespace(id="lento", tamanho_bytes=100_000)
+        rapidos = [SimpleNamespace(id=f"r{i}", tamanho_bytes=1_000) for i in range(6)]
+        concluidos = []
+
+        async def processar(doc):
+            await asyncio.sleep(0.2 if doc.id == "lento" else 0.01)
+            return doc.id
+
+        escalonador = EscalonadorDocumentos(max_concorrentes=2, ordenacao=ORDEM_ORIGINAL)
+        asyncio.run(escalonador.executar(
+            [lento] + rapidos, processar,
+            ao_concluir=lambda indice, doc, resultado: concluidos.append(resultado)
+        ))
+
+        # Com ondas de 2, só 1 rápido terminaria antes do lento
+        assert concluidos[-1] == "lento"
+        assert len(concluidos) == 7
+
+    def test_ordenacao_por_custo(self):
+        docs = [
+            SimpleNamespace(id="texto", tamanho_bytes=0, conteudo_texto="x" * 500, paginas=0),
+            SimpleNamespace(id="grande", tamanho_bytes=90_000),
+            SimpleNamespace(id="paginas", tamanho_bytes=0, conteudo_texto=None, paginas=10),
+            SimpleNamespace(id="pequeno", tamanho_bytes=100),
+        ]
+
+        ordem = [doc.id for _, doc in EscalonadorDocumentos().ordenar(docs)]
+
+        assert ordem == ["pequeno", "texto", "paginas", "grande"]
+        assert custo_documento(docs[2]) == 30_000
+
+    def test_timeout_por_documento_vira_resultado_de_erro(self):
+        docs = [SimpleNamespace(id=1, tamanho_bytes=1), SimpleNamespace(id=2, tamanho_bytes=2)]
+
+        async def processar(doc):
+            await asyncio.sleep(5 if doc.id == 2 else 0)
+            return "ok"
+
+        escalonador = EscalonadorDocumentos(max_concorrentes=2, timeout_documento_s=0.05)
+        resultados = asyncio.run(escalonador.executar(
+            docs, processar,
+            ao_falhar=lambda doc, exc: f"erro:{type(exc).__name__}"
+        ))
+
+        assert resultados == ["ok", "erro:TimeoutError"]
+
+    def test_sem_ao_falhar_propaga_excecao(self):
+        async def processar(doc):
+            raise RuntimeError("falhou")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(EscalonadorDocumentos().executar([SimpleNamespace(id=1)], processar))
+
+
+class TestGravacaoEmLote:
+    """Resultados aplicados conforme chegam e gravados em lote"""
+
+    def test_commit_em_lote(self):
+        db = Mock()
+        lote = CommitEmLote(db, tamanho_lote=3, intervalo_s=60)
+
+        gravados = [lote.registrar() for _ in range(7)]
+        lote.gravar()
+        lote.gravar()
+
+        assert gravados == [False, False, True, False, False, True, False]
+        assert db.commit.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_processar_sessao_grava_resultados_em_lote(self):
+        import auth.models  # noqa: F401 - registra User para os mappers do beta
+        from sistemas.cumprimento_beta.services_processamento_unificado import (
+            ProcessamentoUnificadoService,
+            ResultadoProcessamento,
+        )
+
+        docs = [
+            SimpleNamespace(id=i, tamanho_bytes=100 * i, status_relevancia=StatusRelevancia.PENDENTE)
+            for i in range(1, 26)
+        ]
+        sessao = SimpleNamespace(id=1, status=None, documentos_relevantes=0, documentos_irrelevantes=0)
+
+        db = Mock()
+        db.query.return_value.filter.return_value.all.return_value = docs
+
+        service = ProcessamentoUnificadoService.__new__(ProcessamentoUnificadoService)
+        service.db = db
+        service._modelo = "gemini-teste"
+        service._categoria = None
+        service._max_concurrent = 4
+        service._timeout_documento = 1
+
+        async def processar(doc):
+            await asyncio.sleep(0)
+            if doc.id == 5:
+                raise RuntimeError("falha no LLM")
+            relevante = doc.id % 2 == 0
+            return ResultadoProcessamento(
+                documento_id=doc.id,
+                relevante=relevante,
+                motivo="ok",
+                dados_extraidos={"resumo": "x"} if relevante else None
+            )
+
+        service.processar_documento = processar
+
+        estatisticas = await service.processar_sessao(sessao)
+
+        assert estatisticas == {"total": 25, "relevantes": 12, "irrelevantes": 12, "jsons_criados": 12, "erros": 1}
+        assert sessao.documentos_relevantes == 12
+        assert docs[4].status_relevancia == StatusRelevancia.IRRELEVANTE
+        assert docs[4].motivo_irrelevancia == "Erro: falha no LLM"
+        assert db.add.call_count == 12
+        # status da sessão + 2 lotes de 10 + lote final com os 5 restantes
+        assert db.commit.call_count == 4
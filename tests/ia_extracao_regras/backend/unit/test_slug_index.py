@@ -0,0 +1,254 @@
+# tests/ia_extracao_regras/backend/unit/test_slug_index.py
+"""
+Testes do indice reverso de referencias a slugs (services_slug_index).
+
+Cobre:
+- Extracao de referencias (regras AST, dependency_config, perguntas)
+- Manutencao automatica no flush (insert, update, delete)
+- Reconstrucao completa do indice
+- Renomeacao carrega apenas entidades apontadas pelo indice
+"""
+
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database.connection import Base
+
+from sistemas.gerador_pecas.models_extraction import (
+    ExtractionVariable, ExtractionQuestion, VariableSlugReference
+)
+from admin.models_prompts import PromptModulo, RegraDeterministicaTipoPeca
+from sistemas.gerador_pecas.services_slug_index import (
+    SlugReferenceIndex,
+    extrair_referencias,
+    ENTITY_PROMPT_MODULO,
+    ENTITY_REGRA_TIPO_PECA,
+    ENTITY_EXTRACTION_VARIABLE,
+    ENTITY_EXTRACTION_QUESTION,
+)
+from sistemas.gerador_pecas.services_slug_rename import SlugRenameService, SlugConsistencyChecker
+
+
+REGRA_COMPOSTA = {
+    "type": "and",
+    "conditions": [
+        {"type": "condition", "variable": "autor_idoso", "operator": "equals", "value": True},
+        {"type": "not", "condition": {"type": "condition", "variable": "valor_alto", "operator": "equals", "value": True}},
+    ]
+}
+
+
+class BaseSlugIndexTestCase(unittest.TestCase):
+    """Caso de teste base com banco em memoria."""
+
+    def setUp(self):
+        self.engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False}
+        )
+        self.Session = sessionmaker(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.Session()
+        self.indice = SlugReferenceIndex(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+
+    def _create_prompt_modulo(self, nome, regra=None, regra_secundaria=None, ativo=True):
+        modulo = PromptModulo(
+            tipo="conteudo",
+            nome=nome,
+            titulo=nome.title(),
+            conteudo="Conteudo de teste",
+            regra_deterministica=regra,
+            regra_deterministica_secundaria=regra_secundaria,
+            ativo=ativo
+        )
+        self.db.add(modulo)
+        self.db.flush()
+        return modulo
+
+    def _create_variavel(self, slug, **kwargs):
+        variavel = ExtractionVariable(
+            slug=slug,
+            label=slug,
+            tipo="text",
+            ativo=True,
+            depends_on_variable=kwargs.get("depends_on_variable"),
+            dependency_config=kwargs.get("dependency_config")
+        )
+        self.db.add(variavel)
+        self.db.flush()
+        return variavel
+
+    def _refs(self, entity_type, entity_id):
+        rows = self.db.query(VariableSlugReference).filter(
+            VariableSlugReference.entity_type == entity_type,
+            VariableSlugReference.entity_id == entity_id
+        ).all()
+        return sorted((r.slug, r.location) for r in rows)
+
+
+class TestExtrairReferencias(BaseSlugIndexTestCase):
+
+    def test_regra_composta_com_not(self):
+        modulo = PromptModulo(regra_deterministica=REGRA_COMPOSTA)
+        self.assertEqual(extrair_referencias(modulo), [
+            ("autor_idoso", "regra_deterministica.conditions[0].variable"),
+            ("valor_alto", "regra_deterministica.conditions[1].condition.variable"),
+        ])
+
+    def test_pergunta_com_dependency_config(self):
+        pergunta = ExtractionQuestion(
+            nome_variavel_sugerido="tem_laudo",
+            depends_on_variable="tipo_acao",
+            dependency_config={"conditions": [{"variable": "tipo_acao"}, {"variable": "urgente"}]}
+        )
+        self.assertEqual(extrair_referencias(pergunta), [
+            ("tipo_acao", "depends_on_variable"),
+            ("tipo_acao", "dependency_config.conditions[0].variable"),
+            ("urgente", "dependency_config.conditions[1].variable"),
+            ("tem_laudo", "nome_variavel_sugerido"),
+        ])
+
+    def test_entidade_nao_indexavel(self):
+        self.assertEqual(extrair_referencias(object()), [])
+
+
+class TestManutencaoIndice(BaseSlugIndexTestCase):
+
+    def test_insert_indexa_no_flush(self):
+        modulo = self._create_prompt_modulo("mod_a", REGRA_COMPOSTA)
+        self.assertEqual(self.indice.buscar_ids("autor_idoso", ENTITY_PROMPT_MODULO), [modulo.id])
+        self.assertEqual(self.indice.buscar_ids("valor_alto", ENTITY_PROMPT_MODULO), [modulo.id])
+
+    def test_update_reindexa(self):
+        modulo = self._create_prompt_modulo("mod_a", REGRA_COMPOSTA)
+        self.db.commit()
+
+        modulo.regra_deterministica = {"type": "condition", "variable": "outra", "operator": "equals", "value": 1}
+        self.db.commit()
+
+        self.assertEqual(self.indice.buscar_ids("autor_idoso", ENTITY_PROMPT_MODULO), [])
+        self.assertEqual(self._refs(ENTITY_PROMPT_MODULO, modulo.id), [("outra", "regra_deterministica.variable")])
+
+    def test_delete_remove_do_indice(self):
+        modulo = self._create_prompt_modulo("mod_a", REGRA_COMPOSTA)
+        self.db.commit()
+        modulo_id = modulo.id
+
+        self.db.delete(modulo)
+        self.db.commit()
+
+        self.assertEqual(self._refs(ENTITY_PROMPT_MODULO, modulo_id), [])
+
+    def test_rollback_descarta_indice(self):
+        self._create_prompt_modulo("mod_a", REGRA_COMPOSTA)
+        self.db.rollback()
+        self.assertEqual(self.db.query(VariableSlugReference).count(), 0)
+
+    def test_location_prefix(self):
+        var = self._create_variavel(
+            "dependente",
+            depends_on_variable="pai",
+            dependency_config={"conditions": [{"variable": "avo"}]}
+        )
+        self.assertEqual(self.indice.buscar_ids("avo", ENTITY_EXTRACTION_VARIABLE, "dependency_config"), [var.id])
+        self.assertEqual(self.indice.buscar_ids("pai", ENTITY_EXTRACTION_VARIABLE, "dependency_config"), [])
+
+    def test_contagem_por_slug(self):
+        self._create_prompt_modulo("mod_a", REGRA_COMPOSTA)
+        self._create_prompt_modulo("mod_b", regra_secundaria=REGRA_COMPOSTA["conditions"][0])
+        self.assertEqual(
+            self.indice.contagem_por_slug(["autor_idoso", "valor_alto", "inexistente"], ENTITY_PROMPT_MODULO),
+            {"autor_idoso": 2, "valor_alto": 1}
+        )
+
+    def test_reconstruir(self):
+        modulo = self._create_prompt_modulo("mod_a", REGRA_COMPOSTA)
+        regra = RegraDeterministicaTipoPeca(
+            modulo_id=modulo.id, tipo_peca="contestacao",
+            regra_deterministica={"type": "condition", "variable": "autor_idoso", "operator": "equals", "value": True},
+            ativo=True
+        )
+        self.db.add(regra)
+        self.db.commit()
+
+        # Simula indice corrompido/vazio (ex: alteracao feita direto no banco)
+        self.db.query(VariableSlugReference).delete()
+        self.db.commit()
+
+        totais = self.indice.reconstruir()
+        self.db.commit()
+
+        self.assertEqual(totais[ENTITY_PROMPT_MODULO], 2)
+        self.assertEqual(totais[ENTITY_REGRA_TIPO_PECA], 1)
+        self.assertEqual(self.indice.buscar_ids("autor_idoso", ENTITY_REGRA_TIPO_PECA), [regra.id])
+
+
+class TestRenomeacaoViaIndice(BaseSlugIndexTestCase):
+
+    def test_renomear_carrega_apenas_referenciados(self):
+        """Prompts sem referencia nao entram no identity map durante o rename."""
+        alvo = self._create_prompt_modulo("alvo", REGRA_COMPOSTA)
+        outros_ids = [
+            self._create_prompt_modulo(f"outro_{i}", {"type": "condition", "variable": "x", "operator": "equals", "value": i}).id
+            for i in range(5)
+        ]
+        variavel_id = self._create_variavel("autor_idoso").id
+        alvo_id = alvo.id
+        self.db.commit()
+        self.db.expunge_all()
+
+        carregados = set()
+
+        def _on_load(target, context):
+            carregados.add(target.id)
+
+        event.listen(PromptModulo, "load", _on_load)
+        try:
+            result = SlugRenameService(self.db).renomear(variavel_id, "autor_maior_60")
+            self.db.commit()
+        finally:
+            event.remove(PromptModulo, "load", _on_load)
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.prompts_atualizados, 1)
+        self.assertEqual(carregados, {alvo_id})
+        self.assertTrue(carregados.isdisjoint(outros_ids))
+
+        # Indice acompanha o rename
+        self.assertEqual(self.indice.buscar_ids("autor_idoso", ENTITY_PROMPT_MODULO), [])
+        self.assertEqual(self.indice.buscar_ids("autor_maior_60", ENTITY_PROMPT_MODULO), [alvo_id])
+
+    def test_renomear_dependency_config_sem_depends_on(self):
+        """dependency_config complexo e atualizado mesmo com depends_on_variable nulo."""
+        variavel = self._create_variavel("origem")
+        dependente = self._create_variavel(
+            "dependente",
+            dependency_config={"conditions": [{"variable": "origem", "value": True}]}
+        )
+        self.db.commit()
+
+        SlugRenameService(self.db).renomear(variavel.id, "origem_nova")
+        self.db.commit()
+
+        self.db.refresh(dependente)
+        self.assertEqual(dependente.dependency_config["conditions"][0]["variable"], "origem_nova")
+
+    def test_verificar_referencias_prompts_ignora_inativos(self):
+        ativo = self._create_prompt_modulo("ativo", REGRA_COMPOSTA)
+        self._create_prompt_modulo("inativo", REGRA_COMPOSTA, ativo=False)
+        self.db.commit()
+
+        resultado = SlugConsistencyChecker(self.db).verificar_referencias_prompts("valor_alto")
+
+        self.assertEqual(resultado["total_prompts"], 1)
+        self.assertEqual(resultado["prompts"][0]["id"], ativo.id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+# tests/test_agente1_pipeline.py
+# -*- coding: utf-8 -*-
+"""
+Testes do pipeline download -> extração -> resumo do Agente 1
+(sistemas/gerador_pecas/agente_tjms.py).
+
+Testa:
+- baixar_documentos_stream entrega cada ID uma vez, com fallback individual
+- O primeiro documento é processado antes do último batch terminar
+- Documentos agrupados só são processados com todas as partes (join)
+- O base64 é liberado após o processamento
+"""
+
+import asyncio
+
+import pytest
+
+from sistemas.gerador_pecas import agente_tjms
+from sistemas.gerador_pecas.agente_tjms import (
+    AgenteTJMS,
+    DocumentoTJMS,
+    baixar_documentos_stream,
+)
+
+
+def _xml_documentos(ids):
+    docs = "".join(
+        f'<ns2:documento idDocumento="{i}"><ns2:conteudo>b64-{i}</ns2:conteudo></ns2:documento>'
+        for i in ids
+    )
+    return f'<root xmlns:ns2="http://www.cnj.jus.br/intercomunicacao-2.2.2">{docs}</root>'
+
+
+class FakeDownload:
+    """Substitui baixar_documentos_async com atraso por batch e falhas configuráveis."""
+
+    def __init__(self, atraso_por_batch=None, falha_batch_com=None, ids_indisponiveis=()):
+        self.atraso_por_batch = atraso_por_batch or {}
+        self.falha_batch_com = falha_batch_com
+        self.ids_indisponiveis = set(ids_indisponiveis)
+        self.chamadas = []
+        self.concluidos = []
+
+    async def __call__(self, session, numero_processo, lista_ids, timeout=180):
+        self.chamadas.append(list(lista_ids))
+        await asyncio.sleep(self.atraso_por_batch.get(lista_ids[0], 0))
+        if self.falha_batch_com and self.falha_batch_com in lista_ids and len(lista_ids) > 1:
+            raise RuntimeError("batch falhou")
+        if set(lista_ids) & self.ids_indisponiveis:
+            raise RuntimeError("documento indisponível")
+        self.concluidos.append(list(lista_ids))
+        return _xml_documentos(lista_ids)
+
+
+async def _coletar(stream):
+    return [item async for item in stream]
+
+
+def test_stream_entrega_cada_id_uma_vez_com_fallback(monkeypatch):
+    fake = FakeDownload(falha_batch_com="3", ids_indisponiveis={"4"})
+    monkeypatch.setattr(agente_tjms, "baixar_documentos_async", fake)
+
+    ids = [str(i) for i in range(1, 8)]
+    itens = asyncio.run(_coletar(baixar_documentos_stream(None, "0001", ids, batch_size=3, max_paralelo=2)))
+
+    assert sorted(i for i, _ in itens) == sorted(ids)
+    conteudos = dict(itens)
+    assert conteudos["4"] is None
+    assert conteudos["3"] == "b64-3"
+    # Batch [1,2,3] falhou e foi baixado individualmente
+    assert ["1"] in fake.chamadas and ["3"] in fake.chamadas
+
+
+class AgenteTeste(AgenteTJMS):
+    """Agente com processamento instrumentado (sem PDF/LLM)."""
+
+    def __init__(self, fake_download, max_workers=2):
+        super().__init__(max_workers=max_workers)
+        self.fake_download = fake_download
+        self.processados = []
+        self.conteudos_recebidos = {}
+
+    async def _processar_documento_async(self, session, doc):
+        self.processados.append((doc.id, len(self.fake_download.concluidos)))
+        self.conteudos_recebidos[doc.id] = doc.conteudo_base64
+        await asyncio.sleep(0)
+        doc.resumo = f"resumo {doc.id}"
+
+
+def test_pipeline_processa_antes_do_fim_dos_downloads_e_faz_join(monkeypatch):
+    # Batch 1 rápido, batch 2 lento: o doc "1" deve ser resumido antes do batch 2 terminar
+    fake = FakeDownload(atraso_por_batch={"1": 0.0, "6": 0.2})
+    monkeypatch.setattr(agente_tjms, "baixar_documentos_async", fake)
+
+    agrupado = DocumentoTJMS(id="5", ids_agrupados=["5", "6", "7"])
+    docs = [DocumentoTJMS(id=i) for i in ["1", "2", "3", "4"]] + [agrupado]
+    agente = AgenteTeste(fake)
+
+    asyncio.run(agente._baixar_e_processar_pipeline(None, "0001", docs))
+
+    batches_no_primeiro = dict(agente.processados)["1"]
+    assert batches_no_primeiro < len(fake.concluidos), "processamento esperou todos os downloads"
+
+    # Join: documento agrupado recebe todas as partes, na ordem original
+    assert agente.conteudos_recebidos["5"] == ["b64-5", "b64-6", "b64-7"]
+    assert all(d.resumo for d in docs)
+    # Base64 liberado após o processamento
+    assert all(d.conteudo_base64 is None for d in docs)
+
+
+def test_pipeline_marca_documento_sem_conteudo(monkeypatch):
+    fake = FakeDownload(ids_indisponiveis={"2"})
+    monkeypatch.setattr(agente_tjms, "baixar_documentos_async", fake)
+
+    docs = [DocumentoTJMS(id="1"), DocumentoTJMS(id="2")]
+    agente = AgenteTeste(fake)
+
+    asyncio.run(agente._baixar_e_processar_pipeline(None, "0001", docs))
+
+    assert docs[0].resumo == "resumo 1"
+    assert docs[1].erro == "Documento sem conteúdo disponível"
+    assert [doc_id for doc_id, _ in agente.processados] == ["1"]
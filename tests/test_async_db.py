@@ -0,0 +1,159 @@
+# tests/test_async_db.py
+"""
+Testes da camada async do banco (database/connection.py).
+
+Verifica:
+- Conversão da URL para asyncpg / aiosqlite
+- Transação por request (commit no fim, rollback em erro)
+- log_request_perf_async grava pela AsyncSession
+- Event loop não fica bloqueado por I/O de banco com vários streams simultâneos
+  (com a Session síncrona, cada query trava o loop inteiro)
+"""
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, func, select, text
+
+from admin.models_request_perf import RequestPerfLog
+from admin.services_request_perf import log_request_perf_async
+from database import connection
+from database.connection import async_sessionmaker, AsyncSession, criar_async_engine, url_async
+
+# I/O simulado por query e bloqueio máximo aceito no event loop
+QUERY_MS = 60
+LIMITE_BLOQUEIO_MS = 30
+
+
+def _dormir(ms):
+    time.sleep(ms / 1000)
+    return ms
+
+
+def _registrar_dormir(dbapi_conn, _):
+    dbapi_conn.create_function("dormir", 1, _dormir)
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """SQLite em arquivo, com engine async (aiosqlite) e sync sobre o mesmo banco."""
+    url = f"sqlite:///{tmp_path / 'teste.db'}"
+    sync_engine = create_engine(url)
+    event.listen(sync_engine, "connect", _registrar_dormir)
+    RequestPerfLog.__table__.create(sync_engine)
+
+    async_engine = criar_async_engine(url)
+    event.listen(async_engine.sync_engine, "connect", _registrar_dormir)
+    sessoes = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(connection, "async_engine", async_engine)
+    monkeypatch.setattr(connection, "AsyncSessionLocal", sessoes)
+
+    yield sync_engine, async_engine, sessoes
+
+    asyncio.run(async_engine.dispose())
+    sync_engine.dispose()
+
+
+def _contar(sync_engine):
+    with sync_engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(RequestPerfLog)).scalar()
+
+
+def _report(i=0):
+    return {"request_id": f"req-{i}", "route": "/teste", "total_ms": 10, "marks": {}, "metrics": {}}
+
+
+def test_url_async():
+    assert url_async("postgresql://u:p@h:5432/db?sslmode=require").render_as_string(hide_password=False) == (
+        "postgresql+asyncpg://u:p@h:5432/db?ssl=require"
+    )
+    assert url_async("postgresql+psycopg2://u:p@h/db").drivername == "postgresql+asyncpg"
+    assert url_async("sqlite:///x.db").drivername == "sqlite+aiosqlite"
+
+
+def test_transacao_por_request(banco):
+    sync_engine, _, _ = banco
+
+    async def cenario():
+        dependency = connection.get_async_db_transacao()
+        db = await dependency.__anext__()
+        db.add(RequestPerfLog.from_tracker_report(_report(1)))
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+
+        dependency = connection.get_async_db_transacao()
+        db = await dependency.__anext__()
+        db.add(RequestPerfLog.from_tracker_report(_report(2)))
+        with pytest.raises(ValueError):
+            await dependency.athrow(ValueError("erro na rota"))
+
+    asyncio.run(cenario())
+    assert _contar(sync_engine) == 1
+
+
+def test_log_request_perf_async(banco):
+    sync_engine, _, sessoes = banco
+
+    async def cenario():
+        primeiro = await log_request_perf_async(_report(1), user_id=7, username="ana")
+        async with sessoes() as db:
+            segundo = await log_request_perf_async(_report(2), db=db, success=False, error="x")
+        return primeiro, segundo
+
+    primeiro, segundo = asyncio.run(cenario())
+    assert primeiro and segundo and primeiro != segundo
+    assert _contar(sync_engine) == 2
+
+
+async def _maior_bloqueio_ms(carga) -> float:
+    """Roda a carga junto de um ticker e retorna o maior atraso do ticker."""
+    maior = 0.0
+    parar = asyncio.Event()
+
+    async def ticker():
+        nonlocal maior
+        while not parar.is_set():
+            antes = time.perf_counter()
+            await asyncio.sleep(0.005)
+            maior = max(maior, (time.perf_counter() - antes - 0.005) * 1000)
+
+    tarefa = asyncio.create_task(ticker())
+    await asyncio.sleep(0.02)
+    await carga()
+    parar.set()
+    await tarefa
+    return maior
+
+
+def test_event_loop_nao_bloqueia_com_streams_concorrentes(banco):
+    sync_engine, _, sessoes = banco
+
+    async def stream_async(i):
+        # Stream SSE: lê configuração, emite chunks e salva o resultado
+        async with sessoes() as db:
+            await db.execute(text("SELECT dormir(:ms)"), {"ms": QUERY_MS})
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+        await log_request_perf_async(_report(i), db=None)
+
+    async def carga_async():
+        # async_db_context usa o AsyncSessionLocal do módulo (monkeypatch)
+        async with connection.async_db_context() as db:
+            await db.execute(text("SELECT dormir(:ms)"), {"ms": QUERY_MS})
+        await asyncio.gather(*(stream_async(i) for i in range(12)))
+
+    async def carga_sync():
+        async def stream_sync():
+            with sync_engine.connect() as conn:
+                conn.execute(text("SELECT dormir(:ms)"), {"ms": QUERY_MS})
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*(stream_sync() for _ in range(3)))
+
+    bloqueio_async = asyncio.run(_maior_bloqueio_ms(carga_async))
+    bloqueio_sync = asyncio.run(_maior_bloqueio_ms(carga_sync))
+
+    assert _contar(sync_engine) == 12
+    assert bloqueio_async < LIMITE_BLOQUEIO_MS, f"event loop bloqueado {bloqueio_async:.1f} ms"
+    # Sanidade da medição: a sessão síncrona trava o loop por toda a query
+    assert bloqueio_sync >= QUERY_MS * 0.8
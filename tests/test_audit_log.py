@@ -0,0 +1,194 @@
+# tests/test_audit_log.py
+"""
+Testes da leitura reversa indexada do audit log (utils/audit_log.py).
+
+Verifica:
+- Mesmo resultado da leitura completa (readlines), com linhas cortadas entre blocos
+- Índice mantido na escrita pula regiões fora do período e sem o tipo pedido
+- Regiões sem índice (escrita de outro processo) continuam sendo lidas
+- Índice de outro arquivo (log substituído) é ignorado
+- Índice conta os eventos de cada tipo por região
+- Reconstruções simultâneas não intercalam entradas (temporário + os.replace)
+- Rotação com gzip: eventos lidos do atual para os arquivos antigos
+"""
+
+import json
+import logging
+import os
+import threading
+
+import pytest
+
+from utils import audit, audit_log
+from utils.audit_log import (
+    AuditFileHandler,
+    carregar_indice,
+    ler_eventos_recentes,
+    reconstruir_indice,
+)
+
+TIPOS = ["AUTH_LOGIN_SUCCESS", "ACCESS_DENIED", "DATA_ACCESS"]
+
+
+def _linha(i, evento=None, minuto=None):
+    evento = evento or TIPOS[i % len(TIPOS)]
+    minuto = i if minuto is None else minuto
+    registro = {"event": evento, "seq": i, "details": {"texto": "x" * (i % 37)}}
+    return f"2026-10-18 {minuto // 60:02d}:{minuto % 60:02d}:00 | INFO | {json.dumps(registro)}"
+
+
+def _handler(caminho, **kwargs):
+    handler = AuditFileHandler(str(caminho), **kwargs)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    return handler
+
+
+def _escrever(handler, linhas):
+    """Emite linhas já formatadas; asctime vem do prefixo (como no audit_format)."""
+    for linha in linhas:
+        registro = logging.LogRecord("security.audit", logging.INFO, __file__, 0, linha, None, None)
+        registro.asctime = linha[:19]
+        handler.emit(registro)
+
+
+def _ingenuo(caminho, limit, filtro=lambda e: True):
+    """Comportamento anterior: lê tudo e percorre do fim."""
+    eventos = []
+    with open(caminho, encoding="utf-8") as f:
+        for linha in reversed(f.readlines()):
+            dados = json.loads(linha.split(" | ", 2)[2])
+            if filtro(dados):
+                eventos.append(dados["seq"])
+    return eventos[:limit]
+
+
+@pytest.fixture
+def leituras(monkeypatch):
+    """Registra as regiões [inicio, fim) lidas do disco."""
+    regioes = []
+    original = audit_log.ler_linhas_reverso
+
+    def espiar(arquivo, inicio, fim, tamanho_bloco=audit_log.TAMANHO_BLOCO):
+        regioes.append((inicio, fim))
+        return original(arquivo, inicio, fim, tamanho_bloco)
+
+    monkeypatch.setattr(audit_log, "ler_linhas_reverso", espiar)
+    return regioes
+
+
+def test_leitura_reversa_igual_a_leitura_completa(tmp_path):
+    caminho = tmp_path / "audit.log"
+    caminho.write_text("\n".join(_linha(i) for i in range(500)) + "\n", encoding="utf-8")
+
+    # Blocos de 97 bytes: quase toda linha atravessa a borda de um bloco
+    eventos = ler_eventos_recentes(str(caminho), limit=120, tamanho_bloco=97)
+
+    assert [e["seq"] for e in eventos] == _ingenuo(caminho, 120)
+    assert eventos[0]["_log_timestamp"] == "2026-10-18 08:19:00"
+    assert eventos[0]["_log_level"] == "INFO"
+    assert ler_eventos_recentes(str(caminho), limit=0) == []
+
+
+def test_indice_pula_regioes_por_periodo_e_tipo(tmp_path, leituras):
+    caminho = tmp_path / "audit.log"
+    handler = _handler(caminho, intervalo_indice=2048)
+    linhas = [_linha(i, "AUTH_LOGIN_SUCCESS") for i in range(600)]
+    linhas[250] = _linha(250, "IDOR_ATTEMPT")
+    _escrever(handler, linhas)
+    handler.close()
+    entradas = carregar_indice(str(caminho))
+    assert entradas and entradas[0].inicio == 0
+    assert sum(sum(e.eventos.values()) for e in entradas) == 600
+    assert [e.eventos["IDOR_ATTEMPT"] for e in entradas if "IDOR_ATTEMPT" in e.eventos] == [1]
+
+    raros = ler_eventos_recentes(str(caminho), limit=10, tipos={"IDOR_ATTEMPT"})
+    assert [e["seq"] for e in raros] == [250]
+    # Só a região que contém o evento raro foi lida
+    assert len(leituras) == 1
+
+    leituras.clear()
+    janela = ler_eventos_recentes(str(caminho), limit=1000, desde="2026-10-18 05:00:00", ate="2026-10-18 05:59:59")
+    assert [e["seq"] for e in janela] == list(range(359, 299, -1))
+    bytes_lidos = sum(fim - inicio for inicio, fim in leituras)
+    assert bytes_lidos < os.path.getsize(caminho) / 3
+
+
+def test_regiao_sem_indice_e_lida(tmp_path):
+    caminho = tmp_path / "audit.log"
+    handler = _handler(caminho, intervalo_indice=1024)
+    _escrever(handler, [_linha(i, "DATA_ACCESS") for i in range(100)])
+    # Outro worker escreve no mesmo arquivo sem passar por este handler
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write(_linha(100, "IDOR_ATTEMPT") + "\n")
+    _escrever(handler, [_linha(i, "DATA_ACCESS") for i in range(101, 200)])
+    handler.close()
+
+    assert [e["seq"] for e in ler_eventos_recentes(str(caminho), tipos=["IDOR_ATTEMPT"])] == [100]
+    assert len(ler_eventos_recentes(str(caminho), limit=500)) == 200
+
+
+def test_indice_de_outro_arquivo_e_ignorado(tmp_path):
+    caminho = tmp_path / "audit.log"
+    caminho.write_text("\n".join(_linha(i, "DATA_ACCESS") for i in range(300)) + "\n", encoding="utf-8")
+    assert reconstruir_indice(str(caminho), intervalo=1024) > 5
+
+    # Log substituído (outro inode) com um evento que o índice antigo não conhece
+    novo = tmp_path / "novo.log"
+    novo.write_text("\n".join(_linha(i, "ACCESS_DENIED") for i in range(50)) + "\n", encoding="utf-8")
+    os.replace(novo, caminho)
+
+    assert carregar_indice(str(caminho)) is None
+    assert len(ler_eventos_recentes(str(caminho), tipos=["ACCESS_DENIED"])) == 50
+
+
+def test_reconstrucoes_simultaneas(tmp_path):
+    caminho = tmp_path / "audit.log"
+    caminho.write_text("\n".join(_linha(i) for i in range(2000)) + "\n", encoding="utf-8")
+    esperadas = reconstruir_indice(str(caminho), intervalo=1024)
+    conteudo = (tmp_path / "audit.log.idx").read_text(encoding="utf-8")
+
+    barreira = threading.Barrier(4)
+
+    def reconstruir():
+        barreira.wait()
+        reconstruir_indice(str(caminho), intervalo=1024)
+
+    threads = [threading.Thread(target=reconstruir) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Um índice completo, sem entradas duplicadas, e nenhum temporário esquecido
+    assert (tmp_path / "audit.log.idx").read_text(encoding="utf-8") == conteudo
+    assert len(carregar_indice(str(caminho))) == esperadas
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["audit.log", "audit.log.idx"]
+
+
+def test_rotacao_com_gzip(tmp_path):
+    caminho = tmp_path / "audit.log"
+    handler = _handler(caminho, max_bytes=4096, backup_count=20, intervalo_indice=1024)
+    _escrever(handler, [_linha(i) for i in range(400)])
+    handler.close()
+
+    arquivos = audit_log.listar_arquivos_log(str(caminho))
+    assert arquivos[0] == str(caminho)
+    assert arquivos[1].endswith("audit.log.1.gz")
+    # O índice acompanha só o arquivo atual
+    assert carregar_indice(str(caminho))[0].inicio == 0
+
+    eventos = ler_eventos_recentes(str(caminho), limit=300)
+    assert [e["seq"] for e in eventos] == list(range(399, 99, -1))
+
+    negados = ler_eventos_recentes(str(caminho), limit=5, tipos={"ACCESS_DENIED"}, ate="2026-10-18 01:00:00")
+    assert [e["seq"] for e in negados] == [58, 55, 52, 49, 46]
+
+
+def test_get_recent_security_events_usa_leitor(tmp_path, monkeypatch):
+    (tmp_path / "audit.log").write_text("\n".join(_linha(i) for i in range(30)) + "\n", encoding="utf-8")
+    monkeypatch.setattr(audit, "LOG_DIR", str(tmp_path))
+
+    eventos = audit.get_recent_security_events(limit=3, event_types=["DATA_ACCESS"])
+
+    assert [e["seq"] for e in eventos] == [29, 26, 23]
+    assert audit.get_recent_security_events(since="2026-10-18 00:28:00", limit=10)[-1]["seq"] == 28
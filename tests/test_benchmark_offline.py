@@ -0,0 +1,133 @@
+# tests/test_benchmark_offline.py
+# -*- coding: utf-8 -*-
+"""
+Testes do harness de benchmark offline (scripts/benchmark_offline).
+
+Testa:
+- Corpus deterministico e XML compativel com o parser do TJ-MS
+- Servidores fake respondem no formato das APIs reais
+- Percentis e comparacao com baseline
+"""
+
+import base64
+import json
+
+import httpx
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from scripts.benchmark_offline.corpus import ConfigCorpus, gerar_corpus, processo_para_xml
+from scripts.benchmark_offline.fakes import FakeEmbeddings, FakeLLM, FakeTJMS, Latencia
+from scripts.benchmark_offline.metricas import comparar_com_baseline, percentil
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return gerar_corpus(ConfigCorpus(processos=3, documentos_min=6, documentos_max=8, paginas_max=2))
+
+
+def test_corpus_deterministico(corpus):
+    outro = gerar_corpus(ConfigCorpus(processos=3, documentos_min=6, documentos_max=8, paginas_max=2))
+    assert list(corpus) == list(outro)
+    assert all(len(numero) == 20 for numero in corpus)
+
+
+def test_xml_do_corpus_compativel_com_parser(corpus):
+    from services.tjms.parsers import XMLParserTJMS
+
+    processo = next(iter(corpus.values()))
+    resultado = XMLParserTJMS(processo_para_xml(processo)).parse()
+
+    assert resultado.numero == processo.numero
+    assert len(resultado.documentos) == len(processo.documentos)
+    assert len(resultado.movimentos) == len(processo.movimentos)
+
+
+def test_xml_inclui_conteudo_somente_dos_ids_pedidos(corpus):
+    pytest.importorskip("fitz")
+    processo = next(iter(corpus.values()))
+    alvo = processo.documentos[0].id
+    xml = processo_para_xml(processo, [alvo])
+
+    assert xml.count("<ns2:conteudo>") == 1
+    b64 = xml.split("<ns2:conteudo>")[1].split("</ns2:conteudo>")[0]
+    assert base64.b64decode(b64).startswith(b"%PDF")
+
+
+def test_fake_tjms_consulta_e_processo_inexistente(corpus):
+    numero = next(iter(corpus))
+    fake = FakeTJMS(corpus, Latencia(), Latencia()).iniciar()
+    try:
+        envelope = f"<soapenv:Envelope><tip:numeroProcesso>{numero}</tip:numeroProcesso></soapenv:Envelope>"
+        resposta = httpx.post(f"{fake.url}/soap", content=envelope)
+        assert resposta.status_code == 200
+        assert f'numero="{numero}"' in resposta.text
+
+        resposta = httpx.post(fake.url, content="<tip:numeroProcesso>000</tip:numeroProcesso>")
+        assert "<ns2:sucesso>false</ns2:sucesso>" in resposta.text
+        assert fake.estatisticas["consulta"] == 1
+        assert fake.estatisticas["nao_encontrado"] == 1
+    finally:
+        fake.parar()
+
+
+def test_fake_llm_gemini_e_openrouter():
+    fake = FakeLLM(Latencia(), tokens_por_segundo=0, tokens_saida=30, tokens_por_chunk=10,
+                   respostas=[{"contem": "CLASSIFIQUE", "texto": "peticao"}]).iniciar()
+    try:
+        base = f"{fake.url}/gemini/v1beta/models/gemini-3-flash-preview"
+        payload = {"contents": [{"parts": [{"text": "CLASSIFIQUE este documento"}]}]}
+        resposta = httpx.post(f"{base}:generateContent?key=x", json=payload).json()
+        assert resposta["candidates"][0]["content"]["parts"][0]["text"] == "peticao"
+
+        payload_json = {"contents": [{"parts": [{"text": "x"}]}],
+                        "generationConfig": {"responseMimeType": "application/json"}}
+        texto = httpx.post(f"{base}:generateContent", json=payload_json).json()["candidates"][0]["content"]["parts"][0]["text"]
+        assert json.loads(texto) == {"resultado": "ok"}
+
+        linhas = httpx.post(f"{base}:streamGenerateContent?alt=sse", json={"contents": [{"parts": [{"text": "x"}]}]}).text
+        eventos = [json.loads(l[6:]) for l in linhas.splitlines() if l.startswith("data: ")]
+        assert len(eventos) == 3
+        assert eventos[-1]["candidates"][0]["finishReason"] == "STOP"
+
+        resposta = httpx.post(f"{fake.url}/openrouter/api/v1/chat/completions",
+                              json={"model": "m", "messages": [{"role": "user", "content": "oi"}]}).json()
+        assert resposta["choices"][0]["message"]["content"]
+
+        linhas = httpx.post(f"{fake.url}/openrouter/api/v1/chat/completions",
+                            json={"model": "m", "stream": True, "messages": [{"role": "user", "content": "oi"}]}).text
+        assert linhas.rstrip().endswith("data: [DONE]")
+        assert fake.estatisticas["gemini"] == 2
+        assert fake.estatisticas["openrouter_stream"] == 1
+    finally:
+        fake.parar()
+
+
+def test_fake_embeddings_deterministico():
+    fake = FakeEmbeddings(Latencia()).iniciar()
+    try:
+        url = f"{fake.url}/gemini/v1beta/models/gemini-embedding-001:embedContent"
+        payload = {"content": {"parts": [{"text": "texto"}]}, "outputDimensionality": 16}
+        a = httpx.post(url, json=payload).json()["embedding"]["values"]
+        b = httpx.post(url, json=payload).json()["embedding"]["values"]
+        assert a == b and len(a) == 16
+    finally:
+        fake.parar()
+
+
+def test_percentil():
+    valores = [10, 20, 30, 40, 50]
+    assert percentil(valores, 50) == 30
+    assert percentil(valores, 95) == pytest.approx(48)
+    assert percentil([], 95) == 0.0
+
+
+def test_comparacao_com_baseline():
+    baseline = {"cenarios": {"gerador": {"p95_ms": 1000, "throughput_rps": 2.0, "pico_rss_mb": 500}}}
+    atual = {"cenarios": {"gerador": {"p95_ms": 1300, "throughput_rps": 1.95, "pico_rss_mb": 480}}}
+
+    regressoes = comparar_com_baseline(atual, baseline, tolerancia=0.10)
+
+    assert [(r["cenario"], r["metrica"]) for r in regressoes] == [("gerador", "p95_ms")]
+    assert regressoes[0]["variacao_pct"] == 30.0
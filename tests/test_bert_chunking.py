@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Testes da classificação por janelas de documentos longos
+(sistemas/bert_training/ml/chunking.py).
+
+Verifica:
+- Janelas cobrem o texto inteiro com a sobreposição pedida; limite de
+  max_chunks com cabeça + cauda
+- Agregação dos logits por documento (média, máximo, atenção)
+- Texto curto: logits por janelas iguais aos do modo truncado
+- Treino sorteia até train_chunks janelas; avaliação usa até max_chunks
+- Sorteio determinístico por (seed, época, amostra), sem o RNG global
+- Época de treino com a cabeça de atenção; save/load mantém a configuração
+
+Usa um tokenizer WordPiece e um BERT minúsculo criados localmente (sem download).
+"""
+
+import numpy as np
+import pytest
+
+
+def _can_import_ml() -> bool:
+    """Verifica se PyTorch, transformers, tokenizers e sklearn estão disponíveis."""
+    try:
+        import torch  # noqa: F401
+        import transformers  # noqa: F401
+        import tokenizers  # noqa: F401
+        import sklearn  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _can_import_ml(), reason="PyTorch/transformers não disponível")
+
+PALAVRAS = (
+    "o autor requer a condenação do estado ao pagamento de honorários "
+    "sentença julgou procedente pedido recurso apelação cumprimento prazo"
+).split()
+
+
+def _textos(n: int, minimo: int, maximo: int, seed: int = 0):
+    rnd = np.random.default_rng(seed)
+    return [" ".join(rnd.choice(PALAVRAS, size=int(rnd.integers(minimo, maximo)))) for _ in range(n)]
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    especiais = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab = {t: i for i, t in enumerate(especiais + sorted(set(PALAVRAS)))}
+    backend = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]",
+        cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]",
+    )
+
+
+@pytest.fixture(scope="module")
+def modelo_dir(tmp_path_factory, tokenizer):
+    import torch
+    from transformers import BertConfig, BertForPreTraining
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=128,
+    )
+    path = tmp_path_factory.mktemp("tiny_bert")
+    BertForPreTraining(config).save_pretrained(path)
+    return str(path)
+
+
+def test_janelas_com_sobreposicao_e_cabeca_cauda():
+    from sistemas.bert_training.ml.chunking import ChunkingConfig, chunk_document, select_head_tail, window_starts
+
+    assert window_starts(10, 14, 4) == [0]
+    assert window_starts(30, 14, 4) == [0, 10, 16]
+    assert select_head_tail(list(range(10)), 5) == [0, 1, 2, 8, 9]
+    assert select_head_tail([0, 10], 5) == [0, 10]
+    assert select_head_tail(list(range(10)), 1) == [0]
+
+    config = ChunkingConfig(max_length=16, overlap=4, max_chunks=3)
+    conteudo = np.arange(100, 200)  # 100 tokens -> 9 janelas, 3 mantidas
+    janelas = chunk_document(conteudo, 2, 3, config)
+
+    assert len(janelas) == 3
+    assert all(j[0] == 2 and j[-1] == 3 and len(j) == 16 for j in janelas)
+    assert janelas[0][1:-1].tolist() == list(range(100, 114))
+    assert janelas[1][1:-1].tolist() == list(range(110, 124))  # 4 tokens em comum
+    assert janelas[-1][1:-1].tolist() == list(range(186, 200))  # termina no fim do texto
+
+    with pytest.raises(ValueError):
+        ChunkingConfig(max_length=16, overlap=14)
+    with pytest.raises(ValueError):
+        ChunkingConfig(pooling="soma")
+
+
+def test_agregacao_por_documento():
+    import torch
+    from sistemas.bert_training.ml.chunking import pool_chunk_logits
+
+    logits = torch.tensor([[1.0, 0.0], [3.0, -2.0], [0.5, 0.5], [2.0, 4.0], [0.0, 1.0]])
+    chunk_doc = torch.tensor([0, 0, 1, 2, 2])
+
+    media = pool_chunk_logits(logits, chunk_doc, "mean")
+    torch.testing.assert_close(media, torch.tensor([[2.0, -1.0], [0.5, 0.5], [1.0, 2.5]]))
+
+    maximo = pool_chunk_logits(logits, chunk_doc, "max")
+    torch.testing.assert_close(maximo, torch.tensor([[3.0, 0.0], [0.5, 0.5], [2.0, 4.0]]))
+
+    # Pontuações iguais = média; uma janela dominante = logits dela
+    iguais = pool_chunk_logits(logits, chunk_doc, "attention", torch.zeros(5))
+    torch.testing.assert_close(iguais, media)
+    dominante = pool_chunk_logits(logits, chunk_doc, "attention", torch.tensor([50.0, 0.0, 0.0, 0.0, 50.0]))
+    torch.testing.assert_close(dominante, torch.tensor([[1.0, 0.0], [0.5, 0.5], [0.0, 1.0]]))
+
+    with pytest.raises(ValueError):
+        pool_chunk_logits(logits, chunk_doc, "attention")
+
+
+def test_texto_curto_igual_ao_truncado(tokenizer, modelo_dir):
+    import torch
+    from sistemas.bert_training.ml.chunking import ChunkingConfig, predict_chunked
+    from sistemas.bert_training.ml.classifier import BertClassifier
+
+    textos = _textos(6, 1, 30, seed=2)
+    torch.manual_seed(0)
+    modelo = BertClassifier(modelo_dir, num_labels=3).eval()
+
+    config = ChunkingConfig(max_length=64, overlap=16)
+    logits, info = predict_chunked(modelo, tokenizer, textos, config, batch_size=4)
+
+    assert [i["num_chunks"] for i in info] == [1] * 6
+    with torch.no_grad():
+        for texto, obtido in zip(textos, logits):
+            fixo = tokenizer(texto, truncation=True, max_length=64, return_tensors="pt")
+            esperado = modelo(fixo["input_ids"], fixo["attention_mask"], torch.zeros_like(fixo["input_ids"]))[0]
+            torch.testing.assert_close(obtido, esperado, atol=1e-5, rtol=1e-4)
+
+
+def test_custo_limitado_por_max_chunks(tokenizer, modelo_dir):
+    import torch
+    from sistemas.bert_training.ml.chunking import ChunkingConfig, predict_chunked
+    from sistemas.bert_training.ml.classifier import BertClassifier
+
+    torch.manual_seed(0)
+    modelo = BertClassifier(modelo_dir, num_labels=2, chunk_pooling="attention").eval()
+    config = ChunkingConfig(max_length=32, overlap=8, max_chunks=4, pooling="attention")
+
+    textos = [" ".join(PALAVRAS * 40), "sentença", " ".join(PALAVRAS * 2)]
+    logits, info = predict_chunked(modelo, tokenizer, textos, config)
+
+    assert logits.shape == (3, 2)
+    assert [i["num_chunks"] for i in info] == [4, 1, 2]
+    assert info[0]["num_tokens"] == 40 * len(PALAVRAS)
+
+    # Sem a cabeça de atenção, só média/máximo
+    with pytest.raises(ValueError):
+        predict_chunked(BertClassifier(modelo_dir, num_labels=2), tokenizer, textos, config)
+
+    vazio, info_vazio = predict_chunked(modelo, tokenizer, [], config)
+    assert vazio.shape == (0, 2) and info_vazio == []
+
+
+def test_sorteio_de_janelas_no_treino(tmp_path, tokenizer):
+    import torch
+    from sistemas.bert_training.ml.chunking import ChunkedDataset, ChunkingConfig
+    from sistemas.bert_training.ml.data_pipeline import create_data_loader, tokenize_to_cache
+
+    textos = _textos(20, 1, 200, seed=4)
+    config = ChunkingConfig(max_length=32, overlap=8, max_chunks=5, train_chunks=2)
+    cache = tokenize_to_cache(textos, tokenizer, 32, tmp_path, truncation=False)
+    dataset = ChunkedDataset(cache, labels=[i % 2 for i in range(20)], config=config)
+
+    completos = tokenizer(textos, add_special_tokens=False)["input_ids"]
+    assert dataset.content_lengths.tolist() == [len(ids) for ids in completos]
+    assert all(len(dataset[i]["chunks"]) <= 5 for i in range(20))
+
+    torch.manual_seed(0)
+    for treino, limite in ((True, 2), (False, 5)):
+        loader = create_data_loader(dataset, batch_size=4, shuffle=treino, seed=1)
+        vistos = 0
+        for batch in loader:
+            por_documento = torch.bincount(batch["chunk_doc"]).tolist()
+            assert max(por_documento) <= limite
+            assert len(por_documento) == len(batch["labels"])
+            assert batch["input_ids"].shape[1] <= 32
+            vistos += len(batch["labels"])
+        assert vistos == 20
+
+    # Cache truncado não serve para janelas
+    with pytest.raises(ValueError):
+        ChunkedDataset(tokenize_to_cache(textos, tokenizer, 32, tmp_path), config=config)
+
+
+def test_sorteio_reproduzivel_por_amostra_e_epoca():
+    import torch
+    from sistemas.bert_training.ml.chunking import ChunkCollator
+
+    items = [{"chunks": [np.full(4, 10 * d + j) for j in range(6)], "labels": 0, "index": d} for d in range(5)]
+
+    def sorteio(collator, lote):
+        batch = collator(lote)
+        return [tuple(ids[1].item() for ids in batch["input_ids"][batch["chunk_doc"] == i]) for i in range(len(lote))]
+
+    collator = ChunkCollator(sample_chunks=2, seed=7)
+    torch.manual_seed(0)
+    primeira = sorteio(collator, items)
+    # RNG global diferente (outro worker) e outra composição de batch: mesmo sorteio por amostra
+    torch.manual_seed(123)
+    assert sorteio(ChunkCollator(sample_chunks=2, seed=7), items[3:] + items[:3]) == primeira[3:] + primeira[:3]
+    assert all(len(janelas) == 2 and list(janelas) == sorted(janelas) for janelas in primeira)
+
+    outras = []
+    for epoca in range(1, 4):
+        collator.set_epoch(epoca)
+        outras.append(sorteio(collator, items))
+    assert any(sorteada != primeira for sorteada in outras)
+    collator.set_epoch(0)
+    assert sorteio(collator, items) == primeira
+
+
+def test_treino_com_atencao_e_save_load(tmp_path, tokenizer, modelo_dir):
+    import math
+    import torch
+    from sistemas.bert_training.ml.chunking import ChunkedDataset, ChunkingConfig, predict_chunked
+    from sistemas.bert_training.ml.classifier import BertClassifier
+    from sistemas.bert_training.ml.data_pipeline import tokenize_to_cache
+    from sistemas.bert_training.ml.evaluation import Evaluator
+    from sistemas.bert_training.ml.training import Trainer, split_dataset
+
+    textos = _textos(24, 1, 150, seed=6)
+    labels = [i % 2 for i in range(24)]
+    config = ChunkingConfig(max_length=32, overlap=8, max_chunks=4, train_chunks=2, pooling="attention")
+    dataset = ChunkedDataset(tokenize_to_cache(textos, tokenizer, 32, tmp_path / "cache", truncation=False),
+                             labels, config)
+    train, val = split_dataset(dataset, 0.75, seed=1)
+
+    torch.manual_seed(0)
+    modelo = BertClassifier(modelo_dir, num_labels=2, chunk_pooling="attention")
+    modelo.chunking = config.to_dict()
+    antes = modelo.chunk_attention.weight.detach().clone()
+
+    trainer = Trainer(modelo, train, val, device="cpu", batch_size=4, epochs=1, learning_rate=1e-3, seed=3)
+    historico = trainer.train()
+    assert math.isfinite(historico[0]["train_loss"])
+    assert not torch.equal(antes, modelo.chunk_attention.weight)
+
+    _, _, probabilidades = Evaluator(modelo, val, {0: "A", 1: "B"}, device="cpu", batch_size=4).get_predictions()
+    assert probabilidades.shape == (len(val), 2)
+
+    modelo.save(tmp_path / "modelo", {0: "A", 1: "B"}, modelo_dir)
+    carregado, label_map, _, _ = BertClassifier.load(tmp_path / "modelo", device="cpu")
+    assert carregado.chunk_pooling == "attention"
+    assert ChunkingConfig.from_dict(carregado.chunking) == config
+    assert label_map == {0: "A", 1: "B"}
+
+    esperado, _ = predict_chunked(modelo, tokenizer, textos[:3], config)
+    obtido, _ = predict_chunked(carregado, tokenizer, textos[:3], config)
+    torch.testing.assert_close(obtido, esperado)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do pipeline de dados pré-tokenizado do BERT
+(sistemas/bert_training/ml/data_pipeline.py).
+
+Verifica:
+- Cache de tokenização: reaproveitado com os mesmos textos/tokenizer/max_length
+  e refeito quando qualquer um muda
+- Sampler por tamanho: cobre todas as amostras, determinístico por seed/época
+- Collator: padding só até o maior texto do batch
+- Padding dinâmico dá os mesmos logits que o padding fixo em max_length
+- Evaluator devolve as predições na ordem do dataset
+
+Usa um tokenizer WordPiece e um BERT minúsculo criados localmente (sem download).
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+
+
+def _can_import_ml() -> bool:
+    """Verifica se PyTorch, transformers e tokenizers estão disponíveis."""
+    try:
+        import torch  # noqa: F401
+        import transformers  # noqa: F401
+        import tokenizers  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _can_import_ml(), reason="PyTorch/transformers não disponível")
+
+PALAVRAS = (
+    "o autor requer a condenação do estado ao pagamento de honorários "
+    "sentença julgou procedente pedido recurso apelação cumprimento prazo"
+).split()
+
+
+def _textos(n: int, seed: int = 0):
+    rnd = np.random.default_rng(seed)
+    return [" ".join(rnd.choice(PALAVRAS, size=int(rnd.integers(1, 60)))) for _ in range(n)]
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast
+
+    especiais = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab = {t: i for i, t in enumerate(especiais + sorted(set(PALAVRAS)))}
+    backend = Tokenizer(models.WordPiece(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    backend.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]",
+        cls_token="[CLS]", sep_token="[SEP]", mask_token="[MASK]",
+    )
+
+
+@pytest.fixture(scope="module")
+def modelo_dir(tmp_path_factory, tokenizer):
+    import torch
+    from transformers import BertConfig, BertForPreTraining
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(tokenizer), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, max_position_embeddings=128,
+    )
+    path = tmp_path_factory.mktemp("tiny_bert")
+    BertForPreTraining(config).save_pretrained(path)
+    return str(path)
+
+
+def test_cache_reutilizado_e_invalidado(tmp_path, tokenizer):
+    from sistemas.bert_training.ml.data_pipeline import PreTokenizedDataset, tokenize_to_cache
+
+    textos = _textos(50)
+    path = tokenize_to_cache(textos, tokenizer, 32, tmp_path, batch_size=7)
+    mtime = (path / "ids.npy").stat().st_mtime_ns
+
+    assert tokenize_to_cache(textos, tokenizer, 32, tmp_path) == path
+    assert (path / "ids.npy").stat().st_mtime_ns == mtime
+    assert tokenize_to_cache(textos, tokenizer, 64, tmp_path) != path
+    assert tokenize_to_cache(textos, tokenizer, 32, tmp_path, truncation_side="left") != path
+    assert tokenize_to_cache(textos[:-1] + ["outro texto"], tokenizer, 32, tmp_path) != path
+    assert len([p for p in tmp_path.iterdir() if not p.name.startswith(".")]) == 4
+
+    dataset = PreTokenizedDataset(path, labels=list(range(50)))
+    esperado = tokenizer(textos, truncation=True, max_length=32)["input_ids"]
+    assert [dataset[i]["input_ids"].tolist() for i in range(50)] == esperado
+    assert dataset.lengths.tolist() == [len(e) for e in esperado]
+    assert dataset[3]["labels"] == 3
+
+    # Workers (spawn) reabrem o memmap a partir do caminho
+    copia = pickle.loads(pickle.dumps(dataset))
+    assert len(pickle.dumps(dataset)) < 1000
+    assert copia[7]["input_ids"].tolist() == esperado[7]
+
+
+def test_truncamento_pela_esquerda(tmp_path, tokenizer):
+    from sistemas.bert_training.ml.data_pipeline import PreTokenizedDataset, tokenize_to_cache
+
+    texto = " ".join(PALAVRAS)
+    dataset = PreTokenizedDataset(tokenize_to_cache([texto], tokenizer, 8, tmp_path, truncation_side="left"))
+    ids = dataset[0]["input_ids"].tolist()
+    assert len(ids) == 8
+    assert tokenizer.convert_ids_to_tokens(ids[-2]) == PALAVRAS[-1]
+
+
+def test_sampler_por_tamanho():
+    from sistemas.bert_training.ml.data_pipeline import LengthBucketBatchSampler
+
+    lengths = np.random.default_rng(1).integers(3, 512, size=1003)
+    sampler = LengthBucketBatchSampler(lengths, batch_size=16, shuffle=True, seed=7, megabatch_factor=4)
+    batches = list(sampler)
+
+    assert len(batches) == len(sampler) == 63
+    assert sorted(i for b in batches for i in b) == list(range(1003))
+    assert list(sampler) == batches
+    # Retomada no meio da época: pula os batches já processados, uma vez só
+    sampler.start_batch = 10
+    assert list(sampler) == batches[10:]
+    assert list(sampler) == batches
+    sampler.set_epoch(1)
+    assert list(sampler) != batches
+
+    # Pouco padding: largura do batch perto do tamanho médio das amostras
+    desperdicio = sum(len(b) * lengths[b].max() - lengths[b].sum() for b in batches)
+    assert desperdicio < 0.1 * lengths.sum()
+
+    ordenado = list(LengthBucketBatchSampler(lengths, batch_size=16, shuffle=False))
+    assert [i for b in ordenado for i in b] == np.argsort(lengths, kind="stable").tolist()
+
+
+def test_collator_padding_dinamico():
+    from sistemas.bert_training.ml.data_pipeline import DynamicPaddingCollator
+
+    itens = [
+        {"input_ids": np.array([2, 10, 3]), "labels": 1, "index": 4},
+        {"input_ids": np.array([2, 10, 11, 12, 13, 3]), "labels": 0, "index": 9},
+    ]
+    batch = DynamicPaddingCollator(pad_token_id=0, pad_to_multiple_of=4)(itens)
+
+    assert batch["input_ids"].tolist() == [[2, 10, 3, 0, 0, 0, 0, 0], [2, 10, 11, 12, 13, 3, 0, 0]]
+    assert batch["attention_mask"].sum(dim=1).tolist() == [3, 6]
+    assert batch["token_type_ids"].shape == batch["input_ids"].shape
+    assert batch["labels"].tolist() == [1, 0]
+    assert batch["index"].tolist() == [4, 9]
+
+    limitado = DynamicPaddingCollator(pad_token_id=0, pad_to_multiple_of=8, max_length=6)(itens)
+    assert limitado["input_ids"].shape[1] == 6
+
+
+def test_logits_iguais_ao_padding_fixo(tmp_path, tokenizer, modelo_dir):
+    import torch
+    from sistemas.bert_training.ml.classifier import BertClassifier
+    from sistemas.bert_training.ml.data_pipeline import PreTokenizedDataset, create_data_loader, tokenize_to_cache
+    from sistemas.bert_training.ml.training import split_dataset
+
+    textos = _textos(40, seed=3)
+    dataset = PreTokenizedDataset(tokenize_to_cache(textos, tokenizer, 64, tmp_path), labels=[0] * 40)
+    _, val = split_dataset(dataset, 0.5, seed=1)
+
+    torch.manual_seed(0)
+    modelo = BertClassifier(modelo_dir, num_labels=3).eval()
+
+    logits = {}
+    with torch.no_grad():
+        for batch in create_data_loader(val, batch_size=8):
+            assert batch["input_ids"].shape[1] <= 64
+            saida = modelo(batch["input_ids"], batch["attention_mask"], batch["token_type_ids"])
+            for posicao, linha in zip(batch["index"].tolist(), saida):
+                logits[val.indices[posicao]] = linha
+
+        for i in val.indices:
+            fixo = tokenizer(textos[i], truncation=True, max_length=64, padding="max_length", return_tensors="pt")
+            esperado = modelo(fixo["input_ids"], fixo["attention_mask"], torch.zeros_like(fixo["input_ids"]))[0]
+            torch.testing.assert_close(logits[i], esperado, atol=1e-5, rtol=1e-4)
+
+
+def test_evaluator_preserva_ordem(tmp_path, tokenizer, modelo_dir):
+    import torch
+    from sistemas.bert_training.ml.classifier import BertClassifier
+    from sistemas.bert_training.ml.data_pipeline import PreTokenizedDataset, tokenize_to_cache
+    from sistemas.bert_training.ml.evaluation import Evaluator
+
+    textos = _textos(30, seed=5)
+    labels = [i % 2 for i in range(30)]
+    dataset = PreTokenizedDataset(tokenize_to_cache(textos, tokenizer, 64, tmp_path), labels=labels)
+
+    torch.manual_seed(0)
+    modelo = BertClassifier(modelo_dir, num_labels=2)
+    y_true, _, probabilidades = Evaluator(modelo, dataset, {0: "A", 1: "B"}, device="cpu", batch_size=4).get_predictions()
+
+    assert [int(y) for y in y_true] == labels
+    assert probabilidades.shape == (30, 2)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Testes do loop de treino do BERT (sistemas/bert_training/ml/training.py), em CPU.
+
+Verifica:
+- Treino interrompido e retomado do checkpoint chega aos mesmos pesos que o
+  treino sem interrupção (mesma seed), com o sampler por tamanho e com o
+  DataLoader padrão
+- Checkpoint de outro treino (fingerprint diferente) é ignorado
+- Batch efetivo vira acumulação de gradiente; autocast bf16 em CPU
+
+Usa um modelo mínimo com a mesma assinatura do BertClassifier.
+"""
+
+import pytest
+
+
+def _can_import_training() -> bool:
+    """Verifica se as dependências do Trainer estão disponíveis."""
+    try:
+        import torch  # noqa: F401
+        import transformers  # noqa: F401
+        import sklearn  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not _can_import_training(), reason="PyTorch/transformers/sklearn não disponível")
+
+N_AMOSTRAS = 40
+VOCAB = 30
+
+
+class _QuedaSimulada(RuntimeError):
+    pass
+
+
+def _modelo(queda_no_batch=None):
+    import torch
+    import torch.nn as nn
+
+    class ModeloMinimo(nn.Module):
+        """Média dos embeddings + dropout + linear (o dropout exercita o RNG)."""
+
+        def __init__(self):
+            super().__init__()
+            self.num_labels = 3
+            self.embedding = nn.Embedding(VOCAB, 16)
+            self.dropout = nn.Dropout(0.3)
+            self.classifier = nn.Linear(16, self.num_labels)
+            self.chamadas = 0
+
+        def forward(self, input_ids, attention_mask=None, token_type_ids=None):
+            if self.training:
+                self.chamadas += 1
+                if self.chamadas == queda_no_batch:
+                    raise _QuedaSimulada("worker caiu")
+            mask = attention_mask.unsqueeze(-1).float()
+            media = (self.embedding(input_ids) * mask).sum(1) / mask.sum(1)
+            return self.classifier(self.dropout(media))
+
+    torch.manual_seed(0)
+    return ModeloMinimo()
+
+
+class _TokenizerDeTeste:
+    """Um id por palavra ("3 7 12" -> [1, 3, 7, 12, 2])."""
+
+    name_or_path = "teste"
+    pad_token_id = 0
+    is_fast = True
+    truncation_side = "right"
+
+    def get_vocab(self):
+        return {}
+
+    def __call__(self, textos, max_length, **kwargs):
+        return {"input_ids": [[1] + [int(p) for p in t.split()][: max_length - 2] + [2] for t in textos]}
+
+
+def _datasets(tipo, tmp_path):
+    import numpy as np
+    import torch
+    from torch.utils.data import Dataset
+    from sistemas.bert_training.ml.data_pipeline import PreTokenizedDataset, tokenize_to_cache
+    from sistemas.bert_training.ml.training import split_dataset
+
+    rnd = np.random.default_rng(0)
+    textos = [" ".join(map(str, rnd.integers(3, VOCAB, size=int(rnd.integers(1, 20))))) for _ in range(N_AMOSTRAS)]
+    labels = [int(rnd.integers(0, 3)) for _ in range(N_AMOSTRAS)]
+
+    if tipo == "pre_tokenizado":
+        dataset = PreTokenizedDataset(tokenize_to_cache(textos, _TokenizerDeTeste(), 24, tmp_path / "cache"), labels)
+    else:
+        class DatasetFixo(Dataset):
+            def __init__(self):
+                self.labels = labels
+                self.ids = torch.zeros((N_AMOSTRAS, 24), dtype=torch.long)
+                for i, ids in enumerate(_TokenizerDeTeste()(textos, 24)["input_ids"]):
+                    self.ids[i, :len(ids)] = torch.tensor(ids)
+
+            def __len__(self):
+                return N_AMOSTRAS
+
+            def __getitem__(self, idx):
+                return {
+                    "input_ids": self.ids[idx],
+                    "attention_mask": (self.ids[idx] != 0).long(),
+                    "labels": torch.tensor(self.labels[idx]),
+                }
+
+        dataset = DatasetFixo()
+
+    return split_dataset(dataset, 0.8, seed=1)
+
+
+def _trainer(modelo, datasets, **kwargs):
+    from sistemas.bert_training.ml.training import Trainer
+
+    train, val = datasets
+    opcoes = dict(device="cpu", batch_size=4, epochs=3, learning_rate=1e-2, gradient_accumulation_steps=2,
+                  early_stopping_patience=5, seed=7)
+    opcoes.update(kwargs)
+    return Trainer(modelo, train, val, **opcoes)
+
+
+@pytest.mark.parametrize("tipo", ["pre_tokenizado", "padrao"])
+def test_retomada_reproduz_pesos(tmp_path, tipo):
+    import torch
+
+    datasets = _datasets(tipo, tmp_path)
+
+    referencia = _modelo()
+    historico_ref = _trainer(referencia, datasets).train()
+
+    # 32 amostras de treino / batch 4 = 8 batches por época, 4 passos do otimizador.
+    # Checkpoints a cada 3 passos: o último antes da queda é o do passo 6
+    # (época 2, batch 4); a queda acontece no batch 7 da época 2.
+    checkpoint_dir = tmp_path / "ckpt"
+    with pytest.raises(_QuedaSimulada):
+        _trainer(_modelo(queda_no_batch=15), datasets, checkpoint_dir=checkpoint_dir,
+                 checkpoint_every_steps=3, checkpoint_fingerprint="run-1").train()
+    assert not list(checkpoint_dir.glob("*.tmp"))
+
+    torch.manual_seed(123)  # o RNG do processo novo não importa
+    retomado = _modelo()
+    trainer = _trainer(retomado, datasets, checkpoint_dir=checkpoint_dir,
+                       checkpoint_every_steps=3, checkpoint_fingerprint="run-1")
+    assert trainer.resumed_from == {"epoch": 1, "batch": 4, "step": 6}
+    historico = trainer.train()
+
+    assert historico == historico_ref
+    for (nome, esperado), (_, obtido) in zip(referencia.state_dict().items(), retomado.state_dict().items()):
+        assert torch.equal(esperado, obtido), nome
+
+    trainer.clear_checkpoint()
+    assert not (checkpoint_dir / "checkpoint.pt").exists()
+
+
+def test_checkpoint_de_outro_treino_ignorado(tmp_path):
+    datasets = _datasets("pre_tokenizado", tmp_path)
+    _trainer(_modelo(), datasets, epochs=1, checkpoint_dir=tmp_path / "ckpt", checkpoint_fingerprint="run-1").train()
+
+    assert _trainer(_modelo(), datasets, checkpoint_dir=tmp_path / "ckpt", checkpoint_fingerprint="run-1").resumed_from
+    assert _trainer(_modelo(), datasets, checkpoint_dir=tmp_path / "ckpt", checkpoint_fingerprint="run-2").resumed_from is None
+
+
+def test_batch_efetivo_e_bf16(tmp_path):
+    import math
+
+    trainer = _trainer(_modelo(), _datasets("pre_tokenizado", tmp_path), epochs=1,
+                       effective_batch_size=12, precision="bf16", num_threads=2)
+    assert trainer.gradient_accumulation_steps == 3
+
+    perda = trainer.train_epoch(0)
+    assert math.isfinite(perda)
+    # 8 batches em grupos de 3: 3 passos do otimizador (o último com 2 batches)
+    assert trainer.global_step == 3
+
+    with pytest.raises(ValueError):
+        _trainer(_modelo(), _datasets("pre_tokenizado", tmp_path), precision="int8")
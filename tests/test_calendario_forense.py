@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Testes do calendário forense (utils/calendario_forense.py).
+
+Compara as consultas por tabela cumulativa com a contagem ingênua dia a dia
+sobre o mesmo conjunto de dias não úteis.
+
+Uso:
+    pytest tests/test_calendario_forense.py -v
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from utils.calendario_forense import CalendarioForense, calcular_pascoa, get_calendario
+
+
+ANOS_TESTE = range(2023, 2028)
+
+
+@pytest.fixture(scope="module")
+def calendario():
+    return get_calendario()
+
+
+def _nao_uteis(calendario, anos):
+    """Conjunto de dias não úteis (feriados + suspensões) pelo caminho lento."""
+    dias = set()
+    for ano in anos:
+        dias |= calendario._dias_nao_uteis(ano)
+    return dias
+
+
+def _util(dia, nao_uteis):
+    return dia.weekday() < 5 and dia not in nao_uteis
+
+
+def _apos_ingenuo(dia, n, nao_uteis):
+    contados = 0
+    while contados < n:
+        dia += timedelta(days=1)
+        if _util(dia, nao_uteis):
+            contados += 1
+    return dia
+
+
+def _antes_ingenuo(dia, n, nao_uteis):
+    contados = 0
+    while contados < n:
+        dia -= timedelta(days=1)
+        if _util(dia, nao_uteis):
+            contados += 1
+    return dia
+
+
+class TestPascoa:
+
+    @pytest.mark.parametrize("ano,esperado", [
+        (2024, date(2024, 3, 31)),
+        (2025, date(2025, 4, 20)),
+        (2026, date(2026, 4, 5)),
+        (2027, date(2027, 3, 28)),
+        (2038, date(2038, 4, 25)),
+    ])
+    def test_datas_conhecidas(self, ano, esperado):
+        assert calcular_pascoa(ano) == esperado
+
+
+class TestFeriados:
+
+    def test_moveis_2026(self, calendario):
+        feriados = calendario.feriados(2026)
+        assert date(2026, 2, 16) in feriados  # Carnaval segunda
+        assert date(2026, 2, 17) in feriados  # Carnaval terça
+        assert date(2026, 4, 2) in feriados   # Quinta-feira Santa
+        assert date(2026, 4, 3) in feriados   # Sexta-feira da Paixão
+        assert date(2026, 6, 4) in feriados   # Corpus Christi
+
+    def test_estadual_e_forense(self, calendario):
+        feriados = calendario.feriados(2025)
+        assert date(2025, 10, 11) in feriados  # Criação do Estado de MS
+        assert date(2025, 12, 8) in feriados   # Dia da Justiça
+
+    def test_consciencia_negra_apenas_a_partir_de_2024(self, calendario):
+        assert date(2023, 11, 20) not in calendario.feriados(2023)
+        assert date(2024, 11, 20) in calendario.feriados(2024)
+
+    def test_suspensao_art_220_cruza_virada_do_ano(self, calendario):
+        assert not calendario.eh_dia_util(date(2025, 12, 22))
+        assert not calendario.eh_dia_util(date(2026, 1, 20))
+        assert calendario.eh_dia_util(date(2026, 1, 21))
+
+    def test_suspensao_por_portaria(self):
+        calendario = CalendarioForense({
+            "suspensoes": [{"inicio": "2025-05-05", "fim": "2025-05-09", "descricao": "Portaria"}]
+        })
+        assert calendario.proximo_dia_util(date(2025, 5, 2)) == date(2025, 5, 12)
+
+
+class TestContraContagemIngenua:
+    """Compara todas as consultas com o loop dia a dia."""
+
+    def test_dias_uteis_apos(self, calendario):
+        nao_uteis = _nao_uteis(calendario, range(ANOS_TESTE.start, ANOS_TESTE.stop + 1))
+        dia = date(ANOS_TESTE.start, 1, 1)
+        fim = date(ANOS_TESTE.stop - 1, 12, 31)
+        while dia <= fim:
+            for n in (0, 1, 2, 5, 15, 30):
+                assert calendario.dias_uteis_apos(dia, n) == _apos_ingenuo(dia, n, nao_uteis), (dia, n)
+            dia += timedelta(days=1)
+
+    def test_dias_uteis_antes(self, calendario):
+        nao_uteis = _nao_uteis(calendario, range(ANOS_TESTE.start - 1, ANOS_TESTE.stop))
+        dia = date(ANOS_TESTE.start, 1, 1)
+        fim = date(ANOS_TESTE.stop - 1, 12, 31)
+        while dia <= fim:
+            for n in (0, 1, 3, 15, 30):
+                assert calendario.dias_uteis_antes(dia, n) == _antes_ingenuo(dia, n, nao_uteis), (dia, n)
+            dia += timedelta(days=7)
+
+    def test_dias_uteis_entre(self, calendario):
+        nao_uteis = _nao_uteis(calendario, ANOS_TESTE)
+        inicio = date(2025, 1, 1)
+        esperado = 0
+        dia = inicio
+        while dia < date(2026, 12, 31):
+            dia += timedelta(days=1)
+            if _util(dia, nao_uteis):
+                esperado += 1
+            assert calendario.dias_uteis_entre(inicio, dia) == esperado, dia
+        assert calendario.dias_uteis_entre(dia, inicio) == -esperado
+
+    def test_prazo_longo_estende_tabela(self):
+        calendario = CalendarioForense.carregar()
+        nao_uteis = _nao_uteis(calendario, range(2030, 2034))
+        assert calendario.dias_uteis_apos(date(2030, 3, 1), 600) == _apos_ingenuo(date(2030, 3, 1), 600, nao_uteis)
+        assert calendario.dias_uteis_antes(date(2033, 3, 1), 600) == _antes_ingenuo(date(2033, 3, 1), 600, nao_uteis)
+
+
+class TestHelpersPedidoCalculo:
+
+    def test_termo_inicial_apos_feriado(self):
+        from sistemas.pedido_calculo.xml_parser import _primeiro_dia_util_posterior
+
+        # Intimação na quarta antes da Semana Santa de 2026: quinta e sexta são feriados
+        assert _primeiro_dia_util_posterior(date(2026, 4, 1)) == date(2026, 4, 6)
+
+    def test_prazo_final_considera_feriados(self):
+        from sistemas.pedido_calculo.services import _calcular_dias_uteis
+
+        # 30/10/2026 (sexta) + 1 dia útil: 02/11 é Finados -> 03/11
+        assert _calcular_dias_uteis(date(2026, 10, 30), 1) == date(2026, 11, 3)
@@ -0,0 +1,146 @@
+# tests/test_classificacao_lote.py
+"""
+Testes da classificação em lote do DocumentClassifier.
+
+Cobre:
+1. Duplicatas exatas e quase-duplicatas (MinHash) geram uma única chamada
+2. Concorrência limitada e ordem dos resultados preservada
+3. Erro da IA continua virando fallback por documento
+4. Documentos curtos agrupados em um prompt com resposta em array
+"""
+
+import asyncio
+import importlib
+import json
+from dataclasses import dataclass
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pytest
+
+from sistemas.gerador_pecas.document_classifier import DocumentClassifier, PDFContent
+from sistemas.gerador_pecas.document_dedup import (
+    agrupar_duplicatas,
+    assinatura_minhash,
+    hash_texto,
+    similaridade_estimada,
+)
+
+
+@dataclass
+class Categoria:
+    id: int
+    nome: str
+    titulo: str
+    descricao: str
+    ativo: bool = True
+    is_residual: bool = False
+    ordem: int = 0
+
+
+CATEGORIAS = [
+    Categoria(1, "peticoes", "Petições", "Petições iniciais"),
+    Categoria(2, "decisoes", "Decisões", "Sentenças e decisões"),
+    Categoria(9, "outros", "Outros", "Diversos", is_residual=True),
+]
+
+
+def _texto(tema, n=80):
+    return " ".join(f"{tema} paragrafo {i} do documento juridico numero {i * 7}" for i in range(n))
+
+
+def _conteudo(texto):
+    return PDFContent(texto=texto, imagens=[], tem_texto=True, ocr_tentado=False,
+                      ocr_sucesso=False, total_paginas=1, texto_qualidade="good")
+
+
+@pytest.fixture
+def classificador():
+    db = Mock()
+    db.query.return_value.filter.return_value.first.return_value = None
+    db.query.return_value.filter.return_value.order_by.return_value.all.return_value = CATEGORIAS
+    return DocumentClassifier(db, modelo="gemini-teste")
+
+
+def _lote(textos):
+    """Documentos cujo bytes é a chave do texto extraído."""
+    documentos = [{"nome": f"doc{i}.pdf", "id": f"id{i}", "bytes": f"pdf{i}".encode()} for i in range(len(textos))]
+    mapa = {d["bytes"]: t for d, t in zip(documentos, textos)}
+    return documentos, (lambda pdf_bytes: _conteudo(mapa[pdf_bytes]))
+
+
+def test_minhash_estima_jaccard_e_agrupa():
+    base = _texto("peticao")
+    quase = base.replace("paragrafo 3 ", "paragrafo tres ")
+    diferente = _texto("sentenca condenatoria")
+
+    assert similaridade_estimada(assinatura_minhash(base), assinatura_minhash(quase)) > 0.9
+    assert similaridade_estimada(assinatura_minhash(base), assinatura_minhash(diferente)) < 0.5
+    assert assinatura_minhash("texto curto demais") is None
+    # Caixa, acentos e pontuação não alteram o hash exato
+    assert hash_texto("PETIÇÃO  inicial.") == hash_texto("peticao inicial")
+
+    itens = [(hash_texto(t), t) for t in (base, diferente, quase, base.upper())]
+    assert agrupar_duplicatas(itens) == [0, 1, 0, 0]
+    assert agrupar_duplicatas(itens, limiar=None) == [0, 1, 2, 0]
+
+
+def test_lote_concorrente_deduplica_e_preserva_ordem(classificador):
+    textos = [_texto("peticao"), _texto("sentenca"), _texto("peticao"),
+              _texto("sentenca").replace("paragrafo 5 ", "paragrafo cinco "), _texto("recurso")]
+    documentos, extrair = _lote(textos)
+    chamadas, em_voo, pico = [], [0], [0]
+
+    async def chamar_ia(prompt, imagens=None):
+        chamadas.append(prompt)
+        em_voo[0] += 1
+        pico[0] = max(pico[0], em_voo[0])
+        # Latências invertidas: o primeiro documento termina por último
+        await asyncio.sleep(0.05 if "peticao" in prompt else 0.01)
+        em_voo[0] -= 1
+        if "recurso" in prompt:
+            raise ValueError("timeout na API")
+        return {"categoria_id": 1 if "peticao" in prompt else 2, "confianca": 0.9, "justificativa_curta": "ok"}
+
+    with patch("sistemas.gerador_pecas.document_classifier.extrair_conteudo_pdf", side_effect=extrair), \
+            patch.object(classificador, "_chamar_ia", side_effect=chamar_ia):
+        resultados = asyncio.run(classificador.classificar_lote(documentos, max_concorrencia=2))
+
+    assert len(chamadas) == 3
+    assert pico[0] == 2
+    assert [r.arquivo_id for r in resultados] == [d["id"] for d in documentos]
+    assert [r.categoria_id for r in resultados] == [1, 2, 1, 2, 9]
+    # Resultado replicado com o texto do próprio documento
+    assert resultados[3].texto_utilizado == textos[3]
+    # Erro da IA: fallback por documento, como na classificação individual
+    assert resultados[4].fallback_aplicado and resultados[4].erro == "timeout na API"
+
+
+def test_documentos_curtos_em_prompt_unico(classificador, monkeypatch):
+    textos = [f"Certidão de intimação número {i}. " + "x " * 120 for i in range(3)] + [_texto("peticao", 200)]
+    documentos, extrair = _lote(textos)
+    gemini = importlib.import_module("services.gemini_service")
+    pacotes = []
+
+    async def generate(prompt, **kwargs):
+        pacotes.append(kwargs["response_schema"]["type"])
+        itens = [{"documento": 1, "categoria_id": 2, "confianca": 0.8, "justificativa_curta": "certidão"},
+                 {"documento": 3, "categoria_id": 2, "confianca": 0.7}]
+        return SimpleNamespace(success=True, content=json.dumps(itens), error=None)
+
+    individuais = []
+
+    async def chamar_ia(prompt, imagens=None):
+        individuais.append(prompt)
+        return {"categoria_id": 1, "confianca": 0.9, "justificativa_curta": "ok"}
+
+    monkeypatch.setattr(gemini.gemini_service, "generate", generate)
+    with patch("sistemas.gerador_pecas.document_classifier.extrair_conteudo_pdf", side_effect=extrair), \
+            patch.object(classificador, "_chamar_ia", side_effect=chamar_ia):
+        resultados = asyncio.run(classificador.classificar_lote(documentos, agrupar_curtos=True))
+
+    assert pacotes == ["ARRAY"]
+    # Documento 2 ficou sem resposta no array e o longo não cabe no pacote
+    assert len(individuais) == 2
+    assert [r.categoria_id for r in resultados] == [2, 1, 2, 1]
+    assert resultados[0].justificativa == "certidão"
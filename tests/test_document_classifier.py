@@ -712,35 +712,47 @@ class TestIntegracao:
         """
         mock_db.query.return_value.filter.return_value.order_by.return_value.all.return_value = mock_categorias
 
-        # Simula 2 chamadas à IA retornando categorias diferentes
-        respostas = [
-            {"categoria_id": 1, "confianca": 0.95, "justificativa_curta": "Petição"},
-            {"categoria_id": 2, "confianca": 0.90, "justificativa_curta": "Decisão"},
-        ]
-        call_count = [0]
+        texto_sentenca = """
+SENTENÇA
 
-        async def mock_chamar_ia(*args, **kwargs):
-            resp = respostas[call_count[0] % len(respostas)]
-            call_count[0] += 1
-            return resp
+Vistos etc. Trata-se de ação de cobrança ajuizada por João da Silva em face do
+Estado de Mato Grosso do Sul, na qual o autor pleiteia o pagamento do reajuste
+previsto na Lei Estadual n° 5.500/2023. Citado, o réu apresentou contestação.
+
+É o relatório. Decido. Comprovado o vínculo e a ausência de pagamento, julgo
+procedente o pedido para condenar o réu ao pagamento das diferenças devidas,
+com correção monetária e juros de mora. Sem custas. P.R.I.
+"""
+
+        # Simula chamadas à IA retornando categorias diferentes (pelo conteúdo:
+        # o lote é classificado concorrentemente)
+        async def mock_chamar_ia(prompt, *args, **kwargs):
+            if "SENTENÇA" in prompt:
+                return {"categoria_id": 2, "confianca": 0.90, "justificativa_curta": "Decisão"}
+            return {"categoria_id": 1, "confianca": 0.95, "justificativa_curta": "Petição"}
+
+        def conteudo(texto):
+            return PDFContent(
+                texto=texto,
+                imagens=[],
+                tem_texto=True,
+                ocr_tentado=False,
+                ocr_sucesso=False,
+                total_paginas=1,
+                texto_qualidade="good"
+            )
 
         with patch.object(DocumentClassifier, '_chamar_ia', side_effect=mock_chamar_ia):
             with patch('sistemas.gerador_pecas.document_classifier.extrair_conteudo_pdf') as mock_extrair:
-                mock_extrair.return_value = PDFContent(
-                    texto=texto_peticao_inicial,
-                    imagens=[],
-                    tem_texto=True,
-                    ocr_tentado=False,
-                    ocr_sucesso=False,
-                    total_paginas=1,
-                    texto_qualidade="good"
+                mock_extrair.side_effect = lambda pdf_bytes: conteudo(
+                    texto_sentenca if pdf_bytes == b"sentenca" else texto_peticao_inicial
                 )
 
                 # 1. Classifica
                 classificador = DocumentClassifier(mock_db)
                 documentos = [
-                    {"nome": "peticao.pdf", "id": "pdf_1", "bytes": b"fake"},
-                    {"nome": "sentenca.pdf", "id": "pdf_2", "bytes": b"fake"},
+                    {"nome": "peticao.pdf", "id": "pdf_1", "bytes": b"peticao"},
+                    {"nome": "sentenca.pdf", "id": "pdf_2", "bytes": b"sentenca"},
                 ]
                 classificacoes = await classificador.classificar_lote(documentos)
 
@@ -0,0 +1,210 @@
+# tests/test_download_peticoes.py
+"""
+Testes do download/classificação das petições em lotes
+(sistemas/prestacao_contas/download_peticoes.py).
+
+Verifica:
+- Decodificação do XML de download documento a documento
+- Chamadas SOAP em lotes, com concorrência limitada
+- Classificação começa antes do último download terminar
+- Extração fora do event loop
+- Falhas de download/classificação não interrompem os demais
+- Progresso por documento e cancelamento ao desconectar
+- Extração em thread para de entregar (e de extrair) após o cancelamento
+"""
+
+import asyncio
+import base64
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from sistemas.prestacao_contas import download_peticoes
+from sistemas.prestacao_contas.download_peticoes import PipelinePeticoes, iterar_conteudos_xml
+from sistemas.prestacao_contas.xml_parser import DocumentoProcesso
+
+EXTRACAO_S = 0.03
+DOWNLOAD_S = 0.1
+
+
+def _xml(ids, ns=False):
+    prefixo = 'ns2:' if ns else ''
+    raiz = '<resposta xmlns:ns2="http://x">' if ns else '<resposta>'
+    docs = "".join(
+        f'<{prefixo}documento idDocumento="{i}"><{prefixo}conteudo>'
+        f'{base64.b64encode(f"pdf-{i}".encode()).decode()}</{prefixo}conteudo></{prefixo}documento>'
+        for i in ids
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?>{raiz}{docs}</resposta>'
+
+
+def test_iterar_conteudos_xml(monkeypatch):
+    monkeypatch.setattr(download_peticoes, "TAMANHO_BLOCO_XML", 7)
+    assert list(iterar_conteudos_xml(_xml(["1", "2"], ns=True))) == [("1", b"pdf-1"), ("2", b"pdf-2")]
+
+    invalido = '<resposta><documento idDocumento="3"><conteudo>abcde</conteudo></documento></resposta>'
+    assert list(iterar_conteudos_xml(invalido)) == []
+
+
+class _TJMSFalso:
+    """baixar_documentos_async / extrair_texto_pdf simulados."""
+
+    def __init__(self, ausentes=(), erro_em=None):
+        self.chamadas = []
+        self.extracoes = 0
+        self.simultaneos = self.max_simultaneos = 0
+        self.fim_ultimo_download = 0.0
+        self.ausentes = set(ausentes)
+        self.erro_em = erro_em
+
+    async def baixar(self, session, numero_cnj, ids):
+        self.chamadas.append(list(ids))
+        self.simultaneos += 1
+        self.max_simultaneos = max(self.max_simultaneos, self.simultaneos)
+        try:
+            await asyncio.sleep(DOWNLOAD_S)
+            if self.erro_em in ids:
+                raise TimeoutError("SOAP timeout")
+            return _xml([i for i in ids if i not in self.ausentes])
+        finally:
+            self.simultaneos -= 1
+            self.fim_ultimo_download = time.perf_counter()
+
+    def extrair(self, pdf_bytes):
+        self.extracoes += 1
+        time.sleep(EXTRACAO_S)  # PyMuPDF é síncrono
+        return pdf_bytes.decode().upper()
+
+
+@pytest.fixture
+def tjms(monkeypatch):
+    def _criar(**kwargs):
+        falso = _TJMSFalso(**kwargs)
+        monkeypatch.setattr(download_peticoes, "baixar_documentos_async", falso.baixar)
+        monkeypatch.setattr(download_peticoes, "extrair_texto_pdf", falso.extrair)
+        return falso
+    return _criar
+
+
+def _peticoes(n):
+    return [DocumentoProcesso(id=str(100 + i), tipo_codigo="9500") for i in range(n)]
+
+
+async def _executar(pipeline):
+    eventos, maior_lag = [], 0.0
+    parar = asyncio.Event()
+
+    async def ticker():
+        nonlocal maior_lag
+        while not parar.is_set():
+            antes = time.perf_counter()
+            await asyncio.sleep(0.005)
+            maior_lag = max(maior_lag, time.perf_counter() - antes - 0.005)
+
+    tarefa = asyncio.create_task(ticker())
+    async for evento in pipeline.executar():
+        eventos.append(evento)
+    parar.set()
+    await tarefa
+    return eventos, maior_lag
+
+
+def test_pipeline_em_lotes(tjms):
+    falso = tjms(ausentes={"103"}, erro_em="108")
+    inicios_classificacao = []
+
+    async def classificar(texto):
+        inicios_classificacao.append(time.perf_counter())
+        if texto == "PDF-105":
+            raise RuntimeError("LLM indisponível")
+        await asyncio.sleep(0.02)
+        return SimpleNamespace(tipo=texto)
+
+    pipeline = PipelinePeticoes("0800001-00.2024.8.12.0001", _peticoes(10), classificar, tamanho_lote=4, max_paralelo=2)
+    eventos, maior_lag = asyncio.run(_executar(pipeline))
+
+    # 3 chamadas SOAP (4 + 4 + 2), no máximo 2 ao mesmo tempo
+    assert sorted(map(len, falso.chamadas)) == [2, 4, 4]
+    assert falso.max_simultaneos == 2
+
+    # 103 ausente na resposta, 108 no lote que falhou (108 e 109)
+    assert [d["doc"].id for d in pipeline.baixados] == ["100", "101", "102", "104", "105", "106", "107"]
+    assert pipeline.baixados[0]["bytes"] == b"pdf-100"
+    # 105 falhou na classificação; ordem das petições preservada
+    assert [d["doc"].id for d in pipeline.classificados] == ["100", "101", "102", "104", "106", "107"]
+    assert pipeline.classificados[0]["resultado"].tipo == "PDF-100"
+
+    # Classificação do primeiro lote começa antes do terceiro lote terminar de baixar
+    assert min(inicios_classificacao) < falso.fim_ultimo_download
+    # Extração (EXTRACAO_S por documento) fora do event loop
+    assert maior_lag < EXTRACAO_S
+
+    mensagens = [m for m, _ in eventos]
+    progressos = [p for _, p in eventos]
+    assert mensagens[0] == "Baixando 10 petições em 3 lote(s)..."
+    assert sum("baixado" in m for m in mensagens) == 7
+    assert sum(m.startswith("Falha ao baixar") for m in mensagens) == 3
+    assert progressos == sorted(progressos)
+    assert progressos[0] == download_peticoes.PROGRESSO_INICIO
+    assert progressos[-1] == download_peticoes.PROGRESSO_FIM
+
+
+def test_cancelamento_ao_desconectar(tjms):
+    tjms()
+    classificacoes_canceladas = []
+
+    async def classificar(texto):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            classificacoes_canceladas.append(texto)
+            raise
+
+    async def cenario():
+        pipeline = PipelinePeticoes("0800001-00.2024.8.12.0001", _peticoes(6), classificar, tamanho_lote=2)
+        eventos = pipeline.executar()
+        async for mensagem, _ in eventos:
+            if "baixado" in mensagem:
+                break
+        await asyncio.sleep(0.05)  # Classificação em andamento
+        await eventos.aclose()  # O StreamingResponse fecha o gerador quando o cliente cai
+        await asyncio.sleep(0)
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    pendentes = asyncio.run(cenario())
+    assert pendentes == []
+    assert classificacoes_canceladas
+
+
+def test_extracao_para_apos_cancelamento(tjms, monkeypatch):
+    falso = tjms()
+    agendados = []
+
+    async def classificar(texto):
+        await asyncio.sleep(10)
+
+    async def cenario():
+        loop = asyncio.get_running_loop()
+        original = loop.call_soon_threadsafe
+
+        def contar(callback, *args, **kwargs):
+            if getattr(callback, "__name__", "") == "put_nowait":  # entregas à fila do pipeline
+                agendados.append(args)
+            return original(callback, *args, **kwargs)
+
+        monkeypatch.setattr(loop, "call_soon_threadsafe", contar)
+        pipeline = PipelinePeticoes("0800001-00.2024.8.12.0001", _peticoes(8), classificar, tamanho_lote=8)
+        eventos = pipeline.executar()
+        async for mensagem, _ in eventos:
+            if "baixado" in mensagem:
+                break
+        await eventos.aclose()
+        entregues_no_cancelamento = len(agendados)
+        await asyncio.sleep(8 * EXTRACAO_S)  # Tempo de sobra para a thread terminar o lote
+        return entregues_no_cancelamento
+
+    entregues_no_cancelamento = asyncio.run(cenario())
+    # No máximo a extração em andamento termina; nada mais é agendado no loop
+    assert falso.extracoes <= 2
+    assert len(agendados) == entregues_no_cancelamento
@@ -0,0 +1,275 @@
+# tests/test_estado_compartilhado.py
+"""
+Testes do estado compartilhado entre workers (utils/estado_compartilhado.py).
+
+Verifica:
+- Semântica das primitivas (incremento com expiração, set-if-absent,
+  pertinência com TTL, prefixos, limpeza) no SQLite e na memória
+- Vários processos sobre o mesmo SQLite: incrementos atômicos, um único
+  vencedor no set-if-absent
+- Rate limit, brute force e blacklist valendo entre processos
+- Manutenção (limpeza/checkpoint) fora do caminho das operações
+- Lock de escrita disputado: espera curta, rate limit e brute force deixam
+  passar, leitura da blacklist não espera
+"""
+
+import multiprocessing
+import sqlite3
+import threading
+import time
+
+import pytest
+from jose import jwt
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter
+
+from config import SECRET_KEY, ALGORITHM
+from utils import estado_compartilhado
+from utils.brute_force import BruteForceConfig, BruteForceProtection
+from utils import token_blacklist
+from utils.estado_compartilhado import (
+    EstadoCompartilhado, EstadoMemoria, EstadoOcupado, EstadoSQLite, set_estado_compartilhado,
+)
+from utils.rate_limit import EstadoCompartilhadoStorage
+from utils.token_blacklist import TokenBlacklist
+
+_fork = multiprocessing.get_context("fork")
+
+
+@pytest.fixture(params=["sqlite", "memoria"])
+def estado(request, tmp_path):
+    if request.param == "sqlite":
+        return EstadoSQLite(str(tmp_path / "estado.db"))
+    return EstadoMemoria()
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    caminho = str(tmp_path / "estado.db")
+    EstadoSQLite(caminho)
+    set_estado_compartilhado(EstadoSQLite(caminho))
+    yield caminho
+    set_estado_compartilhado(None)
+
+
+def _em_processos(alvo, n, *args):
+    """Roda alvo(fila, *args) em n processos e junta os resultados."""
+    fila = _fork.Queue()
+    processos = [_fork.Process(target=alvo, args=(fila, *args)) for _ in range(n)]
+    for p in processos:
+        p.start()
+    resultados = [fila.get(timeout=30) for _ in processos]
+    for p in processos:
+        p.join(timeout=30)
+        assert p.exitcode == 0
+    return resultados
+
+
+def test_primitivas(estado):
+    assert estado.incrementar("c", ttl_s=0.2) == 1
+    assert estado.incrementar("c", ttl_s=0.2, quantidade=2) == 3
+    assert estado.contador("c") == 3
+    time.sleep(0.25)
+    # Janela expirou: recomeça
+    assert estado.contador("c") == 0
+    assert estado.incrementar("c", ttl_s=10) == 1
+    assert estado.expira_em("c") > time.time() + 9
+
+    assert estado.definir_se_ausente("lock", "a", ttl_s=0.1)
+    assert not estado.definir_se_ausente("lock", "b", ttl_s=0.1)
+    assert estado.obter("lock") == "a"
+    time.sleep(0.15)
+    assert estado.definir_se_ausente("lock", "c", ttl_s=10)
+
+    estado.adicionar_membro("rev", "j1", ttl_s=10)
+    estado.adicionar_membro("rev", "j2", ttl_s=-1)
+    assert estado.pertence("rev", "j1")
+    assert not estado.pertence("rev", "j2")
+    assert estado.contar_prefixo("rev:") == 1
+    assert estado.remover("rev:j1") and not estado.remover("rev:j1")
+
+    # A memória já descarta expirados na leitura; o SQLite só na limpeza
+    estado.limpar_expirados()
+    assert estado.contar_prefixo("") == estado.remover_prefixo("") == 2
+
+
+def test_limpeza_em_lotes_por_um_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(estado_compartilhado, "LOTE_LIMPEZA", 10)
+    caminho = str(tmp_path / "estado.db")
+    worker1, worker2 = EstadoSQLite(caminho), EstadoSQLite(caminho)
+    for i in range(25):
+        worker1.definir(f"k{i}", "x", ttl_s=-1)
+
+    worker1.intervalo_limpeza_s = worker2.intervalo_limpeza_s = 0
+    worker1._talvez_limpar()
+    # worker2 não ganha o lock de limpeza enquanto o de worker1 valer
+    worker2.intervalo_limpeza_s = 0
+    worker1.definir(estado_compartilhado.CHAVE_LIMPEZA, "1", ttl_s=60)
+    worker2.definir("k-novo", "x", ttl_s=-1)
+    worker2._talvez_limpar()
+
+    assert worker1.contar_prefixo("k") == 0
+    assert worker1.limpar_expirados() == 1  # Só k-novo sobrou
+
+
+def test_backend_incompleto_falha_na_criacao():
+    class SoIncremento(EstadoCompartilhado):
+        def incrementar(self, chave, ttl_s, quantidade=1):
+            return 1
+
+    with pytest.raises(TypeError):
+        SoIncremento()
+
+    class SemExecutar(estado_compartilhado._EstadoSQL):
+        pass
+
+    with pytest.raises(TypeError):
+        SemExecutar()
+
+
+def test_manutencao_em_segundo_plano(tmp_path, monkeypatch):
+    threads = []
+    limpar = EstadoSQLite.limpar_expirados
+
+    def limpar_registrando(self, lote=estado_compartilhado.LOTE_LIMPEZA):
+        threads.append(threading.current_thread().name)
+        return limpar(self, lote)
+
+    monkeypatch.setattr(EstadoSQLite, "limpar_expirados", limpar_registrando)
+    estado = EstadoSQLite(str(tmp_path / "estado.db"))
+    estado.intervalo_limpeza_s = 0
+    estado.intervalo_manutencao_s = 0.01
+    try:
+        for i in range(20):
+            estado.definir(f"k{i}", "x", ttl_s=-1)
+            estado.incrementar("c", ttl_s=60)
+
+        prazo = time.monotonic() + 5
+        while limpar(estado) and time.monotonic() < prazo:
+            time.sleep(0.02)
+        assert estado.contar_prefixo("") == 1
+        # Nenhuma limpeza dentro das operações, só na thread de manutenção
+        assert threads and set(threads) == {"estado-compartilhado-manutencao"}
+    finally:
+        estado.fechar()
+
+
+@pytest.fixture
+def lock_de_escrita(caminho):
+    """Outra conexão segurando o lock de escrita do arquivo."""
+    conn = sqlite3.connect(caminho, isolation_level=None, check_same_thread=False)
+    conn.execute("BEGIN IMMEDIATE")
+    yield conn
+    if conn.in_transaction:
+        conn.rollback()
+    conn.close()
+
+
+def test_lock_disputado(caminho, lock_de_escrita, monkeypatch):
+    estado = EstadoSQLite(caminho, espera_maxima_s=0.05)
+    set_estado_compartilhado(estado)
+
+    t0 = time.monotonic()
+    with pytest.raises(EstadoOcupado):
+        estado.incrementar("c", ttl_s=60)
+    assert time.monotonic() - t0 < 0.5
+
+    # Rate limit: deixa passar sem segurar o event loop
+    limiter = FixedWindowRateLimiter(EstadoCompartilhadoStorage("estado://"))
+    t0 = time.monotonic()
+    assert all(limiter.hit(parse("1/minute"), "ip", "1.2.3.4") for _ in range(3))
+    assert time.monotonic() - t0 < 1.0
+
+    # Brute force: verificação e registro não levantam nem bloqueiam
+    protecao = BruteForceProtection(BRUTE_FORCE, estado=estado)
+    protecao.record_failure("10.0.0.1", "ana")
+    assert not protecao.check("10.0.0.1", "ana").is_blocked
+
+    # Blacklist: leitura não espera o lock (WAL); revogação tenta até o prazo
+    token = jwt.encode({"sub": "ana", "jti": "abc123", "exp": int(time.time()) + 600}, SECRET_KEY, algorithm=ALGORITHM)
+    blacklist = TokenBlacklist(estado=estado)
+    assert not blacklist.is_revoked(token)
+    monkeypatch.setattr(token_blacklist, "ESPERA_REVOGACAO_S", 0.1)
+    assert not blacklist.revoke(token)
+
+    monkeypatch.setattr(token_blacklist, "ESPERA_REVOGACAO_S", 5.0)
+    threading.Timer(0.1, lock_de_escrita.rollback).start()
+    assert blacklist.revoke(token)
+    assert blacklist.is_revoked(token)
+
+
+def _incrementar(fila, caminho, n):
+    estado = EstadoSQLite(caminho)
+    fila.put([estado.incrementar("contador", ttl_s=60) for _ in range(n)])
+
+
+def _travar(fila, caminho):
+    fila.put(EstadoSQLite(caminho).definir_se_ausente("lock", "x", ttl_s=60))
+
+
+def test_multiprocesso_atomico(caminho):
+    valores = _em_processos(_incrementar, 4, caminho, 300)
+    todos = sorted(v for lista in valores for v in lista)
+    assert todos == list(range(1, 1201))
+
+    assert sorted(_em_processos(_travar, 6, caminho)) == [False] * 5 + [True]
+
+
+def _consumir_limite(fila, caminho, tentativas):
+    set_estado_compartilhado(EstadoSQLite(caminho))
+    limiter = FixedWindowRateLimiter(EstadoCompartilhadoStorage("estado://"))
+    limite = parse("12/minute")
+    fila.put(sum(limiter.hit(limite, "ip", "1.2.3.4") for _ in range(tentativas)))
+
+
+def test_rate_limit_entre_processos(caminho):
+    aceitos = _em_processos(_consumir_limite, 3, caminho, 10)
+    # Com memory:// cada processo aceitaria 10 (30 no total)
+    assert sum(aceitos) == 12
+
+
+BRUTE_FORCE = BruteForceConfig(max_attempts=5, block_duration=60)
+
+
+def _falhar_login(fila, caminho, n):
+    protecao = BruteForceProtection(BRUTE_FORCE, estado=EstadoSQLite(caminho))
+    for _ in range(n):
+        protecao.record_failure("10.0.0.1", "ana")
+    fila.put(True)
+
+
+def test_brute_force_entre_processos(caminho):
+    protecao = BruteForceProtection(BRUTE_FORCE, estado=EstadoSQLite(caminho))
+    _em_processos(_falhar_login, 1, caminho, 3)
+    status = protecao.check("10.0.0.1", "ana")
+    assert not status.is_blocked and status.attempts_remaining == 2 and status.delay_required == 4
+
+    _em_processos(_falhar_login, 1, caminho, 2)
+    status = protecao.check("10.0.0.2", "ana")
+    assert status.is_blocked and 55 < status.retry_after <= 60
+    assert protecao.get_stats()["blocked_ips"] == 1
+
+    assert protecao.unblock_user("ana")
+    assert not protecao.check("10.0.0.2", "ana").is_blocked
+    assert protecao.check("10.0.0.1").is_blocked
+    protecao.record_success("10.0.0.1", "ana")
+    assert protecao.get_stats()["tracked_ips"] == 0
+
+
+def _revogar(fila, caminho, token):
+    fila.put(TokenBlacklist(estado=EstadoSQLite(caminho)).revoke(token))
+
+
+def test_revogacao_entre_processos(caminho):
+    token = jwt.encode({"sub": "ana", "jti": "abc123", "exp": int(time.time()) + 600}, SECRET_KEY, algorithm=ALGORITHM)
+    outro = jwt.encode({"sub": "ana", "jti": "def456", "exp": int(time.time()) + 600}, SECRET_KEY, algorithm=ALGORITHM)
+    blacklist = TokenBlacklist(estado=EstadoSQLite(caminho))
+    assert not blacklist.is_revoked(token)
+
+    assert _em_processos(_revogar, 1, caminho, token) == [True]
+
+    assert blacklist.is_revoked(token)
+    assert not blacklist.is_revoked(outro)
+    assert blacklist.is_revoked("token-invalido")
+    # Revogação expira junto com o token
+    assert 590 < blacklist.estado.expira_em("revogado:abc123") - time.time() <= 600
@@ -0,0 +1,205 @@
+# tests/test_gemini_context_cache.py
+"""
+Testes do cache de contexto do Gemini (services/gemini_context_cache.py)
+contra um servidor falso da API (httpx.MockTransport).
+
+Verifica:
+- Prefixo quente vira cachedContent e é reutilizado (só o sufixo é enviado)
+- cachedContentTokenCount registrado nas métricas
+- cachedContent expirado na API: reenvio com o prompt completo
+- Modelo sem cache explícito: fallback para o prompt completo (cache implícito)
+- LRU de handles apaga o cachedContent que sai
+- Prefixo do Agente 3 não depende do processo
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import json
+import re
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from services.gemini_context_cache import GerenciadorCacheContexto, set_cache_contexto
+from services.gemini_service import GeminiService, clear_cache
+
+PREFIXO = "## SISTEMA\n\n" + "Regras estáveis da peça. " * 40
+MODELO = "gemini-3-pro-preview"
+
+
+class GeminiFalso:
+    """Implementa o mínimo de cachedContents e generateContent da API."""
+
+    def __init__(self, suporta_cache: bool = True):
+        self.suporta_cache = suporta_cache
+        self.caches = {}
+        self.criados = 0
+        self.removidos = []
+        self.geracoes = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        caminho = request.url.path
+        corpo = json.loads(request.content) if request.content else {}
+
+        if caminho.endswith("/cachedContents") and request.method == "POST":
+            if not self.suporta_cache:
+                return httpx.Response(400, json={"error": {"message": "cachedContent not supported"}})
+            self.criados += 1
+            nome = f"cachedContents/c{self.criados}"
+            texto = corpo["contents"][0]["parts"][0]["text"]
+            self.caches[nome] = {"texto": texto, "modelo": corpo["model"], "tokens": len(texto) // 4}
+            return httpx.Response(200, json={"name": nome, "usageMetadata": {"totalTokenCount": len(texto) // 4}})
+
+        nome = re.search(r"(cachedContents/\w+)$", caminho)
+        if nome and request.method == "PATCH":
+            return httpx.Response(200 if nome.group(1) in self.caches else 404, json={})
+        if nome and request.method == "DELETE":
+            self.removidos.append(nome.group(1))
+            self.caches.pop(nome.group(1), None)
+            return httpx.Response(200, json={})
+
+        self.geracoes.append(corpo)
+        cached_tokens = 0
+        if "cachedContent" in corpo:
+            cache = self.caches.get(corpo["cachedContent"])
+            if cache is None:
+                return httpx.Response(404, json={"error": {"message": "CachedContent not found"}})
+            cached_tokens = cache["tokens"]
+        resposta = {
+            "candidates": [{"content": {"parts": [{"text": "Peça gerada"}]}}],
+            "usageMetadata": {"totalTokenCount": 900, "cachedContentTokenCount": cached_tokens},
+        }
+        if ":streamGenerateContent" in caminho:
+            return httpx.Response(200, content=f"data: {json.dumps(resposta)}\n\n".encode())
+        return httpx.Response(200, json=resposta)
+
+
+@pytest.fixture
+def gemini():
+    """Serviço ligado ao servidor falso, com cache de contexto novo."""
+    falso = GeminiFalso()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(falso.handler))
+    set_cache_contexto(GerenciadorCacheContexto(min_tokens=100, usos_para_criar=2, max_handles=4))
+    clear_cache()
+    with patch("services.gemini_service.get_http_client", AsyncMock(return_value=client)), \
+            patch("services.gemini_service.CIRCUIT_BREAKER_ENABLED", False), \
+            patch.object(GeminiService, "_log_to_db", AsyncMock()) as log_db:
+        service = GeminiService(api_key="test-key")
+        service.falso = falso
+        service.log_db = log_db
+        yield service
+    set_cache_contexto(None)
+
+
+async def _gerar(service, sufixo, prefixo=PREFIXO):
+    return await service.generate(
+        prompt=sufixo, prompt_prefix=prefixo, model=MODELO, use_cache=False, context={"sistema": "teste"}
+    )
+
+
+def _texto(corpo):
+    return corpo["contents"][0]["parts"][0]["text"]
+
+
+@pytest.mark.asyncio
+async def test_prefixo_quente_reutiliza_cached_content(gemini):
+    primeira = await _gerar(gemini, "processo 1")
+    # Primeiro uso: prompt completo, prefixo no início (cache implícito)
+    assert gemini.falso.criados == 0
+    assert "cachedContent" not in gemini.falso.geracoes[0]
+    assert _texto(gemini.falso.geracoes[0]) == PREFIXO + "processo 1"
+    assert primeira.metrics.cached_tokens == 0
+
+    segunda = await _gerar(gemini, "processo 2")
+    terceira = await _gerar(gemini, "processo 3")
+
+    assert gemini.falso.criados == 1
+    for corpo, sufixo in zip(gemini.falso.geracoes[1:], ["processo 2", "processo 3"]):
+        assert corpo["cachedContent"] == "cachedContents/c1"
+        assert _texto(corpo) == sufixo
+        assert "systemInstruction" not in corpo
+    assert segunda.metrics.cached_tokens == terceira.metrics.cached_tokens == len(PREFIXO) // 4
+    assert segunda.metrics.prompt_chars == len(PREFIXO) + len("processo 2")
+    assert terceira.metrics.to_dict()["cached_tokens"] == len(PREFIXO) // 4
+
+
+@pytest.mark.asyncio
+async def test_cache_expirado_reenvia_prompt_completo(gemini):
+    await _gerar(gemini, "a")
+    await _gerar(gemini, "b")
+    gemini.falso.caches.clear()  # TTL expirou no servidor antes do previsto
+
+    resposta = await _gerar(gemini, "c")
+
+    assert resposta.success and resposta.content == "Peça gerada"
+    assert gemini.falso.geracoes[-2]["cachedContent"] == "cachedContents/c1"
+    assert _texto(gemini.falso.geracoes[-1]) == PREFIXO + "c"
+    assert "cachedContent" not in gemini.falso.geracoes[-1]
+
+    # O próximo uso recria o cache
+    await _gerar(gemini, "d")
+    assert gemini.falso.geracoes[-1]["cachedContent"] == "cachedContents/c2"
+
+
+@pytest.mark.asyncio
+async def test_modelo_sem_cache_explicito_usa_prompt_completo(gemini):
+    gemini.falso.suporta_cache = False
+
+    for sufixo in ("a", "b", "c"):
+        assert (await _gerar(gemini, sufixo)).success
+
+    assert all(_texto(c) == PREFIXO + s for c, s in zip(gemini.falso.geracoes, "abc"))
+    assert all("cachedContent" not in c for c in gemini.falso.geracoes)
+
+
+@pytest.mark.asyncio
+async def test_prefixo_pequeno_nao_cria_cache(gemini):
+    for sufixo in ("a", "b", "c"):
+        await _gerar(gemini, sufixo, prefixo="curto ")
+    assert gemini.falso.criados == 0
+
+
+@pytest.mark.asyncio
+async def test_lru_remove_cache_mais_antigo(gemini):
+    set_cache_contexto(GerenciadorCacheContexto(min_tokens=100, usos_para_criar=1, max_handles=1))
+
+    await _gerar(gemini, "x", prefixo=PREFIXO)
+    await _gerar(gemini, "x", prefixo=PREFIXO + "outro tipo de peça")
+    await asyncio.sleep(0.01)
+
+    assert gemini.falso.criados == 2
+    assert gemini.falso.removidos == ["cachedContents/c1"]
+
+
+@pytest.mark.asyncio
+async def test_stream_reutiliza_cache_e_registra_tokens(gemini):
+    async def stream(sufixo):
+        return [c async for c in gemini.generate_stream(prompt=sufixo, prompt_prefix=PREFIXO, model=MODELO)]
+
+    assert await stream("a") == ["Peça gerada"]
+    assert await stream("b") == ["Peça gerada"]
+    assert gemini.falso.geracoes[-1]["cachedContent"] == "cachedContents/c1"
+    await asyncio.sleep(0)
+    metrics = gemini.log_db.await_args_list[-1].args[0]
+    assert metrics.cached_tokens == len(PREFIXO) // 4
+
+    # cachedContent sumiu: o stream é refeito com o prompt completo
+    gemini.falso.caches.clear()
+    assert await stream("c") == ["Peça gerada"]
+    assert _texto(gemini.falso.geracoes[-1]) == PREFIXO + "c"
+
+
+def test_prefixo_agente3_independe_do_processo():
+    from sistemas.gerador_pecas.orquestrador_agentes import (
+        _montar_prefixo_agente3,
+        _montar_sufixo_agente3,
+    )
+
+    prefixo = _montar_prefixo_agente3("## BASE", "## PECA", "## ARGUMENTOS")
+    sufixo = _montar_sufixo_agente3("resumo do processo 123", "obs", "dados")
+
+    assert prefixo == _montar_prefixo_agente3("## BASE", "## PECA", "## ARGUMENTOS")
+    assert "resumo do processo 123" not in prefixo
+    assert sufixo.startswith("obsdados\n---") and "resumo do processo 123" in sufixo
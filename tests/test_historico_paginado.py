@@ -0,0 +1,244 @@
+# tests/test_historico_paginado.py
+"""
+Testes das listas de histórico paginadas (utils/historico.py) e dos
+endpoints que usam o helper.
+
+Verifica:
+- Lista leve: o tamanho da resposta não cresce com o conteúdo gerado
+  (regressão de payload); o conteúdo completo continua no detalhe
+- Paginação por cursor percorre tudo sem repetir nem pular itens, inclusive
+  com criado_em empatado
+- Cursor adulterado -> 400
+- Cumprimento beta: indicadores calculados na mesma query (sem N+1)
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from auth.dependencies import get_current_active_user
+from auth.models import User
+from database.connection import Base, get_db
+from utils.historico import CABECALHO_CURSOR, codificar_cursor, decodificar_cursor
+from utils.rate_limit import limiter
+
+from sistemas.cumprimento_beta import router as router_beta
+from sistemas.cumprimento_beta.dependencies import require_beta_access
+from sistemas.cumprimento_beta.models import (
+    ConsolidacaoBeta, ConversaBeta, DocumentoBeta, PecaGeradaBeta, SessaoCumprimentoBeta,
+)
+from sistemas.gerador_pecas import router as router_gerador
+from sistemas.gerador_pecas.models import GeracaoPeca
+from sistemas.pedido_calculo import router as router_pedido
+from sistemas.pedido_calculo.models import GeracaoPedidoCalculo
+from sistemas.prestacao_contas import router as router_prestacao
+from sistemas.prestacao_contas.models import GeracaoAnalise
+from sistemas.relatorio_cumprimento import router as router_relatorio
+from sistemas.relatorio_cumprimento.models import GeracaoRelatorioCumprimento
+
+N_GERACOES = 23
+CONTEUDO_GRANDE = "Lorem ipsum dolor sit amet. " * 4000  # ~110 KB por geração
+# Lista leve: por item, só metadados + preview (bem abaixo de 1 KB)
+BYTES_POR_ITEM = 1024
+
+TABELAS = [
+    User.__table__,
+    GeracaoPedidoCalculo.__table__,
+    GeracaoPeca.__table__,
+    GeracaoAnalise.__table__,
+    GeracaoRelatorioCumprimento.__table__,
+    SessaoCumprimentoBeta.__table__,
+    DocumentoBeta.__table__,
+    ConsolidacaoBeta.__table__,
+    ConversaBeta.__table__,
+    PecaGeradaBeta.__table__,
+]
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine, tables=TABELAS)
+    sessao = sessionmaker(bind=engine)()
+    yield sessao
+    sessao.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db_session, monkeypatch):
+    monkeypatch.setattr(limiter, "enabled", False)
+    usuario = SimpleNamespace(id=1, role="user", username="teste")
+
+    app = FastAPI()
+    app.include_router(router_pedido.router, prefix="/pedido-calculo/api")
+    app.include_router(router_gerador.router, prefix="/gerador-pecas/api")
+    app.include_router(router_prestacao.router, prefix="/prestacao-contas/api")
+    app.include_router(router_relatorio.router, prefix="/relatorio-cumprimento/api")
+    app.include_router(router_beta.router, prefix="/api")
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_active_user] = lambda: usuario
+    app.dependency_overrides[require_beta_access] = lambda: usuario
+    return TestClient(app)
+
+
+def _popular(db):
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    for i in range(N_GERACOES):
+        # Pares com o mesmo criado_em: o desempate é pelo id
+        criado_em = base + timedelta(minutes=i // 2)
+        cnj = f"0800{i:03d}2020812000{i % 10}"
+        comum = dict(numero_cnj=cnj, usuario_id=1, criado_em=criado_em)
+        db.add(GeracaoPedidoCalculo(
+            **comum, conteudo_gerado=CONTEUDO_GRANDE,
+            dados_processo={"autor": f"Autor {i}", "movimentos": ["x" * 200] * 100},
+            documentos_baixados=[{"id": str(n), "texto": "y" * 500} for n in range(50)],
+        ))
+        db.add(GeracaoPeca(
+            **comum, tipo_peca="contestacao", conteudo_gerado=CONTEUDO_GRANDE,
+            prompt_enviado=CONTEUDO_GRANDE, dados_processo={"partes": ["z" * 200] * 100},
+        ))
+        db.add(GeracaoAnalise(
+            **comum, status="concluido", parecer="favoravel", fundamentacao=CONTEUDO_GRANDE,
+            extrato_subconta_pdf_base64=CONTEUDO_GRANDE, peticao_inicial_texto=CONTEUDO_GRANDE,
+        ))
+        db.add(GeracaoRelatorioCumprimento(
+            numero_cumprimento=cnj, usuario_id=1, criado_em=criado_em, status="concluido",
+            conteudo_gerado=CONTEUDO_GRANDE, dados_basicos={"cumprimento": {"autor": f"Autor {i}"}},
+            dados_processo_cumprimento={"movimentos": ["x" * 200] * 100},
+        ))
+    # Geração de outro usuário não aparece na lista
+    db.add(GeracaoPedidoCalculo(numero_cnj="1", usuario_id=2, criado_em=base + timedelta(days=1)))
+    db.commit()
+
+
+def _percorrer(client, url, limite):
+    """Segue o cabeçalho X-Proximo-Cursor até a última página."""
+    paginas, cursor = [], None
+    while True:
+        params = {"limite": limite}
+        if cursor:
+            params["cursor"] = cursor
+        resposta = client.get(url, params=params)
+        assert resposta.status_code == 200, resposta.text
+        paginas.append(resposta)
+        cursor = resposta.headers.get(CABECALHO_CURSOR)
+        if not cursor:
+            return paginas
+
+
+@pytest.mark.parametrize("url", [
+    "/pedido-calculo/api/historico",
+    "/gerador-pecas/api/historico",
+    "/relatorio-cumprimento/api/historico",
+])
+def test_lista_leve_e_paginada(client, db_session, url):
+    _popular(db_session)
+
+    paginas = _percorrer(client, url, limite=5)
+    itens = [item for p in paginas for item in p.json()]
+
+    assert len(paginas) == 5
+    ids = [item["id"] for item in itens]
+    assert len(ids) == len(set(ids)) == N_GERACOES
+    datas = [(item.get("criado_em") or item.get("data"), item["id"]) for item in itens]
+    assert datas == sorted(datas, reverse=True)
+
+    # Regressão de payload: nada de conteúdo/JSON completos na lista
+    for p in paginas:
+        assert len(p.content) <= BYTES_POR_ITEM * len(p.json())
+        for item in p.json():
+            assert not {"conteudo_gerado", "dados_processo", "documentos_baixados", "dados_basicos"} & set(item)
+
+
+def test_autor_e_preview_calculados_no_sql(client, db_session):
+    _popular(db_session)
+
+    pedido = client.get("/pedido-calculo/api/historico").json()[0]
+    assert pedido["autor"] == f"Autor {N_GERACOES - 1}"
+    assert pedido["preview"] == CONTEUDO_GRANDE[:200]
+
+    relatorio = client.get("/relatorio-cumprimento/api/historico").json()[0]
+    assert relatorio["autor"] == f"Autor {N_GERACOES - 1}"
+
+    # O detalhe continua trazendo as colunas grandes
+    detalhe = client.get(f"/pedido-calculo/api/historico/{pedido['id']}").json()
+    assert detalhe["conteudo_gerado"] == CONTEUDO_GRANDE
+    assert len(detalhe["documentos_baixados"]) == 50
+
+
+def test_prestacao_contas_cursor_no_corpo(client, db_session):
+    _popular(db_session)
+
+    vistos, cursor = [], None
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        resposta = client.get("/prestacao-contas/api/historico", params=params)
+        assert resposta.status_code == 200, resposta.text
+        corpo = resposta.json()
+        assert corpo["total"] == N_GERACOES
+        assert len(resposta.content) <= BYTES_POR_ITEM * len(corpo["geracoes"]) + 200
+        for g in corpo["geracoes"]:
+            assert g["fundamentacao"] is None
+            assert g["preview"] == CONTEUDO_GRANDE[:200]
+        vistos += [g["id"] for g in corpo["geracoes"]]
+        cursor = corpo["proximo_cursor"]
+        if not cursor:
+            break
+
+    assert len(vistos) == len(set(vistos)) == N_GERACOES
+
+    detalhe = client.get(f"/prestacao-contas/api/historico/{vistos[0]}").json()
+    assert detalhe["fundamentacao"] == CONTEUDO_GRANDE
+
+
+def test_cursor_invalido(client):
+    for url in ("/pedido-calculo/api/historico", "/gerador-pecas/api/historico",
+                "/prestacao-contas/api/historico", "/api/cumprimento-beta/sessoes"):
+        resposta = client.get(url, params={"cursor": "nao-e-um-cursor"})
+        assert resposta.status_code == 400, url
+
+
+def test_cursor_ida_e_volta():
+    data = datetime(2026, 3, 1, 12, 30, 15, 123456)
+    assert decodificar_cursor(codificar_cursor(data, 42)) == (data, 42)
+
+
+def test_sessoes_beta_sem_n_mais_1(client, db_session):
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    for i in range(7):
+        db_session.add(SessaoCumprimentoBeta(
+            id=i + 1, user_id=1, numero_processo=f"0800{i:03d}", status="chatbot",
+            created_at=base + timedelta(minutes=i),
+        ))
+    db_session.flush()
+    db_session.add(ConsolidacaoBeta(sessao_id=3, resumo_consolidado="resumo", modelo_usado="m"))
+    for _ in range(4):
+        db_session.add(ConversaBeta(sessao_id=3, role="user", conteudo="oi"))
+    db_session.add(PecaGeradaBeta(sessao_id=5, tipo_peca="cumprimento", conteudo_markdown="peça", modelo_usado="m"))
+    db_session.commit()
+
+    consultas = []
+    event.listen(db_session.get_bind(), "before_cursor_execute",
+                 lambda *args: consultas.append(args[2]))
+
+    primeira = client.get("/api/cumprimento-beta/sessoes", params={"por_pagina": 4}).json()
+    # COUNT do total + a página (com os indicadores), independente do tamanho da página
+    assert len(consultas) == 2
+    segunda = client.get("/api/cumprimento-beta/sessoes",
+                         params={"por_pagina": 4, "cursor": primeira["proximo_cursor"]}).json()
+
+    assert primeira["total"] == 7
+    assert segunda["proximo_cursor"] is None
+    sessoes = {s["id"]: s for s in primeira["sessoes"] + segunda["sessoes"]}
+    assert list(sessoes) == [7, 6, 5, 4, 3, 2, 1]
+    assert sessoes[3]["tem_consolidacao"] is True and sessoes[3]["total_conversas"] == 4
+    assert sessoes[5]["total_pecas"] == 1 and sessoes[5]["tem_consolidacao"] is False
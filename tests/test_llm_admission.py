@@ -0,0 +1,254 @@
+# tests/test_llm_admission.py
+# -*- coding: utf-8 -*-
+"""
+Testes do controle de admissão de chamadas LLM (utils/llm_admission.py).
+
+Testa:
+- WFQ: interativo passa à frente do lote sem causar inanição
+- AIMD: 429 reduz o limite (uma vez por rajada), sucessos saturados aumentam
+- Cancelamento na fila não vaza vaga
+- Limite de tokens em voo e slots globais via flock
+- GeminiService contra servidor fake que responde 429 acima da cota
+"""
+
+import asyncio
+import importlib
+
+import pytest
+
+from utils.llm_admission import (
+    PRIORIDADE_DOCUMENTO,
+    PRIORIDADE_INTERATIVO,
+    PRIORIDADE_LOTE,
+    ControladorAdmissao,
+    CoordenadorSlotsArquivo,
+    prioridade_llm,
+    set_admissao_llm,
+)
+
+
+async def _ocupar(controlador, modelo, liberar: asyncio.Event, **kwargs):
+    async with controlador.admitir(modelo, **kwargs):
+        await liberar.wait()
+
+
+async def _ordem_de_admissao(controlador, pedidos):
+    """Com limite 1 ocupado, enfileira `pedidos` e retorna a ordem de admissão."""
+    ordem = []
+    liberar = asyncio.Event()
+    bloqueio = asyncio.create_task(_ocupar(controlador, "m", liberar))
+    await asyncio.sleep(0)
+
+    async def pedido(nome, prioridade):
+        async with controlador.admitir("m", prioridade=prioridade):
+            ordem.append(nome)
+            await asyncio.sleep(0)
+
+    tarefas = []
+    for nome, prioridade in pedidos:
+        tarefas.append(asyncio.create_task(pedido(nome, prioridade)))
+        await asyncio.sleep(0)
+
+    liberar.set()
+    await asyncio.gather(bloqueio, *tarefas)
+    return ordem
+
+
+def test_wfq_prioriza_interativo_sem_inanicao_do_lote():
+    controlador = ControladorAdmissao(limite_inicial=1, limite_max=1)
+    pedidos = [(f"lote{i}", PRIORIDADE_LOTE) for i in range(3)]
+    pedidos += [(f"int{i}", PRIORIDADE_INTERATIVO) for i in range(20)]
+
+    ordem = asyncio.run(_ordem_de_admissao(controlador, pedidos))
+
+    # Interativos chegaram depois, mas passam à frente dos lotes...
+    assert ordem[0] == "int0"
+    assert ordem.index("lote0") > ordem.index("int5")
+    # ...e o lote não espera todos os interativos (peso 8:1)
+    assert ordem.index("lote0") < ordem.index("int19")
+    assert [n for n in ordem if n.startswith("lote")] == ["lote0", "lote1", "lote2"]
+
+
+def test_prioridade_do_contexto_e_validacao():
+    controlador = ControladorAdmissao()
+
+    async def cenario():
+        with prioridade_llm(PRIORIDADE_LOTE):
+            async with controlador.admitir("m") as permissao:
+                assert permissao.prioridade == PRIORIDADE_LOTE
+        async with controlador.admitir("m") as permissao:
+            assert permissao.prioridade == PRIORIDADE_DOCUMENTO
+
+    asyncio.run(cenario())
+    with pytest.raises(ValueError):
+        with prioridade_llm("urgente"):
+            pass
+
+
+def test_aimd_reduz_em_429_e_cresce_com_sucesso_saturado():
+    controlador = ControladorAdmissao(limite_inicial=8, limite_max=10, intervalo_reducao_s=60)
+
+    async def chamada(status):
+        async with controlador.admitir("m") as permissao:
+            permissao.registrar(status)
+
+    async def rajada_429():
+        # 3 respostas 429 na mesma rajada contam como um único sinal
+        await asyncio.gather(*(chamada(429) for _ in range(3)))
+
+    asyncio.run(rajada_429())
+    assert controlador.limite("m") == 4
+
+    async def saturar():
+        liberar = asyncio.Event()
+        ocupantes = [asyncio.create_task(_ocupar(controlador, "m", liberar)) for _ in range(3)]
+        await asyncio.sleep(0)
+        await chamada(200)
+        liberar.set()
+        await asyncio.gather(*ocupantes)
+
+    asyncio.run(saturar())
+    assert controlador.limite("m") == pytest.approx(4.25)
+
+    # Sem saturação o limite não cresce
+    asyncio.run(chamada(200))
+    assert controlador.limite("m") == pytest.approx(4.25)
+
+
+def test_latencia_acima_do_alvo_reduz_limite():
+    controlador = ControladorAdmissao(limite_inicial=10, latencia_alvo_s=1.0, intervalo_reducao_s=0)
+
+    async def chamada():
+        async with controlador.admitir("m") as permissao:
+            permissao.registrar(200, latencia_s=5.0)
+
+    asyncio.run(chamada())
+    assert controlador.limite("m") == pytest.approx(9.0)
+
+
+def test_cancelamento_na_fila_nao_vaza_vaga():
+    controlador = ControladorAdmissao(limite_inicial=1, limite_max=1)
+
+    async def cenario():
+        liberar = asyncio.Event()
+        bloqueio = asyncio.create_task(_ocupar(controlador, "m", liberar))
+        await asyncio.sleep(0)
+        esperando = asyncio.create_task(_ocupar(controlador, "m", asyncio.Event()))
+        await asyncio.sleep(0)
+        esperando.cancel()
+        liberar.set()
+        await bloqueio
+        with pytest.raises(asyncio.CancelledError):
+            await esperando
+
+        async with controlador.admitir("m"):
+            pass
+
+    asyncio.run(asyncio.wait_for(cenario(), timeout=5))
+    assert controlador.snapshot()["modelos"]["m"]["em_voo"] == 0
+
+
+def test_limite_de_tokens_em_voo():
+    controlador = ControladorAdmissao(limite_inicial=10, max_tokens_em_voo=1000)
+
+    async def cenario():
+        liberar = asyncio.Event()
+        grande = asyncio.create_task(_ocupar(controlador, "m", liberar, tokens_estimados=800))
+        await asyncio.sleep(0)
+        segundo = asyncio.create_task(_ocupar(controlador, "m", asyncio.Event(), tokens_estimados=300))
+        await asyncio.sleep(0.01)
+        estado = controlador.snapshot()["modelos"]["m"]
+        assert estado["em_voo"] == 1
+        assert estado["aguardando"][PRIORIDADE_DOCUMENTO] == 1
+        liberar.set()
+        await grande
+        await asyncio.sleep(0)
+        assert controlador.snapshot()["modelos"]["m"]["tokens_em_voo"] == 300
+        segundo.cancel()
+
+    asyncio.run(cenario())
+
+
+def test_slots_globais_por_flock(tmp_path):
+    pytest.importorskip("fcntl")
+    coordenador = CoordenadorSlotsArquivo(str(tmp_path), limite_global=1, intervalo_s=0.01)
+    controlador = ControladorAdmissao(limite_inicial=5, coordenador=coordenador)
+    em_voo = []
+    pico = []
+
+    async def chamada():
+        async with controlador.admitir("google/gemini-2.5-flash"):
+            em_voo.append(1)
+            pico.append(len(em_voo))
+            await asyncio.sleep(0.02)
+            em_voo.pop()
+
+    async def cenario():
+        await asyncio.gather(*(chamada() for _ in range(4)))
+
+    asyncio.run(cenario())
+    assert max(pico) == 1
+    assert list(tmp_path.glob("google_gemini-2.5-flash.0.slot"))
+
+
+def test_metricas_prometheus_de_espera():
+    controlador = ControladorAdmissao()
+
+    async def chamada():
+        async with controlador.admitir("m", prioridade=PRIORIDADE_INTERATIVO):
+            pass
+
+    asyncio.run(chamada())
+    texto = controlador.texto_prometheus()
+
+    assert 'portal_pge_llm_espera_fila_seconds_count{prioridade="interativo"} 1' in texto
+    assert 'portal_pge_llm_limite_concorrencia{modelo="m"}' in texto
+
+
+# ============================================
+# INTEGRAÇÃO COM SERVIDOR FAKE (429 acima da cota)
+# ============================================
+
+def test_gemini_service_com_servidor_que_responde_429(monkeypatch):
+    pytest.importorskip("uvicorn")
+    from scripts.benchmark_offline.fakes import FakeLLM, Latencia
+    # services/__init__ re-exporta a instância com o mesmo nome do módulo
+    modulo = importlib.import_module("services.gemini_service")
+
+    fake = FakeLLM(Latencia(media_ms=50, distribuicao="fixa"), tokens_por_segundo=0,
+                   tokens_saida=5, capacidade=2).iniciar()
+    controlador = ControladorAdmissao(limite_inicial=6, limite_max=6, intervalo_reducao_s=0)
+    set_admissao_llm(controlador)
+    monkeypatch.setattr(modulo, "MAX_RETRIES", 8)
+    monkeypatch.setattr(modulo, "CIRCUIT_BREAKER_ENABLED", False)
+
+    async def _sem_log(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(modulo.GeminiService, "_log_to_db", _sem_log)
+
+    servico = modulo.GeminiService(api_key="teste")
+    servico.BASE_URL = f"{fake.url}/gemini/v1beta/models"
+
+    async def cenario():
+        try:
+            return await asyncio.gather(*(
+                servico.generate(prompt=f"documento {i}", model="gemini-3-flash-preview", use_cache=False)
+                for i in range(8)
+            ))
+        finally:
+            await modulo.close_http_client()
+
+    try:
+        respostas = asyncio.run(cenario())
+    finally:
+        set_admissao_llm(None)
+        fake.parar()
+
+    assert all(r.success for r in respostas)
+    assert fake.estatisticas["gemini"] == 8
+    assert fake.estatisticas["429"] > 0
+    estado = controlador.snapshot()["modelos"]["gemini-3-flash-preview"]
+    assert estado["sobrecargas"] == fake.estatisticas["429"]
+    assert estado["limite"] < 6
+    assert estado["em_voo"] == 0
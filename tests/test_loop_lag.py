@@ -0,0 +1,103 @@
+# tests/test_loop_lag.py
+"""
+Testes do monitor de lag do event loop (admin/loop_lag.py).
+
+Verifica:
+- Chamada bloqueante injetada é capturada com o local e a rota da request
+- Carga só com await não gera travamentos
+- Agregação limitada a max_locais
+- Métricas Prometheus
+"""
+
+import asyncio
+import time
+
+from admin.loop_lag import LOCAL_NAO_CAPTURADO, MonitorLagLoop
+from admin.perf_context import perf_ctx
+
+
+def _bloquear(ms):
+    time.sleep(ms / 1000)  # Chamada síncrona dentro de código async
+
+
+async def _request(rota, ms):
+    perf_ctx.start_request(route=rota, method="GET")
+    # Como no BaseHTTPMiddleware: o handler roda em outra task
+    await asyncio.create_task(_handler(ms))
+    perf_ctx.clear()
+
+
+async def _handler(ms):
+    await asyncio.sleep(0.01)
+    _bloquear(ms)
+    await asyncio.sleep(0.01)
+
+
+async def _com_monitor(monitor, carga):
+    await monitor.iniciar()
+    try:
+        await asyncio.sleep(0.05)
+        await carga()
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.parar()
+    return monitor.stats()
+
+
+def test_bloqueio_atribuido_ao_local_e_rota():
+    monitor = MonitorLagLoop(periodo_s=0.02, limite_ms=50)
+
+    async def carga():
+        await asyncio.gather(_request("/api/exportar", 300), _request("/api/leve", 0))
+        await _request("/api/exportar", 200)
+
+    stats = asyncio.run(_com_monitor(monitor, carga))
+
+    assert stats["travamentos"] == 2
+    assert stats["lag_max_ms"] >= 250
+    local = stats["locais"][0]
+    assert local["rota"] == "/api/exportar"
+    assert local["local"].startswith("tests/test_loop_lag.py:")
+    assert local["local"].endswith("(_bloquear)")
+    assert local["ocorrencias"] == 2
+    assert 450 <= local["total_ms"] < 1000
+    assert any("(_handler)" in linha for linha in local["pilha"])
+    assert not monitor.ativo
+
+
+def test_carga_async_sem_travamentos():
+    monitor = MonitorLagLoop(periodo_s=0.01, limite_ms=50)
+
+    async def carga():
+        await asyncio.gather(*(_request(f"/api/{i}", 0) for i in range(50)))
+
+    stats = asyncio.run(_com_monitor(monitor, carga))
+
+    assert stats["amostras"] > 5
+    assert stats["travamentos"] == 0
+    assert stats["locais"] == []
+
+
+def test_agregacao_limitada():
+    monitor = MonitorLagLoop(limite_ms=10, max_locais=3)
+    for i in range(10):
+        monitor._captura = None
+        monitor._registrar(20 + i, seq=i)
+    # Sem captura do watchdog, cai em um único local "não capturado"
+    assert [item["local"] for item in monitor.stats()["locais"]] == [LOCAL_NAO_CAPTURADO]
+
+    from admin.loop_lag import _Captura
+    for i in range(10):
+        monitor._captura = _Captura(seq=100 + i, local=f"x.py:{i} (f)", rota="/r", pilha=[])
+        monitor._registrar(20 + i, seq=100 + i)
+    stats = monitor.stats()
+    assert len(stats["locais"]) == 3
+    assert stats["travamentos"] == 20
+
+    texto = monitor.texto_prometheus()
+    assert "portal_pge_event_loop_travamentos_total 20" in texto
+    assert 'portal_pge_event_loop_lag_seconds_bucket{le="+Inf"} 20' in texto
+    assert 'portal_pge_event_loop_bloqueio_seconds_total{local="x.py:9 (f)",rota="/r"} 0.029' in texto
+
+    monitor.reset()
+    assert monitor.stats()["travamentos"] == 0
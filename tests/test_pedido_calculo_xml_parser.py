@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""
+Testes de referência (golden) do parser de XML do pedido de cálculo
+(sistemas/pedido_calculo/xml_parser.py).
+
+O corpus em tests/fixtures/pedido_calculo_xml/ são XMLs anonimizados com a
+estrutura da consulta SOAP do TJ-MS. golden.json guarda a saída do parser
+para cada um; o índice montado em uma passada tem que reproduzi-la.
+
+Uso:
+    pytest tests/test_pedido_calculo_xml_parser.py -v
+    PYTHONPATH=. python tests/test_pedido_calculo_xml_parser.py --atualizar   # regrava golden.json
+"""
+
+import json
+import random
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from sistemas.pedido_calculo.xml_parser import TERMOS, XMLParser, _BUSCA_TERMOS
+
+CORPUS = Path(__file__).parent / "fixtures" / "pedido_calculo_xml"
+GOLDEN = CORPUS / "golden.json"
+ARQUIVOS = sorted(p.name for p in CORPUS.glob("*.xml"))
+
+
+def _json(obj):
+    return json.loads(json.dumps(obj, default=str, ensure_ascii=False))
+
+
+def _saida(xml_text: str) -> dict:
+    """Tudo o que o parser expõe (inclusive os helpers usados pelo Agente 1)."""
+    parser = XMLParser(xml_text)
+    try:
+        dados = asdict(parser.extrair_dados_basicos())
+    except ValueError as e:
+        dados = {"erro": str(e)}
+    ids = sorted({e.attrib["idDocumento"] for e in parser.root.iter() if "idDocumento" in e.attrib})
+    return _json({
+        "dados_basicos": dados,
+        "documentos": asdict(parser.identificar_documentos_para_download()),
+        "documentos_forcando_sentencas": asdict(parser.identificar_documentos_para_download(forcar_busca_sentencas=True)),
+        "movimentos": asdict(parser.extrair_movimentos_relevantes()),
+        "cumprimento_autonomo": parser._verificar_cumprimento_autonomo(),
+        "numero_origem": parser._extrair_numero_processo_origem(),
+        "transito_vinculado": parser._buscar_documento_vinculado_movimento_transito(),
+        "data_movimento_cumprimento": parser._encontrar_data_movimento_cumprimento(),
+        "movimento_por_documento": {i: parser.get_movimento_info(i) for i in ids},
+    })
+
+
+@pytest.fixture(scope="module")
+def golden():
+    return json.loads(GOLDEN.read_text(encoding="utf-8"))
+
+
+def test_corpus_completo(golden):
+    assert ARQUIVOS and sorted(golden) == ARQUIVOS
+
+
+@pytest.mark.parametrize("arquivo", ARQUIVOS)
+def test_saida_identica_ao_golden(arquivo, golden):
+    xml_text = (CORPUS / arquivo).read_text(encoding="utf-8")
+    assert _saida(xml_text) == golden[arquivo]
+
+
+def test_busca_termos_equivale_a_substring():
+    """A regex única acha as mesmas categorias que `any(termo in texto ...)`, inclusive com termos sobrepostos."""
+    rnd = random.Random(0)
+    pedacos = [t for termos in TERMOS.values() for t in termos] + ["ao ", "de ", "x", " ", "processo", "sentença"]
+    for _ in range(2000):
+        texto = "".join(rnd.choice(pedacos)[: rnd.randint(1, 25)] for _ in range(rnd.randint(0, 6)))
+        esperado = {cat for cat, termos in TERMOS.items() if any(t in texto for t in termos)}
+        assert _BUSCA_TERMOS.categorias(texto) == esperado, texto
+
+    assert _BUSCA_TERMOS.categorias("intime-se para pagar ou impugnar") == {"CUMPRIMENTO", "IMPUGNACAO"}
+
+
+if __name__ == "__main__" and "--atualizar" in sys.argv:
+    saidas = {nome: _saida((CORPUS / nome).read_text(encoding="utf-8")) for nome in ARQUIVOS}
+    GOLDEN.write_text(json.dumps(saidas, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"{GOLDEN} atualizado ({len(saidas)} XMLs)")
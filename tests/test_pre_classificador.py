@@ -0,0 +1,230 @@
+# tests/test_pre_classificador.py
+"""
+Testes do pré-classificador local da prestação de contas
+(sistemas/prestacao_contas/pre_classificador.py).
+
+Verifica:
+- Features determinísticas e normalizadas
+- Treino com rótulos sintéticos: acurácia, limiares, serialização
+- Cascata no IdentificadorPeticoes (ativo x sombra), registro das decisões
+- Histórico no banco: amostras, versões, modelo ativo e avaliação da sombra
+"""
+
+import asyncio
+import random
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from sistemas.prestacao_contas import pre_classificador
+from sistemas.prestacao_contas.ia_logger import IALogger
+from sistemas.prestacao_contas.identificador_peticoes import (
+    IdentificadorPeticoes,
+    ResultadoIdentificacao,
+    TipoDocumento,
+)
+from sistemas.prestacao_contas.models import LogChamadaIAPrestacao, ModeloPreClassificador
+from sistemas.prestacao_contas.pre_classificador import Amostra, ModeloLinear, PreClassificador
+
+NOMES = ["Maria da Silva", "João Pereira", "Ana Souza", "Carlos Lima", "Fernanda Rocha", "Pedro Alves"]
+MEDICAMENTOS = ["Rituximabe", "Insulina Glargina", "Adalimumabe", "Tiotrópio", "Enoxaparina"]
+
+MODELOS = {
+    "IRRELEVANTE": [
+        "PROCURAÇÃO AD JUDICIA. Outorgante: {nome}. Outorgado: advogado inscrito na OAB/MS, a quem confere "
+        "amplos poderes para o foro em geral, podendo substabelecer. Campo Grande, {n} de março.",
+        "CERTIDÃO. Certifico que a decisão foi disponibilizada no Diário da Justiça Eletrônico nº {n}, "
+        "considerando-se publicada no primeiro dia útil seguinte. Intimação de {nome}.",
+        "SUBSTABELECIMENTO com reserva de poderes. {nome}, advogado, substabelece os poderes recebidos "
+        "na procuração de fls. {n} ao colega abaixo assinado.",
+    ],
+    "PETICAO_RELEVANTE": [
+        "O ESTADO DE MATO GROSSO DO SUL, pela Procuradoria-Geral do Estado, vem manifestar-se sobre o bloqueio "
+        "de valores na subconta para aquisição do medicamento {med} em favor de {nome}, requerendo a intimação.",
+        "DECISÃO. Defiro o bloqueio de R$ {n}.000,00 nas contas do Estado para custeio do medicamento {med}, "
+        "devendo o autor {nome} comprovar a utilização dos valores no prazo de 30 dias.",
+        "Manifestação da Fazenda Pública sobre o cumprimento da obrigação de fornecer {med} a {nome}; "
+        "requer a liberação do saldo da subconta judicial nº {n}.",
+    ],
+    "PETICAO_PRESTACAO": [
+        "{nome}, já qualificado, vem apresentar PRESTAÇÃO DE CONTAS dos valores levantados por alvará, "
+        "informando a compra do medicamento {med} conforme notas fiscais, e requer o arquivamento. Saldo de R$ {n},00 devolvido.",
+        "A farmácia fornecedora vem prestar contas da aquisição de {med} para {nome}, demonstrando a "
+        "utilização do valor bloqueado, com recibos de compra nº {n}.",
+    ],
+    "NOTA_FISCAL": [
+        "DANFE - Documento Auxiliar da Nota Fiscal Eletrônica nº {n}. Emitente: Drogaria Central LTDA CNPJ "
+        "12.345.678/0001-90. Produto: {med} cx 30 un. Valor total da nota: R$ {n},90. Destinatário: {nome}.",
+    ],
+    "COMPROVANTE": [
+        "Comprovante de transferência PIX. Valor R$ {n},00. Pagador: {nome}. Recebedor: Drogaria Central. "
+        "ID da transação E{n}2026. Banco do Brasil agência 1234.",
+    ],
+}
+
+ANEXOS = " Segue em anexo a nota fiscal e os comprovantes de pagamento."
+
+
+def _amostra(rng: random.Random, tipo: str, anexos: bool = False) -> Amostra:
+    texto = rng.choice(MODELOS[tipo]).format(nome=rng.choice(NOMES), med=rng.choice(MEDICAMENTOS), n=rng.randint(10, 999))
+    if anexos:
+        texto += ANEXOS
+    return Amostra(texto, tipo, anexos)
+
+
+def _corpus(n: int, semente: int):
+    rng = random.Random(semente)
+    pesos = {"IRRELEVANTE": 0.45, "PETICAO_RELEVANTE": 0.3, "PETICAO_PRESTACAO": 0.1, "NOTA_FISCAL": 0.08, "COMPROVANTE": 0.07}
+    tipos = rng.choices(list(pesos), weights=list(pesos.values()), k=n)
+    return [_amostra(rng, t, anexos=(t == "PETICAO_RELEVANTE" and rng.random() < 0.3)) for t in tipos]
+
+
+@pytest.fixture(scope="module")
+def treinado():
+    modelo, limiares, relatorio = pre_classificador.treinar(_corpus(500, semente=1), n_features=2 ** 15, epocas=6)
+    return modelo, limiares, relatorio
+
+
+def test_features_deterministicas():
+    a = pre_classificador.contar_ngramas("PROCURAÇÃO   ad judicia")
+    b = pre_classificador.contar_ngramas("procuracao ad\njudicia")
+    assert np.array_equal(a[0], b[0]) and np.array_equal(a[1], b[1])
+    # 3, 4 e 5-gramas de "procuracao ad judicia" (21 caracteres)
+    assert a[1].sum() == 19 + 18 + 17
+    assert pre_classificador.contar_ngramas("ab")[0].size == 0
+
+
+def test_treino_limiares_e_serializacao(treinado):
+    modelo, limiares, relatorio = treinado
+    assert relatorio["acuracia"] >= 0.95
+    assert relatorio["por_tipo"]["IRRELEVANTE"]["precisao"] >= pre_classificador.PRECISAO_ALVO
+    assert limiares["IRRELEVANTE"] is not None
+    assert "PETICAO_PRESTACAO" not in limiares
+    assert relatorio["cascata"]["prestacoes_dispensadas"] == 0
+    assert relatorio["cascata"]["cobertura"] > 0.3
+
+    copia = ModeloLinear.desserializar(modelo.serializar())
+    texto = _corpus(1, semente=7)[0].texto
+    probs, anexos = copia.prever(texto)
+    assert probs == pytest.approx(modelo.prever(texto)[0])
+    assert anexos == pytest.approx(modelo.prever(texto)[1])
+
+    with pytest.raises(ValueError):
+        pre_classificador.treinar(_corpus(10, semente=2))
+
+
+def test_escolher_limiares():
+    verdadeiros = ["IRRELEVANTE"] * 30 + ["PETICAO_RELEVANTE"] * 2
+    previstos = ["IRRELEVANTE"] * 32
+    confiancas = [0.99] * 30 + [0.6, 0.5]
+    limiares = pre_classificador.escolher_limiares(verdadeiros, previstos, confiancas, precisao_alvo=0.97, min_previsoes=20)
+    assert limiares["IRRELEVANTE"] == 0.99
+    assert limiares["NOTA_FISCAL"] is None
+
+
+def _identificador(treinado, modo):
+    modelo, limiares, _ = treinado
+    identificador = IdentificadorPeticoes(ia_logger=IALogger())
+    identificador.modo_pre_classificador = modo
+    identificador.pre_classificador = PreClassificador(4, modelo, limiares)
+    identificador._identificar_com_llm = AsyncMock(side_effect=lambda texto: ResultadoIdentificacao(
+        tipo_documento=TipoDocumento.PETICAO_PRESTACAO if "PRESTAÇÃO" in texto.upper() else TipoDocumento.IRRELEVANTE,
+        metodo="llm",
+        confianca=0.9,
+    ))
+    return identificador
+
+
+def test_cascata_ativa(treinado):
+    identificador = _identificador(treinado, "ativo")
+    rng = random.Random(3)
+    rotina = [_amostra(rng, "IRRELEVANTE").texto for _ in range(20)]
+    prestacao = _amostra(rng, "PETICAO_PRESTACAO").texto
+    com_anexos = _amostra(rng, "PETICAO_RELEVANTE", anexos=True).texto
+
+    async def cenario():
+        return await asyncio.gather(*(identificador.identificar_async(t) for t in rotina + [prestacao, com_anexos]))
+
+    resultados = asyncio.run(cenario())
+    locais = [r for r in resultados[:20] if r.metodo == "pre_classificador"]
+    assert len(locais) >= 15
+    assert all(r.tipo_documento == TipoDocumento.IRRELEVANTE for r in locais)
+    assert resultados[20].metodo == "llm" and resultados[20].e_prestacao_contas
+    assert resultados[21].metodo == "llm"
+    assert identificador._identificar_com_llm.await_count == 22 - len(locais)
+
+    logs = identificador.ia_logger.logs
+    assert len(logs) == 22 and all(l.etapa == "identificacao_peticao" for l in logs)
+    assert {l.modelo_usado for l in logs if l.resposta_parseada["metodo"] == "pre_classificador"} == {"pre_classificador_v4"}
+
+
+def test_modo_sombra_so_registra(treinado):
+    identificador = _identificador(treinado, "sombra")
+    texto = _amostra(random.Random(5), "IRRELEVANTE").texto
+    resultado = asyncio.run(identificador.identificar_async(texto))
+
+    assert resultado.metodo == "llm"
+    entrada = identificador.ia_logger.logs[0]
+    assert entrada.documento_texto == texto
+    assert entrada.resposta_parseada["tipo"] == "IRRELEVANTE"
+    assert entrada.resposta_parseada["pre_classificador"]["tipo"] == "IRRELEVANTE"
+    assert entrada.resposta_parseada["pre_classificador"]["versao"] == 4
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pre.db'}")
+    LogChamadaIAPrestacao.__table__.create(engine)
+    ModeloPreClassificador.__table__.create(engine)
+    sessao = sessionmaker(bind=engine)()
+    pre_classificador.invalidar_cache()
+    yield sessao
+    sessao.close()
+    pre_classificador.invalidar_cache()
+
+
+def test_historico_versoes_e_sombra(db, treinado):
+    amostras = _corpus(120, semente=9)
+    for i, a in enumerate(amostras):
+        dados = {"metodo": "llm", "tipo": a.tipo, "menciona_anexos": a.menciona_anexos}
+        if i % 2:
+            local = "IRRELEVANTE" if a.tipo == "IRRELEVANTE" else "PETICAO_RELEVANTE"
+            dados["pre_classificador"] = {"versao": 1, "tipo": local, "confianca": 0.99, "dispensa_ia": local == "IRRELEVANTE"}
+        db.add(LogChamadaIAPrestacao(geracao_id=1, etapa="identificacao_peticao", documento_texto=a.texto, resposta_parseada=dados))
+    # Decisão local e erro não viram rótulo; texto repetido fica com o rótulo mais recente
+    db.add(LogChamadaIAPrestacao(geracao_id=1, etapa="identificacao_peticao", documento_texto="x" * 80,
+                                 resposta_parseada={"metodo": "pre_classificador", "tipo": "IRRELEVANTE"}))
+    db.add(LogChamadaIAPrestacao(geracao_id=1, etapa="identificacao_peticao", documento_texto="y" * 80, sucesso=False,
+                                 resposta_parseada={"metodo": "llm", "tipo": "IRRELEVANTE"}))
+    db.add(LogChamadaIAPrestacao(geracao_id=2, etapa="identificacao_peticao", documento_texto=amostras[0].texto,
+                                 resposta_parseada={"metodo": "llm", "tipo": "PETICAO_RELEVANTE"}))
+    db.commit()
+
+    carregadas = pre_classificador.carregar_amostras(db)
+    assert len(carregadas) == len({a.texto for a in amostras})
+    assert next(a for a in carregadas if a.texto == amostras[0].texto).tipo == "PETICAO_RELEVANTE"
+
+    sombra = pre_classificador.avaliar_sombra(db, versao=1)
+    assert sombra["amostras"] == 60
+    assert sombra["por_tipo"]["IRRELEVANTE"]["precisao"] == 1.0
+    assert sombra["cascata"]["prestacoes_dispensadas"] == 0
+
+    modelo, limiares, relatorio = treinado
+    assert pre_classificador.carregar_ativo(db) is None
+    pre_classificador.invalidar_cache()
+    v1 = pre_classificador.salvar_modelo(db, modelo, limiares, relatorio, 500)
+    v2 = pre_classificador.salvar_modelo(db, modelo, limiares, relatorio, 500, ativar=True)
+    assert (v1.versao, v1.ativo, v2.versao, v2.ativo) == (1, False, 2, True)
+
+    ativo = pre_classificador.carregar_ativo(db)
+    assert ativo.versao == 2 and ativo.limiares == limiares
+    assert pre_classificador.carregar_ativo(db) is ativo  # Cache até o próximo intervalo
+
+    assert pre_classificador.ativar_versao(db, 1)
+    assert pre_classificador.carregar_ativo(db).versao == 1
+    assert not pre_classificador.ativar_versao(db, 9)
+    assert pre_classificador.ativar_versao(db, None)
+    assert pre_classificador.carregar_ativo(db) is None
@@ -0,0 +1,233 @@
+# tests/test_schema_resumo_json.py
+# -*- coding: utf-8 -*-
+"""
+Testes da saída estruturada dos resumos JSON (sistemas/gerador_pecas/schema_resumo_json.py).
+
+Testa:
+- Compilação do formato_json (exemplo e tipado) em responseSchema/json_schema
+- Cache por versão da categoria
+- Parser incremental: chunks arbitrários, validação por campo, parada antecipada
+- Corpus de respostas malformadas (parse com reparo e fallback)
+- Agente 1 encerra o stream quando o documento é irrelevante
+"""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from sistemas.gerador_pecas.extrator_resumo_json import FormatoResumo, parsear_resposta_json
+from sistemas.gerador_pecas.schema_resumo_json import (
+    ParserJSONIncremental,
+    json_schema_resumo,
+    parsear_resposta_estruturada,
+    schema_resposta_gemini,
+)
+
+CORPUS = json.loads(
+    (Path(__file__).parent / "fixtures" / "respostas_json_malformadas.json").read_text(encoding="utf-8")
+)["casos"]
+
+FORMATO_EXEMPLO = json.dumps({
+    "tipo_documento": "string - tipo do documento",
+    "urgente": False,
+    "valor_causa": "number ou null",
+    "rito": "comum | juizado | null",
+    "partes": {"autor": "string", "reu": "string"},
+    "pedidos": ["string - pedido"],
+    "anexos": {},
+})
+
+FORMATO_TIPADO = json.dumps({
+    "resultado": {"type": "choice", "options": ["deferido", "indeferido"]},
+    "medicamentos": {"type": "list"},
+    "valor": {"type": "currency"},
+    "data": {"type": "date"},
+})
+
+
+def _formato(formato_json, categoria_id=1, versao="2026-01-01T00:00:00"):
+    return FormatoResumo(
+        categoria_id=categoria_id,
+        categoria_nome="Teste",
+        formato_json=formato_json,
+        instrucoes_extracao=None,
+        is_residual=False,
+        versao=versao,
+    )
+
+
+def test_schema_gemini_do_formato_exemplo():
+    schema = schema_resposta_gemini(_formato(FORMATO_EXEMPLO))
+
+    assert schema["type"] == "OBJECT"
+    assert schema["required"] == ["irrelevante"]
+    assert schema["propertyOrdering"][:2] == ["irrelevante", "motivo"]
+    props = schema["properties"]
+    assert props["tipo_documento"] == {"type": "STRING", "nullable": True}
+    assert props["urgente"]["type"] == "BOOLEAN"
+    assert props["valor_causa"]["type"] == "NUMBER"
+    assert props["rito"]["type"] == "STRING"
+    assert props["partes"]["type"] == "OBJECT"
+    assert props["partes"]["propertyOrdering"] == ["autor", "reu"]
+    assert props["pedidos"] == {"type": "ARRAY", "nullable": True, "items": {"type": "STRING", "nullable": True}}
+    # Objeto vazio não é aceito pelo Gemini
+    assert props["anexos"]["type"] == "STRING"
+
+
+def test_schema_do_formato_tipado():
+    formato = _formato(FORMATO_TIPADO, categoria_id=7)
+
+    props = schema_resposta_gemini(formato)["properties"]
+    assert props["resultado"] == {"type": "STRING", "nullable": True, "format": "enum", "enum": ["deferido", "indeferido"]}
+    assert props["medicamentos"]["type"] == "ARRAY"
+    assert props["valor"]["type"] == "NUMBER"
+    assert props["data"]["type"] == "STRING"
+
+    resultado = json_schema_resumo(formato)["properties"]["resultado"]
+    assert resultado == {"type": ["string", "null"], "enum": ["deferido", "indeferido", None]}
+
+
+def test_cache_por_versao_e_formato_invalido():
+    assert schema_resposta_gemini(_formato(FORMATO_EXEMPLO)) is schema_resposta_gemini(_formato(FORMATO_EXEMPLO))
+    assert schema_resposta_gemini(_formato(FORMATO_EXEMPLO)) is not schema_resposta_gemini(
+        _formato(FORMATO_EXEMPLO, versao="2026-02-01T00:00:00")
+    )
+    assert schema_resposta_gemini(_formato("resuma o documento")) is None
+    assert schema_resposta_gemini(None) is None
+
+
+@pytest.mark.parametrize("tamanho_chunk", [1, 3, 17, 10_000])
+def test_parser_incremental_com_chunks_arbitrarios(tamanho_chunk):
+    esperado = {
+        "irrelevante": False,
+        "motivo": None,
+        "tipo_documento": "Petição \"inicial\" {com chaves}",
+        "valor_causa": -1500.25e2,
+        "partes": {"autor": "Fulano", "reu": "Estado"},
+        "pedidos": ["medicamento", "cirurgia"],
+        "urgente": True,
+    }
+    texto = json.dumps(esperado, ensure_ascii=False, indent=2)
+    parser = ParserJSONIncremental(json_schema_resumo(_formato(FORMATO_EXEMPLO)))
+
+    concluidos = []
+    for i in range(0, len(texto), tamanho_chunk):
+        concluidos.extend(parser.feed(texto[i:i + tamanho_chunk]))
+
+    assert parser.finalizar() == (esperado, None)
+    assert concluidos == list(esperado)
+    assert parser.avisos == []
+
+
+def test_parser_valida_campos_conforme_chegam():
+    parser = ParserJSONIncremental(json_schema_resumo(_formato(FORMATO_TIPADO)))
+
+    assert parser.feed('{"irrelevante": false, "resultado": "parcial", ') == ["irrelevante", "resultado"]
+    assert parser.avisos == ["resultado: valor fora das opções: 'parcial'"]
+    parser.feed('"valor": "mil reais"}')
+
+    json_dict, erro = parser.finalizar()
+    assert erro is None
+    assert json_dict["valor"] == "mil reais"
+    assert parser.avisos[-1] == "valor: esperado number/null, recebido str"
+
+
+def test_parser_sinaliza_irrelevante_antes_do_fim():
+    parser = ParserJSONIncremental()
+
+    parser.feed('{"irrelevante": true, "mot')
+    assert parser.irrelevante and not parser.pode_encerrar
+    parser.feed('ivo": "procuração", "tipo_documento": "Proc')
+
+    assert parser.pode_encerrar
+    assert parser.finalizar() == ({"irrelevante": True, "motivo": "procuração"}, None)
+
+
+@pytest.mark.parametrize("caso", CORPUS, ids=[c["id"] for c in CORPUS])
+def test_corpus_respostas_malformadas(caso):
+    resultado, erro = parsear_resposta_json(caso["resposta"])
+    estruturado, erro_estruturado = parsear_resposta_estruturada(caso["resposta"])
+
+    if caso["esperado"] is None:
+        assert erro and erro_estruturado
+        return
+    assert (resultado, erro) == (caso["esperado"], None)
+    assert (estruturado, erro_estruturado) == (caso["esperado"], None)
+
+    # O parser incremental resolve sozinho apenas JSON bem-formado; o resto cai no reparo
+    parser = ParserJSONIncremental()
+    for caractere in caso["resposta"]:
+        parser.feed(caractere)
+    _, erro_incremental = parser.finalizar()
+    assert (erro_incremental is None) == caso["incremental"]
+
+
+# ============================================
+# INTEGRAÇÃO COM O AGENTE 1
+# ============================================
+
+def test_agente_encerra_stream_de_documento_irrelevante(monkeypatch):
+    from sistemas.gerador_pecas import agente_tjms
+    from sistemas.gerador_pecas.agente_tjms import AgenteTJMS, DocumentoTJMS
+
+    formato = _formato(FORMATO_EXEMPLO)
+    chamadas = {}
+    consumidos = []
+    chunks = ['{"irrelevante": ', 'true, "motivo": "AR de citação"', ', "tipo_documento": "AR"', "}"] + ["x"] * 50
+
+    async def fake_stream(**kwargs):
+        chamadas.update(kwargs)
+        for chunk in chunks:
+            consumidos.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(agente_tjms.gemini_service, "generate_stream", fake_stream)
+
+    agente = AgenteTJMS()
+    monkeypatch.setattr(
+        agente, "_obter_schemas_resumo",
+        lambda doc: (schema_resposta_gemini(formato), json_schema_resumo(formato))
+    )
+    doc = DocumentoTJMS(id="1")
+
+    resposta, json_dict = asyncio.run(agente._gerar_resumo_llm(None, doc, "prompt", usar_json=True))
+
+    assert json_dict == {"irrelevante": True, "motivo": "AR de citação"}
+    assert len(consumidos) == 2
+    assert chamadas["response_schema"]["propertyOrdering"][0] == "irrelevante"
+
+    assert agente._processar_resposta_resumo(doc, resposta, usar_json=True, json_dict=json_dict)
+    assert doc.irrelevante and doc.resumo == "AR de citação"
+
+
+def test_stream_interrompido_nao_vira_resumo(monkeypatch):
+    from sistemas.gerador_pecas import agente_tjms
+    from sistemas.gerador_pecas.agente_tjms import AgenteTJMS, DocumentoTJMS
+
+    formato = _formato(FORMATO_EXEMPLO)
+
+    async def fake_stream(**kwargs):
+        # generate_stream apenas encerra quando a conexão cai no meio da resposta
+        yield '{"irrelevante": false, "tipo_documento": "Petição", "resumo": "Autor pede'
+
+    monkeypatch.setattr(agente_tjms.gemini_service, "generate_stream", fake_stream)
+    agente = AgenteTJMS()
+    monkeypatch.setattr(
+        agente, "_obter_schemas_resumo",
+        lambda doc: (schema_resposta_gemini(formato), json_schema_resumo(formato))
+    )
+
+    with pytest.raises(ValueError, match="truncada"):
+        asyncio.run(agente._gerar_resumo_llm(None, DocumentoTJMS(id="1"), "prompt", usar_json=True))
+
+
+def test_payload_gemini_com_response_schema():
+    from services.gemini_service import GeminiService
+
+    schema = schema_resposta_gemini(_formato(FORMATO_EXEMPLO))
+    payload = GeminiService(api_key="teste")._build_payload("prompt", response_schema=schema)
+
+    assert payload["generationConfig"]["responseMimeType"] == "application/json"
+    assert payload["generationConfig"]["responseSchema"] is schema
@@ -0,0 +1,168 @@
+# tests/test_static_assets.py
+# -*- coding: utf-8 -*-
+"""
+Testes do pipeline de assets estáticos (utils/static_assets.py).
+
+Testa:
+- Build gera cópia com hash, variante .gz e manifesto
+- Arquivo com hash: Cache-Control imutável
+- Encoding negociado pelo Accept-Encoding (gzip / identidade)
+- Arquivo sem hash: no-cache com ETag e 304
+- Reescrita de src/href no HTML dos sistemas e asset_url
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+
+from utils.static_assets import (
+    CACHE_IMUTAVEL,
+    CACHE_IMUTAVEL_PRIVADO,
+    AssetStaticFiles,
+    ManifestoAssets,
+    construir_assets,
+    resposta_asset,
+    tem_hash,
+)
+
+CONTEUDO_JS = b"console.log('portal pge');\n" * 200
+
+
+@pytest.fixture
+def projeto(tmp_path):
+    static_js = tmp_path / "frontend" / "static" / "js"
+    static_js.mkdir(parents=True)
+    (static_js / "security.js").write_bytes(CONTEUDO_JS)
+
+    sistema = tmp_path / "sistemas" / "gerador_pecas" / "templates"
+    sistema.mkdir(parents=True)
+    (sistema / "app.js").write_bytes(b"var app = 1;\n")
+    (sistema / "index.html").write_text(
+        '<script src="/static/js/security.js"></script>\n'
+        '<script src="app.js"></script>\n'
+        '<script src="https://cdn.example.com/lib.js"></script>\n',
+        encoding="utf-8",
+    )
+
+    mapeamento = construir_assets(raiz=tmp_path)
+    return tmp_path, mapeamento
+
+
+@pytest.fixture
+def client(projeto):
+    raiz, _ = projeto
+    app = FastAPI()
+    app.mount("/static", AssetStaticFiles(directory=str(raiz / "frontend" / "static")), name="static")
+    return TestClient(app)
+
+
+def _url_hash(projeto) -> str:
+    _, mapeamento = projeto
+    return "/static/" + mapeamento["frontend/static/js/security.js"][len("frontend/static/"):]
+
+
+def test_build_gera_hash_variantes_e_manifesto(projeto):
+    raiz, mapeamento = projeto
+    destino = raiz / mapeamento["frontend/static/js/security.js"]
+
+    assert tem_hash(destino.name)
+    assert destino.read_bytes() == CONTEUDO_JS
+    assert gzip.decompress(destino.with_name(destino.name + ".gz").read_bytes()) == CONTEUDO_JS
+
+    manifesto = json.loads((raiz / "frontend" / "static" / "asset-manifest.json").read_text())
+    assert manifesto["arquivos"] == mapeamento
+    assert "sistemas/gerador_pecas/templates/app.js" in mapeamento
+
+
+def test_rebuild_remove_versao_antiga(projeto):
+    raiz, mapeamento = projeto
+    antigo = raiz / mapeamento["sistemas/gerador_pecas/templates/app.js"]
+    (raiz / "sistemas" / "gerador_pecas" / "templates" / "app.js").write_bytes(b"var app = 2;\n")
+
+    novo = construir_assets(raiz=raiz)["sistemas/gerador_pecas/templates/app.js"]
+
+    assert not antigo.exists()
+    assert not antigo.with_name(antigo.name + ".gz").exists()
+    assert (raiz / novo).exists()
+
+
+def test_arquivo_com_hash_tem_cache_imutavel_e_gzip(client, projeto):
+    resposta = client.get(_url_hash(projeto), headers={"Accept-Encoding": "gzip"})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["cache-control"] == CACHE_IMUTAVEL
+    assert resposta.headers["content-encoding"] == "gzip"
+    assert resposta.headers["vary"] == "Accept-Encoding"
+    assert "javascript" in resposta.headers["content-type"]
+    assert resposta.content == CONTEUDO_JS
+
+
+def test_sem_accept_encoding_serve_identidade(client, projeto):
+    resposta = client.get(_url_hash(projeto), headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in resposta.headers
+    assert resposta.content == CONTEUDO_JS
+
+
+def test_encoding_recusado_com_q_zero(client, projeto):
+    resposta = client.get(_url_hash(projeto), headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+    assert "content-encoding" not in resposta.headers
+
+
+def test_arquivo_sem_hash_revalida_com_etag(client):
+    resposta = client.get("/static/js/security.js", headers={"Accept-Encoding": "identity"})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["cache-control"] == "no-cache"
+    etag = resposta.headers["etag"]
+
+    revalidacao = client.get("/static/js/security.js", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert revalidacao.status_code == 304
+    assert revalidacao.headers["etag"] == etag
+    assert revalidacao.content == b""
+
+
+def test_reescrita_html_e_asset_url(projeto):
+    raiz, mapeamento = projeto
+    manifesto = ManifestoAssets(raiz / "frontend" / "static" / "asset-manifest.json", raiz=raiz)
+    sistema = raiz / "sistemas" / "gerador_pecas" / "templates"
+
+    html = manifesto.reescrever_html((sistema / "index.html").read_text(encoding="utf-8"), sistema)
+
+    app_hash = mapeamento["sistemas/gerador_pecas/templates/app.js"].rsplit("/", 1)[1]
+    assert f'src="{app_hash}"' in html
+    assert f'src="{_url_hash(projeto)}"' in html
+    assert 'src="https://cdn.example.com/lib.js"' in html
+
+    assert manifesto.url("/static/js/security.js") == _url_hash(projeto)
+    assert manifesto.url("/static/js/inexistente.js") == "/static/js/inexistente.js"
+
+
+def test_sem_manifesto_mantem_urls(tmp_path):
+    manifesto = ManifestoAssets(tmp_path / "nao-existe.json", raiz=tmp_path)
+
+    assert manifesto.url("/static/js/security.js") == "/static/js/security.js"
+
+
+def test_resposta_asset_sem_stat_responde_304(projeto):
+    raiz, _ = projeto
+    arquivo = raiz / "sistemas" / "gerador_pecas" / "templates" / "app.js"
+
+    etag = resposta_asset(arquivo, Headers()).headers["etag"]
+    revalidacao = resposta_asset(arquivo, Headers({"if-none-match": etag}), media_type="application/javascript")
+
+    assert revalidacao.status_code == 304
+
+
+def test_rota_autenticada_usa_cache_privado(projeto):
+    raiz, mapeamento = projeto
+    arquivo = raiz / mapeamento["sistemas/gerador_pecas/templates/app.js"]
+
+    # Sem publico=True (safe_serve_static): proxies compartilhados não guardam
+    assert resposta_asset(arquivo, Headers()).headers["cache-control"] == CACHE_IMUTAVEL_PRIVADO
+    assert resposta_asset(arquivo, Headers(), publico=True).headers["cache-control"] == CACHE_IMUTAVEL
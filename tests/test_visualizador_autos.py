@@ -0,0 +1,204 @@
+# tests/test_visualizador_autos.py
+"""
+Testes do serviço do visualizador de autos
+(sistemas/gerador_pecas/services_visualizador_autos.py).
+
+Verifica:
+- Abrir o mesmo documento duas vezes custa um único download no TJ-MS
+- Downloads simultâneos da mesma chave são compartilhados
+- Mesmos ids em outra ordem geram outro PDF (ordem do merge)
+- Arquivo removido entre o cache e a resposta é remontado
+- Listagem em cache com TTL
+- Respostas 206/416 para Range e 304 por ETag
+"""
+
+import asyncio
+import base64
+import os
+
+import fitz
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from sistemas.gerador_pecas import services_visualizador_autos as visualizador
+from sistemas.gerador_pecas.services_visualizador_autos import (
+    CachePDFsAutos,
+    FaixaInvalida,
+    interpretar_range,
+    resposta_pdf,
+)
+
+
+def _pdf(paginas, texto):
+    doc = fitz.open()
+    for i in range(paginas):
+        doc.new_page().insert_text((72, 72), f"{texto} pagina {i}")
+    dados = doc.tobytes()
+    doc.close()
+    return dados
+
+
+def _xml_download(pdfs):
+    documentos = "".join(
+        f'<ns2:documento idDocumento="{doc_id}"><ns2:conteudo>{base64.b64encode(dados).decode()}</ns2:conteudo></ns2:documento>'
+        for doc_id, dados in pdfs.items()
+    )
+    return f'<soap:Envelope xmlns:soap="s" xmlns:ns2="n"><soap:Body>{documentos}</soap:Body></soap:Envelope>'
+
+
+@pytest.fixture
+def tjms():
+    """Fake do download SOAP: conta as chamadas e simula latência."""
+    pdfs = {"101": _pdf(2, "peticao"), "102": _pdf(3, "anexo"), "103": _pdf(1, "decisao")}
+    chamadas = []
+
+    async def baixar(cnj, lista_ids):
+        chamadas.append((cnj, lista_ids))
+        await asyncio.sleep(0.01)
+        return _xml_download({doc_id: pdfs[doc_id] for doc_id in lista_ids if doc_id in pdfs})
+
+    return baixar, chamadas
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CachePDFsAutos(diretorio=str(tmp_path / "autos"))
+
+
+def test_reabrir_documento_custa_um_download(cache, tjms):
+    baixar, chamadas = tjms
+
+    async def cenario():
+        primeiro = await cache.obter("0001", ["102", "101"], baixar=baixar)
+        segundo = await cache.obter("0001", ["102", "101", "102"], baixar=baixar)
+        # Mesmos ids em outra ordem: o merge muda, então é outra chave
+        invertido = await cache.obter("0001", ["101", "102"], baixar=baixar)
+        # Visualizações simultâneas de outro documento compartilham o download
+        simultaneos = await asyncio.gather(*(cache.obter("0001", ["103"], baixar=baixar) for _ in range(3)))
+        ausente = await cache.obter("0001", ["999"], baixar=baixar)
+        return primeiro, segundo, invertido, simultaneos, ausente
+
+    primeiro, segundo, invertido, simultaneos, ausente = asyncio.run(cenario())
+
+    assert len(chamadas) == 4
+    assert segundo == primeiro
+    assert invertido.etag != primeiro.etag
+    assert len({pdf.etag for pdf in simultaneos}) == 1
+    assert ausente is None
+    # Merge na ordem pedida: anexo (3 páginas) antes da petição (2)
+    with fitz.open(primeiro.caminho) as doc:
+        assert doc.page_count == 5
+        assert "anexo pagina 0" in doc[0].get_text()
+    with fitz.open(invertido.caminho) as doc:
+        assert "peticao pagina 0" in doc[0].get_text()
+
+
+def test_arquivo_removido_antes_da_resposta_e_remontado(cache, tjms, monkeypatch):
+    baixar, chamadas = tjms
+    asyncio.run(cache.obter("0001", ["101"], baixar=baixar))
+
+    # O arquivo some depois da checagem de existência (get) e antes do open
+    get_original = cache.get
+
+    def get_e_despejar(chave):
+        pdf = get_original(chave)
+        if pdf is not None and len(chamadas) == 1:
+            os.remove(pdf.caminho)
+        return pdf
+
+    monkeypatch.setattr(cache, "get", get_e_despejar)
+    resposta = asyncio.run(cache.responder("0001", ["101"], {}, "doc_101.pdf", baixar=baixar))
+
+    assert resposta.status_code == 200
+    assert len(chamadas) == 2
+    assert os.path.exists(cache.get(cache.chave("0001", ["101"])).caminho)
+
+
+def test_cache_limitado_por_bytes_apaga_arquivos(tmp_path):
+    cache = CachePDFsAutos(diretorio=str(tmp_path), max_bytes=25)
+
+    a = cache.guardar(cache.chave("1", ["a"]), b"x" * 10)
+    cache.guardar(cache.chave("1", ["b"]), b"y" * 10)
+    cache.get(cache.chave("1", ["a"]))
+    cache.guardar(cache.chave("1", ["c"]), b"z" * 10)
+
+    assert cache.get(cache.chave("1", ["b"])) is None
+    assert cache.get(cache.chave("1", ["a"])) == a
+    assert cache.stats()["bytes"] == 20
+    assert sorted(p.stat().st_size for p in tmp_path.iterdir()) == [10, 10]
+
+
+def test_listagem_em_cache_com_ttl(monkeypatch):
+    consultas = []
+
+    async def consultar(session, cnj):
+        consultas.append(cnj)
+        return '<r><documento idDocumento="1" tipoDocumento="8" descricao="Inicial"/></r>'
+
+    monkeypatch.setattr(visualizador, "consultar_processo_async", consultar)
+    visualizador._listagens.invalidate_all()
+
+    async def cenario():
+        primeira = await visualizador.listar_documentos_tjms("0002")
+        segunda = await visualizador.listar_documentos_tjms("0002")
+        visualizador.invalidar_listagem("0002")
+        await visualizador.listar_documentos_tjms("0002")
+        return primeira, segunda
+
+    primeira, segunda = asyncio.run(cenario())
+    visualizador._listagens.invalidate_all()
+
+    assert consultas == ["0002", "0002"]
+    assert [d.id for d in primeira] == ["1"]
+    assert segunda is primeira
+
+
+def test_interpretar_range():
+    assert interpretar_range(None, 100) is None
+    assert interpretar_range("bytes=0-9", 100) == (0, 9)
+    assert interpretar_range("bytes=90-", 100) == (90, 99)
+    assert interpretar_range("bytes=-10", 100) == (90, 99)
+    assert interpretar_range("bytes=50-500", 100) == (50, 99)
+    # Sintaxe inválida ou múltiplos intervalos: arquivo inteiro
+    assert interpretar_range("bytes=0-1,5-9", 100) is None
+    assert interpretar_range("items=0-9", 100) is None
+    assert interpretar_range("bytes=9-0", 100) is None
+    with pytest.raises(FaixaInvalida):
+        interpretar_range("bytes=100-", 100)
+
+
+def test_resposta_com_range_etag_e_304(cache):
+    dados = _pdf(4, "sentenca")
+    pdf = cache.guardar(cache.chave("0003", ["1"]), dados)
+
+    app = FastAPI()
+
+    @app.get("/pdf")
+    async def servir(request: Request):
+        return resposta_pdf(pdf, request.headers, "doc_1.pdf")
+
+    client = TestClient(app)
+
+    inteiro = client.get("/pdf")
+    assert inteiro.status_code == 200
+    assert inteiro.content == dados
+    assert inteiro.headers["accept-ranges"] == "bytes"
+    assert inteiro.headers["etag"] == pdf.etag
+
+    parcial = client.get("/pdf", headers={"Range": "bytes=100-199"})
+    assert parcial.status_code == 206
+    assert parcial.content == dados[100:200]
+    assert parcial.headers["content-range"] == f"bytes 100-199/{len(dados)}"
+
+    final = client.get("/pdf", headers={"Range": "bytes=-50"})
+    assert final.content == dados[-50:]
+
+    invalido = client.get("/pdf", headers={"Range": f"bytes={len(dados)}-"})
+    assert invalido.status_code == 416
+    assert invalido.headers["content-range"] == f"bytes */{len(dados)}"
+
+    assert client.get("/pdf", headers={"If-None-Match": pdf.etag}).status_code == 304
+    # If-Range com ETag antigo: ignora o Range e envia o arquivo inteiro
+    antigo = client.get("/pdf", headers={"Range": "bytes=0-9", "If-Range": '"antigo"'})
+    assert antigo.status_code == 200 and antigo.content == dados
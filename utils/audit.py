@@ -20,8 +20,10 @@ Eventos registrados:
 
 import logging
 import json
+from datetime import datetime
+from utils.audit_log import AuditFileHandler, ler_eventos_recentes
 from utils.timezone import get_utc_now
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Union
 from enum import Enum
 from fastapi import Request
 from sqlalchemy.orm import Session
@@ -41,8 +43,13 @@ LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
 # File handler para auditoria
-audit_handler = logging.FileHandler(
+# PERFORMANCE: mantém audit.log.idx (offsets por data/tipo de evento) para a
+# leitura reversa de get_recent_security_events. Rotação opcional com gzip:
+# AUDIT_LOG_MAX_BYTES=0 (padrão) não rotaciona.
+audit_handler = AuditFileHandler(
     os.path.join(LOG_DIR, "audit.log"),
+    max_bytes=int(os.getenv("AUDIT_LOG_MAX_BYTES", "0")),
+    backup_count=int(os.getenv("AUDIT_LOG_BACKUP_COUNT", "10")),
     encoding="utf-8"
 )
 audit_handler.setLevel(logging.INFO)
@@ -478,46 +485,39 @@ def get_audit_log_path() -> str:
     return os.path.join(LOG_DIR, "audit.log")
 
 
-def get_recent_security_events(limit: int = 100) -> list:
+def get_recent_security_events(
+    limit: int = 100,
+    event_types: Optional[Iterable[str]] = None,
+    since: Optional[Union[datetime, str]] = None,
+    until: Optional[Union[datetime, str]] = None
+) -> list:
     """
     Retorna eventos de segurança recentes do log.
 
     NOTA: Esta função lê o arquivo de log diretamente.
     Em produção, use um sistema centralizado de logs.
 
+    PERFORMANCE: leitura reversa em blocos a partir do fim do arquivo, com
+    o índice audit.log.idx para pular regiões fora do período/tipo
+    (utils/audit_log.py). Inclui os arquivos rotacionados (.1, .2.gz, ...).
+
     Args:
         limit: Número máximo de eventos a retornar
+        event_types: Filtra pelos tipos de evento (ex: {"AUTH_LOGIN_FAILURE"})
+        since: Só eventos a partir deste instante (hora local do log)
+        until: Só eventos até este instante (hora local do log)
 
     Returns:
         Lista de eventos (mais recentes primeiro)
     """
-    events = []
-    log_path = get_audit_log_path()
-
-    if not os.path.exists(log_path):
-        return events
-
     try:
-        with open(log_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        # Processa linhas do final para o início
-        for line in reversed(lines[-limit * 2:]):  # Lê 2x para garantir
-            if len(events) >= limit:
-                break
-
-            try:
-                # Formato: timestamp | level | json
-                parts = line.strip().split(" | ", 2)
-                if len(parts) >= 3:
-                    event_data = json.loads(parts[2])
-                    event_data["_log_timestamp"] = parts[0]
-                    event_data["_log_level"] = parts[1]
-                    events.append(event_data)
-            except (json.JSONDecodeError, IndexError):
-                continue
-
+        return ler_eventos_recentes(
+            get_audit_log_path(),
+            limit=limit,
+            desde=since,
+            ate=until,
+            tipos=event_types
+        )
     except Exception as e:
         audit_logger.error(f"Erro ao ler audit log: {e}")
-
-    return events
+        return []
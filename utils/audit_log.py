@@ -0,0 +1,524 @@
+# utils/audit_log.py
+"""
+Arquivo de audit log: escrita com índice de offsets e leitura reversa.
+
+PERFORMANCE: get_recent_security_events chamava f.readlines() no arquivo
+inteiro para devolver os últimos `limit` eventos; entre rotações o log chega
+a centenas de MB e cada consulta das páginas de segurança lia tudo para a
+memória. Aqui:
+
+- Leitura reversa em blocos de 64 KB a partir do fim do arquivo; o JSON só é
+  parseado para linhas que passam nos filtros baratos (prefixo de data e
+  substring do tipo de evento)
+- Índice auxiliar opcional (audit.log.idx, JSON lines) mantido na escrita:
+  cada entrada cobre uma região contígua do log com offsets, primeiro/último
+  timestamp e a contagem de cada tipo de evento. Consultas por intervalo de tempo
+  pulam direto para a região certa e filtros por tipo ignoram regiões sem
+  aquele evento. Regiões sem índice (log anterior ao índice, escrita de outro
+  processo) são lidas normalmente, então o índice nunca muda o resultado.
+  Cabeçalho e reconstrução são gravados em arquivo temporário + os.replace,
+  então processos reconstruindo ao mesmo tempo não embaralham o índice
+- Arquivos rotacionados (audit.log.1, audit.log.2.gz, ...) são lidos em
+  sequência, do mais recente ao mais antigo; os .gz são lidos em streaming
+  guardando só os `limit` últimos candidatos
+
+Uso:
+    handler = AuditFileHandler(caminho, max_bytes=100 * 1024 * 1024, backup_count=10)
+    eventos = ler_eventos_recentes(caminho, limit=50, tipos={"AUTH_LOGIN_FAILURE"})
+
+Autor: LAB/PGE-MS
+"""
+
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO = 64 * 1024
+
+# Uma entrada de índice a cada ~256 KB de log (~4 mil entradas por GB)
+INTERVALO_INDICE = 256 * 1024
+SUFIXO_INDICE = ".idx"
+VERSAO_INDICE = 2  # v2: contagem por tipo de evento
+
+# Formato do audit_handler: "%Y-%m-%d %H:%M:%S | LEVEL | {json}"
+FORMATO_DATA = "%Y-%m-%d %H:%M:%S"
+TAMANHO_DATA = 19
+SEPARADOR = " | "
+
+_RE_EVENTO = re.compile(r'"event": "([A-Za-z0-9_]+)"')
+
+Instante = Union[str, datetime, None]
+
+
+def _formatar_instante(valor: Instante) -> Optional[str]:
+    """datetime/str -> prefixo comparável com o timestamp das linhas (hora local)."""
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        if valor.tzinfo is not None:
+            valor = valor.astimezone().replace(tzinfo=None)
+        return valor.strftime(FORMATO_DATA)
+    return str(valor)[:TAMANHO_DATA]
+
+
+def caminho_indice(caminho_log: str) -> str:
+    return caminho_log + SUFIXO_INDICE
+
+
+def _temporario(caminho: str) -> str:
+    return f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+# =========================
+# Índice
+# =========================
+
+@dataclass
+class EntradaIndice:
+    """Região [inicio, fim) do log escrita por um único processo."""
+    inicio: int
+    fim: int
+    primeiro: str
+    ultimo: str
+    eventos: Dict[str, int] = field(default_factory=dict)  # tipo -> linhas na região
+
+    def para_json(self) -> str:
+        return json.dumps({
+            "o": self.inicio, "f": self.fim, "t": self.primeiro, "u": self.ultimo, "e": dict(sorted(self.eventos.items()))
+        })
+
+    @classmethod
+    def de_json(cls, linha: str) -> "EntradaIndice":
+        dados = json.loads(linha)
+        return cls(dados["o"], dados["f"], dados["t"], dados["u"], dict(dados["e"]))
+
+
+class IndexadorAuditLog:
+    """
+    Acumula as linhas escritas em blocos e grava uma entrada por bloco.
+
+    Um bloco só cobre escrita contígua deste processo: se o arquivo cresceu
+    por fora (outro worker), o bloco atual é fechado e a região alheia fica
+    sem índice (lida por varredura).
+    """
+
+    def __init__(self, caminho_log: str, intervalo: int = INTERVALO_INDICE, caminho: Optional[str] = None):
+        self.caminho_log = caminho_log
+        self.caminho = caminho or caminho_indice(caminho_log)
+        self.intervalo = intervalo
+        self._bloco: Optional[EntradaIndice] = None
+        self.preparar()
+
+    def preparar(self) -> None:
+        """Mantém o índice existente se pertence ao log atual; senão recria o cabeçalho."""
+        identidade = _identidade(self.caminho_log)
+        if identidade is not None and _ler_cabecalho(self.caminho) == identidade:
+            return
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        self._bloco = None
+        identidade = _identidade(self.caminho_log)
+        # Troca atômica: outro processo nunca vê o índice truncado pela metade
+        temporario = _temporario(self.caminho)
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"versao": VERSAO_INDICE, "inode": identidade}) + "\n")
+        os.replace(temporario, self.caminho)
+
+    def registrar(self, inicio: int, fim: int, timestamp: Optional[str], evento: Optional[str]) -> None:
+        """Registra uma linha escrita em [inicio, fim)."""
+        if not timestamp:
+            return
+        bloco = self._bloco
+        if bloco is not None and bloco.fim != inicio:
+            self.fechar_bloco()
+            bloco = None
+        if bloco is None:
+            bloco = self._bloco = EntradaIndice(inicio, fim, timestamp, timestamp)
+        bloco.fim = fim
+        bloco.ultimo = timestamp
+        if evento:
+            bloco.eventos[evento] = bloco.eventos.get(evento, 0) + 1
+        if bloco.fim - bloco.inicio >= self.intervalo:
+            self.fechar_bloco()
+
+    def fechar_bloco(self) -> None:
+        bloco, self._bloco = self._bloco, None
+        if bloco is None or bloco.fim <= bloco.inicio:
+            return
+        # Uma linha por write em modo append: atômico entre processos
+        with open(self.caminho, "a", encoding="utf-8") as f:
+            f.write(bloco.para_json() + "\n")
+
+
+def _identidade(caminho_log: str) -> Optional[int]:
+    try:
+        return os.stat(caminho_log).st_ino
+    except OSError:
+        return None
+
+
+def _ler_cabecalho(caminho: str) -> Optional[int]:
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            cabecalho = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    if cabecalho.get("versao") != VERSAO_INDICE:
+        return None
+    return cabecalho.get("inode")
+
+
+def carregar_indice(caminho_log: str) -> Optional[List[EntradaIndice]]:
+    """
+    Entradas válidas do índice, ordenadas e sem sobreposição.
+
+    Returns:
+        None quando não há índice ou ele não corresponde ao log atual
+        (arquivo substituído ou truncado)
+    """
+    caminho = caminho_indice(caminho_log)
+    try:
+        tamanho = os.path.getsize(caminho_log)
+    except OSError:
+        return None
+    if _ler_cabecalho(caminho) != _identidade(caminho_log):
+        return None
+
+    entradas = []
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            f.readline()
+            for linha in f:
+                try:
+                    entradas.append(EntradaIndice.de_json(linha))
+                except (ValueError, KeyError):
+                    continue  # Linha parcial (escrita em andamento)
+    except OSError:
+        return None
+
+    entradas.sort(key=lambda e: e.inicio)
+    validas = []
+    for entrada in entradas:
+        if entrada.fim > tamanho:
+            return None  # Log truncado: o índice não vale mais
+        if validas and entrada.inicio < validas[-1].fim:
+            continue
+        validas.append(entrada)
+    return validas
+
+
+def reconstruir_indice(caminho_log: str, intervalo: int = INTERVALO_INDICE) -> int:
+    """
+    Gera o índice de um log existente (leitura sequencial). Retorna o número de entradas.
+
+    O índice é montado num arquivo temporário e só então substitui o atual
+    (os.replace): reconstruções simultâneas não intercalam entradas.
+    """
+    temporario = _temporario(caminho_indice(caminho_log))
+    try:
+        indexador = IndexadorAuditLog(caminho_log, intervalo, caminho=temporario)
+        indexador.reiniciar()
+        with open(caminho_log, "rb") as f:
+            inicio = 0
+            for linha in f:
+                fim = inicio + len(linha)
+                indexador.registrar(inicio, fim, *_metadados_linha(linha))
+                inicio = fim
+        indexador.fechar_bloco()
+        os.replace(temporario, caminho_indice(caminho_log))
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return len(carregar_indice(caminho_log) or [])
+
+
+def _timestamp_linha(linha: bytes) -> Optional[str]:
+    texto = linha[:TAMANHO_DATA].decode("ascii", "ignore")
+    if len(texto) != TAMANHO_DATA or texto[4] != "-":
+        return None
+    return texto
+
+
+def _metadados_linha(linha: bytes):
+    """(timestamp, evento) de uma linha do log, sem parsear o JSON."""
+    texto = _timestamp_linha(linha)
+    if texto is None:
+        return None, None
+    evento = _RE_EVENTO.search(linha.decode("utf-8", "ignore"))
+    return texto, evento.group(1) if evento else None
+
+
+# =========================
+# Handler de escrita
+# =========================
+
+def _nome_gz(nome: str) -> str:
+    return nome + ".gz"
+
+
+def _rotacionar_gz(origem: str, destino: str) -> None:
+    with open(origem, "rb") as entrada, gzip.open(destino, "wb") as saida:
+        shutil.copyfileobj(entrada, saida)
+    os.remove(origem)
+
+
+class AuditFileHandler(RotatingFileHandler):
+    """
+    FileHandler do audit log que mantém o índice de offsets.
+
+    Com max_bytes > 0 rotaciona (audit.log.1, .2, ...), comprimindo os
+    arquivos antigos em gzip; com max_bytes=0 (padrão) nunca rotaciona.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+        comprimir: bool = True,
+        intervalo_indice: int = INTERVALO_INDICE,
+        encoding: str = "utf-8"
+    ):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        if comprimir:
+            self.namer = _nome_gz
+            self.rotator = _rotacionar_gz
+        self.indexador = IndexadorAuditLog(self.baseFilename, intervalo_indice)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            inicio = os.fstat(self.stream.fileno()).st_size
+            logging.FileHandler.emit(self, record)
+            fim = os.fstat(self.stream.fileno()).st_size
+            evento = _RE_EVENTO.search(record.getMessage())
+            self.indexador.registrar(
+                inicio, fim, getattr(record, "asctime", None), evento.group(1) if evento else None
+            )
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self) -> None:
+        self.indexador.fechar_bloco()
+        super().doRollover()
+        if self.stream is None:
+            self.stream = self._open()
+        self.indexador.reiniciar()
+
+    def close(self) -> None:
+        try:
+            self.indexador.fechar_bloco()
+        except OSError:
+            pass
+        super().close()
+
+
+# =========================
+# Leitura reversa
+# =========================
+
+def ler_linhas_reverso(arquivo, inicio: int, fim: int, tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[bytes]:
+    """Linhas de [inicio, fim) do fim para o começo, lendo blocos de tamanho_bloco."""
+    posicao = fim
+    resto = b""
+    while posicao > inicio:
+        leitura = min(tamanho_bloco, posicao - inicio)
+        posicao -= leitura
+        arquivo.seek(posicao)
+        bloco = arquivo.read(leitura) + resto
+        linhas = bloco.split(b"\n")
+        resto = linhas[0]
+        for linha in reversed(linhas[1:]):
+            if linha:
+                yield linha
+    if resto:
+        yield resto
+
+
+@dataclass
+class _Filtro:
+    desde: Optional[str]
+    ate: Optional[str]
+    tipos: Optional[Set[str]]
+    marcadores: List[bytes]
+    antigo_demais: bool = False
+
+    def aceita(self, linha: bytes) -> bool:
+        """Filtros baratos (prefixo de data, substring do tipo); marca quando passou de `desde`."""
+        timestamp = _timestamp_linha(linha)
+        if timestamp is None:
+            return False
+        if self.desde and timestamp < self.desde:
+            self.antigo_demais = True
+            return False
+        if self.ate and timestamp > self.ate:
+            return False
+        if self.marcadores and not any(m in linha for m in self.marcadores):
+            return False
+        return True
+
+
+def _parsear(linha: bytes, filtro: _Filtro) -> Optional[dict]:
+    try:
+        partes = linha.decode("utf-8").strip().split(SEPARADOR, 2)
+        if len(partes) < 3:
+            return None
+        evento = json.loads(partes[2])
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if not isinstance(evento, dict):
+        return None
+    if filtro.tipos and evento.get("event") not in filtro.tipos:
+        return None
+    evento["_log_timestamp"] = partes[0]
+    evento["_log_level"] = partes[1]
+    return evento
+
+
+def _regioes_reverso(entradas: List[EntradaIndice], tamanho: int) -> Iterator[Optional[EntradaIndice]]:
+    """Regiões do log em ordem reversa; trechos sem índice vêm como EntradaIndice sem timestamps."""
+    posicao = tamanho
+    for entrada in reversed(entradas):
+        if entrada.fim < posicao:
+            yield EntradaIndice(entrada.fim, posicao, "", "")
+        yield entrada
+        posicao = entrada.inicio
+    if posicao > 0:
+        yield EntradaIndice(0, posicao, "", "")
+
+
+def _eventos_arquivo(caminho: str, filtro: _Filtro, tamanho_bloco: int, usar_indice: bool) -> Iterator[dict]:
+    with open(caminho, "rb") as arquivo:
+        tamanho = os.fstat(arquivo.fileno()).st_size
+        # Sem filtro o índice não pula nada: lê direto do fim
+        filtrando = filtro.desde or filtro.ate or filtro.tipos
+        entradas = carregar_indice(caminho) if (usar_indice and filtrando) else None
+        regioes = _regioes_reverso(entradas or [], tamanho)
+
+        for regiao in regioes:
+            if regiao.primeiro:
+                if filtro.desde and regiao.ultimo < filtro.desde:
+                    filtro.antigo_demais = True
+                    return
+                if filtro.ate and regiao.primeiro > filtro.ate:
+                    continue
+                if filtro.tipos and filtro.tipos.isdisjoint(regiao.eventos):
+                    continue
+            for linha in ler_linhas_reverso(arquivo, regiao.inicio, regiao.fim, tamanho_bloco):
+                if not filtro.aceita(linha):
+                    if filtro.antigo_demais:
+                        return
+                    continue
+                evento = _parsear(linha, filtro)
+                if evento is not None:
+                    yield evento
+
+
+def _eventos_gzip(caminho: str, filtro: _Filtro, maximo: Optional[int]) -> Iterator[dict]:
+    """Arquivo .gz: leitura sequencial guardando só os `maximo` últimos candidatos."""
+    candidatos: Deque[bytes] = deque(maxlen=maximo)
+    com_recentes = False
+    with gzip.open(caminho, "rb") as arquivo:
+        for linha in arquivo:
+            timestamp = _timestamp_linha(linha)
+            if timestamp is None:
+                continue
+            if filtro.ate and timestamp > filtro.ate:
+                break
+            if filtro.desde and timestamp < filtro.desde:
+                continue
+            com_recentes = True
+            if filtro.marcadores and not any(m in linha for m in filtro.marcadores):
+                continue
+            candidatos.append(linha.rstrip(b"\n"))
+    if filtro.desde and not com_recentes:
+        filtro.antigo_demais = True
+
+    # A deque tem no máximo `maximo` linhas brutas; o JSON ainda pode descartar
+    # algumas (tipo no campo errado), então arquivos seguintes completam o limite
+    for linha in reversed(candidatos):
+        evento = _parsear(linha, filtro)
+        if evento is not None:
+            yield evento
+
+
+def listar_arquivos_log(caminho_log: str) -> List[str]:
+    """Log atual seguido dos rotacionados, do mais recente ao mais antigo."""
+    arquivos = [caminho_log] if os.path.exists(caminho_log) else []
+    rotacionados = [
+        p for p in glob.glob(glob.escape(caminho_log) + ".*")
+        if not p.endswith(SUFIXO_INDICE)
+    ]
+
+    def _ordem(caminho: str):
+        sufixo = caminho[len(caminho_log) + 1:].split(".")[0]
+        # audit.log.1 é mais recente que audit.log.2; demais sufixos pela data
+        return (0, int(sufixo), 0) if sufixo.isdigit() else (1, 0, -os.path.getmtime(caminho))
+
+    return arquivos + sorted(rotacionados, key=_ordem)
+
+
+def iterar_eventos(
+    caminho_log: str,
+    desde: Instante = None,
+    ate: Instante = None,
+    tipos: Optional[Iterable[str]] = None,
+    incluir_rotacionados: bool = True,
+    usar_indice: bool = True,
+    tamanho_bloco: int = TAMANHO_BLOCO,
+    maximo_gzip: Optional[int] = None
+) -> Iterator[dict]:
+    """Eventos do mais recente ao mais antigo, parseados sob demanda."""
+    tipos_set = set(tipos) if tipos else None
+    filtro = _Filtro(
+        desde=_formatar_instante(desde),
+        ate=_formatar_instante(ate),
+        tipos=tipos_set,
+        marcadores=[f'"event": "{t}"'.encode("utf-8") for t in sorted(tipos_set or ())],
+    )
+    arquivos = listar_arquivos_log(caminho_log)
+    if not incluir_rotacionados:
+        arquivos = arquivos[:1]
+
+    for caminho in arquivos:
+        if caminho.endswith(".gz"):
+            yield from _eventos_gzip(caminho, filtro, maximo_gzip)
+        else:
+            yield from _eventos_arquivo(caminho, filtro, tamanho_bloco, usar_indice)
+        if filtro.antigo_demais:
+            return
+
+
+def ler_eventos_recentes(
+    caminho_log: str,
+    limit: int = 100,
+    desde: Instante = None,
+    ate: Instante = None,
+    tipos: Optional[Iterable[str]] = None,
+    **kwargs
+) -> List[dict]:
+    """Até `limit` eventos (mais recentes primeiro) com os filtros de iterar_eventos."""
+    eventos = []
+    if limit <= 0:
+        return eventos
+    for evento in iterar_eventos(caminho_log, desde, ate, tipos, maximo_gzip=limit, **kwargs):
+        eventos.append(evento)
+        if len(eventos) >= limit:
+            break
+    return eventos
@@ -28,6 +28,8 @@ import logging
 from typing import Any, Callable, Coroutine, Optional, TypeVar, List
 from functools import wraps
 from contextlib import contextmanager
+
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 # Tenta usar logging estruturado se disponível
@@ -99,8 +101,15 @@ async def background_db_commit(
     PERFORMANCE: Não bloqueia o fluxo principal enquanto
     o commit é processado.
 
+    Com AsyncSession (database.connection.get_async_db) o commit é
+    aguardado direto no event loop, sem thread.
+
+    ATENÇÃO: Session síncrona não é thread-safe. O commit roda em outra
+    thread; a sessão não pode ser usada até a Task terminar. Prefira
+    AsyncSession nas rotas async.
+
     Args:
-        db: Sessão SQLAlchemy
+        db: Sessão SQLAlchemy (Session ou AsyncSession)
         *models_to_refresh: Modelos para atualizar após commit
         on_error: Callback para erros (opcional)
 
@@ -120,6 +129,14 @@ async def background_db_commit(
     """
     async def do_commit():
         try:
+            if isinstance(db, AsyncSession):
+                await db.commit()
+                for model in models_to_refresh:
+                    if model:
+                        await db.refresh(model)
+                logger.debug(f"[Background] Commit OK, {len(models_to_refresh)} modelos atualizados")
+                return
+
             # Commit síncrono (SQLAlchemy sync)
             # Executa em thread pool para não bloquear event loop
             loop = asyncio.get_event_loop()
@@ -7,6 +7,7 @@ Implementa:
 - Delays progressivos após falhas
 - Bloqueio temporário após muitas tentativas
 - Integração com audit log
+- Estado compartilhado entre workers (utils/estado_compartilhado.py)
 
 USO:
     from utils.brute_force import BruteForceProtection, check_brute_force
@@ -30,10 +31,10 @@ Autor: LAB/PGE-MS
 
 import logging
 import time
-from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from threading import Lock
-from typing import Dict, Optional, Tuple
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.estado_compartilhado import EstadoCompartilhado, EstadoOcupado, get_estado_compartilhado
 
 # Tenta usar logging estruturado
 try:
@@ -43,15 +44,6 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 
-@dataclass
-class AttemptRecord:
-    """Registro de tentativas de login."""
-    failures: int = 0
-    last_failure: Optional[float] = None
-    blocked_until: Optional[float] = None
-    total_failures: int = 0  # Histórico total
-
-
 @dataclass
 class BruteForceConfig:
     """
@@ -63,15 +55,13 @@ class BruteForceConfig:
         progressive_delay: Se True, aumenta delay a cada falha (default: True)
         base_delay: Delay base em segundos (default: 1)
         max_delay: Delay máximo em segundos (default: 30)
-        cleanup_interval: Intervalo para limpar registros antigos (default: 3600)
-        record_ttl: Tempo para manter registros em segundos (default: 86400 = 24h)
+        record_ttl: Tempo para manter contadores de falha em segundos (default: 86400 = 24h)
     """
     max_attempts: int = 5
     block_duration: float = 300.0  # 5 minutos
     progressive_delay: bool = True
     base_delay: float = 1.0
     max_delay: float = 30.0
-    cleanup_interval: float = 3600.0  # 1 hora
     record_ttl: float = 86400.0  # 24 horas
 
 
@@ -92,15 +82,29 @@ class BruteForceProtection:
     Rastreia tentativas por:
     - IP: Bloqueia IPs que fazem muitas tentativas
     - Username: Bloqueia usuários específicos
-    - Combinação IP+Username: Proteção mais granular
+
+    SECURITY: Contadores e bloqueios ficam no estado compartilhado
+    (utils/estado_compartilhado.py), valendo para todos os workers:
+    - bf:falhas:<ip|user>:<id>    contador de falhas (expira em record_ttl)
+    - bf:bloqueio:<ip|user>:<id>  bloqueio ativo (expira em block_duration)
+
+    PERFORMANCE: as chamadas rodam no event loop do login. Com o lock de
+    escrita ocupado além da espera curta do backend (EstadoOcupado), a
+    verificação não bloqueia e a falha/sucesso não é registrada - o rate
+    limit do endpoint de login continua valendo.
     """
 
-    def __init__(self, config: BruteForceConfig = None):
+    def __init__(self, config: BruteForceConfig = None, estado: EstadoCompartilhado = None):
         self._config = config or BruteForceConfig()
-        self._ip_attempts: Dict[str, AttemptRecord] = {}
-        self._user_attempts: Dict[str, AttemptRecord] = {}
-        self._lock = Lock()
-        self._last_cleanup = time.time()
+        self._estado = estado
+
+    @property
+    def estado(self) -> EstadoCompartilhado:
+        return self._estado or get_estado_compartilhado()
+
+    @staticmethod
+    def _chave(tipo: str, alvo: str, ident: str) -> str:
+        return f"bf:{tipo}:{alvo}:{ident}"
 
     def check(
         self,
@@ -117,66 +121,71 @@ class BruteForceProtection:
         Returns:
             BruteForceStatus com informações sobre bloqueio
         """
-        with self._lock:
-            self._maybe_cleanup()
-
-            now = time.time()
-
-            # Verifica bloqueio por IP
-            ip_record = self._ip_attempts.get(ip_address)
-            if ip_record and ip_record.blocked_until:
-                if now < ip_record.blocked_until:
-                    retry_after = ip_record.blocked_until - now
-                    return BruteForceStatus(
-                        is_blocked=True,
-                        retry_after=retry_after,
-                        message=f"IP bloqueado por muitas tentativas. Aguarde {int(retry_after)} segundos."
-                    )
-                else:
-                    # Bloqueio expirou, reseta
-                    ip_record.blocked_until = None
-                    ip_record.failures = 0
-
-            # Verifica bloqueio por usuário
-            if username:
-                user_record = self._user_attempts.get(username)
-                if user_record and user_record.blocked_until:
-                    if now < user_record.blocked_until:
-                        retry_after = user_record.blocked_until - now
-                        return BruteForceStatus(
-                            is_blocked=True,
-                            retry_after=retry_after,
-                            message=f"Conta bloqueada por muitas tentativas. Aguarde {int(retry_after)} segundos."
-                        )
-                    else:
-                        user_record.blocked_until = None
-                        user_record.failures = 0
-
-            # Calcula delay progressivo baseado em falhas recentes
-            delay = 0.0
-            if self._config.progressive_delay:
-                failures = 0
-                if ip_record:
-                    failures = max(failures, ip_record.failures)
-                if username and username in self._user_attempts:
-                    failures = max(failures, self._user_attempts[username].failures)
-
-                if failures > 0:
-                    delay = min(
-                        self._config.base_delay * (2 ** (failures - 1)),
-                        self._config.max_delay
-                    )
-
-            # Calcula tentativas restantes
-            ip_failures = ip_record.failures if ip_record else 0
-            attempts_remaining = max(0, self._config.max_attempts - ip_failures)
+        try:
+            return self._check(ip_address, username)
+        except EstadoOcupado as e:
+            logger.warning(f"[BruteForce] Verificação ignorada para IP {ip_address}: {e}")
+            return BruteForceStatus(attempts_remaining=self._config.max_attempts)
+
+    def _check(self, ip_address: str, username: str = None) -> BruteForceStatus:
+        estado = self.estado
+        now = time.time()
 
+        # Verifica bloqueio por IP
+        blocked_until = estado.expira_em(self._chave("bloqueio", "ip", ip_address))
+        if blocked_until:
+            retry_after = blocked_until - now
             return BruteForceStatus(
-                is_blocked=False,
-                attempts_remaining=attempts_remaining,
-                delay_required=delay
+                is_blocked=True,
+                retry_after=retry_after,
+                message=f"IP bloqueado por muitas tentativas. Aguarde {int(retry_after)} segundos."
             )
 
+        # Verifica bloqueio por usuário
+        if username:
+            blocked_until = estado.expira_em(self._chave("bloqueio", "user", username))
+            if blocked_until:
+                retry_after = blocked_until - now
+                return BruteForceStatus(
+                    is_blocked=True,
+                    retry_after=retry_after,
+                    message=f"Conta bloqueada por muitas tentativas. Aguarde {int(retry_after)} segundos."
+                )
+
+        ip_failures = estado.contador(self._chave("falhas", "ip", ip_address))
+
+        # Calcula delay progressivo baseado em falhas recentes
+        delay = 0.0
+        if self._config.progressive_delay:
+            failures = ip_failures
+            if username:
+                failures = max(failures, estado.contador(self._chave("falhas", "user", username)))
+
+            if failures > 0:
+                delay = min(
+                    self._config.base_delay * (2 ** (failures - 1)),
+                    self._config.max_delay
+                )
+
+        # Calcula tentativas restantes
+        attempts_remaining = max(0, self._config.max_attempts - ip_failures)
+
+        return BruteForceStatus(
+            is_blocked=False,
+            attempts_remaining=attempts_remaining,
+            delay_required=delay
+        )
+
+    def _registrar_falha(self, alvo: str, ident: str) -> int:
+        """Incrementa as falhas; ao atingir o limite, bloqueia e zera o contador."""
+        estado = self.estado
+        failures = estado.incrementar(self._chave("falhas", alvo, ident), self._config.record_ttl)
+        if failures >= self._config.max_attempts:
+            estado.definir(self._chave("bloqueio", alvo, ident), str(failures), self._config.block_duration)
+            # Após o bloqueio expirar, a contagem recomeça do zero
+            estado.remover(self._chave("falhas", alvo, ident))
+        return failures
+
     def record_failure(
         self,
         ip_address: str,
@@ -191,49 +200,38 @@ class BruteForceProtection:
             username: Nome de usuário
             reason: Motivo da falha (para logging)
         """
-        with self._lock:
-            now = time.time()
-
-            # Atualiza registro do IP
-            if ip_address not in self._ip_attempts:
-                self._ip_attempts[ip_address] = AttemptRecord()
-
-            ip_record = self._ip_attempts[ip_address]
-            ip_record.failures += 1
-            ip_record.total_failures += 1
-            ip_record.last_failure = now
+        try:
+            self._record_failure(ip_address, username)
+        except EstadoOcupado as e:
+            logger.warning(f"[BruteForce] Falha de login não registrada para IP {ip_address}: {e}")
+
+    def _record_failure(self, ip_address: str, username: str = None):
+        failures = self._registrar_falha("ip", ip_address)
+        if failures >= self._config.max_attempts:
+            logger.warning(
+                f"[BruteForce] IP {ip_address} bloqueado por {self._config.block_duration}s "
+                f"após {failures} tentativas",
+                ip=ip_address,
+                failures=failures,
+                block_duration=self._config.block_duration
+            )
 
-            # Verifica se deve bloquear IP
-            if ip_record.failures >= self._config.max_attempts:
-                ip_record.blocked_until = now + self._config.block_duration
+        if username:
+            failures = self._registrar_falha("user", username)
+            if failures >= self._config.max_attempts:
                 logger.warning(
-                    f"[BruteForce] IP {ip_address} bloqueado por {self._config.block_duration}s "
-                    f"após {ip_record.failures} tentativas",
-                    ip=ip_address,
-                    failures=ip_record.failures,
+                    f"[BruteForce] Usuário '{username}' bloqueado por {self._config.block_duration}s "
+                    f"após {failures} tentativas",
+                    username=username,
+                    failures=failures,
                     block_duration=self._config.block_duration
                 )
 
-            # Atualiza registro do usuário
-            if username:
-                if username not in self._user_attempts:
-                    self._user_attempts[username] = AttemptRecord()
-
-                user_record = self._user_attempts[username]
-                user_record.failures += 1
-                user_record.total_failures += 1
-                user_record.last_failure = now
-
-                # Verifica se deve bloquear usuário
-                if user_record.failures >= self._config.max_attempts:
-                    user_record.blocked_until = now + self._config.block_duration
-                    logger.warning(
-                        f"[BruteForce] Usuário '{username}' bloqueado por {self._config.block_duration}s "
-                        f"após {user_record.failures} tentativas",
-                        username=username,
-                        failures=user_record.failures,
-                        block_duration=self._config.block_duration
-                    )
+    def _desbloquear(self, alvo: str, ident: str) -> bool:
+        estado = self.estado
+        bloqueado = estado.remover(self._chave("bloqueio", alvo, ident))
+        com_falhas = estado.remover(self._chave("falhas", alvo, ident))
+        return bloqueado or com_falhas
 
     def record_success(
         self,
@@ -249,90 +247,43 @@ class BruteForceProtection:
             ip_address: IP do cliente
             username: Nome de usuário
         """
-        with self._lock:
-            # Reseta falhas do IP (mantém histórico)
-            if ip_address in self._ip_attempts:
-                self._ip_attempts[ip_address].failures = 0
-                self._ip_attempts[ip_address].blocked_until = None
-
-            # Reseta falhas do usuário
-            if username and username in self._user_attempts:
-                self._user_attempts[username].failures = 0
-                self._user_attempts[username].blocked_until = None
+        try:
+            self._desbloquear("ip", ip_address)
+            if username:
+                self._desbloquear("user", username)
+        except EstadoOcupado as e:
+            logger.warning(f"[BruteForce] Sucesso de login não registrado para IP {ip_address}: {e}")
 
     def get_stats(self) -> dict:
-        """Retorna estatísticas de proteção brute force."""
-        with self._lock:
-            now = time.time()
-            blocked_ips = sum(
-                1 for r in self._ip_attempts.values()
-                if r.blocked_until and r.blocked_until > now
-            )
-            blocked_users = sum(
-                1 for r in self._user_attempts.values()
-                if r.blocked_until and r.blocked_until > now
-            )
-
-            return {
-                "tracked_ips": len(self._ip_attempts),
-                "tracked_users": len(self._user_attempts),
-                "blocked_ips": blocked_ips,
-                "blocked_users": blocked_users,
-                "config": {
-                    "max_attempts": self._config.max_attempts,
-                    "block_duration": self._config.block_duration,
-                }
+        """Retorna estatísticas de proteção brute force (todos os workers)."""
+        estado = self.estado
+        blocked_ips = estado.contar_prefixo("bf:bloqueio:ip:")
+        blocked_users = estado.contar_prefixo("bf:bloqueio:user:")
+
+        return {
+            "tracked_ips": estado.contar_prefixo("bf:falhas:ip:") + blocked_ips,
+            "tracked_users": estado.contar_prefixo("bf:falhas:user:") + blocked_users,
+            "blocked_ips": blocked_ips,
+            "blocked_users": blocked_users,
+            "config": {
+                "max_attempts": self._config.max_attempts,
+                "block_duration": self._config.block_duration,
             }
+        }
 
     def unblock_ip(self, ip_address: str) -> bool:
         """Desbloqueia um IP manualmente."""
-        with self._lock:
-            if ip_address in self._ip_attempts:
-                self._ip_attempts[ip_address].failures = 0
-                self._ip_attempts[ip_address].blocked_until = None
-                logger.info(f"[BruteForce] IP {ip_address} desbloqueado manualmente")
-                return True
-            return False
+        if self._desbloquear("ip", ip_address):
+            logger.info(f"[BruteForce] IP {ip_address} desbloqueado manualmente")
+            return True
+        return False
 
     def unblock_user(self, username: str) -> bool:
         """Desbloqueia um usuário manualmente."""
-        with self._lock:
-            if username in self._user_attempts:
-                self._user_attempts[username].failures = 0
-                self._user_attempts[username].blocked_until = None
-                logger.info(f"[BruteForce] Usuário '{username}' desbloqueado manualmente")
-                return True
-            return False
-
-    def _maybe_cleanup(self):
-        """Limpa registros antigos periodicamente."""
-        now = time.time()
-        if now - self._last_cleanup < self._config.cleanup_interval:
-            return
-
-        self._last_cleanup = now
-        ttl_threshold = now - self._config.record_ttl
-
-        # Limpa IPs antigos
-        old_ips = [
-            ip for ip, record in self._ip_attempts.items()
-            if record.last_failure and record.last_failure < ttl_threshold
-        ]
-        for ip in old_ips:
-            del self._ip_attempts[ip]
-
-        # Limpa usuários antigos
-        old_users = [
-            user for user, record in self._user_attempts.items()
-            if record.last_failure and record.last_failure < ttl_threshold
-        ]
-        for user in old_users:
-            del self._user_attempts[user]
-
-        if old_ips or old_users:
-            logger.debug(
-                f"[BruteForce] Cleanup: removidos {len(old_ips)} IPs e {len(old_users)} usuários"
-            )
+        if self._desbloquear("user", username):
+            logger.info(f"[BruteForce] Usuário '{username}' desbloqueado manualmente")
+            return True
+        return False
 
 
 # Instância global singleton
@@ -399,7 +350,6 @@ __all__ = [
     "BruteForceProtection",
     "BruteForceConfig",
     "BruteForceStatus",
-    "AttemptRecord",
     # Funções
     "get_brute_force_protection",
     "check_brute_force",
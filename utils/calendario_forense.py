@@ -0,0 +1,255 @@
+# utils/calendario_forense.py
+"""
+Calendário forense com contagem de dias úteis (TJ-MS).
+
+PROBLEMA: os helpers de prazo avançavam a data um dia por vez e ignoravam
+feriados. Os prazos saíam errados em torno de feriados e cada chamada era
+O(dias).
+
+SOLUÇÃO: dias não úteis = fins de semana + feriados nacionais, estaduais (MS)
+e forenses (TJ-MS), incluindo os móveis calculados a partir da Páscoa, +
+períodos de suspensão de prazos (art. 220 do CPC e portarias). A tabela
+fica em utils/calendario_forense.json (ou no caminho de CALENDARIO_FORENSE_PATH).
+
+PERFORMANCE: para cada ano é pré-computado o array ordenado dos ordinais
+dos dias úteis. Os anos são concatenados em um único array, então a posição
+de um dia útil é o seu índice cumulativo: "N dias úteis após D", "N dias
+úteis antes de D" e "dias úteis entre A e B" viram uma busca binária +
+acesso por índice. Anos fora da faixa são carregados sob demanda.
+
+Uso:
+    from utils.calendario_forense import dias_uteis_apos, proximo_dia_util
+
+    prazo_final = dias_uteis_apos(termo_inicial, 30)
+    termo_inicial = proximo_dia_util(data_intimacao)
+
+Autor: LAB/PGE-MS
+"""
+
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+CALENDARIO_PATH_PADRAO = Path(__file__).with_name("calendario_forense.json")
+
+# Margem de anos carregada além do ano solicitado (evita reconstruções em
+# prazos que cruzam a virada do ano)
+MARGEM_ANOS = 1
+
+
+def calcular_pascoa(ano: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def _mm_dd(ano: int, mm_dd: str) -> date:
+    mes, dia = mm_dd.split("-")
+    return date(ano, int(mes), int(dia))
+
+
+class CalendarioForense:
+    """
+    Calendário de dias úteis forenses com tabela cumulativa pré-computada.
+
+    Args:
+        config: Dicionário no formato de calendario_forense.json
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self._lock = threading.Lock()
+        self._ano_inicial: Optional[int] = None
+        self._ano_final: Optional[int] = None
+        # Ordinais (date.toordinal) dos dias úteis, em ordem crescente
+        self._uteis = array("l")
+
+    @classmethod
+    def carregar(cls, caminho: Optional[str] = None) -> "CalendarioForense":
+        """Carrega o calendário de um arquivo JSON."""
+        caminho = caminho or os.getenv("CALENDARIO_FORENSE_PATH") or CALENDARIO_PATH_PADRAO
+        with open(caminho, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    # ------------------------------------------------------------------
+    # Feriados e suspensões
+    # ------------------------------------------------------------------
+
+    def feriados(self, ano: int) -> Dict[date, str]:
+        """Feriados do ano (data -> descrição)."""
+        resultado: Dict[date, str] = {}
+
+        for grupo in self.config.get("feriados_fixos", {}).values():
+            for mm_dd, descricao in grupo.items():
+                resultado[_mm_dd(ano, mm_dd)] = descricao
+
+        for mm_dd, info in self.config.get("feriados_fixos_a_partir_de", {}).items():
+            if ano >= info.get("ano_inicial", ano):
+                resultado[_mm_dd(ano, mm_dd)] = info["descricao"]
+
+        pascoa = calcular_pascoa(ano)
+        for deslocamento, descricao in self.config.get("feriados_moveis", {}).items():
+            resultado[pascoa + timedelta(days=int(deslocamento))] = descricao
+
+        return resultado
+
+    def suspensoes(self, ano: int) -> List[Tuple[date, date, str]]:
+        """Períodos de suspensão (inclusivos) que tocam o ano."""
+        periodos = []
+
+        for s in self.config.get("suspensoes_anuais", []):
+            # Períodos que cruzam a virada (ex: 20/12 a 20/01) geram dois trechos no ano
+            for ano_inicio in (ano - 1, ano):
+                inicio = _mm_dd(ano_inicio, s["inicio"])
+                fim = _mm_dd(ano_inicio, s["fim"])
+                if fim < inicio:
+                    fim = _mm_dd(ano_inicio + 1, s["fim"])
+                periodos.append((inicio, fim, s.get("descricao", "")))
+
+        for s in self.config.get("suspensoes", []):
+            periodos.append((date.fromisoformat(s["inicio"]), date.fromisoformat(s["fim"]), s.get("descricao", "")))
+
+        return [p for p in periodos if p[0].year <= ano <= p[1].year]
+
+    def _dias_nao_uteis(self, ano: int) -> set:
+        nao_uteis = set(self.feriados(ano))
+        for inicio, fim, _ in self.suspensoes(ano):
+            dia = max(inicio, date(ano, 1, 1))
+            ultimo = min(fim, date(ano, 12, 31))
+            while dia <= ultimo:
+                nao_uteis.add(dia)
+                dia += timedelta(days=1)
+        return nao_uteis
+
+    def _uteis_do_ano(self, ano: int) -> array:
+        nao_uteis = self._dias_nao_uteis(ano)
+        dia = date(ano, 1, 1)
+        uteis = array("l")
+        while dia.year == ano:
+            if dia.weekday() < 5 and dia not in nao_uteis:
+                uteis.append(dia.toordinal())
+            dia += timedelta(days=1)
+        return uteis
+
+    # ------------------------------------------------------------------
+    # Tabela cumulativa
+    # ------------------------------------------------------------------
+
+    def _garantir_anos(self, ano_min: int, ano_max: int) -> None:
+        """Garante que a tabela cobre [ano_min, ano_max] (estende sob demanda)."""
+        if self._ano_inicial is not None and self._ano_inicial <= ano_min and ano_max <= self._ano_final:
+            return
+        with self._lock:
+            inicial = ano_min if self._ano_inicial is None else min(ano_min, self._ano_inicial)
+            final = ano_max if self._ano_final is None else max(ano_max, self._ano_final)
+
+            antes = array("l")
+            for ano in range(inicial, self._ano_inicial if self._ano_inicial is not None else final + 1):
+                antes.extend(self._uteis_do_ano(ano))
+            depois = array("l")
+            if self._ano_final is not None:
+                for ano in range(self._ano_final + 1, final + 1):
+                    depois.extend(self._uteis_do_ano(ano))
+
+            # Substitui a referência de uma vez: leitores concorrentes veem a
+            # tabela antiga ou a nova, nunca uma parcial
+            self._uteis = antes + self._uteis + depois
+            self._ano_inicial, self._ano_final = inicial, final
+
+    def _tabela_para(self, dia: date) -> array:
+        self._garantir_anos(dia.year - MARGEM_ANOS, dia.year + MARGEM_ANOS)
+        return self._uteis
+
+    def eh_dia_util(self, dia: date) -> bool:
+        """Indica se a data é dia útil forense."""
+        uteis = self._tabela_para(dia)
+        i = bisect_left(uteis, dia.toordinal())
+        return i < len(uteis) and uteis[i] == dia.toordinal()
+
+    def dias_uteis_apos(self, dia: date, n: int) -> date:
+        """
+        Data após N dias úteis contados a partir do dia seguinte a `dia`.
+
+        Com n=0 retorna a própria data.
+        """
+        if n <= 0:
+            return dia
+        while True:
+            uteis = self._tabela_para(dia)
+            indice = bisect_right(uteis, dia.toordinal()) + n - 1
+            if indice < len(uteis):
+                return date.fromordinal(uteis[indice])
+            # Prazo ultrapassa a tabela: estende mais anos e repete
+            self._garantir_anos(self._ano_inicial, self._ano_final + 1 + n // 200)
+
+    def dias_uteis_antes(self, dia: date, n: int) -> date:
+        """Data N dias úteis antes de `dia` (sem contar o próprio dia)."""
+        if n <= 0:
+            return dia
+        while True:
+            uteis = self._tabela_para(dia)
+            indice = bisect_left(uteis, dia.toordinal()) - n
+            if indice >= 0:
+                return date.fromordinal(uteis[indice])
+            self._garantir_anos(self._ano_inicial - 1 - n // 200, self._ano_final)
+
+    def dias_uteis_entre(self, inicio: date, fim: date) -> int:
+        """
+        Quantidade de dias úteis no intervalo (inicio, fim].
+
+        Negativo se fim < inicio.
+        """
+        if fim < inicio:
+            return -self.dias_uteis_entre(fim, inicio)
+        self._garantir_anos(inicio.year - MARGEM_ANOS, fim.year + MARGEM_ANOS)
+        uteis = self._uteis
+        return bisect_right(uteis, fim.toordinal()) - bisect_right(uteis, inicio.toordinal())
+
+    def proximo_dia_util(self, dia: date) -> date:
+        """Primeiro dia útil estritamente posterior a `dia` (art. 224 do CPC)."""
+        return self.dias_uteis_apos(dia, 1)
+
+
+@lru_cache(maxsize=1)
+def get_calendario() -> CalendarioForense:
+    """Instância compartilhada carregada do arquivo padrão."""
+    return CalendarioForense.carregar()
+
+
+# =============================================================================
+# ATALHOS
+# =============================================================================
+
+def eh_dia_util(dia: date) -> bool:
+    return get_calendario().eh_dia_util(dia)
+
+
+def dias_uteis_apos(dia: date, n: int) -> date:
+    return get_calendario().dias_uteis_apos(dia, n)
+
+
+def dias_uteis_antes(dia: date, n: int) -> date:
+    return get_calendario().dias_uteis_antes(dia, n)
+
+
+def dias_uteis_entre(inicio: date, fim: date) -> int:
+    return get_calendario().dias_uteis_entre(inicio, fim)
+
+
+def proximo_dia_util(dia: date) -> date:
+    return get_calendario().proximo_dia_util(dia)
@@ -0,0 +1,563 @@
+# utils/estado_compartilhado.py
+"""
+Estado compartilhado entre workers (rate limit, brute force, blacklist de tokens).
+
+PERFORMANCE/SECURITY: Com N workers do uvicorn, estado em memória por processo
+multiplica os limites por N, e bloqueios e revogações valem para um worker só.
+Este módulo oferece um backend comum, de baixa latência, com três primitivas
+atômicas:
+- incrementar(chave, ttl): contador com expiração (janela fixa)
+- definir_se_ausente(chave, valor, ttl): set-if-absent (locks, "primeiro vence")
+- adicionar_membro / pertence: pertinência com TTL (ex: tokens revogados)
+
+Backends:
+- sqlite   (padrão) arquivo local em modo WAL, compartilhado pelos workers do
+           mesmo host; cada operação é um único statement (atômico)
+- postgres tabela UNLOGGED no banco da aplicação (vários hosts/réplicas);
+           sem WAL do Postgres, a tabela é perdida em crash - aceitável para
+           contadores e bloqueios temporários
+- memoria  por processo (testes / desenvolvimento com um worker)
+
+Linhas expiradas nunca são lidas (todo SELECT filtra expira_em) e são
+apagadas em lotes. A manutenção roda numa thread de fundo de cada processo,
+fora do caminho das requisições: limpeza de expirados (só um worker por
+intervalo, quem conseguir o lock "__limpeza__") e, no SQLite, o checkpoint
+do WAL (o autocheckpoint fica desligado nas conexões das requisições).
+
+PERFORMANCE: a espera pelo lock de escrita do SQLite é curta (ESPERA_MAXIMA_S)
+e feita em Python, com backoff de microssegundos - o busy handler padrão do
+SQLite dorme em degraus de milissegundos e bloquearia o event loop por até
+busy_timeout. Se o prazo estourar, a operação levanta EstadoOcupado e quem
+chama decide: o rate limit deixa passar, a revogação de token tenta de novo
+fora do event loop.
+
+USO:
+    from utils.estado_compartilhado import get_estado_compartilhado
+
+    estado = get_estado_compartilhado()
+    falhas = estado.incrementar("bf:falhas:ip:1.2.3.4", ttl_s=86400)
+    estado.adicionar_membro("revogado", jti, ttl_s=3600)
+
+CONFIGURAÇÃO (variáveis de ambiente):
+    ESTADO_COMPARTILHADO_BACKEND   sqlite | postgres | memoria (default: sqlite)
+    ESTADO_COMPARTILHADO_SQLITE    caminho do arquivo (default: <tmp>/portal_pge_estado.db)
+    ESTADO_COMPARTILHADO_ESPERA_MS espera máxima pelo lock de escrita (default: 50)
+
+Autor: LAB/PGE-MS
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TABELA = "estado_compartilhado"
+
+# Intervalo entre limpezas de expirados e tamanho de cada lote
+INTERVALO_LIMPEZA_S = 60.0
+LOTE_LIMPEZA = 500
+
+# Intervalo da thread de manutenção (checkpoint do WAL no SQLite)
+INTERVALO_MANUTENCAO_S = 1.0
+
+# Espera máxima pelo lock de escrita do SQLite antes de EstadoOcupado
+ESPERA_MAXIMA_S = float(os.getenv("ESTADO_COMPARTILHADO_ESPERA_MS", "50")) / 1000
+
+CHAVE_LIMPEZA = "__limpeza__"
+
+
+class EstadoOcupado(Exception):
+    """O backend não conseguiu o lock de escrita dentro da espera máxima."""
+
+
+def _fim_prefixo(prefixo: str) -> str:
+    """Limite superior do intervalo [prefixo, fim) - usa o índice da PK."""
+    return prefixo + "\U0010ffff"
+
+
+class EstadoCompartilhado(ABC):
+    """
+    Interface do backend de estado compartilhado.
+
+    Chaves são strings; cada chave tem um contador, um valor texto opcional e
+    uma expiração absoluta (epoch). Chave expirada se comporta como ausente.
+    """
+
+    intervalo_limpeza_s = INTERVALO_LIMPEZA_S
+    intervalo_manutencao_s = INTERVALO_MANUTENCAO_S
+
+    def __init__(self):
+        self._ultima_limpeza = time.monotonic()
+        self._pid_manutencao: Optional[int] = None
+        self._lock_manutencao = threading.Lock()
+        self._parar = threading.Event()
+
+    @abstractmethod
+    def incrementar(self, chave: str, ttl_s: float, quantidade: int = 1) -> int:
+        """Soma `quantidade` ao contador; se ausente/expirado, começa nova janela de ttl_s."""
+
+    @abstractmethod
+    def definir_se_ausente(self, chave: str, valor: str, ttl_s: float) -> bool:
+        """Define a chave só se ausente/expirada. Retorna True se definiu."""
+
+    @abstractmethod
+    def definir(self, chave: str, valor: str, ttl_s: float) -> None:
+        """Define (ou sobrescreve) a chave com o valor e zera o contador."""
+
+    @abstractmethod
+    def obter(self, chave: str) -> Optional[str]:
+        """Valor da chave ("" se só tem contador) ou None se ausente."""
+
+    @abstractmethod
+    def contador(self, chave: str) -> int:
+        """Contador da chave (0 se ausente)."""
+
+    @abstractmethod
+    def expira_em(self, chave: str) -> Optional[float]:
+        """Expiração (epoch) da chave ou None se ausente."""
+
+    @abstractmethod
+    def remover(self, chave: str) -> bool:
+        """Remove a chave. Retorna True se ela existia."""
+
+    @abstractmethod
+    def remover_prefixo(self, prefixo: str) -> int:
+        """Remove todas as chaves com o prefixo. Retorna quantas removeu."""
+
+    @abstractmethod
+    def contar_prefixo(self, prefixo: str) -> int:
+        """Quantas chaves vivas têm o prefixo."""
+
+    @abstractmethod
+    def limpar_expirados(self, lote: int = LOTE_LIMPEZA) -> int:
+        """Apaga chaves expiradas em lotes. Retorna quantas foram apagadas."""
+
+    # ==========================================
+    # Pertinência com TTL
+    # ==========================================
+
+    def adicionar_membro(self, conjunto: str, membro: str, ttl_s: float) -> None:
+        self.definir(f"{conjunto}:{membro}", "1", ttl_s)
+
+    def pertence(self, conjunto: str, membro: str) -> bool:
+        return self.obter(f"{conjunto}:{membro}") is not None
+
+    # ==========================================
+    # Manutenção em segundo plano
+    # ==========================================
+
+    def _garantir_manutencao(self) -> None:
+        """Inicia a thread de manutenção deste processo (uma vez; de novo após fork)."""
+        pid = os.getpid()
+        if self._pid_manutencao == pid:
+            return
+        with self._lock_manutencao:
+            if self._pid_manutencao == pid:
+                return
+            self._pid_manutencao = pid
+            threading.Thread(
+                target=EstadoCompartilhado._laco_manutencao,
+                args=(weakref.ref(self), self._parar),
+                name="estado-compartilhado-manutencao",
+                daemon=True,
+            ).start()
+
+    @staticmethod
+    def _laco_manutencao(ref: "weakref.ref[EstadoCompartilhado]", parar: threading.Event) -> None:
+        # Referência fraca: a thread termina quando o backend é descartado
+        while True:
+            estado = ref()
+            if estado is None:
+                return
+            intervalo = estado.intervalo_manutencao_s
+            del estado
+            if parar.wait(intervalo):
+                return
+            estado = ref()
+            if estado is None:
+                return
+            try:
+                estado._manutencao()
+            except Exception as e:
+                logger.warning(f"[EstadoCompartilhado] Falha na manutenção: {e}")
+            del estado
+
+    def _manutencao(self) -> None:
+        """Uma rodada de manutenção (thread de fundo)."""
+        self._talvez_limpar()
+
+    def fechar(self) -> None:
+        """Encerra a thread de manutenção."""
+        self._parar.set()
+
+    # ==========================================
+    # Limpeza em lotes (um worker por intervalo)
+    # ==========================================
+
+    def _talvez_limpar(self) -> None:
+        agora = time.monotonic()
+        if agora - self._ultima_limpeza < self.intervalo_limpeza_s:
+            return
+        self._ultima_limpeza = agora
+        try:
+            if not self.definir_se_ausente(CHAVE_LIMPEZA, str(os.getpid()), self.intervalo_limpeza_s):
+                return  # Outro worker limpa neste intervalo
+            total = 0
+            while True:
+                apagadas = self.limpar_expirados()
+                total += apagadas
+                if apagadas < LOTE_LIMPEZA:
+                    break
+            if total:
+                logger.debug(f"[EstadoCompartilhado] Limpeza: {total} chaves expiradas removidas")
+        except Exception as e:
+            logger.warning(f"[EstadoCompartilhado] Falha na limpeza de expirados: {e}")
+
+
+class _EstadoSQL(EstadoCompartilhado, ABC):
+    """Operações em SQL comuns ao SQLite (>= 3.35) e ao Postgres (ON CONFLICT ... RETURNING)."""
+
+    SQL_INCREMENTAR = f"""
+        INSERT INTO {TABELA} (chave, valor, contador, expira_em) VALUES (:chave, NULL, :q, :expira)
+        ON CONFLICT (chave) DO UPDATE SET
+            contador = CASE WHEN {TABELA}.expira_em <= :agora THEN :q ELSE {TABELA}.contador + :q END,
+            valor = CASE WHEN {TABELA}.expira_em <= :agora THEN NULL ELSE {TABELA}.valor END,
+            expira_em = CASE WHEN {TABELA}.expira_em <= :agora THEN :expira ELSE {TABELA}.expira_em END
+        RETURNING contador
+    """
+    SQL_DEFINIR_SE_AUSENTE = f"""
+        INSERT INTO {TABELA} (chave, valor, contador, expira_em) VALUES (:chave, :valor, 0, :expira)
+        ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor, contador = 0, expira_em = excluded.expira_em
+        WHERE {TABELA}.expira_em <= :agora
+        RETURNING chave
+    """
+    SQL_DEFINIR = f"""
+        INSERT INTO {TABELA} (chave, valor, contador, expira_em) VALUES (:chave, :valor, 0, :expira)
+        ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor, contador = 0, expira_em = excluded.expira_em
+    """
+    SQL_OBTER = f"SELECT valor, contador, expira_em FROM {TABELA} WHERE chave = :chave AND expira_em > :agora"
+    SQL_REMOVER = f"DELETE FROM {TABELA} WHERE chave = :chave AND expira_em > :agora"
+    SQL_REMOVER_PREFIXO = f"DELETE FROM {TABELA} WHERE chave >= :inicio AND chave < :fim"
+    SQL_CONTAR_PREFIXO = (
+        f"SELECT COUNT(*) FROM {TABELA} WHERE chave >= :inicio AND chave < :fim AND expira_em > :agora"
+    )
+    SQL_LIMPAR = f"""
+        DELETE FROM {TABELA} WHERE chave IN (
+            SELECT chave FROM {TABELA} WHERE expira_em <= :agora LIMIT :lote
+        )
+    """
+
+    @abstractmethod
+    def _executar(self, sql: str, params: Dict[str, Any]) -> Tuple[List[tuple], int]:
+        """Executa um statement em autocommit. Retorna (linhas, rowcount)."""
+
+    def incrementar(self, chave: str, ttl_s: float, quantidade: int = 1) -> int:
+        self._garantir_manutencao()
+        agora = time.time()
+        linhas, _ = self._executar(self.SQL_INCREMENTAR, {
+            "chave": chave, "q": quantidade, "agora": agora, "expira": agora + ttl_s,
+        })
+        return int(linhas[0][0])
+
+    def definir_se_ausente(self, chave: str, valor: str, ttl_s: float) -> bool:
+        agora = time.time()
+        linhas, _ = self._executar(self.SQL_DEFINIR_SE_AUSENTE, {
+            "chave": chave, "valor": valor, "agora": agora, "expira": agora + ttl_s,
+        })
+        return bool(linhas)
+
+    def definir(self, chave: str, valor: str, ttl_s: float) -> None:
+        self._garantir_manutencao()
+        self._executar(self.SQL_DEFINIR, {"chave": chave, "valor": valor, "expira": time.time() + ttl_s})
+
+    def _linha(self, chave: str) -> Optional[tuple]:
+        linhas, _ = self._executar(self.SQL_OBTER, {"chave": chave, "agora": time.time()})
+        return linhas[0] if linhas else None
+
+    def obter(self, chave: str) -> Optional[str]:
+        linha = self._linha(chave)
+        if linha is None:
+            return None
+        return linha[0] if linha[0] is not None else ""
+
+    def contador(self, chave: str) -> int:
+        linha = self._linha(chave)
+        return int(linha[1]) if linha else 0
+
+    def expira_em(self, chave: str) -> Optional[float]:
+        linha = self._linha(chave)
+        return float(linha[2]) if linha else None
+
+    def remover(self, chave: str) -> bool:
+        _, rowcount = self._executar(self.SQL_REMOVER, {"chave": chave, "agora": time.time()})
+        return rowcount > 0
+
+    def remover_prefixo(self, prefixo: str) -> int:
+        _, rowcount = self._executar(self.SQL_REMOVER_PREFIXO, {"inicio": prefixo, "fim": _fim_prefixo(prefixo)})
+        return rowcount
+
+    def contar_prefixo(self, prefixo: str) -> int:
+        linhas, _ = self._executar(self.SQL_CONTAR_PREFIXO, {
+            "inicio": prefixo, "fim": _fim_prefixo(prefixo), "agora": time.time(),
+        })
+        return int(linhas[0][0])
+
+    def limpar_expirados(self, lote: int = LOTE_LIMPEZA) -> int:
+        _, rowcount = self._executar(self.SQL_LIMPAR, {"agora": time.time(), "lote": lote})
+        return rowcount
+
+
+class EstadoSQLite(_EstadoSQL):
+    """
+    Backend SQLite em modo WAL, compartilhado pelos workers do mesmo host.
+
+    Uma conexão por thread (e por processo, após fork). Autocommit: cada
+    operação é um statement e já é atômica; synchronous=NORMAL em WAL não faz
+    fsync a cada commit. Leituras não esperam o lock de escrita (WAL).
+
+    PERFORMANCE: as conexões das requisições não fazem checkpoint
+    (wal_autocheckpoint=0) nem esperam no busy handler do SQLite
+    (busy_timeout=0); a espera pelo lock é o backoff curto de _executar e o
+    checkpoint PASSIVE roda na thread de manutenção.
+    """
+
+    def __init__(self, caminho: str, espera_maxima_s: float = ESPERA_MAXIMA_S):
+        super().__init__()
+        self.caminho = caminho
+        self.espera_maxima_s = espera_maxima_s
+        self._local = threading.local()
+        # Schema e modo WAL (persistente no arquivo) na inicialização, que
+        # pode esperar o lock; as operações, não
+        conn = sqlite3.connect(caminho, timeout=5.0, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABELA} ("
+                "chave TEXT PRIMARY KEY, valor TEXT, contador INTEGER NOT NULL DEFAULT 0, expira_em REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{TABELA}_expira_em ON {TABELA} (expira_em)")
+        finally:
+            conn.close()
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.caminho, timeout=0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA wal_autocheckpoint=0")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _executar(self, sql: str, params: Dict[str, Any]) -> Tuple[List[tuple], int]:
+        conn = self._conexao()
+        prazo = None
+        pausa = 0.0
+        while True:
+            try:
+                cursor = conn.execute(sql, params)
+                linhas = cursor.fetchall()
+                return linhas, cursor.rowcount
+            except sqlite3.OperationalError as e:
+                if not _lock_ocupado(e):
+                    raise
+                agora = time.monotonic()
+                if prazo is None:
+                    prazo = agora + self.espera_maxima_s
+                elif agora >= prazo:
+                    raise EstadoOcupado(
+                        f"Lock de escrita do SQLite ocupado por mais de {self.espera_maxima_s * 1000:.0f} ms"
+                    ) from e
+                # Backoff de 20 µs a 1 ms: cede a CPU para quem tem o lock
+                time.sleep(pausa)
+                pausa = min(max(pausa * 2, 2e-5), 1e-3)
+
+    def _manutencao(self) -> None:
+        super()._manutencao()
+        # PASSIVE: não espera leitores nem escritores; o que não couber fica
+        # para a próxima rodada
+        self._conexao().execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+
+
+def _lock_ocupado(erro: sqlite3.OperationalError) -> bool:
+    """SQLITE_BUSY/SQLITE_LOCKED (inclusive os códigos estendidos)."""
+    codigo = getattr(erro, "sqlite_errorcode", None)
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(erro) or "busy" in str(erro)
+
+
+class EstadoPostgres(_EstadoSQL):
+    """
+    Backend em tabela UNLOGGED do Postgres (compartilhado entre hosts).
+
+    Usa o engine síncrono da aplicação; cada operação é uma transação curta.
+    """
+
+    def __init__(self, engine=None):
+        super().__init__()
+        from sqlalchemy import text
+        if engine is None:
+            from database.connection import engine
+        self._engine = engine
+        self._text = text
+        self._sql_cache: Dict[str, Any] = {}
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE UNLOGGED TABLE IF NOT EXISTS {TABELA} ("
+                "chave TEXT PRIMARY KEY, valor TEXT, contador BIGINT NOT NULL DEFAULT 0, "
+                "expira_em DOUBLE PRECISION NOT NULL)"
+            ))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{TABELA}_expira_em ON {TABELA} (expira_em)"))
+
+    def _executar(self, sql: str, params: Dict[str, Any]) -> Tuple[List[tuple], int]:
+        stmt = self._sql_cache.get(sql)
+        if stmt is None:
+            stmt = self._sql_cache[sql] = self._text(sql)
+        with self._engine.begin() as conn:
+            result = conn.execute(stmt, params)
+            linhas = [tuple(r) for r in result] if result.returns_rows else []
+            return linhas, result.rowcount
+
+
+class EstadoMemoria(EstadoCompartilhado):
+    """Backend por processo (testes / um único worker)."""
+
+    def __init__(self):
+        super().__init__()
+        self._dados: Dict[str, list] = {}  # chave -> [valor, contador, expira_em]
+        self._lock = threading.Lock()
+
+    def _viva(self, chave: str, agora: float) -> Optional[list]:
+        item = self._dados.get(chave)
+        if item is not None and item[2] <= agora:
+            del self._dados[chave]
+            return None
+        return item
+
+    def incrementar(self, chave: str, ttl_s: float, quantidade: int = 1) -> int:
+        self._garantir_manutencao()
+        with self._lock:
+            agora = time.time()
+            item = self._viva(chave, agora)
+            if item is None:
+                item = self._dados[chave] = [None, 0, agora + ttl_s]
+            item[1] += quantidade
+            return item[1]
+
+    def definir_se_ausente(self, chave: str, valor: str, ttl_s: float) -> bool:
+        with self._lock:
+            agora = time.time()
+            if self._viva(chave, agora) is not None:
+                return False
+            self._dados[chave] = [valor, 0, agora + ttl_s]
+            return True
+
+    def definir(self, chave: str, valor: str, ttl_s: float) -> None:
+        self._garantir_manutencao()
+        with self._lock:
+            self._dados[chave] = [valor, 0, time.time() + ttl_s]
+
+    def obter(self, chave: str) -> Optional[str]:
+        with self._lock:
+            item = self._viva(chave, time.time())
+            if item is None:
+                return None
+            return item[0] if item[0] is not None else ""
+
+    def contador(self, chave: str) -> int:
+        with self._lock:
+            item = self._viva(chave, time.time())
+            return item[1] if item else 0
+
+    def expira_em(self, chave: str) -> Optional[float]:
+        with self._lock:
+            item = self._viva(chave, time.time())
+            return item[2] if item else None
+
+    def remover(self, chave: str) -> bool:
+        with self._lock:
+            existia = self._viva(chave, time.time()) is not None
+            self._dados.pop(chave, None)
+            return existia
+
+    def remover_prefixo(self, prefixo: str) -> int:
+        with self._lock:
+            chaves = [c for c in self._dados if c.startswith(prefixo)]
+            for chave in chaves:
+                del self._dados[chave]
+            return len(chaves)
+
+    def contar_prefixo(self, prefixo: str) -> int:
+        with self._lock:
+            agora = time.time()
+            return sum(1 for c, item in self._dados.items() if c.startswith(prefixo) and item[2] > agora)
+
+    def limpar_expirados(self, lote: int = LOTE_LIMPEZA) -> int:
+        with self._lock:
+            agora = time.time()
+            expiradas = [c for c, item in self._dados.items() if item[2] <= agora][:lote]
+            for chave in expiradas:
+                del self._dados[chave]
+            return len(expiradas)
+
+
+def criar_estado_compartilhado(backend: Optional[str] = None) -> EstadoCompartilhado:
+    """Cria o backend configurado em ESTADO_COMPARTILHADO_BACKEND."""
+    backend = (backend or os.getenv("ESTADO_COMPARTILHADO_BACKEND", "sqlite")).lower()
+    if backend == "memoria":
+        return EstadoMemoria()
+    if backend == "postgres":
+        return EstadoPostgres()
+    if backend != "sqlite":
+        raise ValueError(f"ESTADO_COMPARTILHADO_BACKEND inválido: {backend}")
+    caminho = os.getenv(
+        "ESTADO_COMPARTILHADO_SQLITE",
+        os.path.join(tempfile.gettempdir(), "portal_pge_estado.db"),
+    )
+    return EstadoSQLite(caminho)
+
+
+_estado: Optional[EstadoCompartilhado] = None
+_estado_lock = threading.Lock()
+
+
+def get_estado_compartilhado() -> EstadoCompartilhado:
+    """Retorna o backend de estado compartilhado do processo."""
+    global _estado
+    if _estado is None:
+        with _estado_lock:
+            if _estado is None:
+                try:
+                    _estado = criar_estado_compartilhado()
+                except Exception as e:
+                    # Sem o backend compartilhado, mantém a proteção por processo
+                    logger.error(f"[EstadoCompartilhado] Backend indisponível ({e}); usando memória do processo")
+                    _estado = EstadoMemoria()
+    return _estado
+
+
+def set_estado_compartilhado(estado: Optional[EstadoCompartilhado]) -> None:
+    """Substitui o backend global (para testes)."""
+    global _estado
+    _estado = estado
+
+
+__all__ = [
+    "EstadoCompartilhado",
+    "EstadoOcupado",
+    "EstadoSQLite",
+    "EstadoPostgres",
+    "EstadoMemoria",
+    "criar_estado_compartilhado",
+    "get_estado_compartilhado",
+    "set_estado_compartilhado",
+]
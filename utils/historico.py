@@ -0,0 +1,124 @@
+# utils/historico.py
+"""
+Consulta paginada das listas de histórico dos sistemas.
+
+PERFORMANCE: as telas de histórico carregavam 50 linhas ORM completas
+(conteúdo gerado em Markdown, JSON do processo, documentos baixados...) e
+devolviam tudo na lista, e a paginação por OFFSET piora conforme o histórico
+cresce. Aqui:
+- load_only(..., raiseload=True): só as colunas da lista saem do banco, e um
+  acesso acidental a uma coluna grande falha em vez de virar uma query por
+  linha;
+- expressões calculadas no SQL (ex.: preview com os primeiros caracteres do
+  conteúdo, autor extraído do JSON) em vez de trazer a coluna inteira;
+- paginação por chave (keyset) em (criado_em, id), servida pelos índices
+  compostos (usuario_id, criado_em, id) de cada tabela;
+- as colunas grandes ficam no endpoint de detalhe (/historico/{id}).
+
+O cursor é opaco para o cliente: vai no cabeçalho X-Proximo-Cursor (listas
+que devolvem um array) ou no campo proximo_cursor da resposta, e volta no
+parâmetro ?cursor= da próxima página.
+
+Autor: LAB/PGE-MS
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, load_only
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 100
+TAMANHO_PREVIEW = 200
+CABECALHO_CURSOR = "X-Proximo-Cursor"
+
+
+@dataclass
+class PaginaHistorico:
+    """Uma página do histórico: (registro, valores calculados no SQL) por item."""
+    itens: List[Tuple[Any, Dict[str, Any]]] = field(default_factory=list)
+    proximo_cursor: Optional[str] = None
+
+
+def codificar_cursor(data: datetime, id: int) -> str:
+    """Cursor opaco com a chave (data, id) do último item da página."""
+    bruto = json.dumps([data.isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Lê o cursor da requisição; cursor adulterado vira 400."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data, id = json.loads(bruto)
+        return datetime.fromisoformat(data), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+
+def preview_sql(coluna, tamanho: int = TAMANHO_PREVIEW):
+    """Primeiros caracteres de uma coluna de texto, cortados no banco."""
+    return func.substr(coluna, 1, tamanho)
+
+
+def consultar_historico(
+    db: Session,
+    modelo,
+    colunas: Sequence,
+    filtros: Sequence = (),
+    extras: Optional[Dict[str, Any]] = None,
+    coluna_data=None,
+    limite: int = LIMITE_PADRAO,
+    cursor: Optional[str] = None,
+) -> PaginaHistorico:
+    """
+    Página do histórico, do mais recente para o mais antigo.
+
+    Args:
+        db: Sessão do banco
+        modelo: Modelo SQLAlchemy (ex.: GeracaoPedidoCalculo)
+        colunas: Colunas carregadas no objeto (as demais ficam de fora)
+        filtros: Condições do WHERE (ex.: usuario_id == current_user.id)
+        extras: {nome: expressão SQL} calculados no banco (preview, contagens...)
+        coluna_data: Coluna de ordenação (padrão: modelo.criado_em)
+        limite: Itens por página (máximo LIMITE_MAXIMO)
+        cursor: Cursor devolvido na página anterior
+
+    Returns:
+        PaginaHistorico com os itens e o cursor da próxima página (None na última)
+    """
+    coluna_data = coluna_data if coluna_data is not None else modelo.criado_em
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    extras = extras or {}
+
+    query = db.query(modelo).options(load_only(coluna_data, *colunas, raiseload=True))
+    for nome, expressao in extras.items():
+        query = query.add_columns(expressao.label(nome))
+    query = query.filter(*filtros)
+
+    if cursor:
+        data, id = decodificar_cursor(cursor)
+        query = query.filter(tuple_(coluna_data, modelo.id) < tuple_(data, id))
+
+    linhas = query.order_by(coluna_data.desc(), modelo.id.desc()).limit(limite + 1).all()
+
+    pagina = PaginaHistorico()
+    for linha in linhas[:limite]:
+        if extras:
+            registro, valores = linha[0], dict(zip(extras, linha[1:]))
+        else:
+            registro, valores = linha, {}
+        pagina.itens.append((registro, valores))
+
+    if len(linhas) > limite:
+        ultimo = pagina.itens[-1][0]
+        data_ultimo = getattr(ultimo, coluna_data.key)
+        if data_ultimo is not None:
+            pagina.proximo_cursor = codificar_cursor(data_ultimo, ultimo.id)
+
+    return pagina
@@ -0,0 +1,271 @@
+# utils/lazy_routers.py
+# -*- coding: utf-8 -*-
+"""
+Registro lazy de routers FastAPI.
+
+PROBLEMA: main.py importava todos os routers dos sistemas no import do módulo.
+Isso carrega PyMuPDF, pymupdf4llm, pandas, Playwright, python-docx e o
+router_extraction (5k linhas) antes do worker aceitar a primeira requisição,
+deixando o cold start e cada restart de worker do uvicorn lentos.
+
+SOLUÇÃO: Os routers são declarados por caminho pontilhado ("pacote.modulo:attr")
+e montados através de rotas stub leves, que ocupam a mesma posição na tabela
+de rotas que o include_router original ocuparia. O módulo pesado é importado:
+- Na primeira requisição que casar com o prefixo do stub; ou
+- Pela tarefa de warm-up em background, depois que o worker já aceita tráfego.
+
+Ao carregar, as rotas reais substituem o stub na MESMA posição, preservando a
+precedência original (ex: /gerador-pecas/api/* antes do catch-all estático
+/gerador-pecas/{filename:path}).
+
+Configuração (variáveis de ambiente):
+- LAZY_ROUTERS: "false" desativa o modo lazy (carrega tudo no registro)
+- ROUTER_WARMUP_DELAY_SECONDS: atraso antes do warm-up (default: 2.0)
+
+Uso:
+    from utils.lazy_routers import LazyRouterSpec, register_lazy_routers, warm_up_routers
+
+    ROUTER_REGISTRY = [
+        LazyRouterSpec("sistemas.pedido_calculo.router:router",
+                       prefix="/pedido-calculo/api"),
+    ]
+    register_lazy_routers(app, ROUTER_REGISTRY)
+
+    # No lifespan, após o startup:
+    task = asyncio.create_task(warm_up_routers(app))
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+LAZY_ROUTERS_ENABLED = os.getenv("LAZY_ROUTERS", "true").strip().lower() not in ("0", "false", "no")
+ROUTER_WARMUP_DELAY_SECONDS = float(os.getenv("ROUTER_WARMUP_DELAY_SECONDS", "2.0"))
+
+
+@dataclass(frozen=True)
+class LazyRouterSpec:
+    """
+    Declaração de um router a ser montado sob demanda.
+
+    Attributes:
+        target: Caminho "pacote.modulo:atributo" do APIRouter
+        prefix: Prefixo passado ao include_router (pode ser vazio)
+        match_prefix: Prefixo de path que dispara o carregamento. Se omitido,
+            usa `prefix`. Necessário quando o router define o próprio prefixo
+            internamente (ex: APIRouter(prefix="/admin/api/performance")).
+        optional: Se True, ImportError não é fatal (router simplesmente não é montado)
+    """
+
+    target: str
+    prefix: str = ""
+    match_prefix: Optional[str] = None
+    optional: bool = False
+
+    @property
+    def module_path(self) -> str:
+        return self.target.split(":", 1)[0]
+
+    @property
+    def attr(self) -> str:
+        return self.target.split(":", 1)[1] if ":" in self.target else "router"
+
+    @property
+    def trigger_prefix(self) -> str:
+        return (self.match_prefix if self.match_prefix is not None else self.prefix).rstrip("/")
+
+
+class LazyRouterRoute(BaseRoute):
+    """
+    Rota stub que representa um router ainda não importado.
+
+    Casa com qualquer path sob `spec.trigger_prefix` enquanto o router não foi
+    carregado. No primeiro match, importa o módulo, substitui a si mesma pelas
+    rotas reais e re-despacha a requisição pelo router da aplicação.
+    """
+
+    def __init__(self, app: FastAPI, spec: LazyRouterSpec):
+        self.app = app
+        self.spec = spec
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    # Propriedades usadas por ferramentas que iteram app.routes
+    @property
+    def path(self) -> str:
+        return f"{self.spec.trigger_prefix}/*"
+
+    @property
+    def name(self) -> str:
+        return f"lazy:{self.spec.target}"
+
+    def matches(self, scope: Scope) -> Tuple[Match, Dict[str, Any]]:
+        if self.loaded or scope["type"] not in ("http", "websocket"):
+            return Match.NONE, {}
+        prefix = self.spec.trigger_prefix
+        path = scope.get("path", "")
+        if not prefix or path == prefix or path.startswith(prefix + "/"):
+            return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params: Any):
+        from starlette.routing import NoMatchFound
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.load_async()
+        # Re-despacha: o stub já foi removido, então as rotas reais (ou o próximo
+        # stub com o mesmo prefixo) assumem a requisição.
+        await self.app.router(scope, receive, send)
+
+    async def load_async(self) -> None:
+        """Importa o módulo fora do event loop e monta as rotas reais."""
+        async with self._lock:
+            if self.loaded:
+                return
+            try:
+                router = await asyncio.to_thread(_import_router, self.spec)
+            except ImportError:
+                if not self.spec.optional:
+                    raise
+                logger.warning(f"[LazyRouters] Router opcional indisponível: {self.spec.target}")
+                router = None
+            _mount_in_place(self.app, self, router)
+
+    def load_sync(self) -> None:
+        """Versão síncrona (modo eager, testes e geração do OpenAPI)."""
+        if self.loaded:
+            return
+        try:
+            router = _import_router(self.spec)
+        except ImportError:
+            if not self.spec.optional:
+                raise
+            logger.warning(f"[LazyRouters] Router opcional indisponível: {self.spec.target}")
+            router = None
+        _mount_in_place(self.app, self, router)
+
+
+def _import_router(spec: LazyRouterSpec):
+    start = time.perf_counter()
+    module = importlib.import_module(spec.module_path)
+    router = getattr(module, spec.attr)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"[LazyRouters] {spec.target} importado em {elapsed_ms:.0f}ms")
+    return router
+
+
+def _mount_in_place(app: FastAPI, stub: LazyRouterRoute, router) -> None:
+    """
+    Inclui o router e move as rotas novas para a posição do stub.
+
+    Executado sempre na thread do event loop (ou antes dele existir), de modo
+    que nenhuma requisição observa a lista de rotas em estado intermediário.
+    """
+    routes = app.router.routes
+    if stub.loaded or stub not in routes:
+        stub.loaded = True
+        return
+
+    new_routes: List[BaseRoute] = []
+    if router is not None:
+        before = len(routes)
+        app.include_router(router, prefix=stub.spec.prefix)
+        new_routes = routes[before:]
+        del routes[before:]
+
+    idx = routes.index(stub)
+    routes[idx:idx + 1] = new_routes
+    stub.loaded = True
+
+    # Schema OpenAPI em cache não conhece as rotas recém-montadas
+    app.openapi_schema = None
+
+
+def register_lazy_routers(
+    app: FastAPI,
+    specs: Sequence[LazyRouterSpec],
+    lazy: Optional[bool] = None
+) -> List[LazyRouterRoute]:
+    """
+    Registra os routers na ordem declarada.
+
+    Args:
+        app: Aplicação FastAPI
+        specs: Declarações dos routers
+        lazy: Força modo lazy/eager (default: LAZY_ROUTERS)
+
+    Returns:
+        Lista de stubs registrados
+    """
+    if lazy is None:
+        lazy = LAZY_ROUTERS_ENABLED
+
+    stubs = getattr(app.state, "lazy_router_stubs", None)
+    if stubs is None:
+        stubs = []
+        app.state.lazy_router_stubs = stubs
+        _install_openapi_hook(app)
+
+    registered = []
+    for spec in specs:
+        stub = LazyRouterRoute(app, spec)
+        app.router.routes.append(stub)
+        stubs.append(stub)
+        registered.append(stub)
+        if not lazy:
+            stub.load_sync()
+    return registered
+
+
+def ensure_routers_loaded(app: FastAPI) -> None:
+    """Carrega sincronamente todos os routers pendentes."""
+    for stub in list(getattr(app.state, "lazy_router_stubs", [])):
+        stub.load_sync()
+
+
+def pending_routers(app: FastAPI) -> List[str]:
+    """Retorna os targets ainda não carregados (diagnóstico)."""
+    return [s.spec.target for s in getattr(app.state, "lazy_router_stubs", []) if not s.loaded]
+
+
+async def warm_up_routers(app: FastAPI, delay: Optional[float] = None) -> None:
+    """
+    Carrega em background todos os routers pendentes.
+
+    Deve ser agendada com asyncio.create_task no lifespan: o atraso inicial
+    deixa o worker começar a aceitar tráfego antes dos imports pesados. Cada
+    import roda em thread (asyncio.to_thread), então o event loop segue livre.
+    """
+    await asyncio.sleep(ROUTER_WARMUP_DELAY_SECONDS if delay is None else delay)
+    start = time.perf_counter()
+    for stub in list(getattr(app.state, "lazy_router_stubs", [])):
+        try:
+            await stub.load_async()
+        except Exception as e:
+            logger.error(f"[LazyRouters] Falha no warm-up de {stub.spec.target}: {e}")
+    logger.info(f"[LazyRouters] Warm-up concluído em {(time.perf_counter() - start):.1f}s")
+
+
+def _install_openapi_hook(app: FastAPI) -> None:
+    """Garante que /openapi.json e /docs enxerguem todas as rotas."""
+    original_openapi = app.openapi
+
+    def openapi_with_all_routers():
+        if pending_routers(app):
+            ensure_routers_loaded(app)
+        return original_openapi()
+
+    app.openapi = openapi_with_all_routers
@@ -0,0 +1,570 @@
+# utils/llm_admission.py
+# -*- coding: utf-8 -*-
+"""
+Controle de admissão global para chamadas a LLM.
+
+PERFORMANCE: Sem coordenação, cada chamador (projeto do classificador, lote de
+matrículas, cumprimento beta, streams do gerador) dispara requisições por
+conta própria; quando a cota estoura, todos recebem 429 e fazem backoff
+independente, e o usuário interativo espera atrás dos jobs em lote.
+
+Este módulo mantém, por modelo:
+- Requisições e tokens estimados em voo
+- Limite de concorrência adaptativo (AIMD): 429/503 ou latência acima do
+  alvo reduzem o limite multiplicativamente; sucessos com o limite saturado
+  aumentam ~1 por "rodada" (limite += 1/limite)
+- Fila com prioridades e Weighted Fair Queuing: cada pedido recebe uma tag
+  virtual max(tempo_virtual, última_tag_da_classe) + 1/peso e a fila libera
+  sempre a menor tag. Interativo > documento > lote, sem inanição do lote.
+
+Coordenação entre workers (opcional): com LLM_ADMISSAO_DIR_SLOTS definido,
+cada requisição admitida também precisa de um slot global, obtido com flock
+em um de LLM_ADMISSAO_LIMITE_GLOBAL arquivos do diretório. O lock é liberado
+pelo SO se o processo morrer.
+
+USO:
+    from utils.llm_admission import get_admissao_llm, prioridade_llm, PRIORIDADE_LOTE
+
+    async with get_admissao_llm().admitir(modelo, tokens_estimados=1200) as permissao:
+        response = await client.post(url, json=payload)
+        permissao.registrar(response.status_code)
+
+    # Chamadores em lote marcam a prioridade para todas as chamadas internas
+    with prioridade_llm(PRIORIDADE_LOTE):
+        await processar_lote()
+
+CONFIGURAÇÃO (variáveis de ambiente):
+    LLM_ADMISSAO_HABILITADA       true/false (default: true)
+    LLM_ADMISSAO_LIMITE_INICIAL   concorrência inicial por modelo (default: 8)
+    LLM_ADMISSAO_LIMITE_MIN       piso do limite (default: 1)
+    LLM_ADMISSAO_LIMITE_MAX       teto do limite (default: 32)
+    LLM_ADMISSAO_MAX_TOKENS       tokens estimados em voo por modelo (0 = sem limite)
+    LLM_ADMISSAO_LATENCIA_ALVO_S  latência acima da qual o limite é reduzido (default: 60)
+    LLM_ADMISSAO_DIR_SLOTS        diretório dos slots globais (default: desabilitado)
+    LLM_ADMISSAO_LIMITE_GLOBAL    slots globais por modelo (default: LIMITE_MAX)
+
+Autor: LAB/PGE-MS
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows (run.bat): coordenação entre workers indisponível
+    fcntl = None
+
+# Tenta usar logging estruturado
+try:
+    from utils.logging_config import get_logger
+    logger = get_logger(__name__)
+except ImportError:
+    logger = logging.getLogger(__name__)
+
+
+# ============================================
+# PRIORIDADES
+# ============================================
+
+PRIORIDADE_INTERATIVO = "interativo"   # Streams acompanhados pelo usuário
+PRIORIDADE_DOCUMENTO = "documento"     # Processamento de um documento/processo
+PRIORIDADE_LOTE = "lote"               # Jobs em lote (classificador, matrículas, beta)
+
+PESOS_PRIORIDADE: Dict[str, int] = {
+    PRIORIDADE_INTERATIVO: 8,
+    PRIORIDADE_DOCUMENTO: 3,
+    PRIORIDADE_LOTE: 1,
+}
+
+# Status HTTP tratados como sinal de sobrecarga do upstream
+STATUS_SOBRECARGA = {429, 503}
+
+# Buckets do histograma de espera na fila (segundos)
+BUCKETS_ESPERA = [0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, float("inf")]
+
+_prioridade_atual: ContextVar[Optional[str]] = ContextVar("prioridade_llm", default=None)
+
+
+@contextmanager
+def prioridade_llm(prioridade: str) -> Iterator[None]:
+    """
+    Define a prioridade das chamadas LLM feitas dentro do bloco.
+
+    Vale para a task corrente e para tasks criadas dentro dele (contextvars),
+    e também para asyncio.run() chamado em thread de background.
+    """
+    if prioridade not in PESOS_PRIORIDADE:
+        raise ValueError(f"Prioridade inválida: {prioridade}")
+    token = _prioridade_atual.set(prioridade)
+    try:
+        yield
+    finally:
+        _prioridade_atual.reset(token)
+
+
+def prioridade_corrente(padrao: str = PRIORIDADE_DOCUMENTO) -> str:
+    """Prioridade definida por prioridade_llm() ou o padrão do chamador."""
+    return _prioridade_atual.get() or padrao
+
+
+# ============================================
+# COORDENAÇÃO ENTRE WORKERS
+# ============================================
+
+class CoordenadorSlotsArquivo:
+    """
+    Limite global de requisições em voo entre processos via flock.
+
+    Cada modelo tem `limite_global` arquivos de slot; uma requisição segura o
+    flock exclusivo de um deles enquanto está em voo.
+    """
+
+    def __init__(self, diretorio: str, limite_global: int, intervalo_s: float = 0.05):
+        if fcntl is None:
+            raise RuntimeError("fcntl indisponível nesta plataforma")
+        self.diretorio = diretorio
+        self.limite_global = max(1, limite_global)
+        self.intervalo_s = intervalo_s
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _tentar(self, modelo: str) -> Optional[int]:
+        nome = re.sub(r"[^A-Za-z0-9_.-]", "_", modelo)
+        for i in range(self.limite_global):
+            fd = os.open(os.path.join(self.diretorio, f"{nome}.{i}.slot"), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    async def adquirir(self, modelo: str) -> int:
+        while True:
+            fd = self._tentar(modelo)
+            if fd is not None:
+                return fd
+            await asyncio.sleep(self.intervalo_s)
+
+    def liberar(self, fd: int) -> None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+# ============================================
+# ESTADO POR MODELO
+# ============================================
+
+@dataclass(order=True)
+class _Espera:
+    tag: float
+    seq: int
+    prioridade: str = field(compare=False)
+    tokens: int = field(compare=False)
+    loop: asyncio.AbstractEventLoop = field(compare=False, repr=False)
+    future: asyncio.Future = field(compare=False, repr=False)
+    inicio: float = field(compare=False)
+    concedida: bool = field(default=False, compare=False)
+    cancelada: bool = field(default=False, compare=False)
+
+
+@dataclass
+class _EstadoModelo:
+    limite: float
+    em_voo: int = 0
+    tokens_em_voo: int = 0
+    fila: List[_Espera] = field(default_factory=list)
+    tempo_virtual: float = 0.0
+    ultima_tag: Dict[str, float] = field(default_factory=dict)
+    ultima_reducao: float = float("-inf")
+    sobrecargas: int = 0
+    admitidos: int = 0
+
+    def aguardando(self) -> Dict[str, int]:
+        contagem = {p: 0 for p in PESOS_PRIORIDADE}
+        for espera in self.fila:
+            if not espera.cancelada:
+                contagem[espera.prioridade] += 1
+        return contagem
+
+
+@dataclass
+class _EstatisticasEspera:
+    buckets: List[int] = field(default_factory=lambda: [0] * len(BUCKETS_ESPERA))
+    soma_s: float = 0.0
+    total: int = 0
+
+    def registrar(self, espera_s: float) -> None:
+        for i, limite in enumerate(BUCKETS_ESPERA):
+            if espera_s <= limite:
+                self.buckets[i] += 1
+                break
+        self.soma_s += espera_s
+        self.total += 1
+
+
+class Permissao:
+    """Requisição admitida; informa o resultado para o ajuste AIMD."""
+
+    def __init__(self, modelo: str, prioridade: str, tokens: int, espera_s: float):
+        self.modelo = modelo
+        self.prioridade = prioridade
+        self.tokens = tokens
+        self.espera_s = espera_s
+        self.inicio = time.monotonic()
+        self.status: Optional[int] = None
+        self.latencia_s: Optional[float] = None
+
+    def registrar(self, status: int, latencia_s: Optional[float] = None) -> None:
+        """
+        Registra o status HTTP da resposta.
+
+        A latência padrão é o tempo desde a admissão até esta chamada
+        (para streams, chamar ao receber os headers mede o TTFB).
+        """
+        self.status = status
+        self.latencia_s = latencia_s if latencia_s is not None else time.monotonic() - self.inicio
+
+
+# ============================================
+# CONTROLADOR
+# ============================================
+
+class ControladorAdmissao:
+    """
+    Controlador de admissão por modelo com AIMD e WFQ.
+
+    Thread-safe: o estado fica sob um threading.Lock e a liberação de quem
+    espera usa call_soon_threadsafe no loop do chamador, porque tasks de
+    background (ex.: lote de matrículas) rodam asyncio.run() em outra thread.
+    """
+
+    def __init__(
+        self,
+        limite_inicial: float = 8,
+        limite_min: float = 1,
+        limite_max: float = 32,
+        max_tokens_em_voo: int = 0,
+        latencia_alvo_s: float = 60.0,
+        fator_reducao: float = 0.5,
+        fator_reducao_latencia: float = 0.9,
+        intervalo_reducao_s: float = 2.0,
+        habilitado: bool = True,
+        coordenador: Optional[CoordenadorSlotsArquivo] = None,
+    ):
+        self.limite_inicial = limite_inicial
+        self.limite_min = max(1.0, limite_min)
+        self.limite_max = max(self.limite_min, limite_max)
+        self.max_tokens_em_voo = max_tokens_em_voo
+        self.latencia_alvo_s = latencia_alvo_s
+        self.fator_reducao = fator_reducao
+        self.fator_reducao_latencia = fator_reducao_latencia
+        self.intervalo_reducao_s = intervalo_reducao_s
+        self.habilitado = habilitado
+        self.coordenador = coordenador
+
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._modelos: Dict[str, _EstadoModelo] = {}
+        self._esperas: Dict[str, _EstatisticasEspera] = {p: _EstatisticasEspera() for p in PESOS_PRIORIDADE}
+
+    @classmethod
+    def from_env(cls) -> "ControladorAdmissao":
+        limite_max = float(os.getenv("LLM_ADMISSAO_LIMITE_MAX", "32"))
+        coordenador = None
+        diretorio = os.getenv("LLM_ADMISSAO_DIR_SLOTS")
+        if diretorio:
+            try:
+                coordenador = CoordenadorSlotsArquivo(
+                    diretorio, int(os.getenv("LLM_ADMISSAO_LIMITE_GLOBAL", str(int(limite_max))))
+                )
+            except RuntimeError as e:
+                logger.warning(f"[LLM Admissão] Coordenação entre workers desabilitada: {e}")
+        return cls(
+            limite_inicial=float(os.getenv("LLM_ADMISSAO_LIMITE_INICIAL", "8")),
+            limite_min=float(os.getenv("LLM_ADMISSAO_LIMITE_MIN", "1")),
+            limite_max=limite_max,
+            max_tokens_em_voo=int(os.getenv("LLM_ADMISSAO_MAX_TOKENS", "0")),
+            latencia_alvo_s=float(os.getenv("LLM_ADMISSAO_LATENCIA_ALVO_S", "60")),
+            habilitado=os.getenv("LLM_ADMISSAO_HABILITADA", "true").lower() == "true",
+            coordenador=coordenador,
+        )
+
+    # ------------------------------------------------------------------
+    # Admissão
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def admitir(
+        self,
+        modelo: str,
+        prioridade: Optional[str] = None,
+        tokens_estimados: int = 0,
+    ) -> AsyncIterator[Permissao]:
+        """
+        Aguarda vaga para uma requisição ao modelo e a libera ao sair.
+
+        Args:
+            modelo: Nome do modelo (cada modelo tem limite próprio)
+            prioridade: Classe da requisição (default: prioridade_corrente())
+            tokens_estimados: Tokens de entrada estimados
+        """
+        prioridade = prioridade or prioridade_corrente()
+        if prioridade not in PESOS_PRIORIDADE:
+            raise ValueError(f"Prioridade inválida: {prioridade}")
+
+        if not self.habilitado:
+            yield Permissao(modelo, prioridade, tokens_estimados, 0.0)
+            return
+
+        inicio = time.monotonic()
+        await self._aguardar_vaga(modelo, prioridade, tokens_estimados)
+
+        fd_slot = None
+        permissao = None
+        try:
+            if self.coordenador is not None:
+                fd_slot = await self.coordenador.adquirir(modelo)
+            espera_s = time.monotonic() - inicio
+            with self._lock:
+                self._esperas[prioridade].registrar(espera_s)
+            permissao = Permissao(modelo, prioridade, tokens_estimados, espera_s)
+            yield permissao
+        finally:
+            if fd_slot is not None:
+                self.coordenador.liberar(fd_slot)
+            if permissao is not None:
+                self._liberar(modelo, tokens_estimados, permissao.status, permissao.latencia_s)
+            else:
+                self._liberar(modelo, tokens_estimados, None, None)
+
+    async def _aguardar_vaga(self, modelo: str, prioridade: str, tokens: int) -> None:
+        with self._lock:
+            estado = self._estado(modelo)
+            if not any(not e.cancelada for e in estado.fila) and self._cabe(estado, tokens):
+                self._ocupar(estado, tokens)
+                return
+
+            tag = max(estado.tempo_virtual, estado.ultima_tag.get(prioridade, 0.0)) + 1.0 / PESOS_PRIORIDADE[prioridade]
+            estado.ultima_tag[prioridade] = tag
+            loop = asyncio.get_running_loop()
+            espera = _Espera(tag, next(self._seq), prioridade, tokens, loop, loop.create_future(), time.monotonic())
+            heapq.heappush(estado.fila, espera)
+
+        try:
+            await espera.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if not espera.concedida:
+                    espera.cancelada = True
+                    self._despachar(modelo, estado)
+                    raise
+            # Vaga concedida mas a task foi cancelada: devolve se _entregar não devolveu
+            if not espera.future.cancelled():
+                self._liberar(modelo, tokens, None, None)
+            raise
+
+    def _estado(self, modelo: str) -> _EstadoModelo:
+        estado = self._modelos.get(modelo)
+        if estado is None:
+            limite = min(max(self.limite_inicial, self.limite_min), self.limite_max)
+            estado = self._modelos[modelo] = _EstadoModelo(limite=limite)
+        return estado
+
+    def _cabe(self, estado: _EstadoModelo, tokens: int) -> bool:
+        if estado.em_voo >= int(estado.limite):
+            return False
+        if self.max_tokens_em_voo and estado.em_voo:
+            return estado.tokens_em_voo + tokens <= self.max_tokens_em_voo
+        return True
+
+    def _ocupar(self, estado: _EstadoModelo, tokens: int) -> None:
+        estado.em_voo += 1
+        estado.tokens_em_voo += tokens
+        estado.admitidos += 1
+
+    def _despachar(self, modelo: str, estado: _EstadoModelo) -> None:
+        """Concede vagas livres às esperas de menor tag (chamado sob lock)."""
+        while estado.fila:
+            espera = estado.fila[0]
+            if espera.cancelada:
+                heapq.heappop(estado.fila)
+                continue
+            if not self._cabe(estado, espera.tokens):
+                break
+            heapq.heappop(estado.fila)
+            self._ocupar(estado, espera.tokens)
+            espera.concedida = True
+            estado.tempo_virtual = espera.tag
+            espera.loop.call_soon_threadsafe(self._entregar, modelo, espera)
+
+    def _entregar(self, modelo: str, espera: _Espera) -> None:
+        if espera.future.cancelled():
+            self._liberar(modelo, espera.tokens, None, None)
+        else:
+            espera.future.set_result(None)
+
+    # ------------------------------------------------------------------
+    # Liberação e AIMD
+    # ------------------------------------------------------------------
+
+    def _liberar(self, modelo: str, tokens: int, status: Optional[int], latencia_s: Optional[float]) -> None:
+        with self._lock:
+            estado = self._estado(modelo)
+            saturado = estado.em_voo >= int(estado.limite)
+            estado.em_voo = max(0, estado.em_voo - 1)
+            estado.tokens_em_voo = max(0, estado.tokens_em_voo - tokens)
+
+            if status in STATUS_SOBRECARGA:
+                estado.sobrecargas += 1
+                self._reduzir(modelo, estado, self.fator_reducao, f"HTTP {status}")
+            elif status is not None and 200 <= status < 300:
+                if latencia_s is not None and latencia_s > self.latencia_alvo_s:
+                    self._reduzir(modelo, estado, self.fator_reducao_latencia, f"latência {latencia_s:.1f}s")
+                elif saturado:
+                    estado.limite = min(self.limite_max, estado.limite + 1.0 / estado.limite)
+
+            self._despachar(modelo, estado)
+
+    def _reduzir(self, modelo: str, estado: _EstadoModelo, fator: float, motivo: str) -> None:
+        # Uma rajada de 429 das requisições já em voo conta como um único sinal
+        agora = time.monotonic()
+        if agora - estado.ultima_reducao < self.intervalo_reducao_s:
+            return
+        estado.ultima_reducao = agora
+        anterior = estado.limite
+        estado.limite = max(self.limite_min, estado.limite * fator)
+        logger.warning(
+            f"[LLM Admissão] {modelo}: limite {anterior:.1f} -> {estado.limite:.1f} ({motivo})"
+        )
+
+    # ------------------------------------------------------------------
+    # Observabilidade
+    # ------------------------------------------------------------------
+
+    def limite(self, modelo: str) -> float:
+        with self._lock:
+            return self._estado(modelo).limite
+
+    def snapshot(self) -> Dict:
+        """Estado atual para diagnóstico (get_service_status)."""
+        with self._lock:
+            return {
+                "habilitado": self.habilitado,
+                "coordenado_entre_workers": self.coordenador is not None,
+                "modelos": {
+                    modelo: {
+                        "limite": round(estado.limite, 2),
+                        "em_voo": estado.em_voo,
+                        "tokens_em_voo": estado.tokens_em_voo,
+                        "aguardando": estado.aguardando(),
+                        "admitidos": estado.admitidos,
+                        "sobrecargas": estado.sobrecargas,
+                    }
+                    for modelo, estado in self._modelos.items()
+                },
+                "espera_media_ms": {
+                    prioridade: round(est.soma_s / est.total * 1000, 1) if est.total else 0.0
+                    for prioridade, est in self._esperas.items()
+                },
+            }
+
+    def texto_prometheus(self) -> str:
+        """Métricas em formato Prometheus (anexadas ao /metrics)."""
+        with self._lock:
+            lines = []
+
+            lines.append("# HELP portal_pge_llm_em_voo Requisições LLM em voo por modelo")
+            lines.append("# TYPE portal_pge_llm_em_voo gauge")
+            for modelo, estado in self._modelos.items():
+                lines.append(f'portal_pge_llm_em_voo{{modelo="{modelo}"}} {estado.em_voo}')
+            lines.append("")
+
+            lines.append("# HELP portal_pge_llm_tokens_em_voo Tokens estimados em voo por modelo")
+            lines.append("# TYPE portal_pge_llm_tokens_em_voo gauge")
+            for modelo, estado in self._modelos.items():
+                lines.append(f'portal_pge_llm_tokens_em_voo{{modelo="{modelo}"}} {estado.tokens_em_voo}')
+            lines.append("")
+
+            lines.append("# HELP portal_pge_llm_limite_concorrencia Limite adaptativo (AIMD) por modelo")
+            lines.append("# TYPE portal_pge_llm_limite_concorrencia gauge")
+            for modelo, estado in self._modelos.items():
+                lines.append(f'portal_pge_llm_limite_concorrencia{{modelo="{modelo}"}} {estado.limite:.2f}')
+            lines.append("")
+
+            lines.append("# HELP portal_pge_llm_fila Requisições LLM aguardando admissão")
+            lines.append("# TYPE portal_pge_llm_fila gauge")
+            for modelo, estado in self._modelos.items():
+                for prioridade, quantidade in estado.aguardando().items():
+                    lines.append(f'portal_pge_llm_fila{{modelo="{modelo}",prioridade="{prioridade}"}} {quantidade}')
+            lines.append("")
+
+            lines.append("# HELP portal_pge_llm_sobrecarga_total Respostas 429/503 recebidas por modelo")
+            lines.append("# TYPE portal_pge_llm_sobrecarga_total counter")
+            for modelo, estado in self._modelos.items():
+                lines.append(f'portal_pge_llm_sobrecarga_total{{modelo="{modelo}"}} {estado.sobrecargas}')
+            lines.append("")
+
+            lines.append("# HELP portal_pge_llm_espera_fila_seconds Tempo de espera na fila de admissão")
+            lines.append("# TYPE portal_pge_llm_espera_fila_seconds histogram")
+            for prioridade, est in self._esperas.items():
+                acumulado = 0
+                for bucket, quantidade in zip(BUCKETS_ESPERA, est.buckets):
+                    acumulado += quantidade
+                    rotulo = "+Inf" if bucket == float("inf") else f"{bucket}"
+                    lines.append(f'portal_pge_llm_espera_fila_seconds_bucket{{prioridade="{prioridade}",le="{rotulo}"}} {acumulado}')
+                lines.append(f'portal_pge_llm_espera_fila_seconds_sum{{prioridade="{prioridade}"}} {est.soma_s:.4f}')
+                lines.append(f'portal_pge_llm_espera_fila_seconds_count{{prioridade="{prioridade}"}} {est.total}')
+            lines.append("")
+
+            return "\n".join(lines)
+
+
+# ============================================
+# INSTÂNCIA GLOBAL (SINGLETON)
+# ============================================
+
+_admissao_llm: Optional[ControladorAdmissao] = None
+_admissao_lock = threading.Lock()
+
+
+def get_admissao_llm() -> ControladorAdmissao:
+    """Retorna o controlador de admissão do processo."""
+    global _admissao_llm
+    if _admissao_llm is None:
+        with _admissao_lock:
+            if _admissao_llm is None:
+                _admissao_llm = ControladorAdmissao.from_env()
+    return _admissao_llm
+
+
+def set_admissao_llm(controlador: Optional[ControladorAdmissao]) -> None:
+    """Substitui o controlador global (para testes)."""
+    global _admissao_llm
+    _admissao_llm = controlador
+
+
+__all__ = [
+    "PRIORIDADE_INTERATIVO",
+    "PRIORIDADE_DOCUMENTO",
+    "PRIORIDADE_LOTE",
+    "PESOS_PRIORIDADE",
+    "ControladorAdmissao",
+    "CoordenadorSlotsArquivo",
+    "Permissao",
+    "prioridade_llm",
+    "prioridade_corrente",
+    "get_admissao_llm",
+    "set_admissao_llm",
+]
@@ -25,7 +25,9 @@ Uso:
 """
 
 import os
+import time
 import logging
+from limits.storage import Storage
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -33,6 +35,8 @@ from fastapi import Request
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from utils.estado_compartilhado import EstadoOcupado, get_estado_compartilhado
+
 logger = logging.getLogger(__name__)
 
 # ==================================================
@@ -88,6 +92,69 @@ def get_user_identifier(request: Request) -> str:
     return f"ip:{get_real_ip(request)}"
 
 
+# ==================================================
+# STORAGE COMPARTILHADO ENTRE WORKERS
+# ==================================================
+
+class EstadoCompartilhadoStorage(Storage):
+    """
+    Storage do `limits` sobre o estado compartilhado (utils/estado_compartilhado.py).
+
+    SECURITY: Com "memory://" cada worker conta sozinho e o limite real vira
+    N x o configurado. Aqui o contador da janela fixa é um incremento atômico
+    com expiração, visto por todos os workers.
+
+    URI: "estado://" (backend definido por ESTADO_COMPARTILHADO_BACKEND).
+    Suporta a estratégia fixed-window (padrão do slowapi).
+
+    PERFORMANCE: roda dentro do event loop. Se o lock de escrita do backend
+    não vier dentro da espera curta (EstadoOcupado), a requisição passa sem
+    contar (fail open) em vez de segurar o loop.
+    """
+
+    STORAGE_SCHEME = ["estado"]
+    PREFIXO = "rl:"
+
+    def __init__(self, uri: str = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return Exception
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        try:
+            return get_estado_compartilhado().incrementar(self.PREFIXO + key, expiry, amount)
+        except EstadoOcupado as e:
+            logger.warning(f"Rate limit não contabilizado para {key}: {e}")
+            return 0
+
+    def get(self, key: str) -> int:
+        try:
+            return get_estado_compartilhado().contador(self.PREFIXO + key)
+        except EstadoOcupado:
+            return 0
+
+    def get_expiry(self, key: str) -> float:
+        try:
+            return get_estado_compartilhado().expira_em(self.PREFIXO + key) or time.time()
+        except EstadoOcupado:
+            return time.time()
+
+    def check(self) -> bool:
+        try:
+            get_estado_compartilhado().contador(self.PREFIXO + "__check__")
+            return True
+        except Exception:
+            return False
+
+    def reset(self) -> int:
+        return get_estado_compartilhado().remover_prefixo(self.PREFIXO)
+
+    def clear(self, key: str) -> None:
+        get_estado_compartilhado().remover(self.PREFIXO + key)
+
+
 # ==================================================
 # LIMITER INSTANCE
 # ==================================================
@@ -101,8 +168,8 @@ RATE_LIMIT_EXPORT = os.getenv("RATE_LIMIT_EXPORT", "3/minute")
 RATE_LIMIT_HEAVY = os.getenv("RATE_LIMIT_HEAVY", "5/minute")
 RATE_LIMIT_UPLOAD = os.getenv("RATE_LIMIT_UPLOAD", "10/minute")
 
-# Storage: memória por padrão, Redis em produção
-RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "memory://")
+# Storage: estado compartilhado entre workers por padrão (ou Redis via URI)
+RATE_LIMIT_STORAGE = os.getenv("RATE_LIMIT_STORAGE", "estado://")
 
 limiter = Limiter(
     key_func=get_real_ip,
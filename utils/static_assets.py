@@ -0,0 +1,383 @@
+# utils/static_assets.py
+# -*- coding: utf-8 -*-
+"""
+Pipeline de assets estáticos com fingerprint, cache imutável e variantes
+pré-comprimidas.
+
+PROBLEMA: os bundles JS (gerados pelo esbuild a partir de frontend/src) e os
+scripts de frontend/static eram servidos sem Cache-Control útil e sem
+compressão. A cada carregamento de página o navegador revalidava ou baixava
+novamente ~2 MB de JavaScript.
+
+SOLUÇÃO:
+- Build (`python -m utils.static_assets`, executado ao final do
+  `npm run build`): para cada .js/.css gera uma cópia com hash do conteúdo no
+  nome (app.js -> app.3f2a9c1b0d.js), as variantes .br/.gz dessa cópia e o
+  manifesto frontend/static/asset-manifest.json (original -> com hash).
+- Templates: `asset_url("/static/js/security.js")` nos templates Jinja2 e
+  reescrita de src/href no index.html dos sistemas resolvem a URL pelo
+  manifesto. Sem manifesto (dev), a URL original é mantida.
+- Servidor: arquivos com hash recebem
+  `Cache-Control: public, max-age=31536000, immutable` no mount público
+  /static e `private` nas rotas autenticadas dos sistemas; os demais recebem
+  `no-cache` com ETag/Last-Modified e resposta 304. A variante .br/.gz é
+  escolhida pelo Accept-Encoding (com `Vary: Accept-Encoding`).
+
+Uso:
+    from utils.static_assets import AssetStaticFiles, asset_url
+
+    app.mount("/static", AssetStaticFiles(directory="frontend/static"), name="static")
+    templates.env.globals["asset_url"] = asset_url
+
+Autor: LAB/PGE-MS
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+from email.utils import parsedate
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+MANIFESTO_PATH = BASE_DIR / "frontend" / "static" / "asset-manifest.json"
+
+# Diretórios cujos .js/.css recebem fingerprint (relativos a BASE_DIR)
+DIRETORIOS_ASSETS = ["frontend/static", "sistemas/*/templates"]
+EXTENSOES_FINGERPRINT = {".js", ".css"}
+
+# Prefixos de URL montados sobre diretórios de assets (URL -> diretório)
+PREFIXOS_URL = {"/static/": "frontend/static/"}
+
+TAMANHO_HASH = 10
+RE_NOME_COM_HASH = re.compile(r"\.[0-9a-f]{%d}\.[A-Za-z0-9]+$" % TAMANHO_HASH)
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+# Rotas protegidas por autenticação: proxies compartilhados não podem guardar
+CACHE_IMUTAVEL_PRIVADO = "private, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+# Ordem de preferência das variantes pré-comprimidas
+VARIANTES_COMPRESSAO: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+
+def tem_hash(nome: str) -> bool:
+    """Indica se o nome de arquivo contém fingerprint de conteúdo."""
+    return bool(RE_NOME_COM_HASH.search(nome))
+
+
+def hash_conteudo(dados: bytes) -> str:
+    return hashlib.sha256(dados).hexdigest()[:TAMANHO_HASH]
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def _listar_assets(raiz: Path, diretorios: Iterable[str]) -> List[Path]:
+    arquivos = []
+    for padrao in diretorios:
+        for diretorio in sorted(raiz.glob(padrao)):
+            if not diretorio.is_dir():
+                continue
+            for arquivo in sorted(diretorio.rglob("*")):
+                if (arquivo.is_file()
+                        and arquivo.suffix in EXTENSOES_FINGERPRINT
+                        and not tem_hash(arquivo.name)):
+                    arquivos.append(arquivo)
+    return arquivos
+
+
+def _escrever_comprimidos(arquivo: Path, dados: bytes) -> None:
+    # mtime=0: saída determinística (mesmo conteúdo -> mesmos bytes)
+    arquivo.with_name(arquivo.name + ".gz").write_bytes(gzip.compress(dados, compresslevel=9, mtime=0))
+    if brotli is not None:
+        arquivo.with_name(arquivo.name + ".br").write_bytes(brotli.compress(dados, quality=11))
+
+
+def _remover_versoes_antigas(arquivo: Path, atual: str) -> None:
+    padrao = re.compile(
+        re.escape(arquivo.stem) + r"\.[0-9a-f]{%d}" % TAMANHO_HASH
+        + re.escape(arquivo.suffix) + r"(\.br|\.gz)?$"
+    )
+    for irmao in arquivo.parent.iterdir():
+        if padrao.match(irmao.name) and not irmao.name.startswith(atual):
+            irmao.unlink()
+
+
+def construir_assets(
+    raiz: Path = BASE_DIR,
+    diretorios: Iterable[str] = DIRETORIOS_ASSETS,
+    manifesto_path: Optional[Path] = None
+) -> Dict[str, str]:
+    """
+    Gera cópias com hash, variantes .br/.gz e o manifesto.
+
+    Args:
+        raiz: Raiz do projeto (caminhos do manifesto são relativos a ela)
+        diretorios: Padrões glob dos diretórios de assets
+        manifesto_path: Destino do manifesto (default: frontend/static/asset-manifest.json)
+
+    Returns:
+        Mapeamento caminho original -> caminho com hash (POSIX, relativos à raiz)
+    """
+    manifesto_path = manifesto_path or raiz / "frontend" / "static" / "asset-manifest.json"
+    mapeamento: Dict[str, str] = {}
+
+    for arquivo in _listar_assets(raiz, diretorios):
+        dados = arquivo.read_bytes()
+        nome_hash = f"{arquivo.stem}.{hash_conteudo(dados)}{arquivo.suffix}"
+        destino = arquivo.with_name(nome_hash)
+
+        if not destino.exists():
+            destino.write_bytes(dados)
+            _escrever_comprimidos(destino, dados)
+        _remover_versoes_antigas(arquivo, nome_hash)
+
+        mapeamento[arquivo.relative_to(raiz).as_posix()] = destino.relative_to(raiz).as_posix()
+
+    manifesto_path.parent.mkdir(parents=True, exist_ok=True)
+    manifesto_path.write_text(
+        json.dumps({"arquivos": mapeamento}, indent=2, sort_keys=True),
+        encoding="utf-8"
+    )
+    logger.info(f"[Assets] {len(mapeamento)} arquivo(s) com fingerprint -> {manifesto_path}")
+    return mapeamento
+
+
+# ============================================================================
+# MANIFESTO
+# ============================================================================
+
+class ManifestoAssets:
+    """
+    Manifesto carregado sob demanda e recarregado quando o arquivo muda.
+
+    Ausência do manifesto não é erro: as URLs originais são mantidas.
+    """
+
+    def __init__(self, caminho: Path = MANIFESTO_PATH, raiz: Path = BASE_DIR):
+        self.caminho = caminho
+        self.raiz = raiz
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._arquivos: Dict[str, str] = {}
+
+    def _atualizar(self) -> None:
+        try:
+            mtime = self.caminho.stat().st_mtime
+        except OSError:
+            self._mtime, self._arquivos = None, {}
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            try:
+                with open(self.caminho, "r", encoding="utf-8") as f:
+                    self._arquivos = json.load(f).get("arquivos", {})
+                self._mtime = mtime
+            except (OSError, ValueError) as e:
+                logger.warning(f"[Assets] Manifesto inválido em {self.caminho}: {e}")
+                self._arquivos = {}
+
+    @property
+    def versao(self) -> Optional[float]:
+        self._atualizar()
+        return self._mtime
+
+    def resolver(self, caminho_relativo: str) -> str:
+        """Caminho (relativo à raiz) com hash, ou o próprio caminho se ausente."""
+        self._atualizar()
+        return self._arquivos.get(caminho_relativo, caminho_relativo)
+
+    def url(self, url: str) -> str:
+        """Resolve uma URL absoluta montada (ex: /static/js/app.js)."""
+        base, sep, sufixo = url.partition("?")
+        for prefixo_url, diretorio in PREFIXOS_URL.items():
+            if base.startswith(prefixo_url):
+                relativo = diretorio + base[len(prefixo_url):]
+                resolvido = self.resolver(relativo)
+                if resolvido != relativo:
+                    return prefixo_url + resolvido[len(diretorio):]
+        return url
+
+    def reescrever_html(self, html: str, diretorio: Path) -> str:
+        """
+        Reescreve src/href de .js/.css no HTML servido a partir de `diretorio`.
+
+        URLs relativas são resolvidas contra o diretório do HTML; URLs
+        absolutas usam os prefixos montados (PREFIXOS_URL).
+        """
+        try:
+            base = diretorio.resolve().relative_to(self.raiz.resolve())
+        except ValueError:
+            return html
+
+        def _substituir(match: re.Match) -> str:
+            atributo, url = match.group(1), match.group(2)
+            if url.startswith("/"):
+                return f'{atributo}="{self.url(url)}"'
+            if "://" in url or url.startswith("//"):
+                return match.group(0)
+            caminho = PurePosixPath(base.as_posix(), url)
+            resolvido = self.resolver(caminho.as_posix())
+            if resolvido == caminho.as_posix():
+                return match.group(0)
+            return f'{atributo}="{str(PurePosixPath(url).with_name(PurePosixPath(resolvido).name))}"'
+
+        return re.sub(r'\b(src|href)="([^"?#]+\.(?:js|css))"', _substituir, html)
+
+
+_manifesto = ManifestoAssets()
+
+
+def get_manifesto() -> ManifestoAssets:
+    return _manifesto
+
+
+def asset_url(url: str) -> str:
+    """Global Jinja2: URL com fingerprint do asset (ou a original)."""
+    return _manifesto.url(url)
+
+
+_cache_html: Dict[Tuple[str, float, Optional[float]], str] = {}
+
+
+def html_com_assets(caminho: Path) -> str:
+    """Lê o HTML e reescreve as referências de assets (cacheado por mtime)."""
+    chave = (str(caminho), caminho.stat().st_mtime, _manifesto.versao)
+    html = _cache_html.get(chave)
+    if html is None:
+        html = _manifesto.reescrever_html(caminho.read_text(encoding="utf-8"), caminho.parent)
+        if len(_cache_html) > 64:
+            _cache_html.clear()
+        _cache_html[chave] = html
+    return html
+
+
+# ============================================================================
+# RESPOSTAS
+# ============================================================================
+
+def _encodings_aceitos(request_headers: Headers) -> Dict[str, float]:
+    aceitos = {}
+    for item in request_headers.get("accept-encoding", "").split(","):
+        partes = item.strip().split(";")
+        if not partes[0]:
+            continue
+        q = 1.0
+        for param in partes[1:]:
+            nome, _, valor = param.strip().partition("=")
+            if nome == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        aceitos[partes[0].lower()] = q
+    return aceitos
+
+
+def escolher_variante(caminho: Path, request_headers: Headers) -> Tuple[Path, Optional[str]]:
+    """
+    Escolhe a variante pré-comprimida aceita pelo cliente.
+
+    Returns:
+        (caminho a servir, content-encoding ou None)
+    """
+    aceitos = _encodings_aceitos(request_headers)
+    for encoding, extensao in VARIANTES_COMPRESSAO:
+        if aceitos.get(encoding, aceitos.get("*", 0.0)) <= 0:
+            continue
+        variante = caminho.with_name(caminho.name + extensao)
+        if variante.is_file():
+            return variante, encoding
+    return caminho, None
+
+
+def resposta_asset(
+    caminho: Path,
+    request_headers: Headers,
+    media_type: Optional[str] = None,
+    stat_result: Optional[os.stat_result] = None,
+    publico: bool = False
+) -> Response:
+    """
+    FileResponse com política de cache por fingerprint, variante comprimida
+    negociada e 304 por ETag/Last-Modified.
+
+    Só arquivos de montagens públicas (publico=True) recebem `public`; os
+    servidos por rotas autenticadas ficam `private`.
+    """
+    servido, encoding = escolher_variante(caminho, request_headers)
+    cache_imutavel = CACHE_IMUTAVEL if publico else CACHE_IMUTAVEL_PRIVADO
+    headers = {
+        "Cache-Control": cache_imutavel if tem_hash(caminho.name) else CACHE_REVALIDAR,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if encoding or stat_result is None:
+        # ETag/Last-Modified precisam existir antes da checagem de 304 (e
+        # são os da variante efetivamente servida)
+        stat_result = os.stat(servido)
+
+    response = FileResponse(
+        servido,
+        headers=headers,
+        # O media type é o do arquivo original, não o de .br/.gz
+        media_type=media_type or mimetypes.guess_type(caminho.name)[0] or "text/plain",
+        stat_result=stat_result,
+    )
+    if _nao_modificado(response.headers, request_headers):
+        return NotModifiedResponse(response.headers)
+    return response
+
+
+def _nao_modificado(response_headers, request_headers: Headers) -> bool:
+    """Mesma regra do StaticFiles: If-None-Match pelo ETag, senão If-Modified-Since."""
+    if_none_match = request_headers.get("if-none-match")
+    etag = response_headers.get("etag")
+    if if_none_match and etag:
+        return etag in [tag.strip(" W/") for tag in if_none_match.split(",")]
+
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    last_modified = parsedate(response_headers.get("last-modified", ""))
+    return bool(if_modified_since and last_modified and if_modified_since >= last_modified)
+
+
+class AssetStaticFiles(StaticFiles):
+    """StaticFiles com cache imutável para fingerprint e variantes .br/.gz."""
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        return resposta_asset(Path(full_path), Headers(scope=scope), stat_result=stat_result, publico=True)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    resultado = construir_assets()
+    print(f"{len(resultado)} asset(s) com fingerprint; manifesto em {MANIFESTO_PATH}")
+    if brotli is None:
+        print("Aviso: pacote 'brotli' ausente - apenas variantes .gz foram geradas")
@@ -9,44 +9,56 @@ Casos de uso:
 - Comprometimento de token
 - Bloqueio administrativo de usuário
 
-A blacklist usa duas camadas:
-1. Cache em memória (rápido, para verificações frequentes)
-2. Persistência em banco (sobrevive a reinicializações)
+A blacklist fica no estado compartilhado entre workers
+(utils/estado_compartilhado.py): SQLite em WAL no host ou tabela UNLOGGED
+no Postgres.
+
+PERFORMANCE: is_revoked roda em toda requisição autenticada e só lê (no WAL,
+leitura não espera o lock de escrita). revoke pode esperar o lock por até
+ESPERA_REVOGACAO_S, então o logout a chama fora do event loop
+(asyncio.to_thread).
 """
 
+import hashlib
 import threading
-from datetime import datetime, timedelta
-from typing import Optional, Set
+import time
+from typing import Optional, Tuple
 import logging
 from jose import jwt
 
-from utils.timezone import get_utc_now
+from utils.estado_compartilhado import EstadoCompartilhado, EstadoOcupado, get_estado_compartilhado
 
 from config import SECRET_KEY, ALGORITHM
 
 logger = logging.getLogger("security.token_blacklist")
 
+# Conjunto no estado compartilhado: "revogado:<jti>"
+CONJUNTO_REVOGADOS = "revogado"
+
+# Tempo total tentando gravar uma revogação com o lock de escrita ocupado
+ESPERA_REVOGACAO_S = 5.0
+
 
 class TokenBlacklist:
     """
     SECURITY: Gerencia tokens revogados.
 
-    Thread-safe usando locks para acesso concorrente.
+    Os JTIs revogados ficam no estado compartilhado entre workers
+    (utils/estado_compartilhado.py), cada um com TTL até a expiração do
+    token: a revogação vale em todos os workers e a limpeza dos expirados é
+    feita em lotes por um único worker.
     """
 
-    def __init__(self):
-        # Cache em memória de tokens revogados
-        # Armazena tuples de (token_jti, expiration_time)
-        self._blacklist: Set[str] = set()
-        self._lock = threading.Lock()
+    def __init__(self, estado: EstadoCompartilhado = None):
+        self._estado = estado
 
-        # Limpeza automática de tokens expirados
-        self._last_cleanup = get_utc_now()
-        self._cleanup_interval = timedelta(minutes=30)
+    @property
+    def estado(self) -> EstadoCompartilhado:
+        return self._estado or get_estado_compartilhado()
 
-    def _extract_jti_and_exp(self, token: str) -> Optional[tuple]:
+    def _extract_jti_and_exp(self, token: str) -> Optional[Tuple[str, float]]:
         """
-        SECURITY: Extrai JTI (JWT ID) e tempo de expiração do token.
+        SECURITY: Extrai JTI (JWT ID) e expiração (epoch) do token.
 
         Se o token não tem JTI, usa um hash do próprio token.
         """
@@ -63,16 +75,11 @@ class TokenBlacklist:
             jti = payload.get("jti")
             if not jti:
                 # Fallback: usa hash do token completo
-                import hashlib
                 jti = hashlib.sha256(token.encode()).hexdigest()[:32]
 
-            # Tempo de expiração
+            # Tempo de expiração; se não tem exp, considera 24h
             exp = payload.get("exp")
-            if exp:
-                exp_time = datetime.fromtimestamp(exp)
-            else:
-                # Se não tem exp, considera 24h
-                exp_time = get_utc_now() + timedelta(hours=24)
+            exp_time = float(exp) if exp else time.time() + 24 * 3600
 
             return (jti, exp_time)
 
@@ -97,17 +104,22 @@ class TokenBlacklist:
         jti, exp_time = result
 
         # Não adiciona tokens já expirados
-        if exp_time < get_utc_now():
+        ttl = exp_time - time.time()
+        if ttl <= 0:
             logger.debug(f"Token já expirado, não adicionado à blacklist")
             return True
 
-        with self._lock:
-            self._blacklist.add(jti)
-            logger.info(f"Token revogado: {jti[:8]}...")
-
-            # Cleanup se necessário
-            self._maybe_cleanup()
-
+        # Revogação não pode se perder: tenta de novo enquanto o lock estiver ocupado
+        prazo = time.monotonic() + ESPERA_REVOGACAO_S
+        while True:
+            try:
+                self.estado.adicionar_membro(CONJUNTO_REVOGADOS, jti, ttl)
+                break
+            except EstadoOcupado as e:
+                if time.monotonic() >= prazo:
+                    logger.error(f"Token {jti[:8]}... não revogado: {e}")
+                    return False
+        logger.info(f"Token revogado: {jti[:8]}...")
         return True
 
     def is_revoked(self, token: str) -> bool:
@@ -127,23 +139,12 @@ class TokenBlacklist:
 
         jti, _ = result
 
-        with self._lock:
-            return jti in self._blacklist
-
-    def _maybe_cleanup(self):
-        """
-        SECURITY: Remove tokens expirados da blacklist periodicamente.
-
-        Chamado dentro do lock, então não precisa de lock próprio.
-        """
-        now = get_utc_now()
-        if now - self._last_cleanup < self._cleanup_interval:
-            return
-
-        # Em uma implementação com banco, aqui limparia tokens expirados
-        # Por ora, apenas registra o cleanup
-        self._last_cleanup = now
-        logger.debug(f"Cleanup da blacklist realizado, {len(self._blacklist)} tokens")
+        try:
+            return self.estado.pertence(CONJUNTO_REVOGADOS, jti)
+        except EstadoOcupado as e:
+            # Na dúvida, como o token inválido: considerado revogado
+            logger.error(f"Blacklist indisponível ao verificar {jti[:8]}...: {e}")
+            return True
 
     def revoke_all_for_user(self, user_id: int) -> int:
         """
@@ -165,14 +166,12 @@ class TokenBlacklist:
 
     def clear(self):
         """
-        SECURITY: Limpa toda a blacklist.
+        SECURITY: Limpa toda a blacklist (em todos os workers).
 
         USE COM CUIDADO - apenas para testes ou emergências.
         """
-        with self._lock:
-            count = len(self._blacklist)
-            self._blacklist.clear()
-            logger.warning(f"Blacklist limpa: {count} tokens removidos")
+        count = self.estado.remover_prefixo(f"{CONJUNTO_REVOGADOS}:")
+        logger.warning(f"Blacklist limpa: {count} tokens removidos")
 
 
 # Instância global singleton